@@ -56,6 +56,14 @@ config = cfg.get_configuration()
 config["daemon_name"] = "pvcapid"
 config["daemon_version"] = version
 
+# Bulk data transfers and event streams each occupy a worker thread for their whole duration;
+# leave room for at least one stream, and always leave a thread free for other requests (the
+# streams are limited to the threads remaining, in pvcapid.streams)
+config["api_worker_threads"] = max(config["api_worker_threads"], 3)
+config["api_max_transfers"] = max(
+    min(config["api_max_transfers"], config["api_worker_threads"] - 2), 1
+)
+
 
 ##########################################################
 # Flask App Creation for Gunicorn
@@ -90,6 +98,13 @@ def create_app():
     )
     print("| SSL: {0: <55} |".format(str(config["api_ssl_enabled"])))
     print("| Authentication: {0: <44} |".format(str(config["api_auth_enabled"])))
+    print(
+        "| Workers: {0: <51} |".format(
+            "{} x {} threads".format(
+                config["api_worker_count"], config["api_worker_threads"]
+            )
+        )
+    )
     print("|--------------------------------------------------------------|")
     print("")
 
@@ -128,9 +143,9 @@ def entrypoint():
         gunicorn_cmd = [
             "gunicorn",
             "--workers",
-            "1",
+            str(config["api_worker_count"]),
             "--threads",
-            "8",
+            str(config["api_worker_threads"]),
             "--timeout",
             "86400",
             "--bind",
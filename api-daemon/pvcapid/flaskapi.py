@@ -20,6 +20,7 @@
 ###############################################################################
 
 import flask
+import threading
 
 from functools import wraps
 from flask_restful import Resource, Api, reqparse, abort
@@ -31,13 +32,15 @@ from uuid import uuid4
 from daemon_lib.common import getPrimaryNode
 from daemon_lib.zkhandler import ZKConnection
 from daemon_lib.node import get_list as get_node_list
-from daemon_lib.benchmark import list_benchmarks
+from daemon_lib.benchmark import list_benchmarks, get_benchmark_spec
 
 from pvcapid.Daemon import config, strtobool, API_VERSION
 
 import pvcapid.helper as api_helper
 import pvcapid.provisioner as api_provisioner
 import pvcapid.ova as api_ova
+import pvcapid.streams as api_streams
+import pvcapid.metrics as api_metrics
 
 from flask_sqlalchemy import SQLAlchemy
 
@@ -111,6 +114,34 @@ def run_celery_task(task_name, **kwargs):
     return task
 
 
+def get_task_status(task_id):
+    task = celery.AsyncResult(task_id)
+    if task.state == "PENDING":
+        response = {
+            "state": task.state,
+            "current": 0,
+            "total": 1,
+            "status": "Pending job start",
+        }
+    elif task.state == "FAILURE":
+        response = {
+            "state": task.state,
+            "current": 1,
+            "total": 1,
+            "status": str(task.info),
+        }
+    else:
+        response = {
+            "state": task.state,
+            "current": task.info.get("current", 0),
+            "total": task.info.get("total", 1),
+            "status": task.info.get("status", ""),
+        }
+        if "result" in task.info:
+            response["result"] = task.info["result"]
+    return response
+
+
 # Create celery definition
 celery_task_uri = "redis://{}:{}{}".format(
     config["keydb_host"], config["keydb_port"], config["keydb_path"]
@@ -199,6 +230,53 @@ def Authenticator(function):
     return authenticate
 
 
+# Bulk data transfers (snapshot receives, volume and OVA uploads) in progress in this worker
+transfer_slots = threading.BoundedSemaphore(config["api_max_transfers"])
+
+
+# Transfer admission decorator function
+def TransferLimiter(function):
+    """
+    Refuse a bulk data transfer with a 503 if this worker already runs api_max_transfers of
+    them, so that transfers cannot occupy every worker thread and stall other requests; this
+    must wrap the RequestParser so that the request body is not read before the transfer is
+    admitted.
+    """
+
+    @wraps(function)
+    def limit_transfers(*args, **kwargs):
+        if not transfer_slots.acquire(blocking=False):
+            return (
+                {"message": "Too many active transfers; retry later."},
+                503,
+                {"Retry-After": str(config["api_retry_after"])},
+            )
+        try:
+            return function(*args, **kwargs)
+        finally:
+            transfer_slots.release()
+
+    return limit_transfers
+
+
+# Integer argument parsing function
+def get_integer_arg(reqargs, name, default, minimum=None):
+    """
+    Return the integer value of the argument name from reqargs, or default if it is unset; raises
+    ValueError with a message for the client if it is not an integer of at least minimum.
+    """
+    value = reqargs.get(name, None)
+    if value is None or value == "":
+        return default
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"A {name} value must be an integer")
+    if minimum is not None and value < minimum:
+        raise ValueError(f"A {name} value must be at least {minimum}")
+    return value
+
+
 ##########################################################
 # API Root/Authentication
 ##########################################################
@@ -718,6 +796,32 @@ class API_Status_Primary(Resource):
 api.add_resource(API_Status_Primary, "/status/primary_node")
 
 
+# /events
+class API_Events(Resource):
+    @Authenticator
+    def get(self):
+        """
+        Stream cluster events as Server-Sent Events
+        ---
+        tags:
+          - root
+        produces:
+          - text/event-stream
+        responses:
+          200:
+            description: OK; a "children" event with "type" (node, vm, network or fault) and "added" and "removed" lists is sent each time objects are added or removed, and a "value" event with "type" (primary_node or maintenance) and "value" each time those change; the first events describe the current state
+          503:
+            description: Too many active streams
+            schema:
+              type: object
+              id: Message
+        """
+        return api_streams.cluster_event_stream()
+
+
+api.add_resource(API_Events, "/events")
+
+
 # /metrics
 class API_Metrics(Resource):
     def get(self):
@@ -725,6 +829,12 @@ class API_Metrics(Resource):
         Return the current PVC cluster status in Prometheus-compatible metrics format and
         the Ceph cluster metrics as one document.
 
+        All sources are fetched in parallel, each with its own timeout, and results are cached
+        briefly; a source which is slow or unavailable is omitted, or served from a recent cached
+        result, rather than failing the whole scrape. The state of each source is reported in the
+        pvc_metrics_source_up, pvc_metrics_source_age_seconds and pvc_metrics_source_fetch_seconds
+        metrics.
+
         Endpoint is UNAUTHENTICATED to allow metrics exfiltration without having to deal
         with Prometheus compatibility (only basic auth support). Ensure this API endpoint
         is only opened to trusted networks that cannot abuse the data provided!
@@ -737,17 +847,9 @@ class API_Metrics(Resource):
           400:
             description: Bad request
         """
-        health_output, health_retcode = api_helper.cluster_health_metrics()
-        resource_output, resource_retcode = api_helper.cluster_resource_metrics()
-        ceph_output, ceph_retcode = api_helper.ceph_metrics()
-        zookeeper_output, zookeeper_retcode = api_helper.zookeeper_metrics()
-
-        if health_retcode != 200 or resource_retcode != 200 or ceph_retcode != 200:
-            output = "Error: Failed to obtain data"
-            retcode = 400
-        else:
-            output = health_output + resource_output + ceph_output + zookeeper_output
-            retcode = 200
+        output, retcode = api_metrics.get_metrics(
+            ["health", "resource", "ceph", "zookeeper"], combined=True
+        )
 
         response = flask.make_response(output, retcode)
         response.mimetype = "text/plain"
@@ -776,14 +878,7 @@ class API_Metrics_Health(Resource):
           400:
             description: Bad request
         """
-        health_output, health_retcode = api_helper.cluster_health_metrics()
-
-        if health_retcode != 200:
-            output = "Error: Failed to obtain data"
-            retcode = 400
-        else:
-            output = health_output
-            retcode = 200
+        output, retcode = api_metrics.get_metrics(["health"])
 
         response = flask.make_response(output, retcode)
         response.mimetype = "text/plain"
@@ -812,14 +907,7 @@ class API_Metrics_Resource(Resource):
           400:
             description: Bad request
         """
-        resource_output, resource_retcode = api_helper.cluster_resource_metrics()
-
-        if resource_retcode != 200:
-            output = "Error: Failed to obtain data"
-            retcode = 400
-        else:
-            output = resource_output
-            retcode = 200
+        output, retcode = api_metrics.get_metrics(["resource"])
 
         response = flask.make_response(output, retcode)
         response.mimetype = "text/plain"
@@ -851,14 +939,7 @@ class API_Metrics_Ceph(Resource):
           400:
             description: Bad request
         """
-        ceph_output, ceph_retcode = api_helper.ceph_metrics()
-
-        if ceph_retcode != 200:
-            output = "Error: Failed to obtain data"
-            retcode = 400
-        else:
-            output = ceph_output
-            retcode = 200
+        output, retcode = api_metrics.get_metrics(["ceph"])
 
         response = flask.make_response(output, retcode)
         response.mimetype = "text/plain"
@@ -890,14 +971,7 @@ class API_Metrics_Zookeeper(Resource):
           400:
             description: Bad request
         """
-        zookeeper_output, zookeeper_retcode = api_helper.zookeeper_metrics()
-
-        if zookeeper_retcode != 200:
-            output = "Error: Failed to obtain data"
-            retcode = 400
-        else:
-            output = zookeeper_output
-            retcode = 200
+        output, retcode = api_metrics.get_metrics(["zookeeper"])
 
         response = flask.make_response(output, retcode)
         response.mimetype = "text/plain"
@@ -925,6 +999,8 @@ class API_Faults(Resource):
                 "helptext": "A valid sort key must be specified",
                 "required": False,
             },
+            {"name": "page_size"},
+            {"name": "cursor"},
         ]
     )
     @Authenticator
@@ -980,15 +1056,38 @@ class API_Faults(Resource):
               - status
               - health_delta
               - message
+          - in: query
+            name: page_size
+            type: integer
+            required: false
+            description: Return one page of at most this many faults (1-1000), with the cursor of the next page in the X-PVC-Next-Cursor header if one follows; the whole list is returned if unset
+          - in: query
+            name: cursor
+            type: string
+            required: false
+            description: Return the faults following this cursor, from the X-PVC-Next-Cursor header of the previous page
         responses:
           200:
             description: OK
+            headers:
+              X-PVC-Next-Cursor:
+                type: string
+                description: The cursor of the next page, if page_size is set and another page follows this one
             schema:
               type: array
               items:
                 $ref: '#/definitions/fault'
+          400:
+            description: Bad request
+            schema:
+              type: object
+              id: Message
         """
-        return api_helper.fault_list(sort_key=reqargs.get("sort_key", "last_reported"))
+        return api_helper.fault_list(
+            sort_key=reqargs.get("sort_key", "last_reported"),
+            cursor=reqargs.get("cursor", None),
+            page_size=reqargs.get("page_size", None),
+        )
 
     @Authenticator
     def put(self):
@@ -1187,36 +1286,44 @@ class API_Tasks_Element(Resource):
               type: object
               id: Message
         """
-        task = celery.AsyncResult(task_id)
-        if task.state == "PENDING":
-            response = {
-                "state": task.state,
-                "current": 0,
-                "total": 1,
-                "status": "Pending job start",
-            }
-        elif task.state == "FAILURE":
-            response = {
-                "state": task.state,
-                "current": 1,
-                "total": 1,
-                "status": str(task.info),
-            }
-        else:
-            response = {
-                "state": task.state,
-                "current": task.info.get("current", 0),
-                "total": task.info.get("total", 1),
-                "status": task.info.get("status", ""),
-            }
-            if "result" in task.info:
-                response["result"] = task.info["result"]
-        return response
+        return get_task_status(task_id)
 
 
 api.add_resource(API_Tasks_Element, "/tasks/<task_id>")
 
 
+# /tasks/<task_id>/stream
+class API_Tasks_Element_Stream(Resource):
+    @Authenticator
+    def get(self, task_id):
+        """
+        Stream the status of a Celery worker task {task_id} as Server-Sent Events
+        ---
+        tags:
+          - provisioner
+        produces:
+          - text/event-stream
+        parameters:
+          - in: path
+            name: task_id
+            type: string
+            required: true
+            description: Path parameter
+        responses:
+          200:
+            description: OK; a "status" event with the same data as GET /tasks/{task_id} is sent each time the status changes, then an "end" event once the task completes
+          503:
+            description: Too many active streams; poll GET /tasks/{task_id} instead
+            schema:
+              type: object
+              id: Message
+        """
+        return api_streams.task_stream(celery, task_id, get_task_status)
+
+
+api.add_resource(API_Tasks_Element_Stream, "/tasks/<task_id>/stream")
+
+
 ##########################################################
 # Client API - Node
 ##########################################################
@@ -1688,6 +1795,54 @@ class API_Node_Log(Resource):
 api.add_resource(API_Node_Log, "/node/<node>/log")
 
 
+# /node/<node>/log/stream
+class API_Node_Log_Stream(Resource):
+    @RequestParser([{"name": "lines"}])
+    @Authenticator
+    def get(self, node, reqargs):
+        """
+        Stream the logs of {node} as Server-Sent Events
+        ---
+        tags:
+          - node
+        produces:
+          - text/event-stream
+        parameters:
+          - in: path
+            name: node
+            type: string
+            required: true
+            description: Path parameter
+          - in: query
+            name: lines
+            type: integer
+            required: false
+            description: The number of recent lines to send before following (at most 10000)
+        responses:
+          200:
+            description: OK; a "log" event with a "lines" list is sent for each batch of new log lines
+          400:
+            description: Bad request
+            schema:
+              type: object
+              id: Message
+          404:
+            description: Node not found
+            schema:
+              type: object
+              id: Message
+          503:
+            description: Too many active streams; poll GET /node/{node}/log instead
+            schema:
+              type: object
+              id: Message
+        """
+        return api_streams.node_log_stream(node, reqargs.get("lines", None))
+
+
+api.add_resource(API_Node_Log_Stream, "/node/<node>/log/stream")
+
+
 ##########################################################
 # Client API - VM
 ##########################################################
@@ -1702,6 +1857,8 @@ class API_VM_Root(Resource):
             {"name": "state"},
             {"name": "tag"},
             {"name": "negate"},
+            {"name": "page_size"},
+            {"name": "cursor"},
         ]
     )
     @Authenticator
@@ -1754,6 +1911,43 @@ class API_VM_Root(Resource):
                 migration_max_downtime:
                   type: integer
                   description: The maximum time in milliseconds that a VM can be down for during a live migration; busy VMs may require a larger max_downtime
+                migration_profile:
+                  type: string
+                  description: The live migration profile of the VM, or null for the cluster default profile
+                migration_progress:
+                  type: object
+                  description: The progress of the running live migration of the VM, or null if none is running
+                  properties:
+                    profile:
+                      type: string
+                      description: The live migration profile in use
+                    phase:
+                      type: string
+                      description: The migration phase (precopy, postcopy)
+                    elapsed:
+                      type: integer
+                      description: The time elapsed in milliseconds
+                    iteration:
+                      type: integer
+                      description: The number of memory copy passes so far
+                    memory_total:
+                      type: integer
+                      description: The total memory of the VM in bytes
+                    memory_remaining:
+                      type: integer
+                      description: The memory in bytes remaining to be copied
+                    memory_rate:
+                      type: integer
+                      description: The memory transfer rate in bytes per second
+                    dirty_rate:
+                      type: integer
+                      description: The rate in bytes per second at which the VM is dirtying memory
+                    eta:
+                      type: integer
+                      description: The estimated seconds remaining, or null if the migration is not converging
+                    updated:
+                      type: integer
+                      description: The Unix time of this progress report
                 tags:
                   type: array
                   description: The tag(s) of the VM
@@ -1999,13 +2193,37 @@ class API_VM_Root(Resource):
             type: boolean
             required: false
             description: Negate the specified node, state, or tag limit(s)
+          - in: query
+            name: page_size
+            type: integer
+            required: false
+            description: Return one page of at most this many VMs (1-1000), with the cursor of the next page in the X-PVC-Next-Cursor header if one follows; the whole list is returned if unset
+          - in: query
+            name: cursor
+            type: string
+            required: false
+            description: Return the VMs following this cursor, from the X-PVC-Next-Cursor header of the previous page
         responses:
           200:
             description: OK
+            headers:
+              X-PVC-Next-Cursor:
+                type: string
+                description: The cursor of the next page, if page_size is set and another page follows this one
             schema:
               type: array
               items:
                 $ref: '#/definitions/vm'
+          400:
+            description: Bad request
+            schema:
+              type: object
+              id: Message
+          404:
+            description: Not found
+            schema:
+              type: object
+              id: Message
         """
         return api_helper.vm_list(
             node=reqargs.get("node", None),
@@ -2013,6 +2231,8 @@ class API_VM_Root(Resource):
             tag=reqargs.get("tag", None),
             limit=reqargs.get("limit", None),
             negate=bool(strtobool(reqargs.get("negate", "False"))),
+            cursor=reqargs.get("cursor", None),
+            page_size=reqargs.get("page_size", None),
         )
 
     @RequestParser(
@@ -2455,6 +2675,9 @@ class API_VM_Metadata(Resource):
                 migration_max_downtime:
                   type: integer
                   description: The maximum time in milliseconds that a VM can be down for during a live migration; busy VMs may require a larger max_downtime
+                migration_profile:
+                  type: string
+                  description: The live migration profile of the VM, or null for the cluster default profile
           404:
             description: VM not found
             schema:
@@ -2482,6 +2705,7 @@ class API_VM_Metadata(Resource):
                 "name": "migration_max_downtime",
                 "helptext": "A valid migration_max_downtime must be specified",
             },
+            {"name": "migration_profile"},
         ]
     )
     @Authenticator
@@ -2538,6 +2762,11 @@ class API_VM_Metadata(Resource):
             type: integer
             required: false
             description: The maximum time in milliseconds that a VM can be down for during a live migration; busy VMs may require a larger max_downtime
+          - in: query
+            name: migration_profile
+            type: string
+            required: false
+            description: The live migration profile (from the "migration" configuration) to use; an empty value uses the cluster default profile
         responses:
           200:
             description: OK
@@ -2563,6 +2792,7 @@ class API_VM_Metadata(Resource):
             reqargs.get("profile", None),
             reqargs.get("migration_method", None),
             reqargs.get("migration_max_downtime", None),
+            reqargs.get("migration_profile", None),
         )
 
 
@@ -3018,6 +3248,54 @@ class API_VM_Console(Resource):
 api.add_resource(API_VM_Console, "/vm/<vm>/console")
 
 
+# /vm/<vm>/console/stream
+class API_VM_Console_Stream(Resource):
+    @RequestParser([{"name": "lines"}])
+    @Authenticator
+    def get(self, vm, reqargs):
+        """
+        Stream the console log of {vm} as Server-Sent Events
+        ---
+        tags:
+          - vm
+        produces:
+          - text/event-stream
+        parameters:
+          - in: path
+            name: vm
+            type: string
+            required: true
+            description: Path parameter
+          - in: query
+            name: lines
+            type: integer
+            required: false
+            description: The number of recent lines to send before following (at most 10000)
+        responses:
+          200:
+            description: OK; a "log" event with a "lines" list is sent for each batch of new console lines, and an "end" event if the VM is removed
+          400:
+            description: Bad request
+            schema:
+              type: object
+              id: Message
+          404:
+            description: Not found
+            schema:
+              type: object
+              id: Message
+          503:
+            description: Too many active streams; poll GET /vm/{vm}/console instead
+            schema:
+              type: object
+              id: Message
+        """
+        return api_streams.vm_console_stream(vm, reqargs.get("lines", None))
+
+
+api.add_resource(API_VM_Console_Stream, "/vm/<vm>/console/stream")
+
+
 # /vm/<vm>/rename
 class API_VM_Rename(Resource):
     @RequestParser([{"name": "new_name"}])
@@ -3335,6 +3613,14 @@ class API_VM_Restore(Resource):
                 "name": "retain_snapshot",
                 "required": False,
             },
+            {
+                "name": "volume_concurrency",
+                "required": False,
+            },
+            {
+                "name": "bandwidth_limit",
+                "required": False,
+            },
         ]
     )
     @Authenticator
@@ -3366,6 +3652,17 @@ class API_VM_Restore(Resource):
             required: false
             default: true
             description: Whether or not to retain the (parent, if incremental) volume snapshot after restore
+          - in: query
+            name: volume_concurrency
+            type: integer
+            required: false
+            default: 2
+            description: The number of volumes to restore at once
+          - in: query
+            name: bandwidth_limit
+            type: integer
+            required: false
+            description: The maximum combined restore throughput of all volumes, in MB/s; unlimited if unset or 0
         responses:
           200:
             description: OK
@@ -3386,8 +3683,20 @@ class API_VM_Restore(Resource):
         backup_path = reqargs.get("backup_path", None)
         backup_datestring = reqargs.get("backup_datestring", None)
         retain_snapshot = bool(strtobool(reqargs.get("retain_snapshot", "true")))
+        try:
+            volume_concurrency = get_integer_arg(
+                reqargs, "volume_concurrency", 2, minimum=1
+            )
+            bandwidth_limit = get_integer_arg(reqargs, "bandwidth_limit", 0, minimum=0)
+        except ValueError as e:
+            return {"message": str(e)}, 400
         return api_helper.vm_restore(
-            vm, backup_path, backup_datestring, retain_snapshot
+            vm,
+            backup_path,
+            backup_datestring,
+            retain_snapshot,
+            volume_concurrency=volume_concurrency,
+            bandwidth_limit=bandwidth_limit,
         )
 
 
@@ -3403,6 +3712,10 @@ class API_VM_Snapshot(Resource):
                 "required": False,
                 "helptext": "",
             },
+            {
+                "name": "fsfreeze",
+                "required": False,
+            },
         ]
     )
     @Authenticator
@@ -3423,6 +3736,12 @@ class API_VM_Snapshot(Resource):
             type: string
             required: false
             description: A custom name for the snapshot instead of autogeneration by date
+          - in: query
+            name: fsfreeze
+            type: boolean
+            required: false
+            default: false
+            description: Freeze the filesystems of a running VM through the QEMU guest agent while its volumes are snapshotted, for a filesystem-consistent snapshot
         responses:
           202:
             description: Accepted
@@ -3442,11 +3761,13 @@ class API_VM_Snapshot(Resource):
               id: Message
         """
         snapshot_name = reqargs.get("snapshot_name", None)
+        fsfreeze = bool(strtobool(reqargs.get("fsfreeze", "false")))
 
         task = run_celery_task(
             "vm.create_snapshot",
             domain=vm,
             snapshot_name=snapshot_name,
+            fsfreeze=fsfreeze,
             run_on="primary",
         )
 
@@ -3617,6 +3938,12 @@ class API_VM_Snapshot_Export(Resource):
                 "required": False,
                 "helptext": "A snapshot name to generate an incremental diff from",
             },
+            {
+                "name": "export_format",
+                "choices": ("rbd", "chunked"),
+                "helptext": "A valid export format must be specified",
+                "required": False,
+            },
         ]
     )
     @Authenticator
@@ -3647,6 +3974,15 @@ class API_VM_Snapshot_Export(Resource):
             type: string
             required: false
             description: A snapshot name to generate an incremental diff from
+          - in: query
+            name: export_format
+            type: string
+            required: false
+            default: rbd
+            enum:
+              - rbd
+              - chunked
+            description: The export format; "rbd" writes raw RBD export images, "chunked" stores deduplicated, compressed chunks shared by all exports under export_path with a manifest per volume
         responses:
           202:
             description: Accepted
@@ -3668,6 +4004,7 @@ class API_VM_Snapshot_Export(Resource):
         snapshot_name = reqargs.get("snapshot_name", None)
         export_path = reqargs.get("export_path", None)
         incremental_parent = reqargs.get("incremental_parent", None)
+        export_format = reqargs.get("export_format", None) or "rbd"
 
         task = run_celery_task(
             "vm.export_snapshot",
@@ -3675,6 +4012,7 @@ class API_VM_Snapshot_Export(Resource):
             snapshot_name=snapshot_name,
             export_path=export_path,
             incremental_parent=incremental_parent,
+            export_format=export_format,
             run_on="primary",
         )
 
@@ -3711,6 +4049,14 @@ class API_VM_Snapshot_Import(Resource):
                 "required": False,
                 "helptext": "Whether to retain the snapshot of the import or not (default: true)",
             },
+            {
+                "name": "volume_concurrency",
+                "required": False,
+            },
+            {
+                "name": "bandwidth_limit",
+                "required": False,
+            },
         ]
     )
     @Authenticator
@@ -3742,6 +4088,17 @@ class API_VM_Snapshot_Import(Resource):
             required: false
             default: true
             description: Whether or not to retain the (parent, if incremental) volume snapshot after restore
+          - in: query
+            name: volume_concurrency
+            type: integer
+            required: false
+            default: 2
+            description: The number of volumes to import at once
+          - in: query
+            name: bandwidth_limit
+            type: integer
+            required: false
+            description: The maximum combined import throughput of all volumes, in MB/s; unlimited if unset or 0
         responses:
           202:
             description: Accepted
@@ -3763,6 +4120,13 @@ class API_VM_Snapshot_Import(Resource):
         snapshot_name = reqargs.get("snapshot_name", None)
         import_path = reqargs.get("import_path", None)
         retain_snapshot = bool(strtobool(reqargs.get("retain_snapshot", "True")))
+        try:
+            volume_concurrency = get_integer_arg(
+                reqargs, "volume_concurrency", 2, minimum=1
+            )
+            bandwidth_limit = get_integer_arg(reqargs, "bandwidth_limit", 0, minimum=0)
+        except ValueError as e:
+            return {"message": str(e)}, 400
 
         task = run_celery_task(
             "vm.import_snapshot",
@@ -3770,6 +4134,8 @@ class API_VM_Snapshot_Import(Resource):
             snapshot_name=snapshot_name,
             import_path=import_path,
             retain_snapshot=retain_snapshot,
+            volume_concurrency=volume_concurrency,
+            bandwidth_limit=bandwidth_limit,
             run_on="primary",
         )
 
@@ -3818,6 +4184,20 @@ class API_VM_Snapshot_Send(Resource):
                 "name": "destination_storage_pool",
                 "required": False,
             },
+            {
+                "name": "compression",
+                "choices": ("zstd", "lz4", "none"),
+                "helptext": "A valid compression type must be specified",
+                "required": False,
+            },
+            {
+                "name": "volume_concurrency",
+                "required": False,
+            },
+            {
+                "name": "stream_concurrency",
+                "required": False,
+            },
         ]
     )
     @Authenticator
@@ -3865,6 +4245,28 @@ class API_VM_Snapshot_Send(Resource):
             required: false
             default: source storage pool name
             description: The remote cluster storage pool to create RBD volumes in, if different from the source storage pool
+          - in: query
+            name: compression
+            type: string
+            required: false
+            default: zstd
+            description: The wire compression type to use for volume data; falls back to a type supported by both clusters
+            enum:
+              - zstd
+              - lz4
+              - none
+          - in: query
+            name: volume_concurrency
+            type: integer
+            required: false
+            default: 2
+            description: The number of volumes to send at once
+          - in: query
+            name: stream_concurrency
+            type: integer
+            required: false
+            default: 4
+            description: The number of concurrent connections to send each volume over
         responses:
           202:
             description: Accepted
@@ -3891,6 +4293,16 @@ class API_VM_Snapshot_Send(Resource):
         )
         incremental_parent = reqargs.get("incremental_parent", None)
         destination_storage_pool = reqargs.get("destination_storage_pool", None)
+        compression = reqargs.get("compression", None) or "zstd"
+        try:
+            volume_concurrency = get_integer_arg(
+                reqargs, "volume_concurrency", 2, minimum=1
+            )
+            stream_concurrency = get_integer_arg(
+                reqargs, "stream_concurrency", 4, minimum=1
+            )
+        except ValueError as e:
+            return {"message": str(e)}, 400
 
         task = run_celery_task(
             "vm.send_snapshot",
@@ -3901,6 +4313,9 @@ class API_VM_Snapshot_Send(Resource):
             destination_api_verify_ssl=destination_api_verify_ssl,
             incremental_parent=incremental_parent,
             destination_storage_pool=destination_storage_pool,
+            compression=compression,
+            volume_concurrency=volume_concurrency,
+            stream_concurrency=stream_concurrency,
             run_on="primary",
         )
 
@@ -3920,6 +4335,7 @@ api.add_resource(API_VM_Snapshot_Send, "/vm/<vm>/snapshot/send")
 
 # /vm/<vm>/snapshot/receive/block
 class API_VM_Snapshot_Receive_Block(Resource):
+    @TransferLimiter
     @RequestParser(
         [
             {
@@ -3991,6 +4407,11 @@ class API_VM_Snapshot_Receive_Block(Resource):
             schema:
               type: object
               id: Message
+          503:
+            description: Too many active transfers; retry after the Retry-After header
+            schema:
+              type: object
+              id: Message
         """
         return api_helper.vm_snapshot_receive_block_full(
             reqargs.get("pool"),
@@ -4000,6 +4421,7 @@ class API_VM_Snapshot_Receive_Block(Resource):
             flask.request,
         )
 
+    @TransferLimiter
     @RequestParser(
         [
             {
@@ -4071,6 +4493,11 @@ class API_VM_Snapshot_Receive_Block(Resource):
             schema:
               type: object
               id: Message
+          503:
+            description: Too many active transfers; retry after the Retry-After header
+            schema:
+              type: object
+              id: Message
         """
         return api_helper.vm_snapshot_receive_block_diff(
             reqargs.get("pool"),
@@ -4153,6 +4580,269 @@ class API_VM_Snapshot_Receive_Block(Resource):
 api.add_resource(API_VM_Snapshot_Receive_Block, "/vm/<vm>/snapshot/receive/block")
 
 
+# /vm/<vm>/snapshot/receive/extents
+class API_VM_Snapshot_Receive_Extents(Resource):
+    @RequestParser(
+        [
+            {
+                "name": "pool",
+                "required": False,
+            },
+            {
+                "name": "volume",
+                "required": False,
+            },
+            {
+                "name": "snapshot",
+                "required": False,
+            },
+            {
+                "name": "stream",
+                "required": False,
+            },
+        ]
+    )
+    @Authenticator
+    def get(self, vm, reqargs):
+        """
+        Return the extent stream capabilities of this cluster, or the resume offset of a stream if pool, volume, snapshot and stream are specified
+
+        NOTICE: This is an API-internal endpoint used by /vm/<vm>/snapshot/send; it should never be called by a client.
+        ---
+        tags:
+          - vm
+        parameters:
+          - in: path
+            name: vm
+            type: string
+            required: true
+            description: Path parameter
+          - in: query
+            name: pool
+            type: string
+            required: false
+            description: The name of the destination Ceph RBD data pool
+          - in: query
+            name: volume
+            type: string
+            required: false
+            description: The name of the destination Ceph RBD volume
+          - in: query
+            name: snapshot
+            type: string
+            required: false
+            description: The name of the destination Ceph RBD volume snapshot
+          - in: query
+            name: stream
+            type: string
+            required: false
+            description: The ID of the stream to return the resume offset of
+        responses:
+          200:
+            description: OK
+            schema:
+              type: object
+              id: SnapshotReceiveCapabilities
+              properties:
+                protocol:
+                  type: integer
+                  description: The extent stream protocol version
+                compression:
+                  type: array
+                  description: The supported wire compression types in order of preference
+                  items:
+                    type: string
+                max_transfers:
+                  type: integer
+                  description: The maximum number of concurrent streams accepted by this cluster
+                offset:
+                  type: integer
+                  description: The offset to resume the stream from, if a stream was specified
+        """
+        if reqargs.get("stream", None) is not None:
+            return api_helper.vm_snapshot_receive_extents_offset(
+                reqargs.get("pool"),
+                reqargs.get("volume"),
+                reqargs.get("snapshot"),
+                reqargs.get("stream"),
+            )
+        return api_helper.vm_snapshot_receive_extents_info()
+
+    @RequestParser(
+        [
+            {
+                "name": "pool",
+                "required": True,
+            },
+            {
+                "name": "volume",
+                "required": True,
+            },
+            {
+                "name": "snapshot",
+                "required": True,
+            },
+            {
+                "name": "size",
+                "required": True,
+            },
+        ]
+    )
+    @Authenticator
+    def put(self, vm, reqargs):
+        """
+        Prepare a single RBD volume to receive a full extent stream from another PVC cluster
+
+        The volume is created if it does not exist, or cleared if it does.
+
+        NOTICE: This is an API-internal endpoint used by /vm/<vm>/snapshot/send; it should never be called by a client.
+        ---
+        tags:
+          - vm
+        parameters:
+          - in: path
+            name: vm
+            type: string
+            required: true
+            description: Path parameter
+          - in: query
+            name: pool
+            type: string
+            required: true
+            description: The name of the destination Ceph RBD data pool
+          - in: query
+            name: volume
+            type: string
+            required: true
+            description: The name of the destination Ceph RBD volume
+          - in: query
+            name: snapshot
+            type: string
+            required: true
+            description: The name of the destination Ceph RBD volume snapshot
+          - in: query
+            name: size
+            type: integer
+            required: true
+            description: The size in bytes of the Ceph RBD volume
+        responses:
+          200:
+            description: OK
+            schema:
+              type: object
+              id: Message
+          400:
+            description: Execution error
+            schema:
+              type: object
+              id: Message
+        """
+        return api_helper.vm_snapshot_receive_extents_prepare(
+            reqargs.get("pool"),
+            reqargs.get("volume"),
+            reqargs.get("snapshot"),
+            int(reqargs.get("size")),
+        )
+
+    @TransferLimiter
+    @RequestParser(
+        [
+            {
+                "name": "pool",
+                "required": True,
+            },
+            {
+                "name": "volume",
+                "required": True,
+            },
+            {
+                "name": "snapshot",
+                "required": True,
+            },
+            {
+                "name": "compression",
+                "required": False,
+            },
+            {
+                "name": "stream",
+                "required": False,
+            },
+        ]
+    )
+    @Authenticator
+    def post(self, vm, reqargs):
+        """
+        Receive a stream of extent frames of a single RBD volume from another PVC cluster
+
+        Several streams covering different extents of the same volume may be received concurrently. Frames are written as they arrive, and the offset reached is checkpointed so that a failed stream can be resumed.
+
+        NOTICE: This is an API-internal endpoint used by /vm/<vm>/snapshot/send; it should never be called by a client.
+        ---
+        tags:
+          - vm
+        parameters:
+          - in: path
+            name: vm
+            type: string
+            required: true
+            description: Path parameter
+          - in: query
+            name: pool
+            type: string
+            required: true
+            description: The name of the destination Ceph RBD data pool
+          - in: query
+            name: volume
+            type: string
+            required: true
+            description: The name of the destination Ceph RBD volume
+          - in: query
+            name: snapshot
+            type: string
+            required: true
+            description: The name of the destination Ceph RBD volume snapshot
+          - in: query
+            name: compression
+            type: string
+            required: false
+            default: none
+            description: The compression type of the frame payloads
+          - in: query
+            name: stream
+            type: string
+            required: false
+            default: 0
+            description: The ID of this stream, used to resume it if it fails
+        responses:
+          200:
+            description: OK
+            schema:
+              type: object
+              id: Message
+          400:
+            description: Execution error
+            schema:
+              type: object
+              id: Message
+          503:
+            description: Too many active transfers; retry after the Retry-After header
+            schema:
+              type: object
+              id: Message
+        """
+        return api_helper.vm_snapshot_receive_extents(
+            reqargs.get("pool"),
+            reqargs.get("volume"),
+            reqargs.get("snapshot"),
+            reqargs.get("compression", None) or "none",
+            reqargs.get("stream", None) or "0",
+            flask.request,
+        )
+
+
+api.add_resource(API_VM_Snapshot_Receive_Extents, "/vm/<vm>/snapshot/receive/extents")
+
+
 # /vm/<vm>/snapshot/receive/config
 class API_VM_Snapshot_Receive_Config(Resource):
     @RequestParser(
@@ -4553,54 +5243,409 @@ class API_VM_Automirror_Root(Resource):
           - provisioner
         parameters:
           - in: query
-            name: email_recipients
+            name: email_recipients
+            type: string
+            required: false
+            description: A list of email addresses to send failure and report emails to, comma-separated
+          - in: query
+            name: email_errors_only
+            type: boolean
+            required: false
+            default: false
+            description: If set and true, only sends a report email to email_recipients when there is an error with at least one mirror
+        responses:
+          202:
+            description: Accepted
+            schema:
+              type: object
+              description: The Celery job information of the task
+              id: CeleryTask
+          400:
+            description: Bad request
+            schema:
+              type: object
+              id: Message
+        """
+
+        email_recipients = reqargs.get("email_recipients", None)
+        if email_recipients is not None and not isinstance(email_recipients, list):
+            email_recipients = [email_recipients]
+
+        email_errors_only = bool(strtobool(reqargs.get("email_errors_only", "False")))
+
+        task = run_celery_task(
+            "cluster.automirror",
+            email_recipients=email_recipients,
+            email_errors_only=email_errors_only,
+            run_on="primary",
+        )
+        return (
+            {
+                "task_id": task.id,
+                "task_name": "cluster.automirror",
+                "run_on": f"{get_primary_node()} (primary)",
+            },
+            202,
+            {"Location": Api.url_for(api, API_Tasks_Element, task_id=task.id)},
+        )
+
+
+api.add_resource(API_VM_Automirror_Root, "/vm/automirror")
+
+
+# /vm-bulk/state
+class API_VM_Bulk_State(Resource):
+    @RequestParser(
+        [
+            {
+                "name": "state",
+                "choices": ("start", "shutdown", "stop", "restart", "disable"),
+                "helptext": "A valid state must be specified",
+                "required": True,
+            },
+            {"name": "force"},
+            {"name": "wait"},
+            {"name": "select_vm", "action": "append"},
+            {"name": "select_tag"},
+            {"name": "select_node"},
+            {"name": "select_state"},
+            {"name": "concurrency"},
+        ]
+    )
+    @Authenticator
+    def post(self, reqargs):
+        """
+        Set the state of all selected VMs
+        ---
+        tags:
+          - vm
+        description: The VMs selected by all of the given select_* parameters are validated, then changed together in batched transactions; a VM which fails does not prevent the others from changing. At least one select_* parameter must be specified.
+        parameters:
+          - in: query
+            name: state
+            type: string
+            required: true
+            description: The new state of the VMs
+            enum:
+              - start
+              - shutdown
+              - stop
+              - restart
+              - disable
+          - in: query
+            name: force
+            type: boolean
+            description: For "disable", force stop instead of shutdown and/or force mirror state; for "start" or "stop", force mirror state.
+          - in: query
+            name: wait
+            type: boolean
+            description: Whether to block waiting for the state changes to complete
+          - in: query
+            name: select_vm
+            type: string
+            required: false
+            description: The name or UUID of a VM to select; may be specified multiple times
+          - in: query
+            name: select_tag
+            type: string
+            required: false
+            description: Select only VMs with this tag
+          - in: query
+            name: select_node
+            type: string
+            required: false
+            description: Select only VMs on this node
+          - in: query
+            name: select_state
+            type: string
+            required: false
+            description: Select only VMs in this state
+          - in: query
+            name: concurrency
+            type: integer
+            required: false
+            default: 32
+            description: The number of VMs to lock and wait on at once (1-64)
+        responses:
+          200:
+            description: OK
+            schema:
+              type: object
+              id: VMBulkResult
+              properties:
+                message:
+                  type: string
+                  description: A summary of the results
+                results:
+                  type: array
+                  description: The result for each selected VM
+                  items:
+                    type: object
+                    properties:
+                      name:
+                        type: string
+                        description: The name of the VM, or the selected name if it was not found
+                      uuid:
+                        type: string
+                        description: The UUID of the VM, or null if it was not found
+                      result:
+                        type: boolean
+                        description: Whether the action succeeded for the VM
+                      message:
+                        type: string
+                        description: The result message for the VM
+          400:
+            description: Bad request, or the action failed for at least one VM
+            schema:
+              type: object
+              id: VMBulkResult
+        """
+        return api_helper.vm_bulk_state(
+            reqargs.get("state", None),
+            reqargs.get("select_vm", None),
+            reqargs.get("select_tag", None),
+            reqargs.get("select_node", None),
+            reqargs.get("select_state", None),
+            bool(strtobool(reqargs.get("force", "false"))),
+            bool(strtobool(reqargs.get("wait", "false"))),
+            reqargs.get("concurrency", 32),
+        )
+
+
+api.add_resource(API_VM_Bulk_State, "/vm-bulk/state")
+
+
+# /vm-bulk/tags
+class API_VM_Bulk_Tags(Resource):
+    @RequestParser(
+        [
+            {
+                "name": "action",
+                "choices": ("add", "remove"),
+                "helptext": "A valid action must be specified",
+                "required": True,
+            },
+            {"name": "tag", "required": True, "helptext": "A tag must be specified"},
+            {"name": "protected"},
+            {"name": "select_vm", "action": "append"},
+            {"name": "select_tag"},
+            {"name": "select_node"},
+            {"name": "select_state"},
+            {"name": "concurrency"},
+        ]
+    )
+    @Authenticator
+    def post(self, reqargs):
+        """
+        Set a tag of all selected VMs
+        ---
+        tags:
+          - vm
+        description: The VMs selected by all of the given select_* parameters are tagged together in batched transactions; a VM which fails does not prevent the others from changing. At least one select_* parameter must be specified.
+        parameters:
+          - in: query
+            name: action
+            type: string
+            required: true
+            description: The action to perform with the tag
+            enum:
+              - add
+              - remove
+          - in: query
+            name: tag
+            type: string
+            required: true
+            description: The text value of the tag
+          - in: query
+            name: protected
+            type: boolean
+            required: false
+            default: false
+            description: Set the protected state of the tag
+          - in: query
+            name: select_vm
+            type: string
+            required: false
+            description: The name or UUID of a VM to select; may be specified multiple times
+          - in: query
+            name: select_tag
+            type: string
+            required: false
+            description: Select only VMs with this tag
+          - in: query
+            name: select_node
+            type: string
+            required: false
+            description: Select only VMs on this node
+          - in: query
+            name: select_state
+            type: string
+            required: false
+            description: Select only VMs in this state
+          - in: query
+            name: concurrency
+            type: integer
+            required: false
+            default: 32
+            description: The number of VMs to remove the tag from at once (1-64)
+        responses:
+          200:
+            description: OK
+            schema:
+              type: object
+              id: VMBulkResult
+          400:
+            description: Bad request, or the action failed for at least one VM
+            schema:
+              type: object
+              id: VMBulkResult
+        """
+        return api_helper.vm_bulk_tag(
+            reqargs.get("action"),
+            reqargs.get("tag"),
+            bool(strtobool(reqargs.get("protected", "false"))),
+            reqargs.get("select_vm", None),
+            reqargs.get("select_tag", None),
+            reqargs.get("select_node", None),
+            reqargs.get("select_state", None),
+            reqargs.get("concurrency", 32),
+        )
+
+
+api.add_resource(API_VM_Bulk_Tags, "/vm-bulk/tags")
+
+
+# /vm-bulk/meta
+class API_VM_Bulk_Metadata(Resource):
+    @RequestParser(
+        [
+            {"name": "limit"},
+            {
+                "name": "selector",
+                "choices": ("mem", "memprov", "vcpus", "load", "vms", "none"),
+                "helptext": "A valid selector must be specified",
+            },
+            {"name": "autostart"},
+            {"name": "profile"},
+            {
+                "name": "migration_method",
+                "choices": ("live", "shutdown", "none"),
+                "helptext": "A valid migration_method must be specified",
+            },
+            {
+                "name": "migration_max_downtime",
+                "helptext": "A valid migration_max_downtime must be specified",
+            },
+            {"name": "migration_profile"},
+            {"name": "select_vm", "action": "append"},
+            {"name": "select_tag"},
+            {"name": "select_node"},
+            {"name": "select_state"},
+        ]
+    )
+    @Authenticator
+    def post(self, reqargs):
+        """
+        Set the metadata of all selected VMs
+        ---
+        tags:
+          - vm
+        description: The VMs selected by all of the given select_* parameters are modified together in batched transactions; a VM which fails does not prevent the others from changing. At least one select_* parameter must be specified.
+        parameters:
+          - in: query
+            name: limit
+            type: string
+            required: false
+            description: The CSV list of node(s) the VMs are permitted to be assigned to; this limit will be used for autoselection on migration
+          - in: query
+            name: selector
+            type: string
+            required: false
+            description: The selector used to determine candidate nodes during migration; see 'target_selector' in the node daemon configuration reference
+            enum:
+              - mem
+              - memprov
+              - vcpus
+              - load
+              - vms
+              - none (cluster default)
+          - in: query
+            name: autostart
+            type: boolean
+            required: false
+            description: Whether to autostart the VMs when their node returns to ready domain state
+          - in: query
+            name: profile
+            type: string
+            required: false
+            description: The PVC provisioner profile for the VMs
+          - in: query
+            name: migration_method
             type: string
             required: false
-            description: A list of email addresses to send failure and report emails to, comma-separated
+            description: The preferred migration method (live, shutdown, none)
+            enum:
+              - live
+              - shutdown
+              - none
           - in: query
-            name: email_errors_only
-            type: boolean
+            name: migration_max_downtime
+            type: integer
             required: false
-            default: false
-            description: If set and true, only sends a report email to email_recipients when there is an error with at least one mirror
+            description: The maximum time in milliseconds that a VM can be down for during a live migration; busy VMs may require a larger max_downtime
+          - in: query
+            name: migration_profile
+            type: string
+            required: false
+            description: The live migration profile (from the "migration" configuration) to use; an empty value uses the cluster default profile
+          - in: query
+            name: select_vm
+            type: string
+            required: false
+            description: The name or UUID of a VM to select; may be specified multiple times
+          - in: query
+            name: select_tag
+            type: string
+            required: false
+            description: Select only VMs with this tag
+          - in: query
+            name: select_node
+            type: string
+            required: false
+            description: Select only VMs on this node
+          - in: query
+            name: select_state
+            type: string
+            required: false
+            description: Select only VMs in this state
         responses:
-          202:
-            description: Accepted
+          200:
+            description: OK
             schema:
               type: object
-              description: The Celery job information of the task
-              id: CeleryTask
+              id: VMBulkResult
           400:
-            description: Bad request
+            description: Bad request, or the action failed for at least one VM
             schema:
               type: object
-              id: Message
+              id: VMBulkResult
         """
-
-        email_recipients = reqargs.get("email_recipients", None)
-        if email_recipients is not None and not isinstance(email_recipients, list):
-            email_recipients = [email_recipients]
-
-        email_errors_only = bool(strtobool(reqargs.get("email_errors_only", "False")))
-
-        task = run_celery_task(
-            "cluster.automirror",
-            email_recipients=email_recipients,
-            email_errors_only=email_errors_only,
-            run_on="primary",
-        )
-        return (
-            {
-                "task_id": task.id,
-                "task_name": "cluster.automirror",
-                "run_on": f"{get_primary_node()} (primary)",
-            },
-            202,
-            {"Location": Api.url_for(api, API_Tasks_Element, task_id=task.id)},
+        return api_helper.vm_bulk_meta(
+            reqargs.get("limit", None),
+            reqargs.get("selector", None),
+            reqargs.get("autostart", None),
+            reqargs.get("profile", None),
+            reqargs.get("migration_method", None),
+            reqargs.get("migration_max_downtime", None),
+            reqargs.get("migration_profile", None),
+            reqargs.get("select_vm", None),
+            reqargs.get("select_tag", None),
+            reqargs.get("select_node", None),
+            reqargs.get("select_state", None),
         )
 
 
-api.add_resource(API_VM_Automirror_Root, "/vm/automirror")
+api.add_resource(API_VM_Bulk_Metadata, "/vm-bulk/meta")
 
 
 ##########################################################
@@ -5112,7 +6157,14 @@ api.add_resource(API_Network_Element, "/network/<vni>")
 
 # /network/<vni>/lease
 class API_Network_Lease_Root(Resource):
-    @RequestParser([{"name": "limit"}, {"name": "static"}])
+    @RequestParser(
+        [
+            {"name": "limit"},
+            {"name": "static"},
+            {"name": "page_size"},
+            {"name": "cursor"},
+        ]
+    )
     @Authenticator
     def get(self, vni, reqargs):
         """
@@ -5154,9 +6206,23 @@ class API_Network_Lease_Root(Resource):
             required: false
             default: false
             description: Whether to show only static leases
+          - in: query
+            name: page_size
+            type: integer
+            required: false
+            description: Return one page of at most this many leases (1-1000), with the cursor of the next page in the X-PVC-Next-Cursor header if one follows; the whole list is returned if unset
+          - in: query
+            name: cursor
+            type: string
+            required: false
+            description: Return the leases following this cursor, from the X-PVC-Next-Cursor header of the previous page
         responses:
           200:
             description: OK
+            headers:
+              X-PVC-Next-Cursor:
+                type: string
+                description: The cursor of the next page, if page_size is set and another page follows this one
             schema:
               type: array
               items:
@@ -5176,6 +6242,8 @@ class API_Network_Lease_Root(Resource):
             vni,
             reqargs.get("limit", None),
             bool(strtobool(reqargs.get("static", "false"))),
+            cursor=reqargs.get("cursor", None),
+            page_size=reqargs.get("page_size", None),
         )
 
     @RequestParser(
@@ -6173,12 +7241,30 @@ class API_Storage_Ceph_Benchmark(Resource):
                 "name": "name",
                 "required": False,
             },
+            {
+                "name": "profile",
+                "required": False,
+            },
+            {
+                "name": "matrix",
+                "required": False,
+            },
+            {
+                "name": "clients",
+                "required": False,
+            },
+            {
+                "name": "runtime",
+                "required": False,
+            },
         ]
     )
     @Authenticator
     def post(self, reqargs):
         """
         Execute a storage benchmark against a storage pool
+
+        Each test of the benchmark is run by one or more client nodes at once, each against its own volume; results include the merged completion latency percentiles of all clients and the latency of each OSD.
         ---
         tags:
           - storage / ceph
@@ -6193,6 +7279,27 @@ class API_Storage_Ceph_Benchmark(Resource):
             type: string
             required: false
             description: An optional override name for the job
+          - in: query
+            name: profile
+            type: string
+            required: false
+            default: default
+            description: The benchmark profile to run; one of "default", "scaling", or "latency"
+          - in: query
+            name: matrix
+            type: string
+            required: false
+            description: A JSON object of test names to fio test specifications ("rw", "bs", "iodepth", and optionally "numjobs") to run instead of the profile's tests
+          - in: query
+            name: clients
+            type: integer
+            required: false
+            description: The number of client nodes to run each test on at once, overriding the profile; 0 for all nodes
+          - in: query
+            name: runtime
+            type: integer
+            required: false
+            description: The runtime of each test in seconds, overriding the profile
         responses:
           202:
             description: Accepted
@@ -6215,10 +7322,24 @@ class API_Storage_Ceph_Benchmark(Resource):
                 "message": 'Pool "{}" is not valid.'.format(reqargs.get("pool"))
             }, 400
 
+        # Verify that the profile and any overrides are valid
+        retflag, retdata = get_benchmark_spec(
+            profile=reqargs.get("profile", None),
+            matrix=reqargs.get("matrix", None),
+            clients=reqargs.get("clients", None),
+            runtime=reqargs.get("runtime", None),
+        )
+        if not retflag:
+            return {"message": retdata}, 400
+
         task = run_celery_task(
             "storage.benchmark",
             pool=reqargs.get("pool", None),
             name=reqargs.get("name", None),
+            profile=reqargs.get("profile", None),
+            matrix=reqargs.get("matrix", None),
+            clients=reqargs.get("clients", None),
+            runtime=reqargs.get("runtime", None),
             run_on="primary",
         )
         return (
@@ -7275,7 +8396,14 @@ api.add_resource(API_Storage_Ceph_Pool_Element, "/storage/ceph/pool/<pool>")
 
 # /storage/ceph/volume
 class API_Storage_Ceph_Volume_Root(Resource):
-    @RequestParser([{"name": "limit"}, {"name": "pool"}])
+    @RequestParser(
+        [
+            {"name": "limit"},
+            {"name": "pool"},
+            {"name": "page_size"},
+            {"name": "cursor"},
+        ]
+    )
     @Authenticator
     def get(self, reqargs):
         """
@@ -7359,16 +8487,43 @@ class API_Storage_Ceph_Volume_Root(Resource):
             type: string
             required: false
             description: A pool to limit the search to
+          - in: query
+            name: page_size
+            type: integer
+            required: false
+            description: Return one page of at most this many volumes (1-1000), with the cursor of the next page in the X-PVC-Next-Cursor header if one follows; the whole list is returned if unset
+          - in: query
+            name: cursor
+            type: string
+            required: false
+            description: Return the volumes following this cursor, from the X-PVC-Next-Cursor header of the previous page
         responses:
           200:
             description: OK
+            headers:
+              X-PVC-Next-Cursor:
+                type: string
+                description: The cursor of the next page, if page_size is set and another page follows this one
             schema:
               type: array
               items:
                 $ref: '#/definitions/volume'
+          400:
+            description: Bad request
+            schema:
+              type: object
+              id: Message
+          404:
+            description: Not found
+            schema:
+              type: object
+              id: Message
         """
         return api_helper.ceph_volume_list(
-            reqargs.get("pool", None), reqargs.get("limit", None)
+            reqargs.get("pool", None),
+            reqargs.get("limit", None),
+            cursor=reqargs.get("cursor", None),
+            page_size=reqargs.get("page_size", None),
         )
 
     @RequestParser(
@@ -7768,6 +8923,7 @@ api.add_resource(
 
 # /storage/ceph/volume/<pool>/<volume>/upload
 class API_Storage_Ceph_Volume_Element_Upload(Resource):
+    @TransferLimiter
     @RequestParser(
         [
             {
@@ -7836,6 +8992,11 @@ class API_Storage_Ceph_Volume_Element_Upload(Resource):
             schema:
               type: object
               id: Message
+          503:
+            description: Too many active transfers; retry after the Retry-After header
+            schema:
+              type: object
+              id: Message
         """
         return api_helper.ceph_volume_upload(
             pool,
@@ -7844,6 +9005,137 @@ class API_Storage_Ceph_Volume_Element_Upload(Resource):
             reqargs.get("file_size", None),
         )
 
+    @Authenticator
+    def get(self, pool, volume):
+        """
+        Get the status of a chunked upload to Ceph volume {volume} in pool {pool}
+        ---
+        tags:
+          - storage / ceph
+        parameters:
+          - in: path
+            name: pool
+            type: string
+            required: true
+            description: Path parameter
+          - in: path
+            name: volume
+            type: string
+            required: true
+            description: Path parameter
+        responses:
+          200:
+            description: OK
+            schema:
+              type: object
+              id: VolumeUploadStatus
+              properties:
+                size:
+                  type: integer
+                  description: The size of the volume in bytes
+                offset:
+                  type: integer
+                  description: The offset after the last committed chunk of an in-progress upload
+                in_progress:
+                  type: boolean
+                  description: Whether an initialized chunked upload is in progress
+          404:
+            description: Not found
+            schema:
+              type: object
+              id: Message
+          400:
+            description: Bad request
+            schema:
+              type: object
+              id: Message
+        """
+        return api_helper.ceph_volume_upload_status(pool, volume)
+
+    @TransferLimiter
+    @RequestParser(
+        [
+            {
+                "name": "initialize",
+                "required": False,
+                "location": ["args"],
+            },
+        ]
+    )
+    @Authenticator
+    def put(self, pool, volume, reqargs):
+        """
+        Upload one chunk of a raw disk image to Ceph volume {volume} in pool {pool}
+
+        The body must be the binary contents of the chunk, and the Content-Range header ("bytes {start}-{end}/{total}") must specify its position in the raw image; {total} may not exceed the volume size.
+
+        Chunks must be sent in ascending order. The first chunk of a new upload should set {initialize}, which zeroes the volume; afterwards, regions which are not sent remain zero, so sparse source images need only send their allocated data. The offset after the last written chunk is recorded, so an interrupted upload can be resumed from the offset reported by a GET.
+        ---
+        tags:
+          - storage / ceph
+        parameters:
+          - in: path
+            name: pool
+            type: string
+            required: true
+            description: Path parameter
+          - in: path
+            name: volume
+            type: string
+            required: true
+            description: Path parameter
+          - in: header
+            name: Content-Range
+            type: string
+            required: true
+            description: The byte range of the image contained in the body, e.g. "bytes 0-4194303/10737418240"
+          - in: query
+            name: initialize
+            type: boolean
+            required: false
+            default: false
+            description: Zero the volume and begin a new resumable upload with this chunk
+        responses:
+          200:
+            description: OK
+            schema:
+              type: object
+              id: VolumeUploadChunk
+              properties:
+                message:
+                  type: string
+                offset:
+                  type: integer
+                  description: The offset after the written chunk
+                written:
+                  type: integer
+                  description: The number of bytes of data written
+                skipped:
+                  type: integer
+                  description: The number of all-zero bytes which were not written
+          400:
+            description: Bad request
+            schema:
+              type: object
+              id: Message
+          409:
+            description: Chunk overlaps the committed offset of the upload
+            schema:
+              type: object
+              id: Message
+          503:
+            description: Too many active transfers; retry after the Retry-After header
+            schema:
+              type: object
+              id: Message
+        """
+        return api_helper.ceph_volume_upload_chunk(
+            pool,
+            volume,
+            flask.request.headers.get("Content-Range", None),
+            bool(strtobool(reqargs.get("initialize", "false"))),
+        )
+
 
 api.add_resource(
     API_Storage_Ceph_Volume_Element_Upload,
@@ -7858,6 +9150,8 @@ class API_Storage_Ceph_Snapshot_Root(Resource):
             {"name": "pool"},
             {"name": "volume"},
             {"name": "limit"},
+            {"name": "page_size"},
+            {"name": "cursor"},
         ]
     )
     @Authenticator
@@ -7897,18 +9191,44 @@ class API_Storage_Ceph_Snapshot_Root(Resource):
             type: string
             required: false
             description: A volume to limit the search to
+          - in: query
+            name: page_size
+            type: integer
+            required: false
+            description: Return one page of at most this many snapshots (1-1000), with the cursor of the next page in the X-PVC-Next-Cursor header if one follows; the whole list is returned if unset
+          - in: query
+            name: cursor
+            type: string
+            required: false
+            description: Return the snapshots following this cursor, from the X-PVC-Next-Cursor header of the previous page
         responses:
           200:
             description: OK
+            headers:
+              X-PVC-Next-Cursor:
+                type: string
+                description: The cursor of the next page, if page_size is set and another page follows this one
             schema:
               type: array
               items:
                 $ref: '#/definitions/snapshot'
+          400:
+            description: Bad request
+            schema:
+              type: object
+              id: Message
+          404:
+            description: Not found
+            schema:
+              type: object
+              id: Message
         """
         return api_helper.ceph_volume_snapshot_list(
             reqargs.get("pool", None),
             reqargs.get("volume", None),
             reqargs.get("limit", None),
+            cursor=reqargs.get("cursor", None),
+            page_size=reqargs.get("page_size", None),
         )
 
     @RequestParser(
@@ -10227,6 +11547,7 @@ class API_Provisioner_OVA_Root(Resource):
         """
         return api_ova.list_ova(reqargs.get("limit", None))
 
+    @TransferLimiter
     @RequestParser(
         [
             {
@@ -10285,6 +11606,11 @@ class API_Provisioner_OVA_Root(Resource):
             schema:
               type: object
               id: Message
+          503:
+            description: Too many active transfers; retry after the Retry-After header
+            schema:
+              type: object
+              id: Message
         """
         return api_ova.upload_ova(
             reqargs.get("pool", None),
@@ -10324,6 +11650,7 @@ class API_Provisioner_OVA_Element(Resource):
         """
         return api_ova.list_ova(ova, is_fuzzy=False)
 
+    @TransferLimiter
     @RequestParser(
         [
             {
@@ -10376,6 +11703,11 @@ class API_Provisioner_OVA_Element(Resource):
             schema:
               type: object
               id: Message
+          503:
+            description: Too many active transfers; retry after the Retry-After header
+            schema:
+              type: object
+              id: Message
         """
         return api_ova.upload_ova(
             reqargs.get("pool", None),
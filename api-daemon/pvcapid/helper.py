@@ -26,12 +26,11 @@ import lxml.etree as etree
 import sys
 
 from re import match
-from requests import get
 from werkzeug.formparser import parse_form_data
 
 from pvcapid.Daemon import config, strtobool
 
-from daemon_lib.zkhandler import ZKConnection
+from daemon_lib.zkhandler import ZKConnection, ZKHandler
 
 import daemon_lib.common as pvc_common
 import daemon_lib.cluster as pvc_cluster
@@ -40,6 +39,7 @@ import daemon_lib.node as pvc_node
 import daemon_lib.vm as pvc_vm
 import daemon_lib.network as pvc_network
 import daemon_lib.ceph as pvc_ceph
+import daemon_lib.blockstream as pvc_blockstream
 
 
 logger = logging.getLogger(__name__)
@@ -51,6 +51,94 @@ handler.setFormatter(formatter)
 logger.addHandler(handler)
 
 
+#
+# List pagination
+#
+# The number of entries obtained at once when streaming an unpaged list
+LIST_STREAM_CHUNK_SIZE = 100
+
+# The maximum number of entries in one page of a list
+LIST_MAX_PAGE_SIZE = 1000
+
+# The response header holding the cursor of the next page of a list
+LIST_CURSOR_HEADER = "X-PVC-Next-Cursor"
+
+
+def list_response(list_function, not_found=None, cursor=None, page_size=None):
+    """
+    Return a response for a list obtained from list_function
+
+    {list_function} is called as list_function(zkhandler, cursor, count, chunk_size) and returns
+    (retflag, retdata) for the up to {count} entries following {cursor}, as the ListChunks of
+    their information in chunks of up to {chunk_size} entries if {chunk_size} is set.
+
+    If {page_size} is set, one page is returned, with the cursor of the next page (if any) in
+    the LIST_CURSOR_HEADER header. Otherwise the whole list is returned; lists longer than one
+    chunk are streamed as a chunked JSON array, obtaining the entries one chunk at a time, so
+    that the whole list is never held in memory. Whether more entries follow is found from the
+    selected entries rather than from their information, which omits any entry (e.g. a VM being
+    removed) whose information could not be obtained. If {not_found} is set, an empty list
+    returns a 404 with that message.
+    """
+    if page_size is not None:
+        try:
+            page_size = int(page_size)
+        except ValueError:
+            page_size = 0
+        if page_size < 1 or page_size > LIST_MAX_PAGE_SIZE:
+            return {
+                "message": f"Page size must be between 1 and {LIST_MAX_PAGE_SIZE}."
+            }, 400
+
+    zkhandler = ZKHandler(config)
+    zkhandler.connect()
+    is_streaming = False
+
+    try:
+        schema_version = zkhandler.read("base.schema.version")
+        zkhandler.schema.load(schema_version or 0, quiet=True)
+
+        if page_size is not None:
+            # Select one extra entry to find whether another page follows this one; only the
+            # information of the page itself, the first chunk, is obtained
+            retflag, chunks = list_function(zkhandler, cursor, page_size + 1, page_size)
+            if not retflag:
+                return {"message": chunks}, 400
+            if len(chunks) < 1 and cursor is None and not_found is not None:
+                return {"message": not_found}, 404
+            retdata = next(iter(chunks), list())
+            if len(chunks) <= 1:
+                return retdata, 200
+            return retdata, 200, {LIST_CURSOR_HEADER: chunks.cursor(page_size)}
+
+        retflag, chunks = list_function(zkhandler, cursor, None, LIST_STREAM_CHUNK_SIZE)
+        if not retflag:
+            return {"message": chunks}, 400
+        if len(chunks) < 1 and cursor is None and not_found is not None:
+            return {"message": not_found}, 404
+        chunk_iter = iter(chunks)
+        first_chunk = next(chunk_iter, list())
+        if len(chunks) <= 1:
+            return first_chunk, 200
+
+        def list_chunks():
+            yield "[" + ", ".join(json.dumps(entry) for entry in first_chunk)
+            for chunk in chunk_iter:
+                for entry in chunk:
+                    yield ", " + json.dumps(entry)
+            yield "]\n"
+
+        response = flask.Response(
+            flask.stream_with_context(list_chunks()), mimetype="application/json"
+        )
+        response.call_on_close(zkhandler.disconnect)
+        is_streaming = True
+        return response
+    finally:
+        if not is_streaming:
+            zkhandler.disconnect()
+
+
 #
 # Cluster base functions
 #
@@ -165,104 +253,26 @@ def cluster_resource_metrics(zkhandler):
     return retdata, retcode
 
 
-@pvc_common.Profiler(config)
-@ZKConnection(config)
-def ceph_metrics(zkhandler):
-    """
-    Obtain current Ceph Prometheus metrics from the active MGR
-    """
-    # We have to parse out the *name* of the currently active MGR
-    # While the JSON version of the "ceph status" output provides a
-    # URL, this URL is in the backend (i.e. storage) network, which
-    # the API might not have access to. This way, we can connect to
-    # the node name which can be handled however.
-    retcode, retdata = pvc_ceph.get_status(zkhandler)
-    if not retcode:
-        ceph_mgr_node = None
-    else:
-        ceph_data = retdata["ceph_data"]
-        try:
-            ceph_mgr_line = [
-                n for n in ceph_data.split("\n") if match(r"^mgr:", n.strip())
-            ][0]
-            ceph_mgr_node = ceph_mgr_line.split()[1].split("(")[0]
-        except Exception:
-            ceph_mgr_node = None
-
-    if ceph_mgr_node is not None:
-        # Get the data from the endpoint
-        # We use the default port of 9283
-        ceph_prometheus_uri = f"http://{ceph_mgr_node}:9283/metrics"
-        response = get(ceph_prometheus_uri)
-
-        if response.status_code == 200:
-            output = response.text
-            status_code = 200
-        else:
-            output = (
-                f"Error: Failed to obtain metric data from {ceph_mgr_node} MGR daemon\n"
-            )
-            status_code = 400
-    else:
-        output = "Error: Failed to find an active MGR node\n"
-        status_code = 400
-
-    return output, status_code
-
-
-@pvc_common.Profiler(config)
-@ZKConnection(config)
-def zookeeper_metrics(zkhandler):
-    """
-    Obtain current Zookeeper Prometheus metrics from the active coordinator node
-    """
-    primary_node = zkhandler.read("base.config.primary_node")
-    if primary_node is not None:
-        # Get the data from the endpoint
-        # We use the default port of 9141
-        zookeeper_prometheus_uri = f"http://{primary_node}:9141/metrics"
-        response = get(zookeeper_prometheus_uri)
-
-        if response.status_code == 200:
-            output = response.text
-            # Parse the text to remove annoying ports (":2181")
-            output = output.replace(":2181", "")
-            # Sort the output text
-            output_lines = output.split("\n")
-            output_lines.sort()
-            output = "\n".join(output_lines) + "\n"
-            status_code = 200
-        else:
-            output = f"Error: Failed to obtain metric data from {primary_node} primary node daemon\n"
-            status_code = 400
-    else:
-        output = "Error: Failed to find an active primary node\n"
-        status_code = 400
-
-    return output, status_code
-
-
 #
 # Fault functions
 #
 @pvc_common.Profiler(config)
-@ZKConnection(config)
-def fault_list(zkhandler, limit=None, sort_key="last_reported"):
+def fault_list(limit=None, sort_key="last_reported", cursor=None, page_size=None):
     """
     Return a list of all faults sorted by SORT_KEY.
     """
-    retflag, retdata = pvc_faults.get_list(zkhandler, limit=limit, sort_key=sort_key)
-
-    if retflag:
-        retcode = 200
-    elif retflag and limit is not None and len(retdata) < 1:
-        retcode = 404
-        retdata = {"message": f"No fault with ID {limit} found"}
-    else:
-        retcode = 400
-        retdata = {"message": retdata}
-
-    return retdata, retcode
+    return list_response(
+        lambda zkhandler, cursor, count, chunk_size: pvc_faults.get_list(
+            zkhandler,
+            limit=limit,
+            sort_key=sort_key,
+            cursor=cursor,
+            count=count,
+            chunk_size=chunk_size,
+        ),
+        cursor=cursor,
+        page_size=page_size,
+    )
 
 
 @pvc_common.Profiler(config)
@@ -619,29 +629,37 @@ def vm_console(zkhandler, vm, lines=None):
 
 
 @pvc_common.Profiler(config)
-@ZKConnection(config)
 def vm_list(
-    zkhandler, node=None, state=None, tag=None, limit=None, is_fuzzy=True, negate=False
+    node=None,
+    state=None,
+    tag=None,
+    limit=None,
+    is_fuzzy=True,
+    negate=False,
+    cursor=None,
+    page_size=None,
 ):
     """
     Return a list of VMs with limit LIMIT.
     """
-    retflag, retdata = pvc_vm.get_list(
-        zkhandler, node, state, tag, limit, is_fuzzy, negate
+    return list_response(
+        lambda zkhandler, cursor, count, chunk_size: pvc_vm.get_list(
+            zkhandler,
+            node,
+            state,
+            tag,
+            limit,
+            is_fuzzy,
+            negate,
+            cursor=cursor,
+            count=count,
+            chunk_size=chunk_size,
+        ),
+        not_found="VM not found.",
+        cursor=cursor,
+        page_size=page_size,
     )
 
-    if retflag:
-        if retdata:
-            retcode = 200
-        else:
-            retcode = 404
-            retdata = {"message": "VM not found."}
-    else:
-        retcode = 400
-        retdata = {"message": retdata}
-
-    return retdata, retcode
-
 
 @ZKConnection(config)
 def vm_define(
@@ -755,6 +773,8 @@ def vm_restore(
     backup_path,
     datestring,
     retain_snapshot=False,
+    volume_concurrency=2,
+    bandwidth_limit=None,
 ):
     """
     Restore a VM from a local (primary coordinator) filesystem path.
@@ -765,6 +785,8 @@ def vm_restore(
         backup_path,
         datestring,
         retain_snapshot,
+        volume_concurrency=volume_concurrency,
+        bandwidth_limit=bandwidth_limit,
     )
 
     if retflag:
@@ -968,6 +990,7 @@ def get_vm_meta(zkhandler, vm):
         domain_node_autostart,
         domain_migrate_method,
         domain_migrate_max_downtime,
+        domain_migrate_profile,
     ) = pvc_common.getDomainMetadata(zkhandler, dom_uuid)
 
     retcode = 200
@@ -978,6 +1001,7 @@ def get_vm_meta(zkhandler, vm):
         "node_autostart": domain_node_autostart,
         "migration_method": domain_migrate_method.lower(),
         "migration_max_downtime": int(domain_migrate_max_downtime),
+        "migration_profile": domain_migrate_profile,
     }
 
     return retdata, retcode
@@ -993,6 +1017,7 @@ def update_vm_meta(
     provisioner_profile,
     migration_method,
     migration_max_downtime,
+    migration_profile=None,
 ):
     """
     Update metadata of a VM.
@@ -1007,6 +1032,11 @@ def update_vm_meta(
         except Exception:
             autostart = False
 
+    if migration_profile and migration_profile not in config["migration_profiles"]:
+        return {
+            "message": f"Migration profile '{migration_profile}' is not defined."
+        }, 400
+
     retflag, retdata = pvc_vm.modify_vm_metadata(
         zkhandler,
         vm,
@@ -1016,6 +1046,7 @@ def update_vm_meta(
         provisioner_profile,
         migration_method,
         migration_max_downtime,
+        migration_profile=migration_profile,
     )
 
     if retflag:
@@ -1232,6 +1263,156 @@ def vm_disable(zkhandler, name, force=False):
     return output, retcode
 
 
+# The most threads a bulk VM action may use to lock and wait on VMs
+BULK_MAX_CONCURRENCY = 64
+
+
+def bulk_concurrency(concurrency):
+    """
+    Parse the concurrency of a bulk VM action, returning None if it is not valid
+    """
+    try:
+        concurrency = int(concurrency)
+    except (TypeError, ValueError):
+        return None
+    if concurrency < 1 or concurrency > BULK_MAX_CONCURRENCY:
+        return None
+    return concurrency
+
+
+def bulk_response(retflag, retdata):
+    """
+    Return a response for the (retflag, retdata) of a bulk VM action
+
+    If the selection or action was invalid, {retdata} is an error message; otherwise it is the list
+    of per-VM results, which is returned whether or not every VM succeeded.
+    """
+    if isinstance(retdata, str):
+        return {"message": retdata.replace('"', "'")}, 400
+
+    for result in retdata:
+        result["message"] = result["message"].replace('"', "'")
+
+    succeeded = len([result for result in retdata if result["result"]])
+    output = {
+        "message": "Action succeeded for {} of {} VMs.".format(succeeded, len(retdata)),
+        "results": retdata,
+    }
+
+    if retflag:
+        retcode = 200
+    else:
+        retcode = 400
+
+    return output, retcode
+
+
+@ZKConnection(config)
+def vm_bulk_state(
+    zkhandler, state, vms, tag, node, select_state, force, wait, concurrency
+):
+    """
+    Set the state of many VMs in the PVC cluster.
+    """
+    concurrency = bulk_concurrency(concurrency)
+    if concurrency is None:
+        return {
+            "message": f"Concurrency must be between 1 and {BULK_MAX_CONCURRENCY}."
+        }, 400
+
+    retflag, retdata = pvc_vm.bulk_set_vm_state(
+        zkhandler,
+        state,
+        vms=vms,
+        tag=tag,
+        node=node,
+        state=select_state,
+        force=force,
+        wait=wait,
+        concurrency=concurrency,
+    )
+
+    return bulk_response(retflag, retdata)
+
+
+@ZKConnection(config)
+def vm_bulk_tag(
+    zkhandler, action, tag, protected, vms, select_tag, node, state, concurrency
+):
+    """
+    Update a tag of many VMs.
+    """
+    concurrency = bulk_concurrency(concurrency)
+    if concurrency is None:
+        return {
+            "message": f"Concurrency must be between 1 and {BULK_MAX_CONCURRENCY}."
+        }, 400
+
+    if action not in ["add", "remove"]:
+        return {"message": "Tag action must be one of 'add', 'remove'."}, 400
+
+    retflag, retdata = pvc_vm.bulk_modify_vm_tag(
+        zkhandler,
+        action,
+        tag,
+        protected=protected,
+        vms=vms,
+        select_tag=select_tag,
+        node=node,
+        state=state,
+        concurrency=concurrency,
+    )
+
+    return bulk_response(retflag, retdata)
+
+
+@ZKConnection(config)
+def vm_bulk_meta(
+    zkhandler,
+    limit,
+    selector,
+    autostart,
+    provisioner_profile,
+    migration_method,
+    migration_max_downtime,
+    migration_profile,
+    vms,
+    tag,
+    node,
+    state,
+):
+    """
+    Update metadata of many VMs.
+    """
+    if autostart is not None:
+        try:
+            autostart = bool(strtobool(autostart))
+        except Exception:
+            autostart = False
+
+    if migration_profile and migration_profile not in config["migration_profiles"]:
+        return {
+            "message": f"Migration profile '{migration_profile}' is not defined."
+        }, 400
+
+    retflag, retdata = pvc_vm.bulk_modify_vm_metadata(
+        zkhandler,
+        limit,
+        selector,
+        autostart,
+        provisioner_profile,
+        migration_method,
+        migration_max_downtime,
+        migration_profile=migration_profile,
+        vms=vms,
+        tag=tag,
+        node=node,
+        state=state,
+    )
+
+    return bulk_response(retflag, retdata)
+
+
 @ZKConnection(config)
 def vm_move(zkhandler, name, node, wait, force_live):
     """
@@ -1402,6 +1583,144 @@ def vm_snapshot_receive_block_diff(
     }, 200
 
 
+def vm_snapshot_receive_extents_info():
+    """
+    Report the extent stream capabilities of this system to a remote system
+    """
+    return {
+        "protocol": pvc_blockstream.PROTOCOL_VERSION,
+        "compression": pvc_blockstream.get_compression_types(),
+        "max_transfers": config["api_max_transfers"] * config["api_worker_count"],
+    }, 200
+
+
+@ZKConnection(config)
+def vm_snapshot_receive_extents_offset(zkhandler, pool, volume, snapshot, stream):
+    """
+    Report the offset from which a failed extent stream from a remote system can be resumed
+    """
+    import rados
+    import rbd
+
+    cluster = rados.Rados(conffile="/etc/ceph/ceph.conf")
+    cluster.connect()
+    ioctx = cluster.open_ioctx(pool)
+    try:
+        image = rbd.Image(ioctx, volume)
+        try:
+            offset = int(
+                image.metadata_get(
+                    f"{pvc_blockstream.RESUME_KEY_PREFIX}{snapshot}.{stream}"
+                )
+            )
+        except Exception:
+            offset = 0
+        finally:
+            image.close()
+    except rbd.ImageNotFound:
+        offset = 0
+    finally:
+        ioctx.close()
+        cluster.shutdown()
+
+    return {"offset": offset}, 200
+
+
+@ZKConnection(config)
+def vm_snapshot_receive_extents_prepare(zkhandler, pool, volume, snapshot, size):
+    """
+    Prepare an RBD volume to receive a full extent stream from a remote system
+    """
+    import rados
+    import rbd
+
+    _, rbd_detail = pvc_ceph.get_list_volume(
+        zkhandler, pool, limit=volume, is_fuzzy=False
+    )
+    if len(rbd_detail) > 0:
+        volume_exists = True
+    else:
+        volume_exists = False
+
+    cluster = rados.Rados(conffile="/etc/ceph/ceph.conf")
+    cluster.connect()
+    ioctx = cluster.open_ioctx(pool)
+
+    try:
+        if not volume_exists:
+            rbd_inst = rbd.RBD()
+            rbd_inst.create(ioctx, volume, size)
+            retflag, retdata = pvc_ceph.add_volume(
+                zkhandler, pool, volume, str(size) + "B", force_flag=True, zk_only=True
+            )
+            if not retflag:
+                output = {"message": retdata.replace('"', "'")}
+                return output, 400
+        else:
+            # Only allocated extents are sent, so any existing data must be cleared first
+            image = rbd.Image(ioctx, volume)
+            try:
+                image.write_zeroes(0, image.size())
+            finally:
+                image.close()
+    finally:
+        ioctx.close()
+        cluster.shutdown()
+
+    logger.info(f"Prepared {pool}/{volume} to receive full snapshot {snapshot}")
+    return {"message": "Successfully prepared RBD block device"}, 200
+
+
+@ZKConnection(config)
+def vm_snapshot_receive_extents(
+    zkhandler, pool, volume, snapshot, compression, stream, request
+):
+    """
+    Receive a stream of RBD volume extents from a remote system
+    """
+    import rados
+    import rbd
+
+    if compression not in pvc_blockstream.get_compression_types():
+        return {"message": f"Unsupported compression type '{compression}'"}, 400
+
+    cluster = rados.Rados(conffile="/etc/ceph/ceph.conf")
+    cluster.connect()
+    ioctx = cluster.open_ioctx(pool)
+    try:
+        image = rbd.Image(ioctx, volume)
+    except rbd.ImageNotFound:
+        ioctx.close()
+        cluster.shutdown()
+        return {"message": f"RBD volume {pool}/{volume} does not exist"}, 404
+
+    resume_key = f"{pvc_blockstream.RESUME_KEY_PREFIX}{snapshot}.{stream}"
+
+    def checkpoint(offset):
+        image.metadata_set(resume_key, str(offset))
+
+    logger.info(
+        f"Importing extent stream {stream} for {pool}/{volume}@{snapshot} ({compression} compression)"
+    )
+    try:
+        written = pvc_blockstream.receive_frames(
+            request.stream, image, compression, checkpoint=checkpoint
+        )
+        try:
+            image.metadata_remove(resume_key)
+        except Exception:
+            pass
+    except Exception as e:
+        logger.warning(f"Failed extent stream {stream} for {pool}/{volume}: {e}")
+        return {"message": f"Failed to receive RBD extents: {e}"}, 400
+    finally:
+        image.close()
+        ioctx.close()
+        cluster.shutdown()
+
+    return {"message": f"Successfully received {written} bytes of RBD extents"}, 200
+
+
 @ZKConnection(config)
 def vm_snapshot_receive_block_createsnap(zkhandler, pool, volume, snapshot):
     """
@@ -1414,6 +1733,10 @@ def vm_snapshot_receive_block_createsnap(zkhandler, pool, volume, snapshot):
     cluster.connect()
     ioctx = cluster.open_ioctx(pool)
     image = rbd.Image(ioctx, volume)
+    # Clean up any resume checkpoints left behind by failed extent streams
+    for key, _ in list(image.metadata_list()):
+        if key.startswith(pvc_blockstream.RESUME_KEY_PREFIX):
+            image.metadata_remove(key)
     image.create_snap(snapshot)
     image.close()
     ioctx.close()
@@ -1548,6 +1871,7 @@ def vm_snapshot_receive_config(zkhandler, snapshot, vm_config, source_snapshot=N
             vm_config["profile"],
             vm_config["migration_method"],
             vm_config["migration_max_downtime"],
+            migration_profile=vm_config.get("migration_profile"),
         )
         if not retcode:
             retcode = 400
@@ -1776,24 +2100,24 @@ def net_remove(zkhandler, network):
 
 
 @pvc_common.Profiler(config)
-@ZKConnection(config)
-def net_dhcp_list(zkhandler, network, limit=None, static=False):
+def net_dhcp_list(network, limit=None, static=False, cursor=None, page_size=None):
     """
     Return a list of DHCP leases in network NETWORK with limit LIMIT.
     """
-    retflag, retdata = pvc_network.get_list_dhcp(zkhandler, network, limit, static)
-
-    if retflag:
-        if retdata:
-            retcode = 200
-        else:
-            retcode = 404
-            retdata = {"message": "Lease not found."}
-    else:
-        retcode = 400
-        retdata = {"message": retdata}
-
-    return retdata, retcode
+    return list_response(
+        lambda zkhandler, cursor, count, chunk_size: pvc_network.get_list_dhcp(
+            zkhandler,
+            network,
+            limit,
+            static,
+            cursor=cursor,
+            count=count,
+            chunk_size=chunk_size,
+        ),
+        not_found="Lease not found.",
+        cursor=cursor,
+        page_size=page_size,
+    )
 
 
 @ZKConnection(config)
@@ -2323,24 +2647,24 @@ def ceph_pool_set_pgs(zkhandler, name, pgs):
 
 
 @pvc_common.Profiler(config)
-@ZKConnection(config)
-def ceph_volume_list(zkhandler, pool=None, limit=None, is_fuzzy=True):
+def ceph_volume_list(pool=None, limit=None, is_fuzzy=True, cursor=None, page_size=None):
     """
     Get the list of RBD volumes in the Ceph storage cluster.
     """
-    retflag, retdata = pvc_ceph.get_list_volume(zkhandler, pool, limit, is_fuzzy)
-
-    if retflag:
-        if retdata:
-            retcode = 200
-        else:
-            retcode = 404
-            retdata = {"message": "Volume not found."}
-    else:
-        retcode = 400
-        retdata = {"message": retdata}
-
-    return retdata, retcode
+    return list_response(
+        lambda zkhandler, cursor, count, chunk_size: pvc_ceph.get_list_volume(
+            zkhandler,
+            pool,
+            limit,
+            is_fuzzy,
+            cursor=cursor,
+            count=count,
+            chunk_size=chunk_size,
+        ),
+        not_found="Volume not found.",
+        cursor=cursor,
+        page_size=page_size,
+    )
 
 
 @ZKConnection(config)
@@ -2445,6 +2769,26 @@ def ceph_volume_remove(zkhandler, pool, name):
     return output, retcode
 
 
+def _upload_form_to_image(image, zeroed=False):
+    """
+    Stream the file in the current request form body directly into an RBD image
+    """
+    writer = pvc_blockstream.ImageWriter(image, zeroed=zeroed)
+
+    # This sets up a custom stream_factory that writes directly into the image, rather than
+    # the standard stream_factory which writes to a temporary file waiting on a save() call.
+    # This will break if the API ever uploaded multiple files, but this is an acceptable
+    # workaround.
+    def image_stream_factory(
+        total_content_length, filename, content_type, content_length=None
+    ):
+        return writer
+
+    with writer:
+        parse_form_data(flask.request.environ, stream_factory=image_stream_factory)
+    return writer
+
+
 @ZKConnection(config)
 def ceph_volume_upload(zkhandler, pool, volume, img_type, file_size=None):
     """
@@ -2456,7 +2800,7 @@ def ceph_volume_upload(zkhandler, pool, volume, img_type, file_size=None):
         retcode = 400
         return output, retcode
 
-    # Get the size of the target block device
+    # Verify the target volume exists
     retcode, retdata = pvc_ceph.get_list_volume(zkhandler, pool, volume, is_fuzzy=False)
     # If there's no target, return failure
     if not retcode or len(retdata) < 1:
@@ -2468,73 +2812,48 @@ def ceph_volume_upload(zkhandler, pool, volume, img_type, file_size=None):
         retcode = 400
         return output, retcode
 
-    try:
-        dev_size = retdata[0]["stats"]["size"]
-    except Exception:
-        output = {
-            "message": "Target volume '{}' does not exist in pool '{}'.".format(
-                volume, pool
-            )
-        }
-        retcode = 400
-        return output, retcode
+    temp_volume = "{}_tmp".format(volume)
 
-    def cleanup_maps_and_volumes():
-        # Unmap the target blockdev
-        retflag, retdata = pvc_ceph.unmap_volume(zkhandler, pool, volume)
-        # Unmap the temporary blockdev
-        retflag, retdata = pvc_ceph.unmap_volume(
-            zkhandler, pool, "{}_tmp".format(volume)
-        )
-        # Remove the temporary blockdev
-        retflag, retdata = pvc_ceph.remove_volume(
-            zkhandler, pool, "{}_tmp".format(volume)
-        )
+    def cleanup_volumes():
+        # Remove the temporary volume
+        retflag, retdata = pvc_ceph.remove_volume(zkhandler, pool, temp_volume)
 
     if img_type == "raw":
-        if file_size is not None and file_size != dev_size:
-            output = {
-                "message": f"Image file size {file_size} does not match volume size {dev_size}"
-            }
-            retcode = 400
-            return output, retcode
-
-        # Map the target blockdev
-        retflag, retdata = pvc_ceph.map_volume(zkhandler, pool, volume)
-        if not retflag:
-            output = {"message": retdata.replace('"', "'")}
+        try:
+            cluster, ioctx, image = pvc_blockstream.open_image(pool, volume)
+        except Exception as e:
+            output = {"message": f"Failed to open target volume: {e}"}
             retcode = 400
-            cleanup_maps_and_volumes()
             return output, retcode
-        dest_blockdev = retdata
 
-        # Save the data to the blockdev directly
         try:
-            # This sets up a custom stream_factory that writes directly into the ova_blockdev,
-            # rather than the standard stream_factory which writes to a temporary file waiting
-            # on a save() call. This will break if the API ever uploaded multiple files, but
-            # this is an acceptable workaround.
-            def image_stream_factory(
-                total_content_length, filename, content_type, content_length=None
-            ):
-                return open(dest_blockdev, "wb")
-
-            parse_form_data(flask.request.environ, stream_factory=image_stream_factory)
-        except Exception:
-            output = {
-                "message": "Failed to upload or write image file to temporary volume."
-            }
-            retcode = 400
-            cleanup_maps_and_volumes()
-            return output, retcode
+            dev_size = image.size()
+            if file_size is not None and int(file_size) != dev_size:
+                output = {
+                    "message": f"Image file size {file_size} does not match volume size {dev_size}"
+                }
+                retcode = 400
+                return output, retcode
+
+            # Save the data to the image directly
+            try:
+                writer = _upload_form_to_image(image)
+            except Exception:
+                output = {"message": "Failed to upload or write image file to volume."}
+                retcode = 400
+                return output, retcode
+        finally:
+            pvc_blockstream.close_image(cluster, ioctx, image)
 
+        logger.info(
+            f"Wrote {writer.written} bytes and skipped {writer.skipped} zero bytes to {pool}/{volume}"
+        )
         output = {
             "message": "Wrote uploaded file to volume '{}' in pool '{}'.".format(
                 volume, pool
             )
         }
         retcode = 200
-        cleanup_maps_and_volumes()
         return output, retcode
 
     else:
@@ -2543,58 +2862,50 @@ def ceph_volume_upload(zkhandler, pool, volume, img_type, file_size=None):
             retcode = 400
             return output, retcode
 
-        # Create a temporary blockdev
+        # Non-raw formats require random access to convert, so the upload is first stored in
+        # a temporary volume; this only holds the (usually much smaller) source image file
         retflag, retdata = pvc_ceph.add_volume(
-            zkhandler, pool, "{}_tmp".format(volume), file_size
+            zkhandler, pool, temp_volume, f"{file_size}B"
         )
         if not retflag:
             output = {"message": retdata.replace('"', "'")}
             retcode = 400
-            cleanup_maps_and_volumes()
-            return output, retcode
-
-        # Map the temporary target blockdev
-        retflag, retdata = pvc_ceph.map_volume(zkhandler, pool, "{}_tmp".format(volume))
-        if not retflag:
-            output = {"message": retdata.replace('"', "'")}
-            retcode = 400
-            cleanup_maps_and_volumes()
+            cleanup_volumes()
             return output, retcode
-        temp_blockdev = retdata
 
-        # Map the target blockdev
-        retflag, retdata = pvc_ceph.map_volume(zkhandler, pool, volume)
-        if not retflag:
-            output = {"message": retdata.replace('"', "'")}
-            retcode = 400
-            cleanup_maps_and_volumes()
-            return output, retcode
-        dest_blockdev = retdata
-
-        # Save the data to the temporary blockdev directly
+        # Save the data to the temporary volume directly; it is new and thus already zero
         try:
-            # This sets up a custom stream_factory that writes directly into the ova_blockdev,
-            # rather than the standard stream_factory which writes to a temporary file waiting
-            # on a save() call. This will break if the API ever uploaded multiple files, but
-            # this is an acceptable workaround.
-            def image_stream_factory(
-                total_content_length, filename, content_type, content_length=None
-            ):
-                return open(temp_blockdev, "wb")
-
-            parse_form_data(flask.request.environ, stream_factory=image_stream_factory)
+            cluster, ioctx, image = pvc_blockstream.open_image(pool, temp_volume)
+            try:
+                _upload_form_to_image(image, zeroed=True)
+            finally:
+                pvc_blockstream.close_image(cluster, ioctx, image)
         except Exception:
             output = {
                 "message": "Failed to upload or write image file to temporary volume."
             }
             retcode = 400
-            cleanup_maps_and_volumes()
+            cleanup_volumes()
+            return output, retcode
+
+        # Zero the destination so that the conversion only has to write allocated data
+        try:
+            cluster, ioctx, image = pvc_blockstream.open_image(pool, volume)
+            try:
+                image.write_zeroes(0, image.size())
+            finally:
+                pvc_blockstream.close_image(cluster, ioctx, image)
+        except Exception as e:
+            output = {"message": f"Failed to prepare target volume: {e}"}
+            retcode = 400
+            cleanup_volumes()
             return output, retcode
 
-        # Convert from the temporary to destination format on the blockdevs
+        # Convert from the temporary to destination format in a single pass through librbd,
+        # using parallel out-of-order writes and skipping unallocated and zero data
         retcode, stdout, stderr = pvc_common.run_os_command(
-            "qemu-img convert -C -f {} -O raw {} {}".format(
-                img_type, temp_blockdev, dest_blockdev
+            "qemu-img convert -f {} -O raw -n --target-is-zero -W -m 8 rbd:{}/{} rbd:{}/{}".format(
+                img_type, pool, temp_volume, pool, volume
             )
         )
         if retcode:
@@ -2604,7 +2915,7 @@ def ceph_volume_upload(zkhandler, pool, volume, img_type, file_size=None):
                 )
             }
             retcode = 400
-            cleanup_maps_and_volumes()
+            cleanup_volumes()
             return output, retcode
 
         output = {
@@ -2613,34 +2924,179 @@ def ceph_volume_upload(zkhandler, pool, volume, img_type, file_size=None):
             )
         }
         retcode = 200
-        cleanup_maps_and_volumes()
+        cleanup_volumes()
         return output, retcode
 
 
-@pvc_common.Profiler(config)
 @ZKConnection(config)
+def ceph_volume_upload_status(zkhandler, pool, volume):
+    """
+    Get the committed offset of a chunked upload to a PVC Ceph volume
+    """
+    retcode, retdata = pvc_ceph.get_list_volume(zkhandler, pool, volume, is_fuzzy=False)
+    if not retcode or len(retdata) < 1:
+        output = {
+            "message": "Target volume '{}' does not exist in pool '{}'.".format(
+                volume, pool
+            )
+        }
+        retcode = 404
+        return output, retcode
+
+    try:
+        cluster, ioctx, image = pvc_blockstream.open_image(pool, volume)
+    except Exception as e:
+        output = {"message": f"Failed to open target volume: {e}"}
+        retcode = 400
+        return output, retcode
+
+    try:
+        size = image.size()
+        try:
+            offset = int(image.metadata_get(pvc_blockstream.UPLOAD_KEY))
+            in_progress = True
+        except Exception:
+            offset = 0
+            in_progress = False
+    finally:
+        pvc_blockstream.close_image(cluster, ioctx, image)
+
+    output = {"size": size, "offset": offset, "in_progress": in_progress}
+    retcode = 200
+    return output, retcode
+
+
+@ZKConnection(config)
+def ceph_volume_upload_chunk(zkhandler, pool, volume, content_range, initialize=False):
+    """
+    Write one chunk of a raw image, described by a Content-Range header, to a PVC Ceph volume
+
+    Chunks must be sent in ascending order; the end of the last chunk written is recorded in
+    the image metadata so that an interrupted upload can be resumed from it. Initializing an
+    upload zeroes the volume, after which regions not sent by the client (e.g. unallocated
+    regions of a sparse source image) remain zero, and all-zero data is skipped entirely.
+    """
+    range_match = match(r"^bytes ([0-9]+)-([0-9]+)/([0-9]+)$", content_range or "")
+    if not range_match:
+        output = {"message": f"Invalid or missing Content-Range '{content_range}'"}
+        retcode = 400
+        return output, retcode
+    start, end, total = (int(v) for v in range_match.groups())
+    if end < start or end >= total:
+        output = {"message": f"Invalid Content-Range '{content_range}'"}
+        retcode = 400
+        return output, retcode
+    length = end - start + 1
+
+    retcode, retdata = pvc_ceph.get_list_volume(zkhandler, pool, volume, is_fuzzy=False)
+    if not retcode or len(retdata) < 1:
+        output = {
+            "message": "Target volume '{}' does not exist in pool '{}'.".format(
+                volume, pool
+            )
+        }
+        retcode = 400
+        return output, retcode
+
+    try:
+        cluster, ioctx, image = pvc_blockstream.open_image(pool, volume)
+    except Exception as e:
+        output = {"message": f"Failed to open target volume: {e}"}
+        retcode = 400
+        return output, retcode
+
+    try:
+        dev_size = image.size()
+        if total > dev_size:
+            output = {
+                "message": f"Image size {total} is larger than volume size {dev_size}"
+            }
+            retcode = 400
+            return output, retcode
+
+        if initialize:
+            image.write_zeroes(0, dev_size)
+            image.metadata_set(pvc_blockstream.UPLOAD_KEY, "0")
+            committed = 0
+        else:
+            try:
+                committed = int(image.metadata_get(pvc_blockstream.UPLOAD_KEY))
+            except Exception:
+                committed = None
+
+        if committed is not None and start < committed:
+            output = {
+                "message": f"Chunk at offset {start} overlaps committed offset {committed}",
+                "offset": committed,
+            }
+            retcode = 409
+            return output, retcode
+
+        # Regions are only known to be zero within an initialized upload
+        writer = pvc_blockstream.ImageWriter(
+            image, offset=start, zeroed=committed is not None
+        )
+        try:
+            with writer:
+                copied = pvc_blockstream.copy_stream(
+                    flask.request.stream, writer, length
+                )
+                if copied != length:
+                    raise ValueError(
+                        f"Received {copied} of {length} bytes at offset {start}"
+                    )
+        except Exception as e:
+            output = {"message": f"Failed to write chunk to volume: {e}"}
+            if committed is not None:
+                output["offset"] = committed
+            retcode = 400
+            return output, retcode
+
+        if end + 1 >= total:
+            try:
+                image.metadata_remove(pvc_blockstream.UPLOAD_KEY)
+            except Exception:
+                pass
+        elif committed is not None:
+            image.metadata_set(pvc_blockstream.UPLOAD_KEY, str(end + 1))
+    finally:
+        pvc_blockstream.close_image(cluster, ioctx, image)
+
+    output = {
+        "message": "Wrote bytes {}-{} of uploaded file to volume '{}' in pool '{}'.".format(
+            start, end, volume, pool
+        ),
+        "offset": end + 1,
+        "written": writer.written,
+        "skipped": writer.skipped,
+    }
+    retcode = 200
+    return output, retcode
+
+
+@pvc_common.Profiler(config)
 def ceph_volume_snapshot_list(
-    zkhandler, pool=None, volume=None, limit=None, is_fuzzy=True
+    pool=None, volume=None, limit=None, is_fuzzy=True, cursor=None, page_size=None
 ):
     """
     Get the list of RBD volume snapshots in the Ceph storage cluster.
     """
-    retflag, retdata = pvc_ceph.get_list_snapshot(
-        zkhandler, pool, volume, limit, is_fuzzy
+    return list_response(
+        lambda zkhandler, cursor, count, chunk_size: pvc_ceph.get_list_snapshot(
+            zkhandler,
+            pool,
+            volume,
+            limit,
+            is_fuzzy,
+            cursor=cursor,
+            count=count,
+            chunk_size=chunk_size,
+        ),
+        not_found="Volume snapshot not found.",
+        cursor=cursor,
+        page_size=page_size,
     )
 
-    if retflag:
-        if retdata:
-            retcode = 200
-        else:
-            retcode = 404
-            retdata = {"message": "Volume snapshot not found."}
-    else:
-        retcode = 400
-        retdata = {"message": retdata}
-
-    return retdata, retcode
-
 
 @ZKConnection(config)
 def ceph_volume_snapshot_add(zkhandler, pool, volume, name):
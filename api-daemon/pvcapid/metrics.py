@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+
+# metrics.py - PVC HTTP API Prometheus metrics federation
+# Part of the Parallel Virtual Cluster (PVC) system
+#
+#    Copyright (C) 2018-2024 Joshua M. Boniface <joshua@boniface.me>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+import json
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from re import match
+from requests import get
+
+from pvcapid.Daemon import config
+
+from daemon_lib.zkhandler import ZKConnection
+
+import daemon_lib.common as pvc_common
+import daemon_lib.ceph as pvc_ceph
+
+import pvcapid.helper as api_helper
+
+
+# The port of the Prometheus exporter of the Ceph MGR
+CEPH_EXPORTER_PORT = 9283
+
+# The port of the Prometheus exporter of Zookeeper
+ZOOKEEPER_EXPORTER_PORT = 9141
+
+# The time, in seconds, for which the active Ceph MGR is cached; it is also re-resolved whenever
+# fetching from it fails, so a MGR failover is picked up on the next scrape
+CEPH_MGR_CACHE_TIME = 60
+
+# The timeout, in seconds, of the "ceph mgr dump" command used to resolve the active MGR
+CEPH_MGR_DUMP_TIMEOUT = 5
+
+# The settings of each metrics source:
+#   timeout: the longest time, in seconds, a scrape waits for the source
+#   max_age: the time, in seconds, a fetched result is served without being refreshed
+#   max_stale: the time, in seconds, a fetched result may still be served while a refresh runs
+#     in the background, or when refreshes fail
+METRICS_SOURCES = {
+    "health": {"timeout": 5, "max_age": 5, "max_stale": 60},
+    "resource": {"timeout": 5, "max_age": 5, "max_stale": 60},
+    "ceph": {"timeout": 10, "max_age": 10, "max_stale": 120},
+    "zookeeper": {"timeout": 5, "max_age": 10, "max_stale": 120},
+}
+
+
+#
+# Source fetch functions
+#
+ceph_mgr_cache = {"node": None, "expires": 0}
+ceph_mgr_lock = threading.Lock()
+
+
+def get_ceph_mgr_node(zkhandler):
+    """
+    Return the name of the active Ceph MGR, from a cached "ceph mgr dump"
+
+    While the MGR dump provides the URL of the exporter, this URL is in the backend (i.e.
+    storage) network, which the API might not have access to; the MGR name is the node name,
+    which can be handled however. If the dump fails, the name is parsed from the Ceph status
+    stored by the primary node instead.
+    """
+    with ceph_mgr_lock:
+        if (
+            ceph_mgr_cache["node"] is not None
+            and ceph_mgr_cache["expires"] > time.monotonic()
+        ):
+            return ceph_mgr_cache["node"]
+
+    ceph_mgr_node = None
+    retcode, stdout, stderr = pvc_common.run_os_command(
+        "ceph mgr dump --format json", timeout=CEPH_MGR_DUMP_TIMEOUT
+    )
+    if retcode == 0:
+        try:
+            ceph_mgr_node = json.loads(stdout).get("active_name") or None
+        except Exception:
+            ceph_mgr_node = None
+
+    if ceph_mgr_node is None:
+        retcode, retdata = pvc_ceph.get_status(zkhandler)
+        if retcode:
+            try:
+                ceph_mgr_line = [
+                    n
+                    for n in retdata["ceph_data"].split("\n")
+                    if match(r"^mgr:", n.strip())
+                ][0]
+                ceph_mgr_node = ceph_mgr_line.split()[1].split("(")[0]
+            except Exception:
+                ceph_mgr_node = None
+
+    with ceph_mgr_lock:
+        ceph_mgr_cache["node"] = ceph_mgr_node
+        ceph_mgr_cache["expires"] = time.monotonic() + CEPH_MGR_CACHE_TIME
+
+    return ceph_mgr_node
+
+
+def expire_ceph_mgr_node():
+    """
+    Force the active Ceph MGR to be resolved again on the next fetch
+    """
+    with ceph_mgr_lock:
+        ceph_mgr_cache["expires"] = 0
+
+
+@pvc_common.Profiler(config)
+@ZKConnection(config)
+def ceph_metrics(zkhandler):
+    """
+    Obtain current Ceph Prometheus metrics from the active MGR
+    """
+    ceph_mgr_node = get_ceph_mgr_node(zkhandler)
+    if ceph_mgr_node is None:
+        return "Error: Failed to find an active MGR node\n", 400
+
+    # Get the data from the endpoint
+    ceph_prometheus_uri = f"http://{ceph_mgr_node}:{CEPH_EXPORTER_PORT}/metrics"
+    try:
+        response = get(ceph_prometheus_uri, timeout=METRICS_SOURCES["ceph"]["timeout"])
+    except Exception:
+        response = None
+
+    if response is None or response.status_code != 200:
+        # The active MGR may have moved
+        expire_ceph_mgr_node()
+        return (
+            f"Error: Failed to obtain metric data from {ceph_mgr_node} MGR daemon\n",
+            400,
+        )
+
+    return response.text, 200
+
+
+@pvc_common.Profiler(config)
+@ZKConnection(config)
+def zookeeper_metrics(zkhandler):
+    """
+    Obtain current Zookeeper Prometheus metrics from the active coordinator node
+    """
+    primary_node = zkhandler.read("base.config.primary_node")
+    if primary_node is None:
+        return "Error: Failed to find an active primary node\n", 400
+
+    # Get the data from the endpoint
+    zookeeper_prometheus_uri = (
+        f"http://{primary_node}:{ZOOKEEPER_EXPORTER_PORT}/metrics"
+    )
+    try:
+        response = get(
+            zookeeper_prometheus_uri, timeout=METRICS_SOURCES["zookeeper"]["timeout"]
+        )
+    except Exception:
+        response = None
+
+    if response is None or response.status_code != 200:
+        return (
+            f"Error: Failed to obtain metric data from {primary_node} primary node daemon\n",
+            400,
+        )
+
+    # Parse the text to remove annoying ports (":2181")
+    output = response.text.replace(":2181", "")
+    # Sort the output text; this is done once per fetch, since results are cached
+    output_lines = output.split("\n")
+    output_lines.sort()
+    output = "\n".join(output_lines) + "\n"
+
+    return output, 200
+
+
+#
+# Federation
+#
+# Each source is fetched by at most one thread at a time, so a hung exporter occupies only that
+# one thread, and concurrent scrapes share a single fetch of each source
+fetch_executor = ThreadPoolExecutor(
+    max_workers=len(METRICS_SOURCES), thread_name_prefix="metrics_fetch"
+)
+
+
+class MetricsSource(object):
+    """
+    A cached, timeout-bounded source of Prometheus metrics text
+    """
+
+    def __init__(self, name, fetch, timeout, max_age, max_stale):
+        self.name = name
+        self.fetch = fetch
+        self.timeout = timeout
+        self.max_age = max_age
+        self.max_stale = max_stale
+
+        self.lock = threading.Lock()
+        self.future = None
+        self.output = None
+        self.updated = None
+        self.fetch_duration = None
+
+    def get_age(self):
+        if self.updated is None:
+            return None
+        return time.monotonic() - self.updated
+
+    def run_fetch(self):
+        start = time.monotonic()
+        try:
+            output, retcode = self.fetch()
+        except Exception as e:
+            output, retcode = f"Error: {e}\n", 400
+
+        with self.lock:
+            self.future = None
+            self.fetch_duration = time.monotonic() - start
+            if retcode == 200:
+                self.output = output
+                self.updated = time.monotonic()
+
+        return retcode == 200
+
+    def revalidate(self):
+        """
+        Start a fetch of the source in the background if its cached result is too old, returning
+        the in-progress fetch, or None if the cached result is fresh
+        """
+        with self.lock:
+            age = self.get_age()
+            if age is not None and age <= self.max_age:
+                return None
+            if self.future is None:
+                self.future = fetch_executor.submit(self.run_fetch)
+            return self.future
+
+    def get(self, deadline=None):
+        """
+        Return the metrics text of the source and its age in seconds, or (None, None) if no
+        result could be obtained in time
+
+        Fresh results are returned immediately; stale results are returned immediately while a
+        refresh runs in the background. Otherwise, waits for a fetch until the source timeout or
+        the deadline.
+        """
+        future = self.revalidate()
+
+        with self.lock:
+            output, age = self.output, self.get_age()
+        if future is None or (age is not None and age <= self.max_stale):
+            return output, age
+
+        timeout = self.timeout
+        if deadline is not None:
+            timeout = max(0, min(timeout, deadline - time.monotonic()))
+        try:
+            future.result(timeout=timeout)
+        except TimeoutError:
+            pass
+
+        with self.lock:
+            output, age = self.output, self.get_age()
+        if age is None or age > self.max_stale:
+            return None, None
+        return output, age
+
+
+metrics_sources = {
+    "health": MetricsSource(
+        "health", api_helper.cluster_health_metrics, **METRICS_SOURCES["health"]
+    ),
+    "resource": MetricsSource(
+        "resource", api_helper.cluster_resource_metrics, **METRICS_SOURCES["resource"]
+    ),
+    "ceph": MetricsSource("ceph", ceph_metrics, **METRICS_SOURCES["ceph"]),
+    "zookeeper": MetricsSource(
+        "zookeeper", zookeeper_metrics, **METRICS_SOURCES["zookeeper"]
+    ),
+}
+
+
+def format_source_metrics(results):
+    """
+    Format metrics describing the state of each source for a combined scrape
+    """
+    output_lines = [
+        "# HELP pvc_metrics_source_up Whether metrics from the source were included in this scrape",
+        "# TYPE pvc_metrics_source_up gauge",
+    ]
+    for name, (output, age) in results.items():
+        output_lines.append(
+            f'pvc_metrics_source_up{{source="{name}"}} {0 if output is None else 1}'
+        )
+
+    output_lines.extend(
+        [
+            "# HELP pvc_metrics_source_age_seconds The age of the cached metrics included from the source",
+            "# TYPE pvc_metrics_source_age_seconds gauge",
+        ]
+    )
+    for name, (output, age) in results.items():
+        if age is not None:
+            output_lines.append(
+                f'pvc_metrics_source_age_seconds{{source="{name}"}} {age:.3f}'
+            )
+
+    output_lines.extend(
+        [
+            "# HELP pvc_metrics_source_fetch_seconds The duration of the last fetch from the source",
+            "# TYPE pvc_metrics_source_fetch_seconds gauge",
+        ]
+    )
+    for name in results.keys():
+        fetch_duration = metrics_sources[name].fetch_duration
+        if fetch_duration is not None:
+            output_lines.append(
+                f'pvc_metrics_source_fetch_seconds{{source="{name}"}} {fetch_duration:.3f}'
+            )
+
+    return "\n".join(output_lines) + "\n"
+
+
+def get_metrics(sources, combined=False):
+    """
+    Return the metrics text of one or more sources, fetched in parallel
+
+    A combined scrape includes every source that is available in time, along with metrics
+    describing each source, and only fails if no source is available.
+    """
+    for name in sources:
+        if name not in metrics_sources:
+            return f'Error: Metrics source "{name}" is not valid\n', 400
+
+    # Start all required fetches before waiting on any of them
+    for name in sources:
+        metrics_sources[name].revalidate()
+
+    deadline = time.monotonic() + max(metrics_sources[name].timeout for name in sources)
+    results = {name: metrics_sources[name].get(deadline=deadline) for name in sources}
+
+    if not any(output is not None for output, _ in results.values()):
+        return "Error: Failed to obtain data\n", 400
+    if not combined:
+        if any(output is None for output, _ in results.values()):
+            return "Error: Failed to obtain data\n", 400
+        return "".join(output for output, _ in results.values()), 200
+
+    output = "".join(output for output, _ in results.values() if output is not None)
+    return output + format_source_metrics(results), 200
@@ -20,11 +20,12 @@
 ###############################################################################
 
 import flask
-import psycopg2
-import psycopg2.extras
+import io
 import re
 import math
+import struct
 import tarfile
+import zlib
 
 import lxml.etree
 
@@ -33,38 +34,14 @@ from werkzeug.formparser import parse_form_data
 from pvcapid.Daemon import config
 
 from daemon_lib.zkhandler import ZKConnection
+from daemon_lib.database import open_database, close_database
 
-import daemon_lib.common as pvc_common
 import daemon_lib.ceph as pvc_ceph
+import daemon_lib.blockstream as pvc_blockstream
 
 import pvcapid.provisioner as provisioner
 
 
-#
-# Common functions
-#
-
-
-# Database connections
-def open_database(config):
-    conn = psycopg2.connect(
-        host=config["api_postgresql_host"],
-        port=config["api_postgresql_port"],
-        dbname=config["api_postgresql_dbname"],
-        user=config["api_postgresql_user"],
-        password=config["api_postgresql_password"],
-    )
-    cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    return conn, cur
-
-
-def close_database(conn, cur, failed=False):
-    if not failed:
-        conn.commit()
-    cur.close()
-    conn.close()
-
-
 #
 # OVA functions
 #
@@ -81,12 +58,31 @@ def list_ova(limit, is_fuzzy=True):
             else:
                 limit = limit[:-1]
 
-        query = "SELECT id, name FROM {} WHERE name LIKE %s;".format("ova")
+        where = "WHERE ova.name LIKE %s"
         args = (limit,)
     else:
-        query = "SELECT id, name FROM {};".format("ova")
+        where = ""
         args = ()
 
+    # Aggregate the volumes of each OVA in the same query
+    query = """SELECT ova.id, ova.name, COALESCE(
+        json_agg(
+            json_build_object(
+                'pool', ova_volume.pool,
+                'volume_name', ova_volume.volume_name,
+                'volume_format', ova_volume.volume_format,
+                'disk_id', ova_volume.disk_id,
+                'disk_size_gb', ova_volume.disk_size_gb
+            ) ORDER BY ova_volume.id
+        ) FILTER (WHERE ova_volume.id IS NOT NULL), '[]'
+    ) AS volumes
+    FROM ova
+    LEFT JOIN ova_volume ON ova_volume.ova = ova.id
+    {}
+    GROUP BY ova.id;""".format(
+        where
+    )
+
     conn, cur = open_database(config)
     cur.execute(query, args)
     data = cur.fetchall()
@@ -95,19 +91,13 @@ def list_ova(limit, is_fuzzy=True):
     ova_data = list()
 
     for ova in data:
-        ova_id = ova.get("id")
-        ova_name = ova.get("name")
-
-        query = "SELECT pool, volume_name, volume_format, disk_id, disk_size_gb FROM {} WHERE ova = %s;".format(
-            "ova_volume"
+        ova_data.append(
+            {
+                "id": ova.get("id"),
+                "name": ova.get("name"),
+                "volumes": ova.get("volumes"),
+            }
         )
-        args = (ova_id,)
-        conn, cur = open_database(config)
-        cur.execute(query, args)
-        volumes = cur.fetchall()
-        close_database(conn, cur)
-
-        ova_data.append({"id": ova_id, "name": ova_name, "volumes": volumes})
 
     if ova_data:
         return ova_data, 200
@@ -167,6 +157,334 @@ def delete_ova(zkhandler, name):
     return retmsg, retcode
 
 
+#
+# Streaming OVA import
+#
+
+# VMDK sparse extent header (little-endian) and the flags of a stream-optimized image,
+# whose compressed grains follow the header in order with markers in between
+VMDK_HEADER = struct.Struct("<4sIIQQQQIQQQB4sH")
+VMDK_MAGIC = b"KDMV"
+VMDK_FLAG_COMPRESSED = 1 << 16
+VMDK_FLAG_MARKERS = 1 << 17
+VMDK_COMPRESSION_DEFLATE = 1
+VMDK_MARKER = struct.Struct("<QII")
+VMDK_MARKER_EOS = 0
+VMDK_SECTOR_SIZE = 512
+
+TAR_BLOCK_SIZE = tarfile.BLOCKSIZE
+
+
+class VMDKStreamConverter(object):
+    """
+    Convert a stream-optimized VMDK image to raw as it is written, writing each decompressed
+    grain at its offset through writer; the buffered data never exceeds one grain
+    """
+
+    def __init__(self, writer, capacity, overhead):
+        self.writer = writer
+        self.capacity = capacity
+        self._buffer = bytearray()
+        # Skip the header, descriptor and any other metadata before the first marker
+        self._skip = overhead
+        self._done = False
+
+    def write(self, data):
+        self._buffer += data
+        while not self._done:
+            if self._skip:
+                skipped = min(self._skip, len(self._buffer))
+                del self._buffer[:skipped]
+                self._skip -= skipped
+                if self._skip:
+                    break
+                continue
+
+            if len(self._buffer) < VMDK_SECTOR_SIZE:
+                break
+            value, size, marker_type = VMDK_MARKER.unpack_from(self._buffer)
+
+            if size:
+                # A grain marker: value is the grain's offset in sectors, followed by size
+                # bytes of compressed grain data, padded to a whole sector
+                length = VMDK_MARKER.size - 4 + size
+                padded_length = -(-length // VMDK_SECTOR_SIZE) * VMDK_SECTOR_SIZE
+                if len(self._buffer) < padded_length:
+                    break
+                grain = zlib.decompress(
+                    bytes(self._buffer[VMDK_MARKER.size - 4 : length])
+                )
+                del self._buffer[:padded_length]
+
+                offset = value * VMDK_SECTOR_SIZE
+                if offset >= self.capacity:
+                    continue
+                self.writer.set_offset(offset)
+                self.writer.write(grain[: self.capacity - offset])
+            elif marker_type == VMDK_MARKER_EOS:
+                self._done = True
+            else:
+                # A metadata marker (grain table, grain directory or footer): value is the
+                # number of metadata sectors following the marker, which are not needed
+                del self._buffer[:VMDK_SECTOR_SIZE]
+                self._skip = value * VMDK_SECTOR_SIZE
+
+        if self._done:
+            self._buffer = bytearray()
+        return len(data)
+
+    def close(self):
+        if not self._done:
+            raise ValueError("VMDK stream ended before its end-of-stream marker")
+
+
+class OVADiskSink(object):
+    """
+    Write one disk member of an OVA archive into its own volume as it arrives
+
+    Stream-optimized VMDK images (the usual OVA disk format) are converted to raw on the fly;
+    any other image is stored as-is in a volume sized to fit it.
+    """
+
+    def __init__(self, zkhandler, pool, volume, src, member_size):
+        self.zkhandler = zkhandler
+        self.pool = pool
+        self.volume = volume
+        self.src = src
+        self.member_size = member_size
+        self.volume_format = None
+        self.created = False
+
+        self._header = bytearray()
+        self._image = None
+        self._writer = None
+        self._target = None
+
+    def _start(self):
+        header = bytes(self._header[: VMDK_HEADER.size])
+        size = self.member_size
+        self.volume_format = self.src.split(".")[-1]
+        stream_optimized = False
+        if len(header) == VMDK_HEADER.size:
+            (
+                magic,
+                _,
+                flags,
+                capacity,
+                _,
+                _,
+                _,
+                _,
+                _,
+                _,
+                overhead,
+                _,
+                _,
+                compression,
+            ) = VMDK_HEADER.unpack(header)
+            if (
+                magic == VMDK_MAGIC
+                and flags & VMDK_FLAG_COMPRESSED
+                and flags & VMDK_FLAG_MARKERS
+                and compression == VMDK_COMPRESSION_DEFLATE
+            ):
+                size = capacity * VMDK_SECTOR_SIZE
+                self.volume_format = "raw"
+                stream_optimized = True
+
+        retflag, retdata = pvc_ceph.add_volume(
+            self.zkhandler, self.pool, self.volume, f"{size}B"
+        )
+        if not retflag:
+            raise ValueError(retdata)
+        self.created = True
+
+        self._image = pvc_blockstream.open_image(self.pool, self.volume)
+        # The volume is new, so all-zero data need not be written at all
+        self._writer = pvc_blockstream.ImageWriter(self._image[2], zeroed=True)
+        if stream_optimized:
+            self._target = VMDKStreamConverter(
+                self._writer, size, overhead * VMDK_SECTOR_SIZE
+            )
+        else:
+            self._target = self._writer
+
+        self._target.write(bytes(self._header))
+        self._header = None
+
+    def write(self, data):
+        if self._target is None:
+            self._header += data
+            if len(self._header) >= VMDK_SECTOR_SIZE:
+                self._start()
+        else:
+            self._target.write(data)
+        return len(data)
+
+    def close(self):
+        if self._target is None:
+            self._start()
+        try:
+            if self._target is not self._writer:
+                self._target.close()
+            # Flush only this volume's writes, rather than syncing the whole system
+            self._writer.close()
+        finally:
+            self.abort()
+
+    def abort(self):
+        if self._writer is not None:
+            try:
+                self._writer.__exit__(Exception, None, None)
+            except Exception:
+                pass
+        if self._image is not None:
+            pvc_blockstream.close_image(*self._image)
+            self._image = None
+
+
+class OVAStreamParser(object):
+    """
+    Parse an OVA (tar) archive as it is written, without storing it
+
+    Each regular member is routed to the sink returned by get_sink(name, size), or skipped if
+    it returns None; only the current tar block and upload chunk are ever held in memory.
+    gzip-compressed archives are decompressed on the fly.
+    """
+
+    def __init__(self, get_sink):
+        self.get_sink = get_sink
+        self.sinks = list()
+
+        self._decompressor = None
+        self._detected = False
+        self._buffer = bytearray()
+        self._sink = None
+        self._meta = None
+        self._meta_type = None
+        self._long_name = None
+        self._remaining = 0
+        self._padding = 0
+        self._finished = False
+
+    def _finish_member(self):
+        if self._meta is not None:
+            # A GNU long name or pax extended header applying to the next member
+            meta = bytes(self._meta)
+            self._meta = None
+            if self._meta_type == tarfile.GNUTYPE_LONGNAME:
+                self._long_name = meta.split(b"\0", 1)[0].decode("utf-8")
+            else:
+                for record in meta.decode("utf-8").split("\n"):
+                    _, _, keyword = record.partition(" ")
+                    key, _, value = keyword.partition("=")
+                    if key == "path":
+                        self._long_name = value
+        elif self._sink is not None:
+            sink = self._sink
+            self._sink = None
+            sink.close()
+
+    def _process(self):
+        while True:
+            if self._remaining:
+                length = min(self._remaining, len(self._buffer))
+                if not length:
+                    return
+                data = bytes(self._buffer[:length])
+                del self._buffer[:length]
+                self._remaining -= length
+                if self._meta is not None:
+                    self._meta += data
+                elif self._sink is not None:
+                    self._sink.write(data)
+                if not self._remaining:
+                    self._finish_member()
+            elif self._padding:
+                length = min(self._padding, len(self._buffer))
+                if not length:
+                    return
+                del self._buffer[:length]
+                self._padding -= length
+            elif self._finished:
+                self._buffer = bytearray()
+                return
+            else:
+                if len(self._buffer) < TAR_BLOCK_SIZE:
+                    return
+                header = bytes(self._buffer[:TAR_BLOCK_SIZE])
+                del self._buffer[:TAR_BLOCK_SIZE]
+                if header.count(0) == TAR_BLOCK_SIZE:
+                    self._finished = True
+                    continue
+
+                tarinfo = tarfile.TarInfo.frombuf(header, "utf-8", "surrogateescape")
+                self._remaining = tarinfo.size
+                self._padding = -tarinfo.size % TAR_BLOCK_SIZE
+
+                if tarinfo.type in [
+                    tarfile.GNUTYPE_LONGNAME,
+                    tarfile.XHDTYPE,
+                ]:
+                    self._meta = bytearray()
+                    self._meta_type = tarinfo.type
+                elif tarinfo.isreg():
+                    name = self._long_name or tarinfo.name
+                    self._long_name = None
+                    self._sink = self.get_sink(name, tarinfo.size)
+                    if self._sink is not None:
+                        self.sinks.append(self._sink)
+                else:
+                    self._long_name = None
+
+                if not self._remaining:
+                    self._finish_member()
+
+    def write(self, data):
+        if not self._detected:
+            self._detected = True
+            if data[:2] == b"\x1f\x8b":
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self._decompressor is not None:
+            self._buffer += self._decompressor.decompress(data)
+        else:
+            self._buffer += data
+        self._process()
+        return len(data)
+
+    def seek(self, offset, whence=0):
+        # Werkzeug rewinds completed upload streams; the parser is sequential, so ignore it
+        return 0
+
+    def close(self):
+        if not self._finished and (self._remaining or self._sink is not None):
+            raise tarfile.ReadError("The OVA archive is truncated")
+
+    def abort(self):
+        for sink in self.sinks:
+            sink.abort()
+
+
+class OVFSink(object):
+    """
+    Collect the OVF descriptor of an OVA archive and parse it once complete
+    """
+
+    def __init__(self, on_parsed):
+        self.on_parsed = on_parsed
+        self._data = io.BytesIO()
+
+    def write(self, data):
+        return self._data.write(data)
+
+    def close(self):
+        self._data.seek(0)
+        self.on_parsed(OVFParser(self._data))
+
+    def abort(self):
+        pass
+
+
 @ZKConnection(config)
 def upload_ova(zkhandler, pool, name, ova_size):
     # Check that we have an ova or default_ova provisioning script
@@ -184,28 +502,13 @@ def upload_ova(zkhandler, pool, name, ova_size):
     else:
         ova_script = "ova"
 
-    ova_archive = None
-
-    # Cleanup function
-    def cleanup_ova_maps_and_volumes():
-        # Close the OVA archive
-        if ova_archive:
-            ova_archive.close()
-        # Unmap the OVA temporary blockdev
-        retflag, retdata = pvc_ceph.unmap_volume(zkhandler, pool, "ova_{}".format(name))
-        # Remove the OVA temporary blockdev
-        retflag, retdata = pvc_ceph.remove_volume(
-            zkhandler, pool, "ova_{}".format(name)
-        )
-
     # Normalize the OVA size to bytes
     ova_size_bytes = pvc_ceph.format_bytes_fromhuman(ova_size)
-    ova_size = "{}B".format(ova_size_bytes)
 
-    # Verify that the cluster has enough space to store the OVA volumes (2x OVA size, temporarily, 1x permanently)
+    # Verify that the cluster has enough space to store the OVA volumes
     pool_information = pvc_ceph.getPoolInformation(zkhandler, pool)
     pool_free_space_bytes = int(pool_information["stats"]["free_bytes"])
-    if ova_size_bytes * 2 >= pool_free_space_bytes:
+    if ova_size_bytes >= pool_free_space_bytes:
         output = {
             "message": "The cluster does not have enough free space ({}) to store the OVA volume ({}).".format(
                 pvc_ceph.format_bytes_tohuman(pool_free_space_bytes),
@@ -213,135 +516,94 @@ def upload_ova(zkhandler, pool, name, ova_size):
             )
         }
         retcode = 400
-        cleanup_ova_maps_and_volumes()
-        return output, retcode
-
-    # Create a temporary OVA blockdev
-    retflag, retdata = pvc_ceph.add_volume(
-        zkhandler, pool, "ova_{}".format(name), ova_size
-    )
-    if not retflag:
-        output = {"message": retdata.replace('"', "'")}
-        retcode = 400
-        cleanup_ova_maps_and_volumes()
-        return output, retcode
-
-    # Map the temporary OVA blockdev
-    retflag, retdata = pvc_ceph.map_volume(zkhandler, pool, "ova_{}".format(name))
-    if not retflag:
-        output = {"message": retdata.replace('"', "'")}
-        retcode = 400
-        cleanup_ova_maps_and_volumes()
         return output, retcode
-    ova_blockdev = retdata
 
-    # Save the OVA data to the temporary blockdev directly
+    # The OVF descriptor must be the first file in an OVA archive, so the disk map is known
+    # before any disk arrives and each disk can be written straight into its own volume
+    ovf = dict()
+    disk_sinks = dict()
+
+    def set_ovf(ovf_parser):
+        virtual_system = ovf_parser.getVirtualSystems()[0]
+        ovf["xml"] = ovf_parser.getXML()
+        ovf["virtual_hardware"] = ovf_parser.getVirtualHardware(virtual_system)
+        ovf["disk_map"] = ovf_parser.getDiskMap(virtual_system)
+
+    def get_sink(member_name, member_size):
+        if re.match(r".*\.ovf$", member_name):
+            return OVFSink(set_ovf)
+        if re.match(r".*\.mf$", member_name) or re.match(r".*\.cert$", member_name):
+            return None
+        if "disk_map" not in ovf:
+            raise ValueError(
+                f"File '{member_name}' precedes the OVF descriptor in the OVA archive"
+            )
+        for idx, disk in enumerate(ovf["disk_map"]):
+            if disk.get("src") not in [member_name, member_name.split("/")[-1]]:
+                continue
+            disk_identifier = "sd{}".format(chr(ord("a") + idx))
+            volume = "ova_{}_{}".format(name, disk_identifier)
+            sink = OVADiskSink(zkhandler, pool, volume, disk.get("src"), member_size)
+            disk_sinks[disk_identifier] = sink
+            return sink
+        return None
+
+    ova_parser = OVAStreamParser(get_sink)
+
+    def cleanup_ova_volumes():
+        ova_parser.abort()
+        for sink in disk_sinks.values():
+            if sink.created:
+                pvc_ceph.remove_volume(zkhandler, pool, sink.volume)
+
+    # Parse the OVA as it is uploaded
     try:
-        # This sets up a custom stream_factory that writes directly into the ova_blockdev,
-        # rather than the standard stream_factory which writes to a temporary file waiting
-        # on a save() call. This will break if the API ever uploaded multiple files, but
-        # this is an acceptable workaround.
+        # This sets up a custom stream_factory that feeds the upload directly into the OVA
+        # parser, rather than the standard stream_factory which writes to a temporary file
+        # waiting on a save() call. This will break if the API ever uploaded multiple files,
+        # but this is an acceptable workaround.
         def ova_stream_factory(
             total_content_length, filename, content_type, content_length=None
         ):
-            return open(ova_blockdev, "wb")
+            return ova_parser
 
         parse_form_data(flask.request.environ, stream_factory=ova_stream_factory)
-    except Exception:
-        output = {"message": "Failed to upload or write OVA file to temporary volume."}
+        ova_parser.close()
+    except (tarfile.TarError, zlib.error):
+        output = {"message": "The uploaded OVA file is not readable."}
         retcode = 400
-        cleanup_ova_maps_and_volumes()
+        cleanup_ova_volumes()
         return output, retcode
-
-    try:
-        # Set up the TAR reader for the OVA temporary blockdev
-        ova_archive = tarfile.open(name=ova_blockdev)
-        # Determine the files in the OVA
-        members = ova_archive.getmembers()
-    except tarfile.TarError:
-        output = {"message": "The uploaded OVA file is not readable."}
+    except Exception as e:
+        output = {"message": "Failed to upload or write OVA file: {}".format(e)}
         retcode = 400
-        cleanup_ova_maps_and_volumes()
+        cleanup_ova_volumes()
         return output, retcode
 
-    # Parse through the members list and extract the OVF file
-    for element in set(x for x in members if re.match(r".*\.ovf$", x.name)):
-        ovf_file = ova_archive.extractfile(element)
-
-    # Parse the OVF file to get our VM details
-    ovf_parser = OVFParser(ovf_file)
-    ovf_xml_raw = ovf_parser.getXML()
-    virtual_system = ovf_parser.getVirtualSystems()[0]
-    virtual_hardware = ovf_parser.getVirtualHardware(virtual_system)
-    disk_map = ovf_parser.getDiskMap(virtual_system)
+    if "disk_map" not in ovf:
+        output = {
+            "message": "The uploaded OVA file does not contain an OVF descriptor."
+        }
+        retcode = 400
+        cleanup_ova_volumes()
+        return output, retcode
 
-    # Close the OVF file
-    ovf_file.close()
+    ovf_xml_raw = ovf["xml"]
+    virtual_hardware = ovf["virtual_hardware"]
+    disk_map = ovf["disk_map"]
 
-    # Create and upload each disk volume
     for idx, disk in enumerate(disk_map):
         disk_identifier = "sd{}".format(chr(ord("a") + idx))
-        volume = "ova_{}_{}".format(name, disk_identifier)
-        dev_src = disk.get("src")
-        dev_size_raw = ova_archive.getmember(dev_src).size
-        vm_volume_size = disk.get("capacity")
-
-        # Normalize the dev size to bytes
-        dev_size = "{}B".format(pvc_ceph.format_bytes_fromhuman(dev_size_raw))
-
-        def cleanup_img_maps():
-            # Unmap the temporary blockdev
-            retflag, retdata = pvc_ceph.unmap_volume(zkhandler, pool, volume)
-
-        # Create the blockdev
-        retflag, retdata = pvc_ceph.add_volume(zkhandler, pool, volume, dev_size)
-        if not retflag:
-            output = {"message": retdata.replace('"', "'")}
-            retcode = 400
-            cleanup_img_maps()
-            cleanup_ova_maps_and_volumes()
-            return output, retcode
-
-        # Map the blockdev
-        retflag, retdata = pvc_ceph.map_volume(zkhandler, pool, volume)
-        if not retflag:
-            output = {"message": retdata.replace('"', "'")}
-            retcode = 400
-            cleanup_img_maps()
-            cleanup_ova_maps_and_volumes()
-            return output, retcode
-        temp_blockdev = retdata
-
-        try:
-            # Open (extract) the TAR archive file and seek to byte 0
-            vmdk_file = ova_archive.extractfile(disk.get("src"))
-            vmdk_file.seek(0)
-            # Open the temporary blockdev and seek to byte 0
-            blk_file = open(temp_blockdev, "wb")
-            blk_file.seek(0)
-            # Write the contents of vmdk_file into blk_file
-            blk_file.write(vmdk_file.read())
-            # Close blk_file (and flush the buffers)
-            blk_file.close()
-            # Close vmdk_file
-            vmdk_file.close()
-            # Perform an OS-level sync
-            pvc_common.run_os_command("sync")
-        except Exception:
+        if disk_identifier not in disk_sinks:
             output = {
-                "message": "Failed to write image file '{}' to temporary volume.".format(
+                "message": "The uploaded OVA file does not contain disk image '{}'.".format(
                     disk.get("src")
                 )
             }
             retcode = 400
-            cleanup_img_maps()
-            cleanup_ova_maps_and_volumes()
+            cleanup_ova_volumes()
             return output, retcode
 
-        cleanup_img_maps()
-
-    cleanup_ova_maps_and_volumes()
-
     # Prepare the database entries
     query = "INSERT INTO ova (name, ovf) VALUES (%s, %s);"
     args = (name, ovf_xml_raw)
@@ -366,7 +628,7 @@ def upload_ova(zkhandler, pool, name, ova_size):
     # Prepare disk entries in ova_volume
     for idx, disk in enumerate(disk_map):
         disk_identifier = "sd{}".format(chr(ord("a") + idx))
-        volume_type = disk.get("src").split(".")[-1]
+        volume_type = disk_sinks[disk_identifier].volume_format
         volume = "ova_{}_{}".format(name, disk_identifier)
         vm_volume_size = disk.get("capacity")
 
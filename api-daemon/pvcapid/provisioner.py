@@ -19,12 +19,12 @@
 #
 ###############################################################################
 
-import psycopg2
-import psycopg2.extras
 import re
 
 from pvcapid.Daemon import config, strtobool
 
+from daemon_lib.database import open_database, close_database, execute_prepared
+
 from pvcapid.ova import list_ova
 
 
@@ -56,33 +56,15 @@ class ProvisioningError(Exception):
 
 
 #
-# Common functions
+# Template List functions
 #
+# The element table and sort order aggregated into each template type's rows
+TEMPLATE_ELEMENTS = {
+    "network_template": ("networks", "network", "id"),
+    "storage_template": ("disks", "storage", "disk_id"),
+}
 
 
-# Database connections
-def open_database(config):
-    conn = psycopg2.connect(
-        host=config["api_postgresql_host"],
-        port=config["api_postgresql_port"],
-        dbname=config["api_postgresql_dbname"],
-        user=config["api_postgresql_user"],
-        password=config["api_postgresql_password"],
-    )
-    cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    return conn, cur
-
-
-def close_database(conn, cur, failed=False):
-    if not failed:
-        conn.commit()
-    cur.close()
-    conn.close()
-
-
-#
-# Template List functions
-#
 def list_template(limit, table, is_fuzzy=True):
     if limit:
         if is_fuzzy:
@@ -97,38 +79,44 @@ def list_template(limit, table, is_fuzzy=True):
                 limit = limit[:-1]
 
         args = (limit,)
-        query = "SELECT * FROM {} WHERE name LIKE %s;".format(table)
+        where = "WHERE {}.name LIKE %s".format(table)
     else:
         args = ()
-        query = "SELECT * FROM {};".format(table)
+        where = ""
+
+    if table in TEMPLATE_ELEMENTS:
+        # Aggregate the template's elements into each row in one query, rather than one
+        # additional query per template
+        key, element_table, order = TEMPLATE_ELEMENTS[table]
+        query = """SELECT {table}.*, COALESCE(
+            json_agg({element_table}.* ORDER BY {element_table}.{order})
+            FILTER (WHERE {element_table}.id IS NOT NULL), '[]'
+        ) AS {key}
+        FROM {table}
+        LEFT JOIN {element_table} ON {element_table}.{table} = {table}.id
+        {where}
+        GROUP BY {table}.id;""".format(
+            table=table,
+            element_table=element_table,
+            order=order,
+            key=key,
+            where=where,
+        )
+    else:
+        query = "SELECT * FROM {} {};".format(table, where)
 
     conn, cur = open_database(config)
-    cur.execute(query, args)
+    if limit and not is_fuzzy:
+        # Exact-name lookups are used heavily during provisioning, so prepare them
+        execute_prepared(cur, "list_{}_by_name".format(table), query, args)
+    else:
+        cur.execute(query, args)
     data = cur.fetchall()
+    close_database(conn, cur)
 
     if not isinstance(data, list):
         data = [data]
 
-    if table == "network_template":
-        for template_id, template_data in enumerate(data):
-            # Fetch list of VNIs from network table
-            query = "SELECT * FROM network WHERE network_template = %s;"
-            args = (template_data["id"],)
-            cur.execute(query, args)
-            vnis = cur.fetchall()
-            data[template_id]["networks"] = vnis
-
-    if table == "storage_template":
-        for template_id, template_data in enumerate(data):
-            # Fetch list of VNIs from network table
-            query = "SELECT * FROM storage WHERE storage_template = %s"
-            args = (template_data["id"],)
-            cur.execute(query, args)
-            disks = cur.fetchall()
-            data[template_id]["disks"] = sorted(disks, key=lambda x: x["disk_id"])
-
-    close_database(conn, cur)
-
     return data
 
 
@@ -715,7 +703,10 @@ def list_userdata(limit, is_fuzzy=True):
         args = ()
 
     conn, cur = open_database(config)
-    cur.execute(query, args)
+    if limit and not is_fuzzy:
+        execute_prepared(cur, "list_userdata_by_name", query, args)
+    else:
+        cur.execute(query, args)
     data = cur.fetchall()
     close_database(conn, cur)
     if data:
@@ -810,7 +801,10 @@ def list_script(limit, is_fuzzy=True):
         args = ()
 
     conn, cur = open_database(config)
-    cur.execute(query, args)
+    if limit and not is_fuzzy:
+        execute_prepared(cur, "list_script_by_name", query, args)
+    else:
+        cur.execute(query, args)
     data = cur.fetchall()
     close_database(conn, cur)
     if data:
@@ -898,22 +892,46 @@ def list_profile(limit, is_fuzzy=True):
             else:
                 limit = limit[:-1]
 
-        query = "SELECT * FROM {} WHERE name LIKE %s;".format("profile")
+        where = "WHERE profile.name LIKE %s"
         args = (limit,)
     else:
-        query = "SELECT * FROM {};".format("profile")
+        where = ""
         args = ()
 
+    # Resolve the name of each subelement in the same query
+    query = """SELECT profile.id, profile.name, profile.profile_type, profile.arguments,
+        system_template.name AS system_template,
+        network_template.name AS network_template,
+        storage_template.name AS storage_template,
+        userdata.name AS userdata,
+        script.name AS script,
+        ova.name AS ova
+    FROM profile
+    LEFT JOIN system_template ON system_template.id = profile.system_template
+    LEFT JOIN network_template ON network_template.id = profile.network_template
+    LEFT JOIN storage_template ON storage_template.id = profile.storage_template
+    LEFT JOIN userdata ON userdata.id = profile.userdata
+    LEFT JOIN script ON script.id = profile.script
+    LEFT JOIN ova ON ova.id = profile.ova
+    {}
+    ORDER BY profile.id;""".format(
+        where
+    )
+
     conn, cur = open_database(config)
-    cur.execute(query, args)
+    if limit and not is_fuzzy:
+        execute_prepared(cur, "list_profile_by_name", query, args)
+    else:
+        cur.execute(query, args)
     orig_data = cur.fetchall()
+    close_database(conn, cur)
+
     data = list()
     for profile in orig_data:
         profile_data = dict()
         profile_data["id"] = profile["id"]
         profile_data["name"] = profile["name"]
         profile_data["type"] = profile["profile_type"]
-        # Parse the name of each subelement
         for etype in (
             "system_template",
             "network_template",
@@ -922,19 +940,14 @@ def list_profile(limit, is_fuzzy=True):
             "script",
             "ova",
         ):
-            query = "SELECT name from {} WHERE id = %s".format(etype)
-            args = (profile[etype],)
-            cur.execute(query, args)
-            try:
-                name = cur.fetchone()["name"]
-            except Exception:
-                name = "N/A"
-            profile_data[etype] = name
+            if profile[etype] is not None:
+                profile_data[etype] = profile[etype]
+            else:
+                profile_data[etype] = "N/A"
         # Split the arguments back into a list
         profile_data["arguments"] = profile["arguments"].split("|")
         # Append the new data to our actual output structure
         data.append(profile_data)
-    close_database(conn, cur)
     if data:
         return data, 200
     else:
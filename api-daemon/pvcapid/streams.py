@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+
+# streams.py - PVC HTTP API server-push (Server-Sent Events) streams
+# Part of the Parallel Virtual Cluster (PVC) system
+#
+#    Copyright (C) 2018-2024 Joshua M. Boniface <joshua@boniface.me>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+import flask
+import json
+import queue
+import threading
+
+from pvcapid.Daemon import config
+
+from daemon_lib.zkhandler import ZKConnection, ZKHandler
+
+import daemon_lib.common as pvc_common
+
+
+# The interval, in seconds, between keepalive comments on an idle stream; these let clients and
+# proxies detect dead connections, and let the API notice disconnected clients
+KEEPALIVE_INTERVAL = 15
+
+# The maximum number of concurrent streams; each stream occupies an API worker thread for its
+# whole duration, so these are limited to leave threads free for normal requests
+MAX_STREAMS = 4
+
+# The number of trailing lines of the previous log buffer matched to find new lines in a log buffer
+LOG_MATCH_LINES = 3
+
+# The maximum number of trailing log lines sent when a log stream starts; larger requests are
+# clamped to this
+MAX_LOG_LINES = 10000
+
+# Task states after which a task will not change again
+TASK_FINAL_STATES = ["SUCCESS", "FAILURE", "REVOKED"]
+
+# Together with the bulk data transfers, streams always leave a worker thread free
+stream_slots = threading.BoundedSemaphore(
+    max(
+        min(
+            MAX_STREAMS,
+            config["api_worker_threads"] - config["api_max_transfers"] - 1,
+        ),
+        1,
+    )
+)
+
+
+#
+# Stream helpers
+#
+def format_event(data, event="message"):
+    """
+    Format data as a Server-Sent Event
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def format_keepalive():
+    """
+    Format a Server-Sent Events comment, which clients ignore
+    """
+    return ": keepalive\n\n"
+
+
+def get_new_lines(old_lines, new_lines):
+    """
+    Return the lines appended to a rolling log buffer between two reads of it
+    """
+    if not old_lines:
+        return new_lines
+
+    # Search backwards for the tail of the old buffer within the new buffer, shortening the tail
+    # in case most of the old buffer has already rolled out of the new buffer
+    for length in range(min(LOG_MATCH_LINES, len(old_lines)), 0, -1):
+        tail = old_lines[-length:]
+        for idx in range(len(new_lines) - length, -1, -1):
+            if new_lines[idx : idx + length] == tail:
+                return new_lines[idx + length :]
+
+    # The buffer rolled over completely, so every line is new
+    return new_lines
+
+
+def stream_response(events):
+    """
+    Return a streaming response for a generator of events
+
+    Returns a 503 if all stream slots are in use; clients are expected to fall back to polling.
+    """
+    if not stream_slots.acquire(blocking=False):
+        return (
+            {"message": "Too many active streams; poll instead."},
+            503,
+            {"Retry-After": str(config["api_retry_after"])},
+        )
+
+    response = flask.Response(
+        flask.stream_with_context(events),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    response.call_on_close(stream_slots.release)
+
+    return response
+
+
+def watch_keys(keys):
+    """
+    Yield (name, data) tuples each time the data of one of several keys changes, or None when no
+    key has changed for KEEPALIVE_INTERVAL seconds
+
+    {keys} is a dictionary of names to (key, is_children) tuples; the data of children keys is
+    their list of children. The data of a key is None once it has been deleted.
+    """
+    zkhandler = ZKHandler(config)
+    zkhandler.connect()
+
+    updates = queue.Queue()
+    stopped = threading.Event()
+
+    def add_data_watch(name, path):
+        @zkhandler.zk_conn.DataWatch(path)
+        def watch(data, stat, event=None):
+            if stopped.is_set():
+                return False
+            updates.put(
+                (name, data.decode(zkhandler.encoding) if data is not None else None)
+            )
+            if event is not None and event.type == "DELETED":
+                return False
+
+    def add_children_watch(name, path):
+        @zkhandler.zk_conn.ChildrenWatch(path)
+        def watch(children):
+            if stopped.is_set():
+                return False
+            updates.put((name, children))
+
+    try:
+        for name, (key, is_children) in keys.items():
+            if is_children:
+                add_children_watch(name, zkhandler.get_schema_path(key))
+            else:
+                add_data_watch(name, zkhandler.get_schema_path(key))
+
+        while True:
+            try:
+                yield updates.get(timeout=KEEPALIVE_INTERVAL)
+            except queue.Empty:
+                yield None
+    finally:
+        stopped.set()
+        zkhandler.disconnect()
+
+
+def log_events(key, lines):
+    """
+    Yield the last {lines} lines of a rolling log buffer key, then each line appended to it, as
+    events until the key is deleted
+    """
+    old_lines = None
+    for update in watch_keys({"log": (key, False)}):
+        if update is None:
+            yield format_keepalive()
+            continue
+
+        _, data = update
+        if data is None:
+            yield format_event({}, event="end")
+            return
+
+        # Ignore the empty "line" after a trailing newline, which may not yet be a complete line
+        new_lines = data.split("\n")
+        if new_lines and new_lines[-1] == "":
+            new_lines.pop()
+
+        if old_lines is None:
+            send_lines = new_lines[-lines:]
+        else:
+            send_lines = get_new_lines(old_lines, new_lines)
+        old_lines = new_lines
+
+        if send_lines:
+            yield format_event({"lines": send_lines}, event="log")
+
+
+def get_log_lines(lines):
+    """
+    Return the number of trailing log lines to send when a log stream starts, clamped to
+    MAX_LOG_LINES; raises ValueError if lines is not a positive integer
+    """
+    # Default to 10 lines of log if not set
+    if lines is None or lines == "":
+        return 10
+
+    lines = int(lines)
+    if lines < 1:
+        raise ValueError(lines)
+
+    return min(lines, MAX_LOG_LINES)
+
+
+#
+# Stream functions
+#
+@ZKConnection(config)
+def node_log_stream(zkhandler, node, lines=None):
+    """
+    Return a stream of the log lines of Node.
+    """
+    try:
+        lines = get_log_lines(lines)
+    except ValueError:
+        return {"message": "A lines value must be a positive integer"}, 400
+
+    if not pvc_common.verifyNode(zkhandler, node):
+        return {
+            "message": "No node named {} is present in the cluster.".format(node)
+        }, 404
+
+    return stream_response(log_events(("logs.messages", node), lines))
+
+
+@ZKConnection(config)
+def vm_console_stream(zkhandler, vm, lines=None):
+    """
+    Return a stream of the console log lines of VM.
+    """
+    try:
+        lines = get_log_lines(lines)
+    except ValueError:
+        return {"message": "A lines value must be a positive integer"}, 400
+
+    dom_uuid = pvc_common.getDomainUUID(zkhandler, vm)
+    if not dom_uuid:
+        return {"message": 'Could not find VM "{}" in the cluster!'.format(vm)}, 404
+
+    return stream_response(log_events(("domain.console.log", dom_uuid), lines))
+
+
+def task_stream(celery, task_id, get_task_status):
+    """
+    Return a stream of the status of a Celery task, sent each time it changes until it completes
+
+    Task status updates are received from the Celery result backend's publish/subscribe channel
+    for the task, rather than by polling the result backend.
+    """
+
+    def task_events():
+        pubsub = celery.backend.client.pubsub(ignore_subscribe_messages=True)
+        try:
+            # Subscribe before reading the initial status, so no update can be missed
+            pubsub.subscribe(celery.backend.get_key_for_task(task_id))
+
+            last_status = None
+            while True:
+                status = get_task_status(task_id)
+                if status != last_status:
+                    yield format_event(status, event="status")
+                    last_status = status
+                if status["state"] in TASK_FINAL_STATES:
+                    yield format_event({}, event="end")
+                    return
+
+                if pubsub.get_message(timeout=KEEPALIVE_INTERVAL) is None:
+                    yield format_keepalive()
+        finally:
+            pubsub.close()
+
+    return stream_response(task_events())
+
+
+def cluster_event_stream():
+    """
+    Return a stream of cluster events: changes to the nodes, VMs, networks and faults present in
+    the cluster, and to the cluster primary node and maintenance mode
+    """
+
+    def cluster_events():
+        children = dict()
+        for update in watch_keys(
+            {
+                "node": ("base.node", True),
+                "vm": ("base.domain", True),
+                "network": ("base.network", True),
+                "fault": ("base.faults", True),
+                "primary_node": ("base.config.primary_node", False),
+                "maintenance": ("base.config.maintenance", False),
+            }
+        ):
+            if update is None:
+                yield format_keepalive()
+                continue
+
+            name, data = update
+            if isinstance(data, list):
+                # Send only the changes to lists of children, which may be very large
+                old_children = children.get(name, set())
+                children[name] = set(data)
+                yield format_event(
+                    {
+                        "type": name,
+                        "added": sorted(children[name] - old_children),
+                        "removed": sorted(old_children - children[name]),
+                    },
+                    event="children",
+                )
+            else:
+                yield format_event({"type": name, "value": data}, event="value")
+
+    return stream_response(cluster_events())
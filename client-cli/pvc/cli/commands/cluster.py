@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+
+# cluster.py - PVC Click CLI cluster commands
+# Part of the Parallel Virtual Cluster (PVC) system
+#
+#    Copyright (C) 2018-2024 Joshua M. Boniface <joshua@boniface.me>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+from json import dump as jdump
+from json import dumps as jdumps
+from json import loads as jloads
+
+from pvc.cli.common import *
+from pvc.cli.helpers import *
+from pvc.cli.waiters import *
+from pvc.cli.parsers import *
+from pvc.cli.formatters import *
+
+import pvc.lib
+
+import click
+
+
+###############################################################################
+# > pvc cluster
+###############################################################################
+@click.group(
+    name="cluster",
+    short_help="Manage PVC clusters.",
+    context_settings=CONTEXT_SETTINGS,
+)
+def cli_cluster():
+    """
+    Manage and view the status of a PVC cluster.
+    """
+    pass
+
+
+###############################################################################
+# > pvc cluster init
+###############################################################################
+@click.command(
+    name="init",
+    short_help="Initialize a new cluster.",
+)
+@connection_req
+@click.option(
+    "-o",
+    "--overwrite",
+    "overwrite_flag",
+    is_flag=True,
+    default=False,
+    help="Remove and overwrite any existing data (DANGEROUS)",
+)
+@confirm_opt("Initialize the cluster and delete all data")
+def cli_cluster_init(
+    overwrite_flag,
+):
+    """
+    Perform initialization of a new PVC cluster.
+
+    If the "-o"/"--overwrite" option is specified, all existing data in the cluster will be deleted
+    before new, empty data is written. THIS IS DANGEROUS. YOU WILL LOSE ALL DATA ON THE CLUSTER. Do
+    not "--overwrite" to an existing cluster unless you are absolutely sure what you are doing.
+
+    It is not advisable to initialize a running cluster as this can cause undefined behaviour.
+    Instead, stop all node daemons first and start the API daemon manually before running this
+    command.
+    """
+
+    echo(CLI_CONFIG, "Some music while we're Layin' Pipe? https://youtu.be/sw8S_Kv89IU")
+
+    retcode, retmsg = pvc.lib.cluster.initialize(CLI_CONFIG, overwrite_flag)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc cluster backup
+###############################################################################
+@click.command(
+    name="backup",
+    short_help="Create JSON backup of cluster.",
+)
+@connection_req
+@click.option(
+    "-f",
+    "--file",
+    "filename",
+    default=None,
+    type=click.File(mode="w"),
+    help="Write backup data to this file.",
+)
+def cli_cluster_backup(
+    filename,
+):
+    """
+    Create a JSON-format backup of the cluster Zookeeper state database.
+    """
+
+    retcode, retdata = pvc.lib.cluster.backup(CLI_CONFIG)
+    json_data = jloads(retdata)
+    if retcode and filename is not None:
+        jdump(json_data, filename)
+        finish(retcode, f'''Backup written to file "{filename.name}"''')
+    else:
+        finish(retcode, json_data)
+
+
+###############################################################################
+# > pvc cluster restore
+###############################################################################
+@click.command(
+    name="restore",
+    short_help="Restore JSON backup to cluster.",
+)
+@connection_req
+@click.option(
+    "-f",
+    "--filename",
+    "filename",
+    required=True,
+    default=None,
+    type=click.File(),
+    help="Read backup data from this file.",
+)
+@confirm_opt("Restore backup and overwrite all cluster data")
+def cli_cluster_restore(
+    filename,
+):
+    """
+    Restore a JSON-format backup to the cluster Zookeeper state database.
+
+    All existing data in the cluster will be deleted before the restored data is written. THIS IS
+    DANGEROUS. YOU WILL LOSE ALL (CURRENT) DATA ON THE CLUSTER. Do not restore to an existing
+    cluster unless you are absolutely sure what you are doing.
+
+    It is not advisable to restore to a running cluster as this can cause undefined behaviour.
+    Instead, stop all node daemons first and start the API daemon manually before running this
+    command.
+    """
+
+
+###############################################################################
+# > pvc cluster status
+###############################################################################
+@click.command(
+    name="status",
+    short_help="Show cluster status.",
+)
+@connection_req
+@format_opt(
+    {
+        "pretty": cli_cluster_status_format_pretty,
+        "short": cli_cluster_status_format_short,
+        "json": lambda d: jdumps(d),
+        "json-pretty": lambda d: jdumps(d, indent=2),
+    }
+)
+def cli_cluster_status(
+    format_function,
+):
+    """
+    Show information and health about a PVC cluster.
+
+    \b
+    Format options:
+        "pretty": Output all details in a nice colourful format.
+        "short" Output only details about cluster health in a nice colourful format.
+        "json": Output in unformatted JSON.
+        "json-pretty": Output in formatted JSON.
+    """
+
+    retcode, retdata = pvc.lib.cluster.get_info(CLI_CONFIG)
+    finish(retcode, retdata, format_function)
+
+
+###############################################################################
+# > pvc cluster fault
+###############################################################################
+@click.group(
+    name="fault",
+    short_help="Manage PVC cluster faults.",
+    context_settings=CONTEXT_SETTINGS,
+)
+def cli_cluster_fault():
+    """
+    Manage faults in the PVC cluster.
+    """
+    pass
+
+
+###############################################################################
+# > pvc cluster fault list
+###############################################################################
+@click.command(
+    name="list",
+    short_help="List all cluster faults.",
+)
+@click.argument("limit", default=None, required=False)
+@format_opt(
+    {
+        "short": cli_cluster_fault_list_format_short,
+        "long": cli_cluster_fault_list_format_long,
+        "json": lambda d: jdumps(d),
+        "json-pretty": lambda d: jdumps(d, indent=2),
+    },
+    default_format="short",
+)
+@connection_req
+def cli_cluster_fault_list(limit, format_function):
+    """
+    List all faults in the PVC cluster, optionally limited to fault ID LIMIT.
+    """
+
+    retcode, retdata = pvc.lib.faults.get_list(
+        CLI_CONFIG,
+        limit=limit,
+    )
+    finish(retcode, retdata, format_function)
+
+
+###############################################################################
+# > pvc cluster fault ack
+###############################################################################
+@click.command(
+    name="ack",
+    short_help="Acknowledge a cluster fault.",
+)
+@click.argument("fault_id", nargs=-1, required=True)
+@connection_req
+def cli_cluster_fault_acknowledge(fault_id):
+    """
+    Acknowledge the cluster fault FAULT_ID; multiple FAULT_IDs may be specified.
+    """
+
+    faults = list(fault_id)
+    retcode, retdata = pvc.lib.faults.acknowledge(CLI_CONFIG, faults)
+    finish(retcode, retdata)
+
+
+###############################################################################
+# > pvc cluster fault ack-all
+###############################################################################
+@click.command(
+    name="ack-all",
+    short_help="Acknowledge all cluster faults.",
+)
+@confirm_opt("Acknowledge all current cluster faults")
+@connection_req
+def cli_cluster_fault_acknowledge_all():
+    """
+    Acknowledge all cluster faults.
+    """
+
+    retcode, retdata = pvc.lib.faults.acknowledge_all(CLI_CONFIG)
+    finish(retcode, retdata)
+
+
+###############################################################################
+# > pvc cluster fault delete
+###############################################################################
+@click.command(
+    name="delete",
+    short_help="Delete a cluster fault.",
+)
+@click.argument("fault_id", nargs=-1, required=True)
+@connection_req
+def cli_cluster_fault_delete(fault_id):
+    """
+    Delete the cluster fault FAULT_ID; multiple FAULT_IDs may be specified.
+    """
+
+    faults = list(fault_id)
+    retcode, retdata = pvc.lib.faults.delete(CLI_CONFIG, faults)
+    finish(retcode, retdata)
+
+
+###############################################################################
+# > pvc cluster fault delete-all
+###############################################################################
+@click.command(
+    name="delete-all",
+    short_help="Delete all cluster faults.",
+)
+@confirm_opt("Delete all current cluster faults")
+@connection_req
+def cli_cluster_fault_delete_all():
+    """
+    Delete all cluster faults.
+    """
+
+    retcode, retdata = pvc.lib.faults.delete_all(CLI_CONFIG)
+    finish(retcode, retdata)
+
+
+###############################################################################
+# > pvc cluster maintenance
+###############################################################################
+@click.group(
+    name="maintenance",
+    short_help="Manage PVC cluster maintenance state.",
+    context_settings=CONTEXT_SETTINGS,
+)
+def cli_cluster_maintenance():
+    """
+    Manage the maintenance mode of a PVC cluster.
+    """
+    pass
+
+
+###############################################################################
+# > pvc cluster maintenance on
+###############################################################################
+@click.command(
+    name="on",
+    short_help="Enable cluster maintenance mode.",
+)
+@connection_req
+def cli_cluster_maintenance_on():
+    """
+    Enable maintenance mode on a PVC cluster.
+    """
+
+    retcode, retdata = pvc.lib.cluster.maintenance_mode(CLI_CONFIG, "true")
+    finish(retcode, retdata)
+
+
+###############################################################################
+# > pvc cluster maintenance off
+###############################################################################
+@click.command(
+    name="off",
+    short_help="Disable cluster maintenance mode.",
+)
+@connection_req
+def cli_cluster_maintenance_off():
+    """
+    Disable maintenance mode on a PVC cluster.
+    """
+
+    retcode, retdata = pvc.lib.cluster.maintenance_mode(CLI_CONFIG, "false")
+    finish(retcode, retdata)
+
+
+###############################################################################
+# > pvc cluster task
+###############################################################################
+@click.command(name="task", short_help="Show status of worker task.")
+@connection_req
+@click.argument("task_id", required=False, default=None)
+@click.option(
+    "--wait/--no-wait",
+    "wait_flag",
+    is_flag=True,
+    default=True,
+    show_default=True,
+    help="""Wait or don't wait for task to complete, showing progress. Requires TASK_ID; overrides "-f"/"--format".""",
+)
+@format_opt(
+    {
+        "pretty": cli_cluster_task_format_pretty,
+        "raw": lambda d: (
+            "\n".join([t["id"] for t in d]) if isinstance(d, list) else d["state"]
+        ),
+        "json": lambda d: jdumps(d),
+        "json-pretty": lambda d: jdumps(d, indent=2),
+    }
+)
+def cli_cluster_task(task_id, wait_flag, format_function):
+    """
+    Show the current status of worker task TASK_ID or a list of all active and pending tasks.
+    """
+    if task_id is None:
+        wait_flag = False
+
+    if wait_flag:
+        # First validate that this is actually a valid task that is running
+        echo(CLI_CONFIG, "Querying cluster for tasks...", newline=False)
+        retcode, retdata = pvc.lib.common.task_status(CLI_CONFIG, None)
+        echo(CLI_CONFIG, " done.")
+        echo(CLI_CONFIG, "")
+        if task_id in [i["id"] for i in retdata]:
+            task = [i for i in retdata if i["id"] == task_id][0]
+            retmsg = wait_for_celery_task(
+                CLI_CONFIG,
+                {"task_id": task["id"], "task_name": task["name"]},
+                start_late=True,
+            )
+        else:
+            retmsg = f"No task with ID {task_id} found."
+        finish(retcode, retmsg)
+    else:
+        echo(CLI_CONFIG, "Querying cluster for tasks...", newline=False)
+        retcode, retdata = pvc.lib.common.task_status(CLI_CONFIG, task_id)
+        echo(CLI_CONFIG, " done.")
+        echo(CLI_CONFIG, "")
+        finish(retcode, retdata, format_function)
+
+
+###############################################################################
+# Click command tree
+###############################################################################
+
+cli_cluster.add_command(cli_cluster_init)
+cli_cluster.add_command(cli_cluster_backup)
+cli_cluster.add_command(cli_cluster_restore)
+cli_cluster.add_command(cli_cluster_status)
+cli_cluster_fault.add_command(cli_cluster_fault_list)
+cli_cluster_fault.add_command(cli_cluster_fault_acknowledge)
+cli_cluster_fault.add_command(cli_cluster_fault_acknowledge_all)
+cli_cluster_fault.add_command(cli_cluster_fault_delete)
+cli_cluster_fault.add_command(cli_cluster_fault_delete_all)
+cli_cluster.add_command(cli_cluster_fault)
+cli_cluster_maintenance.add_command(cli_cluster_maintenance_on)
+cli_cluster_maintenance.add_command(cli_cluster_maintenance_off)
+cli_cluster.add_command(cli_cluster_maintenance)
+cli_cluster.add_command(cli_cluster_task)
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+
+# connection.py - PVC Click CLI connection commands
+# Part of the Parallel Virtual Cluster (PVC) system
+#
+#    Copyright (C) 2018-2024 Joshua M. Boniface <joshua@boniface.me>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+from json import dumps as jdumps
+
+from pvc.cli.common import *
+from pvc.cli.helpers import *
+from pvc.cli.waiters import *
+from pvc.cli.parsers import *
+from pvc.cli.formatters import *
+
+import click
+
+
+###############################################################################
+# > pvc connection
+###############################################################################
+@click.group(
+    name="connection",
+    short_help="Manage PVC API connections.",
+    context_settings=CONTEXT_SETTINGS,
+)
+def cli_connection():
+    """
+    Manage the PVC clusters this CLI client can connect to.
+    """
+    pass
+
+
+###############################################################################
+# > pvc connection add
+###############################################################################
+@click.command(
+    name="add",
+    short_help="Add connections to the client database.",
+)
+@click.argument("name")
+@click.option(
+    "-d",
+    "--description",
+    "description",
+    required=False,
+    default="N/A",
+    help="A text description of the connection.",
+)
+@click.option(
+    "-a",
+    "--address",
+    "address",
+    required=True,
+    help="The IP address/hostname of the connection API.",
+)
+@click.option(
+    "-p",
+    "--port",
+    "port",
+    required=False,
+    default=7370,
+    show_default=True,
+    help="The port of the connection API.",
+)
+@click.option(
+    "-k",
+    "--api-key",
+    "api_key",
+    required=False,
+    default=None,
+    help="An API key to use for authentication, if required.",
+)
+@click.option(
+    "-s/-S",
+    "--ssl/--no-ssl",
+    "ssl_flag",
+    is_flag=True,
+    default=False,
+    help="Whether or not to use SSL for the API connection.  [default: False]",
+)
+def cli_connection_add(
+    name,
+    description,
+    address,
+    port,
+    api_key,
+    ssl_flag,
+):
+    """
+    Add the PVC connection NAME to the database of the local CLI client.
+
+    Adding a connection with an existing NAME will replace the existing connection.
+    """
+
+    # Set the scheme based on {ssl_flag}
+    scheme = "https" if ssl_flag else "http"
+
+    # Get the store data
+    connections_config = get_store(CLI_CONFIG["store_path"])
+
+    # Add (or update) the new connection details
+    connections_config[name] = {
+        "description": description,
+        "host": address,
+        "port": port,
+        "scheme": scheme,
+        "api_key": api_key,
+    }
+
+    # Update the store data
+    update_store(CLI_CONFIG["store_path"], connections_config)
+
+    finish(
+        True,
+        f"""Added connection "{name}" ({scheme}://{address}:{port}) to client database""",
+    )
+
+
+###############################################################################
+# > pvc connection remove
+###############################################################################
+@click.command(
+    name="remove",
+    short_help="Remove connections from the client database.",
+)
+@click.argument("name")
+def cli_connection_remove(
+    name,
+):
+    """
+    Remove the PVC connection NAME from the database of the local CLI client.
+    """
+
+    # Get the store data
+    connections_config = get_store(CLI_CONFIG["store_path"])
+
+    # Remove the entry matching the name
+    try:
+        connections_config.pop(name)
+    except KeyError:
+        finish(False, f"""No connection found with name "{name}" in local database""")
+
+    # Update the store data
+    update_store(CLI_CONFIG["store_path"], connections_config)
+
+    finish(True, f"""Removed connection "{name}" from client database""")
+
+
+###############################################################################
+# > pvc connection list
+###############################################################################
+@click.command(
+    name="list",
+    short_help="List connections in the client database.",
+)
+@click.option(
+    "-k",
+    "--show-keys",
+    "show_keys_flag",
+    is_flag=True,
+    default=False,
+    help="Show secure API keys.",
+)
+@format_opt(
+    {
+        "pretty": cli_connection_list_format_pretty,
+        "raw": lambda d: "\n".join([c["name"] for c in d]),
+        "json": lambda d: jdumps(d),
+        "json-pretty": lambda d: jdumps(d, indent=2),
+        "json-prometheus": cli_connection_list_format_prometheus_json,
+    }
+)
+def cli_connection_list(
+    show_keys_flag,
+    format_function,
+):
+    """
+    List all PVC connections in the database of the local CLI client.
+
+    \b
+    Format options:
+        "pretty": Output all details in a nice tabular list format.
+        "raw": Output connection names one per line.
+        "json": Output in unformatted JSON.
+        "json-pretty": Output in formatted JSON.
+        "json-prometheus": Output in Prometheus file service discovery JSON format.
+    """
+
+    connections_config = get_store(CLI_CONFIG["store_path"])
+    connections_data = cli_connection_list_parser(connections_config, show_keys_flag)
+    finish(True, connections_data, format_function)
+
+
+###############################################################################
+# > pvc connection detail
+###############################################################################
+@click.command(
+    name="detail",
+    short_help="List status of all connections in the client database.",
+)
+@format_opt(
+    {
+        "pretty": cli_connection_detail_format_pretty,
+        "json": lambda d: jdumps(d),
+        "json-pretty": lambda d: jdumps(d, indent=2),
+    }
+)
+def cli_connection_detail(
+    format_function,
+):
+    """
+    List the status and information of all PVC cluster in the database of the local CLI client.
+
+    \b
+    Format options:
+        "pretty": Output a nice tabular list of all details.
+        "json": Output in unformatted JSON.
+        "json-pretty": Output in formatted JSON.
+    """
+
+    echo(
+        CLI_CONFIG,
+        "Gathering information from all clusters... ",
+        newline=False,
+        stderr=True,
+    )
+    connections_config = get_store(CLI_CONFIG["store_path"])
+    connections_data = cli_connection_detail_parser(connections_config)
+    echo(CLI_CONFIG, "done.", stderr=True)
+    echo(CLI_CONFIG, "", stderr=True)
+    finish(True, connections_data, format_function)
+
+
+###############################################################################
+# Click command tree
+###############################################################################
+
+cli_connection.add_command(cli_connection_add)
+cli_connection.add_command(cli_connection_remove)
+cli_connection.add_command(cli_connection_list)
+cli_connection.add_command(cli_connection_detail)
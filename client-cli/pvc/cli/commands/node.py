@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+
+# node.py - PVC Click CLI node commands
+# Part of the Parallel Virtual Cluster (PVC) system
+#
+#    Copyright (C) 2018-2024 Joshua M. Boniface <joshua@boniface.me>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+from json import dumps as jdumps
+
+from pvc.cli.common import *
+from pvc.cli.helpers import *
+from pvc.cli.waiters import *
+from pvc.cli.parsers import *
+from pvc.cli.formatters import *
+
+import pvc.lib
+
+import click
+
+
+###############################################################################
+# > pvc node
+###############################################################################
+@click.group(
+    name="node",
+    short_help="Manage PVC nodes.",
+    context_settings=CONTEXT_SETTINGS,
+)
+def cli_node():
+    """
+    Manage and view the status of nodes in a PVC cluster.
+    """
+    pass
+
+
+###############################################################################
+# > pvc node is-primary
+###############################################################################
+@click.command(
+    name="is-primary",
+    short_help="Check if this node is primary coordinator.",
+)
+@connection_req
+@click.argument("node", default=DEFAULT_NODE_HOSTNAME)
+def cli_node_is_primary(
+    node,
+):
+    """
+    Check if NODE (or this node if unset) is the current primary coordinator.
+
+    Designed for scripting; returns no visible data, but the return code is 0 if the node
+    is primary, and 1 if it is not.
+    """
+
+    _, primary_node = pvc.lib.cluster.get_primary_node(CLI_CONFIG)
+
+    if primary_node == node:
+        exit(0)
+    else:
+        exit(1)
+
+
+###############################################################################
+# > pvc node primary
+###############################################################################
+@click.command(
+    name="primary",
+    short_help="Set node as primary coordinator.",
+)
+@connection_req
+@click.argument("node", default=DEFAULT_NODE_HOSTNAME)
+@click.option(
+    "-w",
+    "--wait",
+    "wait_flag",
+    default=False,
+    show_default=True,
+    is_flag=True,
+    help="Block waiting for state transition",
+)
+def cli_node_primary(
+    node,
+    wait_flag,
+):
+    """
+    Set NODE in primary coordinator state, making it the primary coordinator for the cluster.
+    """
+
+    retcode, retdata = pvc.lib.node.node_coordinator_state(CLI_CONFIG, node, "primary")
+    if not retcode or "already" in retdata:
+        finish(retcode, retdata)
+
+    if wait_flag:
+        echo(CLI_CONFIG, retdata)
+        cli_node_waiter(CLI_CONFIG, node, "coordinator_state", "takeover")
+        retdata = f"Set node {node} in primary coordinator state."
+
+    finish(retcode, retdata)
+
+
+###############################################################################
+# > pvc node secondary
+###############################################################################
+@click.command(
+    name="secondary",
+    short_help="Set node as secondary coordinator.",
+)
+@connection_req
+@click.argument("node", default=DEFAULT_NODE_HOSTNAME)
+@click.option(
+    "-w",
+    "--wait",
+    "wait_flag",
+    default=False,
+    show_default=True,
+    is_flag=True,
+    help="Block waiting for state transition",
+)
+def cli_node_secondary(
+    node,
+    wait_flag,
+):
+    """
+    Set NODE in secondary coordinator state, making another active node the primary node for the cluster.
+    """
+
+    retcode, retdata = pvc.lib.node.node_coordinator_state(
+        CLI_CONFIG, node, "secondary"
+    )
+    if not retcode or "already" in retdata:
+        finish(retcode, retdata)
+
+    if wait_flag:
+        echo(CLI_CONFIG, retdata)
+        cli_node_waiter(CLI_CONFIG, node, "coordinator_state", "relinquish")
+        retdata = f"Set node {node} in secondary coordinator state."
+
+    finish(retcode, retdata)
+
+
+###############################################################################
+# > pvc node flush
+###############################################################################
+@click.command(
+    name="flush",
+    short_help="Take node out of service.",
+)
+@connection_req
+@click.argument("node", default=DEFAULT_NODE_HOSTNAME)
+@click.option(
+    "-w",
+    "--wait",
+    "wait_flag",
+    default=False,
+    show_default=True,
+    is_flag=True,
+    help="Block waiting for state transition",
+)
+def cli_node_flush(
+    node,
+    wait_flag,
+):
+    """
+    Take NODE out of service, migrating all VMs on it to other nodes.
+    """
+
+    retcode, retdata = pvc.lib.node.node_domain_state(CLI_CONFIG, node, "flush")
+    if not retcode or "already" in retdata:
+        finish(retcode, retdata)
+
+    if wait_flag:
+        echo(CLI_CONFIG, retdata)
+        cli_node_waiter(CLI_CONFIG, node, "domain_state", "flush")
+        retdata = f"Removed node {node} from active service."
+
+    finish(retcode, retdata)
+
+
+###############################################################################
+# > pvc node ready
+###############################################################################
+@click.command(
+    name="ready",
+    short_help="Restore node to service.",
+)
+@connection_req
+@click.argument("node", default=DEFAULT_NODE_HOSTNAME)
+@click.option(
+    "-w",
+    "--wait",
+    "wait_flag",
+    default=False,
+    show_default=True,
+    is_flag=True,
+    help="Block waiting for state transition",
+)
+def cli_node_ready(
+    node,
+    wait_flag,
+):
+    """
+    Restore NODE to service, returning all previous VMs to it from other nodes.
+    """
+
+    retcode, retdata = pvc.lib.node.node_domain_state(CLI_CONFIG, node, "ready")
+    if not retcode or "already" in retdata:
+        finish(retcode, retdata)
+
+    if wait_flag:
+        echo(CLI_CONFIG, retdata)
+        cli_node_waiter(CLI_CONFIG, node, "domain_state", "unflush")
+        retdata = f"Restored node {node} to active service."
+
+    finish(retcode, retdata)
+
+
+###############################################################################
+# > pvc node log
+###############################################################################
+@click.command(
+    name="log",
+    short_help="View node daemon logs.",
+)
+@connection_req
+@click.argument("node", default=DEFAULT_NODE_HOSTNAME)
+@click.option(
+    "-l",
+    "--lines",
+    "lines",
+    default=None,
+    type=int,
+    show_default=False,
+    help="Display this many log lines from the end of the log buffer.  [default: 1000; with follow: 10]",
+)
+@click.option(
+    "-f",
+    "--follow",
+    "follow_flag",
+    is_flag=True,
+    default=False,
+    help="Follow the live changes of the log buffer.",
+)
+def cli_node_log(
+    node,
+    lines,
+    follow_flag,
+):
+    """
+    Show daemon logs of NODE, either in the local $PAGER tool or following the current output.
+
+    If "-f"/"--follow" is used, log output may be delayed by up to 1-2 seconds relative to the
+    live system due to API refresh delays. Logs will display in batches with each API refresh.
+
+    With "--follow", the default "--lines" value is 10, otherwise it is 1000 unless "--lines" is
+    specified with another value.
+
+    The maximum number of lines is limited only by the systemd journal of the node, though values
+    above ~5000 may cause performance problems.
+    """
+
+    # Set the default lines value based on the follow option
+    if lines is None:
+        if follow_flag:
+            lines = 10
+        else:
+            lines = 1000
+
+    if follow_flag:
+        # This command blocks following the logs until cancelled
+        retcode, retmsg = pvc.lib.node.follow_node_log(CLI_CONFIG, node, lines)
+        retmsg = ""
+    else:
+        retcode, retmsg = pvc.lib.node.view_node_log(CLI_CONFIG, node, lines)
+        click.echo_via_pager(retmsg)
+        retmsg = ""
+
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc node info
+###############################################################################
+@click.command(
+    name="info",
+    short_help="Show details of node.",
+)
+@connection_req
+@click.argument("node", default=DEFAULT_NODE_HOSTNAME)
+@format_opt(
+    {
+        "pretty": cli_node_info_format_pretty,
+        "long": cli_node_info_format_long,
+        "json": lambda d: jdumps(d),
+        "json-pretty": lambda d: jdumps(d, indent=2),
+    }
+)
+def cli_node_info(
+    node,
+    format_function,
+):
+    """
+    Show information about NODE. If a node is not specified, defaults to this host.
+
+    \b
+    Format options:
+        "pretty": Output basic details in a nice colourful format.
+        "long" Output full details including all health plugins in a nice colourful format.
+        "json": Output in unformatted JSON.
+        "json-pretty": Output in formatted JSON.
+    """
+
+    retcode, retdata = pvc.lib.node.node_info(CLI_CONFIG, node)
+    finish(retcode, retdata, format_function)
+
+
+###############################################################################
+# > pvc node list
+###############################################################################
+@click.command(
+    name="list",
+    short_help="List all nodes.",
+)
+@connection_req
+@click.argument("limit", default=None, required=False)
+@click.option(
+    "-ds",
+    "--daemon-state",
+    "daemon_state_filter",
+    default=None,
+    help="Limit list to nodes in the specified daemon state.",
+)
+@click.option(
+    "-cs",
+    "--coordinator-state",
+    "coordinator_state_filter",
+    default=None,
+    help="Limit list to nodes in the specified coordinator state.",
+)
+@click.option(
+    "-vs",
+    "--domain-state",
+    "domain_state_filter",
+    default=None,
+    help="Limit list to nodes in the specified domain state.",
+)
+@format_opt(
+    {
+        "pretty": cli_node_list_format_pretty,
+        "raw": lambda d: "\n".join([c["name"] for c in d]),
+        "json": lambda d: jdumps(d),
+        "json-pretty": lambda d: jdumps(d, indent=2),
+    }
+)
+def cli_node_list(
+    limit,
+    daemon_state_filter,
+    coordinator_state_filter,
+    domain_state_filter,
+    format_function,
+):
+    """
+    List all nodes, optionally only nodes matching regex LIMIT.
+
+    \b
+    Format options:
+        "pretty": Output all details in a nice tabular list format.
+        "raw": Output node names one per line.
+        "json": Output in unformatted JSON.
+        "json-pretty": Output in formatted JSON.
+    """
+
+    retcode, retdata = pvc.lib.node.node_list(
+        CLI_CONFIG,
+        limit,
+        daemon_state_filter,
+        coordinator_state_filter,
+        domain_state_filter,
+    )
+    finish(retcode, retdata, format_function)
+
+
+###############################################################################
+# Click command tree
+###############################################################################
+
+cli_node.add_command(cli_node_is_primary)
+cli_node.add_command(cli_node_primary)
+cli_node.add_command(cli_node_secondary)
+cli_node.add_command(cli_node_flush)
+cli_node.add_command(cli_node_ready)
+cli_node.add_command(cli_node_log)
+cli_node.add_command(cli_node_info)
+cli_node.add_command(cli_node_list)
@@ -0,0 +1,1230 @@
+#!/usr/bin/env python3
+
+# storage.py - PVC Click CLI storage commands
+# Part of the Parallel Virtual Cluster (PVC) system
+#
+#    Copyright (C) 2018-2024 Joshua M. Boniface <joshua@boniface.me>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+from json import dumps as jdumps
+from os import path
+
+from pvc.cli.common import *
+from pvc.cli.helpers import *
+from pvc.cli.waiters import *
+from pvc.cli.parsers import *
+from pvc.cli.formatters import *
+
+import pvc.lib
+
+import click
+
+
+###############################################################################
+# > pvc storage
+###############################################################################
+@click.group(
+    name="storage",
+    short_help="Manage PVC storage.",
+    context_settings=CONTEXT_SETTINGS,
+)
+def cli_storage():
+    """
+    Manage and view the storage system in a PVC cluster.
+    """
+    pass
+
+
+###############################################################################
+# > pvc storage status TODO:send JSON instead of raw
+###############################################################################
+@click.command(name="status", short_help="Show storage cluster status.")
+@connection_req
+@format_opt(
+    {
+        "pretty": cli_storage_status_format_raw,
+        #        "raw": lambda d: "\n".join([f"{n['mac_address']}|{n['ip4_address']}|{n['hostname']}" for n in d]),
+        #        "json": lambda d: jdumps(d),
+        #        "json-pretty": lambda d: jdumps(d, indent=2),
+    }
+)
+def cli_storage_status(format_function):
+    """
+    Show detailed status of the storage cluster.
+    """
+
+    retcode, retdata = pvc.lib.storage.ceph_status(CLI_CONFIG)
+    finish(retcode, retdata, format_function)
+
+
+###############################################################################
+# > pvc storage util TODO:send JSON instead of raw
+###############################################################################
+@click.command(name="util", short_help="Show storage cluster utilization.")
+@connection_req
+@format_opt(
+    {
+        "pretty": cli_storage_util_format_raw,
+        #        "raw": lambda d: "\n".join([f"{n['mac_address']}|{n['ip4_address']}|{n['hostname']}" for n in d]),
+        #        "json": lambda d: jdumps(d),
+        #        "json-pretty": lambda d: jdumps(d, indent=2),
+    }
+)
+def cli_storage_util(format_function):
+    """
+    Show utilization of the storage cluster.
+    """
+
+    retcode, retdata = pvc.lib.storage.ceph_util(CLI_CONFIG)
+    finish(retcode, retdata, format_function)
+
+
+###############################################################################
+# > pvc storage benchmark
+###############################################################################
+@click.group(name="benchmark", short_help="Run or view cluster storage benchmarks.")
+def cli_storage_benchmark():
+    """
+    Run or view benchmarks of the storage cluster.
+    """
+    pass
+
+
+###############################################################################
+# > pvc storage benchmark run
+###############################################################################
+@click.command(name="run", short_help="Run a storage benchmark.")
+@connection_req
+@click.argument("pool")
+@click.option(
+    "--name",
+    "name",
+    default=None,
+    show_default=False,
+    help="Use a custom name for the job",
+)
+@click.option(
+    "-p",
+    "--profile",
+    "profile",
+    default="default",
+    show_default=True,
+    type=click.Choice(["default", "scaling", "latency"]),
+    help="The benchmark profile to run.",
+)
+@click.option(
+    "-m",
+    "--matrix",
+    "matrix_file",
+    default=None,
+    type=click.File(),
+    help="A JSON file of tests to run instead of the profile's tests.",
+)
+@click.option(
+    "-c",
+    "--clients",
+    "clients",
+    default=None,
+    type=int,
+    help="Run each test on this many nodes at once (0 for all nodes) instead of the profile's count.",
+)
+@click.option(
+    "-r",
+    "--runtime",
+    "runtime",
+    default=None,
+    type=int,
+    help="Run each test for this many seconds instead of the profile's runtime.",
+)
+@click.option(
+    "--wait/--no-wait",
+    "wait_flag",
+    is_flag=True,
+    default=True,
+    show_default=True,
+    help="Wait or don't wait for task to complete, showing progress if waiting",
+)
+@confirm_opt(
+    "Storage benchmarks take approximately 10 minutes to run and generate significant load on the cluster; they should be run sparingly. Continue"
+)
+def cli_storage_benchmark_run(
+    pool, name, profile, matrix_file, clients, runtime, wait_flag
+):
+    """
+    Run a storage benchmark on POOL in the background.
+
+    Each test of the benchmark runs on one or more client nodes at once, each against its own volume in POOL. The available profiles are:
+
+    \b
+      default: The standard 8-test matrix from a single node
+      scaling: Sequential and 4K random tests from every node at once
+      latency: Single-queue 4K random tests from a single node
+
+    A custom test matrix can be provided with the "--matrix" option as a JSON object of test names to fio test specifications, for example:
+
+    \b
+      {"rand_read_16K": {"rw": "randread", "bs": "16K", "iodepth": 32, "numjobs": 2}}
+
+    Use "pvc storage benchmark compare" to compare the results of several benchmark jobs.
+    """
+
+    matrix = None
+    if matrix_file is not None:
+        matrix = matrix_file.read()
+        matrix_file.close()
+
+    retcode, retmsg = pvc.lib.storage.ceph_benchmark_run(
+        CLI_CONFIG,
+        pool,
+        name,
+        wait_flag,
+        profile=profile,
+        matrix=matrix,
+        clients=clients,
+        runtime=runtime,
+    )
+
+    if retcode and wait_flag:
+        retmsg = wait_for_celery_task(CLI_CONFIG, retmsg)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc storage benchmark info
+###############################################################################
+@click.command(name="info", short_help="Show detailed storage benchmark results.")
+@connection_req
+@click.argument("job", required=True)
+@format_opt(
+    {
+        "pretty": cli_storage_benchmark_info_format_pretty,
+        "json": lambda d: jdumps(d),
+        "json-pretty": lambda d: jdumps(d, indent=2),
+    }
+)
+def cli_storage_benchmark_info(job, format_function):
+    """
+    Show full details of storage benchmark JOB.
+    """
+
+    retcode, retdata = pvc.lib.storage.ceph_benchmark_list(CLI_CONFIG, job)
+    finish(retcode, retdata, format_function)
+
+
+###############################################################################
+# > pvc storage benchmark list
+###############################################################################
+@click.command(name="list", short_help="List storage benchmark results.")
+@connection_req
+@click.argument("job", default=None, required=False)
+@format_opt(
+    {
+        "pretty": cli_storage_benchmark_list_format_pretty,
+        "json": lambda d: jdumps(d),
+        "json-pretty": lambda d: jdumps(d, indent=2),
+    }
+)
+def cli_storage_benchmark_list(job, format_function):
+    """
+    List all Ceph storage benchmarks; optionally only match JOB.
+    """
+
+    retcode, retdata = pvc.lib.storage.ceph_benchmark_list(CLI_CONFIG, job)
+    finish(retcode, retdata, format_function)
+
+
+###############################################################################
+# > pvc storage benchmark compare
+###############################################################################
+@click.command(name="compare", short_help="Compare storage benchmark results.")
+@connection_req
+@click.argument("jobs", nargs=-1, required=True)
+@format_opt(
+    {
+        "pretty": cli_storage_benchmark_compare_format_pretty,
+        "json": lambda d: jdumps(d),
+        "json-pretty": lambda d: jdumps(d, indent=2),
+    }
+)
+def cli_storage_benchmark_compare(jobs, format_function):
+    """
+    Compare the results of storage benchmark JOBS, showing changes relative to the first job.
+
+    Bandwidth, IOPS, and completion latency percentiles are shown for each test. Only jobs with
+    fio-based results (format 1 or newer) can be compared.
+    """
+
+    if len(jobs) < 2:
+        finish(False, "At least two jobs must be specified to compare.")
+
+    retdata = list()
+    for job in jobs:
+        retcode, job_data = pvc.lib.storage.ceph_benchmark_list(CLI_CONFIG, job)
+        if not retcode or not job_data:
+            finish(False, job_data or f'No benchmark job "{job}" found.')
+        retdata.append(job_data[0])
+
+    finish(True, retdata, format_function)
+
+
+###############################################################################
+# > pvc storage osd
+###############################################################################
+@click.group(
+    name="osd",
+    short_help="Manage OSDs in the PVC storage cluster.",
+    context_settings=CONTEXT_SETTINGS,
+)
+def cli_storage_osd():
+    """
+    Manage the Ceph OSDs of the PVC cluster.
+    """
+    pass
+
+
+###############################################################################
+# > pvc storage osd create-db-vg
+###############################################################################
+@click.command(name="create-db-vg", short_help="Create new OSD database volume group.")
+@connection_req
+@click.argument("node")
+@click.argument("device")
+@click.option(
+    "--wait/--no-wait",
+    "wait_flag",
+    is_flag=True,
+    default=True,
+    show_default=True,
+    help="Wait or don't wait for task to complete, showing progress if waiting",
+)
+@confirm_opt(
+    "Destroy all data on and create a new OSD database volume group on node {node} device {device}"
+)
+def cli_storage_osd_create_db_vg(node, device, wait_flag):
+    """
+    Create a new Ceph OSD database volume group on node NODE with block device DEVICE.
+
+    DEVICE must be a valid block device path (e.g. '/dev/nvme0n1', '/dev/disk/by-path/...') or a "detect" string. Partitions are NOT supported. A "detect" string is a string in the form "detect:<NAME>:<HUMAN-SIZE>:<ID>". For details, see 'pvc storage osd add --help'. The path or detect string must be valid on the current node housing the OSD.
+
+    This volume group will be used for Ceph OSD database and WAL functionality if an'--ext-db-*' flag is passed to newly-created OSDs during 'pvc storage osd add'. DEVICE should be an extremely fast SSD device (NVMe, Intel Optane, etc.) which is significantly faster than the normal OSD disks and with very high write endurance. For mor edetails, see the "pvc storage osd add" command help.
+
+    Only one OSD database volume group on a single physical device, named "osd-db", is supported per node, so it must be fast and large enough to act as an effective OSD database device for all OSDs on the node. Attempting to add additional database volume groups after the first will result in an error.
+
+    (!) WARNING: If the OSD database device fails, all OSDs on the node using it will be lost and must be recreated.
+    """
+
+    retcode, retmsg = pvc.lib.storage.ceph_osd_db_vg_add(
+        CLI_CONFIG, node, device, wait_flag
+    )
+
+    if retcode and wait_flag:
+        retmsg = wait_for_celery_task(CLI_CONFIG, retmsg)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc storage osd add
+###############################################################################
+@click.command(name="add", short_help="Add new OSD.")
+@connection_req
+@click.argument("node")
+@click.argument("device")
+@click.option(
+    "-w",
+    "--weight",
+    "weight",
+    default=1.0,
+    show_default=True,
+    help="Weight of the OSD(s) within the CRUSH map.",
+)
+@click.option(
+    "-r",
+    "--ext-db-ratio",
+    "ext_db_ratio",
+    default=None,
+    type=float,
+    help="Create an external database logical volume for the OSD(s) with this decimal ratio of the DB LV to the OSD size.",
+)
+@click.option(
+    "-s",
+    "--ext-db-size",
+    "ext_db_size",
+    default=None,
+    show_default=True,
+    help="Create an external database logical volume for the OSD(s) with this human-unit size.",
+)
+@click.option(
+    "-c",
+    "--osd-count",
+    "osd_count",
+    default=None,
+    show_default=False,
+    type=int,
+    help="Split (an NVMe) disk into this many OSDs.",
+)
+@click.option(
+    "--wait/--no-wait",
+    "wait_flag",
+    is_flag=True,
+    default=True,
+    show_default=True,
+    help="Wait or don't wait for task to complete, showing progress if waiting",
+)
+@confirm_opt("Destroy all data on and create new OSD(s) on node {node} device {device}")
+def cli_storage_osd_add(
+    node, device, weight, ext_db_ratio, ext_db_size, osd_count, wait_flag
+):
+    """
+    Add a new Ceph OSD on node NODE with block device DEVICE.
+
+    DEVICE must be a valid block device path (e.g. '/dev/nvme0n1', '/dev/disk/by-path/...') or a "detect" string. Partitions are NOT supported. A "detect" string is a string in the form "detect:<NAME>:<HUMAN-SIZE>:<ID>". The path or detect string must be valid on the current node housing the OSD.
+
+    A "detect" string is a string in the form "detect:<NAME>:<HUMAN-SIZE>:<ID>". Detect strings allow for automatic determination of Linux block device paths from known basic information about disks by leveraging "lsscsi"/"nvme" on the target host. The "NAME" should be some descriptive identifier that would be part of the device's Model information, for instance the manufacturer (e.g. "INTEL") or a similar unique string (e.g. "BOSS" for Dell BOSS cards); the "HUMAN-SIZE" should be the labeled human-readable size of the device (e.g. "480GB", "1.92TB"); and "ID" specifies the Nth 0-indexed device which matches the "NAME" and "HUMAN-SIZE" values (e.g. "2" would match the third device with the corresponding "NAME" and "HUMAN-SIZE"). When matching against sizes, there is +/- 3% flexibility to account for base-1000 vs. base-1024 differences and rounding errors. The "NAME" may contain whitespace but if so the entire detect string should be quoted, and is case-insensitive. More information about detect strings can be found in the pvcbootstrapd manual.
+
+    The weight of an OSD should reflect the ratio of the size of the OSD to the other OSDs in the storage cluster. For example, with a 200GB disk and a 400GB disk in each node, the 400GB disk should have twice the weight as the 200GB disk. For more information about CRUSH weights, please see the Ceph documentation.
+
+    The "-r"/"--ext-db-ratio" or "-s"/"--ext-db-size" options, if specified, and if a OSD DB VG exists on the node (see "pvc storage osd create-db-vg"), will instruct the OSD to locate its RocksDB database and WAL on a new logical volume on that OSD DB VG. If "-r"/"--ext-db-ratio" is specified, the sizing of this DB LV will be the given ratio (specified as a decimal percentage e.g. 0.05 for 5%) of the size of the OSD (e.g. 0.05 on a 1TB SSD will create a 50GB LV). If "-s"/"--ext-db-size" is specified, the sizing of this DB LV will be the given human-unit size (e.g. 1024M, 20GB, etc.). An 0.05 ratio is recommended; at least 0.02 is required, and more than 0.05 can potentially increase performance in write-heavy workloads.
+
+    (!) WARNING: An external DB carries important caveats. An external DB is only suggested for relatively slow OSD devices (e.g. SATA SSDs) when there is also a much faster, more robust, but smaller storage device in the system (e.g. an NVMe or 3DXPoint SSD) which can accelerate the OSD. An external DB is NOT recommended for NVMe OSDs as this will hamper performance and reliability. Additionally, it is important to note that the OSD will depend entirely on this external DB device; they cannot be separated without destroying the OSD, and the OSD cannot function without the external DB device, thus introducting a single point of failure. Use this feature with extreme care.
+
+    The "-c"/"--osd-count" option allows the splitting of a single block device into multiple logical OSDs. This is recommended in the Ceph literature for extremely fast OSD block devices (i.e. NVMe or 3DXPoint) which can saturate a single OSD process. Usually, 2 or 4 OSDs is recommended, based on the size and performance of the OSD disk; more than 4 OSDs per volume is not recommended, and this option is not recommended for SATA SSDs.
+
+    Note that, if "-c"/"--osd-count" is specified, the provided "-w"/"--weight" will be the weight of EACH created OSD, not the block device as a whole. Ensure you take this into account if mixing and matching OSD block devices. Additionally, if "-r"/"--ext-db-ratio" or "-s"/"--ext-db-size" is specified, one DB LV will be created for EACH created OSD, of the given ratio/size per OSD; ratios are calculated from the OSD size, not the underlying device.
+
+    (†) NOTE: This command may take a long time to complete. Observe the node logs of the hosting OSD node for detailed status.
+    """
+
+    retcode, retmsg = pvc.lib.storage.ceph_osd_add(
+        CLI_CONFIG,
+        node,
+        device,
+        weight,
+        ext_db_ratio,
+        ext_db_size,
+        osd_count,
+        wait_flag,
+    )
+
+    if retcode and wait_flag:
+        retmsg = wait_for_celery_task(CLI_CONFIG, retmsg)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc storage osd replace
+###############################################################################
+@click.command(name="replace", short_help="Replace OSD block device.")
+@connection_req
+@click.argument("osdid")
+@click.argument("new_device")
+@click.option(
+    "-o",
+    "--old-device",
+    "old_device",
+    default=None,
+    help="The old OSD block device, if known and valid",
+)
+@click.option(
+    "-w",
+    "--weight",
+    "weight",
+    default=None,
+    help="New weight of the OSD(s) within the CRUSH map; if unset, old weight is used",
+)
+@click.option(
+    "-r",
+    "--ext-db-ratio",
+    "ext_db_ratio",
+    default=None,
+    help="Create a new external database logical volume for the OSD(s) with this decimal ratio of the DB LV to the OSD size; if unset, old ext_db_size is used",
+)
+@click.option(
+    "-s",
+    "--ext-db-size",
+    "ext_db_size",
+    default=None,
+    help="Create a new external database logical volume for the OSD(s) with this human-unit size; if unset, old ext_db_size is used",
+)
+@click.option(
+    "--wait/--no-wait",
+    "wait_flag",
+    is_flag=True,
+    default=True,
+    show_default=True,
+    help="Wait or don't wait for task to complete, showing progress if waiting",
+)
+@confirm_opt(
+    "Destroy all data on and replace OSD {osdid} (and peer split OSDs) with new device {new_device}"
+)
+def cli_storage_osd_replace(
+    osdid, new_device, old_device, weight, ext_db_ratio, ext_db_size, wait_flag
+):
+    """
+    Replace the block device of an existing OSD with ID OSDID, and any peer split OSDs with the same block device, with NEW_DEVICE. Use this command to replace a failed or smaller OSD block device with a new one in one command.
+
+    DEVICE must be a valid block device path (e.g. '/dev/nvme0n1', '/dev/disk/by-path/...') or a "detect" string. Partitions are NOT supported. A "detect" string is a string in the form "detect:<NAME>:<HUMAN-SIZE>:<ID>". For details, see 'pvc storage osd add --help'. The path or detect string must be valid on the current node housing the OSD.
+
+    If OSDID is part of a split OSD set, any peer split OSDs with the same configured block device will be replaced as well. The split count will be retained and cannot be changed with this command; to do so, all OSDs in the split OSD set must be removed and new OSD(s) created.
+
+    (!) WARNING: This operation entails (and is functionally equivalent to) a removal and recreation of the specified OSD and, if applicable, all peer split OSDs. This is an intensive and potentially destructive action. Ensure that the cluster is otherwise healthy before proceeding, and ensure the subsequent rebuild completes successfully. Do not attempt this operation on a severely degraded cluster without first considering the possible data loss implications.
+
+    If the "-o"/"--old-device" option is specified, is a valid block device on the node, is readable/accessible, and contains the metadata for the specified OSD, it will be zapped. If this option is not specified, the system will try to find the old block device automatically to zap it. If it can't be found, the OSD will simply be removed from the CRUSH map and PVC database before recreating. This option can provide a cleaner deletion when replacing a working device that has a different block path, but is otherwise unnecessary.
+
+    The "-w"/"--weight", "-r"/"--ext-db-ratio", and "-s"/"--ext-db-size" allow overriding the existing weight and external DB LV for the OSD(s), if desired. If unset, the existing weight and external DB LV size (if applicable) will be used for the replacement OSD(s) instead.
+
+    (†) NOTE: If neither the "-r"/"--ext-db-ratio" or "-s"/"--ext-db-size" option is specified, and the OSD(s) had an external DB LV, it cannot be removed a new DB LV will be created for the replacement OSD(s); this cannot be avoided. However, if the OSD(s) did not have an external DB LV, and one of these options is specified, a new DB LV will be added to the new OSD.
+
+    (†) NOTE: This command may take a long time to complete. Observe the node logs of the hosting OSD node for detailed status.
+    """
+
+    retcode, retmsg = pvc.lib.storage.ceph_osd_replace(
+        CLI_CONFIG,
+        osdid,
+        new_device,
+        old_device,
+        weight,
+        ext_db_ratio,
+        ext_db_size,
+        wait_flag,
+    )
+
+    if retcode and wait_flag:
+        retmsg = wait_for_celery_task(CLI_CONFIG, retmsg)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc storage osd refresh
+###############################################################################
+@click.command(name="refresh", short_help="Refresh (reimport) OSD device.")
+@connection_req
+@click.argument("osdid")
+@click.argument("device")
+@click.option(
+    "--wait/--no-wait",
+    "wait_flag",
+    is_flag=True,
+    default=True,
+    show_default=True,
+    help="Wait or don't wait for task to complete, showing progress if waiting",
+)
+@confirm_opt("Refresh OSD {osdid} (and peer split OSDs) on device {device}")
+def cli_storage_osd_refresh(osdid, device, wait_flag):
+    """
+    Refresh (reimport) the block DEVICE of an existing OSD with ID OSDID. Use this command to reimport a working OSD into a rebuilt/replaced node.
+
+    DEVICE must be a valid block device path (e.g. '/dev/nvme0n1', '/dev/disk/by-path/...') or a "detect" string. Partitions are NOT supported. A "detect" string is a string in the form "detect:<NAME>:<HUMAN-SIZE>:<ID>". For details, see 'pvc storage osd add --help'. The path or detect string must be valid on the current node housing the OSD.
+
+    Existing data, IDs, weights, DB LVs, etc. of the OSD will be preserved. Any split peer OSD(s) on the same block device will also be automatically refreshed.
+
+    (†) NOTE: If the OSD(s) had an external DB device, it must exist before refreshing the OSD. If it can't be found, the OSD cannot be reimported and must be recreated.
+
+    (†) NOTE: This command may take a long time to complete. Observe the node logs of the hosting OSD node for detailed status.
+    """
+
+    retcode, retmsg = pvc.lib.storage.ceph_osd_refresh(
+        CLI_CONFIG, osdid, device, wait_flag
+    )
+
+    if retcode and wait_flag:
+        retmsg = wait_for_celery_task(CLI_CONFIG, retmsg)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc storage osd remove
+###############################################################################
+@click.command(name="remove", short_help="Remove OSD.")
+@connection_req
+@click.argument("osdid")
+@click.option(
+    "-f",
+    "--force",
+    "force_flag",
+    is_flag=True,
+    default=False,
+    help="Force removal even if steps fail",
+)
+@click.option(
+    "--wait/--no-wait",
+    "wait_flag",
+    is_flag=True,
+    default=True,
+    show_default=True,
+    help="Wait or don't wait for task to complete, showing progress if waiting",
+)
+@confirm_opt("Remove and destroy data on OSD {osdid}")
+def cli_storage_osd_remove(osdid, force_flag, wait_flag):
+    """
+    Remove a Ceph OSD with ID OSDID.
+
+    DANGER: This will completely remove the OSD from the cluster. OSDs will rebalance which will negatively affect performance and available space. It is STRONGLY RECOMMENDED to set an OSD out (using 'pvc storage osd out') and allow the cluster to fully rebalance, verified with 'pvc storage status', before removing an OSD.
+
+    (†) NOTE: The "-f"/"--force" option is useful after replacing a failed node, to ensure the OSD is removed even if the OSD in question does not properly exist on the node after a rebuild.
+
+    (†) NOTE: This command may take a long time to complete. Observe the node logs of the hosting OSD node for detailed status.
+    """
+
+    retcode, retmsg = pvc.lib.storage.ceph_osd_remove(
+        CLI_CONFIG, osdid, force_flag, wait_flag
+    )
+
+    if retcode and wait_flag:
+        retmsg = wait_for_celery_task(CLI_CONFIG, retmsg)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc storage osd in
+###############################################################################
+@click.command(name="in", short_help="Online OSD.")
+@connection_req
+@click.argument("osdid")
+def cli_storage_osd_in(osdid):
+    """
+    Set a Ceph OSD with ID OSDID online.
+    """
+
+    retcode, retmsg = pvc.lib.storage.ceph_osd_state(CLI_CONFIG, osdid, "in")
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc storage osd out
+###############################################################################
+@click.command(name="out", short_help="Offline OSD.")
+@connection_req
+@click.argument("osdid")
+def cli_storage_osd_out(osdid):
+    """
+    Set a Ceph OSD with ID OSDID offline.
+    """
+
+    retcode, retmsg = pvc.lib.storage.ceph_osd_state(CLI_CONFIG, osdid, "out")
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc storage osd set
+###############################################################################
+@click.command(name="set", short_help="Set OSD property.")
+@connection_req
+@click.argument("osd_property")
+def cli_storage_osd_set(osd_property):
+    """
+    Set (enable) a Ceph OSD property OSD_PROPERTY on the cluster.
+
+    Valid properties are:
+
+      full|pause|noup|nodown|noout|noin|nobackfill|norebalance|norecover|noscrub|nodeep-scrub|notieragent|sortbitwise|recovery_deletes|require_jewel_osds|require_kraken_osds
+    """
+
+    retcode, retmsg = pvc.lib.storage.ceph_osd_option(CLI_CONFIG, osd_property, "set")
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc storage osd unset
+###############################################################################
+@click.command(name="unset", short_help="Unset OSD property.")
+@connection_req
+@click.argument("osd_property")
+def cli_storage_osd_unset(osd_property):
+    """
+    Unset (disable) a Ceph OSD property OSD_PROPERTY on the cluster.
+
+    Valid properties are:
+
+      full|pause|noup|nodown|noout|noin|nobackfill|norebalance|norecover|noscrub|nodeep-scrub|notieragent|sortbitwise|recovery_deletes|require_jewel_osds|require_kraken_osds
+    """
+
+    retcode, retmsg = pvc.lib.storage.ceph_osd_option(CLI_CONFIG, osd_property, "unset")
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc storage osd info
+###############################################################################
+# Not implemented
+
+
+###############################################################################
+# > pvc storage osd list
+###############################################################################
+@click.command(name="list", short_help="List cluster OSDs.")
+@connection_req
+@click.argument("limit", default=None, required=False)
+@format_opt(
+    {
+        "pretty": cli_storage_osd_list_format_pretty,
+        "raw": lambda d: "\n".join([f"{o['id']}:{o['node']}:{o['device']}" for o in d]),
+        "json": lambda d: jdumps(d),
+        "json-pretty": lambda d: jdumps(d, indent=2),
+    }
+)
+def cli_storage_osd_list(limit, format_function):
+    """
+    List all Ceph OSDs; optionally only match elements matching ID regex LIMIT.
+    """
+
+    retcode, retdata = pvc.lib.storage.ceph_osd_list(CLI_CONFIG, limit)
+    finish(retcode, retdata, format_function)
+
+
+###############################################################################
+# > pvc storage pool
+###############################################################################
+@click.group(
+    name="pool",
+    short_help="Manage RBD pools in the PVC storage cluster.",
+    context_settings=CONTEXT_SETTINGS,
+)
+def cli_storage_pool():
+    """
+    Manage the Ceph RBD pools of the PVC cluster.
+    """
+    pass
+
+
+###############################################################################
+# > pvc storage pool add
+###############################################################################
+@click.command(name="add", short_help="Add new RBD pool.")
+@connection_req
+@click.argument("name")
+@click.argument("pgs")
+@click.option(
+    "-t",
+    "--tier",
+    "tier",
+    default="default",
+    show_default=True,
+    type=click.Choice(["default", "hdd", "ssd", "nvme"]),
+    help="""
+    The device tier to limit the pool to. Default is all OSD tiers, and specific tiers can be specified instead. At least one full set of OSDs for a given tier must be present for the tier to be specified, or the pool creation will fail.
+    """,
+)
+@click.option(
+    "--replcfg",
+    "replcfg",
+    default="copies=3,mincopies=2",
+    show_default=True,
+    required=False,
+    help="""
+    The replication configuration, specifying both a "copies" and "mincopies" value, separated by a comma, e.g. "copies=3,mincopies=2". The "copies" value specifies the total number of replicas and the "mincopies" value specifies the minimum number of active replicas to allow I/O. For additional details please see the documentation.
+    """,
+)
+def cli_storage_pool_add(name, pgs, tier, replcfg):
+    """
+    Add a new Ceph RBD pool with name NAME and PGS placement groups.
+
+    The placement group count must be a non-zero power of 2. Generally you should choose a PGS number such that there will be 50-150 PGs on each OSD in a single node (before replicas); 64, 128, or 256 are good values for small clusters (1-5 OSDs per node); higher values are recommended for higher node or OSD counts. For additional details please see the documentation.
+    """
+
+    retcode, retmsg = pvc.lib.storage.ceph_pool_add(
+        CLI_CONFIG, name, pgs, replcfg, tier
+    )
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc storage pool remove
+###############################################################################
+@click.command(name="remove", short_help="Remove RBD pool.")
+@connection_req
+@click.argument("name")
+@confirm_opt("Remove and destroy all data in RBD pool {name}")
+def cli_storage_pool_remove(name):
+    """
+    Remove a Ceph RBD pool with name NAME and all volumes on it.
+
+    DANGER: This will completely remove the pool and all volumes contained in it from the cluster.
+    """
+
+    retcode, retmsg = pvc.lib.storage.ceph_pool_remove(CLI_CONFIG, name)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc storage pool set-pgs
+###############################################################################
+@click.command(name="set-pgs", short_help="Set PGs of an RBD pool.")
+@connection_req
+@click.argument("name")
+@click.argument("pgs")
+@confirm_opt("Adjust PG count of pool {name} to {pgs}")
+def cli_storage_pool_set_pgs(name, pgs):
+    """
+    Set the placement groups (PGs) count for the pool NAME to PGS.
+
+    The placement group count must be a non-zero power of 2. Generally you should choose a PGS number such that there will be 50-150 PGs on each OSD in a single node (before replicas); 64, 128, or 256 are good values for small clusters (1-5 OSDs per node); higher values are recommended for higher node or OSD counts. For additional details please see the documentation.
+
+    Placement group counts may be increased or decreased as required though frequent alteration is not recommended. Placement group alterations are intensive operations on the storage cluster.
+    """
+
+    retcode, retmsg = pvc.lib.storage.ceph_pool_set_pgs(CLI_CONFIG, name, pgs)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc storage pool info
+###############################################################################
+# Not implemented
+
+
+###############################################################################
+# > pvc storage pool list
+###############################################################################
+@click.command(name="list", short_help="List cluster RBD pools.")
+@connection_req
+@click.argument("limit", default=None, required=False)
+@format_opt(
+    {
+        "pretty": cli_storage_pool_list_format_pretty,
+        "raw": lambda d: "\n".join([p["name"] for p in d]),
+        "json": lambda d: jdumps(d),
+        "json-pretty": lambda d: jdumps(d, indent=2),
+    }
+)
+def cli_storage_pool_list(limit, format_function):
+    """
+    List all Ceph RBD pools; optionally only match elements matching name regex LIMIT.
+    """
+
+    retcode, retdata = pvc.lib.storage.ceph_pool_list(CLI_CONFIG, limit)
+    finish(retcode, retdata, format_function)
+
+
+###############################################################################
+# > pvc storage volume
+###############################################################################
+@click.group(
+    name="volume",
+    short_help="Manage RBD volumes in the PVC storage cluster.",
+    context_settings=CONTEXT_SETTINGS,
+)
+def cli_storage_volume():
+    """
+    Manage the Ceph RBD volumes of the PVC cluster.
+    """
+    pass
+
+
+###############################################################################
+# > pvc storage volume add
+###############################################################################
+@click.command(name="add", short_help="Add new RBD volume.")
+@connection_req
+@click.argument("pool")
+@click.argument("name")
+@click.argument("size")
+@click.option(
+    "-f",
+    "--force",
+    "force_flag",
+    is_flag=True,
+    default=False,
+    help="Force creation even if volume would violate 80% full safe free space.",
+)
+def cli_storage_volume_add(pool, name, size, force_flag):
+    """
+    Add a new Ceph RBD volume in pool POOL with name NAME and size SIZE (in human units, e.g. 1024M, 20G, etc.).
+
+    PVC will prevent the creation of a volume who's size is greater than the available free space on the pool. This cannot be overridden.
+
+    PVC will prevent the creation of a volume who's size is greater than the 80% full safe free space on the pool. This can be overridden with the "-f"/"--force" option but this may be dangerous!
+    """
+
+    retcode, retmsg = pvc.lib.storage.ceph_volume_add(
+        CLI_CONFIG, pool, name, size, force_flag=force_flag
+    )
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc storage volume upload
+###############################################################################
+@click.command(name="upload", short_help="Upload a local image file to RBD volume.")
+@connection_req
+@click.argument("pool")
+@click.argument("name")
+@click.argument("image_file")
+@click.option(
+    "-f",
+    "--format",
+    "image_format",
+    default="raw",
+    show_default=True,
+    help="The format of the source image.",
+)
+@click.option(
+    "-r",
+    "--resume",
+    "resume_flag",
+    is_flag=True,
+    default=False,
+    help="Resume an interrupted raw or qcow2 upload.",
+)
+def cli_storage_volume_upload(pool, name, image_format, image_file, resume_flag):
+    """
+    Upload a disk image file IMAGE_FILE to the RBD volume NAME in pool POOL.
+
+    The volume NAME must exist in the pool before uploading to it, and must be large enough to fit the disk image in raw format.
+
+    If the image format is "raw" or "qcow2", the image data is uploaded directly to the target volume in chunks. Unallocated and all-zero regions of the image are not sent, and an interrupted upload can be continued with the "-r"/"--resume" option. qcow2 images which use backing files, encryption, or compressed clusters are instead handled like other formats.
+
+    Otherwise, the image will be converted into raw format by "qemu-img convert" on the remote side before writing using a temporary volume. The image format must be a valid format recognized by "qemu-img", such as "vmdk" or "qcow2".
+    """
+
+    if not path.exists(image_file):
+        echo(CLI_CONFIG, "ERROR: File '{}' does not exist!".format(image_file))
+        exit(1)
+
+    retcode, retmsg = pvc.lib.storage.ceph_volume_upload(
+        CLI_CONFIG, pool, name, image_format, image_file, resume=resume_flag
+    )
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc storage volume remove
+###############################################################################
+@click.command(name="remove", short_help="Remove RBD volume.")
+@connection_req
+@click.argument("pool")
+@click.argument("name")
+@confirm_opt("Remove and delete data of RBD volume {name} in pool {pool}")
+def cli_storage_volume_remove(pool, name):
+    """
+    Remove a Ceph RBD volume with name NAME from pool POOL.
+
+    DANGER: This will completely remove the volume and all data contained in it.
+    """
+
+    retcode, retmsg = pvc.lib.storage.ceph_volume_remove(CLI_CONFIG, pool, name)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc storage volume resize
+###############################################################################
+@click.command(name="resize", short_help="Resize RBD volume.")
+@connection_req
+@click.argument("pool")
+@click.argument("name")
+@click.argument("size")
+@click.option(
+    "-f",
+    "--force",
+    "force_flag",
+    is_flag=True,
+    default=False,
+    help="Force resize even if volume would violate 80% full safe free space.",
+)
+@confirm_opt("Resize volume {name} in pool {pool} to size {size}")
+def cli_storage_volume_resize(pool, name, size, force_flag):
+    """
+    Resize an existing Ceph RBD volume with name NAME in pool POOL to size SIZE (in human units, e.g. 1024M, 20G, etc.).
+
+    PVC will prevent the resize of a volume who's new size is greater than the available free space on the pool. This cannot be overridden.
+
+    PVC will prevent the resize of a volume who's new size is greater than the 80% full safe free space on the pool. This can be overridden with the "-f"/"--force" option but this may be dangerous!
+    """
+
+    retcode, retmsg = pvc.lib.storage.ceph_volume_modify(
+        CLI_CONFIG, pool, name, new_size=size, force_flag=force_flag
+    )
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc storage volume rename
+###############################################################################
+@click.command(name="rename", short_help="Rename RBD volume.")
+@connection_req
+@click.argument("pool")
+@click.argument("name")
+@click.argument("new_name")
+@confirm_opt("Rename volume {name} in pool {pool} to {new_name}")
+def cli_storage_volume_rename(pool, name, new_name):
+    """
+    Rename an existing Ceph RBD volume with name NAME in pool POOL to name NEW_NAME.
+    """
+
+    retcode, retmsg = pvc.lib.storage.ceph_volume_modify(
+        CLI_CONFIG, pool, name, new_name=new_name
+    )
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc storage volume clone
+###############################################################################
+@click.command(name="clone", short_help="Clone RBD volume.")
+@connection_req
+@click.argument("pool")
+@click.argument("name")
+@click.argument("new_name")
+@click.option(
+    "-f",
+    "--force",
+    "force_flag",
+    is_flag=True,
+    default=False,
+    help="Force clone even if volume would violate 80% full safe free space.",
+)
+def cli_storage_volume_clone(pool, name, new_name, force_flag):
+    """
+    Clone a Ceph RBD volume with name NAME in pool POOL to name NEW_NAME in pool POOL.
+
+    PVC will prevent the clone of a volume who's new size is greater than the available free space on the pool. This cannot be overridden.
+
+    PVC will prevent the clone of a volume who's new size is greater than the 80% full safe free space on the pool. This can be overridden with the "-f"/"--force" option but this may be dangerous!
+    """
+
+    retcode, retmsg = pvc.lib.storage.ceph_volume_clone(
+        CLI_CONFIG, pool, name, new_name, force_flag=force_flag
+    )
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc storage volume info
+###############################################################################
+# Not implemented
+
+
+###############################################################################
+# > pvc storage volume list
+###############################################################################
+@click.command(name="list", short_help="List cluster RBD volumes.")
+@connection_req
+@click.argument("limit", default=None, required=False)
+@click.option(
+    "-p",
+    "--pool",
+    "pool",
+    default=None,
+    show_default=True,
+    help="Show volumes from this pool only.",
+)
+@format_opt(
+    {
+        "pretty": cli_storage_volume_list_format_pretty,
+        "raw": lambda d: "\n".join([f"{v['pool']}/{v['name']}" for v in d]),
+        "json": lambda d: jdumps(d),
+        "json-pretty": lambda d: jdumps(d, indent=2),
+    }
+)
+def cli_storage_volume_list(limit, pool, format_function):
+    """
+    List all Ceph RBD volumes; optionally only match elements matching name regex LIMIT.
+    """
+
+    pages = pvc.lib.storage.ceph_volume_list_pages(CLI_CONFIG, limit, pool)
+    finish_pages(pages, format_function)
+
+
+###############################################################################
+# > pvc storage volume snapshot
+###############################################################################
+@click.group(
+    name="snapshot",
+    short_help="Manage RBD volume snapshots in the PVC storage cluster.",
+    context_settings=CONTEXT_SETTINGS,
+)
+def cli_storage_volume_snapshot():
+    """
+    Manage the Ceph RBD volume snapshots of the PVC cluster.
+    """
+    pass
+
+
+###############################################################################
+# > pvc storage volume snapshot add
+###############################################################################
+@click.command(name="add", short_help="Add new RBD volume snapshot.")
+@connection_req
+@click.argument("pool")
+@click.argument("volume")
+@click.argument("name")
+def cli_storage_volume_snapshot_add(pool, volume, name):
+    """
+    Add a snapshot with name NAME of Ceph RBD volume VOLUME in pool POOL.
+
+    (!) WARNING: RBD snapshots are crash-consistent but not filesystem-aware. If a snapshot was taken
+    of a running VM, restoring that snapshot will be equivalent to having forcibly restarted the
+    VM at the moment of the snapshot.
+    """
+
+    retcode, retmsg = pvc.lib.storage.ceph_snapshot_add(CLI_CONFIG, pool, volume, name)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc storage volume snapshot rename
+###############################################################################
+@click.command(name="rename", short_help="Rename RBD volume snapshot.")
+@connection_req
+@click.argument("pool")
+@click.argument("volume")
+@click.argument("name")
+@click.argument("new_name")
+def cli_storage_volume_snapshot_rename(pool, volume, name, new_name):
+    """
+    Rename an existing Ceph RBD volume snapshot with name NAME to name NEW_NAME for volume VOLUME in pool POOL.
+    """
+    retcode, retmsg = pvc.lib.storage.ceph_snapshot_modify(
+        CLI_CONFIG, pool, volume, name, new_name=new_name
+    )
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc storage volume snapshot remove
+###############################################################################
+@click.command(name="remove", short_help="Remove RBD volume snapshot.")
+@connection_req
+@click.argument("pool")
+@click.argument("volume")
+@click.argument("name")
+@confirm_opt("Remove snapshot {name} for volume {pool}/{volume}")
+def cli_storage_volume_snapshot_remove(pool, volume, name):
+    """
+    Remove a Ceph RBD volume snapshot with name NAME from volume VOLUME in pool POOL.
+
+    DANGER: This will completely remove the snapshot.
+    """
+
+    retcode, retmsg = pvc.lib.storage.ceph_snapshot_remove(
+        CLI_CONFIG, pool, volume, name
+    )
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc storage volume snapshot rollback
+###############################################################################
+@click.command(name="rollback", short_help="Roll back RBD volume to snapshot.")
+@connection_req
+@click.argument("pool")
+@click.argument("volume")
+@click.argument("name")
+@confirm_opt("Roll back to snapshot {name} for volume {pool}/{volume}")
+def cli_storage_volume_snapshot_rollback(pool, volume, name):
+    """
+    Roll back the Ceph RBD volume VOLUME in pool POOL to the snapshot NAME.
+
+    DANGER: All data written to the volume since the given snapshot will be permanently lost.
+
+    (!) WARNING: A rollback cannot be performed on an RBD volume with active I/O. Doing so will cause
+    undefined behaviour and possible corruption. Ensure that any VM(s) using this RBD volume are
+    stopped or disabled before attempting a snapshot rollback.
+
+    (!) WARNING: RBD snapshots are crash-consistent but not filesystem-aware. If a snapshot was taken
+    of a running VM, restoring that snapshot will be equivalent to having forcibly restarted the
+    VM at the moment of the snapshot.
+    """
+
+    retcode, retmsg = pvc.lib.storage.ceph_snapshot_rollback(
+        CLI_CONFIG, pool, volume, name
+    )
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc storage volume snapshot list
+###############################################################################
+@click.command(name="list", short_help="List cluster RBD volume shapshots.")
+@connection_req
+@click.argument("limit", default=None, required=False)
+@click.option(
+    "-p",
+    "--pool",
+    "pool",
+    default=None,
+    show_default=True,
+    help="Show snapshots from this pool only.",
+)
+@click.option(
+    "-o",
+    "--volume",
+    "volume",
+    default=None,
+    show_default=True,
+    help="Show snapshots from this volume only.",
+)
+@format_opt(
+    {
+        "pretty": cli_storage_snapshot_list_format_pretty,
+        "raw": lambda d: " ".join(
+            [f"{s['pool']}/{s['volume']}@{s['snapshot']}" for s in d]
+        ),
+        "json": lambda d: jdumps(d),
+        "json-pretty": lambda d: jdumps(d, indent=2),
+    }
+)
+def cli_storage_volume_snapshot_list(pool, volume, limit, format_function):
+    """
+    List all Ceph RBD volume snapshots; optionally only match elements matching name regex LIMIT.
+    """
+
+    pages = pvc.lib.storage.ceph_snapshot_list_pages(CLI_CONFIG, limit, volume, pool)
+    finish_pages(pages, format_function)
+
+
+###############################################################################
+# Click command tree
+###############################################################################
+
+cli_storage.add_command(cli_storage_status)
+cli_storage.add_command(cli_storage_util)
+cli_storage_benchmark.add_command(cli_storage_benchmark_run)
+cli_storage_benchmark.add_command(cli_storage_benchmark_info)
+cli_storage_benchmark.add_command(cli_storage_benchmark_list)
+cli_storage_benchmark.add_command(cli_storage_benchmark_compare)
+cli_storage.add_command(cli_storage_benchmark)
+cli_storage.add_command(cli_storage_osd_create_db_vg)
+cli_storage_osd.add_command(cli_storage_osd_create_db_vg)
+cli_storage_osd.add_command(cli_storage_osd_add)
+cli_storage_osd.add_command(cli_storage_osd_replace)
+cli_storage_osd.add_command(cli_storage_osd_refresh)
+cli_storage_osd.add_command(cli_storage_osd_remove)
+cli_storage_osd.add_command(cli_storage_osd_in)
+cli_storage_osd.add_command(cli_storage_osd_out)
+cli_storage_osd.add_command(cli_storage_osd_set)
+cli_storage_osd.add_command(cli_storage_osd_unset)
+cli_storage_osd.add_command(cli_storage_osd_list)
+cli_storage.add_command(cli_storage_osd)
+cli_storage_pool.add_command(cli_storage_pool_add)
+cli_storage_pool.add_command(cli_storage_pool_remove)
+cli_storage_pool.add_command(cli_storage_pool_set_pgs)
+cli_storage_pool.add_command(cli_storage_pool_list)
+cli_storage.add_command(cli_storage_pool)
+cli_storage_volume.add_command(cli_storage_volume_add)
+cli_storage_volume.add_command(cli_storage_volume_upload)
+cli_storage_volume.add_command(cli_storage_volume_remove)
+cli_storage_volume.add_command(cli_storage_volume_resize)
+cli_storage_volume.add_command(cli_storage_volume_rename)
+cli_storage_volume.add_command(cli_storage_volume_clone)
+cli_storage_volume.add_command(cli_storage_volume_list)
+cli_storage_volume_snapshot.add_command(cli_storage_volume_snapshot_add)
+cli_storage_volume_snapshot.add_command(cli_storage_volume_snapshot_rename)
+cli_storage_volume_snapshot.add_command(cli_storage_volume_snapshot_remove)
+cli_storage_volume_snapshot.add_command(cli_storage_volume_snapshot_rollback)
+cli_storage_volume_snapshot.add_command(cli_storage_volume_snapshot_list)
+cli_storage_volume.add_command(cli_storage_volume_snapshot)
+cli_storage.add_command(cli_storage_volume)
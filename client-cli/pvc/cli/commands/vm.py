@@ -0,0 +1,2980 @@
+#!/usr/bin/env python3
+
+# vm.py - PVC Click CLI VM commands
+# Part of the Parallel Virtual Cluster (PVC) system
+#
+#    Copyright (C) 2018-2024 Joshua M. Boniface <joshua@boniface.me>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+from colorama import Fore
+from difflib import unified_diff
+from functools import wraps
+from json import dumps as jdumps
+from re import match
+
+from pvc.cli.common import *
+from pvc.cli.helpers import *
+from pvc.cli.waiters import *
+from pvc.cli.parsers import *
+from pvc.cli.formatters import *
+
+import pvc.lib
+
+import click
+
+
+###############################################################################
+# > pvc vm
+###############################################################################
+@click.group(
+    name="vm",
+    short_help="Manage PVC VMs.",
+    context_settings=CONTEXT_SETTINGS,
+)
+def cli_vm():
+    """
+    Manage and view the status of VMs in a PVC cluster.
+    """
+    pass
+
+
+###############################################################################
+# > pvc vm define
+###############################################################################
+@click.command(
+    name="define", short_help="Define a new virtual machine from a Libvirt XML file."
+)
+@connection_req
+@click.option(
+    "-t",
+    "--target",
+    "target_node",
+    help="Home node for this domain; autoselect if unspecified.",
+)
+@click.option(
+    "-l",
+    "--limit",
+    "node_limit",
+    default=None,
+    show_default=False,
+    help="Comma-separated list of nodes to limit VM operation to; saved with VM.",
+)
+@click.option(
+    "-s",
+    "--node-selector",
+    "node_selector",
+    default="none",
+    show_default=True,
+    type=click.Choice(["mem", "memprov", "load", "vcpus", "vms", "none"]),
+    help='Method to determine optimal target node during autoselect; "none" will use the default for the cluster.',
+)
+@click.option(
+    "-a/-A",
+    "--autostart/--no-autostart",
+    "node_autostart",
+    is_flag=True,
+    default=False,
+    help="Start VM automatically on next unflush/ready state of home node; unset by daemon once used.",
+)
+@click.option(
+    "-m",
+    "--method",
+    "migration_method",
+    default="none",
+    show_default=True,
+    type=click.Choice(["none", "live", "shutdown"]),
+    help="The preferred migration method of the VM between nodes; saved with VM.",
+)
+@click.option(
+    "-d",
+    "--max-downtime",
+    "migration_max_downtime",
+    default=300,
+    show_default=True,
+    help="The maximum time in milliseconds that a VM can be down for during a live migration; busy VMs may require a larger downtime.",
+)
+@click.option(
+    "-g",
+    "--tag",
+    "user_tags",
+    default=[],
+    multiple=True,
+    help="User tag for the VM; can be specified multiple times, once per tag.",
+)
+@click.option(
+    "-G",
+    "--protected-tag",
+    "protected_tags",
+    default=[],
+    multiple=True,
+    help="Protected user tag for the VM; can be specified multiple times, once per tag.",
+)
+@click.argument("vmconfig", type=click.File())
+def cli_vm_define(
+    vmconfig,
+    target_node,
+    node_limit,
+    node_selector,
+    node_autostart,
+    migration_method,
+    migration_max_downtime,
+    user_tags,
+    protected_tags,
+):
+    """
+    Define a new virtual machine from Libvirt XML configuration file VMCONFIG.
+
+    The target node selector ("--node-selector"/"-s") can be "none" to use the cluster default, or one of the following values:
+      * "mem": choose the node with the most (real) free memory
+      * "memprov": choose the node with the least provisioned VM memory
+      * "vcpus": choose the node with the least allocated VM vCPUs
+      * "load": choose the node with the lowest current load average
+      * "vms": choose the node with the least number of provisioned VMs
+
+    For most clusters, the migration method selector ("--method"/"-m") "mem" should be sufficient, but others may be used based on the cluster workload and available resources. The following caveats should be considered:
+      * "mem" looks at the free memory of the node in general, ignoring the amount provisioned to VMs; if any VM's internal memory usage changes, this value would be affected.
+      * "memprov" looks at the provisioned memory, not the allocated memory; thus, stopped or disabled VMs are counted towards a node's memory for this selector, even though their memory is not actively in use.
+      * "load" looks at the system load of the node in general, ignoring load in any particular VMs; if any VM's CPU usage changes, this value would be affected. This might be preferable on clusters with some very CPU intensive VMs.
+
+    For most VMs, the 300ms default maximum downtime ("--max-downtime"/"-d") should be sufficient. However very busy VMs with a lot of memory pressure or CPU load may require a larger downtime to properly migrate. Generally, keep this at the default unless you know the VM will be extremely busy, or you find you have problems migrating it later. Reasonable values range from 100ms to 2000ms (2 seconds).
+    """
+
+    # Open the XML file
+    vmconfig_data = vmconfig.read()
+    vmconfig.close()
+
+    # Verify our XML is sensible
+    try:
+        from lxml.etree import fromstring, tostring
+
+        xml_data = fromstring(vmconfig_data)
+        new_cfg = tostring(xml_data, pretty_print=True).decode("utf8")
+    except Exception:
+        finish(False, "Error: XML is malformed or invalid")
+
+    retcode, retmsg = pvc.lib.vm.vm_define(
+        CLI_CONFIG,
+        new_cfg,
+        target_node,
+        node_limit,
+        node_selector,
+        node_autostart,
+        migration_method,
+        migration_max_downtime,
+        user_tags,
+        protected_tags,
+    )
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm meta
+###############################################################################
+@click.command(name="meta", short_help="Modify PVC metadata of an existing VM.")
+@connection_req
+@click.option(
+    "-l",
+    "--limit",
+    "node_limit",
+    default=None,
+    show_default=False,
+    help="Comma-separated list of nodes to limit VM operation to; set to an empty string to remove.",
+)
+@click.option(
+    "-s",
+    "--node-selector",
+    "node_selector",
+    default=None,
+    show_default=False,
+    type=click.Choice(["mem", "memprov", "load", "vcpus", "vms", "none"]),
+    help='Method to determine optimal target node during autoselect; "none" will use the default for the cluster.',
+)
+@click.option(
+    "-a/-A",
+    "--autostart/--no-autostart",
+    "node_autostart",
+    is_flag=True,
+    default=None,
+    help="Start VM automatically on next unflush/ready state of home node; unset by daemon once used.",
+)
+@click.option(
+    "-m",
+    "--method",
+    "migration_method",
+    default="none",
+    show_default=True,
+    type=click.Choice(["none", "live", "shutdown"]),
+    help="The preferred migration method of the VM between nodes.",
+)
+@click.option(
+    "-d",
+    "--max-downtime",
+    "migration_max_downtime",
+    default=None,
+    help="The maximum time in milliseconds that a VM can be down for during a live migration; busy VMs may require a larger downtime.",
+)
+@click.option(
+    "--migration-profile",
+    "migration_profile",
+    default=None,
+    show_default=False,
+    help='The live migration profile of the VM, as defined in the cluster configuration; "" will use the default for the cluster.',
+)
+@click.option(
+    "-p",
+    "--profile",
+    "provisioner_profile",
+    default=None,
+    show_default=False,
+    help="PVC provisioner profile name for VM.",
+)
+@click.argument("domain")
+def cli_vm_meta(
+    domain,
+    node_limit,
+    node_selector,
+    node_autostart,
+    migration_method,
+    migration_max_downtime,
+    migration_profile,
+    provisioner_profile,
+):
+    """
+    Modify the PVC metadata of existing virtual machine DOMAIN. At least one option to update must be specified. DOMAIN may be a UUID or name.
+
+    For details on the available option values, please see help for the command "pvc vm define".
+    """
+
+    if (
+        node_limit is None
+        and node_selector is None
+        and node_autostart is None
+        and migration_method is None
+        and migration_max_downtime is None
+        and migration_profile is None
+        and provisioner_profile is None
+    ):
+        finish(False, "At least one metadata option must be specified to update.")
+
+    retcode, retmsg = pvc.lib.vm.vm_metadata(
+        CLI_CONFIG,
+        domain,
+        node_limit,
+        node_selector,
+        node_autostart,
+        migration_method,
+        migration_max_downtime,
+        migration_profile,
+        provisioner_profile,
+    )
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm modify
+###############################################################################
+@click.command(name="modify", short_help="Modify an existing VM configuration.")
+@connection_req
+@click.option(
+    "-e",
+    "--editor",
+    "editor",
+    is_flag=True,
+    help="Use local editor to modify existing config.",
+)
+@click.option(
+    "-r",
+    "--restart",
+    "restart",
+    is_flag=True,
+    help="Immediately restart VM to apply new config.",
+)
+@click.option(
+    "-d",
+    "--confirm-diff",
+    "confirm_diff_flag",
+    is_flag=True,
+    default=False,
+    help="Confirm the diff.",
+)
+@click.option(
+    "-c",
+    "--confirm-restart",
+    "confirm_restart_flag",
+    is_flag=True,
+    default=False,
+    help="Confirm the restart.",
+)
+@click.option(
+    "-y",
+    "--yes",
+    "confirm_all_flag",
+    is_flag=True,
+    default=False,
+    help="Confirm the diff and the restart.",
+)
+@click.argument("domain")
+@click.argument("cfgfile", type=click.File(), default=None, required=False)
+def cli_vm_modify(
+    domain,
+    cfgfile,
+    editor,
+    restart,
+    confirm_diff_flag,
+    confirm_restart_flag,
+    confirm_all_flag,
+):
+    """
+    Modify existing virtual machine DOMAIN, either in-editor or with replacement CONFIG. DOMAIN may be a UUID or name.
+    """
+
+    if editor is False and cfgfile is None:
+        finish(
+            False,
+            'Either an XML config file or the "--editor" option must be specified.',
+        )
+
+    retcode, vm_information = pvc.lib.vm.vm_info(CLI_CONFIG, domain)
+    if not retcode or not vm_information.get("name", None):
+        finish(False, 'ERROR: Could not find VM "{}"!'.format(domain))
+
+    dom_name = vm_information.get("name")
+
+    # Grab the current config
+    current_vm_cfg_raw = vm_information.get("xml")
+
+    from lxml.etree import fromstring, tostring
+
+    xml_data = fromstring(current_vm_cfg_raw)
+    current_vm_cfgfile = tostring(xml_data, pretty_print=True).decode("utf8").strip()
+
+    if editor is True:
+        new_vm_cfgfile = click.edit(
+            text=current_vm_cfgfile, require_save=True, extension=".xml"
+        )
+        if new_vm_cfgfile is None:
+            echo(CLI_CONFIG, "Aborting with no modifications.")
+            exit(0)
+        else:
+            new_vm_cfgfile = new_vm_cfgfile.strip()
+
+    # We're operating in replace mode
+    else:
+        # Open the XML file
+        new_vm_cfgfile = cfgfile.read()
+        cfgfile.close()
+
+        echo(
+            CLI_CONFIG,
+            'Replacing configuration of VM "{}" with file "{}".'.format(
+                dom_name, cfgfile.name
+            ),
+        )
+
+    diff = list(
+        unified_diff(
+            current_vm_cfgfile.split("\n"),
+            new_vm_cfgfile.split("\n"),
+            fromfile="current",
+            tofile="modified",
+            fromfiledate="",
+            tofiledate="",
+            n=3,
+            lineterm="",
+        )
+    )
+    if len(diff) < 1:
+        echo(CLI_CONFIG, "Aborting with no modifications.")
+        exit(0)
+
+    # Show a diff and confirm
+    echo(CLI_CONFIG, "Pending modifications:")
+    echo(CLI_CONFIG, "")
+    for line in diff:
+        if match(r"^\+", line) is not None:
+            echo(CLI_CONFIG, Fore.GREEN + line + Fore.RESET)
+        elif match(r"^\-", line) is not None:
+            echo(CLI_CONFIG, Fore.RED + line + Fore.RESET)
+        elif match(r"^\^", line) is not None:
+            echo(CLI_CONFIG, Fore.BLUE + line + Fore.RESET)
+        else:
+            echo(CLI_CONFIG, line)
+    echo(CLI_CONFIG, "")
+
+    # Verify our XML is sensible
+    try:
+        from lxml.etree import fromstring, tostring
+
+        xml_data = fromstring(new_vm_cfgfile)
+        new_cfg = tostring(xml_data, pretty_print=True).decode("utf8")
+    except Exception as e:
+        finish(False, "Error: XML is malformed or invalid: {}".format(e))
+
+    if not confirm_diff_flag and not confirm_all_flag and not CLI_CONFIG["unsafe"]:
+        click.confirm("Write modifications to cluster?", abort=True)
+
+    if (
+        restart
+        and not confirm_restart_flag
+        and not confirm_all_flag
+        and not CLI_CONFIG["unsafe"]
+    ):
+        try:
+            click.confirm(
+                "Restart VM {}".format(domain), prompt_suffix="? ", abort=True
+            )
+        except Exception:
+            restart = False
+
+    retcode, retmsg = pvc.lib.vm.vm_modify(CLI_CONFIG, domain, new_cfg, restart)
+    if retcode and not restart:
+        retmsg = retmsg + " Changes will be applied on next VM start/restart."
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm rename
+###############################################################################
+@click.command(name="rename", short_help="Rename a virtual machine.")
+@connection_req
+@click.argument("domain")
+@click.argument("new_name")
+@confirm_opt("Rename virtual machine {domain} to {new_name}")
+def cli_vm_rename(domain, new_name):
+    """
+    Rename virtual machine DOMAIN, and all its connected disk volumes, to NEW_NAME. DOMAIN may be a UUID or name.
+    """
+
+    retcode, retmsg = pvc.lib.vm.vm_rename(CLI_CONFIG, domain, new_name)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm undefine
+###############################################################################
+@click.command(name="undefine", short_help="Undefine a virtual machine.")
+@connection_req
+@click.argument("domain")
+@confirm_opt("Remove definition of virtual machine {domain}")
+def cli_vm_undefine(domain):
+    """
+    Stop virtual machine DOMAIN and remove it database, preserving disks. DOMAIN may be a UUID or name.
+    """
+
+    retcode, retmsg = pvc.lib.vm.vm_remove(CLI_CONFIG, domain, delete_disks=False)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm remove
+###############################################################################
+@click.command(name="remove", short_help="Remove a virtual machine.")
+@connection_req
+@click.argument("domain")
+@confirm_opt("Remove virtual machine {domain} and all disks")
+def cli_vm_remove(domain):
+    """
+    Stop virtual machine DOMAIN and remove it, along with all disks,. DOMAIN may be a UUID or name.
+    """
+
+    retcode, retmsg = pvc.lib.vm.vm_remove(CLI_CONFIG, domain, delete_disks=True)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm start
+###############################################################################
+@click.command(name="start", short_help="Start up a defined virtual machine.")
+@connection_req
+@click.argument("domain")
+@click.option(
+    "--force",
+    "force_flag",
+    is_flag=True,
+    default=False,
+    help="Force a snapshot mirror state change.",
+)
+def cli_vm_start(domain, force_flag):
+    """
+    Start virtual machine DOMAIN on its configured node. DOMAIN may be a UUID or name.
+
+    If the VM is a snapshot mirror, "--force" allows a manual state change to the mirror.
+    """
+
+    retcode, retmsg = pvc.lib.vm.vm_state(CLI_CONFIG, domain, "start", force=force_flag)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm restart
+###############################################################################
+@click.command(name="restart", short_help="Restart a running virtual machine.")
+@connection_req
+@click.argument("domain")
+@click.option(
+    "-w",
+    "--wait",
+    "wait",
+    is_flag=True,
+    default=False,
+    help="Wait for restart to complete before returning.",
+)
+@confirm_opt("Restart virtual machine {domain}")
+def cli_vm_restart(domain, wait):
+    """
+    Restart running virtual machine DOMAIN. DOMAIN may be a UUID or name.
+    """
+
+    retcode, retmsg = pvc.lib.vm.vm_state(CLI_CONFIG, domain, "restart", wait=wait)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm shutdown
+###############################################################################
+@click.command(
+    name="shutdown", short_help="Gracefully shut down a running virtual machine."
+)
+@connection_req
+@click.argument("domain")
+@click.option(
+    "-w",
+    "--wait",
+    "wait",
+    is_flag=True,
+    default=False,
+    help="Wait for shutdown to complete before returning.",
+)
+@confirm_opt("Shut down virtual machine {domain}")
+def cli_vm_shutdown(domain, wait):
+    """
+    Gracefully shut down virtual machine DOMAIN. DOMAIN may be a UUID or name.
+    """
+
+    retcode, retmsg = pvc.lib.vm.vm_state(CLI_CONFIG, domain, "shutdown", wait=wait)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm stop
+###############################################################################
+@click.command(name="stop", short_help="Forcibly halt a running virtual machine.")
+@connection_req
+@click.argument("domain")
+@click.option(
+    "--force",
+    "force_flag",
+    is_flag=True,
+    default=False,
+    help="Force a snapshot mirror state change.",
+)
+@confirm_opt("Forcibly stop virtual machine {domain}")
+def cli_vm_stop(domain, force_flag):
+    """
+    Forcibly halt (destroy) running virtual machine DOMAIN. DOMAIN may be a UUID or name.
+
+    If the VM is a snapshot mirror, "--force" allows a manual state change to the mirror.
+    """
+
+    retcode, retmsg = pvc.lib.vm.vm_state(CLI_CONFIG, domain, "stop", force=force_flag)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm disable
+###############################################################################
+@click.command(name="disable", short_help="Mark a virtual machine as disabled.")
+@connection_req
+@click.argument("domain")
+@click.option(
+    "--force",
+    "force_flag",
+    is_flag=True,
+    default=False,
+    help="Forcibly stop VM without shutdown and/or force a snapshot mirror state change.",
+)
+@confirm_opt("Shut down and disable virtual machine {domain}")
+def cli_vm_disable(domain, force_flag):
+    """
+    Shut down virtual machine DOMAIN and mark it as disabled. DOMAIN may be a UUID or name.
+
+    If "--force" is specified, and the VM is running, it will be forcibly stopped instead of waiting for a graceful ACPI shutdown. If the VM is a snapshot mirror, "--force" allows a manual state change to the mirror.
+    """
+
+    retcode, retmsg = pvc.lib.vm.vm_state(
+        CLI_CONFIG, domain, "disable", force=force_flag
+    )
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm move
+###############################################################################
+@click.command(
+    name="move", short_help="Permanently move a virtual machine to another node."
+)
+@connection_req
+@click.argument("domain")
+@click.option(
+    "-t",
+    "--target",
+    "target_node",
+    default=None,
+    help="Target node to migrate to; autodetect if unspecified.",
+)
+@click.option(
+    "-w",
+    "--wait",
+    "wait",
+    is_flag=True,
+    default=False,
+    help="Wait for migration to complete before returning.",
+)
+@click.option(
+    "--force-live",
+    "force_live",
+    is_flag=True,
+    default=False,
+    help="Do not fall back to shutdown-based migration if live migration fails.",
+)
+def cli_vm_move(domain, target_node, wait, force_live):
+    """
+    Permanently move virtual machine DOMAIN, via live migration if running and possible, to another node. DOMAIN may be a UUID or name.
+    """
+
+    retcode, retmsg = pvc.lib.vm.vm_node(
+        CLI_CONFIG,
+        domain,
+        target_node,
+        "move",
+        force=False,
+        wait=wait,
+        force_live=force_live,
+    )
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm migrate
+###############################################################################
+@click.command(
+    name="migrate", short_help="Temporarily migrate a virtual machine to another node."
+)
+@connection_req
+@click.argument("domain")
+@click.option(
+    "-t",
+    "--target",
+    "target_node",
+    default=None,
+    help="Target node to migrate to; autodetect if unspecified.",
+)
+@click.option(
+    "-f",
+    "--force",
+    "force_migrate",
+    is_flag=True,
+    default=False,
+    help="Force migrate an already migrated VM; does not replace an existing previous node value.",
+)
+@click.option(
+    "-w",
+    "--wait",
+    "wait",
+    is_flag=True,
+    default=False,
+    help="Wait for migration to complete before returning.",
+)
+@click.option(
+    "--force-live",
+    "force_live",
+    is_flag=True,
+    default=False,
+    help="Do not fall back to shutdown-based migration if live migration fails.",
+)
+def cli_vm_migrate(domain, target_node, force_migrate, wait, force_live):
+    """
+    Temporarily migrate running virtual machine DOMAIN, via live migration if possible, to another node. DOMAIN may be a UUID or name. If DOMAIN is not running, it will be started on the target node.
+    """
+
+    retcode, retmsg = pvc.lib.vm.vm_node(
+        CLI_CONFIG,
+        domain,
+        target_node,
+        "migrate",
+        force=force_migrate,
+        wait=wait,
+        force_live=force_live,
+    )
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm unmigrate
+###############################################################################
+@click.command(
+    name="unmigrate",
+    short_help="Restore a migrated virtual machine to its original node.",
+)
+@connection_req
+@click.argument("domain")
+@click.option(
+    "-w",
+    "--wait",
+    "wait",
+    is_flag=True,
+    default=False,
+    help="Wait for migration to complete before returning.",
+)
+@click.option(
+    "--force-live",
+    "force_live",
+    is_flag=True,
+    default=False,
+    help="Do not fall back to shutdown-based migration if live migration fails.",
+)
+def cli_vm_unmigrate(domain, wait, force_live):
+    """
+    Restore previously migrated virtual machine DOMAIN, via live migration if possible, to its original node. DOMAIN may be a UUID or name. If DOMAIN is not running, it will be started on the target node.
+    """
+
+    retcode, retmsg = pvc.lib.vm.vm_node(
+        CLI_CONFIG,
+        domain,
+        None,
+        "unmigrate",
+        force=False,
+        wait=wait,
+        force_live=force_live,
+    )
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm flush-locks
+###############################################################################
+@click.command(
+    name="flush-locks", short_help="Flush stale RBD locks for a virtual machine."
+)
+@connection_req
+@click.argument("domain")
+@click.option(
+    "--wait/--no-wait",
+    "wait_flag",
+    is_flag=True,
+    default=True,
+    show_default=True,
+    help="Wait or don't wait for task to complete, showing progress if waiting",
+)
+def cli_vm_flush_locks(domain, wait_flag):
+    """
+    Flush stale RBD locks for virtual machine DOMAIN. DOMAIN may be a UUID or name. DOMAIN must be in the stop, disable, or fail state before flushing locks.
+
+    (†) NOTE: This is a task-based command. The "--wait" flag (default) will block and show progress. Specifying the "--no-wait" flag will return immediately with a job ID instead, which can be queried externally later.
+    """
+
+    retcode, retmsg = pvc.lib.vm.vm_locks(CLI_CONFIG, domain, wait_flag=wait_flag)
+
+    if retcode and wait_flag:
+        retmsg = wait_for_celery_task(CLI_CONFIG, retmsg)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm snapshot
+###############################################################################
+@click.group(
+    name="snapshot",
+    short_help="Manage snapshots for PVC VMs.",
+    context_settings=CONTEXT_SETTINGS,
+)
+def cli_vm_snapshot():
+    """
+    Manage snapshots of VMs in a PVC cluster.
+    """
+    pass
+
+
+###############################################################################
+# > pvc vm snapshot create
+###############################################################################
+@click.command(name="create", short_help="Create a snapshot of a virtual machine.")
+@connection_req
+@click.argument("domain")
+@click.argument("snapshot_name", required=False, default=None)
+@click.option(
+    "-f",
+    "--fsfreeze",
+    "fsfreeze_flag",
+    is_flag=True,
+    default=False,
+    help="Freeze the filesystems of a running VM while its disks are snapshotted; requires the QEMU guest agent.",
+)
+@click.option(
+    "--wait/--no-wait",
+    "wait_flag",
+    is_flag=True,
+    default=True,
+    show_default=True,
+    help="Wait or don't wait for task to complete, showing progress if waiting",
+)
+def cli_vm_snapshot_create(domain, snapshot_name, fsfreeze_flag, wait_flag):
+    """
+    Create a snapshot of the disks and XML configuration of virtual machine DOMAIN, with the
+    optional name SNAPSHOT_NAME. DOMAIN may be a UUID or name.
+
+    (!) WARNING: RBD snapshots are crash-consistent but not filesystem-aware. If a snapshot was taken
+    of a running VM, restoring that snapshot will be equivalent to having forcibly restarted the
+    VM at the moment of the snapshot. With "--fsfreeze", the filesystems of the VM are frozen by the
+    QEMU guest agent while its disks are snapshotted, making the snapshot filesystem-consistent.
+    """
+
+    retcode, retmsg = pvc.lib.vm.vm_create_snapshot(
+        CLI_CONFIG,
+        domain,
+        snapshot_name=snapshot_name,
+        fsfreeze=fsfreeze_flag,
+        wait_flag=wait_flag,
+    )
+
+    if retcode and wait_flag:
+        retmsg = wait_for_celery_task(CLI_CONFIG, retmsg)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm snapshot remove
+###############################################################################
+@click.command(name="remove", short_help="Remove a snapshot of a virtual machine.")
+@connection_req
+@click.argument("domain")
+@click.argument("snapshot_name")
+@click.option(
+    "--wait/--no-wait",
+    "wait_flag",
+    is_flag=True,
+    default=True,
+    show_default=True,
+    help="Wait or don't wait for task to complete, showing progress if waiting",
+)
+@confirm_opt("Remove shapshot {snapshot_name} of VM {domain}")
+def cli_vm_snapshot_remove(domain, snapshot_name, wait_flag):
+    """
+    Remove the snapshot SNAPSHOT_NAME of the disks and XML configuration of virtual machine DOMAIN,
+    DOMAIN may be a UUID or name.
+    """
+
+    retcode, retmsg = pvc.lib.vm.vm_remove_snapshot(
+        CLI_CONFIG, domain, snapshot_name, wait_flag=wait_flag
+    )
+
+    if retcode and wait_flag:
+        retmsg = wait_for_celery_task(CLI_CONFIG, retmsg)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm snapshot rollback
+###############################################################################
+@click.command(
+    name="rollback", short_help="Roll back to a snapshot of a virtual machine."
+)
+@connection_req
+@click.argument("domain")
+@click.argument("snapshot_name")
+@click.option(
+    "--wait/--no-wait",
+    "wait_flag",
+    is_flag=True,
+    default=True,
+    show_default=True,
+    help="Wait or don't wait for task to complete, showing progress if waiting",
+)
+@confirm_opt(
+    "Roll back to snapshot {snapshot_name} of {domain} and lose all data and changes since this snapshot"
+)
+def cli_vm_snapshot_rollback(domain, snapshot_name, wait_flag):
+    """
+    Roll back to the snapshot SNAPSHOT_NAME of the disks and XML configuration of virtual machine DOMAIN,
+    DOMAIN may be a UUID or name.
+    """
+
+    retcode, retmsg = pvc.lib.vm.vm_rollback_snapshot(
+        CLI_CONFIG, domain, snapshot_name, wait_flag=wait_flag
+    )
+
+    if retcode and wait_flag:
+        retmsg = wait_for_celery_task(CLI_CONFIG, retmsg)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm snapshot export
+###############################################################################
+@click.command(
+    name="export", short_help="Export a snapshot of a virtual machine to files."
+)
+@connection_req
+@click.argument("domain")
+@click.argument("snapshot_name")
+@click.argument("export_path")
+@click.option(
+    "-i",
+    "--incremental",
+    "incremental_parent",
+    default=None,
+    help="Perform an incremental volume export from this parent snapshot.",
+)
+@click.option(
+    "-f",
+    "--format",
+    "export_format",
+    type=click.Choice(["rbd", "chunked"]),
+    default="rbd",
+    show_default=True,
+    help="Write raw RBD export images, or deduplicated and compressed chunks.",
+)
+@click.option(
+    "--wait/--no-wait",
+    "wait_flag",
+    is_flag=True,
+    default=True,
+    show_default=True,
+    help="Wait or don't wait for task to complete, showing progress if waiting",
+)
+def cli_vm_snapshot_export(
+    domain, snapshot_name, export_path, incremental_parent, export_format, wait_flag
+):
+    """
+    Export the (existing) snapshot SNAPSHOT_NAME of virtual machine DOMAIN to the absolute path EXPORT_PATH on the current PVC primary coordinator.
+    DOMAIN may be a UUID or name.
+
+    EXPORT_PATH must be a valid absolute directory path on the cluster "primary" coordinator (see "pvc node list") allowing writes from the API daemon (normally running as "root"). The EXPORT_PATH should be a large storage volume, ideally a remotely mounted filesystem (e.g. NFS, SSHFS, etc.) or non-Ceph-backed disk; PVC does not handle this path, that is up to the administrator to configure and manage.
+
+    The export will include the VM configuration, metainfo, and a point-in-time snapshot of all attached RBD volumes.
+
+    Incremental exports are possible by specifying the "-i"/"--incremental" option along with a parent snapshot name. To correctly import, that export must exist on EXPORT_PATH.
+
+    Full export volume images are sparse-allocated, however it is recommended for safety to consider their maximum allocated size when allocated space for the EXPORT_PATH. Incremental volume images are generally small but are dependent entirely on the rate of data change in each volume.
+
+    With "-f"/"--format chunked", volumes are instead split into fixed-size chunks which are compressed and stored once by hash in a ".chunks" directory under EXPORT_PATH, shared by all chunked exports there, along with a manifest per volume. Identical data, such as that of VMs cloned from the same template, is stored only once, and every export, including incrementals, can be imported on its own. Chunks are not removed when an export directory is deleted; they are reclaimed by the autobackup garbage collection if EXPORT_PATH is the autobackup root.
+    """
+
+    retcode, retmsg = pvc.lib.vm.vm_export_snapshot(
+        CLI_CONFIG,
+        domain,
+        snapshot_name,
+        export_path,
+        incremental_parent=incremental_parent,
+        export_format=export_format,
+        wait_flag=wait_flag,
+    )
+
+    if retcode and wait_flag:
+        retmsg = wait_for_celery_task(CLI_CONFIG, retmsg)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm snapshot import
+###############################################################################
+@click.command(name="import", short_help="Import a snapshot of a virtual machine.")
+@connection_req
+@click.argument("domain")
+@click.argument("snapshot_name")
+@click.argument("import_path")
+@click.option(
+    "-r/-R",
+    "--retain-snapshot/--remove-snapshot",
+    "retain_snapshot",
+    is_flag=True,
+    default=True,
+    help="Retain or remove restored (parent, if incremental) snapshot in Ceph.",
+)
+@click.option(
+    "--volume-concurrency",
+    "volume_concurrency",
+    type=click.IntRange(min=1),
+    default=2,
+    show_default=True,
+    help="The number of volumes to import at once.",
+)
+@click.option(
+    "--bandwidth-limit",
+    "bandwidth_limit",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Limit the combined import throughput of all volumes to this many MB/s.",
+)
+@click.option(
+    "--wait/--no-wait",
+    "wait_flag",
+    is_flag=True,
+    default=True,
+    show_default=True,
+    help="Wait or don't wait for task to complete, showing progress if waiting",
+)
+def cli_vm_snapshot_import(
+    domain,
+    snapshot_name,
+    import_path,
+    retain_snapshot,
+    volume_concurrency,
+    bandwidth_limit,
+    wait_flag,
+):
+    """
+    Import the snapshot SNAPSHOT_NAME of virtual machine DOMAIN from the absolute path IMPORT_PATH on the current PVC primary coordinator.
+    DOMAIN may be a UUID or name.
+
+    IMPORT_PATH must be a valid absolute directory path on the cluster "primary" coordinator (see "pvc node list") allowing reads from the API daemon (normally running as "root"). The IMPORT_PATH should be a large storage volume, ideally a remotely mounted filesystem (e.g. NFS, SSHFS, etc.) or non-Ceph-backed disk; PVC does not handle this path, that is up to the administrator to configure and manage.
+
+    The import will include the VM configuration, metainfo, and the point-in-time snapshot of all attached RBD volumes. Incremental imports will be automatically handled.
+
+    Up to "--volume-concurrency" volumes are imported at once, each volume continuing with its incremental image as soon as its parent image is imported. If "--bandwidth-limit" is specified, the combined read throughput from IMPORT_PATH is limited to that many MB/s, to avoid saturating the storage or network backing it.
+
+    A VM named DOMAIN or with the same UUID must not exist; if a VM with the same name or UUID already exists, it must be removed (or renamed and then undefined, to preserve volumes while freeing the UUID) before importing.
+
+    If the "-r"/"--retain-snapshot" option is specified (the default), for incremental imports, only the parent snapshot is kept; for full imports, the imported snapshot is kept. If the "-R"/"--remove-snapshot" option is specified, the imported snapshot is removed.
+
+    (!) WARNING: The "-R"/"--remove-snapshot" option will invalidate any existing incremental snapshots based on the same incremental parent for the imported VM.
+    """
+
+    retcode, retmsg = pvc.lib.vm.vm_import_snapshot(
+        CLI_CONFIG,
+        domain,
+        snapshot_name,
+        import_path,
+        retain_snapshot=retain_snapshot,
+        volume_concurrency=volume_concurrency,
+        bandwidth_limit=bandwidth_limit,
+        wait_flag=wait_flag,
+    )
+
+    if retcode and wait_flag:
+        retmsg = wait_for_celery_task(CLI_CONFIG, retmsg)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm snapshot send
+###############################################################################
+@click.command(
+    name="send",
+    short_help="Send a snapshot of a virtual machine to another PVC cluster.",
+)
+@connection_req
+@click.argument("domain")
+@click.argument("snapshot_name")
+@click.argument("destination")
+@click.option(
+    "-k",
+    "--destination-api-key",
+    "destination_api_key",
+    default=None,
+    help="The API key of the destination cluster when specifying an API URI.",
+)
+@click.option(
+    "-p",
+    "--destination-pool",
+    "destination_storage_pool",
+    default=None,
+    help="The target storage pool on the destination cluster, if it differs from the source pool.",
+)
+@click.option(
+    "-i",
+    "--incremental",
+    "incremental_parent",
+    default=None,
+    help="Perform an incremental volume send from this parent snapshot.",
+)
+@click.option(
+    "-c",
+    "--compression",
+    "compression",
+    type=click.Choice(["zstd", "lz4", "none"]),
+    default="zstd",
+    show_default=True,
+    help="The wire compression to use for volume sends.",
+)
+@click.option(
+    "--volume-concurrency",
+    "volume_concurrency",
+    type=click.IntRange(min=1),
+    default=2,
+    show_default=True,
+    help="The number of volumes to send at once.",
+)
+@click.option(
+    "--stream-concurrency",
+    "stream_concurrency",
+    type=click.IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="The number of concurrent connections to send each volume over.",
+)
+@click.option(
+    "--wait/--no-wait",
+    "wait_flag",
+    is_flag=True,
+    default=True,
+    show_default=True,
+    help="Wait or don't wait for task to complete, showing progress if waiting",
+)
+def cli_vm_snapshot_send(
+    domain,
+    snapshot_name,
+    destination,
+    destination_api_key,
+    destination_storage_pool,
+    incremental_parent,
+    compression,
+    volume_concurrency,
+    stream_concurrency,
+    wait_flag,
+):
+    """
+        Send the (existing) snapshot SNAPSHOT_NAME of virtual machine DOMAIN to the remote PVC cluster DESTINATION.
+
+        DOMAIN may be a UUID or name. DESTINATION may be either a configured PVC connection name in this CLI instance (i.e. a valid argument to "--connection"), or a full API URI, including the scheme, port and API prefix; if using the latter, an API key can be specified with the "-k"/"--destination-api-key" option. SSL validation will be inferred from this CLI instance's configuration.
+
+        The send will include the VM configuration, metainfo, and a point-in-time snapshot of all attached RBD volumes.
+
+        By default, the storage pool of the sending cluster will be used at the destination cluster as well. If a pool of that name does not exist, specify a valid pool name on the destination with the "-p"/"--detination-pool" option.
+
+        Incremental sends are possible by specifying the "-i"/"--incremental-parent" option along with a parent snapshot name. To correctly receive, that parent snapshot must exist on DESTINATION. Subsequent sends after the first do not have to be incremental, but an incremental send is likely to perform better than a full send if the VM experiences few writes.
+
+        Sends transmit only the allocated extents of each volume, or for incremental sends only the changed extents. Up to "--volume-concurrency" volumes are sent at once, each over up to "--stream-concurrency" connections which are resumed automatically if interrupted, and extents are checksummed and compressed on the wire with the "-c"/"--compression" type if DESTINATION supports it, falling back to a supported type otherwise. Destinations running older PVC versions receive data in the previous uncompressed formats.
+
+        (!) WARNING: Once sent, the VM will be in the state "mirror" on the destination cluster. If it is subsequently started, for instance for disaster recovery, a new snapshot must be taken on the destination cluster and sent back or data will be inconsistent between the instances. Only VMs in the "mirror" state can accept new sends.
+
+        (!) WARNING: This functionality has no automatic backout on the remote side. While a properly configured cluster should not fail any step in the process, a situation like an intermittent network connection might cause a failure which would have to be manually corrected on that side, usually by removing the mirrored VM and retrying, or rolling back to a previous snapshot and retrying. Future versions may enhance automatic recovery, but for now this would be up to the administrator.
+    """
+
+    connections_config = get_store(CLI_CONFIG["store_path"])
+    if destination in connections_config.keys():
+        destination_cluster_config = connections_config[destination]
+        destination_api_uri = "{}://{}:{}{}".format(
+            destination_cluster_config["scheme"],
+            destination_cluster_config["host"],
+            destination_cluster_config["port"],
+            CLI_CONFIG["api_prefix"],
+        )
+        destination_api_key = destination_cluster_config["api_key"]
+    else:
+        if "http" not in destination:
+            finish(
+                False, "ERROR: A valid destination cluster or URI must be specified!"
+            )
+        destination_api_uri = destination
+        destination_api_key = destination_api_key
+
+    retcode, retmsg = pvc.lib.vm.vm_send_snapshot(
+        CLI_CONFIG,
+        domain,
+        snapshot_name,
+        destination_api_uri,
+        destination_api_key,
+        destination_api_verify_ssl=CLI_CONFIG.get("verify_ssl"),
+        destination_storage_pool=destination_storage_pool,
+        incremental_parent=incremental_parent,
+        compression=compression,
+        volume_concurrency=volume_concurrency,
+        stream_concurrency=stream_concurrency,
+        wait_flag=wait_flag,
+    )
+
+    if retcode and wait_flag:
+        retmsg = wait_for_celery_task(CLI_CONFIG, retmsg)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm mirror
+###############################################################################
+@click.group(
+    name="mirror",
+    short_help="Manage snapshot mirrors for PVC VMs.",
+    context_settings=CONTEXT_SETTINGS,
+)
+def cli_vm_mirror():
+    """
+    Manage snapshot mirrors of VMs in a PVC cluster.
+    """
+    pass
+
+
+###############################################################################
+# > pvc vm mirror create
+###############################################################################
+@click.command(
+    name="create",
+    short_help="Create a snapshot mirror of a virtual machine to another PVC cluster.",
+)
+@connection_req
+@click.argument("domain")
+@click.argument("destination")
+@click.option(
+    "-k",
+    "--destination-api-key",
+    "destination_api_key",
+    default=None,
+    help="The API key of the destination cluster when specifying an API URI.",
+)
+@click.option(
+    "-p",
+    "--destination-pool",
+    "destination_storage_pool",
+    default=None,
+    help="The target storage pool on the destination cluster, if it differs from the source pool.",
+)
+@click.option(
+    "--wait/--no-wait",
+    "wait_flag",
+    is_flag=True,
+    default=True,
+    show_default=True,
+    help="Wait or don't wait for task to complete, showing progress if waiting",
+)
+def cli_vm_mirror_create(
+    domain,
+    destination,
+    destination_api_key,
+    destination_storage_pool,
+    wait_flag,
+):
+    """
+    For the virtual machine DOMAIN, create a new snapshot and send that snapshot to the remote PVC cluster DESTINATION; creates a cross-cluster snapshot mirror of the VM.
+
+    DOMAIN may be a UUID or name. DESTINATION may be either a configured PVC connection name in this CLI instance (i.e. a valid argument to "--connection"), or a full API URI, including the scheme, port and API prefix; if using the latter, an API key can be specified with the "-k"/"--destination-api-key" option. SSL validation will be inferred from this CLI instance's configuration.
+
+    This command will create snapshots named in the format "mrYYYYMMDDHHMMSS" to differentiate them from manually-created snapshots. The send will include the VM configuration, metainfo, and a point-in-time snapshot of all attached RBD volumes.
+
+    This command may be used repeatedly to send new updates for a remote VM mirror. If a valid shared snapshot is found on the destination cluster, block device transfers will be incremental based on that snapshot.
+
+    By default, the storage pool of the sending cluster will be used at the destination cluster as well. If a pool of that name does not exist, specify a valid pool name on the destination with the "-p"/"--detination-pool" option.
+
+    (†) NOTE: Any configured autobackup and automirror tag(s) will be removed from the VM metadata on the remote cluster to prevent possible loops and because configurations may differ between clusters.
+
+    (!) WARNING: Once sent, the VM will be in the state "mirror" on the destination cluster. If it is subsequently started, for instance for disaster recovery, a new snapshot must be taken on the destination cluster and sent back or data will be inconsistent between the instances; THIS WILL CAUSE DATA LOSS ON THE SOURCE CLUSTER. To avoid this, use "mirror promote" instead of attempting a manual promotion. Only VMs in the "mirror" state on the target can accept sends.
+
+    (!) WARNING: This functionality has no automatic backout on the remote side. While a properly configured cluster should not fail any step in the process, a situation like an intermittent network connection might cause a failure which would have to be manually corrected on that side, usually by removing the mirrored VM and retrying, or rolling back to a previous snapshot and retrying. Future versions may enhance automatic recovery, but for now this would be up to the administrator.
+    """
+
+    connections_config = get_store(CLI_CONFIG["store_path"])
+    if destination in connections_config.keys():
+        destination_cluster_config = connections_config[destination]
+        destination_api_uri = "{}://{}:{}{}".format(
+            destination_cluster_config["scheme"],
+            destination_cluster_config["host"],
+            destination_cluster_config["port"],
+            CLI_CONFIG["api_prefix"],
+        )
+        destination_api_key = destination_cluster_config["api_key"]
+    else:
+        if "http" not in destination:
+            finish(
+                False, "ERROR: A valid destination cluster or URI must be specified!"
+            )
+        destination_api_uri = destination
+        destination_api_key = destination_api_key
+
+    retcode, retmsg = pvc.lib.vm.vm_create_mirror(
+        CLI_CONFIG,
+        domain,
+        destination_api_uri,
+        destination_api_key,
+        destination_api_verify_ssl=CLI_CONFIG.get("verify_ssl"),
+        destination_storage_pool=destination_storage_pool,
+        wait_flag=wait_flag,
+    )
+
+    if retcode and wait_flag:
+        retmsg = wait_for_celery_task(CLI_CONFIG, retmsg)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm mirror promote
+###############################################################################
+@click.command(
+    name="promote",
+    short_help="Shut down, create a snapshot mirror, and promote a virtual machine to another PVC cluster.",
+)
+@connection_req
+@click.argument("domain")
+@click.argument("destination")
+@click.option(
+    "-k",
+    "--destination-api-key",
+    "destination_api_key",
+    default=None,
+    help="The API key of the destination cluster when specifying an API URI.",
+)
+@click.option(
+    "-p",
+    "--destination-pool",
+    "destination_storage_pool",
+    default=None,
+    help="The target storage pool on the destination cluster, if it differs from the source pool.",
+)
+@click.option(
+    "--remove/--no-remove",
+    "remove_flag",
+    is_flag=True,
+    default=False,
+    show_default=True,
+    help="Remove or don't remove the local VM after promoting (if set, performs a cross-cluster move).",
+)
+@click.option(
+    "--wait/--no-wait",
+    "wait_flag",
+    is_flag=True,
+    default=True,
+    show_default=True,
+    help="Wait or don't wait for task to complete, showing progress if waiting",
+)
+@confirm_opt("Promote VM {domain} on cluster {destination} (will shut down VM)")
+def cli_vm_mirror_promote(
+    domain,
+    destination,
+    destination_api_key,
+    destination_storage_pool,
+    remove_flag,
+    wait_flag,
+):
+    """
+    For the virtual machine DOMAIN, shut down the VM on this cluster, create a new snapshot, send that snapshot to the remote PVC cluster DESTINATION, start the VM on DESTINATION, and optionally remove the VM from this cluster; performs a cross-cluster "move" of the VM, with or without retaining the source as a snapshot mirror.
+
+    DOMAIN may be a UUID or name. DESTINATION may be either a configured PVC connection name in this CLI instance (i.e. a valid argument to "--connection"), or a full API URI, including the scheme, port and API prefix; if using the latter, an API key can be specified with the "-k"/"--destination-api-key" option. SSL validation will be inferred from this CLI instance's configuration.
+
+    This command will create snapshots named in the format "mrYYYYMMDDHHMMSS" to differentiate them from manually-created snapshots. The send will include the VM configuration, metainfo, and a point-in-time snapshot of all attached RBD volumes.
+
+    If a valid shared snapshot is found on the destination cluster, block device transfers will be incremental based on that snapshot.
+
+    By default, the storage pool of the sending cluster will be used at the destination cluster as well. If a pool of that name does not exist, specify a valid pool name on the destination with the "-p"/"--detination-pool" option.
+
+    (†) NOTE: Any configured autobackup and automirror tag(s) will be removed from the VM metadata on the remote cluster to prevent possible loops and because configurations may differ between clusters.
+
+    (!) WARNING: The VM will experience some amount of downtime during the promotion.
+
+    (!) WARNING: Once promoted, if the "--remove" flag is not set, the VM will be in the state "mirror" on this cluster. This effectively flips which cluster is the "primary" for this VM, and subsequent mirror management commands must be run against the destination cluster instead of this cluster. If the "--remove" flag is set, the VM will be removed from this cluster entirely once successfully started on the destination cluster.
+
+    (!) WARNING: This functionality has no automatic backout on the remote side. While a properly configured cluster should not fail any step in the process, a situation like an intermittent network connection might cause a failure which would have to be manually corrected on that side, usually by removing the mirrored VM and retrying, or rolling back to a previous snapshot and retrying. Future versions may enhance automatic recovery, but for now this would be up to the administrator.
+    """
+
+    connections_config = get_store(CLI_CONFIG["store_path"])
+    if destination in connections_config.keys():
+        destination_cluster_config = connections_config[destination]
+        destination_api_uri = "{}://{}:{}{}".format(
+            destination_cluster_config["scheme"],
+            destination_cluster_config["host"],
+            destination_cluster_config["port"],
+            CLI_CONFIG["api_prefix"],
+        )
+        destination_api_key = destination_cluster_config["api_key"]
+    else:
+        if "http" not in destination:
+            finish(
+                False, "ERROR: A valid destination cluster or URI must be specified!"
+            )
+        destination_api_uri = destination
+        destination_api_key = destination_api_key
+
+    retcode, retmsg = pvc.lib.vm.vm_promote_mirror(
+        CLI_CONFIG,
+        domain,
+        destination_api_uri,
+        destination_api_key,
+        destination_api_verify_ssl=CLI_CONFIG.get("verify_ssl"),
+        destination_storage_pool=destination_storage_pool,
+        remove_on_source=remove_flag,
+        wait_flag=wait_flag,
+    )
+
+    if retcode and wait_flag:
+        retmsg = wait_for_celery_task(CLI_CONFIG, retmsg)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm backup
+###############################################################################
+@click.group(
+    name="backup",
+    short_help="Manage backups for PVC VMs.",
+    context_settings=CONTEXT_SETTINGS,
+)
+def cli_vm_backup():
+    """
+    DEPRECATED: Use 'pvc vm snapshot' commands instead. 'pvc vm backup' commands will be removed in a future version.
+
+    Manage backups of VMs in a PVC cluster.
+    """
+    pass
+
+
+###############################################################################
+# > pvc vm backup create
+###############################################################################
+@click.command(name="create", short_help="Create a backup of a virtual machine.")
+@connection_req
+@click.argument("domain")
+@click.argument("backup_path")
+@click.option(
+    "-i",
+    "--incremental",
+    "incremental_parent",
+    default=None,
+    help="Perform an incremental volume backup from this parent backup datestring.",
+)
+@click.option(
+    "-r",
+    "--retain-snapshot",
+    "retain_snapshot",
+    is_flag=True,
+    default=False,
+    help="Retain volume snapshot for future incremental use (full only).",
+)
+def cli_vm_backup_create(domain, backup_path, incremental_parent, retain_snapshot):
+    """
+    DEPRECATED: Use 'pvc vm snapshot' commands instead. 'pvc vm backup' commands will be removed in a future version.
+
+    Create a backup of virtual machine DOMAIN to BACKUP_PATH on the cluster primary coordinator. DOMAIN may be a UUID or name.
+
+    BACKUP_PATH must be a valid absolute directory path on the cluster "primary" coordinator (see "pvc node list") allowing writes from the API daemon (normally running as "root"). The BACKUP_PATH should be a large storage volume, ideally a remotely mounted filesystem (e.g. NFS, SSHFS, etc.) or non-Ceph-backed disk; PVC does not handle this path, that is up to the administrator to configure and manage.
+
+    The backup will export the VM configuration, metainfo, and a point-in-time snapshot of all attached RBD volumes, using a datestring formatted backup name (i.e. YYYYMMDDHHMMSS).
+
+    The virtual machine DOMAIN may be running, and due to snapshots the backup should be crash-consistent, but will be in an unclean state and this must be considered when restoring from backups.
+
+    Incremental snapshots are possible by specifying the "-i"/"--incremental" option along with a source backup datestring. The snapshots from that source backup must have been retained using the "-r"/"--retain-snapshots" option. Retaining snapshots of incremental backups is not supported as incremental backups cannot be chained.
+
+    Full backup volume images are sparse-allocated, however it is recommended for safety to consider their maximum allocated size when allocated space for the BACKUP_PATH. Incremental volume images are generally small but are dependent entirely on the rate of data change in each volume.
+    """
+
+    echo(
+        CLI_CONFIG,
+        f"Backing up VM '{domain}'... ",
+        newline=False,
+    )
+    retcode, retmsg = pvc.lib.vm.vm_backup(
+        CLI_CONFIG, domain, backup_path, incremental_parent, retain_snapshot
+    )
+    if retcode:
+        echo(CLI_CONFIG, "done.")
+    else:
+        echo(CLI_CONFIG, "failed.")
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm backup restore
+###############################################################################
+@click.command(name="restore", short_help="Restore a backup of a virtual machine.")
+@connection_req
+@click.argument("domain")
+@click.argument("backup_datestring")
+@click.argument("backup_path")
+@click.option(
+    "-r/-R",
+    "--retain-snapshot/--remove-snapshot",
+    "retain_snapshot",
+    is_flag=True,
+    default=True,
+    help="Retain or remove restored (parent, if incremental) snapshot.",
+)
+@click.option(
+    "--volume-concurrency",
+    "volume_concurrency",
+    type=click.IntRange(min=1),
+    default=2,
+    show_default=True,
+    help="The number of volumes to restore at once.",
+)
+@click.option(
+    "--bandwidth-limit",
+    "bandwidth_limit",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Limit the combined restore throughput of all volumes to this many MB/s.",
+)
+def cli_vm_backup_restore(
+    domain,
+    backup_datestring,
+    backup_path,
+    retain_snapshot,
+    volume_concurrency,
+    bandwidth_limit,
+):
+    """
+    DEPRECATED: Use 'pvc vm snapshot' commands instead. 'pvc vm backup' commands will be removed in a future version.
+
+    Restore the backup BACKUP_DATESTRING of virtual machine DOMAIN stored in BACKUP_PATH on the cluster primary coordinator. DOMAIN may be a UUID or name.
+
+    BACKUP_PATH must be a valid absolute directory path on the cluster "primary" coordinator (see "pvc node list") allowing reads from the API daemon (normally running as "root"). The BACKUP_PATH should be a large storage volume, ideally a remotely mounted filesystem (e.g. NFS, SSHFS, etc.) or non-Ceph-backed disk; PVC does not handle this path, that is up to the administrator to configure and manage.
+
+    The restore will import the VM configuration, metainfo, and the point-in-time snapshot of all attached RBD volumes. Incremental backups will be automatically handled.
+
+    Up to "--volume-concurrency" volumes are restored at once, each volume continuing with its incremental image as soon as its parent image is restored. If "--bandwidth-limit" is specified, the combined read throughput from BACKUP_PATH is limited to that many MB/s, to avoid saturating the storage or network backing it.
+
+    A VM named DOMAIN or with the same UUID must not exist; if a VM with the same name or UUID already exists, it must be removed (or renamed and then undefined, to preserve volumes while freeing the UUID) before importing.
+
+    If the "-r"/"--retain-snapshot" option is specified (the default), for incremental restores, only the parent snapshot is kept; for full restores, the restored snapshot is kept. If the "-R"/"--remove-snapshot" option is specified, the imported snapshot is removed.
+
+    (!) WARNING: The "-R"/"--remove-snapshot" option will invalidate any existing incremental backups based on the same incremental parent for the restored VM.
+    """
+
+    echo(
+        CLI_CONFIG,
+        f"Restoring backup {backup_datestring} of VM '{domain}'... ",
+        newline=False,
+    )
+    retcode, retmsg = pvc.lib.vm.vm_restore(
+        CLI_CONFIG,
+        domain,
+        backup_path,
+        backup_datestring,
+        retain_snapshot,
+        volume_concurrency=volume_concurrency,
+        bandwidth_limit=bandwidth_limit,
+    )
+    if retcode:
+        echo(CLI_CONFIG, "done.")
+    else:
+        echo(CLI_CONFIG, "failed.")
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm backup remove
+###############################################################################
+@click.command(name="remove", short_help="Remove a backup of a virtual machine.")
+@connection_req
+@click.argument("domain")
+@click.argument("backup_datestring")
+@click.argument("backup_path")
+def cli_vm_backup_remove(domain, backup_datestring, backup_path):
+    """
+    DEPRECATED: Use 'pvc vm snapshot' commands instead. 'pvc vm backup' commands will be removed in a future version.
+
+    Remove the backup BACKUP_DATESTRING, including snapshots, of virtual machine DOMAIN stored in BACKUP_PATH on the cluster primary coordinator. DOMAIN may be a UUID or name.
+
+    (!) WARNING: Removing an incremental parent will invalidate any existing incremental backups based on that backup.
+    """
+
+    echo(
+        CLI_CONFIG,
+        f"Removing backup {backup_datestring} of VM '{domain}'... ",
+        newline=False,
+    )
+    retcode, retmsg = pvc.lib.vm.vm_remove_backup(
+        CLI_CONFIG, domain, backup_path, backup_datestring
+    )
+    if retcode:
+        echo(CLI_CONFIG, "done.")
+    else:
+        echo(CLI_CONFIG, "failed.")
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm autobackup
+###############################################################################
+@click.command(
+    name="autobackup", short_help="Perform automatic virtual machine backups."
+)
+@connection_req
+@click.option(
+    "--email-report",
+    "email_report",
+    default=None,
+    help="Email a backup summary report to the specified address(es), comma-separated.",
+)
+@click.option(
+    "--force-full",
+    "force_full_flag",
+    default=False,
+    is_flag=True,
+    help="Force all backups to be full backups this run.",
+)
+@click.option(
+    "--wait/--no-wait",
+    "wait_flag",
+    is_flag=True,
+    default=True,
+    show_default=True,
+    help="Wait or don't wait for task to complete, showing progress if waiting.",
+)
+@click.option(
+    "--cron",
+    "cron_flag",
+    is_flag=True,
+    default=False,
+    show_default=True,
+    help="Run in cron mode (returns immediately with no output once job is submitted).",
+)
+def cli_vm_autobackup(email_report, force_full_flag, wait_flag, cron_flag):
+    """
+    Perform automated backups of VMs, with integrated cleanup and full/incremental scheduling.
+
+    This command enables automatic backup of PVC VMs at the block level, leveraging the various "pvc vm snapshot"
+    functions with an internal rentention and cleanup system as well as determination of full vs. incremental
+    backups at different intervals. VMs are selected based on configured VM tags. The destination storage
+    may either be local, or provided by a remote filesystem which is automatically mounted and unmounted during
+    the backup run via a set of configured commands before and after the backup run.
+
+    This command should be run from cron or a timer at a regular interval (e.g. daily, hourly, etc.) which defines
+    how often backups are taken. Backup format (full/incremental) and retention is based only on the number of
+    recorded backups, not on the time interval between them. Exports taken manually outside of the "autobackup"
+    command are not counted towards the format or retention of autobackups.
+
+    (!) WARNING: Running this command manually will interfere with the schedule! Do not run manually except for testing.
+
+    The actual details of the autobackup, including retention policies, full-vs-incremental, pre- and post- run
+    mounting/unmounting commands, etc. are defined in the main PVC configuration file `/etc/pvc/pvc.conf`. See
+    the sample configuration for more details on how to configure autobackups.
+
+    An optional report on all current backups can be emailed to one or more email addresses using the
+    "--email-report" flag. This report will include information on all current known backups.
+
+    The "--force-full" option can be used to force all configured VMs to perform a "full" level backup this run,
+    which can help synchronize the backups of existing VMs with new ones.
+
+    This command will create snapshots named in the format "abYYYYMMDDHHMMSS" to differentiate them from manually-created snapshots.
+
+    For more details on VM snapshot exports, see "pvc vm snapshot export --help".
+    """
+
+    if cron_flag:
+        wait_flag = False
+
+    if email_report is not None:
+        email_recipients = email_report.split(",")
+    else:
+        email_recipients = None
+
+    retcode, retmsg = pvc.lib.vm.vm_autobackup(
+        CLI_CONFIG,
+        email_recipients=email_recipients,
+        force_full_flag=force_full_flag,
+        wait_flag=wait_flag,
+    )
+
+    if retcode and wait_flag:
+        retmsg = wait_for_celery_task(CLI_CONFIG, retmsg)
+
+    if cron_flag:
+        finish(retcode, None)
+    else:
+        finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm automirror
+###############################################################################
+@click.command(
+    name="automirror", short_help="Perform automatic virtual machine mirrors."
+)
+@connection_req
+@click.option(
+    "--email-report",
+    "email_report",
+    default=None,
+    help="Email a mirror summary report to the specified address(es), comma-separated.",
+)
+@click.option(
+    "--email-errors-only",
+    "email_errors_only_flag",
+    is_flag=True,
+    default=False,
+    show_default=True,
+    help="Only send a mirror summary report when at least one error occurrs.",
+)
+@click.option(
+    "--wait/--no-wait",
+    "wait_flag",
+    is_flag=True,
+    default=True,
+    show_default=True,
+    help="Wait or don't wait for task to complete, showing progress if waiting.",
+)
+@click.option(
+    "--cron",
+    "cron_flag",
+    is_flag=True,
+    default=False,
+    show_default=True,
+    help="Run in cron mode (returns immediately with no output once job is submitted).",
+)
+def cli_vm_automirror(email_report, email_errors_only_flag, wait_flag, cron_flag):
+    """
+    Perform automated mirrors of VMs, with integrated cleanup and full/incremental scheduling.
+
+    This command enables automatic mirrors of PVC VMs at the block level, leveraging the various "pvc vm snapshot"
+    functions with an internal rentention and cleanup system. VMs and the destination cluster(s) are selected based
+    on configured VM tags and a set of static configs in the cluster's `pvc.conf` configuration.
+
+    This command should be run from cron or a timer at a regular interval (e.g. daily, hourly, etc.) which defines
+    how often mirrors are taken. Mirror retention is based only on the number of recorded mirrors on the remote side,
+    not on the time interval between them. Mirrors taken manually outside of the "automirror" command are not counted
+    towards the format or retention of automirrors.
+
+    (!) WARNING: Running this command manually will interfere with the schedule! Do not run manually except for testing.
+
+    The actual details of the automirror, including retention policies, are defined in the main PVC configuration file
+    `/etc/pvc/pvc.conf`. See the sample configuration for more details on how to configure automirrors.
+
+    An optional report on the job's results can be emailed to one or more email addresses using the "--email-report" flag.
+    By default, reports are sent for all mirror jobs; reporting only on jobs that experience one or more errors can be
+    specified using the "--email-errors-only" flag.
+
+    This command will create snapshots named in the format "amYYYYMMDDHHMMSS" to differentiate them from manually-created snapshots.
+
+    For more details on VM mirrors, see "pvc vm mirror create --help".
+    """
+
+    if cron_flag:
+        wait_flag = False
+
+    if email_report is not None:
+        email_recipients = email_report.split(",")
+    else:
+        email_recipients = None
+
+    retcode, retmsg = pvc.lib.vm.vm_automirror(
+        CLI_CONFIG,
+        email_recipients=email_recipients,
+        email_errors_only_flag=email_errors_only_flag,
+        wait_flag=wait_flag,
+    )
+
+    if retcode and wait_flag:
+        retmsg = wait_for_celery_task(CLI_CONFIG, retmsg)
+
+    if cron_flag:
+        finish(retcode, None)
+    else:
+        finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm tag
+###############################################################################
+@click.group(
+    name="tag",
+    short_help="Manage tags for PVC VMs.",
+    context_settings=CONTEXT_SETTINGS,
+)
+def cli_vm_tag():
+    """
+    Manage and view the tags of VMs in a PVC cluster.
+    """
+    pass
+
+
+###############################################################################
+# > pvc vm tag get
+###############################################################################
+@click.command(name="get", short_help="Get the current tags of a virtual machine.")
+@connection_req
+@click.argument("domain")
+@format_opt(
+    {
+        "pretty": cli_vm_tag_get_format_pretty,
+        "raw": lambda d: "\n".join([t["name"] for t in d["tags"]]),
+        "json": lambda d: jdumps(d),
+        "json-pretty": lambda d: jdumps(d, indent=2),
+    }
+)
+def cli_vm_tag_get(domain, format_function):
+    """
+    Get the current tags of the virtual machine DOMAIN.
+    """
+
+    retcode, retdata = pvc.lib.vm.vm_tags_get(CLI_CONFIG, domain)
+    finish(retcode, retdata, format_function)
+
+
+###############################################################################
+# > pvc vm tag add
+###############################################################################
+@click.command(name="add", short_help="Add new tags to a virtual machine.")
+@connection_req
+@click.argument("domain")
+@click.argument("tag")
+@click.option(
+    "-p",
+    "--protected",
+    "protected",
+    is_flag=True,
+    required=False,
+    default=False,
+    help="Set this tag as protected; protected tags cannot be removed.",
+)
+def cli_vm_tag_add(domain, tag, protected):
+    """
+    Add TAG to the virtual machine DOMAIN.
+    """
+
+    retcode, retmsg = pvc.lib.vm.vm_tag_set(CLI_CONFIG, domain, "add", tag, protected)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm tag remove
+###############################################################################
+@click.command(name="remove", short_help="Remove tags from a virtual machine.")
+@connection_req
+@click.argument("domain")
+@click.argument("tag")
+def cli_vm_tag_remove(domain, tag):
+    """
+    Remove TAG from the virtual machine DOMAIN.
+    """
+
+    retcode, retmsg = pvc.lib.vm.vm_tag_set(CLI_CONFIG, domain, "remove", tag)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm bulk
+###############################################################################
+@click.group(
+    name="bulk",
+    short_help="Manage many PVC VMs at once.",
+    context_settings=CONTEXT_SETTINGS,
+)
+def cli_vm_bulk():
+    """
+    Manage many VMs in a PVC cluster at once.
+
+    Each command acts on the VMs selected by all of the given DOMAIN arguments (names or UUIDs) and "--target", "--state", and "--tag" options; at least one must be specified. The action is validated for all selected VMs at once and applied to them together, and a VM for which it fails does not prevent the others from being changed. The result for each VM is shown, and the command fails if the action failed for any VM.
+    """
+    pass
+
+
+def bulk_selector_opt(function):
+    """
+    Click Option Decorator:
+    Wraps a Click command which selects VMs for a bulk action
+    """
+
+    @click.argument("domains", metavar="[DOMAIN]...", nargs=-1)
+    @click.option(
+        "-t",
+        "--target",
+        "target_node",
+        default=None,
+        help="Select only VMs on the specified node.",
+    )
+    @click.option(
+        "-s",
+        "--state",
+        "target_state",
+        default=None,
+        help="Select only VMs in the specified state.",
+    )
+    @click.option(
+        "-g",
+        "--tag",
+        "target_tag",
+        default=None,
+        help="Select only VMs with the specified tag.",
+    )
+    @wraps(function)
+    def bulk_selector_action(*args, **kwargs):
+        if (
+            not kwargs["domains"]
+            and kwargs["target_node"] is None
+            and kwargs["target_state"] is None
+            and kwargs["target_tag"] is None
+        ):
+            finish(
+                False,
+                'At least one DOMAIN or "--target", "--state", or "--tag" must be specified.',
+            )
+        return function(*args, **kwargs)
+
+    return bulk_selector_action
+
+
+def bulk_concurrency_opt(function):
+    """
+    Click Option Decorator:
+    Wraps a Click command which acts on or waits for many VMs at once
+    """
+
+    @click.option(
+        "-c",
+        "--concurrency",
+        "concurrency",
+        default=32,
+        show_default=True,
+        type=click.IntRange(1, 64),
+        help="The number of VMs to act on or wait for at once.",
+    )
+    @wraps(function)
+    def bulk_concurrency_action(*args, **kwargs):
+        return function(*args, **kwargs)
+
+    return bulk_concurrency_action
+
+
+###############################################################################
+# > pvc vm bulk start
+###############################################################################
+@click.command(name="start", short_help="Start up many defined virtual machines.")
+@connection_req
+@bulk_selector_opt
+@bulk_concurrency_opt
+@click.option(
+    "--force",
+    "force_flag",
+    is_flag=True,
+    default=False,
+    help="Force a snapshot mirror state change.",
+)
+def cli_vm_bulk_start(
+    domains, target_node, target_state, target_tag, concurrency, force_flag
+):
+    """
+    Start all selected virtual machines on their configured nodes.
+
+    If a VM is a snapshot mirror, "--force" allows a manual state change to the mirror.
+    """
+
+    retcode, retdata = pvc.lib.vm.vm_bulk_state(
+        CLI_CONFIG,
+        "start",
+        vms=domains,
+        tag=target_tag,
+        node=target_node,
+        state=target_state,
+        force=force_flag,
+        concurrency=concurrency,
+    )
+    finish(retcode, pvc.lib.vm.format_vm_bulk_results(CLI_CONFIG, retdata))
+
+
+###############################################################################
+# > pvc vm bulk restart
+###############################################################################
+@click.command(name="restart", short_help="Restart many running virtual machines.")
+@connection_req
+@bulk_selector_opt
+@bulk_concurrency_opt
+@click.option(
+    "-w",
+    "--wait",
+    "wait",
+    is_flag=True,
+    default=False,
+    help="Wait for all restarts to complete before returning.",
+)
+@confirm_opt("Restart all selected virtual machines")
+def cli_vm_bulk_restart(
+    domains, target_node, target_state, target_tag, concurrency, wait
+):
+    """
+    Restart all selected running virtual machines.
+    """
+
+    retcode, retdata = pvc.lib.vm.vm_bulk_state(
+        CLI_CONFIG,
+        "restart",
+        vms=domains,
+        tag=target_tag,
+        node=target_node,
+        state=target_state,
+        wait=wait,
+        concurrency=concurrency,
+    )
+    finish(retcode, pvc.lib.vm.format_vm_bulk_results(CLI_CONFIG, retdata))
+
+
+###############################################################################
+# > pvc vm bulk shutdown
+###############################################################################
+@click.command(
+    name="shutdown", short_help="Gracefully shut down many running virtual machines."
+)
+@connection_req
+@bulk_selector_opt
+@bulk_concurrency_opt
+@click.option(
+    "-w",
+    "--wait",
+    "wait",
+    is_flag=True,
+    default=False,
+    help="Wait for all shutdowns to complete before returning.",
+)
+@confirm_opt("Shut down all selected virtual machines")
+def cli_vm_bulk_shutdown(
+    domains, target_node, target_state, target_tag, concurrency, wait
+):
+    """
+    Gracefully shut down all selected running virtual machines.
+    """
+
+    retcode, retdata = pvc.lib.vm.vm_bulk_state(
+        CLI_CONFIG,
+        "shutdown",
+        vms=domains,
+        tag=target_tag,
+        node=target_node,
+        state=target_state,
+        wait=wait,
+        concurrency=concurrency,
+    )
+    finish(retcode, pvc.lib.vm.format_vm_bulk_results(CLI_CONFIG, retdata))
+
+
+###############################################################################
+# > pvc vm bulk stop
+###############################################################################
+@click.command(name="stop", short_help="Forcibly halt many running virtual machines.")
+@connection_req
+@bulk_selector_opt
+@bulk_concurrency_opt
+@click.option(
+    "--force",
+    "force_flag",
+    is_flag=True,
+    default=False,
+    help="Force a snapshot mirror state change.",
+)
+@confirm_opt("Forcibly stop all selected virtual machines")
+def cli_vm_bulk_stop(
+    domains, target_node, target_state, target_tag, concurrency, force_flag
+):
+    """
+    Forcibly halt (destroy) all selected running virtual machines.
+
+    If a VM is a snapshot mirror, "--force" allows a manual state change to the mirror.
+    """
+
+    retcode, retdata = pvc.lib.vm.vm_bulk_state(
+        CLI_CONFIG,
+        "stop",
+        vms=domains,
+        tag=target_tag,
+        node=target_node,
+        state=target_state,
+        force=force_flag,
+        concurrency=concurrency,
+    )
+    finish(retcode, pvc.lib.vm.format_vm_bulk_results(CLI_CONFIG, retdata))
+
+
+###############################################################################
+# > pvc vm bulk disable
+###############################################################################
+@click.command(name="disable", short_help="Mark many virtual machines as disabled.")
+@connection_req
+@bulk_selector_opt
+@bulk_concurrency_opt
+@click.option(
+    "--force",
+    "force_flag",
+    is_flag=True,
+    default=False,
+    help="Forcibly stop VMs without shutdown and/or force a snapshot mirror state change.",
+)
+@confirm_opt("Shut down and disable all selected virtual machines")
+def cli_vm_bulk_disable(
+    domains, target_node, target_state, target_tag, concurrency, force_flag
+):
+    """
+    Shut down all selected virtual machines and mark them as disabled.
+
+    If "--force" is specified, running VMs will be forcibly stopped instead of waiting for a graceful ACPI shutdown. If a VM is a snapshot mirror, "--force" allows a manual state change to the mirror.
+    """
+
+    retcode, retdata = pvc.lib.vm.vm_bulk_state(
+        CLI_CONFIG,
+        "disable",
+        vms=domains,
+        tag=target_tag,
+        node=target_node,
+        state=target_state,
+        force=force_flag,
+        concurrency=concurrency,
+    )
+    finish(retcode, pvc.lib.vm.format_vm_bulk_results(CLI_CONFIG, retdata))
+
+
+###############################################################################
+# > pvc vm bulk meta
+###############################################################################
+@click.command(name="meta", short_help="Modify PVC metadata of many existing VMs.")
+@connection_req
+@bulk_selector_opt
+@click.option(
+    "-l",
+    "--limit",
+    "node_limit",
+    default=None,
+    show_default=False,
+    help="Comma-separated list of nodes to limit VM operation to; set to an empty string to remove.",
+)
+@click.option(
+    "--node-selector",
+    "node_selector",
+    default=None,
+    show_default=False,
+    type=click.Choice(["mem", "memprov", "load", "vcpus", "vms", "none"]),
+    help='Method to determine optimal target node during autoselect; "none" will use the default for the cluster.',
+)
+@click.option(
+    "-a/-A",
+    "--autostart/--no-autostart",
+    "node_autostart",
+    is_flag=True,
+    default=None,
+    help="Start VMs automatically on next unflush/ready state of home node; unset by daemon once used.",
+)
+@click.option(
+    "-m",
+    "--method",
+    "migration_method",
+    default=None,
+    show_default=False,
+    type=click.Choice(["none", "live", "shutdown"]),
+    help="The preferred migration method of the VMs between nodes.",
+)
+@click.option(
+    "-d",
+    "--max-downtime",
+    "migration_max_downtime",
+    default=None,
+    help="The maximum time in milliseconds that a VM can be down for during a live migration; busy VMs may require a larger downtime.",
+)
+@click.option(
+    "--migration-profile",
+    "migration_profile",
+    default=None,
+    show_default=False,
+    help='The live migration profile of the VMs, as defined in the cluster configuration; "" will use the default for the cluster.',
+)
+@click.option(
+    "-p",
+    "--profile",
+    "provisioner_profile",
+    default=None,
+    show_default=False,
+    help="PVC provisioner profile name for VMs.",
+)
+def cli_vm_bulk_meta(
+    domains,
+    target_node,
+    target_state,
+    target_tag,
+    node_limit,
+    node_selector,
+    node_autostart,
+    migration_method,
+    migration_max_downtime,
+    migration_profile,
+    provisioner_profile,
+):
+    """
+    Modify the PVC metadata of all selected virtual machines. At least one option to update must be specified.
+
+    For details on the available option values, please see help for the command "pvc vm define".
+    """
+
+    if (
+        node_limit is None
+        and node_selector is None
+        and node_autostart is None
+        and migration_method is None
+        and migration_max_downtime is None
+        and migration_profile is None
+        and provisioner_profile is None
+    ):
+        finish(False, "At least one metadata option must be specified to update.")
+
+    retcode, retdata = pvc.lib.vm.vm_bulk_metadata(
+        CLI_CONFIG,
+        node_limit,
+        node_selector,
+        node_autostart,
+        migration_method,
+        migration_max_downtime,
+        migration_profile,
+        provisioner_profile,
+        vms=domains,
+        tag=target_tag,
+        node=target_node,
+        state=target_state,
+    )
+    finish(retcode, pvc.lib.vm.format_vm_bulk_results(CLI_CONFIG, retdata))
+
+
+###############################################################################
+# > pvc vm bulk tag
+###############################################################################
+@click.group(
+    name="tag",
+    short_help="Manage tags of many PVC VMs.",
+    context_settings=CONTEXT_SETTINGS,
+)
+def cli_vm_bulk_tag():
+    """
+    Manage the tags of many VMs in a PVC cluster at once.
+    """
+    pass
+
+
+###############################################################################
+# > pvc vm bulk tag add
+###############################################################################
+@click.command(name="add", short_help="Add a new tag to many virtual machines.")
+@connection_req
+@click.argument("tag")
+@bulk_selector_opt
+@bulk_concurrency_opt
+@click.option(
+    "-p",
+    "--protected",
+    "protected",
+    is_flag=True,
+    required=False,
+    default=False,
+    help="Set this tag as protected; protected tags cannot be removed.",
+)
+def cli_vm_bulk_tag_add(
+    tag, domains, target_node, target_state, target_tag, concurrency, protected
+):
+    """
+    Add TAG to all selected virtual machines.
+    """
+
+    retcode, retdata = pvc.lib.vm.vm_bulk_tag_set(
+        CLI_CONFIG,
+        "add",
+        tag,
+        protected=protected,
+        vms=domains,
+        select_tag=target_tag,
+        node=target_node,
+        state=target_state,
+        concurrency=concurrency,
+    )
+    finish(retcode, pvc.lib.vm.format_vm_bulk_results(CLI_CONFIG, retdata))
+
+
+###############################################################################
+# > pvc vm bulk tag remove
+###############################################################################
+@click.command(name="remove", short_help="Remove a tag from many virtual machines.")
+@connection_req
+@click.argument("tag")
+@bulk_selector_opt
+@bulk_concurrency_opt
+def cli_vm_bulk_tag_remove(
+    tag, domains, target_node, target_state, target_tag, concurrency
+):
+    """
+    Remove TAG from all selected virtual machines.
+    """
+
+    retcode, retdata = pvc.lib.vm.vm_bulk_tag_set(
+        CLI_CONFIG,
+        "remove",
+        tag,
+        vms=domains,
+        select_tag=target_tag,
+        node=target_node,
+        state=target_state,
+        concurrency=concurrency,
+    )
+    finish(retcode, pvc.lib.vm.format_vm_bulk_results(CLI_CONFIG, retdata))
+
+
+###############################################################################
+# > pvc vm vcpu
+###############################################################################
+@click.group(
+    name="vcpu",
+    short_help="Manage vCPUs for PVC VMs.",
+    context_settings=CONTEXT_SETTINGS,
+)
+def cli_vm_vcpu():
+    """
+    Manage and view the vCPUs of VMs in a PVC cluster.
+    """
+    pass
+
+
+###############################################################################
+# > pvc vm vcpu get
+###############################################################################
+@click.command(
+    name="get", short_help="Get the current vCPU count of a virtual machine."
+)
+@connection_req
+@click.argument("domain")
+@format_opt(
+    {
+        "pretty": cli_vm_vcpu_get_format_pretty,
+        "raw": lambda d: d["vcpus"],
+        "json": lambda d: jdumps(d),
+        "json-pretty": lambda d: jdumps(d, indent=2),
+    }
+)
+def cli_vm_vcpu_get(domain, format_function):
+    """
+    Get the current vCPU count of the virtual machine DOMAIN.
+    """
+
+    retcode, retmsg = pvc.lib.vm.vm_vcpus_get(CLI_CONFIG, domain)
+    finish(retcode, retmsg, format_function)
+
+
+###############################################################################
+# > pvc vm vcpu set TODO:fix return message to show what happened
+###############################################################################
+@click.command(name="set", short_help="Set the vCPU count of a virtual machine.")
+@connection_req
+@click.argument("domain")
+@click.argument("vcpus")
+@click.option(
+    "-t",
+    "--topology",
+    "topology",
+    default=None,
+    help="Use an alternative topology for the vCPUs in the CSV form <sockets>,<cores>,<threads>. SxCxT must equal VCPUS.",
+)
+@restart_opt
+@confirm_opt("Restart virtual machine {domain}")
+def cli_vm_vcpu_set(domain, vcpus, topology, restart_flag):
+    """
+    Set the vCPU count of the virtual machine DOMAIN to VCPUS.
+
+    By default, the topology of the vCPus is 1 socket, VCPUS cores per socket, 1 thread per core.
+    """
+    if topology is not None:
+        try:
+            sockets, cores, threads = topology.split(",")
+            if sockets * cores * threads != vcpus:
+                raise
+        except Exception:
+            cleanup(False, "The specified topology is not valid.")
+        topology = (sockets, cores, threads)
+    else:
+        topology = (1, vcpus, 1)
+
+    retcode, retmsg = pvc.lib.vm.vm_vcpus_set(
+        CLI_CONFIG, domain, vcpus, topology, restart_flag
+    )
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm memory
+###############################################################################
+@click.group(
+    name="memory",
+    short_help="Manage memory for PVC VMs.",
+    context_settings=CONTEXT_SETTINGS,
+)
+def cli_vm_memory():
+    """
+    Manage and view the memory of VMs in a PVC cluster.
+    """
+    pass
+
+
+###############################################################################
+# > pvc vm memory get
+###############################################################################
+@click.command(
+    name="get", short_help="Get the current provisioned memory of a virtual machine."
+)
+@connection_req
+@click.argument("domain")
+@format_opt(
+    {
+        "pretty": cli_vm_memory_get_format_pretty,
+        "raw": lambda d: d["memory"],
+        "json": lambda d: jdumps(d),
+        "json-pretty": lambda d: jdumps(d, indent=2),
+    }
+)
+def cli_vm_memory_get(domain, format_function):
+    """
+    Get the current provisioned memory of the virtual machine DOMAIN.
+    """
+
+    retcode, retmsg = pvc.lib.vm.vm_memory_get(CLI_CONFIG, domain)
+    finish(retcode, retmsg, format_function)
+
+
+###############################################################################
+# > pvc vm memory set TODO:fix return message to show what happened
+###############################################################################
+@click.command(
+    name="set", short_help="Set the provisioned memory of a virtual machine."
+)
+@connection_req
+@click.argument("domain")
+@click.argument("memory")
+@restart_opt
+@confirm_opt("Restart virtual machine {domain}")
+def cli_vm_memory_set(domain, memory, restart_flag):
+    """
+    Set the provisioned memory of the virtual machine DOMAIN to MEMORY; MEMORY must be an integer in MB.
+    """
+
+    retcode, retmsg = pvc.lib.vm.vm_memory_set(CLI_CONFIG, domain, memory, restart_flag)
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm network
+###############################################################################
+@click.group(
+    name="network",
+    short_help="Manage networks for PVC VMs.",
+    context_settings=CONTEXT_SETTINGS,
+)
+def cli_vm_network():
+    """
+    Manage and view the networks of VMs in a PVC cluster.
+    """
+    pass
+
+
+###############################################################################
+# > pvc vm network get
+###############################################################################
+@click.command(name="get", short_help="Get the networks of a virtual machine.")
+@connection_req
+@click.argument("domain")
+@format_opt(
+    {
+        "pretty": cli_vm_network_get_format_pretty,
+        "raw": lambda d: ",".join([t["network"] for t in d["networks"]]),
+        "json": lambda d: jdumps(d),
+        "json-pretty": lambda d: jdumps(d, indent=2),
+    }
+)
+def cli_vm_network_get(domain, format_function):
+    """
+    Get the networks of the virtual machine DOMAIN.
+    """
+
+    retcode, retdata = pvc.lib.vm.vm_networks_get(CLI_CONFIG, domain)
+    finish(retcode, retdata, format_function)
+
+
+###############################################################################
+# > pvc vm network add
+###############################################################################
+@click.command(name="add", short_help="Add network to a virtual machine.")
+@connection_req
+@click.argument("domain")
+@click.argument("net")
+@click.option(
+    "-a",
+    "--macaddr",
+    "macaddr",
+    default=None,
+    help="Use this MAC address instead of random generation; must be a valid MAC address in colon-delimited format.",
+)
+@click.option(
+    "-m",
+    "--model",
+    "model",
+    default="virtio",
+    show_default=True,
+    help='The model for the interface; must be a valid libvirt model. Not used for "netdev" SR-IOV NETs.',
+)
+@click.option(
+    "-s",
+    "--sriov",
+    "sriov_flag",
+    is_flag=True,
+    default=False,
+    help="Identify that NET is an SR-IOV device name and not a VNI. Required for adding SR-IOV NETs.",
+)
+@click.option(
+    "-d",
+    "--sriov-mode",
+    "sriov_mode",
+    default="macvtap",
+    show_default=True,
+    type=click.Choice(["hostdev", "macvtap"]),
+    help="For SR-IOV NETs, the SR-IOV network device mode.",
+)
+@click.option(
+    "-l/-L",
+    "--live/--no-live",
+    "live_flag",
+    is_flag=True,
+    default=True,
+    help="Immediately live-attach device to VM [default] or disable this behaviour.",
+)
+@restart_opt
+@confirm_opt("Restart virtual machine {domain}")
+def cli_vm_network_add(
+    domain,
+    net,
+    macaddr,
+    model,
+    sriov_flag,
+    sriov_mode,
+    live_flag,
+    restart_flag,
+):
+    """
+    Add the network NET to the virtual machine DOMAIN. Networks are always addded to the end of the current list of networks in the virtual machine.
+
+    NET may be a PVC network VNI, which is added as a bridged device, or a SR-IOV VF device connected in the given mode.
+
+    (†) NOTE: Adding a SR-IOV network device in the "hostdev" mode has the following caveats:
+
+      1. The VM will not be able to be live migrated; it must be shut down to migrate between nodes. The VM metadata will be updated to force this.
+
+      2. If an identical SR-IOV VF device is not present on the target node, post-migration startup will fail. It may be prudent to use a node limit here.
+
+    """
+    if restart_flag and live_flag:
+        live_flag = False
+
+    retcode, retmsg = pvc.lib.vm.vm_networks_add(
+        CLI_CONFIG,
+        domain,
+        net,
+        macaddr,
+        model,
+        sriov_flag,
+        sriov_mode,
+        live_flag,
+        restart_flag,
+    )
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm network remove
+###############################################################################
+@click.command(name="remove", short_help="Remove network from a virtual machine.")
+@connection_req
+@click.argument("domain")
+@click.argument("net", required=False, default=None)
+@click.option(
+    "-m",
+    "--mac-address",
+    "macaddr",
+    default=None,
+    help="Remove an interface with this MAC address; required if NET is unspecified.",
+)
+@click.option(
+    "-s",
+    "--sriov",
+    "sriov_flag",
+    is_flag=True,
+    default=False,
+    help="Identify that NET is an SR-IOV device name and not a VNI. Required for removing SR-IOV NETs.",
+)
+@click.option(
+    "-l/-L",
+    "--live/--no-live",
+    "live_flag",
+    is_flag=True,
+    default=True,
+    help="Immediately live-detach device to VM [default] or disable this behaviour.",
+)
+@restart_opt
+@confirm_opt("Restart virtual machine {domain}")
+def cli_vm_network_remove(domain, net, macaddr, sriov_flag, live_flag, restart_flag):
+    """
+    Remove the network NET from the virtual machine DOMAIN.
+
+    NET may be a PVC network VNI, which is added as a bridged device, or a SR-IOV VF device connected in the given mode.
+
+    NET is optional if the '-m'/'--mac-address' option is specified. If it is, then the specific device with that MAC address is removed instead.
+
+    If multiple interfaces are present on the VM in network NET, and '-m'/'--mac-address' is not specified, then all interfaces in that network will be removed.
+    """
+    if restart_flag and live_flag:
+        live_flag = False
+
+    retcode, retmsg = pvc.lib.vm.vm_networks_remove(
+        CLI_CONFIG, domain, net, macaddr, sriov_flag, live_flag, restart_flag
+    )
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm volume
+###############################################################################
+@click.group(
+    name="volume",
+    short_help="Manage volumes for PVC VMs.",
+    context_settings=CONTEXT_SETTINGS,
+)
+def cli_vm_volume():
+    """
+    Manage and view the volumes of VMs in a PVC cluster.
+    """
+    pass
+
+
+###############################################################################
+# > pvc vm volume get
+###############################################################################
+@click.command(name="get", short_help="Get the volumes of a virtual machine.")
+@connection_req
+@click.argument("domain")
+@format_opt(
+    {
+        "pretty": cli_vm_volume_get_format_pretty,
+        "raw": lambda d: ",".join(
+            [f"{v['protocol']}:{v['volume']}" for v in d["volumes"]]
+        ),
+        "json": lambda d: jdumps(d),
+        "json-pretty": lambda d: jdumps(d, indent=2),
+    }
+)
+def cli_vm_volume_get(domain, format_function):
+    """
+    Get the volumes of the virtual machine DOMAIN.
+    """
+
+    retcode, retdata = pvc.lib.vm.vm_volumes_get(CLI_CONFIG, domain)
+    finish(retcode, retdata, format_function)
+
+
+###############################################################################
+# > pvc vm volume add
+###############################################################################
+@click.command(name="add", short_help="Add volume to a virtual machine.")
+@connection_req
+@click.argument("domain")
+@click.argument("volume")
+@click.option(
+    "-d",
+    "--disk-id",
+    "disk_id",
+    default=None,
+    help="The disk ID in sdX/vdX/hdX format; if not specified, the next available will be used.",
+)
+@click.option(
+    "-b",
+    "--bus",
+    "bus",
+    default="scsi",
+    show_default=True,
+    type=click.Choice(["scsi", "ide", "usb", "virtio"]),
+    help="The bus to attach the disk to; must be present in the VM.",
+)
+@click.option(
+    "-t",
+    "--type",
+    "disk_type",
+    default="rbd",
+    show_default=True,
+    type=click.Choice(["rbd", "file"]),
+    help="The type of volume to add.",
+)
+@click.option(
+    "-l/-L",
+    "--live/--no-live",
+    "live_flag",
+    is_flag=True,
+    default=True,
+    help="Immediately live-attach device to VM [default] or disable this behaviour.",
+)
+@restart_opt
+@confirm_opt("Restart virtual machine {domain}")
+def cli_vm_volume_add(domain, volume, disk_id, bus, disk_type, live_flag, restart_flag):
+    """
+    Add the volume VOLUME to the virtual machine DOMAIN.
+
+    VOLUME may be either an absolute file path (for type 'file') or an RBD volume in the form "pool/volume" (for type 'rbd'). RBD volumes are verified against the cluster before adding and must exist.
+    """
+    if restart_flag and live_flag:
+        live_flag = False
+
+    retcode, retmsg = pvc.lib.vm.vm_volumes_add(
+        CLI_CONFIG, domain, volume, disk_id, bus, disk_type, live_flag, restart_flag
+    )
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm volume remove
+###############################################################################
+@click.command(name="remove", short_help="Remove volume from a virtual machine.")
+@connection_req
+@click.argument("domain")
+@click.argument("volume")
+@click.option(
+    "-l/-L",
+    "--live/--no-live",
+    "live_flag",
+    is_flag=True,
+    default=True,
+    help="Immediately live-detach device to VM [default] or disable this behaviour.",
+)
+@restart_opt
+@confirm_opt("Restart virtual machine {domain}")
+def cli_vm_volume_remove(domain, volume, live_flag, restart_flag):
+    """
+    Remove VOLUME from the virtual machine DOMAIN; VOLUME must be a file path or RBD path in 'pool/volume' format.
+    """
+    if restart_flag and live_flag:
+        live_flag = False
+
+    retcode, retmsg = pvc.lib.vm.vm_volumes_remove(
+        CLI_CONFIG, domain, volume, live_flag, restart_flag
+    )
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm log
+###############################################################################
+@click.command(name="log", short_help="Show console logs of a VM object.")
+@connection_req
+@click.argument("domain")
+@click.option(
+    "-l",
+    "--lines",
+    "lines",
+    default=None,
+    type=int,
+    show_default=False,
+    help="Display this many log lines from the end of the log buffer.  [default: 1000; with follow: 10]",
+)
+@click.option(
+    "-f",
+    "--follow",
+    "follow",
+    is_flag=True,
+    default=False,
+    help="Follow the log buffer; output may be delayed by a few seconds relative to the live system. The --lines value defaults to 10 for the initial output.",
+)
+def cli_vm_log(domain, lines, follow):
+    """
+    Show console logs of virtual machine DOMAIN on its current node in a pager or continuously. DOMAIN may be a UUID or name. Note that migrating a VM to a different node will cause the log buffer to be overwritten by entries from the new node.
+    """
+
+    # Set the default here so we can handle it
+    if lines is None:
+        if follow:
+            lines = 10
+        else:
+            lines = 1000
+
+    if follow:
+        retcode, retmsg = pvc.lib.vm.follow_console_log(CLI_CONFIG, domain, lines)
+    else:
+        retcode, retmsg = pvc.lib.vm.view_console_log(CLI_CONFIG, domain, lines)
+        click.echo_via_pager(retmsg)
+        retmsg = ""
+    finish(retcode, retmsg)
+
+
+###############################################################################
+# > pvc vm dump
+###############################################################################
+@click.command(name="dump", short_help="Dump a virtual machine XML to stdout.")
+@connection_req
+@click.option(
+    "-f",
+    "--file",
+    "filename",
+    default=None,
+    type=click.File(mode="w"),
+    help="Write VM XML to this file.",
+)
+@click.argument("domain")
+def cli_vm_dump(filename, domain):
+    """
+    Dump the Libvirt XML definition of virtual machine DOMAIN to stdout. DOMAIN may be a UUID or name.
+    """
+
+    retcode, retdata = pvc.lib.vm.vm_info(CLI_CONFIG, domain)
+    if not retcode or not retdata.get("name", None):
+        finish(False, 'ERROR: Could not find VM "{}"!'.format(domain))
+
+    current_vm_cfg_raw = retdata.get("xml")
+
+    from lxml.etree import fromstring, tostring
+
+    xml_data = fromstring(current_vm_cfg_raw)
+    current_vm_cfgfile = tostring(xml_data, pretty_print=True).decode("utf8")
+    xml = current_vm_cfgfile.strip()
+
+    if filename is not None:
+        filename.write(xml)
+        finish(retcode, 'VM XML written to "{}".'.format(filename.name))
+    else:
+        finish(retcode, xml)
+
+
+###############################################################################
+# > pvc vm info
+###############################################################################
+@click.command(name="info", short_help="Show details of a VM object.")
+@connection_req
+@click.argument("domain")
+@format_opt(
+    {
+        "pretty": cli_vm_info_format_pretty,
+        "long": cli_vm_info_format_long,
+        "json": lambda d: jdumps(d),
+        "json-pretty": lambda d: jdumps(d, indent=2),
+    }
+)
+def cli_vm_info(domain, format_function):
+    """
+    Show information about virtual machine DOMAIN. DOMAIN may be a UUID or name.
+    """
+
+    retcode, retdata = pvc.lib.vm.vm_info(CLI_CONFIG, domain)
+    finish(retcode, retdata, format_function)
+
+
+###############################################################################
+# > pvc vm list
+###############################################################################
+@click.command(name="list", short_help="List all VM objects.")
+@connection_req
+@click.argument("limit", default=None, required=False)
+@click.option(
+    "-t",
+    "--target",
+    "target_node",
+    default=None,
+    help="Limit list to VMs on the specified node.",
+)
+@click.option(
+    "-s",
+    "--state",
+    "target_state",
+    default=None,
+    help="Limit list to VMs in the specified state.",
+)
+@click.option(
+    "-g",
+    "--tag",
+    "target_tag",
+    default=None,
+    help="Limit list to VMs with the specified tag.",
+)
+@click.option(
+    "-n",
+    "--negate",
+    "negate",
+    is_flag=True,
+    default=False,
+    help="Negate the specified node, state, or tag limit(s).",
+)
+@format_opt(
+    {
+        "pretty": cli_vm_list_format_pretty,
+        "raw": lambda d: "\n".join([v["name"] for v in d]),
+        "json": lambda d: jdumps(d),
+        "json-pretty": lambda d: jdumps(d, indent=2),
+    }
+)
+def cli_vm_list(target_node, target_state, target_tag, limit, negate, format_function):
+    """
+    List all virtual machines; optionally only match names or full UUIDs matching regex LIMIT.
+
+    (†) NOTE: Red-coloured network lists indicate one or more configured networks are missing/invalid.
+    """
+
+    pages = pvc.lib.vm.vm_list_pages(
+        CLI_CONFIG, limit, target_node, target_state, target_tag, negate
+    )
+    finish_pages(pages, format_function)
+
+
+###############################################################################
+# Click command tree
+###############################################################################
+
+cli_vm.add_command(cli_vm_define)
+cli_vm.add_command(cli_vm_meta)
+cli_vm.add_command(cli_vm_modify)
+cli_vm.add_command(cli_vm_rename)
+cli_vm.add_command(cli_vm_undefine)
+cli_vm.add_command(cli_vm_remove)
+cli_vm.add_command(cli_vm_start)
+cli_vm.add_command(cli_vm_restart)
+cli_vm.add_command(cli_vm_shutdown)
+cli_vm.add_command(cli_vm_stop)
+cli_vm.add_command(cli_vm_disable)
+cli_vm.add_command(cli_vm_move)
+cli_vm.add_command(cli_vm_migrate)
+cli_vm.add_command(cli_vm_unmigrate)
+cli_vm.add_command(cli_vm_flush_locks)
+cli_vm_snapshot.add_command(cli_vm_snapshot_create)
+cli_vm_snapshot.add_command(cli_vm_snapshot_remove)
+cli_vm_snapshot.add_command(cli_vm_snapshot_rollback)
+cli_vm_snapshot.add_command(cli_vm_snapshot_export)
+cli_vm_snapshot.add_command(cli_vm_snapshot_import)
+cli_vm_snapshot.add_command(cli_vm_snapshot_send)
+cli_vm.add_command(cli_vm_snapshot)
+cli_vm_mirror.add_command(cli_vm_mirror_create)
+cli_vm_mirror.add_command(cli_vm_mirror_promote)
+cli_vm.add_command(cli_vm_mirror)
+cli_vm_backup.add_command(cli_vm_backup_create)
+cli_vm_backup.add_command(cli_vm_backup_restore)
+cli_vm_backup.add_command(cli_vm_backup_remove)
+cli_vm.add_command(cli_vm_backup)
+cli_vm.add_command(cli_vm_autobackup)
+cli_vm.add_command(cli_vm_automirror)
+cli_vm_tag.add_command(cli_vm_tag_get)
+cli_vm_tag.add_command(cli_vm_tag_add)
+cli_vm_tag.add_command(cli_vm_tag_remove)
+cli_vm.add_command(cli_vm_tag)
+cli_vm_bulk.add_command(cli_vm_bulk_start)
+cli_vm_bulk.add_command(cli_vm_bulk_restart)
+cli_vm_bulk.add_command(cli_vm_bulk_shutdown)
+cli_vm_bulk.add_command(cli_vm_bulk_stop)
+cli_vm_bulk.add_command(cli_vm_bulk_disable)
+cli_vm_bulk.add_command(cli_vm_bulk_meta)
+cli_vm_bulk_tag.add_command(cli_vm_bulk_tag_add)
+cli_vm_bulk_tag.add_command(cli_vm_bulk_tag_remove)
+cli_vm_bulk.add_command(cli_vm_bulk_tag)
+cli_vm.add_command(cli_vm_bulk)
+cli_vm_vcpu.add_command(cli_vm_vcpu_get)
+cli_vm_vcpu.add_command(cli_vm_vcpu_set)
+cli_vm.add_command(cli_vm_vcpu)
+cli_vm_memory.add_command(cli_vm_memory_get)
+cli_vm_memory.add_command(cli_vm_memory_set)
+cli_vm.add_command(cli_vm_memory)
+cli_vm_network.add_command(cli_vm_network_get)
+cli_vm_network.add_command(cli_vm_network_add)
+cli_vm_network.add_command(cli_vm_network_remove)
+cli_vm.add_command(cli_vm_network)
+cli_vm_volume.add_command(cli_vm_volume_get)
+cli_vm_volume.add_command(cli_vm_volume_add)
+cli_vm_volume.add_command(cli_vm_volume_remove)
+cli_vm.add_command(cli_vm_volume)
+cli_vm.add_command(cli_vm_log)
+cli_vm.add_command(cli_vm_dump)
+cli_vm.add_command(cli_vm_info)
+cli_vm.add_command(cli_vm_list)
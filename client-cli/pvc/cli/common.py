@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+
+# common.py - PVC Click CLI common functions and decorators
+# Part of the Parallel Virtual Cluster (PVC) system
+#
+#    Copyright (C) 2018-2024 Joshua M. Boniface <joshua@boniface.me>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+from functools import wraps
+from importlib import import_module
+from json import dumps as jdumps
+from os import environ
+from re import sub
+
+from pvc.cli.helpers import *
+
+import pvc.lib
+
+import click
+
+
+###############################################################################
+# Context and completion handler, globals
+###############################################################################
+
+
+CONTEXT_SETTINGS = dict(
+    help_option_names=["-h", "--help"], max_content_width=MAX_CONTENT_WIDTH
+)
+IS_COMPLETION = True if environ.get("_PVC_COMPLETE", "") == "complete" else False
+
+CLI_CONFIG = dict()
+
+
+###############################################################################
+# Local helper functions
+###############################################################################
+
+
+def finish(success=True, data=None, formatter=None):
+    """
+    Output data to the terminal and exit based on code (T/F or integer code)
+    """
+
+    if data is not None:
+        if formatter is not None and success:
+            if formatter.__name__ == "<lambda>":
+                # We don't pass CLI_CONFIG into lambdas
+                echo(CLI_CONFIG, formatter(data))
+            else:
+                echo(CLI_CONFIG, formatter(CLI_CONFIG, data))
+        else:
+            echo(CLI_CONFIG, data)
+
+    # Allow passing raw values if not a bool
+    if isinstance(success, bool):
+        if success:
+            exit(0)
+        else:
+            exit(1)
+    else:
+        exit(success)
+
+
+def finish_pages(pages, formatter=None):
+    """
+    Output the pages of a list to the terminal as they are received and exit based on their codes
+
+    Pages are formatted separately with the table header on the first page only; lambda
+    formatters (e.g. JSON) need the whole list, so pages are collected before these are output.
+    """
+
+    if formatter is None or formatter.__name__ == "<lambda>":
+        retcode, retdata = pvc.lib.common.collect_pages(pages)
+        finish(retcode, retdata, formatter)
+
+    for idx, (retcode, retdata) in enumerate(pages):
+        if not retcode:
+            finish(retcode, retdata)
+        echo(CLI_CONFIG, formatter(CLI_CONFIG, retdata, header=(idx == 0)))
+
+    finish(True)
+
+
+def version(ctx, param, value):
+    """
+    Show the version of the CLI client
+    """
+
+    if not value or ctx.resilient_parsing:
+        return
+
+    echo(CLI_CONFIG, f"Parallel Virtual Cluster CLI client version {VERSION}")
+    ctx.exit()
+
+
+###############################################################################
+# Click command classes
+###############################################################################
+
+
+class LazyGroup(click.Group):
+    """
+    Click Group Class:
+    A Click group whose subcommands are only imported when they are dispatched; {lazy_subcommands}
+    defines a dictionary of subcommands with keys as command names and values as tuples of the
+    module, the command object in it, and its short help. The short help is used for the group
+    help and shell completion, so that neither has to import every subcommand module.
+    e.g. { "vm": ("pvc.cli.commands.vm", "cli_vm", "Manage PVC VMs."), ... }
+    """
+
+    def __init__(self, *args, lazy_subcommands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_subcommands = lazy_subcommands or dict()
+
+    def list_commands(self, ctx):
+        return sorted(super().list_commands(ctx) + list(self.lazy_subcommands.keys()))
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name in self.lazy_subcommands:
+            module_name, command_name, _ = self.lazy_subcommands[cmd_name]
+            return getattr(import_module(module_name), command_name)
+        return super().get_command(ctx, cmd_name)
+
+    def get_short_help(self, ctx, cmd_name):
+        if cmd_name in self.lazy_subcommands:
+            return self.lazy_subcommands[cmd_name][2]
+        return self.get_command(ctx, cmd_name).get_short_help_str()
+
+    def format_commands(self, ctx, formatter):
+        rows = [
+            (cmd_name, self.get_short_help(ctx, cmd_name))
+            for cmd_name in self.list_commands(ctx)
+            if cmd_name in self.lazy_subcommands
+            or not self.get_command(ctx, cmd_name).hidden
+        ]
+        if rows:
+            with formatter.section("Commands"):
+                formatter.write_dl(rows)
+
+    def shell_complete(self, ctx, incomplete):
+        from click.shell_completion import CompletionItem
+
+        results = [
+            CompletionItem(cmd_name, help=self.get_short_help(ctx, cmd_name))
+            for cmd_name in self.list_commands(ctx)
+            if cmd_name.startswith(incomplete)
+            and (
+                cmd_name in self.lazy_subcommands
+                or not self.get_command(ctx, cmd_name).hidden
+            )
+        ]
+        results.extend(click.Command.shell_complete(self, ctx, incomplete))
+        return results
+
+
+###############################################################################
+# Click command decorators
+###############################################################################
+
+
+def connection_req(function):
+    """
+    General Decorator:
+    Wraps a Click command which requires a connection to be set and validates that it is present
+    """
+
+    @wraps(function)
+    def validate_connection(*args, **kwargs):
+        if CLI_CONFIG.get("badcfg", None) and CLI_CONFIG.get("connection"):
+            echo(
+                CLI_CONFIG,
+                f"""Invalid connection "{CLI_CONFIG.get('connection')}" specified; set a valid connection and try again.""",
+            )
+            exit(1)
+        elif CLI_CONFIG.get("badcfg", None):
+            echo(
+                CLI_CONFIG,
+                'No connection specified and no local API configuration found. Use "pvc connection" to add a connection.',
+            )
+            exit(1)
+
+        if CLI_CONFIG.get("api_scheme") == "https" and not CLI_CONFIG.get("verify_ssl"):
+            ssl_verify_msg = " (unverified)"
+        else:
+            ssl_verify_msg = ""
+
+        echo(
+            CLI_CONFIG,
+            f'''Using connection "{CLI_CONFIG.get('connection')}" - Host: "{CLI_CONFIG.get('api_host')}"  Scheme: "{CLI_CONFIG.get('api_scheme')}{ssl_verify_msg}"  Prefix: "{CLI_CONFIG.get('api_prefix')}"''',
+            stderr=True,
+        )
+        echo(
+            CLI_CONFIG,
+            "",
+            stderr=True,
+        )
+
+        return function(*args, **kwargs)
+
+    return validate_connection
+
+
+def restart_opt(function):
+    """
+    Click Option Decorator:
+    Wraps a Click command which requires a VM domain restart, to provide options for/against restart or prompt
+    """
+
+    @click.option(
+        "-r/-R",
+        "--restart/--no-restart",
+        "restart_flag",
+        is_flag=True,
+        default=None,
+        show_default=False,
+        help="Immediately restart VM to apply changes or do not restart VM, or prompt if unspecified.",
+    )
+    @wraps(function)
+    def confirm_action(*args, **kwargs):
+        restart_state = kwargs.get("restart_flag", None)
+        live_state = kwargs.get("live_flag", False)
+
+        if restart_state is None and not live_state:
+            # Neither "--restart" or "--no-restart" was passed, and "--no-live" was passed: prompt for restart or restart if "--unsafe"
+            try:
+                click.confirm(
+                    f"Restart VM {kwargs.get('domain')} to apply changes",
+                    prompt_suffix="? ",
+                    abort=True,
+                )
+                kwargs["restart_flag"] = True
+                kwargs["confirm_flag"] = True
+            except Exception:
+                echo(CLI_CONFIG, "Changes will be applied on next VM start/restart.")
+                kwargs["restart_flag"] = False
+        elif restart_state is True:
+            # "--restart" was passed: allow restart without confirming
+            kwargs["restart_flag"] = True
+        elif restart_state is False:
+            # "--no-restart" was passed: skip confirming and skip restart
+            kwargs["restart_flag"] = False
+
+        return function(*args, **kwargs)
+
+    return confirm_action
+
+
+def confirm_opt(message):
+    """
+    Click Option Decorator with argument:
+    Wraps a Click command which requires confirm_flag or unsafe option or asks for confirmation with message
+    """
+
+    def confirm_decorator(function):
+        @click.option(
+            "-y",
+            "--yes",
+            "confirm_flag",
+            is_flag=True,
+            default=False,
+            help="Pre-confirm any unsafe operations.",
+        )
+        @wraps(function)
+        def confirm_action(*args, **kwargs):
+            confirm_action = True
+            if "confirm_flag" in kwargs:
+                if not kwargs.get("confirm_flag", False):
+                    if not CLI_CONFIG.get("unsafe", False):
+                        confirm_action = True
+                    else:
+                        confirm_action = False
+                else:
+                    confirm_action = False
+            else:
+                confirm_action = False
+
+            # Handle cases where the confirmation is only for a restart_flag
+            # We do not want to confirm if we're not doing the restart
+            if (
+                "restart_flag" in kwargs
+                and confirm_action
+                and not kwargs["restart_flag"]
+            ):
+                confirm_action = False
+
+            if confirm_action:
+                try:
+                    # Try to interpolate any variables in the message from the kwargs
+                    # This is slightly messy but allows for nicer specification of the variables
+                    # in the calling {message} string
+                    _message = sub(r"{([^{}]*)}", r"\"{kwargs['\1']}\"", message)
+                    _message = eval(f"""f'''{_message}'''""")
+
+                    click.confirm(_message, prompt_suffix="? ", abort=True)
+                except Exception:
+                    print("Aborted.")
+                    exit(0)
+
+                click.echo()
+
+            del kwargs["confirm_flag"]
+
+            return function(*args, **kwargs)
+
+        return confirm_action
+
+    return confirm_decorator
+
+
+def format_opt(formats, default_format="pretty"):
+    """
+    Click Option Decorator with argument:
+    Wraps a Click command that can output in multiple formats; {formats} defines a dictionary of
+    formatting functions for the command with keys as valid format types.
+    e.g. { "json": lambda d: json.dumps(d), "pretty": format_function_pretty, ... }
+    Injects a "format_function" argument into the function for this purpose.
+    """
+
+    if default_format not in formats.keys():
+        echo(CLI_CONFIG, f"Fatal code error: {default_format} not in {formats.keys()}")
+        exit(255)
+
+    def format_decorator(function):
+        @click.option(
+            "-f",
+            "--format",
+            "output_format",
+            default=default_format,
+            show_default=True,
+            type=click.Choice(formats.keys()),
+            help="Output information in this format.",
+        )
+        @wraps(function)
+        def format_action(*args, **kwargs):
+            kwargs["format_function"] = formats[kwargs["output_format"]]
+
+            del kwargs["output_format"]
+
+            return function(*args, **kwargs)
+
+        return format_action
+
+    return format_decorator
+
+
+# Decorators example
+@click.command(name="testing", short_help="Testing")  # Click command
+@connection_req  # Require a connection to be set
+@click.argument("vm")  # A Click argument
+@confirm_opt("Confirm this very dangerous task")  # A "--yes" confirmation option
+@restart_opt  # A "--restart" confirmation option (adds 'restart_flag')
+@format_opt(  # A "--format" output option (adds 'format_function')
+    {
+        "pretty": lambda d: d,  # This dictionary is of "type":"callable" entries, where each
+        "json": lambda d: jdumps(
+            d
+        ),  # key is the nice name for the user to specify, and the value
+        "json-pretty": lambda d: jdumps(
+            d, indent=2
+        ),  # is a callable that takes in the provided data to format
+    },
+    default_format="json-pretty",  # Can also set a default if "pretty" shouldn't be the default
+)
+# Always in format {arguments}, {options}, {flags}, {format_function}
+def testing(vm, restart_flag, format_function):
+    echo(CLI_CONFIG, vm)
+    echo(CLI_CONFIG, restart_flag)
+    echo(CLI_CONFIG, format_function)
+
+    data = {
+        "athing": "value",
+        "anotherthing": 1234,
+        "thelist": ["a", "b", "c"],
+    }
+
+    finish(True, data, format_function)
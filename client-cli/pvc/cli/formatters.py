@@ -20,34 +20,8 @@
 ###############################################################################
 
 from pvc.cli.helpers import MAX_CONTENT_WIDTH
-from pvc.lib.node import format_info as node_format_info
-from pvc.lib.node import format_list as node_format_list
-from pvc.lib.vm import format_vm_tags as vm_format_tags
-from pvc.lib.vm import format_vm_vcpus as vm_format_vcpus
-from pvc.lib.vm import format_vm_memory as vm_format_memory
-from pvc.lib.vm import format_vm_networks as vm_format_networks
-from pvc.lib.vm import format_vm_volumes as vm_format_volumes
-from pvc.lib.vm import format_info as vm_format_info
-from pvc.lib.vm import format_list as vm_format_list
-from pvc.lib.network import format_info as network_format_info
-from pvc.lib.network import format_list as network_format_list
-from pvc.lib.network import format_list_dhcp as network_format_dhcp_list
-from pvc.lib.network import format_list_acl as network_format_acl_list
-from pvc.lib.network import format_list_sriov_pf as network_format_sriov_pf_list
-from pvc.lib.network import format_info_sriov_vf as network_format_sriov_vf_info
-from pvc.lib.network import format_list_sriov_vf as network_format_sriov_vf_list
-from pvc.lib.storage import format_raw_output as storage_format_raw
-from pvc.lib.storage import format_info_benchmark as storage_format_benchmark_info
-from pvc.lib.storage import format_list_benchmark as storage_format_benchmark_list
-from pvc.lib.storage import format_list_osd as storage_format_osd_list
-from pvc.lib.storage import format_list_pool as storage_format_pool_list
-from pvc.lib.storage import format_list_volume as storage_format_volume_list
-from pvc.lib.storage import format_list_snapshot as storage_format_snapshot_list
-from pvc.lib.provisioner import format_list_template as provisioner_format_template_list
-from pvc.lib.provisioner import format_list_userdata as provisioner_format_userdata_list
-from pvc.lib.provisioner import format_list_script as provisioner_format_script_list
-from pvc.lib.provisioner import format_list_ova as provisioner_format_ova_list
-from pvc.lib.provisioner import format_list_profile as provisioner_format_profile_list
+
+import pvc.lib
 
 
 # Define colour values for use in formatters
@@ -1106,7 +1080,7 @@ def cli_node_info_format_pretty(CLI_CONFIG, data):
     Pretty format the basic output of cli_node_info
     """
 
-    return node_format_info(CLI_CONFIG, data, long_output=False)
+    return pvc.lib.node.format_info(CLI_CONFIG, data, long_output=False)
 
 
 def cli_node_info_format_long(CLI_CONFIG, data):
@@ -1114,7 +1088,7 @@ def cli_node_info_format_long(CLI_CONFIG, data):
     Pretty format the full output of cli_node_info
     """
 
-    return node_format_info(CLI_CONFIG, data, long_output=True)
+    return pvc.lib.node.format_info(CLI_CONFIG, data, long_output=True)
 
 
 def cli_node_list_format_pretty(CLI_CONFIG, data):
@@ -1122,7 +1096,7 @@ def cli_node_list_format_pretty(CLI_CONFIG, data):
     Pretty format the output of cli_node_list
     """
 
-    return node_format_list(CLI_CONFIG, data)
+    return pvc.lib.node.format_list(CLI_CONFIG, data)
 
 
 def cli_vm_tag_get_format_pretty(CLI_CONFIG, data):
@@ -1130,7 +1104,7 @@ def cli_vm_tag_get_format_pretty(CLI_CONFIG, data):
     Pretty format the output of cli_vm_tag_get
     """
 
-    return vm_format_tags(CLI_CONFIG, data)
+    return pvc.lib.vm.format_vm_tags(CLI_CONFIG, data)
 
 
 def cli_vm_vcpu_get_format_pretty(CLI_CONFIG, data):
@@ -1138,7 +1112,7 @@ def cli_vm_vcpu_get_format_pretty(CLI_CONFIG, data):
     Pretty format the output of cli_vm_vcpu_get
     """
 
-    return vm_format_vcpus(CLI_CONFIG, data)
+    return pvc.lib.vm.format_vm_vcpus(CLI_CONFIG, data)
 
 
 def cli_vm_memory_get_format_pretty(CLI_CONFIG, data):
@@ -1146,7 +1120,7 @@ def cli_vm_memory_get_format_pretty(CLI_CONFIG, data):
     Pretty format the output of cli_vm_memory_get
     """
 
-    return vm_format_memory(CLI_CONFIG, data)
+    return pvc.lib.vm.format_vm_memory(CLI_CONFIG, data)
 
 
 def cli_vm_network_get_format_pretty(CLI_CONFIG, data):
@@ -1154,7 +1128,7 @@ def cli_vm_network_get_format_pretty(CLI_CONFIG, data):
     Pretty format the output of cli_vm_network_get
     """
 
-    return vm_format_networks(CLI_CONFIG, data)
+    return pvc.lib.vm.format_vm_networks(CLI_CONFIG, data)
 
 
 def cli_vm_volume_get_format_pretty(CLI_CONFIG, data):
@@ -1162,7 +1136,7 @@ def cli_vm_volume_get_format_pretty(CLI_CONFIG, data):
     Pretty format the output of cli_vm_volume_get
     """
 
-    return vm_format_volumes(CLI_CONFIG, data)
+    return pvc.lib.vm.format_vm_volumes(CLI_CONFIG, data)
 
 
 def cli_vm_info_format_pretty(CLI_CONFIG, data):
@@ -1170,7 +1144,7 @@ def cli_vm_info_format_pretty(CLI_CONFIG, data):
     Pretty format the basic output of cli_vm_info
     """
 
-    return vm_format_info(CLI_CONFIG, data, long_output=False)
+    return pvc.lib.vm.format_info(CLI_CONFIG, data, long_output=False)
 
 
 def cli_vm_info_format_long(CLI_CONFIG, data):
@@ -1178,15 +1152,15 @@ def cli_vm_info_format_long(CLI_CONFIG, data):
     Pretty format the full output of cli_vm_info
     """
 
-    return vm_format_info(CLI_CONFIG, data, long_output=True)
+    return pvc.lib.vm.format_info(CLI_CONFIG, data, long_output=True)
 
 
-def cli_vm_list_format_pretty(CLI_CONFIG, data):
+def cli_vm_list_format_pretty(CLI_CONFIG, data, header=True):
     """
     Pretty format the output of cli_vm_list
     """
 
-    return vm_format_list(CLI_CONFIG, data)
+    return pvc.lib.vm.format_list(CLI_CONFIG, data, header=header)
 
 
 def cli_network_info_format_pretty(CLI_CONFIG, data):
@@ -1194,7 +1168,7 @@ def cli_network_info_format_pretty(CLI_CONFIG, data):
     Pretty format the full output of cli_network_info
     """
 
-    return network_format_info(CLI_CONFIG, data, long_output=True)
+    return pvc.lib.network.format_info(CLI_CONFIG, data, long_output=True)
 
 
 def cli_network_info_format_long(CLI_CONFIG, data):
@@ -1202,7 +1176,7 @@ def cli_network_info_format_long(CLI_CONFIG, data):
     Pretty format the full output of cli_network_info
     """
 
-    return network_format_info(CLI_CONFIG, data, long_output=True)
+    return pvc.lib.network.format_info(CLI_CONFIG, data, long_output=True)
 
 
 def cli_network_list_format_pretty(CLI_CONFIG, data):
@@ -1210,7 +1184,7 @@ def cli_network_list_format_pretty(CLI_CONFIG, data):
     Pretty format the output of cli_network_list
     """
 
-    return network_format_list(CLI_CONFIG, data)
+    return pvc.lib.network.format_list(CLI_CONFIG, data)
 
 
 def cli_network_dhcp_list_format_pretty(CLI_CONFIG, data):
@@ -1218,7 +1192,7 @@ def cli_network_dhcp_list_format_pretty(CLI_CONFIG, data):
     Pretty format the output of cli_network_dhcp_list
     """
 
-    return network_format_dhcp_list(CLI_CONFIG, data)
+    return pvc.lib.network.format_list_dhcp(CLI_CONFIG, data)
 
 
 def cli_network_acl_list_format_pretty(CLI_CONFIG, data):
@@ -1226,7 +1200,7 @@ def cli_network_acl_list_format_pretty(CLI_CONFIG, data):
     Pretty format the output of cli_network_acl_list
     """
 
-    return network_format_acl_list(CLI_CONFIG, data)
+    return pvc.lib.network.format_list_acl(CLI_CONFIG, data)
 
 
 def cli_network_sriov_pf_list_format_pretty(CLI_CONFIG, data):
@@ -1234,7 +1208,7 @@ def cli_network_sriov_pf_list_format_pretty(CLI_CONFIG, data):
     Pretty format the output of cli_network_sriov_pf_list
     """
 
-    return network_format_sriov_pf_list(CLI_CONFIG, data)
+    return pvc.lib.network.format_list_sriov_pf(CLI_CONFIG, data)
 
 
 def cli_network_sriov_vf_info_format_pretty(CLI_CONFIG, data):
@@ -1242,7 +1216,7 @@ def cli_network_sriov_vf_info_format_pretty(CLI_CONFIG, data):
     Pretty format the output of cli_network_sriov_vf_info
     """
 
-    return network_format_sriov_vf_info(CLI_CONFIG, data)
+    return pvc.lib.network.format_info_sriov_vf(CLI_CONFIG, data)
 
 
 def cli_network_sriov_vf_list_format_pretty(CLI_CONFIG, data):
@@ -1250,7 +1224,7 @@ def cli_network_sriov_vf_list_format_pretty(CLI_CONFIG, data):
     Pretty format the output of cli_network_sriov_vf_list
     """
 
-    return network_format_sriov_vf_list(CLI_CONFIG, data)
+    return pvc.lib.network.format_list_sriov_vf(CLI_CONFIG, data)
 
 
 def cli_storage_status_format_raw(CLI_CONFIG, data):
@@ -1258,7 +1232,7 @@ def cli_storage_status_format_raw(CLI_CONFIG, data):
     Direct format the output of cli_storage_status
     """
 
-    return storage_format_raw(CLI_CONFIG, data)
+    return pvc.lib.storage.format_raw_output(CLI_CONFIG, data)
 
 
 def cli_storage_util_format_raw(CLI_CONFIG, data):
@@ -1266,7 +1240,7 @@ def cli_storage_util_format_raw(CLI_CONFIG, data):
     Direct format the output of cli_storage_util
     """
 
-    return storage_format_raw(CLI_CONFIG, data)
+    return pvc.lib.storage.format_raw_output(CLI_CONFIG, data)
 
 
 def cli_storage_benchmark_info_format_pretty(CLI_CONFIG, data):
@@ -1274,7 +1248,7 @@ def cli_storage_benchmark_info_format_pretty(CLI_CONFIG, data):
     Pretty format the output of cli_storage_benchmark_info
     """
 
-    return storage_format_benchmark_info(CLI_CONFIG, data)
+    return pvc.lib.storage.format_info_benchmark(CLI_CONFIG, data)
 
 
 def cli_storage_benchmark_list_format_pretty(CLI_CONFIG, data):
@@ -1282,7 +1256,15 @@ def cli_storage_benchmark_list_format_pretty(CLI_CONFIG, data):
     Pretty format the output of cli_storage_benchmark_list
     """
 
-    return storage_format_benchmark_list(CLI_CONFIG, data)
+    return pvc.lib.storage.format_list_benchmark(CLI_CONFIG, data)
+
+
+def cli_storage_benchmark_compare_format_pretty(CLI_CONFIG, data):
+    """
+    Pretty format the output of cli_storage_benchmark_compare
+    """
+
+    return pvc.lib.storage.format_compare_benchmark(CLI_CONFIG, data)
 
 
 def cli_storage_osd_list_format_pretty(CLI_CONFIG, data):
@@ -1290,7 +1272,7 @@ def cli_storage_osd_list_format_pretty(CLI_CONFIG, data):
     Pretty format the output of cli_storage_osd_list
     """
 
-    return storage_format_osd_list(CLI_CONFIG, data)
+    return pvc.lib.storage.format_list_osd(CLI_CONFIG, data)
 
 
 def cli_storage_pool_list_format_pretty(CLI_CONFIG, data):
@@ -1298,23 +1280,23 @@ def cli_storage_pool_list_format_pretty(CLI_CONFIG, data):
     Pretty format the output of cli_storage_pool_list
     """
 
-    return storage_format_pool_list(CLI_CONFIG, data)
+    return pvc.lib.storage.format_list_pool(CLI_CONFIG, data)
 
 
-def cli_storage_volume_list_format_pretty(CLI_CONFIG, data):
+def cli_storage_volume_list_format_pretty(CLI_CONFIG, data, header=True):
     """
     Pretty format the output of cli_storage_volume_list
     """
 
-    return storage_format_volume_list(CLI_CONFIG, data)
+    return pvc.lib.storage.format_list_volume(CLI_CONFIG, data, header=header)
 
 
-def cli_storage_snapshot_list_format_pretty(CLI_CONFIG, data):
+def cli_storage_snapshot_list_format_pretty(CLI_CONFIG, data, header=True):
     """
     Pretty format the output of cli_storage_snapshot_list
     """
 
-    return storage_format_snapshot_list(CLI_CONFIG, data)
+    return pvc.lib.storage.format_list_snapshot(CLI_CONFIG, data, header=header)
 
 
 def cli_provisioner_template_system_list_format_pretty(CLI_CONFIG, data):
@@ -1322,7 +1304,9 @@ def cli_provisioner_template_system_list_format_pretty(CLI_CONFIG, data):
     Pretty format the output of cli_provisioner_template_system_list
     """
 
-    return provisioner_format_template_list(CLI_CONFIG, data, template_type="system")
+    return pvc.lib.provisioner.format_list_template(
+        CLI_CONFIG, data, template_type="system"
+    )
 
 
 def cli_provisioner_template_network_list_format_pretty(CLI_CONFIG, data):
@@ -1330,7 +1314,9 @@ def cli_provisioner_template_network_list_format_pretty(CLI_CONFIG, data):
     Pretty format the output of cli_provisioner_template_network_list
     """
 
-    return provisioner_format_template_list(CLI_CONFIG, data, template_type="network")
+    return pvc.lib.provisioner.format_list_template(
+        CLI_CONFIG, data, template_type="network"
+    )
 
 
 def cli_provisioner_template_storage_list_format_pretty(CLI_CONFIG, data):
@@ -1338,7 +1324,9 @@ def cli_provisioner_template_storage_list_format_pretty(CLI_CONFIG, data):
     Pretty format the output of cli_provisioner_template_storage_list
     """
 
-    return provisioner_format_template_list(CLI_CONFIG, data, template_type="storage")
+    return pvc.lib.provisioner.format_list_template(
+        CLI_CONFIG, data, template_type="storage"
+    )
 
 
 def cli_provisioner_userdata_list_format_pretty(CLI_CONFIG, data):
@@ -1346,7 +1334,7 @@ def cli_provisioner_userdata_list_format_pretty(CLI_CONFIG, data):
     Pretty format the output of cli_provisioner_userdata_list
     """
 
-    return provisioner_format_userdata_list(CLI_CONFIG, data)
+    return pvc.lib.provisioner.format_list_userdata(CLI_CONFIG, data)
 
 
 def cli_provisioner_script_list_format_pretty(CLI_CONFIG, data):
@@ -1354,7 +1342,7 @@ def cli_provisioner_script_list_format_pretty(CLI_CONFIG, data):
     Pretty format the output of cli_provisioner_script_list
     """
 
-    return provisioner_format_script_list(CLI_CONFIG, data)
+    return pvc.lib.provisioner.format_list_script(CLI_CONFIG, data)
 
 
 def cli_provisioner_ova_list_format_pretty(CLI_CONFIG, data):
@@ -1362,7 +1350,7 @@ def cli_provisioner_ova_list_format_pretty(CLI_CONFIG, data):
     Pretty format the output of cli_provisioner_ova_list
     """
 
-    return provisioner_format_ova_list(CLI_CONFIG, data)
+    return pvc.lib.provisioner.format_list_ova(CLI_CONFIG, data)
 
 
 def cli_provisioner_profile_list_format_pretty(CLI_CONFIG, data):
@@ -1370,4 +1358,4 @@ def cli_provisioner_profile_list_format_pretty(CLI_CONFIG, data):
     Pretty format the output of cli_provisioner_profile_list
     """
 
-    return provisioner_format_profile_list(CLI_CONFIG, data)
+    return pvc.lib.provisioner.format_list_profile(CLI_CONFIG, data)
@@ -26,8 +26,6 @@ from os import chmod, environ, getpid, path, get_terminal_size
 from socket import gethostname
 from sys import argv
 from syslog import syslog, openlog, closelog, LOG_AUTH
-from yaml import load as yload
-from yaml import SafeLoader
 
 
 VERSION = "1.0.3"
@@ -84,6 +82,10 @@ def read_config_from_yaml(cfgfile):
     Read the PVC API configuration from the local API configuration file
     """
 
+    # YAML is only needed for a local connection, so is imported here to keep CLI startup fast
+    from yaml import load as yload
+    from yaml import SafeLoader
+
     try:
         with open(cfgfile) as fh:
             api_config = yload(fh, Loader=SafeLoader)["api"]
@@ -24,7 +24,7 @@ from re import sub
 
 from pvc.cli.helpers import read_config_from_yaml, get_config
 
-import pvc.lib.cluster
+import pvc.lib
 
 
 def cli_connection_list_parser(connections_config, show_keys_flag):
@@ -26,7 +26,7 @@ from time import sleep, time
 
 from pvc.cli.helpers import echo
 
-import pvc.lib.node
+import pvc.lib
 
 
 def cli_node_waiter(config, node, state_field, state_value):
@@ -75,6 +75,9 @@ def wait_for_celery_task(CLI_CONFIG, task_detail, start_late=False):
     task_id = task_detail["task_id"]
     task_name = task_detail["task_name"]
 
+    # Receive each task status change, streamed from the API or polled if streaming is unavailable
+    task_statuses = pvc.lib.common.watch_task_status(CLI_CONFIG, task_id)
+
     if not start_late:
         run_on = task_detail["run_on"]
 
@@ -83,11 +86,9 @@ def wait_for_celery_task(CLI_CONFIG, task_detail, start_late=False):
 
         # Wait for the task to start
         echo(CLI_CONFIG, "Waiting for task to start...", newline=False)
-        while True:
-            sleep(0.5)
-            task_status = pvc.lib.common.task_status(
-                CLI_CONFIG, task_id=task_id, is_watching=True
-            )
+        for task_status in task_statuses:
+            if isinstance(task_status, tuple):
+                continue
             if task_status.get("state") != "PENDING":
                 break
             echo(CLI_CONFIG, ".", newline=False)
@@ -115,13 +116,7 @@ def wait_for_celery_task(CLI_CONFIG, task_detail, start_late=False):
             "  " + "Gathering information",
             newline=False,
         )
-        while True:
-            sleep(0.5)
-
-            task_status = pvc.lib.common.task_status(
-                CLI_CONFIG, task_id=task_id, is_watching=True
-            )
-
+        for task_status in task_statuses:
             if isinstance(task_status, tuple):
                 continue
             if task_status.get("state") != "RUNNING":
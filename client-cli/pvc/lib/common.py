@@ -21,15 +21,23 @@
 
 from ast import literal_eval
 from click import echo, progressbar
+from json import loads
 from math import ceil
 from os.path import getsize
 from requests import get, post, put, patch, delete, Response
 from requests.exceptions import ConnectionError
-from time import time
+from time import sleep, time
 from urllib3 import disable_warnings
 from pvc.cli.helpers import VERSION
 
 
+# The number of entries requested in each page of a list
+LIST_PAGE_SIZE = 100
+
+# The response header holding the cursor of the next page of a list
+LIST_CURSOR_HEADER = "X-PVC-Next-Cursor"
+
+
 def format_bytes(size_bytes):
     byte_unit_matrix = {
         "B": 1,
@@ -255,6 +263,125 @@ def call_api(
     return response
 
 
+def call_api_pages(config, request_uri, params=None, page_size=LIST_PAGE_SIZE):
+    """
+    Get a list from the API one page at a time
+
+    Returns a generator of (True, page) tuples for each page of the list, following the cursor
+    of each page to the next, or of a single (False, message) tuple if a request fails. APIs
+    without list pagination ignore the page size and return the whole list as one page.
+    """
+    params = dict(params or {})
+    params["page_size"] = page_size
+
+    while True:
+        response = call_api(config, "get", request_uri, params=params)
+        if response.status_code != 200:
+            yield False, response.json().get("message", "")
+            return
+
+        yield True, response.json()
+
+        cursor = response.headers.get(LIST_CURSOR_HEADER)
+        if not cursor:
+            return
+        params["cursor"] = cursor
+
+
+def collect_pages(pages):
+    """
+    Collect the pages from call_api_pages into one list, returning (True, list) or (False,
+    message)
+    """
+    data = list()
+    for retstatus, page in pages:
+        if not retstatus:
+            return False, page
+        data.extend(page)
+
+    return True, data
+
+
+def stream_api(config, request_uri, params=None):
+    """
+    Open a Server-Sent Events stream from the API
+
+    Returns a generator of (event, data) tuples, or None if the stream is not available (e.g. the
+    API is too old or has no free stream slots), in which case the caller should poll instead.
+    The generator raises an exception if the stream fails after it is opened.
+    """
+    # Set the connect timeout to 2 seconds and the data timeout to a few missed keepalives
+    timeout = (2.05, 60)
+
+    # Craft the URI
+    uri = "{}://{}{}{}".format(
+        config["api_scheme"], config["api_host"], config["api_prefix"], request_uri
+    )
+
+    headers = {
+        "User-Agent": f"pvc-client-cli/{VERSION}",
+        "Accept": "text/event-stream",
+    }
+
+    # Craft the authentication header if required
+    if config["api_key"]:
+        headers["X-Api-Key"] = config["api_key"]
+
+    disable_warnings()
+    try:
+        response = get(
+            uri,
+            timeout=timeout,
+            headers=headers,
+            params=params,
+            verify=config["verify_ssl"],
+            stream=True,
+        )
+    except Exception:
+        return None
+
+    # Display debug output
+    if config["debug"]:
+        echo("API endpoint: {}".format(uri), err=True)
+        echo("Response code: {}".format(response.status_code), err=True)
+        echo("Response headers: {}".format(response.headers), err=True)
+        echo(err=True)
+
+    if response.status_code != 200 or not response.headers.get(
+        "Content-Type", ""
+    ).startswith("text/event-stream"):
+        response.close()
+        return None
+
+    def read_events():
+        event = "message"
+        data = list()
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if line is None:
+                    continue
+                if not line:
+                    # A blank line ends an event
+                    if data:
+                        yield event, loads("\n".join(data))
+                    event = "message"
+                    data = list()
+                elif line.startswith(":"):
+                    # Comments are keepalives
+                    continue
+                else:
+                    field, _, value = line.partition(":")
+                    value = value[1:] if value.startswith(" ") else value
+                    if field == "event":
+                        event = value
+                    elif field == "data":
+                        data.append(value)
+        finally:
+            response.close()
+
+    return read_events()
+
+
 def get_wait_retdata(response, wait_flag):
     if response.status_code == 202:
         retvalue = True
@@ -333,3 +460,28 @@ def task_status(config, task_id=None, is_watching=False):
         retdata = task_data
 
     return retvalue, retdata
+
+
+def watch_task_status(config, task_id):
+    """
+    Yield the status of Celery job {task_id} each time it changes, until the caller stops
+
+    Statuses are streamed from the API if possible, otherwise (or if the stream fails) the API is
+    polled every half-second.
+
+    API endpoint: GET /api/v1/tasks/{task_id}/stream
+    API arguments:
+    API schema: {json_data_object}
+    """
+    events = stream_api(config, f"/tasks/{task_id}/stream")
+    if events is not None:
+        try:
+            for event, data in events:
+                if event == "status":
+                    yield data
+        except Exception:
+            pass
+
+    while True:
+        sleep(0.5)
+        yield task_status(config, task_id=task_id, is_watching=True)
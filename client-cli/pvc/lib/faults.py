@@ -19,7 +19,7 @@
 #
 ###############################################################################
 
-from pvc.lib.common import call_api
+from pvc.lib.common import call_api, call_api_pages, collect_pages
 
 
 def get_list(config, limit=None, sort_key="last_reported"):
@@ -27,17 +27,15 @@ def get_list(config, limit=None, sort_key="last_reported"):
     Get list of PVC faults
 
     API endpoint: GET /api/v1/faults
-    API arguments: sort_key={sort_key}
+    API arguments: sort_key={sort_key}, page_size={page_size}, cursor={cursor}
     API schema: {json_data_object}
     """
-    if limit is not None:
-        params = {}
-        endpoint = f"/faults/{limit}"
-    else:
-        params = {"sort_key": sort_key}
-        endpoint = "/faults"
+    if limit is None:
+        return collect_pages(
+            call_api_pages(config, "/faults", params={"sort_key": sort_key})
+        )
 
-    response = call_api(config, "get", endpoint, params=params)
+    response = call_api(config, "get", f"/faults/{limit}")
 
     if response.status_code == 200:
         return True, response.json()
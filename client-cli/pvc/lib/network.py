@@ -21,7 +21,7 @@
 
 import re
 import pvc.lib.ansiprint as ansiprint
-from pvc.lib.common import call_api
+from pvc.lib.common import call_api, call_api_pages, collect_pages
 
 
 def isValidMAC(macaddr):
@@ -259,7 +259,7 @@ def net_dhcp_list(config, net, limit, only_static=False):
     Get list information about leases (limited by {limit})
 
     API endpoint: GET /api/v1/network/{net}/lease
-    API arguments: limit={limit}, static={only_static}
+    API arguments: limit={limit}, static={only_static}, page_size={page_size}, cursor={cursor}
     API schema: [{json_data_object},{json_data_object},etc.]
     """
     params = dict()
@@ -271,15 +271,10 @@ def net_dhcp_list(config, net, limit, only_static=False):
     else:
         params["static"] = False
 
-    response = call_api(
-        config, "get", "/network/{net}/lease".format(net=net), params=params
+    return collect_pages(
+        call_api_pages(config, "/network/{net}/lease".format(net=net), params=params)
     )
 
-    if response.status_code == 200:
-        return True, response.json()
-    else:
-        return False, response.json().get("message", "")
-
 
 def net_dhcp_add(config, net, ipaddr, macaddr, hostname):
     """
@@ -24,7 +24,7 @@ import time
 from collections import deque
 
 import pvc.lib.ansiprint as ansiprint
-from pvc.lib.common import call_api
+from pvc.lib.common import call_api, stream_api
 
 
 #
@@ -104,32 +104,52 @@ def follow_node_log(config, node, lines=10):
     """
     Return and follow node log lines from the API
 
-    API endpoint: GET /node/{node}/log
+    The log is streamed from the API if possible, otherwise (or if the stream fails) the API is
+    polled every half-second.
+
+    API endpoint: GET /node/{node}/log/stream, or GET /node/{node}/log
     API arguments: lines={lines}
-    API schema: {"name":"{nodename}","data":"{node_log}"}
+    API schema: {"lines":["{log_line}"]}, or {"name":"{nodename}","data":"{node_log}"}
     """
     # We always grab 200 to match the follow call, but only _show_ `lines` number
     max_lines = 200
 
-    params = {"lines": max_lines}
-    response = call_api(
-        config, "get", "/node/{node}/log".format(node=node), params=params
+    # Create the deque we'll use to buffer loglines
+    loglines = deque(maxlen=max_lines)
+
+    events = stream_api(
+        config, "/node/{node}/log/stream".format(node=node), params={"lines": lines}
     )
+    if events is not None:
+        try:
+            for event, data in events:
+                if event == "end":
+                    return True, ""
+                for line in data.get("lines", []):
+                    loglines.append(line)
+                    print(line)
+        except Exception:
+            pass
 
-    if response.status_code != 200:
-        return False, response.json().get("message", "")
+    if not loglines:
+        params = {"lines": max_lines}
+        response = call_api(
+            config, "get", "/node/{node}/log".format(node=node), params=params
+        )
 
-    # Shrink the log buffer to length lines
-    node_log = response.json()["data"]
-    full_log = node_log.split("\n")
-    shrunk_log = full_log[-int(lines) :]
+        if response.status_code != 200:
+            return False, response.json().get("message", "")
 
-    # Print the initial data and begin following
-    for line in shrunk_log:
-        print(line)
+        # Shrink the log buffer to length lines
+        node_log = response.json()["data"]
+        full_log = node_log.split("\n")
+        shrunk_log = full_log[-int(lines) :]
 
-    # Create the deque we'll use to buffer loglines
-    loglines = deque(full_log, max_lines)
+        # Print the initial data and begin following
+        for line in shrunk_log:
+            print(line)
+
+        loglines.extend(full_log)
 
     while True:
         # Wait half a second
@@ -20,12 +20,20 @@
 ###############################################################################
 
 import math
+import struct
 
 from os import path
+from time import sleep
 from json import loads
 
 import pvc.lib.ansiprint as ansiprint
-from pvc.lib.common import UploadProgressBar, call_api, get_wait_retdata
+from pvc.lib.common import (
+    UploadProgressBar,
+    call_api,
+    call_api_pages,
+    collect_pages,
+    get_wait_retdata,
+)
 from pvc.cli.helpers import MAX_CONTENT_WIDTH
 
 #
@@ -1157,18 +1165,25 @@ def ceph_volume_list(config, limit, pool):
     API arguments: limit={limit}, pool={pool}
     API schema: [{json_data_object},{json_data_object},etc.]
     """
+    return collect_pages(ceph_volume_list_pages(config, limit, pool))
+
+
+def ceph_volume_list_pages(config, limit, pool):
+    """
+    Get list information about Ceph volumes (limited by {limit} and by {pool}) one page at a
+    time, as a generator of (True, page) or (False, message) tuples
+
+    API endpoint: GET /api/v1/storage/ceph/volume
+    API arguments: limit={limit}, pool={pool}, page_size={page_size}, cursor={cursor}
+    API schema: [{json_data_object},{json_data_object},etc.]
+    """
     params = dict()
     if limit:
         params["limit"] = limit
     if pool:
         params["pool"] = pool
 
-    response = call_api(config, "get", "/storage/ceph/volume", params=params)
-
-    if response.status_code == 200:
-        return True, response.json()
-    else:
-        return False, response.json().get("message", "")
+    return call_api_pages(config, "/storage/ceph/volume", params=params)
 
 
 def ceph_volume_add(config, pool, volume, size, force_flag=False):
@@ -1190,20 +1205,249 @@ def ceph_volume_add(config, pool, volume, size, force_flag=False):
     return retstatus, response.json().get("message", "")
 
 
-def ceph_volume_upload(config, pool, volume, image_format, image_file):
+# The size of each chunk of a chunked volume upload
+UPLOAD_CHUNK_SIZE = 64 * 1024 * 1024
+
+# The number of times a failed chunk is retried before a chunked upload fails
+UPLOAD_RETRIES = 3
+
+# The qcow2 header fields common to all versions, and the version 3 feature flags
+QCOW2_HEADER = struct.Struct(">4sIQIIQIIQQIIQ")
+QCOW2_FEATURES = struct.Struct(">Q")
+# Incompatible features which prevent reading the image directly: corrupt, external data
+# file and extended L2 entries; the dirty flag only affects refcounts and is ignored
+QCOW2_UNSUPPORTED_FEATURES = 0x02 | 0x04 | 0x10
+QCOW2_OFFSET_MASK = 0x00FFFFFFFFFFFE00
+QCOW2_COMPRESSED = 1 << 62
+QCOW2_ZERO = 1
+
+
+def get_qcow2_extents(image_file):
+    """
+    Get the virtual size and allocated data extents of a qcow2 image file
+
+    Returns (size, [(offset, file_offset, length), ...]), or None if the image uses features
+    which cannot be read directly (backing files, encryption, compressed clusters, etc.).
+    """
+    with open(image_file, "rb") as fh:
+        header = fh.read(QCOW2_HEADER.size + QCOW2_FEATURES.size)
+        if len(header) < QCOW2_HEADER.size:
+            return None
+        (
+            magic,
+            version,
+            backing_file_offset,
+            _,
+            cluster_bits,
+            size,
+            crypt_method,
+            l1_size,
+            l1_table_offset,
+            _,
+            _,
+            _,
+            _,
+        ) = QCOW2_HEADER.unpack(header[: QCOW2_HEADER.size])
+        if magic != b"QFI\xfb" or version not in [2, 3]:
+            return None
+        if backing_file_offset != 0 or crypt_method != 0:
+            return None
+        if version == 3:
+            (incompatible_features,) = QCOW2_FEATURES.unpack(
+                header[QCOW2_HEADER.size :]
+            )
+            if incompatible_features & QCOW2_UNSUPPORTED_FEATURES:
+                return None
+
+        cluster_size = 1 << cluster_bits
+        l2_entries = cluster_size // 8
+
+        fh.seek(l1_table_offset)
+        l1_table = struct.unpack(f">{l1_size}Q", fh.read(l1_size * 8))
+
+        extents = list()
+        for l1_index, l1_entry in enumerate(l1_table):
+            l2_offset = l1_entry & QCOW2_OFFSET_MASK
+            if not l2_offset:
+                continue
+            fh.seek(l2_offset)
+            l2_table = struct.unpack(f">{l2_entries}Q", fh.read(cluster_size))
+            for l2_index, l2_entry in enumerate(l2_table):
+                if l2_entry & QCOW2_COMPRESSED:
+                    return None
+                cluster_offset = l2_entry & QCOW2_OFFSET_MASK
+                if not cluster_offset or (version == 3 and l2_entry & QCOW2_ZERO):
+                    continue
+                offset = (l1_index * l2_entries + l2_index) * cluster_size
+                if offset >= size:
+                    break
+                length = min(cluster_size, size - offset)
+                # Merge clusters which are contiguous in both the image and the file
+                if extents:
+                    last_offset, last_file_offset, last_length = extents[-1]
+                    if (
+                        last_offset + last_length == offset
+                        and last_file_offset + last_length == cluster_offset
+                    ):
+                        extents[-1] = (
+                            last_offset,
+                            last_file_offset,
+                            last_length + length,
+                        )
+                        continue
+                extents.append((offset, cluster_offset, length))
+
+    return size, extents
+
+
+def ceph_volume_upload_chunked(
+    config, pool, volume, image_file, size, extents, resume=False
+):
+    """
+    Upload the raw data extents of a disk image to a Ceph volume in resumable chunks
+
+    API endpoint: PUT /api/v1/storage/ceph/volume/{pool}/{volume}/upload
+    API headers: Content-Range=bytes {start}-{end}/{size}
+    API arguments: initialize={initialize}
+    API schema: {"message":"{data}","offset":"{offset}","written":"{written}","skipped":"{skipped}"}
+    """
+    import click
+
+    request_uri = "/storage/ceph/volume/{}/{}/upload".format(pool, volume)
+
+    committed = 0
+    if resume:
+        response = call_api(config, "get", request_uri)
+        if response.status_code != 200:
+            return False, response.json().get("message", "")
+        if response.json().get("in_progress", False):
+            committed = int(response.json().get("offset", 0))
+            click.echo(
+                f"Resuming upload from offset {format_bytes_tohuman(committed)}..."
+            )
+
+    def send_chunk(start, data, initialize):
+        end = start + len(data) - 1
+        params = {"initialize": initialize}
+        for attempt in range(UPLOAD_RETRIES + 1):
+            headers = {
+                "Content-Type": "application/octet-stream",
+                "Content-Range": f"bytes {start}-{end}/{size}",
+            }
+            response = call_api(
+                config, "put", request_uri, headers=headers, params=params, data=data
+            )
+            if response.status_code == 200:
+                return True, ""
+            # The API is busy with other transfers; wait as long as it asks before retrying
+            if response.status_code == 503:
+                retry_after = response.headers.get("Retry-After", "")
+                sleep(int(retry_after) if retry_after.isdigit() else 1)
+                continue
+            # A previous attempt may have succeeded without us seeing the response
+            if (
+                response.status_code == 409
+                and int(response.json().get("offset", 0)) > end
+            ):
+                return True, ""
+            # The upload was initialized by a previous attempt; don't zero the volume again
+            if response.json().get("offset", None) is not None:
+                params = {"initialize": False}
+        return False, response.json().get("message", "")
+
+    zero_chunk = bytes(UPLOAD_CHUNK_SIZE)
+    initialize = not committed
+    sent_end = False
+    data_size = sum(length for _, _, length in extents)
+
+    click.echo(
+        "Uploading {} of data (total image size {})...".format(
+            format_bytes_tohuman(data_size), format_bytes_tohuman(size)
+        )
+    )
+    with open(image_file, "rb") as fh, click.progressbar(
+        length=data_size, width=20, show_eta=True
+    ) as bar:
+        for offset, file_offset, length in extents:
+            position = 0
+            while position < length:
+                chunk_length = min(UPLOAD_CHUNK_SIZE, length - position)
+                start = offset + position
+                # Skip data which was already committed by a previous upload
+                if start + chunk_length <= committed:
+                    bar.update(chunk_length)
+                    position += chunk_length
+                    continue
+                if start < committed:
+                    skip = committed - start
+                    bar.update(skip)
+                    position += skip
+                    continue
+
+                fh.seek(file_offset + position)
+                data = fh.read(chunk_length)
+                if len(data) != chunk_length:
+                    return (
+                        False,
+                        f"Failed to read image file at offset {file_offset + position}",
+                    )
+
+                # The volume is zeroed when the upload is initialized, so zero chunks are
+                # only ever sent to initialize it or to complete the upload
+                is_final = start + chunk_length == size
+                if initialize or is_final or data != zero_chunk[:chunk_length]:
+                    retflag, retmsg = send_chunk(start, data, initialize)
+                    if not retflag:
+                        click.echo()
+                        return False, retmsg
+                    initialize = False
+                    sent_end = is_final
+
+                bar.update(chunk_length)
+                position += chunk_length
+
+    # Complete the upload if its final byte was not part of any extent
+    if not sent_end:
+        retflag, retmsg = send_chunk(size - 1, b"\0", initialize)
+        if not retflag:
+            return False, retmsg
+
+    click.echo()
+
+    return True, "Wrote uploaded file to volume '{}' in pool '{}'.".format(volume, pool)
+
+
+def ceph_volume_upload(config, pool, volume, image_format, image_file, resume=False):
     """
     Upload a disk image to a Ceph volume
 
+    Raw and (most) qcow2 images are sent as resumable chunks of raw data, omitting all
+    unallocated and zero regions; other formats are converted on the remote side.
+
     API endpoint: POST /api/v1/storage/ceph/volume/{pool}/{volume}/upload
     API arguments: image_format={image_format}
     API schema: {"message":"{data}"}
     """
     import click
 
-    if image_format != "raw":
-        file_size = path.getsize(image_file)
-    else:
-        file_size = None
+    if image_format == "raw":
+        size = path.getsize(image_file)
+        return ceph_volume_upload_chunked(
+            config, pool, volume, image_file, size, [(0, 0, size)], resume=resume
+        )
+
+    if image_format == "qcow2":
+        qcow2_extents = get_qcow2_extents(image_file)
+        if qcow2_extents is not None:
+            size, extents = qcow2_extents
+            return ceph_volume_upload_chunked(
+                config, pool, volume, image_file, size, extents, resume=resume
+            )
+        click.echo(
+            "Image uses qcow2 features which require remote conversion; uploading whole file."
+        )
+
+    file_size = path.getsize(image_file)
 
     bar = UploadProgressBar(
         image_file, end_message="Parsing file on remote side...", end_nl=False
@@ -1323,7 +1567,7 @@ def ceph_volume_clone(config, pool, volume, new_volume, force_flag=False):
     return retstatus, response.json().get("message", "")
 
 
-def format_list_volume(config, volume_list):
+def format_list_volume(config, volume_list, header=True):
     # Handle empty list
     if not volume_list:
         volume_list = list()
@@ -1376,40 +1620,43 @@ def format_list_volume(config, volume_list):
         if _volume_features_length > volume_features_length:
             volume_features_length = _volume_features_length
 
-    # Format the output header
-    volume_list_output.append(
-        "{bold}{volume_header: <{volume_header_length}} {details_header: <{details_header_length}}{end_bold}".format(
-            bold=ansiprint.bold(),
-            end_bold=ansiprint.end(),
-            volume_header_length=volume_name_length + volume_pool_length + 1,
-            details_header_length=volume_size_length
-            + volume_objects_length
-            + volume_order_length
-            + volume_format_length
-            + volume_features_length
-            + 4,
-            volume_header="Volumes "
-            + "".join(["-" for _ in range(8, volume_name_length + volume_pool_length)]),
-            details_header="Details "
-            + "".join(
-                [
-                    "-"
-                    for _ in range(
-                        8,
-                        volume_size_length
-                        + volume_objects_length
-                        + volume_order_length
-                        + volume_format_length
-                        + volume_features_length
-                        + 3,
-                    )
-                ]
-            ),
+    if header:
+        # Format the output header
+        volume_list_output.append(
+            "{bold}{volume_header: <{volume_header_length}} {details_header: <{details_header_length}}{end_bold}".format(
+                bold=ansiprint.bold(),
+                end_bold=ansiprint.end(),
+                volume_header_length=volume_name_length + volume_pool_length + 1,
+                details_header_length=volume_size_length
+                + volume_objects_length
+                + volume_order_length
+                + volume_format_length
+                + volume_features_length
+                + 4,
+                volume_header="Volumes "
+                + "".join(
+                    ["-" for _ in range(8, volume_name_length + volume_pool_length)]
+                ),
+                details_header="Details "
+                + "".join(
+                    [
+                        "-"
+                        for _ in range(
+                            8,
+                            volume_size_length
+                            + volume_objects_length
+                            + volume_order_length
+                            + volume_format_length
+                            + volume_features_length
+                            + 3,
+                        )
+                    ]
+                ),
+            )
         )
-    )
 
-    volume_list_output.append(
-        "{bold}\
+        volume_list_output.append(
+            "{bold}\
 {volume_name: <{volume_name_length}} \
 {volume_pool: <{volume_pool_length}} \
 {volume_size: <{volume_size_length}} \
@@ -1418,26 +1665,26 @@ def format_list_volume(config, volume_list):
 {volume_format: <{volume_format_length}} \
 {volume_features: <{volume_features_length}} \
 {end_bold}".format(
-            bold=ansiprint.bold(),
-            end_bold=ansiprint.end(),
-            volume_name_length=volume_name_length,
-            volume_pool_length=volume_pool_length,
-            volume_size_length=volume_size_length,
-            volume_objects_length=volume_objects_length,
-            volume_order_length=volume_order_length,
-            volume_format_length=volume_format_length,
-            volume_features_length=volume_features_length,
-            volume_name="Name",
-            volume_pool="Pool",
-            volume_size="Size",
-            volume_objects="Objects",
-            volume_order="Order",
-            volume_format="Format",
-            volume_features="Features",
+                bold=ansiprint.bold(),
+                end_bold=ansiprint.end(),
+                volume_name_length=volume_name_length,
+                volume_pool_length=volume_pool_length,
+                volume_size_length=volume_size_length,
+                volume_objects_length=volume_objects_length,
+                volume_order_length=volume_order_length,
+                volume_format_length=volume_format_length,
+                volume_features_length=volume_features_length,
+                volume_name="Name",
+                volume_pool="Pool",
+                volume_size="Size",
+                volume_objects="Objects",
+                volume_order="Order",
+                volume_format="Format",
+                volume_features="Features",
+            )
         )
-    )
 
-    for volume_information in sorted(volume_list, key=lambda v: v["pool"] + v["name"]):
+    for volume_information in sorted(volume_list, key=lambda v: (v["pool"], v["name"])):
         volume_list_output.append(
             "{bold}\
 {volume_name: <{volume_name_length}} \
@@ -1512,6 +1759,18 @@ def ceph_snapshot_list(config, limit, volume, pool):
     API arguments: limit={limit}, volume={volume}, pool={pool}
     API schema: [{json_data_object},{json_data_object},etc.]
     """
+    return collect_pages(ceph_snapshot_list_pages(config, limit, volume, pool))
+
+
+def ceph_snapshot_list_pages(config, limit, volume, pool):
+    """
+    Get list information about Ceph snapshots (limited by {limit}, by {pool}, or by {volume})
+    one page at a time, as a generator of (True, page) or (False, message) tuples
+
+    API endpoint: GET /api/v1/storage/ceph/snapshot
+    API arguments: limit={limit}, volume={volume}, pool={pool}, page_size={page_size}, cursor={cursor}
+    API schema: [{json_data_object},{json_data_object},etc.]
+    """
     params = dict()
     if limit:
         params["limit"] = limit
@@ -1520,12 +1779,7 @@ def ceph_snapshot_list(config, limit, volume, pool):
     if pool:
         params["pool"] = pool
 
-    response = call_api(config, "get", "/storage/ceph/snapshot", params=params)
-
-    if response.status_code == 200:
-        return True, response.json()
-    else:
-        return False, response.json().get("message", "")
+    return call_api_pages(config, "/storage/ceph/snapshot", params=params)
 
 
 def ceph_snapshot_add(config, pool, volume, snapshot):
@@ -1625,7 +1879,7 @@ def ceph_snapshot_modify(config, pool, volume, snapshot, new_name=None):
     return retstatus, response.json().get("message", "")
 
 
-def format_list_snapshot(config, snapshot_list):
+def format_list_snapshot(config, snapshot_list, header=True):
     # Handle empty list
     if not snapshot_list:
         snapshot_list = list()
@@ -1656,50 +1910,51 @@ def format_list_snapshot(config, snapshot_list):
         if _snapshot_pool_length > snapshot_pool_length:
             snapshot_pool_length = _snapshot_pool_length
 
-    # Format the output header
-    snapshot_list_output.append(
-        "{bold}{snapshot_header: <{snapshot_header_length}}{end_bold}".format(
-            bold=ansiprint.bold(),
-            end_bold=ansiprint.end(),
-            snapshot_header_length=snapshot_name_length
-            + snapshot_volume_length
-            + snapshot_pool_length
-            + 2,
-            snapshot_header="Snapshots "
-            + "".join(
-                [
-                    "-"
-                    for _ in range(
-                        10,
-                        snapshot_name_length
-                        + snapshot_volume_length
-                        + snapshot_pool_length
-                        + 1,
-                    )
-                ]
-            ),
+    if header:
+        # Format the output header
+        snapshot_list_output.append(
+            "{bold}{snapshot_header: <{snapshot_header_length}}{end_bold}".format(
+                bold=ansiprint.bold(),
+                end_bold=ansiprint.end(),
+                snapshot_header_length=snapshot_name_length
+                + snapshot_volume_length
+                + snapshot_pool_length
+                + 2,
+                snapshot_header="Snapshots "
+                + "".join(
+                    [
+                        "-"
+                        for _ in range(
+                            10,
+                            snapshot_name_length
+                            + snapshot_volume_length
+                            + snapshot_pool_length
+                            + 1,
+                        )
+                    ]
+                ),
+            )
         )
-    )
 
-    snapshot_list_output.append(
-        "{bold}\
+        snapshot_list_output.append(
+            "{bold}\
 {snapshot_name: <{snapshot_name_length}} \
 {snapshot_volume: <{snapshot_volume_length}} \
 {snapshot_pool: <{snapshot_pool_length}} \
 {end_bold}".format(
-            bold=ansiprint.bold(),
-            end_bold=ansiprint.end(),
-            snapshot_name_length=snapshot_name_length,
-            snapshot_volume_length=snapshot_volume_length,
-            snapshot_pool_length=snapshot_pool_length,
-            snapshot_name="Name",
-            snapshot_volume="Volume",
-            snapshot_pool="Pool",
+                bold=ansiprint.bold(),
+                end_bold=ansiprint.end(),
+                snapshot_name_length=snapshot_name_length,
+                snapshot_volume_length=snapshot_volume_length,
+                snapshot_pool_length=snapshot_pool_length,
+                snapshot_name="Name",
+                snapshot_volume="Volume",
+                snapshot_pool="Pool",
+            )
         )
-    )
 
     for snapshot_information in sorted(
-        snapshot_list, key=lambda s: s["pool"] + s["volume"] + s["snapshot"]
+        snapshot_list, key=lambda s: (s["pool"], s["volume"], s["snapshot"])
     ):
         snapshot_name = snapshot_information["snapshot"]
         snapshot_volume = snapshot_information["volume"]
@@ -1727,18 +1982,41 @@ def format_list_snapshot(config, snapshot_list):
 #
 # Benchmark functions
 #
-def ceph_benchmark_run(config, pool, name, wait_flag):
+def ceph_benchmark_run(
+    config,
+    pool,
+    name,
+    wait_flag,
+    profile=None,
+    matrix=None,
+    clients=None,
+    runtime=None,
+):
     """
     Run a storage benchmark against {pool}
 
     API endpoint: POST /api/v1/storage/ceph/benchmark
-    API arguments: pool={pool}, name={name}
+    API arguments: pool={pool}, name={name}, profile={profile}, matrix={matrix}, clients={clients}, runtime={runtime}
     API schema: {message}
     """
     params = {"pool": pool}
     if name:
         params["name"] = name
-    response = call_api(config, "post", "/storage/ceph/benchmark", params=params)
+    if profile is not None:
+        params["profile"] = profile
+    if clients is not None:
+        params["clients"] = clients
+    if runtime is not None:
+        params["runtime"] = runtime
+
+    # The test matrix may be large, so send it in the request body
+    data = None
+    if matrix is not None:
+        data = {"matrix": matrix}
+
+    response = call_api(
+        config, "post", "/storage/ceph/benchmark", params=params, data=data
+    )
 
     return get_wait_retdata(response, wait_flag)
 
@@ -1804,6 +2082,28 @@ def get_benchmark_list_results_json(benchmark_data):
     return benchmark_bandwidth, benchmark_iops
 
 
+def get_benchmark_list_results_profile(benchmark_data):
+    benchmark_bandwidth = dict()
+    benchmark_iops = dict()
+    for test in ["seq_read", "seq_write", "rand_read_4K", "rand_write_4K"]:
+        # Profiles and custom matrices need not include every listed test
+        benchmark_bandwidth[test] = "N/A"
+        benchmark_iops[test] = "N/A"
+        if test not in benchmark_data["tests"]:
+            continue
+        benchmark_test_data = benchmark_data["tests"][test]["overall"]
+        for io_class in ["read", "write"]:
+            if io_class in benchmark_test_data:
+                benchmark_bandwidth[test] = format_bytes_tohuman(
+                    int(benchmark_test_data[io_class]["bw_bytes"])
+                )
+                benchmark_iops[test] = format_ops_tohuman(
+                    int(benchmark_test_data[io_class]["iops"])
+                )
+
+    return benchmark_bandwidth, benchmark_iops
+
+
 def get_benchmark_list_results(benchmark_format, benchmark_data):
     if benchmark_format == 0:
         benchmark_bandwidth, benchmark_iops = get_benchmark_list_results_legacy(
@@ -1813,6 +2113,10 @@ def get_benchmark_list_results(benchmark_format, benchmark_data):
         benchmark_bandwidth, benchmark_iops = get_benchmark_list_results_json(
             benchmark_data
         )
+    elif benchmark_format == 3:
+        benchmark_bandwidth, benchmark_iops = get_benchmark_list_results_profile(
+            benchmark_data
+        )
 
     seq_benchmark_bandwidth = "{} / {}".format(
         benchmark_bandwidth["seq_read"], benchmark_bandwidth["seq_write"]
@@ -2012,6 +2316,7 @@ def format_info_benchmark(config, benchmark_information):
         0: format_info_benchmark_legacy,
         1: format_info_benchmark_json,
         2: format_info_benchmark_json,
+        3: format_info_benchmark_profile,
     }
 
     benchmark_version = benchmark_information[0]["test_format"]
@@ -2742,3 +3047,303 @@ def format_info_benchmark_json(config, benchmark_information):
             )
 
     return "\n".join(ainformation) + "\n"
+
+
+def format_benchmark_test_name(test, test_spec):
+    return "{} ({} {} blocks, queue depth {}, {} job(s))".format(
+        test,
+        test_spec["rw"],
+        test_spec["bs"],
+        test_spec["iodepth"],
+        test_spec.get("numjobs", "1"),
+    )
+
+
+def format_info_benchmark_profile(config, benchmark_information):
+    if benchmark_information["benchmark_result"] == "Running":
+        return "Benchmark test is still running."
+
+    benchmark_format = benchmark_information["test_format"]
+    benchmark_details = benchmark_information["benchmark_result"]
+
+    header_width = MAX_CONTENT_WIDTH if MAX_CONTENT_WIDTH <= 120 else 120
+
+    # Format a nice output; do this line-by-line then concat the elements at the end
+    ainformation = []
+    ainformation.append(
+        "{}Storage Benchmark details (format {}):{}".format(
+            ansiprint.bold(), benchmark_format, ansiprint.end()
+        )
+    )
+    ainformation.append("")
+    ainformation.append(
+        "{}Profile:{}          {}".format(
+            ansiprint.purple(), ansiprint.end(), benchmark_details["profile"]
+        )
+    )
+    ainformation.append(
+        "{}Pool:{}             {}".format(
+            ansiprint.purple(), ansiprint.end(), benchmark_details["pool"]
+        )
+    )
+    ainformation.append(
+        "{}Clients:{}          {}".format(
+            ansiprint.purple(), ansiprint.end(), ", ".join(benchmark_details["clients"])
+        )
+    )
+    ainformation.append(
+        "{}Runtime:{}          {}s per test (+{}s ramp)".format(
+            ansiprint.purple(),
+            ansiprint.end(),
+            benchmark_details["runtime"],
+            benchmark_details["ramp_time"],
+        )
+    )
+    ainformation.append(
+        "{}Volume size:{}      {} per client".format(
+            ansiprint.purple(), ansiprint.end(), benchmark_details["volume_size"]
+        )
+    )
+
+    for test, test_details in benchmark_details["tests"].items():
+        test_name = format_benchmark_test_name(test, test_details["spec"])
+
+        ainformation.append("")
+        ainformation.append(
+            "{}{} {}{}".format(
+                ansiprint.bold(),
+                test_name,
+                "-" * max(0, header_width - len(test_name) - 4),
+                ansiprint.end(),
+            )
+        )
+
+        for io_class, overall in test_details["overall"].items():
+            percentiles = overall["clat_ns"]["percentile"]
+            ainformation.append(
+                "{}Overall {}:{}  BW/s {}  IOPS {}  I/O {}".format(
+                    ansiprint.purple(),
+                    io_class,
+                    ansiprint.end(),
+                    format_bytes_tohuman(int(overall["bw_bytes"])),
+                    format_ops_tohuman(int(overall["iops"])),
+                    format_bytes_tohuman(int(overall["io_bytes"])),
+                )
+            )
+            ainformation.append(
+                "  {}Latency (μs):{}      min {}  mean {}  max {}".format(
+                    ansiprint.bold(),
+                    ansiprint.end(),
+                    round(int(overall["clat_ns"]["min"] or 0) / 1000, 1),
+                    round(float(overall["clat_ns"]["mean"]) / 1000, 1),
+                    round(int(overall["clat_ns"]["max"]) / 1000, 1),
+                )
+            )
+            ainformation.append(
+                "  {}Percentiles (μs):{}  {}".format(
+                    ansiprint.bold(),
+                    ansiprint.end(),
+                    "  ".join(
+                        "p{:g} {}".format(
+                            float(percentile), round(int(value) / 1000, 1)
+                        )
+                        for percentile, value in sorted(
+                            percentiles.items(), key=lambda p: float(p[0])
+                        )
+                    ),
+                )
+            )
+
+        ainformation.append(
+            "{bold}  {node: <16} {bw: >10} {iops: >10} {p99: >12} {cpu: >8} {osd_cpu: >8} {net: >10}{end_bold}".format(
+                bold=ansiprint.bold(),
+                end_bold=ansiprint.end(),
+                node="Client",
+                bw="BW/s",
+                iops="IOPS",
+                p99="p99 (μs)",
+                cpu="CPU %",
+                osd_cpu="OSD %",
+                net="Net (bps)",
+            )
+        )
+        for node, client in test_details["clients"].items():
+            job = client["fio"]["jobs"][0]
+            io_class = "read" if job["read"]["io_bytes"] > 0 else "write"
+            p99 = job[io_class]["clat_ns"].get("percentile", {}).get("99.000000")
+            ainformation.append(
+                "  {node: <16} {bw: >10} {iops: >10} {p99: >12} {cpu: >8} {osd_cpu: >8} {net: >10}".format(
+                    node=node,
+                    bw=format_bytes_tohuman(int(job[io_class]["bw_bytes"])),
+                    iops=format_ops_tohuman(int(job[io_class]["iops"])),
+                    p99=round(int(p99) / 1000, 1) if p99 is not None else "N/A",
+                    cpu=client["resources"]["avg_cpu_util_percent"]["total"],
+                    osd_cpu=client["resources"]["avg_cpu_util_percent"]["ceph-osd"],
+                    net=format_bytes_tohuman(
+                        int(client["resources"]["avg_network_util_bps"]["total"])
+                    ),
+                )
+            )
+
+        if test_details["osd_perf"]:
+            ainformation.append(
+                "{bold}  {osd: <16} {commit: >21} {apply: >21}{end_bold}".format(
+                    bold=ansiprint.bold(),
+                    end_bold=ansiprint.end(),
+                    osd="OSD",
+                    commit="Commit avg/max (ms)",
+                    apply="Apply avg/max (ms)",
+                )
+            )
+            for osd, osd_perf in test_details["osd_perf"].items():
+                ainformation.append(
+                    "  {osd: <16} {commit: >21} {apply: >21}".format(
+                        osd=f"osd.{osd}",
+                        commit="{} / {}".format(
+                            osd_perf["commit_latency_ms"]["avg"],
+                            osd_perf["commit_latency_ms"]["max"],
+                        ),
+                        apply="{} / {}".format(
+                            osd_perf["apply_latency_ms"]["avg"],
+                            osd_perf["apply_latency_ms"]["max"],
+                        ),
+                    )
+                )
+
+    return "\n".join(ainformation) + "\n"
+
+
+def get_benchmark_compare_results(benchmark_format, benchmark_data):
+    """
+    Return the overall bandwidth, IOPS and completion latency percentiles of each test of a
+    benchmark result, in a common form for any result format which records them
+    """
+    if benchmark_format in [1, 2]:
+        tests = {
+            test: test_data["jobs"][0] for test, test_data in benchmark_data.items()
+        }
+    elif benchmark_format == 3:
+        tests = {
+            test: test_data["overall"]
+            for test, test_data in benchmark_data["tests"].items()
+        }
+    else:
+        return None
+
+    results = dict()
+    for test, test_data in tests.items():
+        for io_class in ["read", "write"]:
+            if io_class not in test_data or test_data[io_class]["io_bytes"] < 1:
+                continue
+            percentiles = test_data[io_class]["clat_ns"].get("percentile", {})
+            results[test] = {
+                "bw_bytes": int(test_data[io_class]["bw_bytes"]),
+                "iops": int(test_data[io_class]["iops"]),
+                "p50": percentiles.get("50.000000"),
+                "p99": percentiles.get("99.000000"),
+                "p99.9": percentiles.get("99.900000"),
+            }
+
+    return results
+
+
+def format_compare_benchmark(config, benchmark_information):
+    """
+    Format a comparison of the results of several benchmark jobs, relative to the first
+    """
+    benchmark_results = list()
+    for benchmark in benchmark_information:
+        if benchmark["benchmark_result"] == "Running":
+            return f"Benchmark job {benchmark['job']} is still running."
+        results = get_benchmark_compare_results(
+            benchmark.get("test_format", 0), benchmark["benchmark_result"]
+        )
+        if results is None:
+            return f"Benchmark job {benchmark['job']} uses legacy format {benchmark.get('test_format', 0)}, which cannot be compared."
+        benchmark_results.append((benchmark["job"], results))
+
+    base_job, base_results = benchmark_results[0]
+
+    def format_column(text, value, base_value, lower_is_better=False):
+        # Pad by the visible width, since colour codes take no space on the terminal
+        if value is None or base_value is None or int(base_value) == 0:
+            return f"{text: <20}"
+        change = (int(value) - int(base_value)) / int(base_value) * 100
+        change_text = f"({change:+.1f}%)"
+        padding = " " * max(0, 20 - len(text) - len(change_text) - 1)
+        if round(change, 1) == 0:
+            return f"{text} {change_text}{padding}"
+        if (change > 0) != lower_is_better:
+            colour = ansiprint.green()
+        else:
+            colour = ansiprint.red()
+        return f"{text} {colour}{change_text}{ansiprint.end()}{padding}"
+
+    def format_latency(value):
+        return str(round(int(value) / 1000, 1)) if value is not None else "N/A"
+
+    job_length = max(len(job) for job, _ in benchmark_results) + 1
+
+    ainformation = []
+    ainformation.append(
+        "{}Storage Benchmark comparison against {}:{}".format(
+            ansiprint.bold(), base_job, ansiprint.end()
+        )
+    )
+
+    tests = list(base_results.keys())
+    for _, results in benchmark_results[1:]:
+        tests.extend(test for test in results if test not in tests)
+
+    for test in tests:
+        ainformation.append("")
+        ainformation.append("{}{}{}".format(ansiprint.bold(), test, ansiprint.end()))
+        ainformation.append(
+            "{bold}  {job: <{job_length}} {bw: <20} {iops: <20} {p50: <20} {p99: <20} {p999: <20}{end_bold}".format(
+                bold=ansiprint.bold(),
+                end_bold=ansiprint.end(),
+                job="Job",
+                job_length=job_length,
+                bw="BW/s",
+                iops="IOPS",
+                p50="p50 (μs)",
+                p99="p99 (μs)",
+                p999="p99.9 (μs)",
+            )
+        )
+        base_test = base_results.get(test, dict())
+        for job, results in benchmark_results:
+            if test not in results:
+                ainformation.append(
+                    "  {job: <{job_length}} N/A".format(job=job, job_length=job_length)
+                )
+                continue
+            result = results[test]
+            columns = [
+                format_column(
+                    format_bytes_tohuman(result["bw_bytes"]),
+                    result["bw_bytes"],
+                    base_test.get("bw_bytes"),
+                ),
+                format_column(
+                    format_ops_tohuman(result["iops"]),
+                    result["iops"],
+                    base_test.get("iops"),
+                ),
+            ]
+            for percentile in ["p50", "p99", "p99.9"]:
+                columns.append(
+                    format_column(
+                        format_latency(result[percentile]),
+                        result[percentile],
+                        base_test.get(percentile),
+                        lower_is_better=True,
+                    )
+                )
+            ainformation.append(
+                "  {job: <{job_length}} {columns}".format(
+                    job=job, job_length=job_length, columns=" ".join(columns)
+                )
+            )
+
+    return "\n".join(ainformation) + "\n"
@@ -22,13 +22,18 @@
 import time
 import re
 
+from collections import deque
+
 import pvc.lib.ansiprint as ansiprint
 from pvc.lib.common import (
     call_api,
+    call_api_pages,
+    collect_pages,
     format_bytes,
     format_metric,
     format_age,
     get_wait_retdata,
+    stream_api,
 )
 
 
@@ -68,6 +73,20 @@ def vm_list(config, limit, target_node, target_state, target_tag, negate):
     API arguments: limit={limit}, node={target_node}, state={target_state}, tag={target_tag}, negate={negate}
     API schema: [{json_data_object},{json_data_object},etc.]
     """
+    return collect_pages(
+        vm_list_pages(config, limit, target_node, target_state, target_tag, negate)
+    )
+
+
+def vm_list_pages(config, limit, target_node, target_state, target_tag, negate):
+    """
+    Get list information about VMs (limited by {limit}, {target_node}, or {target_state}) one
+    page at a time, as a generator of (True, page) or (False, message) tuples
+
+    API endpoint: GET /api/v1/vm
+    API arguments: limit={limit}, node={target_node}, state={target_state}, tag={target_tag}, negate={negate}, page_size={page_size}, cursor={cursor}
+    API schema: [{json_data_object},{json_data_object},etc.]
+    """
     params = dict()
     if limit:
         params["limit"] = limit
@@ -79,12 +98,7 @@ def vm_list(config, limit, target_node, target_state, target_tag, negate):
         params["tag"] = target_tag
     params["negate"] = negate
 
-    response = call_api(config, "get", "/vm", params=params)
-
-    if response.status_code == 200:
-        return True, response.json()
-    else:
-        return False, response.json().get("message", "")
+    return call_api_pages(config, "/vm", params=params)
 
 
 def vm_define(
@@ -214,13 +228,14 @@ def vm_metadata(
     node_autostart,
     migration_method,
     migration_max_downtime,
+    migration_profile,
     provisioner_profile,
 ):
     """
     Modify PVC metadata of a VM
 
     API endpoint: POST /vm/{vm}/meta
-    API arguments: limit={node_limit}, selector={node_selector}, autostart={node_autostart}, migration_method={migration_method} profile={provisioner_profile}
+    API arguments: limit={node_limit}, selector={node_selector}, autostart={node_autostart}, migration_method={migration_method}, migration_max_downtime={migration_max_downtime}, migration_profile={migration_profile}, profile={provisioner_profile}
     API schema: {"message":"{data}"}
     """
     params = dict()
@@ -241,6 +256,9 @@ def vm_metadata(
     if migration_max_downtime is not None:
         params["migration_max_downtime"] = migration_max_downtime
 
+    if migration_profile is not None:
+        params["migration_profile"] = migration_profile
+
     if provisioner_profile is not None:
         params["profile"] = provisioner_profile
 
@@ -402,6 +420,224 @@ def vm_state(config, vm, target_state, force=False, wait=False):
     return retstatus, response.json().get("message", "")
 
 
+def vm_bulk_selection(vms, tag, node, state):
+    """
+    Return the API arguments selecting VMs for a bulk action
+    """
+    params = dict()
+
+    if vms:
+        params["select_vm"] = list(vms)
+
+    if tag is not None:
+        params["select_tag"] = tag
+
+    if node is not None:
+        params["select_node"] = node
+
+    if state is not None:
+        params["select_state"] = state
+
+    return params
+
+
+def vm_bulk_result(response):
+    """
+    Return the status and data of a bulk action response: the full response if it contains per-VM
+    results, otherwise its message
+    """
+    if response.status_code == 200:
+        retstatus = True
+    else:
+        retstatus = False
+
+    retdata = response.json()
+    if "results" not in retdata:
+        retdata = retdata.get("message", "")
+
+    return retstatus, retdata
+
+
+def vm_bulk_state(
+    config,
+    target_state,
+    vms=None,
+    tag=None,
+    node=None,
+    state=None,
+    force=False,
+    wait=False,
+    concurrency=32,
+):
+    """
+    Modify the current state of all selected VMs
+
+    API endpoint: POST /vm-bulk/state
+    API arguments: state={target_state}, force={force}, wait={wait}, select_vm={vms}, select_tag={tag}, select_node={node}, select_state={state}, concurrency={concurrency}
+    API schema: {"message":"{data}","results":[{"name":"{name}","uuid":"{uuid}","result":{result},"message":"{message}"},...]}
+    """
+    params = {
+        "state": target_state,
+        "force": str(force).lower(),
+        "wait": str(wait).lower(),
+        "concurrency": concurrency,
+    }
+    params.update(vm_bulk_selection(vms, tag, node, state))
+
+    response = call_api(config, "post", "/vm-bulk/state", params=params)
+
+    return vm_bulk_result(response)
+
+
+def vm_bulk_tag_set(
+    config,
+    action,
+    tag,
+    protected=False,
+    vms=None,
+    select_tag=None,
+    node=None,
+    state=None,
+    concurrency=32,
+):
+    """
+    Modify PVC tags of all selected VMs
+
+    API endpoint: POST /vm-bulk/tags
+    API arguments: action={action}, tag={tag}, protected={protected}, select_vm={vms}, select_tag={select_tag}, select_node={node}, select_state={state}, concurrency={concurrency}
+    API schema: {"message":"{data}","results":[{"name":"{name}","uuid":"{uuid}","result":{result},"message":"{message}"},...]}
+    """
+    params = {
+        "action": action,
+        "tag": tag,
+        "protected": str(protected).lower(),
+        "concurrency": concurrency,
+    }
+    params.update(vm_bulk_selection(vms, select_tag, node, state))
+
+    response = call_api(config, "post", "/vm-bulk/tags", params=params)
+
+    return vm_bulk_result(response)
+
+
+def vm_bulk_metadata(
+    config,
+    node_limit,
+    node_selector,
+    node_autostart,
+    migration_method,
+    migration_max_downtime,
+    migration_profile,
+    provisioner_profile,
+    vms=None,
+    tag=None,
+    node=None,
+    state=None,
+):
+    """
+    Modify PVC metadata of all selected VMs
+
+    API endpoint: POST /vm-bulk/meta
+    API arguments: limit={node_limit}, selector={node_selector}, autostart={node_autostart}, migration_method={migration_method}, migration_max_downtime={migration_max_downtime}, migration_profile={migration_profile}, profile={provisioner_profile}, select_vm={vms}, select_tag={tag}, select_node={node}, select_state={state}
+    API schema: {"message":"{data}","results":[{"name":"{name}","uuid":"{uuid}","result":{result},"message":"{message}"},...]}
+    """
+    params = dict()
+
+    # Update any params that we've sent
+    if node_limit is not None:
+        params["limit"] = node_limit
+
+    if node_selector is not None:
+        params["selector"] = node_selector
+
+    if node_autostart is not None:
+        params["autostart"] = node_autostart
+
+    if migration_method is not None:
+        params["migration_method"] = migration_method
+
+    if migration_max_downtime is not None:
+        params["migration_max_downtime"] = migration_max_downtime
+
+    if migration_profile is not None:
+        params["migration_profile"] = migration_profile
+
+    if provisioner_profile is not None:
+        params["profile"] = provisioner_profile
+
+    params.update(vm_bulk_selection(vms, tag, node, state))
+
+    response = call_api(config, "post", "/vm-bulk/meta", params=params)
+
+    return vm_bulk_result(response)
+
+
+def format_vm_bulk_results(config, data):
+    """
+    Format the per-VM results of a bulk action in a nice table
+    """
+
+    if not isinstance(data, dict):
+        return data
+
+    results = data.get("results", [])
+
+    if len(results) < 1:
+        return "No VMs selected."
+
+    output_list = []
+
+    result_name_length = 5
+    result_result_length = 7
+    for result in results:
+        _result_name_length = len(result["name"]) + 1
+        if _result_name_length > result_name_length:
+            result_name_length = _result_name_length
+
+    output_list.append(
+        "{bold}{result_name: <{result_name_length}}  \
+{result_result: <{result_result_length}}  \
+{result_message}{end_bold}".format(
+            result_name_length=result_name_length,
+            result_result_length=result_result_length,
+            bold=ansiprint.bold(),
+            end_bold=ansiprint.end(),
+            result_name="Name",
+            result_result="Result",
+            result_message="Message",
+        )
+    )
+
+    for result in results:
+        if result["result"]:
+            result_colour = ansiprint.green()
+            result_result = "OK"
+        else:
+            result_colour = ansiprint.red()
+            result_result = "Failed"
+
+        output_list.append(
+            "{bold}{result_name: <{result_name_length}}  \
+{result_colour}{result_result: <{result_result_length}}{end_colour}  \
+{result_message}{end_bold}".format(
+                result_name_length=result_name_length,
+                result_result_length=result_result_length,
+                bold="",
+                end_bold="",
+                result_colour=result_colour,
+                end_colour=ansiprint.end(),
+                result_name=result["name"],
+                result_result=result_result,
+                result_message=result["message"],
+            )
+        )
+
+    output_list.append("")
+    output_list.append(data.get("message", ""))
+
+    return "\n".join(output_list)
+
+
 def vm_node(config, vm, target_node, action, force=False, wait=False, force_live=False):
     """
     Modify the current node of VM via {action}
@@ -483,19 +719,30 @@ def vm_remove_backup(config, vm, backup_path, backup_datestring):
         return True, response.json().get("message", "")
 
 
-def vm_restore(config, vm, backup_path, backup_datestring, retain_snapshot=False):
+def vm_restore(
+    config,
+    vm,
+    backup_path,
+    backup_datestring,
+    retain_snapshot=False,
+    volume_concurrency=2,
+    bandwidth_limit=None,
+):
     """
     Restore a backup of {vm} and its volumes from a local primary coordinator filesystem path
 
     API endpoint: POST /vm/{vm}/restore
-    API arguments: backup_path={backup_path}, backup_datestring={backup_datestring}, retain_snapshot={retain_snapshot}
+    API arguments: backup_path={backup_path}, backup_datestring={backup_datestring}, retain_snapshot={retain_snapshot}, volume_concurrency={volume_concurrency}, bandwidth_limit={bandwidth_limit}
     API schema: {"message":"{data}"}
     """
     params = {
         "backup_path": backup_path,
         "backup_datestring": backup_datestring,
         "retain_snapshot": retain_snapshot,
+        "volume_concurrency": volume_concurrency,
     }
+    if bandwidth_limit is not None:
+        params["bandwidth_limit"] = bandwidth_limit
     response = call_api(config, "post", "/vm/{vm}/restore".format(vm=vm), params=params)
 
     if response.status_code != 200:
@@ -504,17 +751,19 @@ def vm_restore(config, vm, backup_path, backup_datestring, retain_snapshot=False
         return True, response.json().get("message", "")
 
 
-def vm_create_snapshot(config, vm, snapshot_name=None, wait_flag=True):
+def vm_create_snapshot(config, vm, snapshot_name=None, fsfreeze=False, wait_flag=True):
     """
     Take a snapshot of a VM's disks and configuration
 
     API endpoint: POST /vm/{vm}/snapshot
-    API arguments: snapshot_name=snapshot_name
+    API arguments: snapshot_name=snapshot_name, fsfreeze=fsfreeze
     API schema: {"message":"{data}"}
     """
     params = dict()
     if snapshot_name is not None:
         params["snapshot_name"] = snapshot_name
+    if fsfreeze:
+        params["fsfreeze"] = fsfreeze
     response = call_api(
         config, "post", "/vm/{vm}/snapshot".format(vm=vm), params=params
     )
@@ -555,19 +804,26 @@ def vm_rollback_snapshot(config, vm, snapshot_name, wait_flag=True):
 
 
 def vm_export_snapshot(
-    config, vm, snapshot_name, export_path, incremental_parent=None, wait_flag=True
+    config,
+    vm,
+    snapshot_name,
+    export_path,
+    incremental_parent=None,
+    export_format="rbd",
+    wait_flag=True,
 ):
     """
     Export an (existing) snapshot of a VM's disks and configuration to export_path, optionally
     incremental with incremental_parent
 
     API endpoint: POST /vm/{vm}/snapshot/export
-    API arguments: snapshot_name=snapshot_name, export_path=export_path, incremental_parent=incremental_parent
+    API arguments: snapshot_name=snapshot_name, export_path=export_path, incremental_parent=incremental_parent, export_format=export_format
     API schema: {"message":"{data}"}
     """
     params = {
         "snapshot_name": snapshot_name,
         "export_path": export_path,
+        "export_format": export_format,
     }
     if incremental_parent is not None:
         params["incremental_parent"] = incremental_parent
@@ -580,20 +836,30 @@ def vm_export_snapshot(
 
 
 def vm_import_snapshot(
-    config, vm, snapshot_name, import_path, retain_snapshot=False, wait_flag=True
+    config,
+    vm,
+    snapshot_name,
+    import_path,
+    retain_snapshot=False,
+    volume_concurrency=2,
+    bandwidth_limit=None,
+    wait_flag=True,
 ):
     """
     Import a snapshot of {vm} and its volumes from a local primary coordinator filesystem path
 
     API endpoint: POST /vm/{vm}/snapshot/import
-    API arguments: snapshot_name={snapshot_name}, import_path={import_path}, retain_snapshot={retain_snapshot}
+    API arguments: snapshot_name={snapshot_name}, import_path={import_path}, retain_snapshot={retain_snapshot}, volume_concurrency={volume_concurrency}, bandwidth_limit={bandwidth_limit}
     API schema: {"message":"{data}"}
     """
     params = {
         "snapshot_name": snapshot_name,
         "import_path": import_path,
         "retain_snapshot": retain_snapshot,
+        "volume_concurrency": volume_concurrency,
     }
+    if bandwidth_limit is not None:
+        params["bandwidth_limit"] = bandwidth_limit
     response = call_api(
         config, "post", "/vm/{vm}/snapshot/import".format(vm=vm), params=params
     )
@@ -610,6 +876,9 @@ def vm_send_snapshot(
     destination_api_verify_ssl=True,
     destination_storage_pool=None,
     incremental_parent=None,
+    compression="zstd",
+    volume_concurrency=2,
+    stream_concurrency=4,
     wait_flag=True,
 ):
     """
@@ -617,7 +886,7 @@ def vm_send_snapshot(
     incremental with incremental_parent
 
     API endpoint: POST /vm/{vm}/snapshot/send
-    API arguments: snapshot_name=snapshot_name, destination_api_uri=destination_api_uri, destination_api_key=destination_api_key, destination_api_verify_ssl=destination_api_verify_ssl, incremental_parent=incremental_parent, destination_storage_pool=destination_storage_pool
+    API arguments: snapshot_name=snapshot_name, destination_api_uri=destination_api_uri, destination_api_key=destination_api_key, destination_api_verify_ssl=destination_api_verify_ssl, incremental_parent=incremental_parent, destination_storage_pool=destination_storage_pool, compression=compression, volume_concurrency=volume_concurrency, stream_concurrency=stream_concurrency
     API schema: {"message":"{data}"}
     """
     params = {
@@ -625,6 +894,9 @@ def vm_send_snapshot(
         "destination_api_uri": destination_api_uri,
         "destination_api_key": destination_api_key,
         "destination_api_verify_ssl": destination_api_verify_ssl,
+        "compression": compression,
+        "volume_concurrency": volume_concurrency,
+        "stream_concurrency": stream_concurrency,
     }
     if destination_storage_pool is not None:
         params["destination_storage_pool"] = destination_storage_pool
@@ -1667,24 +1939,49 @@ def follow_console_log(config, vm, lines=10):
     """
     Return and follow console log lines from the API
 
-    API endpoint: GET /vm/{vm}/console
+    The console log is streamed from the API if possible, otherwise (or if the stream fails) the
+    API is polled every half-second.
+
+    API endpoint: GET /vm/{vm}/console/stream, or GET /vm/{vm}/console
     API arguments: lines={lines}
-    API schema: {"name":"{vmname}","data":"{console_log}"}
+    API schema: {"lines":["{console_line}"]}, or {"name":"{vmname}","data":"{console_log}"}
     """
-    # We always grab 200 to match the follow call, but only _show_ `lines` number
-    params = {"lines": 200}
-    response = call_api(config, "get", "/vm/{vm}/console".format(vm=vm), params=params)
+    # Buffer streamed lines, so polling can continue from them if the stream fails
+    streamed_lines = deque(maxlen=200)
 
-    if response.status_code != 200:
-        return False, response.json().get("message", "")
+    events = stream_api(
+        config, "/vm/{vm}/console/stream".format(vm=vm), params={"lines": lines}
+    )
+    if events is not None:
+        try:
+            for event, data in events:
+                if event == "end":
+                    return True, ""
+                for line in data.get("lines", []):
+                    streamed_lines.append(line)
+                    print(line)
+        except Exception:
+            pass
 
-    # Shrink the log buffer to length lines
-    console_log = response.json()["data"]
-    shrunk_log = console_log.split("\n")[-int(lines) :]
-    loglines = "\n".join(shrunk_log)
+    if streamed_lines:
+        console_log = "\n".join(streamed_lines)
+    else:
+        # We always grab 200 to match the follow call, but only _show_ `lines` number
+        params = {"lines": 200}
+        response = call_api(
+            config, "get", "/vm/{vm}/console".format(vm=vm), params=params
+        )
+
+        if response.status_code != 200:
+            return False, response.json().get("message", "")
 
-    # Print the initial data and begin following
-    print(loglines, end="")
+        # Shrink the log buffer to length lines
+        console_log = response.json()["data"]
+        shrunk_log = console_log.split("\n")[-int(lines) :]
+        loglines = "\n".join(shrunk_log)
+
+        # Print the initial data and begin following
+        print(loglines, end="")
 
     while True:
         # Grab the next line set (200 is a reasonable number of lines per half-second; any more are skipped)
@@ -1984,6 +2281,35 @@ def format_info(config, domain_information, long_output):
             f"{domain_information.get('migration_max_downtime')} ms",
         )
     )
+    ainformation.append(
+        "{}Migration profile:{}  {}".format(
+            ansiprint.purple(),
+            ansiprint.end(),
+            domain_information.get("migration_profile") or "Default",
+        )
+    )
+
+    migration_progress = domain_information.get("migration_progress")
+    if migration_progress:
+        if migration_progress.get("eta") is None:
+            formatted_migration_eta = "not converging"
+        else:
+            formatted_migration_eta = f"ETA {migration_progress['eta']}s"
+        ainformation.append(
+            "{}Migration progress:{} {}".format(
+                ansiprint.purple(),
+                ansiprint.end(),
+                "{} iteration {}, {}/{} MiB remaining at {} MiB/s ({} MiB/s dirtied), {}".format(
+                    str(migration_progress.get("phase")).title(),
+                    migration_progress.get("iteration"),
+                    int(migration_progress.get("memory_remaining", 0) / 1048576),
+                    int(migration_progress.get("memory_total", 0) / 1048576),
+                    int(migration_progress.get("memory_rate", 0) / 1048576),
+                    int(migration_progress.get("dirty_rate", 0) / 1048576),
+                    formatted_migration_eta,
+                ),
+            )
+        )
 
     # Tag list
     tags_name_length = 5
@@ -2252,7 +2578,7 @@ def format_info(config, domain_information, long_output):
     return "\n".join(ainformation)
 
 
-def format_list(config, vm_list):
+def format_list(config, vm_list, header=True):
     # Function to strip the "br" off of nets and return a nicer list
     def getNiceNetID(domain_information):
         # Network list
@@ -2318,48 +2644,52 @@ def format_list(config, vm_list):
         if _vm_migrated_length > vm_migrated_length:
             vm_migrated_length = _vm_migrated_length
 
-    # Format the string (header)
-    vm_list_output.append(
-        "{bold}{vm_header: <{vm_header_length}} {resource_header: <{resource_header_length}} {node_header: <{node_header_length}}{end_bold}".format(
-            vm_header_length=vm_name_length
-            + vm_state_length
-            + vm_tags_length
-            + vm_snapshots_length
-            + 3,
-            resource_header_length=vm_nets_length + vm_ram_length + vm_vcpu_length + 2,
-            node_header_length=vm_node_length + vm_migrated_length + 1,
-            bold=ansiprint.bold(),
-            end_bold=ansiprint.end(),
-            vm_header="VMs "
-            + "".join(
-                [
-                    "-"
-                    for _ in range(
-                        4,
-                        vm_name_length
-                        + vm_state_length
-                        + vm_tags_length
-                        + +vm_snapshots_length
-                        + 2,
-                    )
-                ]
-            ),
-            resource_header="Resources "
-            + "".join(
-                [
-                    "-"
-                    for _ in range(
-                        10, vm_nets_length + vm_ram_length + vm_vcpu_length + 1
-                    )
-                ]
-            ),
-            node_header="Node "
-            + "".join(["-" for _ in range(5, vm_node_length + vm_migrated_length)]),
+    if header:
+        # Format the string (header)
+        vm_list_output.append(
+            "{bold}{vm_header: <{vm_header_length}} {resource_header: <{resource_header_length}} {node_header: <{node_header_length}}{end_bold}".format(
+                vm_header_length=vm_name_length
+                + vm_state_length
+                + vm_tags_length
+                + vm_snapshots_length
+                + 3,
+                resource_header_length=vm_nets_length
+                + vm_ram_length
+                + vm_vcpu_length
+                + 2,
+                node_header_length=vm_node_length + vm_migrated_length + 1,
+                bold=ansiprint.bold(),
+                end_bold=ansiprint.end(),
+                vm_header="VMs "
+                + "".join(
+                    [
+                        "-"
+                        for _ in range(
+                            4,
+                            vm_name_length
+                            + vm_state_length
+                            + vm_tags_length
+                            + +vm_snapshots_length
+                            + 2,
+                        )
+                    ]
+                ),
+                resource_header="Resources "
+                + "".join(
+                    [
+                        "-"
+                        for _ in range(
+                            10, vm_nets_length + vm_ram_length + vm_vcpu_length + 1
+                        )
+                    ]
+                ),
+                node_header="Node "
+                + "".join(["-" for _ in range(5, vm_node_length + vm_migrated_length)]),
+            )
         )
-    )
 
-    vm_list_output.append(
-        "{bold}{vm_name: <{vm_name_length}} \
+        vm_list_output.append(
+            "{bold}{vm_name: <{vm_name_length}} \
 {vm_state_colour}{vm_state: <{vm_state_length}}{end_colour} \
 {vm_tags: <{vm_tags_length}} \
 {vm_snapshots: <{vm_snapshots_length}} \
@@ -2367,30 +2697,30 @@ def format_list(config, vm_list):
 {vm_memory: <{vm_ram_length}} {vm_vcpu: <{vm_vcpu_length}} \
 {vm_node: <{vm_node_length}} \
 {vm_migrated: <{vm_migrated_length}}{end_bold}".format(
-            vm_name_length=vm_name_length,
-            vm_state_length=vm_state_length,
-            vm_tags_length=vm_tags_length,
-            vm_snapshots_length=vm_snapshots_length,
-            vm_nets_length=vm_nets_length,
-            vm_ram_length=vm_ram_length,
-            vm_vcpu_length=vm_vcpu_length,
-            vm_node_length=vm_node_length,
-            vm_migrated_length=vm_migrated_length,
-            bold=ansiprint.bold(),
-            end_bold=ansiprint.end(),
-            vm_state_colour="",
-            end_colour="",
-            vm_name="Name",
-            vm_state="State",
-            vm_tags="Tags",
-            vm_snapshots="Snapshots",
-            vm_networks="Networks",
-            vm_memory="RAM (M)",
-            vm_vcpu="vCPUs",
-            vm_node="Current",
-            vm_migrated="Migrated",
+                vm_name_length=vm_name_length,
+                vm_state_length=vm_state_length,
+                vm_tags_length=vm_tags_length,
+                vm_snapshots_length=vm_snapshots_length,
+                vm_nets_length=vm_nets_length,
+                vm_ram_length=vm_ram_length,
+                vm_vcpu_length=vm_vcpu_length,
+                vm_node_length=vm_node_length,
+                vm_migrated_length=vm_migrated_length,
+                bold=ansiprint.bold(),
+                end_bold=ansiprint.end(),
+                vm_state_colour="",
+                end_colour="",
+                vm_name="Name",
+                vm_state="State",
+                vm_tags="Tags",
+                vm_snapshots="Snapshots",
+                vm_networks="Networks",
+                vm_memory="RAM (M)",
+                vm_vcpu="vCPUs",
+                vm_node="Current",
+                vm_migrated="Migrated",
+            )
         )
-    )
 
     # Get a list of cluster networks for validity comparisons
     cluster_net_list = call_api(config, "get", "/network").json()
@@ -19,17 +19,21 @@
 #
 ###############################################################################
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from datetime import datetime
 from json import load as jload
 from json import dump as jdump
 from os import popen, makedirs, path, scandir
 from shutil import rmtree
 from subprocess import run, PIPE
+from threading import BoundedSemaphore, Lock
 
 from daemon_lib.common import run_os_command
 from daemon_lib.config import get_autobackup_configuration
 from daemon_lib.celery import start, fail, log_info, log_err, update, finish
 
+import daemon_lib.backuprepo as backuprepo
 import daemon_lib.ceph as ceph
 import daemon_lib.vm as vm
 
@@ -150,14 +154,39 @@ def send_execution_summary_report(
         log_err(f"Failed to send report email: {e}")
 
 
-def run_vm_backup(zkhandler, celery, config, vm_detail, force_full=False):
-    vm_name = vm_detail["name"]
-    dom_uuid = vm_detail["uuid"]
+class ExportLimiter(object):
+    """
+    Bound the number of volume exports running at once from each Ceph pool and to the backup
+    target mount, across all concurrently-running VM backups
+    """
+
+    def __init__(self, per_pool, per_target):
+        self.per_pool = per_pool
+        self._pools = dict()
+        self._pools_lock = Lock()
+        self._target = BoundedSemaphore(per_target)
+
+    @contextmanager
+    def export(self, pool):
+        with self._pools_lock:
+            if pool not in self._pools:
+                self._pools[pool] = BoundedSemaphore(self.per_pool)
+            pool_slot = self._pools[pool]
+        # Always take the pool slot before the target slot so waiters can't deadlock
+        with pool_slot:
+            with self._target:
+                yield
+
+
+def get_backup_plan(config, vm_name, force_full=False):
+    """
+    Determine the type of the next autobackup of vm_name from its state file, and estimate
+    its size from the most recent backup of the same type
+    """
     backup_suffixed_path = f"{config['backup_root_path']}{config['backup_root_suffix']}"
     vm_backup_path = f"{backup_suffixed_path}/{vm_name}"
     autobackup_state_file = f"{vm_backup_path}/.autobackup.json"
     full_interval = config["backup_schedule"]["full_interval"]
-    full_retention = config["backup_schedule"]["full_retention"]
 
     if not path.exists(vm_backup_path) or not path.exists(autobackup_state_file):
         # There are no existing backups so the list is empty
@@ -173,22 +202,63 @@ def run_vm_backup(zkhandler, celery, config, vm_detail, force_full=False):
         last_full_backup = full_backups[0]
         last_full_backup_idx = tracked_backups.index(last_full_backup)
         if force_full:
-            this_backup_incremental_parent = None
-            this_backup_retain_snapshot = True
+            incremental_parent = None
+            retain_snapshot = True
         elif last_full_backup_idx >= full_interval - 1:
-            this_backup_incremental_parent = None
-            this_backup_retain_snapshot = True
+            incremental_parent = None
+            retain_snapshot = True
         else:
-            this_backup_incremental_parent = last_full_backup["snapshot_name"]
-            this_backup_retain_snapshot = False
+            incremental_parent = last_full_backup["snapshot_name"]
+            retain_snapshot = False
     else:
         # The very first ackup must be full to start the tree
-        this_backup_incremental_parent = None
-        this_backup_retain_snapshot = True
+        incremental_parent = None
+        retain_snapshot = True
+
+    export_type = "incremental" if incremental_parent is not None else "full"
+
+    # Estimate the size from the last successful backup of this type, or failing that, the
+    # last successful full backup; None means the VM has no history to estimate from
+    estimated_size = None
+    for estimate_type in [export_type, "full"]:
+        previous = [
+            b
+            for b in tracked_backups
+            if b.get("type") == estimate_type and b.get("result", False)
+        ]
+        if previous:
+            estimated_size = previous[0].get("export_size_bytes", 0)
+            break
 
-    export_type = (
-        "incremental" if this_backup_incremental_parent is not None else "full"
-    )
+    return {
+        "state_data": state_data,
+        "tracked_backups": tracked_backups,
+        "incremental_parent": incremental_parent,
+        "retain_snapshot": retain_snapshot,
+        "export_type": export_type,
+        "estimated_size": estimated_size,
+    }
+
+
+def run_vm_backup(
+    zkhandler, celery, config, vm_detail, force_full=False, export_limiter=None
+):
+    vm_name = vm_detail["name"]
+    dom_uuid = vm_detail["uuid"]
+    backup_suffixed_path = f"{config['backup_root_path']}{config['backup_root_suffix']}"
+    vm_backup_path = f"{backup_suffixed_path}/{vm_name}"
+    autobackup_state_file = f"{vm_backup_path}/.autobackup.json"
+    full_retention = config["backup_schedule"]["full_retention"]
+
+    if export_limiter is None:
+        export_limiter = ExportLimiter(1, 1)
+
+    backup_plan = get_backup_plan(config, vm_name, force_full=force_full)
+    state_data = backup_plan["state_data"]
+    tracked_backups = backup_plan["tracked_backups"]
+    this_backup_incremental_parent = backup_plan["incremental_parent"]
+    this_backup_retain_snapshot = backup_plan["retain_snapshot"]
+    export_type = backup_plan["export_type"]
 
     now = datetime.now()
     datestring = now.strftime("%Y%m%d%H%M%S")
@@ -230,6 +300,7 @@ def run_vm_backup(zkhandler, celery, config, vm_detail, force_full=False):
             "runtime_secs": ttotal,
             "snapshot_name": snapshot_name,
             "incremental_parent": this_backup_incremental_parent,
+            "export_format": export_format,
             "vm_detail": vm_detail,
             "export_files": export_files,
             "export_size_bytes": export_files_size,
@@ -360,47 +431,83 @@ def run_vm_backup(zkhandler, celery, config, vm_detail, force_full=False):
         if ret:
             snapshot_volumes += snapshots
 
-    export_files = list()
-    for snapshot_volume in snapshot_volumes:
+    export_format = config["backup_export_format"]
+    export_stored_sizes = list()
+
+    def export_volume_chunked(snapshot_volume):
         snap_pool = snapshot_volume["pool"]
         snap_volume = snapshot_volume["volume"]
         snap_snapshot_name = snapshot_volume["snapshot"]
         snap_size = snapshot_volume["stats"]["size"]
 
         if this_backup_incremental_parent is not None:
-            retcode, stdout, stderr = run_os_command(
-                f"rbd export-diff --from-snap {this_backup_incremental_parent} {snap_pool}/{snap_volume}@{snap_snapshot_name} {export_target_path}/{snap_pool}.{snap_volume}.{export_fileext}"
-            )
-            if retcode:
-                error_message = (
-                    f"[{vm_name}] Failed to export snapshot for volume(s) '{snap_pool}/{snap_volume}'",
-                )
-                failure = True
-                break
-            else:
-                export_files.append(
-                    (
-                        f"images/{snap_pool}.{snap_volume}.{export_fileext}",
-                        snap_size,
-                    )
-                )
+            base_manifest_path = f"{vm_backup_path}/{this_backup_incremental_parent}/images/{snap_pool}.{snap_volume}.manifest"
         else:
-            retcode, stdout, stderr = run_os_command(
-                f"rbd export --export-format 2 {snap_pool}/{snap_volume}@{snap_snapshot_name} {export_target_path}/{snap_pool}.{snap_volume}.{export_fileext}"
-            )
-            if retcode:
-                error_message = (
-                    f"[{vm_name}] Failed to export snapshot for volume(s) '{snap_pool}/{snap_volume}'",
-                )
-                failure = True
-                break
-            else:
-                export_files.append(
-                    (
-                        f"images/{snap_pool}.{snap_volume}.{export_fileext}",
-                        snap_size,
-                    )
+            base_manifest_path = None
+
+        try:
+            with export_limiter.export(snap_pool):
+                stored_size = backuprepo.export_snapshot_volume(
+                    backup_suffixed_path,
+                    f"{export_target_path}/{snap_pool}.{snap_volume}.manifest",
+                    snap_pool,
+                    snap_volume,
+                    snap_snapshot_name,
+                    base_manifest_path=base_manifest_path,
+                    base_snapshot=this_backup_incremental_parent,
+                    compression=config["backup_compression"],
                 )
+        except Exception as e:
+            log_err(
+                celery, f"[{vm_name}] Failed to export {snap_pool}/{snap_volume}: {e}"
+            )
+            return False, f"{snap_pool}/{snap_volume}"
+        export_stored_sizes.append(stored_size)
+        return True, (
+            f"images/{snap_pool}.{snap_volume}.manifest",
+            snap_size,
+        )
+
+    def export_volume(snapshot_volume):
+        if export_format == backuprepo.EXPORT_FORMAT:
+            return export_volume_chunked(snapshot_volume)
+
+        snap_pool = snapshot_volume["pool"]
+        snap_volume = snapshot_volume["volume"]
+        snap_snapshot_name = snapshot_volume["snapshot"]
+        snap_size = snapshot_volume["stats"]["size"]
+
+        if this_backup_incremental_parent is not None:
+            export_cmd = f"rbd export-diff --from-snap {this_backup_incremental_parent} {snap_pool}/{snap_volume}@{snap_snapshot_name} {export_target_path}/{snap_pool}.{snap_volume}.{export_fileext}"
+        else:
+            export_cmd = f"rbd export --export-format 2 {snap_pool}/{snap_volume}@{snap_snapshot_name} {export_target_path}/{snap_pool}.{snap_volume}.{export_fileext}"
+
+        with export_limiter.export(snap_pool):
+            retcode, stdout, stderr = run_os_command(export_cmd)
+        if retcode:
+            return False, f"{snap_pool}/{snap_volume}"
+        return True, (
+            f"images/{snap_pool}.{snap_volume}.{export_fileext}",
+            snap_size,
+        )
+
+    # Export all volumes at once, bounded by the per-pool and per-target limits
+    export_files = list()
+    failed_volumes = list()
+    if snapshot_volumes:
+        with ThreadPoolExecutor(
+            max_workers=len(snapshot_volumes), thread_name_prefix="autobackup_export"
+        ) as executor:
+            for success, result in executor.map(export_volume, snapshot_volumes):
+                if success:
+                    export_files.append(result)
+                else:
+                    failed_volumes.append(result)
+    if failed_volumes:
+        error_message = (
+            f"[{vm_name}] Failed to export snapshot for volume(s) '{', '.join(failed_volumes)}'",
+        )
+        failure = True
 
     if failure:
         log_err(celery, error_message)
@@ -418,7 +525,11 @@ def run_vm_backup(zkhandler, celery, config, vm_detail, force_full=False):
                     total += get_dir_size(entry.path)
         return total
 
-    export_files_size = get_dir_size(export_target_path)
+    if export_format == backuprepo.EXPORT_FORMAT:
+        # Only count the chunks this backup added to the repository
+        export_files_size = sum(export_stored_sizes)
+    else:
+        export_files_size = get_dir_size(export_target_path)
 
     ret, e = write_backup_summary(success=True)
     if not ret:
@@ -515,9 +626,10 @@ def worker_cluster_autobackup(
 
     autobackup_start_time = datetime.now()
 
-    retcode, vm_list = vm.get_list(zkhandler)
+    # Select VMs through the tag index, so only tagged VMs are fully parsed
+    retcode, backup_vms = vm.get_list_by_tags(zkhandler, config["backup_tags"])
     if not retcode:
-        error_message = f"Failed to fetch VM list: {vm_list}"
+        error_message = f"Failed to fetch VM list: {backup_vms}"
         log_err(celery, error_message)
         send_execution_failure_report(
             (celery, current_stage, total_stages),
@@ -532,19 +644,6 @@ def worker_cluster_autobackup(
     if not path.exists(backup_suffixed_path):
         makedirs(backup_suffixed_path)
 
-    full_interval = config["backup_schedule"]["full_interval"]
-
-    backup_vms = list()
-    for vm_detail in vm_list:
-        vm_tag_names = [t["name"] for t in vm_detail["tags"]]
-        matching_tags = (
-            True
-            if len(set(vm_tag_names).intersection(set(config["backup_tags"]))) > 0
-            else False
-        )
-        if matching_tags:
-            backup_vms.append(vm_detail)
-
     if len(backup_vms) < 1:
         message = "Found no VMs tagged for autobackup."
         log_info(celery, message)
@@ -596,53 +695,78 @@ def worker_cluster_autobackup(
                 fail(celery, error_message)
                 return False
 
-    # Execute the backup: take a snapshot, then export the snapshot
+    # Order the backups by their estimated size, largest (or unknown) first, so that the
+    # longest backups are not left to run alone at the end of the window
+    backup_plans = dict()
     for vm_detail in backup_vms:
-        vm_backup_path = f"{backup_suffixed_path}/{vm_detail['name']}"
-        autobackup_state_file = f"{vm_backup_path}/.autobackup.json"
-        if not path.exists(vm_backup_path) or not path.exists(autobackup_state_file):
-            # There are no existing backups so the list is empty
-            state_data = dict()
-            tracked_backups = list()
-        else:
-            with open(autobackup_state_file) as fh:
-                state_data = jload(fh)
-            tracked_backups = state_data["tracked_backups"]
-
-        full_backups = [b for b in tracked_backups if b["type"] == "full"]
-        if len(full_backups) > 0:
-            last_full_backup = full_backups[0]
-            last_full_backup_idx = tracked_backups.index(last_full_backup)
-            if force_full:
-                this_backup_incremental_parent = None
-            elif last_full_backup_idx >= full_interval - 1:
-                this_backup_incremental_parent = None
-            else:
-                this_backup_incremental_parent = last_full_backup["snapshot_name"]
-        else:
-            # The very first ackup must be full to start the tree
-            this_backup_incremental_parent = None
-
-        export_type = (
-            "incremental" if this_backup_incremental_parent is not None else "full"
+        backup_plans[vm_detail["name"]] = get_backup_plan(
+            config, vm_detail["name"], force_full=force_full
         )
-
-        current_stage += 1
-        update(
-            celery,
-            f"Performing autobackup of VM {vm_detail['name']} ({export_type})",
-            current=current_stage,
-            total=total_stages,
+    backup_vms.sort(
+        key=lambda v: (
+            backup_plans[v["name"]]["estimated_size"] is not None,
+            -(backup_plans[v["name"]]["estimated_size"] or 0),
         )
+    )
 
-        summary = run_vm_backup(
-            zkhandler,
-            celery,
-            config,
-            vm_detail,
-            force_full=force_full,
-        )
-        backup_summary[vm_detail["name"]] = summary
+    concurrency = config["backup_concurrency"]
+    export_limiter = ExportLimiter(concurrency["per_pool"], concurrency["per_target"])
+
+    log_info(
+        celery,
+        f"Running up to {concurrency['cluster']} VM autobackup(s) at once, with up to {concurrency['per_pool']} export(s) per pool and {concurrency['per_target']} export(s) to the backup target",
+    )
+
+    # Execute the backups: take a snapshot, then export the snapshot
+    with ThreadPoolExecutor(
+        max_workers=concurrency["cluster"], thread_name_prefix="autobackup"
+    ) as executor:
+        futures = dict()
+        for vm_detail in backup_vms:
+            futures[
+                executor.submit(
+                    run_vm_backup,
+                    zkhandler,
+                    celery,
+                    config,
+                    vm_detail,
+                    force_full=force_full,
+                    export_limiter=export_limiter,
+                )
+            ] = vm_detail["name"]
+
+        for future in as_completed(futures):
+            vm_name = futures[future]
+            export_type = backup_plans[vm_name]["export_type"]
+            try:
+                backup_summary[vm_name] = future.result()
+            except Exception as e:
+                log_err(celery, f"[{vm_name}] Autobackup failed: {e}")
+                backup_summary[vm_name] = list()
+
+            current_stage += 1
+            update(
+                celery,
+                f"Completed autobackup of VM {vm_name} ({export_type})",
+                current=current_stage,
+                total=total_stages,
+            )
+
+    # Report in VM name order, as the backups complete in no particular order
+    backup_summary = {k: backup_summary[k] for k in sorted(backup_summary.keys())}
+
+    # Reclaim chunks which are no longer referenced now that retention has been applied
+    if config["backup_export_format"] == backuprepo.EXPORT_FORMAT:
+        try:
+            removed_chunks, removed_bytes = backuprepo.garbage_collect(
+                backup_suffixed_path
+            )
+            log_info(
+                celery,
+                f"Removed {removed_chunks} unreferenced chunk(s) ({removed_bytes} bytes) from the backup repository",
+            )
+        except Exception as e:
+            log_err(celery, f"Failed to garbage collect the backup repository: {e}")
 
     # Handle automount unmount commands
     if config["auto_mount_enabled"]:
@@ -19,17 +19,24 @@
 #
 ###############################################################################
 
-import requests
+import re
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from os import popen
+from threading import BoundedSemaphore, Lock
 
 from daemon_lib.config import get_automirror_configuration
 from daemon_lib.celery import start, fail, log_info, log_warn, log_err, update, finish
 
+import daemon_lib.blockstream as blockstream
 import daemon_lib.vm as vm
 
 
+# The number of VMs looked up in each batched remote snapshot request
+REMOTE_LOOKUP_BATCH_SIZE = 50
+
+
 def send_execution_failure_report(
     celery, config, recipients=None, total_time=0, error=None
 ):
@@ -149,106 +156,270 @@ def send_execution_summary_report(
         log_err(f"Failed to send report email: {e}")
 
 
-def run_vm_mirror(
-    zkhandler, celery, config, vm_detail, snapshot_name, destination_name
-):
+class MirrorDestination(object):
+    """
+    A destination cluster shared by all concurrent automirror sends to it, holding a pooled API
+    session, its concurrency and bandwidth limits, and a cache of its automirror snapshots
+    """
+
+    def __init__(self, name, destination):
+        self.name = name
+        self.key = destination["key"]
+        self.verify_ssl = destination["verify_ssl"]
+        self.pool = destination["pool"]
+        self.api_uri = f"{'https' if destination['ssl'] else 'http'}://{destination['address']}:{destination['port']}{destination['prefix']}"
+
+        self.concurrency = max(1, int(destination.get("concurrency", 1)))
+        self.slots = BoundedSemaphore(self.concurrency)
+
+        # The bandwidth limit is in MB/s and is shared by all sends to this destination
+        bandwidth_limit = int(destination.get("bandwidth_limit", 0) or 0)
+        if bandwidth_limit > 0:
+            self.limiter = blockstream.RateLimiter(bandwidth_limit * 1024 * 1024)
+        else:
+            self.limiter = None
+
+        self.session = blockstream.get_session(
+            self.key,
+            verify_ssl=self.verify_ssl,
+            pool_size=self.concurrency
+            * blockstream.DEFAULT_VOLUME_CONCURRENCY
+            * blockstream.DEFAULT_STREAM_CONCURRENCY,
+        )
+
+        self.snapshots_lock = Lock()
+        self.remote_snapshots = dict()
+        self.loaded_vms = set()
+
+    def load_remote_snapshots(self, vm_names):
+        """
+        Fetch the automirror snapshots of all of vm_names from the destination in batches
+        """
+        vm_names = sorted(vm_names)
+        for idx in range(0, len(vm_names), REMOTE_LOOKUP_BATCH_SIZE):
+            batch = vm_names[idx : idx + REMOTE_LOOKUP_BATCH_SIZE]
+            response = self.session.get(
+                f"{self.api_uri}/vm",
+                params={"limit": f"^({'|'.join(re.escape(n) for n in batch)})$"},
+            )
+            # A 404 means none of the VMs exist on the destination yet
+            if response.status_code not in [200, 404]:
+                continue
+            remote_vms = response.json() if response.status_code == 200 else list()
+            with self.snapshots_lock:
+                for remote_vm in remote_vms:
+                    self.remote_snapshots[remote_vm["name"]] = sorted(
+                        [
+                            s["name"]
+                            for s in remote_vm["snapshots"]
+                            if s["name"].startswith("am")
+                        ],
+                        reverse=True,
+                    )
+                self.loaded_vms.update(batch)
+
+    def get_remote_snapshots(self, vm_name):
+        """
+        Return the automirror snapshots of vm_name on the destination, newest first
+        """
+        with self.snapshots_lock:
+            if vm_name in self.loaded_vms:
+                return list(self.remote_snapshots.get(vm_name, list()))
+
+        # This VM was not covered by a successful batch lookup, so look it up directly
+        response = self.session.get(f"{self.api_uri}/vm/{vm_name}")
+        remote_vm = response.json()
+        if type(remote_vm) is list and len(remote_vm) > 0:
+            return sorted(
+                [
+                    s["name"]
+                    for s in remote_vm[0]["snapshots"]
+                    if s["name"].startswith("am")
+                ],
+                reverse=True,
+            )
+        return list()
+
+    def set_remote_snapshots(self, vm_name, snapshots):
+        with self.snapshots_lock:
+            self.remote_snapshots[vm_name] = snapshots
+            self.loaded_vms.add(vm_name)
+
+
+def run_vm_mirror(zkhandler, celery, config, vm_detail, snapshot_name, destination):
     vm_name = vm_detail["name"]
     keep_count = config["mirror_keep_snapshots"]
 
-    try:
-        destination = config["mirror_destinations"][destination_name]
-    except Exception:
-        error_message = f"Failed to find valid destination cluster '{destination_name}' for VM '{vm_name}'"
-        log_err(celery, error_message)
-        return error_message
-
-    destination_api_uri = f"{'https' if destination['ssl'] else 'http'}://{destination['address']}:{destination['port']}{destination['prefix']}"
-    destination_api_timeout = (3.05, 172800)
-    destination_api_headers = {
-        "X-Api-Key": destination["key"],
-    }
-
-    session = requests.Session()
-    session.headers.update(destination_api_headers)
-    session.verify = destination["verify_ssl"]
-    session.timeout = destination_api_timeout
-
-    # Get the last snapshot that is on the remote side for incrementals
-    response = session.get(
-        f"{destination_api_uri}/vm/{vm_name}",
-        params=None,
-        data=None,
-    )
-    destination_vm_detail = response.json()
-    if type(destination_vm_detail) is list and len(destination_vm_detail) > 0:
-        destination_vm_detail = destination_vm_detail[0]
+    with destination.slots:
+        # Get the last snapshot that is on the remote side for incrementals
         try:
-            last_snapshot_name = [
-                s
-                for s in destination_vm_detail["snapshots"]
-                if s["name"].startswith("am")
-            ][0]["name"]
-        except Exception:
+            remote_snapshots = destination.get_remote_snapshots(vm_name)
+        except Exception as e:
+            return False, f"Failed to get remote snapshots: {e}"
+        if remote_snapshots:
+            last_snapshot_name = remote_snapshots[0]
+        else:
             last_snapshot_name = None
-    else:
-        last_snapshot_name = None
 
-    # Send the current snapshot
-    result, message = vm.vm_worker_send_snapshot(
+        # Send the current snapshot
+        result, message = vm.vm_worker_send_snapshot(
+            zkhandler,
+            None,
+            vm_name,
+            snapshot_name,
+            destination.api_uri,
+            destination.key,
+            destination_api_verify_ssl=destination.verify_ssl,
+            incremental_parent=last_snapshot_name,
+            destination_storage_pool=destination.pool,
+            return_status=True,
+            session=destination.session,
+            limiter=destination.limiter,
+        )
+
+        if not result:
+            return False, message
+
+        # The new snapshot is now the newest on the remote side, since the names sort by date
+        remote_snapshots = [snapshot_name] + remote_snapshots
+
+        # Find any mirror snapshots that are expired
+        remote_marked_for_deletion = remote_snapshots[keep_count:]
+        destination.set_remote_snapshots(vm_name, remote_snapshots[:keep_count])
+
+        for snapshot in remote_marked_for_deletion:
+            log_info(
+                celery,
+                f"VM {vm_name} removing stale remote automirror snapshot {snapshot} from {destination.name}",
+            )
+            destination.session.delete(
+                f"{destination.api_uri}/vm/{vm_name}/snapshot",
+                params={
+                    "snapshot_name": snapshot,
+                },
+                data=None,
+            )
+
+    return True, remote_marked_for_deletion
+
+
+def run_vm_mirrors(zkhandler, celery, config, vm_detail, destinations):
+    """
+    Snapshot a VM and send the snapshot to all of its destinations at once, then remove any
+    local snapshots which were removed from every destination
+
+    Returns the mirror summary entries of the VM and the set of removed local snapshots.
+    """
+    vm_name = vm_detail["name"]
+    mirror_summary = dict()
+
+    # Automirrors use a custom name to allow them to be properly cleaned up later
+    now = datetime.now()
+    datestring = now.strftime("%Y%m%d%H%M%S")
+    snapshot_name = f"am{datestring}"
+
+    result, message = vm.vm_worker_create_snapshot(
         zkhandler,
         None,
         vm_name,
-        snapshot_name,
-        destination_api_uri,
-        destination["key"],
-        destination_api_verify_ssl=destination["verify_ssl"],
-        incremental_parent=last_snapshot_name,
-        destination_storage_pool=destination["pool"],
+        snapshot_name=snapshot_name,
         return_status=True,
     )
-
     if not result:
-        return False, message
-
-    response = session.get(
-        f"{destination_api_uri}/vm/{vm_name}",
-        params=None,
-        data=None,
-    )
-    destination_vm_detail = response.json()
-    if type(destination_vm_detail) is list and len(destination_vm_detail) > 0:
-        destination_vm_detail = destination_vm_detail[0]
-    else:
-        message = "Remote VM somehow does not exist after successful mirror; skipping snapshot cleanup"
-        return False, message
-
-    # Find any mirror snapshots that are expired
-    remote_snapshots = [
-        s for s in destination_vm_detail["snapshots"] if s["name"].startswith("am")
-    ]
+        for destination_name in destinations.keys():
+            mirror_summary[f"{vm_name}:{destination_name}"] = {
+                "result": result,
+                "snapshot_name": snapshot_name,
+                "runtime_secs": 0,
+                "result_message": message,
+            }
+        return mirror_summary, set()
+
+    def mirror_to(destination_name):
+        mirror_start = datetime.now()
+        destination = destinations[destination_name]
+        if destination is None:
+            result, ret = (
+                False,
+                f"Failed to find valid destination cluster '{destination_name}' for VM '{vm_name}'",
+            )
+        else:
+            try:
+                result, ret = run_vm_mirror(
+                    zkhandler,
+                    celery,
+                    config,
+                    vm_detail,
+                    snapshot_name,
+                    destination,
+                )
+            except Exception as e:
+                result, ret = False, f"Error in mirror send: {e}"
+        mirror_end = datetime.now()
+        return result, ret, (mirror_end - mirror_start).seconds
+
+    # Send to all destinations at once; each destination bounds its own concurrency
+    with ThreadPoolExecutor(
+        max_workers=len(destinations), thread_name_prefix="automirror_send"
+    ) as executor:
+        results = dict(zip(destinations.keys(), executor.map(mirror_to, destinations)))
+
+    remote_marked_for_deletion = dict()
+    for destination_name, (result, ret, runtime_secs) in results.items():
+        if result:
+            remote_marked_for_deletion[destination_name] = ret
+
+            mirror_summary[f"{vm_name}:{destination_name}"] = {
+                "result": result,
+                "snapshot_name": snapshot_name,
+                "runtime_secs": runtime_secs,
+            }
+        else:
+            log_warn(
+                celery,
+                f"Error in mirror send of VM {vm_name} to {destination_name}: {ret}",
+            )
+            mirror_summary[f"{vm_name}:{destination_name}"] = {
+                "result": result,
+                "snapshot_name": snapshot_name,
+                "runtime_secs": runtime_secs,
+                "result_message": ret,
+            }
+
+    # If all sends failed, remove the snapshot we created as it will never be needed or automatically cleaned up later
+    if not remote_marked_for_deletion:
+        vm.vm_worker_remove_snapshot(
+            zkhandler,
+            None,
+            vm_name,
+            snapshot_name,
+        )
 
-    # Snapshots are in dated descending order due to the names
-    if len(remote_snapshots) > keep_count:
-        remote_marked_for_deletion = [s["name"] for s in remote_snapshots[keep_count:]]
+    # Find all local snapshots that were present in all remote snapshot deletions,
+    # then remove them
+    # If one of the sends fails, this should result in nothing being removed
+    if remote_marked_for_deletion:
+        all_lists = [set(lst) for lst in remote_marked_for_deletion.values() if lst]
+        if all_lists:
+            local_marked_for_deletion = set.intersection(*all_lists)
+        else:
+            local_marked_for_deletion = set()
     else:
-        remote_marked_for_deletion = list()
+        local_marked_for_deletion = set()
 
-    for snapshot in remote_marked_for_deletion:
+    for snapshot in local_marked_for_deletion:
         log_info(
             celery,
-            f"VM {vm_detail['name']} removing stale remote automirror snapshot {snapshot}",
+            f"VM {vm_name} removing stale local automirror snapshot {snapshot}",
         )
-        session.delete(
-            f"{destination_api_uri}/vm/{vm_name}/snapshot",
-            params={
-                "snapshot_name": snapshot,
-            },
-            data=None,
+        vm.vm_worker_remove_snapshot(
+            zkhandler,
+            None,
+            vm_name,
+            snapshot,
         )
 
-    session.close()
-
-    return True, remote_marked_for_deletion
+    return mirror_summary, local_marked_for_deletion
 
 
 def worker_cluster_automirror(
@@ -353,110 +524,106 @@ def worker_cluster_automirror(
         f"Found {len(mirror_vm_names)} suitable VM(s) for automirror: {', '.join(mirror_vm_names)}",
     )
 
-    # Execute the backup: take a snapshot, then export the snapshot
+    # Set up each destination once, to be shared by all VMs mirrored to it; unknown
+    # destination names are kept as None so that they are reported per VM
+    destinations = dict()
     for mirror_vm in mirror_vms:
-        vm_detail = mirror_vm["detail"]
-        vm_destinations = mirror_vm["destinations"]
+        for destination_name in mirror_vm["destinations"]:
+            if destination_name in destinations:
+                continue
+            if destination_name in config["mirror_destinations"]:
+                destinations[destination_name] = MirrorDestination(
+                    destination_name, config["mirror_destinations"][destination_name]
+                )
+            else:
+                destinations[destination_name] = None
 
-        current_stage += 1
-        update(
-            celery,
-            f"Performing automirror of VM {vm_detail['name']}",
-            current=current_stage,
-            total=total_stages,
-        )
+    # Fetch the existing remote snapshots of all VMs from each destination at once
+    def load_destination(destination_name):
+        destination = destinations[destination_name]
+        if destination is None:
+            return
+        try:
+            destination.load_remote_snapshots(
+                [
+                    m["detail"]["name"]
+                    for m in mirror_vms
+                    if destination_name in m["destinations"]
+                ]
+            )
+        except Exception as e:
+            log_warn(
+                celery,
+                f"Failed to fetch remote snapshots from {destination_name}; falling back to per-VM lookups: {e}",
+            )
 
-        # Automirrors use a custom name to allow them to be properly cleaned up later
-        now = datetime.now()
-        datestring = now.strftime("%Y%m%d%H%M%S")
-        snapshot_name = f"am{datestring}"
+    with ThreadPoolExecutor(
+        max_workers=len(destinations), thread_name_prefix="automirror_lookup"
+    ) as executor:
+        list(executor.map(load_destination, destinations.keys()))
 
-        result, message = vm.vm_worker_create_snapshot(
-            zkhandler,
-            None,
-            vm_detail["name"],
-            snapshot_name=snapshot_name,
-            return_status=True,
-        )
-        if not result:
-            for destination in vm_destinations:
-                mirror_summary[f"{vm_detail['name']}:{destination}"] = {
-                    "result": result,
-                    "snapshot_name": snapshot_name,
-                    "runtime_secs": 0,
-                    "result_message": message,
-                }
-            continue
+    # By default, run enough VMs at once to fill every destination's concurrency limit
+    if config["mirror_concurrency"] is not None:
+        concurrency = max(1, int(config["mirror_concurrency"]))
+    else:
+        concurrency = sum(d.concurrency for d in destinations.values() if d) or 1
 
-        remote_marked_for_deletion = dict()
-        all_results = list()
-        for destination in vm_destinations:
-            mirror_start = datetime.now()
-            result, ret = run_vm_mirror(
-                zkhandler,
-                celery,
-                config,
-                vm_detail,
-                snapshot_name,
-                destination,
-            )
-            mirror_end = datetime.now()
-            runtime_secs = (mirror_end - mirror_start).seconds
-            all_results.append(result)
-            if result:
-                remote_marked_for_deletion[destination] = ret
-
-                mirror_summary[f"{vm_detail['name']}:{destination}"] = {
-                    "result": result,
-                    "snapshot_name": snapshot_name,
-                    "runtime_secs": runtime_secs,
-                }
-            else:
-                log_warn(
+    log_info(
+        celery,
+        f"Running up to {concurrency} VM automirror(s) at once to {len(destinations)} destination(s)",
+    )
+
+    # Execute the mirrors: take a snapshot, then send the snapshot to each destination
+    with ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="automirror"
+    ) as executor:
+        futures = dict()
+        for mirror_vm in mirror_vms:
+            futures[
+                executor.submit(
+                    run_vm_mirrors,
+                    zkhandler,
                     celery,
-                    f"Error in mirror send: {ret}",
+                    config,
+                    mirror_vm["detail"],
+                    {d: destinations[d] for d in mirror_vm["destinations"]},
                 )
-                mirror_summary[f"{vm_detail['name']}:{destination}"] = {
-                    "result": result,
-                    "snapshot_name": snapshot_name,
-                    "runtime_secs": runtime_secs,
-                    "result_message": ret,
+            ] = mirror_vm
+
+        for future in as_completed(futures):
+            vm_name = futures[future]["detail"]["name"]
+            try:
+                vm_mirror_summary, vm_local_deleted_snapshots = future.result()
+            except Exception as e:
+                log_err(celery, f"Automirror of VM {vm_name} failed: {e}")
+                vm_mirror_summary = {
+                    f"{vm_name}:{d}": {
+                        "result": False,
+                        "snapshot_name": f"am{datetime.now().strftime('%Y%m%d%H%M%S')}",
+                        "runtime_secs": 0,
+                        "result_message": str(e),
+                    }
+                    for d in futures[future]["destinations"]
                 }
+                vm_local_deleted_snapshots = set()
 
-        # If all sends failed, remove the snapshot we created as it will never be needed or automatically cleaned up later
-        if not any(all_results):
-            vm.vm_worker_remove_snapshot(
-                zkhandler,
-                None,
-                vm_detail["name"],
-                snapshot_name,
-            )
-
-        # Find all local snapshots that were present in all remote snapshot deletions,
-        # then remove them
-        # If one of the sends fails, this should result in nothing being removed
-        if remote_marked_for_deletion:
-            all_lists = [set(lst) for lst in remote_marked_for_deletion.values() if lst]
-            if all_lists:
-                local_marked_for_deletion = set.intersection(*all_lists)
-            else:
-                local_marked_for_deletion = set()
-        else:
-            local_marked_for_deletion = set()
+            mirror_summary.update(vm_mirror_summary)
+            local_deleted_snapshots[vm_name] = vm_local_deleted_snapshots
 
-        for snapshot in local_marked_for_deletion:
-            log_info(
+            current_stage += 1
+            update(
                 celery,
-                f"VM {vm_detail['name']} removing stale local automirror snapshot {snapshot}",
-            )
-            vm.vm_worker_remove_snapshot(
-                zkhandler,
-                None,
-                vm_detail["name"],
-                snapshot,
+                f"Completed automirror of VM {vm_name}",
+                current=current_stage,
+                total=total_stages,
             )
 
-        local_deleted_snapshots[vm_detail["name"]] = local_marked_for_deletion
+    for destination in destinations.values():
+        if destination is not None:
+            destination.session.close()
+
+    # Report in VM name order, as the mirrors complete in no particular order
+    mirror_summary = {k: mirror_summary[k] for k in sorted(mirror_summary.keys())}
 
     automirror_end_time = datetime.now()
     automirror_total_time = automirror_end_time - automirror_start_time
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+
+# backuprepo.py - PVC content-addressed backup repository functions
+# Part of the Parallel Virtual Cluster (PVC) system
+#
+#    Copyright (C) 2018-2024 Joshua M. Boniface <joshua@boniface.me>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+import hashlib
+import os
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from glob import glob
+from json import dump as jdump
+from json import load as jload
+
+import daemon_lib.blockstream as blockstream
+
+
+#
+# Repository format definitions
+#
+# A repository is an export path containing the usual "{vm}/{snapshot}/snapshot.json" layout.
+# Rather than raw RBD export images, each exported volume is described by a manifest at
+# "{vm}/{snapshot}/images/{pool}.{volume}.manifest", listing the SHA256 digest of every non-zero
+# fixed-size chunk of the volume. The chunks themselves are stored once, compressed, under
+# "{root}/.chunks/{digest[:2]}/{digest}", and are shared by every manifest in the repository.
+#
+# Every manifest is complete, including those of incremental exports, so any snapshot can be
+# restored on its own and removing a snapshot never invalidates another.
+#
+
+# The version of the repository format implemented here
+REPOSITORY_VERSION = 1
+
+# The export format name recorded in snapshot.json for repository exports
+EXPORT_FORMAT = "chunked"
+
+# The directory, relative to the repository root, in which chunks are stored
+CHUNK_DIRECTORY = ".chunks"
+
+# Each stored chunk begins with a single byte identifying the codec of the payload which follows
+CHUNK_CODECS = {"none": 0, "zstd": 1, "lz4": 2}
+CHUNK_CODEC_NAMES = {v: k for k, v in CHUNK_CODECS.items()}
+
+# The default chunk size; this matches the default RBD object size, so chunk boundaries align
+# with the objects reported as changed by diff_iterate and with the blocks of cloned images
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Repository defaults
+DEFAULT_COMPRESSION = "zstd"
+DEFAULT_CONCURRENCY = 8
+
+# Unreferenced chunks modified within this many seconds are never removed by garbage collection,
+# so that chunks stored by in-progress exports survive until their manifests are written
+GC_GRACE_PERIOD = 24 * 60 * 60
+
+
+#
+# Chunk store
+#
+def get_chunk_path(root, digest):
+    """
+    Return the path of the chunk with the given digest in the repository at root
+    """
+    return f"{root}/{CHUNK_DIRECTORY}/{digest[:2]}/{digest}"
+
+
+def store_chunk(root, data, compression="none", compressor=None):
+    """
+    Store a chunk in the repository if it is not already present, returning its digest and the
+    number of bytes newly written to the repository
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    chunk_path = get_chunk_path(root, digest)
+
+    if os.path.exists(chunk_path):
+        try:
+            # Refresh the chunk so that garbage collection treats it as recently used
+            os.utime(chunk_path)
+            return digest, 0
+        except FileNotFoundError:
+            pass
+
+    payload = compressor(data) if compressor is not None else data
+    if compressor is None or len(payload) >= len(data):
+        # Incompressible data is stored as-is
+        compression = "none"
+        payload = data
+
+    os.makedirs(os.path.dirname(chunk_path), exist_ok=True)
+    tmp_path = f"{chunk_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as fh:
+        fh.write(bytes([CHUNK_CODECS[compression]]))
+        fh.write(payload)
+    # Chunks only ever appear complete, even if two exports store the same chunk at once
+    os.replace(tmp_path, chunk_path)
+
+    return digest, len(payload) + 1
+
+
+def load_chunk(root, digest):
+    """
+    Load and verify the chunk with the given digest from the repository
+    """
+    with open(get_chunk_path(root, digest), "rb") as fh:
+        header = fh.read(1)
+        payload = fh.read()
+
+    if len(header) < 1 or header[0] not in CHUNK_CODEC_NAMES:
+        raise ValueError(f"Chunk {digest} has an invalid header")
+
+    decompressor = blockstream.get_decompressor(CHUNK_CODEC_NAMES[header[0]])
+    data = decompressor(payload) if decompressor is not None else payload
+
+    if hashlib.sha256(data).hexdigest() != digest:
+        raise ValueError(f"Chunk {digest} failed verification")
+
+    return data
+
+
+#
+# Manifests
+#
+def read_manifest(manifest_path):
+    """
+    Read a volume manifest
+    """
+    with open(manifest_path) as fh:
+        manifest = jload(fh)
+
+    if manifest.get("version", 0) > REPOSITORY_VERSION:
+        raise ValueError(
+            f"Manifest '{manifest_path}' has unsupported version {manifest.get('version')}"
+        )
+
+    return manifest
+
+
+def write_manifest(manifest_path, manifest):
+    """
+    Write a volume manifest atomically
+    """
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w") as fh:
+        jdump(manifest, fh)
+    os.replace(tmp_path, manifest_path)
+
+
+def get_manifest_paths(root):
+    """
+    Return the paths of all volume manifests in the repository at root
+    """
+    return glob(f"{root}/*/*/images/*.manifest")
+
+
+#
+# Export and restore
+#
+def export_volume(
+    root,
+    image,
+    pool,
+    volume,
+    snapshot_name,
+    base_manifest=None,
+    base_snapshot=None,
+    compression=DEFAULT_COMPRESSION,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    concurrency=DEFAULT_CONCURRENCY,
+):
+    """
+    Store the contents of an RBD image, opened at snapshot_name, into the repository, returning
+    its manifest and the number of bytes newly written to the repository
+
+    If base_manifest describes base_snapshot of the same image, only the chunks changed since
+    base_snapshot are read; all others are carried over from base_manifest.
+    """
+    if compression not in blockstream.get_compression_types():
+        compression = blockstream.get_compression_types()[0]
+
+    size = image.size()
+
+    if (
+        base_manifest is not None
+        and base_snapshot is not None
+        and base_manifest.get("size") == size
+        and base_manifest.get("chunk_size") == chunk_size
+    ):
+        chunks = {offset: digest for offset, digest in base_manifest["chunks"]}
+        extents = blockstream.get_extents(image, size, from_snapshot=base_snapshot)
+    else:
+        chunks = dict()
+        extents = blockstream.get_extents(image, size)
+
+    # Read whole aligned chunks, so identical data always produces identical chunks
+    offsets = set()
+    for offset, length, _ in extents:
+        first = offset // chunk_size
+        last = (offset + length - 1) // chunk_size
+        offsets.update(index * chunk_size for index in range(first, last + 1))
+
+    thread_state = threading.local()
+
+    def store(offset):
+        data = image.read(offset, min(chunk_size, size - offset))
+        if blockstream.is_zero(data):
+            return offset, None, 0
+        if not hasattr(thread_state, "compressor"):
+            # Compressor objects are not thread-safe, so each thread gets its own
+            thread_state.compressor = blockstream.get_compressor(compression)
+        digest, stored_bytes = store_chunk(
+            root, data, compression, thread_state.compressor
+        )
+        return offset, digest, stored_bytes
+
+    total_stored_bytes = 0
+    with ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="repo_export"
+    ) as executor:
+        for offset, digest, stored_bytes in executor.map(store, sorted(offsets)):
+            if digest is None:
+                chunks.pop(offset, None)
+            else:
+                chunks[offset] = digest
+            total_stored_bytes += stored_bytes
+
+    manifest = {
+        "version": REPOSITORY_VERSION,
+        "pool": pool,
+        "volume": volume,
+        "snapshot": snapshot_name,
+        "size": size,
+        "chunk_size": chunk_size,
+        "chunks": [[offset, chunks[offset]] for offset in sorted(chunks.keys())],
+    }
+
+    return manifest, total_stored_bytes
+
+
+def restore_volume(
+    root,
+    manifest,
+    image,
+    base_manifest=None,
+    concurrency=DEFAULT_CONCURRENCY,
+    progress=None,
+    name=None,
+):
+    """
+    Write the contents described by manifest into an RBD image, returning the number of bytes
+    written
+
+    The image must either be zeroed, or contain exactly the contents described by base_manifest,
+    in which case only the chunks which differ from base_manifest are written. If progress is set,
+    the bytes written are accounted to name in this blockstream.TransferProgress, which also
+    applies its rate limit.
+    """
+    size = manifest["size"]
+    chunk_size = manifest["chunk_size"]
+    chunks = {offset: digest for offset, digest in manifest["chunks"]}
+
+    zero_extents = list()
+    if base_manifest is not None:
+        if base_manifest["chunk_size"] == chunk_size:
+            base_chunks = {offset: digest for offset, digest in base_manifest["chunks"]}
+            for offset in sorted(base_chunks.keys()):
+                if offset < size and offset not in chunks:
+                    zero_extents.append((offset, min(chunk_size, size - offset)))
+            chunks = {
+                offset: digest
+                for offset, digest in chunks.items()
+                if base_chunks.get(offset) != digest
+            }
+        else:
+            zero_extents.append((0, size))
+
+    for offset, length in zero_extents:
+        image.write_zeroes(offset, length)
+
+    def write(item):
+        offset, digest = item
+        data = load_chunk(root, digest)
+        image.write(data, offset)
+        if progress is not None:
+            progress.add(name, len(data), len(data))
+        return len(data)
+
+    written_bytes = 0
+    with ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="repo_restore"
+    ) as executor:
+        for length in executor.map(write, sorted(chunks.items())):
+            written_bytes += length
+
+    image.flush()
+    return written_bytes
+
+
+def export_snapshot_volume(
+    root,
+    manifest_path,
+    pool,
+    volume,
+    snapshot_name,
+    base_manifest_path=None,
+    base_snapshot=None,
+    compression=DEFAULT_COMPRESSION,
+    concurrency=DEFAULT_CONCURRENCY,
+):
+    """
+    Export an RBD snapshot into the repository at root and write its manifest to manifest_path,
+    returning the number of bytes newly written to the repository
+    """
+    base_manifest = None
+    if base_manifest_path is not None and os.path.isfile(base_manifest_path):
+        base_manifest = read_manifest(base_manifest_path)
+
+    cluster, ioctx, image = blockstream.open_image(pool, volume)
+    try:
+        image.set_snap(snapshot_name)
+        manifest, stored_bytes = export_volume(
+            root,
+            image,
+            pool,
+            volume,
+            snapshot_name,
+            base_manifest=base_manifest,
+            base_snapshot=base_snapshot,
+            compression=compression,
+            concurrency=concurrency,
+        )
+    finally:
+        blockstream.close_image(cluster, ioctx, image)
+
+    write_manifest(manifest_path, manifest)
+    return stored_bytes + os.path.getsize(manifest_path)
+
+
+#
+# Garbage collection
+#
+def garbage_collect(root, grace_period=GC_GRACE_PERIOD):
+    """
+    Remove all chunks not referenced by any manifest in the repository at root, returning the
+    number of chunks and bytes removed
+
+    Retention is applied by removing snapshot directories; this then reclaims their chunks.
+    """
+    chunk_root = f"{root}/{CHUNK_DIRECTORY}"
+    if not os.path.isdir(chunk_root):
+        return 0, 0
+
+    # Any unreadable manifest raises here, so that its chunks are never removed
+    referenced = set()
+    for manifest_path in get_manifest_paths(root):
+        manifest = read_manifest(manifest_path)
+        referenced.update(digest for _, digest in manifest["chunks"])
+
+    cutoff = time.time() - grace_period
+    removed_chunks = 0
+    removed_bytes = 0
+    with os.scandir(chunk_root) as prefixes:
+        for prefix in prefixes:
+            if not prefix.is_dir():
+                continue
+            with os.scandir(prefix.path) as entries:
+                for entry in entries:
+                    is_tmp = entry.name.endswith(".tmp")
+                    if not is_tmp and entry.name in referenced:
+                        continue
+                    stat = entry.stat()
+                    if stat.st_mtime >= cutoff:
+                        continue
+                    try:
+                        os.remove(entry.path)
+                    except FileNotFoundError:
+                        continue
+                    if not is_tmp:
+                        removed_chunks += 1
+                    removed_bytes += stat.st_size
+
+    return removed_chunks, removed_bytes
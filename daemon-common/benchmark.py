@@ -21,21 +21,29 @@
 
 import os
 import psutil
-import psycopg2
-import psycopg2.extras
+import re
 import subprocess
+import threading
+import time
 
 from datetime import datetime
 from json import loads, dumps
 from time import sleep
 
-from daemon_lib.celery import start, fail, log_info, update, finish
+from daemon_lib.celery import start, fail, log_info, log_warn, update, finish
+from daemon_lib.database import open_database, close_database
 
+import daemon_lib.common as common
 import daemon_lib.ceph as pvc_ceph
 
 
 # Define the current test format
-TEST_FORMAT = 2
+#   0: Legacy text-parsed results of a single client
+#   1: fio JSON results of a single client
+#   2: fio JSON results of a single client with system resource utilization
+#   3: Profile-based results of one or more concurrent clients with merged latency histograms
+#      and per-OSD latency
+TEST_FORMAT = 3
 
 
 # We run a total of 8 tests, to give a generalized idea of performance on the cluster:
@@ -101,7 +109,61 @@ test_matrix = {
 }
 
 
-# Specify the benchmark volume name and size
+# Benchmark profiles; each profile runs its matrix of tests in order, with every test run by
+# "clients" nodes at once (0 for every node), each against its own benchmark volume
+benchmark_profiles = {
+    "default": {
+        "description": "The standard 8-test matrix from a single node",
+        "clients": 1,
+        "runtime": 75,
+        "ramp_time": 15,
+        "volume_size": "64G",
+        "tests": test_matrix,
+    },
+    "scaling": {
+        "description": "Sequential and 4K random tests from every node at once",
+        "clients": 0,
+        "runtime": 60,
+        "ramp_time": 10,
+        "volume_size": "64G",
+        "tests": {
+            test: test_matrix[test]
+            for test in ["seq_read", "seq_write", "rand_read_4K", "rand_write_4K"]
+        },
+    },
+    "latency": {
+        "description": "Single-queue 4K random tests from a single node",
+        "clients": 1,
+        "runtime": 60,
+        "ramp_time": 10,
+        "volume_size": "16G",
+        "tests": {
+            test: test_matrix[test]
+            for test in ["rand_read_4K_lowdepth", "rand_write_4K_lowdepth"]
+        },
+    },
+}
+
+# The fio readwrite modes permitted in test matrices, and the I/O direction of each
+benchmark_rw_directions = {
+    "read": "read",
+    "write": "write",
+    "randread": "read",
+    "randwrite": "write",
+    "rw": "mixed",
+    "randrw": "mixed",
+}
+
+# The completion latency percentiles reported by fio for each client
+clat_percentiles = [1, 5, 10, 25, 50, 75, 90, 95, 99, 99.5, 99.9, 99.99]
+
+# The interval, in seconds, between samples of per-OSD latency during each test
+osd_perf_interval = 5
+
+# The time, in seconds, allowed for every client to receive its test before the test starts
+client_start_delay = 10
+
+# Specify the benchmark volume name and default size; each client uses its own volume
 benchmark_volume_name = "pvcbenchmark"
 benchmark_volume_size = "64G"
 
@@ -133,26 +195,6 @@ def cleanup(job_name, db_conn=None, db_cur=None, zkhandler=None, final=False):
         del zkhandler
 
 
-# Database connections
-def open_database(config):
-    conn = psycopg2.connect(
-        host=config["api_postgresql_host"],
-        port=config["api_postgresql_port"],
-        dbname=config["api_postgresql_dbname"],
-        user=config["api_postgresql_user"],
-        password=config["api_postgresql_password"],
-    )
-    cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    return conn, cur
-
-
-def close_database(conn, cur, failed=False):
-    if not failed:
-        conn.commit()
-    cur.close()
-    conn.close()
-
-
 def list_benchmarks(config, job=None):
     if job is not None:
         query = "SELECT * FROM {} WHERE job = %s;".format("storage_benchmarks")
@@ -186,33 +228,131 @@ def list_benchmarks(config, job=None):
         return {"message": "No benchmark found."}, 404
 
 
-def prepare_benchmark_volume(
-    pool, job_name=None, db_conn=None, db_cur=None, zkhandler=None
-):
-    # Create the RBD volume
-    retcode, retmsg = pvc_ceph.add_volume(
-        zkhandler, pool, benchmark_volume_name, benchmark_volume_size
-    )
-    if not retcode:
-        cleanup(
-            job_name,
-            db_conn=db_conn,
-            db_cur=db_cur,
-            zkhandler=zkhandler,
-        )
-        fail(
-            None,
-            f'Failed to create volume "{benchmark_volume_name}" on pool "{pool}": {retmsg}',
+def get_benchmark_spec(profile=None, matrix=None, clients=None, runtime=None):
+    """
+    Build the specification of a benchmark run from a profile and optional overrides
+
+    {matrix} is a dictionary (or JSON string) of test names to fio test specs, each with "rw", "bs",
+    "iodepth" and optionally "numjobs" values; it replaces the tests of the profile.
+    """
+    if profile is None:
+        profile = "default"
+    if profile not in benchmark_profiles:
+        return (
+            False,
+            f'Benchmark profile "{profile}" is not valid; valid profiles are: {", ".join(benchmark_profiles.keys())}',
         )
-    else:
-        log_info(None, retmsg)
+
+    spec = {
+        key: value
+        for key, value in benchmark_profiles[profile].items()
+        if key != "description"
+    }
+    spec["profile"] = profile
+
+    if matrix is not None:
+        if isinstance(matrix, str):
+            try:
+                matrix = loads(matrix)
+            except Exception as e:
+                return False, f"Test matrix is not valid JSON: {e}"
+        if not isinstance(matrix, dict) or len(matrix) < 1:
+            return (
+                False,
+                "Test matrix must be a non-empty object of test names to tests",
+            )
+
+        tests = dict()
+        for test, test_spec in matrix.items():
+            if not re.match(r"^[\w.-]+$", test):
+                return False, f'Test name "{test}" is not valid'
+            if not isinstance(test_spec, dict):
+                return False, f'Test "{test}" must be an object'
+            rw = test_spec.get("rw")
+            if rw not in benchmark_rw_directions:
+                return (
+                    False,
+                    f'Test "{test}" has invalid "rw" value "{rw}"; valid values are: {", ".join(benchmark_rw_directions.keys())}',
+                )
+            bs = str(test_spec.get("bs", ""))
+            if not re.match(r"^[0-9]+[KkMm]?$", bs):
+                return False, f'Test "{test}" has invalid "bs" value "{bs}"'
+            try:
+                iodepth = int(test_spec.get("iodepth", 1))
+                numjobs = int(test_spec.get("numjobs", 1))
+                if not 1 <= iodepth <= 1024 or not 1 <= numjobs <= 64:
+                    raise ValueError
+            except (TypeError, ValueError):
+                return (
+                    False,
+                    f'Test "{test}" must have an "iodepth" between 1 and 1024 and a "numjobs" between 1 and 64',
+                )
+            tests[test] = {
+                "direction": benchmark_rw_directions[rw],
+                "iodepth": str(iodepth),
+                "numjobs": str(numjobs),
+                "bs": bs.upper(),
+                "rw": rw,
+            }
+        spec["profile"] = f"{profile} (custom matrix)"
+        spec["tests"] = tests
+
+    if clients is not None:
+        try:
+            spec["clients"] = int(clients)
+            if spec["clients"] < 0:
+                raise ValueError
+        except (TypeError, ValueError):
+            return False, "Client count must be 0 (all nodes) or a positive integer"
+
+    if runtime is not None:
+        try:
+            spec["runtime"] = int(runtime)
+            if not 10 <= spec["runtime"] <= 3600:
+                raise ValueError
+        except (TypeError, ValueError):
+            return False, "Test runtime must be between 10 and 3600 seconds"
+
+    return True, spec
+
+
+def get_benchmark_clients(zkhandler, count):
+    """
+    Return the nodes to run benchmark clients on: the primary node first, then other running nodes
+    """
+    primary_node = zkhandler.read("base.config.primary_node")
+    all_nodes = sorted(zkhandler.children("base.node"))
+    node_states = zkhandler.read_many(
+        [("node.state.daemon", node) for node in all_nodes]
+    )
+    run_nodes = [
+        node
+        for node, state in zip(all_nodes, node_states)
+        if state == "run" and node != primary_node
+    ]
+    nodes = [primary_node] + run_nodes
+
+    if count == 0:
+        return nodes
+    if count > len(nodes):
+        return None
+    return nodes[:count]
+
+
+def get_benchmark_volume_name(node):
+    return f"{benchmark_volume_name}_{node}"
 
 
 def cleanup_benchmark_volume(
-    pool, job_name=None, db_conn=None, db_cur=None, zkhandler=None
+    pool,
+    volume=benchmark_volume_name,
+    job_name=None,
+    db_conn=None,
+    db_cur=None,
+    zkhandler=None,
 ):
     # Remove the RBD volume
-    retcode, retmsg = pvc_ceph.remove_volume(zkhandler, pool, benchmark_volume_name)
+    retcode, retmsg = pvc_ceph.remove_volume(zkhandler, pool, volume)
     if not retcode:
         cleanup(
             job_name,
@@ -222,37 +362,42 @@ def cleanup_benchmark_volume(
         )
         fail(
             None,
-            f'Failed to remove volume "{benchmark_volume_name}" from pool "{pool}": {retmsg}',
+            f'Failed to remove volume "{volume}" from pool "{pool}": {retmsg}',
         )
     else:
         log_info(None, retmsg)
 
 
-def run_benchmark_job(
-    config, test, pool, job_name=None, db_conn=None, db_cur=None, zkhandler=None
-):
-    test_spec = test_matrix[test]
-    log_info(None, f"Running test '{test}'")
+def run_benchmark_job(config, test, test_spec, pool, volume, runtime, ramp_time):
+    log_info(None, f"Running test '{test}' against volume '{pool}/{volume}'")
+    # Report JSON with the full completion latency histogram (json+), so that the histograms of
+    # several clients can be merged into exact cluster-wide percentiles
     fio_cmd = """
             fio \
                 --name={test} \
                 --ioengine=rbd \
                 --pool={pool} \
                 --rbdname={volume} \
-                --output-format=json \
+                --output-format=json+ \
                 --direct=1 \
                 --randrepeat=1 \
-                --numjobs=1 \
+                --numjobs={numjobs} \
                 --time_based \
-                --runtime=75 \
+                --ramp_time={ramp_time} \
+                --runtime={runtime} \
                 --group_reporting \
+                --percentile_list={percentiles} \
                 --iodepth={iodepth} \
                 --bs={bs} \
                 --readwrite={rw}
         """.format(
         test=test,
         pool=pool,
-        volume=benchmark_volume_name,
+        volume=volume,
+        numjobs=test_spec.get("numjobs", "1"),
+        ramp_time=ramp_time,
+        runtime=runtime,
+        percentiles=":".join([str(p) for p in clat_percentiles]),
         iodepth=test_spec["iodepth"],
         bs=test_spec["bs"],
         rw=test_spec["rw"],
@@ -269,9 +414,9 @@ def run_benchmark_job(
         text=True,
     )
 
-    # Wait 15 seconds for the test to start
-    log_info(None, "Waiting 15 seconds for test resource stabilization")
-    sleep(15)
+    # Resource utilization, like the fio results, excludes the ramp time
+    log_info(None, f"Waiting {ramp_time} seconds for the test ramp time")
+    sleep(ramp_time)
 
     # Set up function to get process CPU utilization by name
     def get_cpu_utilization_by_name(process_name):
@@ -294,7 +439,7 @@ def run_benchmark_job(
         # Get initial network counters
         net_io_start = psutil.net_io_counters(pernic=True)
         if interface not in net_io_start:
-            return None, None
+            return 0, 0, 0
 
         stats_start = net_io_start[interface]
         bytes_sent_start = stats_start.bytes_sent
@@ -410,7 +555,247 @@ def run_benchmark_job(
     return resource_data, jstdout
 
 
-def worker_run_benchmark(zkhandler, celery, config, pool, name):
+def get_osd_perf():
+    """
+    Return the current commit and apply latency (in ms) of each OSD from "ceph osd perf"
+    """
+    retcode, stdout, stderr = common.run_os_command(
+        "ceph osd perf --format json", timeout=osd_perf_interval
+    )
+    if retcode:
+        return dict()
+
+    try:
+        osd_perf = loads(stdout)
+        # Newer Ceph releases nest the OSD perf infos under "osdstats"
+        osd_perf_infos = osd_perf.get("osdstats", osd_perf)["osd_perf_infos"]
+    except Exception:
+        return dict()
+
+    return {
+        str(info["id"]): (
+            info["perf_stats"]["commit_latency_ms"],
+            info["perf_stats"]["apply_latency_ms"],
+        )
+        for info in osd_perf_infos
+    }
+
+
+def collect_osd_perf(stop_event, samples):
+    """
+    Append samples of per-OSD latency to samples every osd_perf_interval seconds until stop_event
+    """
+    while not stop_event.wait(osd_perf_interval):
+        sample = get_osd_perf()
+        if sample:
+            samples.append(sample)
+
+
+def summarize_osd_perf(samples):
+    """
+    Return the average and maximum commit and apply latency (in ms) of each OSD over samples
+    """
+    osd_perf = dict()
+    for osd in sorted(set(osd for sample in samples for osd in sample), key=int):
+        commit = [sample[osd][0] for sample in samples if osd in sample]
+        apply = [sample[osd][1] for sample in samples if osd in sample]
+        osd_perf[osd] = {
+            "commit_latency_ms": {
+                "avg": round(sum(commit) / len(commit), 2),
+                "max": max(commit),
+            },
+            "apply_latency_ms": {
+                "avg": round(sum(apply) / len(apply), 2),
+                "max": max(apply),
+            },
+        }
+    return osd_perf
+
+
+def get_histogram_percentiles(bins):
+    """
+    Return the clat_percentiles of a fio latency histogram of bucket values (in ns) to counts
+    """
+    buckets = sorted((int(value), count) for value, count in bins.items())
+    total = sum(count for _, count in buckets)
+    percentiles = dict()
+    if total < 1:
+        return percentiles
+
+    idx = 0
+    seen = buckets[0][1]
+    for percentile in clat_percentiles:
+        while seen < total * percentile / 100 and idx < len(buckets) - 1:
+            idx += 1
+            seen += buckets[idx][1]
+        percentiles[f"{float(percentile):.6f}"] = buckets[idx][0]
+    return percentiles
+
+
+def summarize_benchmark_test(test_spec, client_results, osd_perf_samples):
+    """
+    Combine the results of every client of a test into cluster-wide results
+
+    Bandwidth and IOPS are summed over the clients, and completion latency percentiles are
+    calculated from the merged latency histograms of every client.
+    """
+    overall = dict()
+    histograms = dict()
+    clients = dict()
+
+    for node, client_result in client_results.items():
+        job = client_result["fio"]["jobs"][0]
+        for io_class in ["read", "write"]:
+            if job[io_class]["io_bytes"] < 1:
+                continue
+
+            clat = job[io_class]["clat_ns"]
+            class_overall = overall.setdefault(
+                io_class,
+                {
+                    "bw_bytes": 0,
+                    "iops": 0,
+                    "io_bytes": 0,
+                    "total_ios": 0,
+                    "clat_ns": {"min": None, "max": 0, "mean": 0},
+                },
+            )
+            class_overall["bw_bytes"] += job[io_class]["bw_bytes"]
+            class_overall["iops"] += job[io_class]["iops"]
+            class_overall["io_bytes"] += job[io_class]["io_bytes"]
+            class_overall["total_ios"] += job[io_class]["total_ios"]
+            if class_overall["clat_ns"]["min"] is None:
+                class_overall["clat_ns"]["min"] = clat["min"]
+            else:
+                class_overall["clat_ns"]["min"] = min(
+                    class_overall["clat_ns"]["min"], clat["min"]
+                )
+            class_overall["clat_ns"]["max"] = max(
+                class_overall["clat_ns"]["max"], clat["max"]
+            )
+            # Weight the mean of each client by its number of completions
+            class_overall["clat_ns"]["mean"] += clat["mean"] * clat.get("N", 0)
+
+            histogram = histograms.setdefault(io_class, dict())
+            for value, count in clat.pop("bins", dict()).items():
+                histogram[value] = histogram.get(value, 0) + count
+
+        clients[node] = client_result
+
+    for io_class, class_overall in overall.items():
+        completions = sum(histograms[io_class].values())
+        if completions > 0:
+            class_overall["clat_ns"]["mean"] = round(
+                class_overall["clat_ns"]["mean"] / completions, 2
+            )
+        class_overall["clat_ns"]["percentile"] = get_histogram_percentiles(
+            histograms[io_class]
+        )
+
+    return {
+        "spec": test_spec,
+        "overall": overall,
+        "clat_histogram_ns": histograms,
+        "osd_perf": summarize_osd_perf(osd_perf_samples),
+        "clients": clients,
+    }
+
+
+def worker_run_benchmark_client(
+    celery, config, pool, volume, test, test_spec, runtime, ramp_time, start_at
+):
+    """
+    Run a single benchmark test from this node as one client of a storage benchmark
+    """
+    start(
+        celery,
+        f"Running storage benchmark test '{test}' against volume '{pool}/{volume}'",
+    )
+
+    # Start at the same time as every other client of the test
+    delay = start_at - time.time()
+    if delay > 0:
+        sleep(delay)
+    else:
+        log_warn(None, f"Starting test '{test}' {-delay:.1f} seconds late")
+
+    resource_data, fio_data = run_benchmark_job(
+        config, test, test_spec, pool, volume, runtime, ramp_time
+    )
+    if resource_data is None or fio_data is None:
+        fail(celery, f"Failed to run fio test '{test}'", exception=BenchmarkError)
+
+    return {"resources": resource_data, "fio": fio_data}
+
+
+def run_benchmark_test(celery, spec, test, pool, clients):
+    """
+    Run a benchmark test on every client node at once, returning the combined results
+
+    Each client runs as a storage.benchmark.client task on its own node, while this node samples
+    the per-OSD latency of the cluster.
+    """
+    test_spec = spec["tests"][test]
+    start_at = time.time() + client_start_delay
+
+    client_tasks = dict()
+    for node in clients:
+        client_tasks[node] = celery.app.send_task(
+            "storage.benchmark.client",
+            kwargs={
+                "pool": pool,
+                "volume": get_benchmark_volume_name(node),
+                "test": test,
+                "test_spec": test_spec,
+                "runtime": spec["runtime"],
+                "ramp_time": spec["ramp_time"],
+                "start_at": start_at,
+                "run_on": node,
+            },
+            queue=node,
+        )
+
+    osd_perf_samples = list()
+    stop_event = threading.Event()
+    osd_perf_thread = threading.Thread(
+        target=collect_osd_perf, args=(stop_event, osd_perf_samples), daemon=True
+    )
+    # Only sample once the clients have started and finished their ramp time
+    sleep(max(0, start_at + spec["ramp_time"] - time.time()))
+    osd_perf_thread.start()
+
+    timeout = spec["runtime"] + spec["ramp_time"] + client_start_delay + 300
+    client_results = dict()
+    errors = list()
+    try:
+        for node, client_task in client_tasks.items():
+            try:
+                client_results[node] = client_task.get(
+                    timeout=timeout, disable_sync_subtasks=False
+                )
+            except Exception as e:
+                errors.append(f"{node}: {e}")
+    finally:
+        stop_event.set()
+        osd_perf_thread.join()
+
+    if errors:
+        return None, "; ".join(errors)
+
+    return summarize_benchmark_test(test_spec, client_results, osd_perf_samples), None
+
+
+def worker_run_benchmark(
+    zkhandler,
+    celery,
+    config,
+    pool,
+    name,
+    profile=None,
+    matrix=None,
+    clients=None,
+    runtime=None,
+):
     # Phase 0 - connect to databases
     if not name:
         cur_time = datetime.now().isoformat(timespec="seconds")
@@ -419,11 +804,25 @@ def worker_run_benchmark(zkhandler, celery, config, pool, name):
     else:
         job_name = name
 
+    retcode, spec = get_benchmark_spec(profile, matrix, clients, runtime)
+    if not retcode:
+        cleanup(job_name, zkhandler=zkhandler)
+        fail(celery, spec, exception=BenchmarkError)
+
+    client_nodes = get_benchmark_clients(zkhandler, spec["clients"])
+    if client_nodes is None:
+        cleanup(job_name, zkhandler=zkhandler)
+        fail(
+            celery,
+            f"Cannot run {spec['clients']} benchmark clients; not enough nodes are running",
+            exception=BenchmarkError,
+        )
+
     current_stage = 0
-    total_stages = 13
+    total_stages = 6 + len(spec["tests"])
     start(
         celery,
-        f"Running storage benchmark '{job_name}' on pool '{pool}'",
+        f"Running storage benchmark '{job_name}' with profile '{spec['profile']}' and {len(client_nodes)} client(s) on pool '{pool}'",
         current=current_stage,
         total=total_stages,
     )
@@ -471,47 +870,67 @@ def worker_run_benchmark(zkhandler, celery, config, pool, name):
     current_stage += 1
     update(
         celery,
-        "Creating benchmark volume",
+        f"Creating benchmark volumes for clients {', '.join(client_nodes)}",
         current=current_stage,
         total=total_stages,
     )
 
-    prepare_benchmark_volume(
-        pool,
-        job_name=job_name,
-        db_conn=db_conn,
-        db_cur=db_cur,
-        zkhandler=zkhandler,
-    )
+    created_volumes = list()
+
+    def cleanup_benchmark_volumes():
+        for volume in created_volumes:
+            cleanup_benchmark_volume(
+                pool,
+                volume=volume,
+                job_name=job_name,
+                db_conn=db_conn,
+                db_cur=db_cur,
+                zkhandler=zkhandler,
+            )
+
+    for node in client_nodes:
+        volume = get_benchmark_volume_name(node)
+        retcode, retmsg = pvc_ceph.add_volume(
+            zkhandler, pool, volume, spec["volume_size"]
+        )
+        if not retcode:
+            cleanup_benchmark_volumes()
+            cleanup(
+                job_name,
+                db_conn=db_conn,
+                db_cur=db_cur,
+                zkhandler=zkhandler,
+            )
+            fail(
+                celery,
+                f'Failed to create volume "{volume}" on pool "{pool}": {retmsg}',
+                exception=BenchmarkError,
+            )
+        log_info(None, retmsg)
+        created_volumes.append(volume)
 
     # Phase 2 - benchmark run
-    results = dict()
-    for test in test_matrix:
+    results = {
+        "profile": spec["profile"],
+        "pool": pool,
+        "clients": client_nodes,
+        "runtime": spec["runtime"],
+        "ramp_time": spec["ramp_time"],
+        "volume_size": spec["volume_size"],
+        "tests": dict(),
+    }
+    for test in spec["tests"]:
         current_stage += 1
         update(
             celery,
-            f"Running benchmark job '{test}'",
+            f"Running benchmark job '{test}' on {len(client_nodes)} client(s)",
             current=current_stage,
             total=total_stages,
         )
 
-        resource_data, fio_data = run_benchmark_job(
-            config,
-            test,
-            pool,
-            job_name=job_name,
-            db_conn=db_conn,
-            db_cur=db_cur,
-            zkhandler=zkhandler,
-        )
-        if resource_data is None or fio_data is None:
-            cleanup_benchmark_volume(
-                pool,
-                job_name=job_name,
-                db_conn=db_conn,
-                db_cur=db_cur,
-                zkhandler=zkhandler,
-            )
+        test_results, error = run_benchmark_test(celery, spec, test, pool, client_nodes)
+        if test_results is None:
+            cleanup_benchmark_volumes()
             cleanup(
                 job_name,
                 db_conn=db_conn,
@@ -519,27 +938,22 @@ def worker_run_benchmark(zkhandler, celery, config, pool, name):
                 zkhandler=zkhandler,
             )
             fail(
-                None,
-                f"Failed to run fio test '{test}'",
+                celery,
+                f"Failed to run fio test '{test}': {error}",
+                exception=BenchmarkError,
             )
-        results[test] = {**resource_data, **fio_data}
+        results["tests"][test] = test_results
 
     # Phase 3 - cleanup
     current_stage += 1
     update(
         celery,
-        "Cleaning up venchmark volume",
+        "Cleaning up benchmark volumes",
         current=current_stage,
         total=total_stages,
     )
 
-    cleanup_benchmark_volume(
-        pool,
-        job_name=job_name,
-        db_conn=db_conn,
-        db_cur=db_cur,
-        zkhandler=zkhandler,
-    )
+    cleanup_benchmark_volumes()
 
     current_stage += 1
     update(
@@ -0,0 +1,1153 @@
+#!/usr/bin/env python3
+
+# blockstream.py - PVC RBD block transfer protocol functions
+# Part of the Parallel Virtual Cluster (PVC) system
+#
+#    Copyright (C) 2018-2024 Joshua M. Boniface <joshua@boniface.me>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+import os
+import requests
+import struct
+import subprocess
+import tempfile
+import time
+
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import lru_cache
+from threading import Lock, Semaphore
+from zlib import crc32
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+
+#
+# Protocol definitions
+#
+
+# The version of the extent stream protocol implemented here
+PROTOCOL_VERSION = 1
+
+# Each extent frame begins with a big-endian header containing:
+#   * the offset of the extent in the image (64-bit)
+#   * the raw length of the extent (64-bit)
+#   * the length of the (possibly compressed) payload which follows the header (64-bit)
+#   * a set of FRAME_FLAG_* flags (8-bit)
+#   * the CRC32 of the raw extent data, if FRAME_FLAG_CHECKSUM is set (32-bit)
+FRAME_HEADER = struct.Struct(">QQQBI")
+FRAME_FLAG_CHECKSUM = 0x01
+# A zero frame has no payload; the receiver zeroes the extent instead
+FRAME_FLAG_ZERO = 0x02
+
+# The RBD image metadata key prefix used to record the resume offset of each stream
+RESUME_KEY_PREFIX = "pvc.receive."
+
+# The RBD image metadata key used to record the committed offset of a chunked upload
+UPLOAD_KEY = "pvc.upload.offset"
+
+# The largest extent sent in a single frame; adjacent RBD objects are merged up to this
+MAX_EXTENT_SIZE = 8 * 1024 * 1024
+
+# Transfer defaults
+DEFAULT_COMPRESSION = "zstd"
+DEFAULT_VOLUME_CONCURRENCY = 2
+DEFAULT_STREAM_CONCURRENCY = 4
+
+# The number of times a failed stream is resumed before the transfer fails
+STREAM_RETRIES = 3
+
+# The maximum number of asynchronous writes in flight per received stream; this bounds
+# receiver memory to roughly AIO_DEPTH * MAX_EXTENT_SIZE per stream
+AIO_DEPTH = 8
+
+# The number of bytes received between resume checkpoints
+CHECKPOINT_INTERVAL = 256 * 1024 * 1024
+
+# The interval between progress reports, in seconds
+PROGRESS_INTERVAL = 5
+
+
+#
+# Compression helpers
+#
+def get_compression_types():
+    """
+    Return the list of wire compression types supported on this system, in order of preference
+    """
+    compression_types = list()
+    if zstandard is not None:
+        compression_types.append("zstd")
+    if lz4 is not None:
+        compression_types.append("lz4")
+    compression_types.append("none")
+    return compression_types
+
+
+def select_compression(requested, remote_types):
+    """
+    Select a compression type supported by both ends, preferring the requested type
+    """
+    local_types = get_compression_types()
+    if requested in local_types and requested in remote_types:
+        return requested
+    if requested == "none":
+        return "none"
+    for compression in local_types:
+        if compression in remote_types:
+            return compression
+    return "none"
+
+
+def get_compressor(compression):
+    """
+    Return a compression function for the given type, or None for no compression
+
+    Compressor objects are not thread-safe, so each stream must obtain its own.
+    """
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress
+    elif compression == "lz4":
+        return lz4.frame.compress
+    else:
+        return None
+
+
+def get_decompressor(compression):
+    """
+    Return a decompression function for the given type, or None for no compression
+    """
+    if compression == "zstd":
+        return zstandard.ZstdDecompressor().decompress
+    elif compression == "lz4":
+        return lz4.frame.decompress
+    elif compression in [None, "none"]:
+        return None
+    else:
+        raise ValueError(f"Unsupported compression type '{compression}'")
+
+
+@lru_cache(maxsize=8)
+def _zero_block(length):
+    return bytes(length)
+
+
+def is_zero(data):
+    """
+    Return True if data contains only zero bytes
+    """
+    return data == _zero_block(len(data))
+
+
+#
+# Extent helpers
+#
+def get_extents(image, size, from_snapshot=None, max_extent_size=MAX_EXTENT_SIZE):
+    """
+    Return a list of (offset, length, exists) tuples for the allocated extents of image, or those
+    changed since from_snapshot if set, merging adjacent extents up to max_extent_size
+
+    Extents with exists False were removed since from_snapshot and must be zeroed on the target.
+    """
+    extents = list()
+
+    def diff_cb(offset, length, exists):
+        while length > 0:
+            if extents:
+                last_offset, last_length, last_exists = extents[-1]
+                grow = min(length, max_extent_size - last_length)
+                if (
+                    last_offset + last_length == offset
+                    and last_exists == exists
+                    and grow > 0
+                ):
+                    extents[-1] = (last_offset, last_length + grow, exists)
+                    offset += grow
+                    length -= grow
+                    continue
+            part = min(length, max_extent_size)
+            extents.append((offset, part, exists))
+            offset += part
+            length -= part
+
+    image.diff_iterate(0, size, from_snapshot, diff_cb, whole_object=True)
+    return extents
+
+
+def split_extents(extents, count):
+    """
+    Split a list of extents into at most count contiguous groups of roughly equal size
+    """
+    total = sum(length for _, length in extents)
+    target = total / max(count, 1)
+    groups = [list()]
+    group_size = 0
+    for extent in extents:
+        if group_size >= target * len(groups) and len(groups) < count:
+            groups.append(list())
+        groups[-1].append(extent)
+        group_size += extent[1]
+    return [group for group in groups if group]
+
+
+#
+# Progress tracking
+#
+class RateLimiter(object):
+    """
+    A thread-safe token bucket limiting the combined rate of all transfers which share it
+    """
+
+    def __init__(self, rate):
+        # The rate is in bytes per second; 0 or None disables limiting
+        self.rate = rate
+        self.lock = Lock()
+        self.allowance = rate or 0
+        self.last = time.monotonic()
+
+    def consume(self, length):
+        """
+        Account for length bytes, sleeping as required to stay within the rate
+        """
+        if not self.rate or length <= 0:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.allowance = min(
+                self.rate, self.allowance + (now - self.last) * self.rate
+            )
+            self.last = now
+            self.allowance -= length
+            delay = -self.allowance / self.rate if self.allowance < 0 else 0
+        if delay > 0:
+            time.sleep(delay)
+
+
+class TransferProgress(object):
+    """
+    Thread-safe byte counters for a set of concurrent volume transfers
+
+    If limiter is set, every sender blocks in add() as required to keep the wire bytes of all
+    transfers sharing the limiter within its rate.
+    """
+
+    def __init__(self, limiter=None):
+        self.lock = Lock()
+        self.volumes = dict()
+        self.limiter = limiter
+
+    def begin(self, name, total_bytes):
+        with self.lock:
+            self.volumes[name] = {
+                "total_bytes": total_bytes,
+                "raw_bytes": 0,
+                "wire_bytes": 0,
+                "start": time.time(),
+                "end": None,
+            }
+
+    def add(self, name, raw_bytes, wire_bytes):
+        with self.lock:
+            self.volumes[name]["raw_bytes"] += raw_bytes
+            self.volumes[name]["wire_bytes"] += wire_bytes
+        if self.limiter is not None:
+            self.limiter.consume(wire_bytes)
+
+    def end(self, name):
+        with self.lock:
+            self.volumes[name]["end"] = time.time()
+
+    def rate(self, name):
+        """
+        Return the current (or final) throughput of a volume transfer in MB/s
+        """
+        volume = self.volumes[name]
+        end = volume["end"] if volume["end"] is not None else time.time()
+        elapsed = max(end - volume["start"], 0.001)
+        return round(volume["raw_bytes"] / 1024 / 1024 / elapsed, 1)
+
+    def format(self):
+        """
+        Return a summary of all active volume transfers
+        """
+        details = list()
+        for name, volume in list(self.volumes.items()):
+            if volume["end"] is not None:
+                continue
+            if volume["total_bytes"] > 0:
+                percent = round(volume["raw_bytes"] / volume["total_bytes"] * 100)
+            else:
+                percent = 100
+            details.append(f"{name} {percent}% at {self.rate(name)} MB/s")
+        return ", ".join(details)
+
+    def summary(self):
+        """
+        Return the total raw MB, total wire MB and per-volume throughput of all transfers
+        """
+        raw_mb = sum(v["raw_bytes"] for v in self.volumes.values()) / 1024 / 1024
+        wire_mb = sum(v["wire_bytes"] for v in self.volumes.values()) / 1024 / 1024
+        rates = {name: self.rate(name) for name in self.volumes.keys()}
+        return raw_mb, wire_mb, rates
+
+
+#
+# Sender functions
+#
+def get_session(
+    api_key,
+    verify_ssl=True,
+    pool_size=DEFAULT_VOLUME_CONCURRENCY * DEFAULT_STREAM_CONCURRENCY,
+):
+    """
+    Return a requests session for a remote PVC API with a connection pool of pool_size
+
+    The session may be shared by any number of concurrent sends to the same remote.
+    """
+    session = requests.Session()
+    session.headers.update({"X-Api-Key": api_key})
+    session.verify = verify_ssl
+    session.timeout = (3.05, 172800)
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.pvc_pool_size = pool_size
+    return session
+
+
+def generate_frames(image, extents, compression, progress, name, skip_zero=True):
+    """
+    Generate extent frames (header and payload) for the given extents of image
+
+    Extents which are removed or read back as all zeroes are sent as zero frames, or omitted
+    entirely if skip_zero is set, since the receiver starts a full transfer from a zeroed image.
+    """
+    compress = get_compressor(compression)
+    for offset, length, exists in extents:
+        if exists:
+            data = image.read(offset, length)
+        else:
+            data = None
+        if data is None or is_zero(data):
+            if skip_zero:
+                progress.add(name, length, 0)
+            else:
+                progress.add(name, length, FRAME_HEADER.size)
+                yield FRAME_HEADER.pack(offset, length, 0, FRAME_FLAG_ZERO, 0)
+            continue
+        checksum = crc32(data)
+        if compress is not None:
+            payload = compress(data)
+        else:
+            payload = data
+        progress.add(name, length, FRAME_HEADER.size + len(payload))
+        yield FRAME_HEADER.pack(
+            offset, length, len(payload), FRAME_FLAG_CHECKSUM, checksum
+        ) + payload
+
+
+def get_remote_capabilities(session, destination_api_uri, vm_name):
+    """
+    Obtain the block receive capabilities of a remote PVC API, or None if it only supports the
+    legacy whole-image and multipart diff endpoints
+    """
+    response = session.get(
+        f"{destination_api_uri}/vm/{vm_name}/snapshot/receive/extents",
+        params=None,
+        data=None,
+    )
+    if response.status_code != 200:
+        return None
+    try:
+        capabilities = response.json()
+        if int(capabilities.get("protocol", 0)) < PROTOCOL_VERSION:
+            return None
+    except Exception:
+        return None
+    return capabilities
+
+
+def get_resume_offset(session, destination_api_uri, vm_name, params, stream):
+    """
+    Obtain the offset from which a remote system can resume receiving a failed stream
+    """
+    response = session.get(
+        f"{destination_api_uri}/vm/{vm_name}/snapshot/receive/extents",
+        params={**params, "stream": stream},
+    )
+    if response.status_code != 200:
+        return 0
+    return int(response.json().get("offset", 0))
+
+
+def send_volume_extents(
+    session,
+    destination_api_uri,
+    vm_name,
+    ioctx,
+    volume,
+    snapshot_name,
+    incremental_parent,
+    destination_pool,
+    compression,
+    stream_concurrency,
+    transfer_slots,
+    progress,
+    name,
+):
+    """
+    Send the allocated extents of a volume snapshot, or the extents changed since
+    incremental_parent, over several concurrent framed streams
+
+    Each stream holds one of transfer_slots while it is open, and is resumed from the last offset
+    the remote system checkpointed if it fails or is refused as busy.
+    """
+    from rbd import Image as RBDImage
+
+    image = RBDImage(ioctx, name=volume, snapshot=snapshot_name, read_only=True)
+    try:
+        size = image.size()
+        extents = get_extents(image, size, from_snapshot=incremental_parent)
+    finally:
+        image.close()
+
+    progress.begin(name, sum(extent[1] for extent in extents))
+
+    params = {
+        "pool": destination_pool,
+        "volume": volume,
+        "snapshot": snapshot_name,
+    }
+
+    # A full send starts from a new or zeroed remote volume
+    if incremental_parent is None:
+        response = session.put(
+            f"{destination_api_uri}/vm/{vm_name}/snapshot/receive/extents",
+            params={**params, "size": size},
+        )
+        if response.status_code != 200:
+            return (
+                False,
+                f"Failed to prepare remote volume: {response.json()['message']}",
+            )
+
+    def send_stream(stream, stream_extents):
+        stream_image = RBDImage(
+            ioctx, name=volume, snapshot=snapshot_name, read_only=True
+        )
+        try:
+            remaining_extents = stream_extents
+            retry_after = 0
+            for attempt in range(STREAM_RETRIES + 1):
+                if attempt > 0:
+                    time.sleep(max(attempt * 5, retry_after))
+                    resume_offset = get_resume_offset(
+                        session, destination_api_uri, vm_name, params, stream
+                    )
+                    remaining_extents = [
+                        e for e in stream_extents if e[0] >= resume_offset
+                    ]
+                try:
+                    with transfer_slots:
+                        response = session.post(
+                            f"{destination_api_uri}/vm/{vm_name}/snapshot/receive/extents",
+                            headers={"Content-Type": "application/octet-stream"},
+                            params={
+                                **params,
+                                "compression": compression,
+                                "stream": stream,
+                            },
+                            data=generate_frames(
+                                stream_image,
+                                remaining_extents,
+                                compression,
+                                progress,
+                                name,
+                                skip_zero=incremental_parent is None,
+                            ),
+                        )
+                    if response.status_code == 200:
+                        return True, ""
+                    # The remote API is busy with other transfers; wait as long as it asks
+                    retry_after = response.headers.get("Retry-After", "")
+                    retry_after = int(retry_after) if retry_after.isdigit() else 0
+                    message = f"Failed to send extents: {response.json()['message']}"
+                except requests.exceptions.RequestException as e:
+                    message = f"Failed to send extents: {e}"
+            return False, message
+        finally:
+            stream_image.close()
+
+    stream_groups = split_extents(extents, stream_concurrency)
+    with ThreadPoolExecutor(max_workers=max(len(stream_groups), 1)) as executor:
+        results = list(
+            executor.map(send_stream, range(len(stream_groups)), stream_groups)
+        )
+
+    progress.end(name)
+
+    for result, message in results:
+        if not result:
+            return False, message
+    return True, ""
+
+
+def send_volume_full_legacy(
+    session,
+    destination_api_uri,
+    vm_name,
+    ioctx,
+    volume,
+    snapshot_name,
+    destination_pool,
+    progress,
+    name,
+):
+    """
+    Send an entire volume snapshot as a single raw stream, for remotes without extent support
+    """
+    from rbd import Image as RBDImage
+
+    image = RBDImage(ioctx, name=volume, snapshot=snapshot_name, read_only=True)
+    size = image.size()
+    progress.begin(name, size)
+
+    def full_chunker():
+        chunk_size = 1024 * 1024 * 1024
+        current_chunk = 0
+        while current_chunk < size:
+            chunk = image.read(current_chunk, chunk_size)
+            progress.add(name, len(chunk), len(chunk))
+            yield chunk
+            current_chunk += chunk_size
+
+    try:
+        response = session.post(
+            f"{destination_api_uri}/vm/{vm_name}/snapshot/receive/block",
+            headers={"Content-Type": "application/octet-stream"},
+            params={
+                "pool": destination_pool,
+                "volume": volume,
+                "snapshot": snapshot_name,
+                "size": size,
+            },
+            data=full_chunker(),
+        )
+    finally:
+        image.close()
+
+    progress.end(name)
+
+    if response.status_code != 200:
+        return False, f"Failed to send snapshot: {response.json()['message']}"
+    return True, ""
+
+
+def send_volume_diff_legacy(
+    session,
+    destination_api_uri,
+    vm_name,
+    ioctx,
+    volume,
+    snapshot_name,
+    incremental_parent,
+    destination_pool,
+    progress,
+    name,
+):
+    """
+    Send the changes between two volume snapshots as batched multipart uploads, for remotes
+    without extent support
+    """
+    from rbd import Image as RBDImage
+
+    send_params = {
+        "pool": destination_pool,
+        "volume": volume,
+        "snapshot": snapshot_name,
+        "source_snapshot": incremental_parent,
+    }
+
+    # Send 32 objects (128MB) at once
+    send_max_objects = 32
+    batch_size = 4 * send_max_objects * 1024 * 1024
+
+    def send_batch_multipart(buffer):
+        files = {}
+        for i in range(len(buffer)):
+            files[f"object_{i}"] = (
+                f"object_{i}",
+                buffer[i],
+                "application/octet-stream",
+            )
+
+        response = session.put(
+            f"{destination_api_uri}/vm/{vm_name}/snapshot/receive/block",
+            params=send_params,
+            files=files,
+            stream=True,
+        )
+        if response.status_code != 200:
+            raise ValueError(f"Failed to send diff batch: {response.json()['message']}")
+
+    image = RBDImage(ioctx, name=volume, snapshot=snapshot_name, read_only=True)
+    try:
+        size = image.size()
+        extents = [
+            extent
+            for extent in get_extents(image, size, from_snapshot=incremental_parent)
+            if extent[2]
+        ]
+        progress.begin(name, sum(extent[1] for extent in extents))
+
+        buffer = list()
+        buffer_size = 0
+        for offset, length, _ in extents:
+            data = image.read(offset, length)
+            buffer.append(offset.to_bytes(8, "big") + length.to_bytes(8, "big") + data)
+            buffer_size += len(data)
+            progress.add(name, length, length)
+            if buffer_size >= batch_size:
+                send_batch_multipart(buffer)
+                buffer.clear()
+                buffer_size = 0
+
+        if buffer:
+            send_batch_multipart(buffer)
+    except Exception as e:
+        return False, str(e)
+    finally:
+        image.close()
+
+    progress.end(name)
+    return True, ""
+
+
+def send_volumes(
+    session,
+    destination_api_uri,
+    vm_name,
+    volumes,
+    snapshot_name,
+    incremental_parent=None,
+    compression=DEFAULT_COMPRESSION,
+    volume_concurrency=DEFAULT_VOLUME_CONCURRENCY,
+    stream_concurrency=DEFAULT_STREAM_CONCURRENCY,
+    report=None,
+    limiter=None,
+):
+    """
+    Send snapshot_name of each (source_pool, volume, destination_pool) in volumes to a remote PVC
+    API, creating the remote RBD snapshot as each volume completes
+
+    Up to volume_concurrency volumes are sent at once, each over up to stream_concurrency
+    connections; report, if set, is called from this thread with a progress summary, and
+    limiter, if set, is a RateLimiter bounding the wire throughput.
+
+    Returns a tuple of (success, message, progress).
+    """
+    import rados
+
+    # Sessions from get_session are shared and already pooled, so never replace their adapter
+    if not hasattr(session, "pvc_pool_size"):
+        pool_size = volume_concurrency * stream_concurrency
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+    capabilities = get_remote_capabilities(session, destination_api_uri, vm_name)
+    max_transfers = volume_concurrency * stream_concurrency
+    if capabilities is not None:
+        compression = select_compression(
+            compression, capabilities.get("compression", ["none"])
+        )
+        # Never open more streams at once than the remote API accepts, or they are refused
+        max_transfers = min(
+            max_transfers, int(capabilities.get("max_transfers", max_transfers))
+        )
+    transfer_slots = Semaphore(max(max_transfers, 1))
+
+    progress = TransferProgress(limiter=limiter)
+
+    cluster = rados.Rados(conffile="/etc/ceph/ceph.conf")
+    cluster.connect()
+
+    def send_volume(volume_detail):
+        source_pool, volume, destination_pool = volume_detail
+        name = f"{source_pool}/{volume}"
+        try:
+            ioctx = cluster.open_ioctx(source_pool)
+            try:
+                if capabilities is not None:
+                    result, message = send_volume_extents(
+                        session,
+                        destination_api_uri,
+                        vm_name,
+                        ioctx,
+                        volume,
+                        snapshot_name,
+                        incremental_parent,
+                        destination_pool,
+                        compression,
+                        stream_concurrency,
+                        transfer_slots,
+                        progress,
+                        name,
+                    )
+                elif incremental_parent is not None:
+                    result, message = send_volume_diff_legacy(
+                        session,
+                        destination_api_uri,
+                        vm_name,
+                        ioctx,
+                        volume,
+                        snapshot_name,
+                        incremental_parent,
+                        destination_pool,
+                        progress,
+                        name,
+                    )
+                else:
+                    result, message = send_volume_full_legacy(
+                        session,
+                        destination_api_uri,
+                        vm_name,
+                        ioctx,
+                        volume,
+                        snapshot_name,
+                        destination_pool,
+                        progress,
+                        name,
+                    )
+            finally:
+                ioctx.close()
+            if not result:
+                return False, f"{name}: {message}"
+
+            response = session.patch(
+                f"{destination_api_uri}/vm/{vm_name}/snapshot/receive/block",
+                params={
+                    "pool": destination_pool,
+                    "volume": volume,
+                    "snapshot": snapshot_name,
+                },
+            )
+            if response.status_code != 200:
+                return (
+                    False,
+                    f"{name}: Failed to create remote snapshot: {response.json()['message']}",
+                )
+        except Exception as e:
+            return False, f"{name}: {e}"
+        return True, ""
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(volume_concurrency, 1)) as executor:
+            futures = [executor.submit(send_volume, v) for v in volumes]
+            pending = futures
+            while pending:
+                _, pending = wait(pending, timeout=PROGRESS_INTERVAL)
+                if pending and report is not None:
+                    report(progress.format())
+            results = [future.result() for future in futures]
+    finally:
+        cluster.shutdown()
+
+    for result, message in results:
+        if not result:
+            return False, message, progress
+    return True, "", progress
+
+
+#
+# Receiver functions
+#
+def read_exact(stream, length):
+    """
+    Read exactly length bytes from stream, returning fewer only at the end of the stream
+    """
+    chunks = list()
+    remaining = length
+    while remaining > 0:
+        chunk = stream.read(remaining)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def receive_frames(
+    stream,
+    image,
+    compression,
+    checkpoint=None,
+    depth=AIO_DEPTH,
+    checkpoint_interval=CHECKPOINT_INTERVAL,
+):
+    """
+    Read extent frames from stream and write them to image with up to depth asynchronous
+    writes in flight, returning the number of raw bytes written
+
+    If set, checkpoint is called with the offset after the last durably-written frame every
+    checkpoint_interval bytes and when the stream fails, so that the sender can resume from it.
+    """
+    decompress = get_decompressor(compression)
+
+    slots = Semaphore(depth)
+    write_errors = list()
+
+    def write_cb(completion):
+        return_value = completion.get_return_value()
+        if return_value < 0:
+            write_errors.append(return_value)
+        slots.release()
+
+    def drain():
+        # Wait for every in-flight write to complete by taking all the slots
+        for _ in range(depth):
+            slots.acquire()
+        for _ in range(depth):
+            slots.release()
+        if write_errors:
+            raise IOError(f"Asynchronous write failed with code {write_errors[0]}")
+
+    written = 0
+    last_end = None
+    unchecked = 0
+    try:
+        while True:
+            header = read_exact(stream, FRAME_HEADER.size)
+            if not header:
+                break
+            if len(header) != FRAME_HEADER.size:
+                raise ValueError("Truncated extent frame header")
+            offset, length, payload_length, flags, checksum = FRAME_HEADER.unpack(
+                header
+            )
+
+            if flags & FRAME_FLAG_ZERO:
+                image.write_zeroes(offset, length)
+            else:
+                payload = read_exact(stream, payload_length)
+                if len(payload) != payload_length:
+                    raise ValueError(f"Truncated extent frame at offset {offset}")
+                if decompress is not None:
+                    data = decompress(payload)
+                else:
+                    data = payload
+                if len(data) != length:
+                    raise ValueError(f"Invalid extent frame length at offset {offset}")
+                if flags & FRAME_FLAG_CHECKSUM and crc32(data) != checksum:
+                    raise ValueError(f"Checksum mismatch at offset {offset}")
+
+                slots.acquire()
+                if write_errors:
+                    slots.release()
+                    raise IOError(
+                        f"Asynchronous write failed with code {write_errors[0]}"
+                    )
+                image.aio_write(data, offset, write_cb)
+
+            written += length
+            last_end = offset + length
+            unchecked += length
+            if checkpoint is not None and unchecked >= checkpoint_interval:
+                drain()
+                checkpoint(last_end)
+                unchecked = 0
+
+        drain()
+    except Exception:
+        # Record how far we got before the failure, if every submitted write succeeded
+        try:
+            drain()
+            if checkpoint is not None and last_end is not None:
+                checkpoint(last_end)
+        except Exception:
+            pass
+        raise
+
+    return written
+
+
+def open_image(pool, volume, conffile="/etc/ceph/ceph.conf"):
+    """
+    Open an RBD image directly via librbd, returning the cluster, ioctx and image handles
+    """
+    import rados
+    import rbd
+
+    cluster = rados.Rados(conffile=conffile)
+    cluster.connect()
+    try:
+        ioctx = cluster.open_ioctx(pool)
+        try:
+            image = rbd.Image(ioctx, volume)
+        except Exception:
+            ioctx.close()
+            raise
+    except Exception:
+        cluster.shutdown()
+        raise
+    return cluster, ioctx, image
+
+
+def close_image(cluster, ioctx, image):
+    """
+    Close the handles returned by open_image
+    """
+    image.close()
+    ioctx.close()
+    cluster.shutdown()
+
+
+class ImageWriter(object):
+    """
+    A sequential, file-like writer into an RBD image
+
+    Data is collected into block_size blocks which are written with up to depth asynchronous
+    writes in flight, bounding memory to roughly (depth + 1) * block_size. All-zero blocks are
+    never written: they are zeroed (a metadata-only operation in RBD) or, if the target region
+    is already known to be zero (zeroed=True), skipped entirely.
+    """
+
+    def __init__(
+        self, image, offset=0, zeroed=False, block_size=MAX_EXTENT_SIZE, depth=AIO_DEPTH
+    ):
+        self.image = image
+        self.offset = offset
+        self.zeroed = zeroed
+        self.block_size = block_size
+        self.depth = depth
+        self.written = 0
+        self.skipped = 0
+
+        self._buffer = bytearray()
+        self._slots = Semaphore(depth)
+        self._errors = list()
+        self._closed = False
+
+    def _write_cb(self, completion):
+        return_value = completion.get_return_value()
+        if return_value < 0:
+            self._errors.append(return_value)
+        self._slots.release()
+
+    def _check(self):
+        if self._errors:
+            raise IOError(f"Asynchronous write failed with code {self._errors[0]}")
+
+    def _submit(self, data):
+        length = len(data)
+        if is_zero(data):
+            if not self.zeroed:
+                self.image.write_zeroes(self.offset, length)
+            self.skipped += length
+        else:
+            self._slots.acquire()
+            if self._errors:
+                self._slots.release()
+                self._check()
+            self.image.aio_write(bytes(data), self.offset, self._write_cb)
+            self.written += length
+        self.offset += length
+
+    def drain(self):
+        """
+        Wait for every in-flight write to complete
+        """
+        for _ in range(self.depth):
+            self._slots.acquire()
+        for _ in range(self.depth):
+            self._slots.release()
+        self._check()
+
+    def write(self, data):
+        if self._closed:
+            raise ValueError("Write to closed ImageWriter")
+        self._buffer += data
+        while len(self._buffer) >= self.block_size:
+            self._submit(self._buffer[: self.block_size])
+            del self._buffer[: self.block_size]
+        return len(data)
+
+    def seek(self, offset, whence=0):
+        # Werkzeug rewinds completed upload streams; the writer is sequential, so ignore it
+        return self.offset
+
+    def set_offset(self, offset):
+        """
+        Move the writer to offset; any region skipped over is left untouched
+
+        Contiguous writes are still collected into full blocks, so sparse writers (e.g. image
+        format converters) should only call this when the next write is not contiguous.
+        """
+        if offset == self.tell():
+            return
+        if self._buffer:
+            self._submit(self._buffer)
+            self._buffer = bytearray()
+        self.offset = offset
+
+    def tell(self):
+        return self.offset + len(self._buffer)
+
+    def flush(self):
+        """
+        Write out any buffered data and wait for all writes to be durable in the image
+        """
+        if self._buffer:
+            self._submit(self._buffer)
+            self._buffer = bytearray()
+        self.drain()
+        self.image.flush()
+
+    def close(self):
+        if not self._closed:
+            self.flush()
+            self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            # Don't leave writes referencing our buffers in flight
+            try:
+                self.drain()
+            except Exception:
+                pass
+            self._closed = True
+
+
+def copy_stream(stream, writer, length=None, chunk_size=1024 * 1024):
+    """
+    Copy stream into writer, up to length bytes if set, returning the number of bytes copied
+    """
+    copied = 0
+    while length is None or copied < length:
+        if length is None:
+            size = chunk_size
+        else:
+            size = min(chunk_size, length - copied)
+        chunk = stream.read(size)
+        if not chunk:
+            break
+        writer.write(chunk)
+        copied += len(chunk)
+    return copied
+
+
+#
+# Local import functions
+#
+def run_import_step(command, path, progress, name, chunk_size=4 * 1024 * 1024):
+    """
+    Run command, streaming the file at path, if set, into its standard input and accounting the
+    bytes to name in progress; returns a tuple of (success, stderr)
+    """
+    with tempfile.TemporaryFile() as errors:
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE if path is not None else subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=errors,
+        )
+        if path is not None:
+            try:
+                with open(path, "rb") as fh:
+                    while True:
+                        chunk = fh.read(chunk_size)
+                        if not chunk:
+                            break
+                        process.stdin.write(chunk)
+                        progress.add(name, len(chunk), len(chunk))
+            except BrokenPipeError:
+                # The command exited early; its return code and errors report why
+                pass
+            finally:
+                try:
+                    process.stdin.close()
+                except BrokenPipeError:
+                    pass
+        retcode = process.wait()
+        errors.seek(0)
+        stderr = errors.read().decode(errors="replace").strip()
+    return retcode == 0, stderr
+
+
+def import_volumes(
+    chains,
+    volume_concurrency=DEFAULT_VOLUME_CONCURRENCY,
+    report=None,
+    limiter=None,
+):
+    """
+    Run the import chain of each volume in chains, a list of (name, steps) tuples, where each step
+    is a (description, command, path) tuple run by run_import_step
+
+    Up to volume_concurrency chains run at once, each running its own steps in order, so that each
+    volume continues with its incremental images as soon as its full image is imported; report, if
+    set, is called from this thread with a progress summary, and limiter, if set, is a RateLimiter
+    bounding the combined throughput.
+
+    Returns a tuple of (success, message, progress).
+    """
+    progress = TransferProgress(limiter=limiter)
+
+    def import_chain(chain):
+        name, steps = chain
+        progress.begin(
+            name, sum(os.path.getsize(path) for _, _, path in steps if path is not None)
+        )
+        try:
+            for description, command, path in steps:
+                result, stderr = run_import_step(command, path, progress, name)
+                if not result:
+                    return False, f"Failed to {description}: {stderr}"
+        except Exception as e:
+            return False, f"{name}: {e}"
+        finally:
+            progress.end(name)
+        return True, ""
+
+    with ThreadPoolExecutor(max_workers=max(volume_concurrency, 1)) as executor:
+        futures = [executor.submit(import_chain, chain) for chain in chains]
+        pending = futures
+        while pending:
+            _, pending = wait(pending, timeout=PROGRESS_INTERVAL)
+            if pending and report is not None:
+                report(progress.format())
+        results = [future.result() for future in futures]
+
+    for result, message in results:
+        if not result:
+            return False, message, progress
+    return True, "", progress
@@ -418,6 +418,7 @@ def add_pool(zkhandler, name, pgs, replcfg, tier=None):
             (("pool.pgs", name), pgs),
             (("pool.tier", name), tier),
             (("pool.stats", name), "{}"),
+            (("pool.snapshot_count", name), "0"),
             (("volume", name), ""),
             (("snapshot", name), ""),
         ]
@@ -922,7 +923,22 @@ def unmap_volume(zkhandler, pool, name):
     return True, 'Unmapped RBD volume at "{}".'.format(mapped_volume)
 
 
-def get_list_volume(zkhandler, pool, limit=None, is_fuzzy=True):
+def get_list_volume(
+    zkhandler,
+    pool,
+    limit=None,
+    is_fuzzy=True,
+    cursor=None,
+    count=None,
+    chunk_size=None,
+):
+    """
+    Get the information of all volumes matching the filters, sorted by pool and name
+
+    If {cursor} or {count} are set, only the up to {count} volumes following {cursor} are
+    returned. If {chunk_size} is set, a generator of lists of up to {chunk_size} volumes is
+    returned instead.
+    """
     if pool and not verifyPool(zkhandler, pool):
         return False, 'ERROR: No pool with name "{}" is present in the cluster.'.format(
             pool
@@ -955,24 +971,43 @@ def get_list_volume(zkhandler, pool, limit=None, is_fuzzy=True):
 
         get_volume_info[volume] = True if is_limit_match else False
 
+    def volume_key(volume):
+        return tuple(volume.split("/"))
+
+    retflag, volume_execute_list = common.getListPage(
+        [volume for volume in full_volume_list if get_volume_info[volume]],
+        volume_key,
+        cursor=cursor,
+        count=count,
+    )
+    if not retflag:
+        return False, volume_execute_list
+
     # Obtain our volume data in a thread pool
-    volume_execute_list = [
-        volume for volume in full_volume_list if get_volume_info[volume]
-    ]
-    volume_data_list = list()
-    with ThreadPoolExecutor(
-        max_workers=32, thread_name_prefix="volume_list"
-    ) as executor:
-        futures = []
-        for volume in volume_execute_list:
-            pool_name, volume_name = volume.split("/")
-            futures.append(
-                executor.submit(getVolumeInformation, zkhandler, pool_name, volume_name)
-            )
-        for future in futures:
-            volume_data_list.append(future.result())
+    def get_volume_data_list(volumes):
+        volume_data_list = list()
+        with ThreadPoolExecutor(
+            max_workers=32, thread_name_prefix="volume_list"
+        ) as executor:
+            futures = []
+            for volume in volumes:
+                pool_name, volume_name = volume.split("/")
+                futures.append(
+                    executor.submit(
+                        getVolumeInformation, zkhandler, pool_name, volume_name
+                    )
+                )
+            for future in futures:
+                volume_data_list.append(future.result())
 
-    return True, sorted(volume_data_list, key=lambda x: str(x["name"]))
+        return sorted(volume_data_list, key=lambda x: (str(x["pool"]), str(x["name"])))
+
+    if chunk_size is not None:
+        return True, common.getListChunks(
+            volume_execute_list, get_volume_data_list, chunk_size, volume_key
+        )
+
+    return True, get_volume_data_list(volume_execute_list)
 
 
 #
@@ -996,6 +1031,27 @@ def getCephSnapshots(zkhandler, pool, volume):
     return snapshot_list
 
 
+def create_rbd_snapshot(pool, volume, name):
+    """
+    Create the RBD snapshot {name} of {pool}/{volume} in Ceph only, without its stats or its
+    Zookeeper entry, which add_snapshot with zk_only adds afterwards
+    """
+    retcode, stdout, stderr = common.run_os_command(
+        "rbd snap create {}/{}@{}".format(pool, volume, name)
+    )
+    if retcode:
+        return (
+            False,
+            'ERROR: Failed to create RBD snapshot "{}" of volume "{}" in pool "{}": {}'.format(
+                name, volume, pool, stderr
+            ),
+        )
+
+    return True, 'Created RBD snapshot "{}" of volume "{}" in pool "{}".'.format(
+        name, volume, pool
+    )
+
+
 def add_snapshot(zkhandler, pool, volume, name, zk_only=False):
     if not verifyVolume(zkhandler, pool, volume):
         return False, 'ERROR: No volume with name "{}" is present in pool "{}".'.format(
@@ -1004,16 +1060,9 @@ def add_snapshot(zkhandler, pool, volume, name, zk_only=False):
 
     # 1. Create the snapshot
     if not zk_only:
-        retcode, stdout, stderr = common.run_os_command(
-            "rbd snap create {}/{}@{}".format(pool, volume, name)
-        )
-        if retcode:
-            return (
-                False,
-                'ERROR: Failed to create RBD snapshot "{}" of volume "{}" in pool "{}": {}'.format(
-                    name, volume, pool, stderr
-                ),
-            )
+        retflag, retmsg = create_rbd_snapshot(pool, volume, name)
+        if not retflag:
+            return retflag, retmsg
 
     # 2. Get snapshot stats
     retcode, stdout, stderr = common.run_os_command(
@@ -1021,23 +1070,27 @@ def add_snapshot(zkhandler, pool, volume, name, zk_only=False):
     )
     snapstats = stdout
 
-    # 3. Add the snapshot to Zookeeper
-    zkhandler.write(
-        [
+    # 3. Add the snapshot to Zookeeper, counting it only if it did not already exist there
+    added = zkhandler.adjust_counters(
+        [(("pool.snapshot_count", pool), 1)],
+        creates=[
             (("snapshot", f"{pool}/{volume}/{name}"), ""),
             (("snapshot.stats", f"{pool}/{volume}/{name}"), snapstats),
-        ]
-    )
-
-    # 4. Update the count of snapshots on this volume
-    volume_stats_raw = zkhandler.read(("volume.stats", f"{pool}/{volume}"))
-    volume_stats = dict(json.loads(volume_stats_raw))
-    volume_stats["snapshot_count"] = volume_stats["snapshot_count"] + 1
-    zkhandler.write(
-        [
-            (("volume.stats", f"{pool}/{volume}"), json.dumps(volume_stats)),
-        ]
+        ],
     )
+    if added is None:
+        # The snapshot was already in Zookeeper, so only its stats are updated
+        zkhandler.write([(("snapshot.stats", f"{pool}/{volume}/{name}"), snapstats)])
+    else:
+        # 4. Update the count of snapshots on this volume
+        volume_stats_raw = zkhandler.read(("volume.stats", f"{pool}/{volume}"))
+        volume_stats = dict(json.loads(volume_stats_raw))
+        volume_stats["snapshot_count"] = volume_stats["snapshot_count"] + 1
+        zkhandler.write(
+            [
+                (("volume.stats", f"{pool}/{volume}"), json.dumps(volume_stats)),
+            ]
+        )
 
     return True, 'Created RBD snapshot "{}" of volume "{}" in pool "{}".'.format(
         name, volume, pool
@@ -1144,24 +1197,101 @@ def remove_snapshot(zkhandler, pool, volume, name):
             ),
         )
 
-    # 2. Delete snapshot from Zookeeper
-    zkhandler.delete([("snapshot", f"{pool}/{volume}/{name}")])
-
-    # 3. Update the count of snapshots on this volume
-    volume_stats_raw = zkhandler.read(("volume.stats", f"{pool}/{volume}"))
-    volume_stats = dict(json.loads(volume_stats_raw))
-    # Format the size to something nicer
-    volume_stats["snapshot_count"] = volume_stats["snapshot_count"] - 1
-    volume_stats_raw = json.dumps(volume_stats)
-    zkhandler.write([(("volume.stats", f"{pool}/{volume}"), volume_stats_raw)])
+    # 2. Delete snapshot from Zookeeper, uncounting it only if it was still there
+    removed = zkhandler.adjust_counters(
+        [(("pool.snapshot_count", pool), -1)],
+        deletes=[("snapshot", f"{pool}/{volume}/{name}")],
+    )
+    if removed is not None:
+        # 3. Update the count of snapshots on this volume
+        volume_stats_raw = zkhandler.read(("volume.stats", f"{pool}/{volume}"))
+        volume_stats = dict(json.loads(volume_stats_raw))
+        # Format the size to something nicer
+        volume_stats["snapshot_count"] = volume_stats["snapshot_count"] - 1
+        volume_stats_raw = json.dumps(volume_stats)
+        zkhandler.write([(("volume.stats", f"{pool}/{volume}"), volume_stats_raw)])
 
     return True, 'Removed RBD snapshot "{}" of volume "{}" in pool "{}".'.format(
         name, volume, pool
     )
 
 
-def get_list_snapshot(zkhandler, target_pool, target_volume, limit=None, is_fuzzy=True):
-    snapshot_list = []
+def count_snapshots(zkhandler, pools):
+    """
+    Count the snapshots of every volume in each pool by listing them, returning a dictionary of
+    pool names to snapshot counts
+    """
+    volume_keys = list()
+    for pool in pools:
+        volume_keys += [
+            ("snapshot", f"{pool}/{volume}")
+            for volume in zkhandler.children(("snapshot", pool)) or list()
+        ]
+
+    counts = {pool: 0 for pool in pools}
+    for volume_key, count in zip(volume_keys, zkhandler.count_many(volume_keys)):
+        counts[volume_key[1].split("/")[0]] += count or 0
+
+    return counts
+
+
+def get_snapshot_counts(zkhandler, pools):
+    """
+    Get the number of snapshots in each pool from the pool snapshot counters, returning a
+    dictionary of pool names to snapshot counts
+
+    Pools whose counters are not yet set (e.g. after a schema upgrade) are counted by listing.
+    """
+    counters = zkhandler.read_many([("pool.snapshot_count", pool) for pool in pools])
+
+    counts = dict()
+    unknown_pools = list()
+    for pool, counter in zip(pools, counters):
+        try:
+            counts[pool] = int(counter)
+        except (TypeError, ValueError):
+            unknown_pools.append(pool)
+
+    if unknown_pools:
+        counts.update(count_snapshots(zkhandler, unknown_pools))
+
+    return counts
+
+
+def reconcile_snapshot_counts(zkhandler):
+    """
+    Correct any drift in the pool snapshot counters, returning a list of (pool, old count, new
+    count) tuples for every counter changed
+    """
+    corrections = list()
+    for pool in zkhandler.children("base.pool") or list():
+        result = zkhandler.reconcile_counter(
+            ("pool.snapshot_count", pool),
+            lambda: count_snapshots(zkhandler, [pool])[pool],
+        )
+        if result is not None and result[0] != result[1]:
+            corrections.append((pool, result[0], result[1]))
+
+    return corrections
+
+
+def get_list_snapshot(
+    zkhandler,
+    target_pool,
+    target_volume,
+    limit=None,
+    is_fuzzy=True,
+    cursor=None,
+    count=None,
+    chunk_size=None,
+):
+    """
+    Get the information of all snapshots matching the filters, sorted by pool, volume and name
+
+    If {cursor} or {count} are set, only the up to {count} snapshots following {cursor} are
+    returned; snapshot stats are only read for these snapshots. If {chunk_size} is set, a
+    generator of lists of up to {chunk_size} snapshots is returned instead.
+    """
     full_snapshot_list = getCephSnapshots(zkhandler, target_pool, target_volume)
 
     if is_fuzzy and limit:
@@ -1171,6 +1301,7 @@ def get_list_snapshot(zkhandler, target_pool, target_volume, limit=None, is_fuzz
         if not re.match(r".*\$", limit):
             limit = limit + ".*"
 
+    snapshot_execute_list = list()
     for snapshot in full_snapshot_list:
         volume, snapshot_name = snapshot.split("@")
         pool_name, volume_name = volume.split("/")
@@ -1178,28 +1309,34 @@ def get_list_snapshot(zkhandler, target_pool, target_volume, limit=None, is_fuzz
             continue
         if target_volume and volume_name != target_volume:
             continue
-        try:
-            snapshot_stats = json.loads(
-                zkhandler.read(
-                    ("snapshot.stats", f"{pool_name}/{volume_name}/{snapshot_name}")
-                )
-            )
-        except Exception:
-            snapshot_stats = []
         if limit:
             try:
-                if re.fullmatch(limit, snapshot_name):
-                    snapshot_list.append(
-                        {
-                            "pool": pool_name,
-                            "volume": volume_name,
-                            "snapshot": snapshot_name,
-                            "stats": snapshot_stats,
-                        }
-                    )
+                if not re.fullmatch(limit, snapshot_name):
+                    continue
             except Exception as e:
                 return False, "Regex Error: {}".format(e)
-        else:
+        snapshot_execute_list.append((pool_name, volume_name, snapshot_name))
+
+    retflag, snapshot_execute_list = common.getListPage(
+        snapshot_execute_list, lambda snapshot: snapshot, cursor=cursor, count=count
+    )
+    if not retflag:
+        return False, snapshot_execute_list
+
+    def get_snapshot_data_list(snapshots):
+        snapshot_list = list()
+        for pool_name, volume_name, snapshot_name in snapshots:
+            try:
+                snapshot_stats = json.loads(
+                    zkhandler.read(
+                        (
+                            "snapshot.stats",
+                            f"{pool_name}/{volume_name}/{snapshot_name}",
+                        )
+                    )
+                )
+            except Exception:
+                snapshot_stats = []
             snapshot_list.append(
                 {
                     "pool": pool_name,
@@ -1209,7 +1346,17 @@ def get_list_snapshot(zkhandler, target_pool, target_volume, limit=None, is_fuzz
                 }
             )
 
-    return True, sorted(snapshot_list, key=lambda x: str(x["snapshot"]))
+        return snapshot_list
+
+    if chunk_size is not None:
+        return True, common.getListChunks(
+            snapshot_execute_list,
+            get_snapshot_data_list,
+            chunk_size,
+            lambda snapshot: snapshot,
+        )
+
+    return True, get_snapshot_data_list(snapshot_execute_list)
 
 
 #
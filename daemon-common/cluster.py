@@ -465,31 +465,23 @@ def getClusterInformation(zkhandler):
         else 0.00
     )
 
-    # Get the list of Networks
-    network_list = zkhandler.children("base.network")
-    network_count = len(network_list)
+    # Get the count of Networks
+    network_count = zkhandler.count_many(["base.network"])[0] or 0
 
     # Get the list of Ceph pools
     ceph_pool_list = zkhandler.children("base.pool")
     ceph_pool_count = len(ceph_pool_list)
 
-    # Get the list of Ceph volumes
-    ceph_volume_list = list()
-    for pool in ceph_pool_list:
-        ceph_volume_list_pool = zkhandler.children(("volume", pool))
-        if ceph_volume_list_pool is not None:
-            ceph_volume_list += [f"{pool}/{volume}" for volume in ceph_volume_list_pool]
-    ceph_volume_count = len(ceph_volume_list)
-
-    # Get the list of Ceph snapshots
-    ceph_snapshot_list = list()
-    for volume in ceph_volume_list:
-        ceph_snapshot_list_volume = zkhandler.children(("snapshot", volume))
-        if ceph_snapshot_list_volume is not None:
-            ceph_snapshot_list += [
-                f"{volume}@{snapshot}" for snapshot in ceph_snapshot_list_volume
-            ]
-    ceph_snapshot_count = len(ceph_snapshot_list)
+    # Get the count of Ceph volumes from the child counts of each pool, rather than listing them
+    ceph_volume_count = sum(
+        count or 0
+        for count in zkhandler.count_many([("volume", pool) for pool in ceph_pool_list])
+    )
+
+    # Get the count of Ceph snapshots from the pool snapshot counters, rather than listing them
+    ceph_snapshot_count = sum(
+        pvc_ceph.get_snapshot_counts(zkhandler, ceph_pool_list).values()
+    )
 
     # Get the list of faults
     faults_data = faults.getAllFaults(zkhandler)
@@ -609,6 +601,45 @@ def get_health_metrics(zkhandler):
         if isinstance(node_health, (int, float)):
             output_lines.append(f'pvc_node_health{{node="{node}"}} {node_health}')
 
+    # Plugin runtime histograms are only present once the active schema supports them
+    if zkhandler.schema.path("monitoring_plugin.runtime_histogram") is not None:
+        output_lines.append(
+            "# HELP pvc_node_plugin_runtime_seconds PVC Node monitoring plugin runtimes"
+        )
+        output_lines.append("# TYPE pvc_node_plugin_runtime_seconds histogram")
+        histogram_labels = list()
+        histogram_reads = list()
+        for node in node_data:
+            for plugin in node["health_plugins"]:
+                histogram_labels.append(f'node="{node["name"]}", plugin="{plugin}"')
+                histogram_reads.append(
+                    (
+                        "node.monitoring.data",
+                        node["name"],
+                        "monitoring_plugin.runtime_histogram",
+                        plugin,
+                    )
+                )
+        all_histograms = zkhandler.read_many(histogram_reads)
+        for labels, histogram in zip(histogram_labels, all_histograms):
+            try:
+                histogram = loads(histogram)
+            except Exception:
+                continue
+            for bucket, count in zip(histogram["bounds"], histogram["buckets"]):
+                output_lines.append(
+                    f'pvc_node_plugin_runtime_seconds_bucket{{{labels}, le="{bucket}"}} {count}'
+                )
+            output_lines.append(
+                f'pvc_node_plugin_runtime_seconds_bucket{{{labels}, le="+Inf"}} {histogram["count"]}'
+            )
+            output_lines.append(
+                f"pvc_node_plugin_runtime_seconds_sum{{{labels}}} {histogram['sum']}"
+            )
+            output_lines.append(
+                f"pvc_node_plugin_runtime_seconds_count{{{labels}}} {histogram['count']}"
+            )
+
     output_lines.append("# HELP pvc_node_daemon_states PVC Node daemon state counts")
     output_lines.append("# TYPE pvc_node_daemon_states gauge")
     node_daemon_state_map = dict()
@@ -24,7 +24,8 @@ import uuid
 import lxml
 import subprocess
 import signal
-from json import loads
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from json import dumps, loads
 from re import match as re_match
 from re import search as re_search
 from re import split as re_split
@@ -256,6 +257,98 @@ def run_os_command(command_string, background=False, environment=None, timeout=N
         return retcode, stdout, stderr
 
 
+#
+# Encode and decode list cursors
+#
+# A cursor is the opaque, URL-safe form of the sort key of the last entry of a page of a list,
+# so that a following page starts after that entry even if entries are added or removed between
+# requests.
+#
+def encodeCursor(key):
+    return urlsafe_b64encode(dumps(list(key)).encode("utf8")).decode("ascii")
+
+
+def decodeCursor(cursor):
+    try:
+        key = loads(urlsafe_b64decode(cursor.encode("ascii")).decode("utf8"))
+    except Exception:
+        return None
+    if not isinstance(key, list):
+        return None
+    return tuple(key)
+
+
+#
+# Get a page of a list
+#
+def getListPage(entries, key, cursor=None, count=None, reverse=False):
+    """
+    Return (True, page) with the up to {count} entries that follow {cursor} when {entries} are
+    sorted by {key}, or (False, message) if {cursor} is not valid
+
+    {key} must return a unique tuple for each entry.
+    """
+    entries = sorted(entries, key=key, reverse=reverse)
+
+    if cursor is not None:
+        cursor_key = decodeCursor(cursor)
+        if cursor_key is None:
+            return False, f'Cursor "{cursor}" is not valid.'
+        try:
+            if reverse:
+                entries = [entry for entry in entries if key(entry) < cursor_key]
+            else:
+                entries = [entry for entry in entries if key(entry) > cursor_key]
+        except TypeError:
+            return False, f'Cursor "{cursor}" is not valid.'
+
+    if count is not None:
+        entries = entries[:count]
+
+    return True, entries
+
+
+#
+# Get a list in chunks
+#
+class ListChunks(object):
+    """
+    The information of {entries} in chunks of up to {chunk_size} entries
+
+    Iterating yields get_information(chunk) for each chunk, so that only one chunk of information
+    is obtained and held at a time. The number of chunks, and the cursor following each chunk, are
+    found from {entries} and their sort key {key}, so they do not depend on any entry whose
+    information could not be obtained.
+    """
+
+    def __init__(self, entries, get_information, chunk_size, key):
+        self.entries = entries
+        self.get_information = get_information
+        self.chunk_size = chunk_size
+        self.key = key
+
+    def __len__(self):
+        return (len(self.entries) + self.chunk_size - 1) // self.chunk_size
+
+    def __iter__(self):
+        for idx in range(0, len(self.entries), self.chunk_size):
+            yield self.get_information(self.entries[idx : idx + self.chunk_size])
+
+    def cursor(self, count):
+        """
+        Return the cursor following the first {count} entries
+        """
+        return encodeCursor(self.key(self.entries[count - 1]))
+
+
+def getListChunks(entries, get_information, chunk_size, key):
+    """
+    Return the ListChunks of the information of {entries} in chunks of up to {chunk_size} entries;
+    {key} is the sort key of {entries}, as given to getListPage
+    """
+    return ListChunks(entries, get_information, chunk_size, key)
+
+
 #
 # Validate a UUID
 #
@@ -514,6 +607,7 @@ def getDomainMetadata(zkhandler, dom_uuid):
         domain_node_autostart,
         domain_migration_method,
         domain_migration_max_downtime,
+        domain_migration_profile,
     ) = zkhandler.read_many(
         [
             ("domain.meta.node_limit", dom_uuid),
@@ -521,6 +615,7 @@ def getDomainMetadata(zkhandler, dom_uuid):
             ("domain.meta.autostart", dom_uuid),
             ("domain.meta.migrate_method", dom_uuid),
             ("domain.meta.migrate_max_downtime", dom_uuid),
+            ("domain.meta.migrate_profile", dom_uuid),
         ]
     )
 
@@ -541,12 +636,16 @@ def getDomainMetadata(zkhandler, dom_uuid):
     if not domain_migration_max_downtime or domain_migration_max_downtime == "none":
         domain_migration_max_downtime = 300
 
+    if not domain_migration_profile:
+        domain_migration_profile = None
+
     return (
         domain_node_limit,
         domain_node_selector,
         domain_node_autostart,
         domain_migration_method,
         domain_migration_max_downtime,
+        domain_migration_profile,
     )
 
 
@@ -584,8 +683,19 @@ def getInformationFromXML(zkhandler, uuid):
         domain_node_autostart,
         domain_migration_method,
         domain_migration_max_downtime,
+        domain_migration_profile,
     ) = getDomainMetadata(zkhandler, uuid)
 
+    # Migration progress is only reported while a migration is running
+    domain_migration_progress = None
+    if domain_state in ["migrate", "migrate-live"]:
+        try:
+            domain_migration_progress = loads(
+                zkhandler.read(("domain.migrate.progress", uuid))
+            )
+        except Exception:
+            domain_migration_progress = None
+
     domain_tags = getDomainTags(zkhandler, uuid)
     domain_snapshots = getDomainSnapshots(zkhandler, uuid)
 
@@ -646,6 +756,8 @@ def getInformationFromXML(zkhandler, uuid):
         "node_autostart": bool(strtobool(domain_node_autostart)),
         "migration_method": domain_migration_method,
         "migration_max_downtime": int(domain_migration_max_downtime),
+        "migration_profile": domain_migration_profile,
+        "migration_progress": domain_migration_progress,
         "tags": domain_tags,
         "snapshots": domain_snapshots,
         "description": domain_description,
@@ -121,6 +121,79 @@ def validate_floating_ip(config, network):
     return True, ""
 
 
+# The settings of the built-in "default" live migration profile, which performs a plain live
+# migration; any setting not given in a configured profile takes its value from here
+DEFAULT_MIGRATION_PROFILE = {
+    "parallel_connections": 1,
+    "compression": [],
+    "auto_converge": False,
+    "postcopy": False,
+    "postcopy_after": 3,
+    "max_downtime": None,
+    "bandwidth": 0,
+}
+
+
+def get_migration_profiles(o_profiles):
+    """
+    Parse and validate the live migration profiles of the migration configuration
+    """
+    profiles = {"default": dict(DEFAULT_MIGRATION_PROFILE)}
+
+    for name, o_profile in (o_profiles or dict()).items():
+        o_profile = o_profile or dict()
+        profile = dict(DEFAULT_MIGRATION_PROFILE)
+
+        unknown = [key for key in o_profile if key not in DEFAULT_MIGRATION_PROFILE]
+        if unknown:
+            raise MalformedConfigurationError(
+                f"Migration profile {name} has unknown settings: {', '.join(unknown)}"
+            )
+
+        profile["parallel_connections"] = int(
+            o_profile.get("parallel_connections", profile["parallel_connections"])
+        )
+
+        compression = o_profile.get("compression", profile["compression"])
+        if not compression or compression == "none":
+            compression = []
+        elif isinstance(compression, str):
+            compression = [compression]
+        for method in compression:
+            if method not in ["xbzrle", "mt", "zlib", "zstd"]:
+                raise MalformedConfigurationError(
+                    f"Migration profile {name} has invalid compression method {method}"
+                )
+            # zlib and zstd compress the multifd connections, which xbzrle and mt do not support
+            if (method in ["zlib", "zstd"]) != (profile["parallel_connections"] > 1):
+                raise MalformedConfigurationError(
+                    f"Migration profile {name} compression method {method} "
+                    + (
+                        "requires parallel_connections"
+                        if method in ["zlib", "zstd"]
+                        else "cannot be used with parallel_connections"
+                    )
+                )
+        profile["compression"] = list(compression)
+
+        profile["auto_converge"] = bool(
+            o_profile.get("auto_converge", profile["auto_converge"])
+        )
+        profile["postcopy"] = bool(o_profile.get("postcopy", profile["postcopy"]))
+        profile["postcopy_after"] = int(
+            o_profile.get("postcopy_after", profile["postcopy_after"])
+        )
+
+        max_downtime = o_profile.get("max_downtime", profile["max_downtime"])
+        profile["max_downtime"] = int(max_downtime) if max_downtime else None
+
+        profile["bandwidth"] = int(o_profile.get("bandwidth", profile["bandwidth"]))
+
+        profiles[name] = profile
+
+    return profiles
+
+
 def get_parsed_configuration(config_file):
     print('Loading configuration from file "{}"'.format(config_file))
 
@@ -256,6 +329,12 @@ def get_parsed_configuration(config_file):
             "keydb_port": o_database["keydb"]["port"],
             "keydb_host": o_database["keydb"]["hostname"],
             "keydb_path": o_database["keydb"]["path"],
+            "telemetry_backend": (o_database.get("telemetry") or dict()).get(
+                "backend", "zookeeper"
+            ),
+            "telemetry_ttl": int(
+                (o_database.get("telemetry") or dict()).get("ttl", 300)
+            ),
             "api_postgresql_port": o_database["postgres"]["port"],
             "api_postgresql_host": o_database["postgres"]["hostname"],
             "api_postgresql_dbname": o_database["postgres"]["credentials"]["api"][
@@ -267,6 +346,7 @@ def get_parsed_configuration(config_file):
             "api_postgresql_password": o_database["postgres"]["credentials"]["api"][
                 "password"
             ],
+            "api_postgresql_pool_size": int(o_database["postgres"].get("pool_size", 8)),
             "pdns_postgresql_port": o_database["postgres"]["port"],
             "pdns_postgresql_host": o_database["postgres"]["hostname"],
             "pdns_postgresql_dbname": o_database["postgres"]["credentials"]["dns"][
@@ -286,6 +366,12 @@ def get_parsed_configuration(config_file):
             "vm_shutdown_timeout": int(o_timer.get("vm_shutdown_timeout", 180)),
             "keepalive_interval": int(o_timer.get("keepalive_interval", 5)),
             "monitoring_interval": int(o_timer.get("monitoring_interval", 15)),
+            "monitoring_plugin_timeout": int(
+                o_timer.get("monitoring_plugin_timeout", 60)
+            ),
+            "monitoring_plugin_isolation": o_timer.get(
+                "monitoring_plugin_isolation", False
+            ),
         }
         config = {**config, **config_timer}
 
@@ -305,7 +391,19 @@ def get_parsed_configuration(config_file):
         o_migration = o_config["migration"]
         config_migration = {
             "migration_target_selector": o_migration.get("target_selector", "mem"),
+            "migration_default_profile": o_migration.get("default_profile", "default"),
+            "migration_profiles": get_migration_profiles(
+                o_migration.get("profiles", dict())
+            ),
         }
+        if config_migration["migration_default_profile"] not in (
+            config_migration["migration_profiles"]
+        ):
+            raise MalformedConfigurationError(
+                "Default migration profile {} is not defined".format(
+                    config_migration["migration_default_profile"]
+                )
+            )
         config = {**config, **config_migration}
 
         o_logging = o_config["logging"]
@@ -374,6 +472,15 @@ def get_parsed_configuration(config_file):
         }
         config = {**config, **config_api_ssl}
 
+        o_api_workers = o_api.get("workers", dict())
+        config_api_workers = {
+            "api_worker_count": int(o_api_workers.get("count", 1)),
+            "api_worker_threads": int(o_api_workers.get("threads", 8)),
+            "api_max_transfers": int(o_api_workers.get("max_transfers", 2)),
+            "api_retry_after": int(o_api_workers.get("retry_after", 30)),
+        }
+        config = {**config, **config_api_workers}
+
         # Use coordinators as storage hosts if not explicitly specified
         # These are added as FQDNs in the storage domain
         if not config["storage_hosts"] or len(config["storage_hosts"]) < 1:
@@ -442,9 +549,21 @@ def get_parsed_autobackup_configuration(config_file):
             "backup_root_suffix": o_autobackup["backup_root_suffix"],
             "backup_tags": o_autobackup["backup_tags"],
             "backup_schedule": o_autobackup["backup_schedule"],
+            "backup_export_format": o_autobackup.get("export_format", "rbd"),
+            "backup_compression": o_autobackup.get("compression", "zstd"),
         }
         config = {**config, **config_autobackup}
 
+        o_concurrency = o_autobackup.get("concurrency") or dict()
+        config_concurrency = {
+            "backup_concurrency": {
+                "cluster": max(1, int(o_concurrency.get("cluster", 2))),
+                "per_pool": max(1, int(o_concurrency.get("per_pool", 2))),
+                "per_target": max(1, int(o_concurrency.get("per_target", 2))),
+            },
+        }
+        config = {**config, **config_concurrency}
+
         o_automount = o_autobackup["auto_mount"]
         config_automount = {
             "auto_mount_enabled": o_automount["enabled"],
@@ -514,6 +633,7 @@ def get_parsed_automirror_configuration(config_file):
             "mirror_destinations": o_automirror["destinations"],
             "mirror_default_destination": o_automirror["default_destination"],
             "mirror_keep_snapshots": o_automirror["keep_snapshots"],
+            "mirror_concurrency": o_automirror.get("concurrency", None),
         }
         config = {**config, **config_automirror}
 
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+# database.py - PVC API database connection pool functions
+# Part of the Parallel Virtual Cluster (PVC) system
+#
+#    Copyright (C) 2018-2024 Joshua M. Boniface <joshua@boniface.me>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+import os
+import psycopg2
+import psycopg2.extensions
+import psycopg2.extras
+import psycopg2.pool
+import re
+
+from threading import Lock
+
+
+# The default maximum number of pooled connections per process
+DEFAULT_POOL_SIZE = 8
+
+# Pools are per-process (connections cannot be shared across a fork) and per-database
+_pools = dict()
+_pools_lock = Lock()
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    """
+    A psycopg2 connection which remembers its pool, whether it was used before, and the
+    statements prepared on it
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pvc_pool = None
+        self.pvc_used = False
+        self.pvc_prepared = set()
+
+
+def get_pool(config):
+    """
+    Get (creating if needed) the connection pool for the API database in this process
+    """
+    key = (
+        os.getpid(),
+        config["api_postgresql_host"],
+        config["api_postgresql_port"],
+        config["api_postgresql_dbname"],
+        config["api_postgresql_user"],
+    )
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = psycopg2.pool.ThreadedConnectionPool(
+                0,
+                config.get("api_postgresql_pool_size", DEFAULT_POOL_SIZE),
+                host=config["api_postgresql_host"],
+                port=config["api_postgresql_port"],
+                dbname=config["api_postgresql_dbname"],
+                user=config["api_postgresql_user"],
+                password=config["api_postgresql_password"],
+                connection_factory=PooledConnection,
+            )
+            _pools[key] = pool
+    return pool
+
+
+def check_connection(conn):
+    """
+    Check that a pooled connection still works by running a trivial query on it
+
+    The client only notices that the server dropped a connection (e.g. on a restart or a leader
+    change) once it is used, so idle pooled connections must be checked before they are reused.
+    """
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        return False
+
+
+def open_database(config):
+    """
+    Get a connection from the pool and a RealDictCursor on it
+
+    Reused connections which no longer work are discarded, and the pool opens new ones in their
+    place. If the pool is exhausted, a dedicated connection is opened instead, which is closed
+    rather than returned to the pool by close_database.
+    """
+    pool = get_pool(config)
+    try:
+        while True:
+            conn = pool.getconn()
+            if not conn.pvc_used or check_connection(conn):
+                break
+            pool.putconn(conn, close=True)
+        conn.pvc_pool = pool
+    except psycopg2.pool.PoolError:
+        conn = psycopg2.connect(
+            host=config["api_postgresql_host"],
+            port=config["api_postgresql_port"],
+            dbname=config["api_postgresql_dbname"],
+            user=config["api_postgresql_user"],
+            password=config["api_postgresql_password"],
+            connection_factory=PooledConnection,
+        )
+    cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    return conn, cur
+
+
+def close_database(conn, cur, failed=False):
+    """
+    Commit (or, if failed, roll back) and release a connection from open_database
+    """
+    try:
+        if not conn.closed:
+            if not failed:
+                conn.commit()
+            else:
+                conn.rollback()
+        cur.close()
+    finally:
+        pool = conn.pvc_pool
+        if pool is None:
+            conn.close()
+        else:
+            conn.pvc_pool = None
+            # Connections left in an unusable state are closed rather than reused
+            broken = (
+                conn.closed
+                or conn.info.transaction_status
+                != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+            )
+            conn.pvc_used = True
+            pool.putconn(conn, close=broken)
+
+
+def execute_prepared(cur, name, query, args=()):
+    """
+    Execute query on cur as the prepared statement name, preparing it the first time it is
+    used on the cursor's connection; query uses %s placeholders like a normal execute
+
+    Prepared statements persist for the life of the (pooled) connection, so frequently-run
+    lookups are only parsed and planned once per connection.
+    """
+    conn = cur.connection
+    if name not in conn.pvc_prepared:
+        placeholder = iter(range(1, len(args) + 1))
+        statement = re.sub(r"%s", lambda _: f"${next(placeholder)}", query)
+        cur.execute(f"PREPARE {name} AS {statement}")
+        conn.pvc_prepared.add(name)
+    if args:
+        cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(args))})", args)
+    else:
+        cur.execute(f"EXECUTE {name}")
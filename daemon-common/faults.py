@@ -21,6 +21,8 @@
 
 from datetime import datetime
 
+import daemon_lib.common as common
+
 
 def generate_fault(
     zkhandler,
@@ -31,51 +33,101 @@ def generate_fault(
     fault_message,
     fault_details=None,
 ):
-    # Strip the microseconds off of the fault time; we don't care about that precision
-    fault_time = str(fault_time).split(".")[0]
+    generate_faults(
+        zkhandler,
+        logger,
+        [(fault_name, fault_time, fault_delta, fault_message, fault_details)],
+    )
+
+
+def generate_faults(zkhandler, logger, new_faults, refresh_interval=None):
+    """
+    Generate or update several faults in a single transaction
 
-    if fault_details is not None:
-        fault_message = f"{fault_message}: {fault_details}"
+    {new_faults} is a list of (fault_name, fault_time, fault_delta, fault_message, fault_details)
+    tuples. Existing faults whose delta and message are unchanged are only updated once their last
+    reported time is at least {refresh_interval} seconds old, or every time if it is None.
+
+    Returns False if fault reporting was skipped, or True otherwise.
+    """
+    if not new_faults:
+        return True
+
+    # A fault may only be written once per transaction, so only its last report is kept
+    new_faults = list({f[0]: f for f in new_faults}.values())
+    fault_names = ", ".join([f[0] for f in new_faults])
 
-    # If a fault already exists with this ID, just update the time
     if not zkhandler.exists("base.faults"):
         logger.out(
-            f"Skipping fault reporting for {fault_name} due to missing Zookeeper schemas",
+            f"Skipping fault reporting for {fault_names} due to missing Zookeeper schemas",
             state="w",
         )
-        return
-
-    existing_faults = zkhandler.children("base.faults")
-    if fault_name in existing_faults:
-        logger.out(
-            f"Updating fault {fault_name}: {fault_message} @ {fault_time}", state="i"
-        )
-    else:
-        logger.out(
-            f"Generating fault {fault_name}: {fault_message} @ {fault_time}",
-            state="i",
-        )
+        return False
 
     if zkhandler.read("base.config.maintenance") == "true":
         logger.out(
-            f"Skipping fault reporting for {fault_name} due to maintenance mode",
+            f"Skipping fault reporting for {fault_names} due to maintenance mode",
             state="w",
         )
-        return
+        return False
 
-    # Update an existing fault
-    if fault_name in existing_faults:
-        zkhandler.write(
-            [
+    # Read the current details of every existing fault in one batch
+    existing_faults = set(zkhandler.children("base.faults"))
+    update_names = [f[0] for f in new_faults if f[0] in existing_faults]
+    existing_details = zkhandler.read_many(
+        [
+            (key, fault_name)
+            for fault_name in update_names
+            for key in ["faults.last_time", "faults.delta", "faults.message"]
+        ]
+    )
+    existing_details = {
+        fault_name: existing_details[idx * 3 : idx * 3 + 3]
+        for idx, fault_name in enumerate(update_names)
+    }
+
+    fault_writes = list()
+    for fault_name, fault_time, fault_delta, fault_message, fault_details in new_faults:
+        # Strip the microseconds off of the fault time; we don't care about that precision
+        fault_time = str(fault_time).split(".")[0]
+
+        if fault_details is not None:
+            fault_message = f"{fault_message}: {fault_details}"
+
+        # Update an existing fault
+        if fault_name in existing_details:
+            last_time, last_delta, last_message = existing_details[fault_name]
+            if (
+                refresh_interval is not None
+                and last_delta == str(fault_delta)
+                and last_message == fault_message
+            ):
+                try:
+                    age = (
+                        datetime.fromisoformat(fault_time)
+                        - datetime.fromisoformat(last_time)
+                    ).total_seconds()
+                except (TypeError, ValueError):
+                    age = refresh_interval
+                if age < refresh_interval:
+                    continue
+
+            logger.out(
+                f"Updating fault {fault_name}: {fault_message} @ {fault_time}",
+                state="i",
+            )
+            fault_writes += [
                 (("faults.last_time", fault_name), fault_time),
                 (("faults.delta", fault_name), fault_delta),
                 (("faults.message", fault_name), fault_message),
             ]
-        )
-    # Generate a new fault
-    else:
-        zkhandler.write(
-            [
+        # Generate a new fault
+        else:
+            logger.out(
+                f"Generating fault {fault_name}: {fault_message} @ {fault_time}",
+                state="i",
+            )
+            fault_writes += [
                 (("faults.id", fault_name), ""),
                 (("faults.first_time", fault_name), fault_time),
                 (("faults.last_time", fault_name), fault_time),
@@ -84,7 +136,11 @@ def generate_fault(
                 (("faults.delta", fault_name), fault_delta),
                 (("faults.message", fault_name), fault_message),
             ]
-        )
+
+    if fault_writes:
+        zkhandler.write(fault_writes)
+
+    return True
 
 
 def getFault(zkhandler, fault_id):
@@ -175,17 +231,28 @@ def getAllFaults(zkhandler, sort_key="last_reported"):
         }
         faults_detail.append(fault_output)
 
-    sorted_faults = sorted(faults_detail, key=lambda x: x[sort_key])
-    # Sort newest-first for time-based sorts
-    if sort_key in ["first_reported", "last_reported", "acknowledge_at"]:
-        sorted_faults.reverse()
-
-    return sorted_faults
+    # Sort newest-first for time-based sorts; ties are sorted by ID so the order is stable
+    return sorted(
+        faults_detail,
+        key=lambda x: (x[sort_key], x["id"]),
+        reverse=sort_key in ["first_reported", "last_reported", "acknowledge_at"],
+    )
 
 
-def get_list(zkhandler, limit=None, sort_key="last_reported"):
+def get_list(
+    zkhandler,
+    limit=None,
+    sort_key="last_reported",
+    cursor=None,
+    count=None,
+    chunk_size=None,
+):
     """
     Get a list of all known faults, sorted by {sort_key}
+
+    If {cursor} or {count} are set, only the up to {count} faults following {cursor} are
+    returned. If {chunk_size} is set, a generator of lists of up to {chunk_size} faults is
+    returned instead.
     """
     if sort_key not in [
         "first_reported",
@@ -202,6 +269,24 @@ def get_list(zkhandler, limit=None, sort_key="last_reported"):
     if limit is not None:
         all_faults = [fault for fault in all_faults if fault["id"] == limit]
 
+    def fault_key(fault):
+        return (fault[sort_key], fault["id"])
+
+    if cursor is not None or count is not None:
+        retflag, all_faults = common.getListPage(
+            all_faults,
+            fault_key,
+            cursor=cursor,
+            count=count,
+            reverse=sort_key in ["first_reported", "last_reported", "acknowledge_at"],
+        )
+        if not retflag:
+            return False, all_faults
+
+    if chunk_size is not None:
+        # Faults are read in full to be sorted, so chunks only bound the size of each response
+        return True, common.getListChunks(all_faults, list, chunk_size, fault_key)
+
     return True, all_faults
 
 
@@ -706,7 +706,24 @@ def get_list(zkhandler, limit, is_fuzzy=True):
     return True, net_list
 
 
-def get_list_dhcp(zkhandler, network, limit, only_static=False, is_fuzzy=True):
+def get_list_dhcp(
+    zkhandler,
+    network,
+    limit,
+    only_static=False,
+    is_fuzzy=True,
+    cursor=None,
+    count=None,
+    chunk_size=None,
+):
+    """
+    Get the information of all DHCP leases and reservations in a network matching the filters,
+    sorted by MAC address
+
+    If {cursor} or {count} are set, only the up to {count} leases following {cursor} are
+    returned. If {chunk_size} is set, a generator of lists of up to {chunk_size} leases is
+    returned instead.
+    """
     # Validate and obtain alternate passed value
     net_vni = getNetworkVNI(zkhandler, network)
     if not net_vni:
@@ -714,8 +731,6 @@ def get_list_dhcp(zkhandler, network, limit, only_static=False, is_fuzzy=True):
             network
         )
 
-    dhcp_list = []
-
     if only_static:
         full_dhcp_list = getNetworkDHCPReservations(zkhandler, net_vni)
     else:
@@ -729,7 +744,8 @@ def get_list_dhcp(zkhandler, network, limit, only_static=False, is_fuzzy=True):
         if not re.match(r".*\$", limit):
             limit = limit + ".*"
 
-    for lease in full_dhcp_list:
+    dhcp_execute_list = list()
+    for lease in set(full_dhcp_list):
         valid_lease = False
         if limit:
             if re.fullmatch(limit, lease):
@@ -740,9 +756,23 @@ def get_list_dhcp(zkhandler, network, limit, only_static=False, is_fuzzy=True):
             valid_lease = True
 
         if valid_lease:
-            dhcp_list.append(getDHCPLeaseInformation(zkhandler, net_vni, lease))
+            dhcp_execute_list.append(lease)
+
+    retflag, dhcp_execute_list = common.getListPage(
+        dhcp_execute_list, lambda lease: (lease,), cursor=cursor, count=count
+    )
+    if not retflag:
+        return False, dhcp_execute_list
+
+    def get_dhcp_list(leases):
+        return [getDHCPLeaseInformation(zkhandler, net_vni, lease) for lease in leases]
+
+    if chunk_size is not None:
+        return True, common.getListChunks(
+            dhcp_execute_list, get_dhcp_list, chunk_size, lambda lease: (lease,)
+        )
 
-    return True, dhcp_list
+    return True, get_dhcp_list(dhcp_execute_list)
 
 
 def get_list_acl(zkhandler, network, limit, direction, is_fuzzy=True):
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+
+# telemetry.py - PVC ephemeral telemetry storage backends
+# Part of the Parallel Virtual Cluster (PVC) system
+#
+#    Copyright (C) 2018-2024 Joshua M. Boniface <joshua@boniface.me>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+from threading import Lock
+
+
+#
+# Telemetry key definitions
+#
+# These schema keys hold ephemeral statistics rewritten by the daemons every keepalive. When a
+# telemetry backend is configured, ZKHandler reads and writes them through the backend instead
+# of Zookeeper, leaving Zookeeper to hold only configuration and state.
+#
+# Each key maps to the value read back when the key of an existing object is missing or has
+# expired, which matches the value written when the owning object is first created; keys of
+# objects which do not exist read back as None, as they do from Zookeeper.
+TELEMETRY_KEYS = {
+    "node.memory.total": "0",
+    "node.memory.used": "0",
+    "node.memory.free": "0",
+    "node.memory.allocated": "0",
+    "node.memory.provisioned": "0",
+    "node.vcpu.allocated": "0",
+    "node.cpu.load": "0.0",
+    "node.count.provisioned_domains": "0",
+    "node.network.stats": "{}",
+    "domain.stats": "{}",
+    "osd.stats": "{}",
+    "pool.stats": "{}",
+}
+
+# The prefix of all telemetry keys in KeyDB, followed by the key's Zookeeper schema path
+KEYDB_KEY_PREFIX = "pvc.telemetry:"
+
+# The default lifetime of telemetry values, in seconds; values from a node that stops
+# reporting expire and read back as their defaults
+DEFAULT_TTL = 300
+
+# The KeyDB socket timeout, in seconds; telemetry must never stall a keepalive for long
+KEYDB_TIMEOUT = 2
+
+
+def is_telemetry_key(key):
+    """
+    Return True if the schema key tuple is a telemetry key
+    """
+    return isinstance(key, tuple) and len(key) == 2 and key[0] in TELEMETRY_KEYS
+
+
+def get_default(key):
+    """
+    Return the value read back for a missing or expired telemetry key
+    """
+    return TELEMETRY_KEYS[key[0]]
+
+
+def get_object_key(key):
+    """
+    Return the schema key of the object (node, VM, OSD or pool) which owns a telemetry key
+    """
+    return (key[0].split(".")[0], key[1])
+
+
+#
+# Backends
+#
+class KeyDBTelemetry(object):
+    """
+    Store telemetry in KeyDB, with a TTL on every value and pipelined multi-key operations
+    """
+
+    _pools = dict()
+    _pools_lock = Lock()
+
+    def __init__(self, host, port, path, ttl=DEFAULT_TTL):
+        import redis
+
+        db = int(str(path).strip("/") or 0)
+        # Connection pools are shared by every handler in the process
+        with self._pools_lock:
+            if (host, port, db) not in self._pools:
+                self._pools[(host, port, db)] = redis.ConnectionPool(
+                    host=host,
+                    port=int(port),
+                    db=db,
+                    socket_timeout=KEYDB_TIMEOUT,
+                    socket_connect_timeout=KEYDB_TIMEOUT,
+                )
+            pool = self._pools[(host, port, db)]
+
+        self.client = redis.Redis(connection_pool=pool)
+        self.ttl = ttl
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            config["keydb_host"],
+            config["keydb_port"],
+            config["keydb_path"],
+            ttl=config.get("telemetry_ttl", DEFAULT_TTL),
+        )
+
+    def read_many(self, paths):
+        """
+        Read several telemetry values in one round trip, returning None for missing values
+        """
+        if not paths:
+            return list()
+        values = self.client.mget([f"{KEYDB_KEY_PREFIX}{path}" for path in paths])
+        return [v.decode("utf8") if v is not None else None for v in values]
+
+    def write(self, pairs):
+        """
+        Write several (path, value) telemetry pairs in one pipelined round trip
+        """
+        pipeline = self.client.pipeline(transaction=False)
+        for path, value in pairs:
+            pipeline.set(f"{KEYDB_KEY_PREFIX}{path}", str(value), ex=self.ttl)
+        pipeline.execute()
+
+
+TELEMETRY_BACKENDS = {
+    "keydb": KeyDBTelemetry,
+}
+
+
+def get_backend(config):
+    """
+    Return the telemetry backend for config, or None to keep telemetry in Zookeeper
+
+    Configurations without a telemetry backend (e.g. minimal configurations used by tools
+    which only need Zookeeper) always keep telemetry in Zookeeper.
+    """
+    backend = config.get("telemetry_backend", "zookeeper")
+    if backend not in TELEMETRY_BACKENDS:
+        return None
+
+    return TELEMETRY_BACKENDS[backend].from_config(config)
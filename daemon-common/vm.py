@@ -24,10 +24,9 @@ import re
 import os.path
 import lxml.objectify
 import lxml.etree
-import rados
 import requests
 
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 from distutils.util import strtobool
 from json import dump as jdump
@@ -36,18 +35,34 @@ from json import loads as jloads
 from libvirt import open as lvopen
 from os import scandir
 from packaging.version import parse as parse_version
-from rbd import Image as RBDImage
 from shutil import rmtree
 from socket import gethostname
 from uuid import UUID
 
 import daemon_lib.common as common
 import daemon_lib.ceph as ceph
+import daemon_lib.backuprepo as backuprepo
+import daemon_lib.blockstream as blockstream
 
 from daemon_lib.network import set_sriov_vf_vm, unset_sriov_vf_vm
 from daemon_lib.celery import start, update, fail, finish
 
 
+# The states a VM can be filtered by
+valid_states = [
+    "start",
+    "restart",
+    "shutdown",
+    "stop",
+    "disable",
+    "fail",
+    "migrate",
+    "unmigrate",
+    "provision",
+    "mirror",
+]
+
+
 #
 # Cluster search functions
 #
@@ -155,6 +170,7 @@ def define_vm(
     profile=None,
     tags=[],
     initial_state="stop",
+    migration_profile=None,
 ):
     # Parse the XML data
     try:
@@ -308,8 +324,10 @@ def define_vm(
             ),
             (("domain.meta.node_limit", dom_uuid), formatted_node_limit),
             (("domain.meta.node_selector", dom_uuid), str(node_selector).lower()),
+            (("domain.meta.migrate_profile", dom_uuid), migration_profile or ""),
             (("domain.meta.tags", dom_uuid), ""),
             (("domain.migrate.sync_lock", dom_uuid), ""),
+            (("domain.migrate.progress", dom_uuid), ""),
             (("domain.snapshots", dom_uuid), ""),
         ]
     )
@@ -341,6 +359,7 @@ def modify_vm_metadata(
     provisioner_profile,
     migration_method,
     migration_max_downtime,
+    migration_profile=None,
 ):
     dom_uuid = getDomainUUID(zkhandler, domain)
     if not dom_uuid:
@@ -375,6 +394,11 @@ def modify_vm_metadata(
             )
         )
 
+    if migration_profile is not None:
+        update_list.append(
+            (("domain.meta.migrate_profile", dom_uuid), migration_profile)
+        )
+
     if len(update_list) < 1:
         return False, "ERROR: No updates to apply."
 
@@ -1134,26 +1158,31 @@ def get_info(zkhandler, domain):
 
 
 def get_list(
-    zkhandler, node=None, state=None, tag=None, limit=None, is_fuzzy=True, negate=False
+    zkhandler,
+    node=None,
+    state=None,
+    tag=None,
+    limit=None,
+    is_fuzzy=True,
+    negate=False,
+    cursor=None,
+    count=None,
+    chunk_size=None,
 ):
+    """
+    Get the full information of all VMs matching the filters, sorted by name
+
+    If {cursor} or {count} are set, only the up to {count} VMs following {cursor} are returned;
+    VM information, the expensive part of the list, is only obtained for these VMs. If
+    {chunk_size} is set, a generator of lists of up to {chunk_size} VMs is returned instead, which
+    obtains the information of each chunk of VMs only as it is consumed.
+    """
     if node is not None:
         # Verify node is valid
         if not common.verifyNode(zkhandler, node):
             return False, 'Specified node "{}" is invalid.'.format(node)
 
     if state is not None:
-        valid_states = [
-            "start",
-            "restart",
-            "shutdown",
-            "stop",
-            "disable",
-            "fail",
-            "migrate",
-            "unmigrate",
-            "provision",
-            "mirror",
-        ]
         if state not in valid_states:
             return False, 'VM state "{}" is not valid.'.format(state)
 
@@ -1181,9 +1210,37 @@ def get_list(
             except Exception as e:
                 return False, "Regex Error: {}".format(e)
 
+    # Read the names, and the keys of any filters, of all VMs in one pipelined pass each
+    vm_names = dict(
+        zip(full_vm_list, zkhandler.read_many([("domain", vm) for vm in full_vm_list]))
+    )
+    if tag is not None:
+        all_vm_tags = dict(
+            zip(
+                full_vm_list,
+                zkhandler.children_many(
+                    [("domain.meta.tags", vm) for vm in full_vm_list]
+                ),
+            )
+        )
+    if node is not None:
+        all_vm_nodes = dict(
+            zip(
+                full_vm_list,
+                zkhandler.read_many([("domain.node", vm) for vm in full_vm_list]),
+            )
+        )
+    if state is not None:
+        all_vm_states = dict(
+            zip(
+                full_vm_list,
+                zkhandler.read_many([("domain.state", vm) for vm in full_vm_list]),
+            )
+        )
+
     get_vm_info = dict()
     for vm in full_vm_list:
-        name = zkhandler.read(("domain", vm))
+        name = vm_names[vm]
         is_limit_match = False
         is_tag_match = False
         is_node_match = False
@@ -1203,7 +1260,7 @@ def get_list(
             is_limit_match = True
 
         if tag is not None:
-            vm_tags = zkhandler.children(("domain.meta.tags", vm))
+            vm_tags = all_vm_tags[vm] or list()
             if negate and tag not in vm_tags:
                 is_tag_match = True
             if not negate and tag in vm_tags:
@@ -1213,7 +1270,7 @@ def get_list(
 
         # Check on node
         if node is not None:
-            vm_node = zkhandler.read(("domain.node", vm))
+            vm_node = all_vm_nodes[vm]
             if negate and vm_node != node:
                 is_node_match = True
             if not negate and vm_node == node:
@@ -1223,7 +1280,7 @@ def get_list(
 
         # Check on state
         if state is not None:
-            vm_state = zkhandler.read(("domain.state", vm))
+            vm_state = all_vm_states[vm]
             if negate and vm_state != state:
                 is_state_match = True
             if not negate and vm_state == state:
@@ -1237,13 +1294,81 @@ def get_list(
             else False
         )
 
+    def vm_key(vm):
+        return (str(vm_names[vm]),)
+
+    retflag, vm_execute_list = common.getListPage(
+        [vm for vm in full_vm_list if get_vm_info[vm]],
+        vm_key,
+        cursor=cursor,
+        count=count,
+    )
+    if not retflag:
+        return False, vm_execute_list
+
     # Obtain our VM data in a thread pool
     # This helps parallelize the numerous Zookeeper calls a bit, within the bounds of the GIL, and
     # should help prevent this task from becoming absurdly slow with very large numbers of VMs.
     # The max_workers is capped at 32 to avoid creating an absurd number of threads especially if
     # the list gets called multiple times simultaneously by the API, but still provides a noticeable
     # speedup.
-    vm_execute_list = [vm for vm in full_vm_list if get_vm_info[vm]]
+    def get_vm_data_list(vm_uuids):
+        vm_data_list = list()
+        with ThreadPoolExecutor(
+            max_workers=32, thread_name_prefix="vm_list"
+        ) as executor:
+            futures = []
+            for vm_uuid in vm_uuids:
+                futures.append(
+                    executor.submit(common.getInformationFromXML, zkhandler, vm_uuid)
+                )
+            for future in futures:
+                try:
+                    vm_data_list.append(future.result())
+                except Exception:
+                    pass
+
+        return sorted(vm_data_list, key=lambda d: d["name"])
+
+    if chunk_size is not None:
+        return True, common.getListChunks(
+            vm_execute_list, get_vm_data_list, chunk_size, vm_key
+        )
+
+    return True, get_vm_data_list(vm_execute_list)
+
+
+def get_tag_index(zkhandler):
+    """
+    Get an index of each VM tag name to the UUIDs of the VMs with that tag
+
+    Only the tag keys are read, so this is far cheaper than filtering the output of get_list.
+    """
+    full_vm_list = zkhandler.children("base.domain")
+
+    tag_index = dict()
+    with ThreadPoolExecutor(max_workers=32, thread_name_prefix="vm_tags") as executor:
+        vm_tags = executor.map(
+            lambda vm: zkhandler.children(("domain.meta.tags", vm)) or list(),
+            full_vm_list,
+        )
+        for vm_uuid, tags in zip(full_vm_list, vm_tags):
+            for tag in tags:
+                tag_index.setdefault(tag, list()).append(vm_uuid)
+
+    return tag_index
+
+
+def get_list_by_tags(zkhandler, tags):
+    """
+    Get the full information of all VMs with at least one of the given tags, via the tag index
+    """
+    tag_index = get_tag_index(zkhandler)
+
+    vm_execute_list = set()
+    for tag in tags:
+        vm_execute_list.update(tag_index.get(tag, list()))
+
     vm_data_list = list()
     with ThreadPoolExecutor(max_workers=32, thread_name_prefix="vm_list") as executor:
         futures = []
@@ -1260,6 +1385,505 @@ def get_list(
     return True, sorted(vm_data_list, key=lambda d: d["name"])
 
 
+#
+# Bulk VM functions
+#
+def get_bulk_vm_list(zkhandler, vms=None, tag=None, node=None, state=None):
+    """
+    Resolve a bulk VM selector to the VMs it selects, sorted by name
+
+    The VMs named (by name or UUID) in {vms} which also match all of {tag}, {node} and {state} are
+    selected; if {vms} is not given, all VMs matching the other filters are. The names of all VMs,
+    then the state, node and tags of the candidate VMs, are each read in one pipelined pass.
+    Returns a list of VM details (uuid, name, state, node, tags) and a list of the entries of
+    {vms} which are not VMs in the cluster.
+    """
+    if vms is None and tag is None and node is None and state is None:
+        return False, "At least one of VMs, tag, node, or state must be specified."
+
+    if node is not None:
+        # Verify node is valid
+        if not common.verifyNode(zkhandler, node):
+            return False, 'Specified node "{}" is invalid.'.format(node)
+
+    if state is not None:
+        if state not in valid_states:
+            return False, 'VM state "{}" is not valid.'.format(state)
+
+    full_vm_list = zkhandler.children("base.domain")
+    full_vm_names = zkhandler.read_many([("domain", vm) for vm in full_vm_list])
+    uuid_by_name = dict(zip(full_vm_names, full_vm_list))
+    name_by_uuid = dict(zip(full_vm_list, full_vm_names))
+
+    missing_vms = list()
+    if vms is not None:
+        candidate_list = list()
+        for vm in vms:
+            if vm in uuid_by_name:
+                candidate_list.append(uuid_by_name[vm])
+            elif vm in name_by_uuid:
+                candidate_list.append(vm)
+            else:
+                missing_vms.append(vm)
+        # Preserve the order but drop any VMs specified twice
+        candidate_list = list(dict.fromkeys(candidate_list))
+    else:
+        candidate_list = full_vm_list
+
+    vm_details = zkhandler.read_many(
+        [(key, vm) for vm in candidate_list for key in ["domain.state", "domain.node"]]
+    )
+    vm_tags = zkhandler.children_many(
+        [("domain.meta.tags", vm) for vm in candidate_list]
+    )
+
+    vm_list = list()
+    for idx, vm in enumerate(candidate_list):
+        vm_state, vm_node = vm_details[idx * 2 : idx * 2 + 2]
+        tags = vm_tags[idx] or list()
+        if tag is not None and tag not in tags:
+            continue
+        if node is not None and vm_node != node:
+            continue
+        if state is not None and vm_state != state:
+            continue
+        vm_list.append(
+            {
+                "uuid": vm,
+                "name": name_by_uuid[vm],
+                "state": vm_state,
+                "node": vm_node,
+                "tags": tags,
+            }
+        )
+
+    return True, (sorted(vm_list, key=lambda vm: vm["name"]), missing_vms)
+
+
+def bulk_write(zkhandler, vm_updates, batch_size=100):
+    """
+    Write the key-value pairs of many VMs in as few transactions as possible
+
+    {vm_updates} is a list of (uuid, kvpairs) tuples; the pairs of up to {batch_size} VMs are
+    committed in each transaction. If a transaction fails, the VMs in it are written one by one
+    instead, so that a failing VM does not fail the others. Returns the set of UUIDs whose pairs
+    were written.
+    """
+    written = set()
+    for idx in range(0, len(vm_updates), batch_size):
+        batch = vm_updates[idx : idx + batch_size]
+        if zkhandler.write([kvpair for _, kvpairs in batch for kvpair in kvpairs]):
+            written.update(vm for vm, _ in batch)
+            continue
+
+        for vm, kvpairs in batch:
+            if zkhandler.write(kvpairs):
+                written.add(vm)
+
+    return written
+
+
+def bulk_change_state(zkhandler, vm_list, new_state, concurrency=32, lock_timeout=30):
+    """
+    Change the state of many VMs, as change_state does for one VM
+
+    The state locks of the VMs are acquired concurrently by up to {concurrency} threads, then the
+    new states are written in batched transactions and the state is allowed to flow to all nodes
+    once for all of the VMs. A VM whose lock cannot be acquired within {lock_timeout} seconds, for
+    instance because it is being migrated, is not changed. Returns a dict of UUID to an error
+    message for each VM that was not changed.
+    """
+    errors = dict()
+
+    def acquire_lock(vm):
+        lock = zkhandler.exclusivelock(("domain.state", vm["uuid"]))
+        if lock is None:
+            return None
+        try:
+            if lock.acquire(timeout=lock_timeout):
+                return lock
+        except Exception:
+            pass
+        return None
+
+    with ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="vm_bulk"
+    ) as executor:
+        locks = list(executor.map(acquire_lock, vm_list))
+        try:
+            vm_updates = list()
+            for vm, lock in zip(vm_list, locks):
+                if lock is None:
+                    errors[vm["uuid"]] = (
+                        'ERROR: Failed to lock the state of VM "{}"; it may be busy.'.format(
+                            vm["name"]
+                        )
+                    )
+                else:
+                    vm_updates.append(
+                        (vm["uuid"], [(("domain.state", vm["uuid"]), new_state)])
+                    )
+
+            written = bulk_write(zkhandler, vm_updates)
+            for vm, _ in vm_updates:
+                if vm not in written:
+                    errors[vm] = 'ERROR: Failed to set the state of VM "{}".'.format(
+                        zkhandler.read(("domain", vm))
+                    )
+
+            # Wait for 1/2 second to allow state to flow to all nodes
+            if written:
+                time.sleep(0.5)
+        finally:
+            list(
+                executor.map(
+                    lambda lock: lock.release(),
+                    [lock for lock in locks if lock is not None],
+                )
+            )
+
+    return errors
+
+
+def bulk_wait_state(zkhandler, vm_list, is_waiting, concurrency=32):
+    """
+    Wait until is_waiting(state) is false for each of the VMs, reading the states of the VMs still
+    waiting concurrently by up to {concurrency} threads every 1/2 second
+    """
+    waiting = list(vm_list)
+    with ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="vm_bulk"
+    ) as executor:
+        while waiting:
+            states = executor.map(
+                lambda vm: zkhandler.read(("domain.state", vm["uuid"])), waiting
+            )
+            waiting = [vm for vm, state in zip(waiting, states) if is_waiting(state)]
+            if waiting:
+                time.sleep(0.5)
+
+
+def bulk_results(vm_list, missing_vms, errors, messages):
+    """
+    Build the per-VM results of a bulk action from its {errors} and {messages}, dicts of UUID to
+    message, and return them with a flag of whether all VMs succeeded
+    """
+    results = [
+        {
+            "name": vm,
+            "uuid": None,
+            "result": False,
+            "message": 'ERROR: Could not find VM "{}" in the cluster!'.format(vm),
+        }
+        for vm in missing_vms
+    ]
+    for vm in vm_list:
+        if vm["uuid"] in errors:
+            result, message = False, errors[vm["uuid"]]
+        else:
+            result, message = True, messages[vm["uuid"]]
+        results.append(
+            {
+                "name": vm["name"],
+                "uuid": vm["uuid"],
+                "result": result,
+                "message": message,
+            }
+        )
+
+    return all(result["result"] for result in results), results
+
+
+def bulk_set_vm_state(
+    zkhandler,
+    new_state,
+    vms=None,
+    tag=None,
+    node=None,
+    state=None,
+    force=False,
+    wait=False,
+    concurrency=32,
+):
+    """
+    Set the state of all VMs selected by {vms}, {tag}, {node} and {state} (see get_bulk_vm_list)
+    to {new_state} (start, shutdown, stop, restart or disable)
+
+    Each VM is validated as by start_vm, shutdown_vm, stop_vm, restart_vm or disable_vm, then all
+    valid VMs are changed together by bulk_change_state and waited for by bulk_wait_state; a VM
+    which fails does not prevent the others from changing. Returns a flag of whether all VMs
+    succeeded and a list of the results of each VM.
+    """
+    if new_state not in ["start", "shutdown", "stop", "restart", "disable"]:
+        return False, 'VM state "{}" is not valid.'.format(new_state)
+
+    retflag, retdata = get_bulk_vm_list(
+        zkhandler, vms=vms, tag=tag, node=node, state=state
+    )
+    if not retflag:
+        return False, retdata
+    vm_list, missing_vms = retdata
+
+    errors = dict()
+    messages = dict()
+
+    # Validate all the VMs first, exactly as the individual state changes do
+    for vm in vm_list:
+        if new_state in ["start", "stop", "disable"]:
+            if vm["state"] in ["mirror"] and not force:
+                errors[vm["uuid"]] = (
+                    'ERROR: VM "{}" is a snapshot mirror and {} not forced!'.format(
+                        vm["name"], new_state
+                    )
+                )
+        elif vm["state"] != "start":
+            errors[vm["uuid"]] = 'ERROR: VM "{}" is not in "start" state!'.format(
+                vm["name"]
+            )
+    valid_list = [vm for vm in vm_list if vm["uuid"] not in errors]
+
+    if new_state == "disable":
+        # Shut down (or force stop) any running VMs before disabling them
+        running_list = [vm for vm in valid_list if vm["state"] in ["start"]]
+        errors.update(
+            bulk_change_state(
+                zkhandler,
+                running_list,
+                "stop" if force else "shutdown",
+                concurrency=concurrency,
+            )
+        )
+        running_list = [vm for vm in running_list if vm["uuid"] not in errors]
+        if force:
+            # Wait for the command to be registered by the node
+            time.sleep(0.5)
+        else:
+            # Wait for the shutdowns to complete
+            bulk_wait_state(
+                zkhandler,
+                running_list,
+                lambda state: state != "stop",
+                concurrency=concurrency,
+            )
+        valid_list = [vm for vm in valid_list if vm["uuid"] not in errors]
+
+    # Set the new state of all of the valid VMs
+    errors.update(
+        bulk_change_state(zkhandler, valid_list, new_state, concurrency=concurrency)
+    )
+    valid_list = [vm for vm in valid_list if vm["uuid"] not in errors]
+
+    if wait and new_state in ["shutdown", "restart"]:
+        bulk_wait_state(
+            zkhandler,
+            valid_list,
+            lambda state: state == new_state,
+            concurrency=concurrency,
+        )
+
+    for vm in valid_list:
+        if new_state == "start":
+            messages[vm["uuid"]] = 'Starting VM "{}".'.format(vm["name"])
+        elif new_state == "stop":
+            messages[vm["uuid"]] = 'Forcibly stopping VM "{}".'.format(vm["name"])
+        elif new_state == "disable":
+            messages[vm["uuid"]] = 'Disabled VM "{}".'.format(vm["name"])
+        elif new_state == "shutdown":
+            if wait:
+                messages[vm["uuid"]] = 'Shut down VM "{}"'.format(vm["name"])
+            else:
+                messages[vm["uuid"]] = 'Shutting down VM "{}"'.format(vm["name"])
+        elif new_state == "restart":
+            if wait:
+                messages[vm["uuid"]] = 'Restarted VM "{}"'.format(vm["name"])
+            else:
+                messages[vm["uuid"]] = 'Restarting VM "{}".'.format(vm["name"])
+
+    return bulk_results(vm_list, missing_vms, errors, messages)
+
+
+def bulk_modify_vm_tag(
+    zkhandler,
+    action,
+    tag,
+    protected=False,
+    vms=None,
+    select_tag=None,
+    node=None,
+    state=None,
+    concurrency=32,
+):
+    """
+    Add or remove {tag} on all VMs selected by {vms}, {select_tag}, {node} and {state} (see
+    get_bulk_vm_list), as modify_vm_tag does for one VM
+
+    Added tags are written in batched transactions; removed tags are deleted concurrently by up to
+    {concurrency} threads. Returns a flag of whether all VMs succeeded and a list of the results of
+    each VM.
+    """
+    if action not in ["add", "remove"]:
+        return False, "Specified tag action is not available."
+
+    retflag, retdata = get_bulk_vm_list(
+        zkhandler,
+        vms=vms,
+        tag=select_tag,
+        node=node,
+        state=state,
+    )
+    if not retflag:
+        return False, retdata
+    vm_list, missing_vms = retdata
+
+    errors = dict()
+    messages = dict()
+
+    if action == "add":
+        vm_updates = [
+            (
+                vm["uuid"],
+                [
+                    (("domain.meta.tags", vm["uuid"], "tag.name", tag), tag),
+                    (("domain.meta.tags", vm["uuid"], "tag.type", tag), "user"),
+                    (
+                        ("domain.meta.tags", vm["uuid"], "tag.protected", tag),
+                        protected,
+                    ),
+                ],
+            )
+            for vm in vm_list
+        ]
+        written = bulk_write(zkhandler, vm_updates)
+        for vm in vm_list:
+            if vm["uuid"] in written:
+                messages[vm["uuid"]] = 'Successfully added tag "{}" to VM "{}".'.format(
+                    tag, vm["name"]
+                )
+            else:
+                errors[vm["uuid"]] = 'ERROR: Failed to add tag "{}" to VM "{}".'.format(
+                    tag, vm["name"]
+                )
+
+        return bulk_results(vm_list, missing_vms, errors, messages)
+
+    def remove_tag(vm):
+        if tag not in vm["tags"]:
+            return False, 'The tag "{}" does not exist.'.format(tag)
+
+        if zkhandler.read(("domain.meta.tags", vm["uuid"], "tag.type", tag)) != "user":
+            return (
+                False,
+                'The tag "{}" is not a user tag and cannot be removed.'.format(tag),
+            )
+
+        if bool(
+            strtobool(
+                zkhandler.read(("domain.meta.tags", vm["uuid"], "tag.protected", tag))
+            )
+        ):
+            return False, 'The tag "{}" is protected and cannot be removed.'.format(tag)
+
+        if not zkhandler.delete([(("domain.meta.tags", vm["uuid"], "tag", tag))]):
+            return False, 'ERROR: Failed to remove tag "{}" from VM "{}".'.format(
+                tag, vm["name"]
+            )
+
+        return True, 'Successfully removed tag "{}" from VM "{}".'.format(
+            tag, vm["name"]
+        )
+
+    with ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="vm_bulk"
+    ) as executor:
+        for vm, (result, message) in zip(vm_list, executor.map(remove_tag, vm_list)):
+            if result:
+                messages[vm["uuid"]] = message
+            else:
+                errors[vm["uuid"]] = message
+
+    return bulk_results(vm_list, missing_vms, errors, messages)
+
+
+def bulk_modify_vm_metadata(
+    zkhandler,
+    node_limit,
+    node_selector,
+    node_autostart,
+    provisioner_profile,
+    migration_method,
+    migration_max_downtime,
+    migration_profile=None,
+    vms=None,
+    tag=None,
+    node=None,
+    state=None,
+):
+    """
+    Modify the PVC metadata of all VMs selected by {vms}, {tag}, {node} and {state} (see
+    get_bulk_vm_list), as modify_vm_metadata does for one VM, in batched transactions
+
+    Returns a flag of whether all VMs succeeded and a list of the results of each VM.
+    """
+    update_list = list()
+
+    if node_limit is not None:
+        update_list.append(("domain.meta.node_limit", node_limit))
+
+    if node_selector is not None:
+        update_list.append(("domain.meta.node_selector", str(node_selector).lower()))
+
+    if node_autostart is not None:
+        update_list.append(("domain.meta.autostart", node_autostart))
+
+    if provisioner_profile is not None:
+        update_list.append(("domain.profile", provisioner_profile))
+
+    if migration_method is not None:
+        update_list.append(
+            ("domain.meta.migrate_method", str(migration_method).lower())
+        )
+
+    if migration_max_downtime is not None:
+        try:
+            migration_max_downtime = int(migration_max_downtime)
+        except (TypeError, ValueError):
+            return False, "ERROR: Migration max downtime must be an integer."
+        update_list.append(("domain.meta.migrate_max_downtime", migration_max_downtime))
+
+    if migration_profile is not None:
+        update_list.append(("domain.meta.migrate_profile", migration_profile))
+
+    if len(update_list) < 1:
+        return False, "ERROR: No updates to apply."
+
+    retflag, retdata = get_bulk_vm_list(
+        zkhandler, vms=vms, tag=tag, node=node, state=state
+    )
+    if not retflag:
+        return False, retdata
+    vm_list, missing_vms = retdata
+
+    errors = dict()
+    messages = dict()
+
+    vm_updates = [
+        (vm["uuid"], [((key, vm["uuid"]), value) for key, value in update_list])
+        for vm in vm_list
+    ]
+    written = bulk_write(zkhandler, vm_updates)
+    for vm in vm_list:
+        if vm["uuid"] in written:
+            messages[vm["uuid"]] = (
+                'Successfully modified PVC metadata of VM "{}".'.format(vm["name"])
+            )
+        else:
+            errors[vm["uuid"]] = (
+                'ERROR: Failed to modify PVC metadata of VM "{}".'.format(vm["name"])
+            )
+
+    return bulk_results(vm_list, missing_vms, errors, messages)
+
+
 #
 # VM Backup Tasks
 #
@@ -1646,7 +2270,34 @@ def remove_backup(zkhandler, domain, backup_path, datestring):
     return True, "\n".join(retlines)
 
 
-def restore_vm(zkhandler, domain, backup_path, datestring, retain_snapshot=False):
+def rbd_import_command(pool, volume, diff=False):
+    """
+    Return the command to import an RBD export image, or an export diff if {diff} is set, from
+    standard input into {pool}/{volume}
+    """
+    if diff:
+        return ["rbd", "import-diff", "--no-progress", "-", f"{pool}/{volume}"]
+    else:
+        return [
+            "rbd",
+            "import",
+            "--no-progress",
+            "--export-format",
+            "2",
+            "-",
+            f"{pool}/{volume}",
+        ]
+
+
+def restore_vm(
+    zkhandler,
+    domain,
+    backup_path,
+    datestring,
+    retain_snapshot=False,
+    volume_concurrency=blockstream.DEFAULT_VOLUME_CONCURRENCY,
+    bandwidth_limit=None,
+):
     tstart = time.time()
 
     # 0. Validations
@@ -1728,11 +2379,16 @@ def restore_vm(zkhandler, domain, backup_path, datestring, retain_snapshot=False
         return False, f"ERROR: Failed to parse VM backup details: {e}"
 
     # 4. Import volumes
-    is_snapshot_remove_failed = False
-    which_snapshot_remove_failed = list()
-    if incremental_parent is not None:
-        for volume_file, volume_size in backup_source_details.get("backup_files"):
-            pool, volume, _ = volume_file.split("/")[-1].split(".")
+    #   rbd import does not expect an existing volume, but we need the information in PVC, so
+    #   first create each RBD volume using ceph.add_volume based on the backup size, and then
+    #   manually remove the RBD volume (leaving the PVC metainfo), before importing all volumes,
+    #   each as a chain of its full and any incremental image, concurrently
+    import_chains = list()
+    for volume_file, volume_size in backup_source_details.get("backup_files"):
+        pool, volume, _ = volume_file.split("/")[-1].split(".")
+
+        import_steps = list()
+        if incremental_parent is not None:
             try:
                 parent_volume_file = [
                     f[0]
@@ -1745,46 +2401,58 @@ def restore_vm(zkhandler, domain, backup_path, datestring, retain_snapshot=False
                     False,
                     f"ERROR: Failed to find parent volume for volume {pool}/{volume}; backup may be corrupt or invalid: {e}",
                 )
-
-            # First we create the expected volumes then clean them up
-            #   This process is a bit of a hack because rbd import does not expect an existing volume,
-            #   but we need the information in PVC.
-            #   Thus create the RBD volume using ceph.add_volume based on the backup size, and then
-            #   manually remove the RBD volume (leaving the PVC metainfo)
-            retcode, retmsg = ceph.add_volume(zkhandler, pool, volume, volume_size)
-            if not retcode:
-                return False, f"ERROR: Failed to create restored volume: {retmsg}"
-
-            retcode, stdout, stderr = common.run_os_command(
-                f"rbd remove {pool}/{volume}"
+            import_steps.append(
+                (
+                    f"import parent backup image {parent_volume_file}",
+                    rbd_import_command(pool, volume),
+                    f"{backup_path}/{domain}/{incremental_parent}/{parent_volume_file}",
+                )
             )
-            if retcode:
-                return (
-                    False,
-                    f"ERROR: Failed to remove temporary RBD volume '{pool}/{volume}': {stderr}",
+            import_steps.append(
+                (
+                    f"import incremental backup image {volume_file}",
+                    rbd_import_command(pool, volume, diff=True),
+                    f"{backup_path}/{domain}/{datestring}/{volume_file}",
                 )
-
-            # Next we import the parent images
-            retcode, stdout, stderr = common.run_os_command(
-                f"rbd import --export-format 2 --dest-pool {pool} {backup_path}/{domain}/{incremental_parent}/{parent_volume_file} {volume}"
             )
-            if retcode:
-                return (
-                    False,
-                    f"ERROR: Failed to import parent backup image {parent_volume_file}: {stderr}",
+        else:
+            import_steps.append(
+                (
+                    f"import backup image {volume_file}",
+                    rbd_import_command(pool, volume),
+                    f"{backup_path}/{domain}/{datestring}/{volume_file}",
                 )
+            )
 
-            # Then we import the incremental diffs
-            retcode, stdout, stderr = common.run_os_command(
-                f"rbd import-diff {backup_path}/{domain}/{datestring}/{volume_file} {pool}/{volume}"
+        retcode, retmsg = ceph.add_volume(zkhandler, pool, volume, volume_size)
+        if not retcode:
+            return False, f"ERROR: Failed to create restored volume: {retmsg}"
+
+        retcode, stdout, stderr = common.run_os_command(f"rbd remove {pool}/{volume}")
+        if retcode:
+            return (
+                False,
+                f"ERROR: Failed to remove temporary RBD volume '{pool}/{volume}': {stderr}",
             )
-            if retcode:
-                return (
-                    False,
-                    f"ERROR: Failed to import incremental backup image {volume_file}: {stderr}",
-                )
 
-            # Finally we remove the parent and child snapshots (no longer required required)
+        import_chains.append((f"{pool}/{volume}", import_steps))
+
+    if bandwidth_limit:
+        limiter = blockstream.RateLimiter(bandwidth_limit * 1024 * 1024)
+    else:
+        limiter = None
+    retcode, retmsg, _ = blockstream.import_volumes(
+        import_chains, volume_concurrency=volume_concurrency, limiter=limiter
+    )
+    if not retcode:
+        return False, f"ERROR: {retmsg}"
+
+    # Finally we remove the source snapshots (no longer required), or recreate the retained one
+    is_snapshot_remove_failed = False
+    which_snapshot_remove_failed = list()
+    for rbd, _ in import_chains:
+        pool, volume = rbd.split("/")
+        if incremental_parent is not None:
             if retain_snapshot:
                 retcode, retmsg = ceph.add_snapshot(
                     zkhandler,
@@ -1796,7 +2464,7 @@ def restore_vm(zkhandler, domain, backup_path, datestring, retain_snapshot=False
                 if not retcode:
                     return (
                         False,
-                        f"ERROR: Failed to add imported image snapshot for {parent_volume_file}: {retmsg}",
+                        f"ERROR: Failed to add imported image snapshot for {pool}/{volume}: {retmsg}",
                     )
             else:
                 retcode, stdout, stderr = common.run_os_command(
@@ -1811,62 +2479,28 @@ def restore_vm(zkhandler, domain, backup_path, datestring, retain_snapshot=False
             if retcode:
                 is_snapshot_remove_failed = True
                 which_snapshot_remove_failed.append(f"{pool}/{volume}")
-
-    else:
-        for volume_file, volume_size in backup_source_details.get("backup_files"):
-            pool, volume, _ = volume_file.split("/")[-1].split(".")
-
-            # First we create the expected volumes then clean them up
-            #   This process is a bit of a hack because rbd import does not expect an existing volume,
-            #   but we need the information in PVC.
-            #   Thus create the RBD volume using ceph.add_volume based on the backup size, and then
-            #   manually remove the RBD volume (leaving the PVC metainfo)
-            retcode, retmsg = ceph.add_volume(zkhandler, pool, volume, volume_size)
-            if not retcode:
-                return False, f"ERROR: Failed to create restored volume: {retmsg}"
-
-            retcode, stdout, stderr = common.run_os_command(
-                f"rbd remove {pool}/{volume}"
+        elif retain_snapshot:
+            retcode, retmsg = ceph.add_snapshot(
+                zkhandler,
+                pool,
+                volume,
+                f"backup_{datestring}",
+                zk_only=True,
             )
-            if retcode:
+            if not retcode:
                 return (
                     False,
-                    f"ERROR: Failed to remove temporary RBD volume '{pool}/{volume}': {stderr}",
+                    f"ERROR: Failed to add imported image snapshot for {pool}/{volume}: {retmsg}",
                 )
-
-            # Then we perform the actual import
+        else:
             retcode, stdout, stderr = common.run_os_command(
-                f"rbd import --export-format 2 --dest-pool {pool} {backup_path}/{domain}/{datestring}/{volume_file} {volume}"
+                f"rbd snap rm {pool}/{volume}@backup_{datestring}"
             )
             if retcode:
                 return (
                     False,
-                    f"ERROR: Failed to import backup image {volume_file}: {stderr}",
-                )
-
-            # Finally we remove the source snapshot (not required)
-            if retain_snapshot:
-                retcode, retmsg = ceph.add_snapshot(
-                    zkhandler,
-                    pool,
-                    volume,
-                    f"backup_{datestring}",
-                    zk_only=True,
-                )
-                if not retcode:
-                    return (
-                        False,
-                        f"ERROR: Failed to add imported image snapshot for {volume_file}: {retmsg}",
-                    )
-            else:
-                retcode, stdout, stderr = common.run_os_command(
-                    f"rbd snap rm {pool}/{volume}@backup_{datestring}"
+                    f"ERROR: Failed to remove imported image snapshot for {pool}/{volume}: {stderr}",
                 )
-                if retcode:
-                    return (
-                        False,
-                        f"ERROR: Failed to remove imported image snapshot for {volume_file}: {stderr}",
-                    )
 
     # 5. Start VM
     retcode, retmsg = start_vm(zkhandler, domain)
@@ -1917,6 +2551,81 @@ def vm_worker_helper_getdom(tuuid):
     return dom
 
 
+def vm_worker_helper_run_volumes(
+    celery, message, items, task, current_stage, total_stages, concurrency=8
+):
+    """
+    Run task(item) for each RBD volume or snapshot in items, up to {concurrency} at once, updating
+    the progress with "{message} {item}" as they complete; returns a dictionary of each item to its
+    (ret, msg) result
+    """
+    results = dict()
+    if not items:
+        return results
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(concurrency, len(items))),
+        thread_name_prefix="vm_volumes",
+    ) as executor:
+        pending = {executor.submit(task, item): item for item in items}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                try:
+                    results[item] = future.result()
+                except Exception as e:
+                    results[item] = (False, str(e))
+            # Progress updates pause for the Celery state to propagate, while the remaining
+            # volumes continue in the background; the last one is left to the caller's next stage
+            if pending:
+                update(
+                    celery,
+                    f"{message} {item} ({len(results)}/{len(items)})",
+                    current=current_stage + len(results),
+                    total=total_stages,
+                )
+
+    return results
+
+
+def vm_worker_helper_fsfreeze(zkhandler, dom_uuid):
+    """
+    Freeze the guest filesystems of VM {dom_uuid}, if it is running, through the QEMU guest agent
+    on its node; returns the Libvirt connection and domain to thaw it with, or None if the VM is
+    not running
+    """
+    if zkhandler.read(("domain.state", dom_uuid)) != "start":
+        return None
+
+    node = zkhandler.read(("domain.node", dom_uuid))
+    lv_conn = lvopen(f"qemu+tcp://{node}/system")
+    if lv_conn is None:
+        raise Exception(f"Failed to open libvirt connection to node {node}")
+    try:
+        dom = lv_conn.lookupByUUID(UUID(dom_uuid).bytes)
+        dom.fsFreeze()
+    except Exception:
+        lv_conn.close()
+        raise
+
+    return lv_conn, dom
+
+
+def vm_worker_helper_fsthaw(frozen):
+    """
+    Thaw the guest filesystems frozen by vm_worker_helper_fsfreeze
+    """
+    if frozen is None:
+        return
+
+    lv_conn, dom = frozen
+    try:
+        dom.fsThaw()
+    finally:
+        lv_conn.close()
+
+
 def vm_worker_flush_locks(zkhandler, celery, domain, force_unlock=False):
     current_stage = 0
     total_stages = 3
@@ -2111,6 +2820,8 @@ def vm_worker_create_snapshot(
     snapshot_name=None,
     zk_only=False,
     return_status=False,
+    fsfreeze=False,
+    concurrency=8,
 ):
     if snapshot_name is None:
         now = datetime.now()
@@ -2162,41 +2873,108 @@ def vm_worker_create_snapshot(
 
     total_stages += 1 + len(rbd_list)
 
-    snap_list = list()
-
     # If a snapshot fails, clean up any snapshots that were successfuly created
-    def cleanup_failure():
-        for snapshot in snap_list:
-            rbd, snapshot_name = snapshot.split("@")
-            pool, volume = rbd.split("/")
-            # We capture no output here, because if this fails too we're in a deep
-            # error chain and will just ignore it
-            ceph.remove_snapshot(zkhandler, pool, volume, snapshot_name)
-
-    # Iterrate through and create a snapshot for each RBD volume
-    for rbd in rbd_list:
-        current_stage += 1
-        update(
-            celery,
-            f"Creating RBD snapshot of {rbd}",
-            current=current_stage,
-            total=total_stages,
+    def cleanup_failure(snap_list):
+        # We capture no output here, because if this fails too we're in a deep
+        # error chain and will just ignore it
+        vm_worker_helper_run_volumes(
+            None,
+            "Removed RBD snapshot",
+            snap_list,
+            remove_rbd_snapshot,
+            current_stage,
+            total_stages,
+            concurrency=concurrency,
         )
 
+    def create_rbd_snapshot(rbd):
         pool, volume = rbd.split("/")
-        ret, msg = ceph.add_snapshot(
+        return ceph.create_rbd_snapshot(pool, volume, snapshot_name)
+
+    def add_rbd_snapshot(rbd):
+        pool, volume = rbd.split("/")
+        return ceph.add_snapshot(
             zkhandler, pool, volume, snapshot_name, zk_only=zk_only
         )
-        if not ret:
-            cleanup_failure()
-            message = (msg.replace("ERROR: ", ""),)
+
+    def add_created_rbd_snapshot(rbd):
+        pool, volume = rbd.split("/")
+        return ceph.add_snapshot(zkhandler, pool, volume, snapshot_name, zk_only=True)
+
+    def remove_rbd_snapshot(snap):
+        rbd, name = snap.split("@")
+        pool, volume = rbd.split("/")
+        return ceph.remove_snapshot(zkhandler, pool, volume, name)
+
+    # Create a snapshot of each RBD volume concurrently
+    current_stage += 1
+    update(
+        celery,
+        f"Creating RBD snapshots of {len(rbd_list)} volumes",
+        current=current_stage,
+        total=total_stages,
+    )
+
+    # Freeze the guest filesystems, if requested, so that the snapshots of all volumes are
+    # consistent with each other and with the filesystems within them
+    frozen = None
+    if fsfreeze and not zk_only:
+        try:
+            frozen = vm_worker_helper_fsfreeze(zkhandler, dom_uuid)
+        except Exception as e:
+            message = f"Failed to freeze the filesystems of VM '{domain}'; is the QEMU guest agent running? {e}"
             fail(celery, message)
             if return_status:
                 return False, message
             else:
                 return False
+
+    # While the guest is frozen, only the RBD snapshots themselves are created, without progress
+    # updates; it is thawed before their stats and Zookeeper entries are added
+    results = dict()
+    thaw_error = None
+    if frozen is not None:
+        try:
+            results = vm_worker_helper_run_volumes(
+                None,
+                "Created RBD snapshot of",
+                rbd_list,
+                create_rbd_snapshot,
+                current_stage,
+                total_stages,
+                concurrency=concurrency,
+            )
+        finally:
+            try:
+                vm_worker_helper_fsthaw(frozen)
+            except Exception as e:
+                thaw_error = e
+
+    results.update(
+        vm_worker_helper_run_volumes(
+            celery,
+            "Created RBD snapshot of",
+            [rbd for rbd in rbd_list if results.get(rbd, (True,))[0]],
+            add_rbd_snapshot if frozen is None else add_created_rbd_snapshot,
+            current_stage,
+            total_stages,
+            concurrency=concurrency,
+        )
+    )
+    current_stage += len(rbd_list) - 1
+
+    snap_list = [f"{rbd}@{snapshot_name}" for rbd in rbd_list if results[rbd][0]]
+    failed = [results[rbd][1] for rbd in rbd_list if not results[rbd][0]]
+    if thaw_error is not None:
+        failed.append(f"Failed to thaw the filesystems of VM '{domain}': {thaw_error}")
+    if failed:
+        cleanup_failure(snap_list)
+        message = failed[0].replace("ERROR: ", "")
+        fail(celery, message)
+        if return_status:
+            return False, message
         else:
-            snap_list.append(f"{pool}/{volume}@{snapshot_name}")
+            return False
 
     current_stage += 1
     update(
@@ -2277,6 +3055,7 @@ def vm_worker_remove_snapshot(
     celery,
     domain,
     snapshot_name,
+    concurrency=8,
 ):
     current_stage = 0
     total_stages = 1
@@ -2312,24 +3091,37 @@ def vm_worker_remove_snapshot(
 
     total_stages += 1 + len(rbd_snapshots)
 
-    for snap in rbd_snapshots:
-        current_stage += 1
-        update(
-            celery,
-            f"Removing RBD snapshot {snap}",
-            current=current_stage,
-            total=total_stages,
-        )
-
+    def remove_rbd_snapshot(snap):
         rbd, name = snap.split("@")
         pool, volume = rbd.split("/")
-        ret, msg = ceph.remove_snapshot(zkhandler, pool, volume, name)
-        if not ret:
-            fail(
-                celery,
-                msg.replace("ERROR: ", ""),
-            )
-            return False
+        return ceph.remove_snapshot(zkhandler, pool, volume, name)
+
+    # Remove the snapshot of each RBD volume concurrently
+    current_stage += 1
+    update(
+        celery,
+        f"Removing RBD snapshots of {len(rbd_snapshots)} volumes",
+        current=current_stage,
+        total=total_stages,
+    )
+    results = vm_worker_helper_run_volumes(
+        celery,
+        "Removed RBD snapshot",
+        rbd_snapshots,
+        remove_rbd_snapshot,
+        current_stage,
+        total_stages,
+        concurrency=concurrency,
+    )
+    current_stage += len(rbd_snapshots) - 1
+
+    failed = [results[snap][1] for snap in rbd_snapshots if not results[snap][0]]
+    if failed:
+        fail(
+            celery,
+            failed[0].replace("ERROR: ", ""),
+        )
+        return False
 
     current_stage += 1
     update(
@@ -2358,7 +3150,9 @@ def vm_worker_remove_snapshot(
     )
 
 
-def vm_worker_rollback_snapshot(zkhandler, celery, domain, snapshot_name):
+def vm_worker_rollback_snapshot(
+    zkhandler, celery, domain, snapshot_name, concurrency=8
+):
     current_stage = 0
     total_stages = 1
     start(
@@ -2394,6 +3188,7 @@ def vm_worker_rollback_snapshot(zkhandler, celery, domain, snapshot_name):
             celery,
             f"Could not find snapshot '{snapshot_name}' of VM '{domain}'",
         )
+        return False
 
     _snapshots = zkhandler.read(
         ("domain.snapshots", dom_uuid, "domain_snapshot.rbd_snapshots", snapshot_name)
@@ -2402,24 +3197,37 @@ def vm_worker_rollback_snapshot(zkhandler, celery, domain, snapshot_name):
 
     total_stages += 1 + len(rbd_snapshots)
 
-    for snap in rbd_snapshots:
-        current_stage += 1
-        update(
-            celery,
-            f"Rolling back RBD snapshot {snap}",
-            current=current_stage,
-            total=total_stages,
-        )
-
+    def rollback_rbd_snapshot(snap):
         rbd, name = snap.split("@")
         pool, volume = rbd.split("/")
-        ret, msg = ceph.rollback_snapshot(zkhandler, pool, volume, name)
-        if not ret:
-            fail(
-                celery,
-                msg.replace("ERROR: ", ""),
-            )
-            return False
+        return ceph.rollback_snapshot(zkhandler, pool, volume, name)
+
+    # Roll back each RBD volume concurrently
+    current_stage += 1
+    update(
+        celery,
+        f"Rolling back RBD snapshots of {len(rbd_snapshots)} volumes",
+        current=current_stage,
+        total=total_stages,
+    )
+    results = vm_worker_helper_run_volumes(
+        celery,
+        "Rolled back RBD snapshot",
+        rbd_snapshots,
+        rollback_rbd_snapshot,
+        current_stage,
+        total_stages,
+        concurrency=concurrency,
+    )
+    current_stage += len(rbd_snapshots) - 1
+
+    failed = [results[snap][1] for snap in rbd_snapshots if not results[snap][0]]
+    if failed:
+        fail(
+            celery,
+            failed[0].replace("ERROR: ", ""),
+        )
+        return False
 
     current_stage += 1
     update(
@@ -2463,6 +3271,7 @@ def vm_worker_export_snapshot(
     snapshot_name,
     export_path,
     incremental_parent=None,
+    export_format="rbd",
 ):
     current_stage = 0
     total_stages = 1
@@ -2473,6 +3282,13 @@ def vm_worker_export_snapshot(
         total=total_stages,
     )
 
+    if export_format not in ["rbd", backuprepo.EXPORT_FORMAT]:
+        fail(
+            celery,
+            f"Export format '{export_format}' is not valid",
+        )
+        return False
+
     # Validate that the target path is valid
     if not re.match(r"^/", export_path):
         fail(
@@ -2602,8 +3418,10 @@ def vm_worker_export_snapshot(
     else:
         export_fileext = "rbdimg"
 
-    # Dump snapshot to folder with `rbd export` (full) or `rbd export-diff` (incremental)
+    # Dump snapshot to folder with `rbd export` (full) or `rbd export-diff` (incremental),
+    # or store it in the chunk repository at the export path
     export_files = list()
+    export_stored_size = 0
     for snapshot_volume in snapshot_volumes:
         pool = snapshot_volume["pool"]
         volume = snapshot_volume["volume"]
@@ -2619,7 +3437,30 @@ def vm_worker_export_snapshot(
             total=total_stages,
         )
 
-        if incremental_parent is not None:
+        if export_format == backuprepo.EXPORT_FORMAT:
+            if incremental_parent is not None:
+                base_manifest_path = f"{export_path}/{domain}/{incremental_parent}/images/{pool}.{volume}.manifest"
+            else:
+                base_manifest_path = None
+            try:
+                export_stored_size += backuprepo.export_snapshot_volume(
+                    export_path,
+                    f"{export_target_path}/{pool}.{volume}.manifest",
+                    pool,
+                    volume,
+                    snapshot_name,
+                    base_manifest_path=base_manifest_path,
+                    base_snapshot=incremental_parent,
+                )
+            except Exception as e:
+                export_cleanup()
+                fail(
+                    celery,
+                    f"Failed to export snapshot for volume(s) '{pool}/{volume}': {e}",
+                )
+                return False
+            export_files.append((f"images/{pool}.{volume}.manifest", size))
+        elif incremental_parent is not None:
             retcode, stdout, stderr = common.run_os_command(
                 f"rbd export-diff --from-snap {incremental_parent} {pool}/{volume}@{snapshot_name} {export_target_path}/{pool}.{volume}.{export_fileext}"
             )
@@ -2662,10 +3503,15 @@ def vm_worker_export_snapshot(
                     total += get_dir_size(entry.path)
         return total
 
-    export_files_size = get_dir_size(export_target_path)
+    if export_format == backuprepo.EXPORT_FORMAT:
+        # Only count the chunks this export added to the repository
+        export_files_size = export_stored_size
+    else:
+        export_files_size = get_dir_size(export_target_path)
 
     export_details = {
         "type": export_type,
+        "export_format": export_format,
         "snapshot_name": snapshot_name,
         "incremental_parent": incremental_parent,
         "vm_detail": vm_detail,
@@ -2690,7 +3536,14 @@ def vm_worker_export_snapshot(
 
 
 def vm_worker_import_snapshot(
-    zkhandler, celery, domain, snapshot_name, import_path, retain_snapshot=True
+    zkhandler,
+    celery,
+    domain,
+    snapshot_name,
+    import_path,
+    retain_snapshot=True,
+    volume_concurrency=blockstream.DEFAULT_VOLUME_CONCURRENCY,
+    bandwidth_limit=None,
 ):
     myhostname = gethostname().split(".")[0]
 
@@ -2789,31 +3642,39 @@ def vm_worker_import_snapshot(
         total_stages += 3
         total_stages += len(export_source_parent_details.get("export_files"))
 
+    # All volumes share one rate limit, and report their progress together
+    if bandwidth_limit:
+        limiter = blockstream.RateLimiter(bandwidth_limit * 1024 * 1024)
+    else:
+        limiter = None
+
+    def report_progress(progress_message):
+        update(
+            celery,
+            f"Importing RBD volumes: {progress_message}",
+            current=current_stage,
+            total=total_stages,
+        )
+
     # 4. Import volumes
-    if incremental_parent is not None:
+    if export_source_details.get("export_format") == backuprepo.EXPORT_FORMAT:
+        # Every manifest is complete, so the parent is only restored to recreate its snapshot
+        restore_parent = incremental_parent is not None and retain_snapshot
+
+        import_volumes = list()
         for volume_file, volume_size in export_source_details.get("export_files"):
-            volume_size = f"{volume_size}B"
             pool, volume, _ = volume_file.split("/")[-1].split(".")
-
-            try:
-                parent_volume_file = [
-                    f[0]
-                    for f in export_source_parent_details.get("export_files")
-                    if f[0].split("/")[-1].replace(".rbdimg", "")
-                    == volume_file.split("/")[-1].replace(".rbddiff", "")
-                ][0]
-            except Exception as e:
+            manifest_path = f"{vm_import_path}/{snapshot_name}/{volume_file}"
+            parent_manifest_path = (
+                f"{vm_import_path}/{incremental_parent}/images/{pool}.{volume}.manifest"
+            )
+            if restore_parent and not os.path.isfile(parent_manifest_path):
                 fail(
                     celery,
-                    f"Failed to find parent volume for volume {pool}/{volume}; export may be corrupt or invalid: {e}",
+                    f"Failed to find parent manifest for volume {pool}/{volume}; export may be corrupt or invalid",
                 )
                 return False
 
-            # First we create the expected volumes then clean them up
-            #   This process is a bit of a hack because rbd import does not expect an existing volume,
-            #   but we need the information in PVC.
-            #   Thus create the RBD volume using ceph.add_volume based on the export size, and then
-            #   manually remove the RBD volume (leaving the PVC metainfo)
             current_stage += 1
             update(
                 celery,
@@ -2822,61 +3683,125 @@ def vm_worker_import_snapshot(
                 total=total_stages,
             )
 
-            retcode, retmsg = ceph.add_volume(zkhandler, pool, volume, volume_size)
+            retcode, retmsg = ceph.add_volume(
+                zkhandler, pool, volume, f"{volume_size}B"
+            )
             if not retcode:
                 fail(celery, f"Failed to create imported volume: {retmsg}")
                 return False
 
-            retcode, stdout, stderr = common.run_os_command(
-                f"rbd remove {pool}/{volume}"
-            )
-            if retcode:
-                fail(
-                    celery,
-                    f"Failed to remove temporary RBD volume '{pool}/{volume}': {stderr}",
+            import_volumes.append(
+                (
+                    pool,
+                    volume,
+                    manifest_path,
+                    parent_manifest_path if restore_parent else None,
                 )
-                return False
-
-            current_stage += 1
-            update(
-                celery,
-                f"Importing RBD snapshot {pool}/{volume}@{incremental_parent}",
-                current=current_stage,
-                total=total_stages,
             )
 
-            # Next we import the parent image
-            retcode, stdout, stderr = common.run_os_command(
-                f"rbd import --export-format 2 --dest-pool {pool} {import_path}/{domain}/{incremental_parent}/{parent_volume_file} {volume}"
-            )
-            if retcode:
-                fail(
-                    celery,
-                    f"Failed to import parent export image {parent_volume_file}: {stderr}",
+        progress = blockstream.TransferProgress(limiter=limiter)
+
+        def import_volume(pool, volume, manifest_path, parent_manifest_path):
+            name = f"{pool}/{volume}"
+            manifest = backuprepo.read_manifest(manifest_path)
+            if parent_manifest_path is not None:
+                parent_manifest = backuprepo.read_manifest(parent_manifest_path)
+                parent_chunks = dict(parent_manifest["chunks"])
+                total_chunks = len(parent_chunks) + sum(
+                    1
+                    for offset, digest in manifest["chunks"]
+                    if parent_chunks.get(offset) != digest
                 )
-                return False
+            else:
+                parent_manifest = None
+                total_chunks = len(manifest["chunks"])
+            progress.begin(name, total_chunks * manifest["chunk_size"])
 
-        # Import VM config and metadata in import state, from the *source* details
+            cluster, ioctx, image = blockstream.open_image(pool, volume)
+            try:
+                if parent_manifest is not None:
+                    backuprepo.restore_volume(
+                        import_path,
+                        parent_manifest,
+                        image,
+                        progress=progress,
+                        name=name,
+                    )
+                    image.create_snap(incremental_parent)
+                backuprepo.restore_volume(
+                    import_path,
+                    manifest,
+                    image,
+                    base_manifest=parent_manifest,
+                    progress=progress,
+                    name=name,
+                )
+                if retain_snapshot:
+                    image.create_snap(snapshot_name)
+            finally:
+                progress.end(name)
+                blockstream.close_image(cluster, ioctx, image)
+
+        # Reassemble up to volume_concurrency volumes at once; each volume is also restored in
+        # parallel
+        current_stage += 1
+        update(
+            celery,
+            f"Importing RBD snapshots of {len(import_volumes)} volumes",
+            current=current_stage,
+            total=total_stages,
+        )
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(volume_concurrency, len(import_volumes))),
+            thread_name_prefix="import",
+        ) as executor:
+            futures = [
+                (pool, volume, executor.submit(import_volume, pool, volume, *paths))
+                for pool, volume, *paths in import_volumes
+            ]
+            pending = [future for _, _, future in futures]
+            while pending:
+                _, pending = wait(pending, timeout=blockstream.PROGRESS_INTERVAL)
+                if pending:
+                    report_progress(progress.format())
+            for pool, volume, future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    fail(
+                        celery,
+                        f"Failed to import volume {pool}/{volume} from manifest: {e}",
+                    )
+                    return False
+        current_stage += len(import_volumes) - 1
+
+        # Import VM config and metadata in import state, from the parent details if its
+        # snapshot is being recreated, and otherwise from the *current* details
         current_stage += 1
         update(
             celery,
-            f"Importing VM configuration snapshot {incremental_parent}",
+            "Importing VM configuration snapshot",
             current=current_stage,
             total=total_stages,
         )
 
+        if restore_parent:
+            define_details = export_source_parent_details["vm_detail"]
+        else:
+            define_details = export_source_details["vm_detail"]
+
         try:
             retcode, retmsg = define_vm(
                 zkhandler,
-                export_source_parent_details["vm_detail"]["xml"],
-                export_source_parent_details["vm_detail"]["node"],
-                export_source_parent_details["vm_detail"]["node_limit"],
-                export_source_parent_details["vm_detail"]["node_selector"],
-                export_source_parent_details["vm_detail"]["node_autostart"],
-                export_source_parent_details["vm_detail"]["migration_method"],
-                export_source_parent_details["vm_detail"]["migration_max_downtime"],
-                export_source_parent_details["vm_detail"]["profile"],
-                export_source_parent_details["vm_detail"]["tags"],
+                define_details["xml"],
+                define_details["node"],
+                define_details["node_limit"],
+                define_details["node_selector"],
+                define_details["node_autostart"],
+                define_details["migration_method"],
+                define_details["migration_max_downtime"],
+                define_details["profile"],
+                define_details["tags"],
                 "import",
             )
             if not retcode:
@@ -2892,17 +3817,7 @@ def vm_worker_import_snapshot(
             )
             return False
 
-        # Handle the VM snapshots
-        if retain_snapshot:
-            current_stage += 1
-            update(
-                celery,
-                "Recreating incremental parent snapshot",
-                current=current_stage,
-                total=total_stages,
-            )
-
-            # Create the parent snapshot
+        if restore_parent:
             retcode = vm_worker_create_snapshot(
                 zkhandler, None, domain, snapshot_name=incremental_parent, zk_only=True
             )
@@ -2913,103 +3828,52 @@ def vm_worker_import_snapshot(
                 )
                 return False
 
-        for volume_file, volume_size in export_source_details.get("export_files"):
-            current_stage += 1
-            update(
-                celery,
-                f"Importing RBD snapshot {pool}/{volume}@{snapshot_name}",
-                current=current_stage,
-                total=total_stages,
-            )
-
-            volume_size = f"{volume_size}B"
-            pool, volume, _ = volume_file.split("/")[-1].split(".")
-            # Then we import the incremental diffs
-            retcode, stdout, stderr = common.run_os_command(
-                f"rbd import-diff {import_path}/{domain}/{snapshot_name}/{volume_file} {pool}/{volume}"
-            )
-            if retcode:
-                fail(
-                    celery,
-                    f"Failed to import incremental export image {volume_file}: {stderr}",
-                )
-                return False
-
-            if not retain_snapshot:
-                retcode, stdout, stderr = common.run_os_command(
-                    f"rbd snap rm {pool}/{volume}@{incremental_parent}"
+            try:
+                retcode, retmsg = modify_vm(
+                    zkhandler,
+                    domain,
+                    False,
+                    export_source_details["vm_detail"]["xml"],
                 )
-                if retcode:
+                if not retcode:
                     fail(
                         celery,
-                        f"Failed to remove imported image snapshot '{pool}/{volume}@{incremental_parent}': {stderr}",
+                        f"Failed to modify imported VM: {retmsg}",
                     )
                     return False
 
-                retcode, stdout, stderr = common.run_os_command(
-                    f"rbd snap rm {pool}/{volume}@{snapshot_name}"
+                # We don't care if this fails, because it just means the vm was never moved
+                move_vm(
+                    zkhandler,
+                    domain,
+                    export_source_details["vm_detail"]["node"],
                 )
-                if retcode:
+
+                retcode, retmsg = modify_vm_metadata(
+                    zkhandler,
+                    domain,
+                    export_source_details["vm_detail"]["node_limit"],
+                    export_source_details["vm_detail"]["node_selector"],
+                    export_source_details["vm_detail"]["node_autostart"],
+                    export_source_details["vm_detail"]["profile"],
+                    export_source_details["vm_detail"]["migration_method"],
+                    export_source_details["vm_detail"]["migration_max_downtime"],
+                    migration_profile=export_source_details["vm_detail"].get(
+                        "migration_profile"
+                    ),
+                )
+                if not retcode:
                     fail(
                         celery,
-                        f"Failed to remove imported image snapshot '{pool}/{volume}@{snapshot_name}': {stderr}",
+                        f"Failed to modify imported VM: {retmsg}",
                     )
                     return False
-
-        # Now update VM config and metadata, from the *current* details
-        current_stage += 1
-        update(
-            celery,
-            f"Importing VM configuration snapshot {snapshot_name}",
-            current=current_stage,
-            total=total_stages,
-        )
-
-        try:
-            retcode, retmsg = modify_vm(
-                zkhandler,
-                domain,
-                False,
-                export_source_details["vm_detail"]["xml"],
-            )
-            if not retcode:
-                fail(
-                    celery,
-                    f"Failed to modify imported VM: {retmsg}",
-                )
-                return False
-
-            retcode, retmsg = move_vm(
-                zkhandler,
-                domain,
-                export_source_details["vm_detail"]["node"],
-            )
-            if not retcode:
-                # We don't actually care if this fails, because it just means the vm was never moved
-                pass
-
-            retcode, retmsg = modify_vm_metadata(
-                zkhandler,
-                domain,
-                export_source_details["vm_detail"]["node_limit"],
-                export_source_details["vm_detail"]["node_selector"],
-                export_source_details["vm_detail"]["node_autostart"],
-                export_source_details["vm_detail"]["profile"],
-                export_source_details["vm_detail"]["migration_method"],
-                export_source_details["vm_detail"]["migration_max_downtime"],
-            )
-            if not retcode:
+            except Exception as e:
                 fail(
                     celery,
-                    f"Failed to modify imported VM: {retmsg}",
+                    f"Failed to parse VM export details: {e}",
                 )
                 return False
-        except Exception as e:
-            fail(
-                celery,
-                f"Failed to parse VM export details: {e}",
-            )
-            return False
 
         if retain_snapshot:
             current_stage += 1
@@ -3020,7 +3884,6 @@ def vm_worker_import_snapshot(
                 total=total_stages,
             )
 
-            # Create the child snapshot
             retcode = vm_worker_create_snapshot(
                 zkhandler, None, domain, snapshot_name=snapshot_name, zk_only=True
             )
@@ -3031,15 +3894,54 @@ def vm_worker_import_snapshot(
                 )
                 return False
     else:
+        # First we create the expected volumes then clean them up
+        #   This process is a bit of a hack because rbd import does not expect an existing volume,
+        #   but we need the information in PVC.
+        #   Thus create the RBD volume using ceph.add_volume based on the export size, and then
+        #   manually remove the RBD volume (leaving the PVC metainfo)
+        import_chains = list()
         for volume_file, volume_size in export_source_details.get("export_files"):
             volume_size = f"{volume_size}B"
             pool, volume, _ = volume_file.split("/")[-1].split(".")
 
-            # First we create the expected volumes then clean them up
-            #   This process is a bit of a hack because rbd import does not expect an existing volume,
-            #   but we need the information in PVC.
-            #   Thus create the RBD volume using ceph.add_volume based on the export size, and then
-            #   manually remove the RBD volume (leaving the PVC metainfo)
+            import_steps = list()
+            if incremental_parent is not None:
+                try:
+                    parent_volume_file = [
+                        f[0]
+                        for f in export_source_parent_details.get("export_files")
+                        if f[0].split("/")[-1].replace(".rbdimg", "")
+                        == volume_file.split("/")[-1].replace(".rbddiff", "")
+                    ][0]
+                except Exception as e:
+                    fail(
+                        celery,
+                        f"Failed to find parent volume for volume {pool}/{volume}; export may be corrupt or invalid: {e}",
+                    )
+                    return False
+                import_steps.append(
+                    (
+                        f"import parent export image {parent_volume_file}",
+                        rbd_import_command(pool, volume),
+                        f"{import_path}/{domain}/{incremental_parent}/{parent_volume_file}",
+                    )
+                )
+                import_steps.append(
+                    (
+                        f"import incremental export image {volume_file}",
+                        rbd_import_command(pool, volume, diff=True),
+                        f"{import_path}/{domain}/{snapshot_name}/{volume_file}",
+                    )
+                )
+            else:
+                import_steps.append(
+                    (
+                        f"import export image {volume_file}",
+                        rbd_import_command(pool, volume),
+                        f"{import_path}/{domain}/{snapshot_name}/{volume_file}",
+                    )
+                )
+
             current_stage += 1
             update(
                 celery,
@@ -3050,10 +3952,7 @@ def vm_worker_import_snapshot(
 
             retcode, retmsg = ceph.add_volume(zkhandler, pool, volume, volume_size)
             if not retcode:
-                fail(
-                    celery,
-                    f"Failed to create imported volume: {retmsg}",
-                )
+                fail(celery, f"Failed to create imported volume: {retmsg}")
                 return False
 
             retcode, stdout, stderr = common.run_os_command(
@@ -3066,40 +3965,40 @@ def vm_worker_import_snapshot(
                 )
                 return False
 
-            # Then we perform the actual import
-            current_stage += 1
-            update(
-                celery,
-                f"Importing RBD snapshot {pool}/{volume}@{snapshot_name}",
-                current=current_stage,
-                total=total_stages,
-            )
+            import_chains.append((f"{pool}/{volume}", import_steps))
 
-            retcode, stdout, stderr = common.run_os_command(
-                f"rbd import --export-format 2 --dest-pool {pool} {import_path}/{domain}/{snapshot_name}/{volume_file} {volume}"
-            )
-            if retcode:
-                fail(
-                    celery,
-                    f"Failed to import export image {volume_file}: {stderr}",
-                )
+        # Then we import the images of up to volume_concurrency volumes at once, each volume
+        # continuing with its incremental diff as soon as its parent image is imported
+        current_stage += 1
+        update(
+            celery,
+            f"Importing RBD snapshots of {len(import_chains)} volumes",
+            current=current_stage,
+            total=total_stages,
+        )
+        retcode, retmsg, _ = blockstream.import_volumes(
+            import_chains,
+            volume_concurrency=volume_concurrency,
+            report=report_progress,
+            limiter=limiter,
+        )
+        if not retcode:
+            fail(celery, retmsg)
+            return False
+        current_stage += sum(len(steps) for _, steps in import_chains) - 1
 
-            if not retain_snapshot:
-                retcode, stdout, stderr = common.run_os_command(
-                    f"rbd snap rm {pool}/{volume}@{snapshot_name}"
-                )
-                if retcode:
-                    fail(
-                        celery,
-                        f"Failed to remove imported image snapshot '{pool}/{volume}@{snapshot_name}': {stderr}",
-                    )
-                    return False
+        # Import VM config and metadata in import state, from the *source* details
+        if incremental_parent is not None:
+            define_details = export_source_parent_details["vm_detail"]
+            define_snapshot_name = incremental_parent
+        else:
+            define_details = export_source_details["vm_detail"]
+            define_snapshot_name = snapshot_name
 
-        # Import VM config and metadata in provision state
         current_stage += 1
         update(
             celery,
-            f"Importing VM configuration snapshot {snapshot_name}",
+            f"Importing VM configuration snapshot {define_snapshot_name}",
             current=current_stage,
             total=total_stages,
         )
@@ -3107,16 +4006,17 @@ def vm_worker_import_snapshot(
         try:
             retcode, retmsg = define_vm(
                 zkhandler,
-                export_source_details["vm_detail"]["xml"],
-                export_source_details["vm_detail"]["node"],
-                export_source_details["vm_detail"]["node_limit"],
-                export_source_details["vm_detail"]["node_selector"],
-                export_source_details["vm_detail"]["node_autostart"],
-                export_source_details["vm_detail"]["migration_method"],
-                export_source_details["vm_detail"]["migration_max_downtime"],
-                export_source_details["vm_detail"]["profile"],
-                export_source_details["vm_detail"]["tags"],
+                define_details["xml"],
+                define_details["node"],
+                define_details["node_limit"],
+                define_details["node_selector"],
+                define_details["node_autostart"],
+                define_details["migration_method"],
+                define_details["migration_max_downtime"],
+                define_details["profile"],
+                define_details["tags"],
                 "import",
+                migration_profile=define_details.get("migration_profile"),
             )
             if not retcode:
                 fail(
@@ -3131,7 +4031,109 @@ def vm_worker_import_snapshot(
             )
             return False
 
-        # Finally we handle the VM snapshot
+        # Handle the VM snapshots
+        if incremental_parent is not None and retain_snapshot:
+            current_stage += 1
+            update(
+                celery,
+                "Recreating incremental parent snapshot",
+                current=current_stage,
+                total=total_stages,
+            )
+
+            # Create the parent snapshot
+            retcode = vm_worker_create_snapshot(
+                zkhandler, None, domain, snapshot_name=incremental_parent, zk_only=True
+            )
+            if retcode is False:
+                fail(
+                    celery,
+                    f"Failed to create imported snapshot for {incremental_parent} (parent)",
+                )
+                return False
+
+        if not retain_snapshot:
+            for rbd, _ in import_chains:
+                if incremental_parent is not None:
+                    retcode, stdout, stderr = common.run_os_command(
+                        f"rbd snap rm {rbd}@{incremental_parent}"
+                    )
+                    if retcode:
+                        fail(
+                            celery,
+                            f"Failed to remove imported image snapshot '{rbd}@{incremental_parent}': {stderr}",
+                        )
+                        return False
+
+                retcode, stdout, stderr = common.run_os_command(
+                    f"rbd snap rm {rbd}@{snapshot_name}"
+                )
+                if retcode:
+                    fail(
+                        celery,
+                        f"Failed to remove imported image snapshot '{rbd}@{snapshot_name}': {stderr}",
+                    )
+                    return False
+
+        # Now update VM config and metadata, from the *current* details
+        if incremental_parent is not None:
+            current_stage += 1
+            update(
+                celery,
+                f"Importing VM configuration snapshot {snapshot_name}",
+                current=current_stage,
+                total=total_stages,
+            )
+
+            try:
+                retcode, retmsg = modify_vm(
+                    zkhandler,
+                    domain,
+                    False,
+                    export_source_details["vm_detail"]["xml"],
+                )
+                if not retcode:
+                    fail(
+                        celery,
+                        f"Failed to modify imported VM: {retmsg}",
+                    )
+                    return False
+
+                retcode, retmsg = move_vm(
+                    zkhandler,
+                    domain,
+                    export_source_details["vm_detail"]["node"],
+                )
+                if not retcode:
+                    # We don't actually care if this fails, because it just means the vm was never moved
+                    pass
+
+                retcode, retmsg = modify_vm_metadata(
+                    zkhandler,
+                    domain,
+                    export_source_details["vm_detail"]["node_limit"],
+                    export_source_details["vm_detail"]["node_selector"],
+                    export_source_details["vm_detail"]["node_autostart"],
+                    export_source_details["vm_detail"]["profile"],
+                    export_source_details["vm_detail"]["migration_method"],
+                    export_source_details["vm_detail"]["migration_max_downtime"],
+                    migration_profile=export_source_details["vm_detail"].get(
+                        "migration_profile"
+                    ),
+                )
+                if not retcode:
+                    fail(
+                        celery,
+                        f"Failed to modify imported VM: {retmsg}",
+                    )
+                    return False
+            except Exception as e:
+                fail(
+                    celery,
+                    f"Failed to parse VM export details: {e}",
+                )
+                return False
+
         if retain_snapshot:
             current_stage += 1
             update(
@@ -3141,6 +4143,7 @@ def vm_worker_import_snapshot(
                 total=total_stages,
             )
 
+            # Create the child snapshot
             retcode = vm_worker_create_snapshot(
                 zkhandler, None, domain, snapshot_name=snapshot_name, zk_only=True
             )
@@ -3179,7 +4182,12 @@ def vm_worker_send_snapshot(
     destination_api_verify_ssl=True,
     incremental_parent=None,
     destination_storage_pool=None,
+    compression=blockstream.DEFAULT_COMPRESSION,
+    volume_concurrency=blockstream.DEFAULT_VOLUME_CONCURRENCY,
+    stream_concurrency=blockstream.DEFAULT_STREAM_CONCURRENCY,
     return_status=False,
+    session=None,
+    limiter=None,
 ):
 
     current_stage = 0
@@ -3245,10 +4253,12 @@ def vm_worker_send_snapshot(
         "X-Api-Key": destination_api_key,
     }
 
-    session = requests.Session()
-    session.headers.update(destination_api_headers)
-    session.verify = destination_api_verify_ssl
-    session.timeout = destination_api_timeout
+    # A pooled session may be shared by concurrent sends to the same destination
+    if session is None:
+        session = requests.Session()
+        session.headers.update(destination_api_headers)
+        session.verify = destination_api_verify_ssl
+        session.timeout = destination_api_timeout
 
     try:
         # Hit the API root; this should return "PVC API version x"
@@ -3422,7 +4432,7 @@ def vm_worker_send_snapshot(
                 return False
 
     # Begin send, set stages
-    total_stages += 1 + (3 * len(snapshot_rbdsnaps))
+    total_stages += 2 + (2 * len(snapshot_rbdsnaps))
 
     current_stage += 1
     update(
@@ -3470,9 +4480,8 @@ def vm_worker_send_snapshot(
         else:
             return False
 
-    # Create the block devices on the remote side if this is a new VM send
-    block_t_start = time.time()
-    block_total_mb = 0
+    # Check the block devices on the remote side, resizing existing ones if required
+    send_volumes = list()
 
     for rbd_detail in [r for r in vm_detail["disks"] if r["type"] == "rbd"]:
         rbd_name = rbd_detail["name"]
@@ -3506,9 +4515,17 @@ def vm_worker_send_snapshot(
             local_volume_size = ceph.format_bytes_fromhuman(retdata[0]["stats"]["size"])
         except Exception as e:
             error_message = f"Failed to get volume size for {rbd_name}: {e}"
+            message = (error_message,)
+            fail(celery, message)
+            if return_status:
+                return False, message
+            else:
+                return False
 
         if destination_storage_pool is not None:
-            pool = destination_storage_pool
+            destination_pool = destination_storage_pool
+        else:
+            destination_pool = pool
 
         current_stage += 1
         update(
@@ -3520,12 +4537,14 @@ def vm_worker_send_snapshot(
 
         # Check if the volume exists on the target
         response = session.get(
-            f"{destination_api_uri}/storage/ceph/volume/{pool}/{volume}",
+            f"{destination_api_uri}/storage/ceph/volume/{destination_pool}/{volume}",
             params=None,
             data=None,
         )
         if response.status_code != 404 and current_destination_vm_state is None:
-            message = (f"Remote storage pool {pool} already contains volume {volume}",)
+            message = (
+                f"Remote storage pool {destination_pool} already contains volume {volume}",
+            )
             fail(celery, message)
             if return_status:
                 return False, message
@@ -3539,15 +4558,16 @@ def vm_worker_send_snapshot(
                 )
             except Exception as e:
                 error_message = f"Failed to get volume size for remote {rbd_name}: {e}"
-                fail(celery, error_message)
+                message = (error_message,)
+                fail(celery, message)
                 if return_status:
-                    return False, error_message
+                    return False, message
                 else:
                     return False
 
             if local_volume_size != remote_volume_size:
                 response = session.put(
-                    f"{destination_api_uri}/storage/ceph/volume/{pool}/{volume}",
+                    f"{destination_api_uri}/storage/ceph/volume/{destination_pool}/{volume}",
                     params={"new_size": local_volume_size, "force": True},
                 )
                 if response.status_code != 200:
@@ -3558,220 +4578,64 @@ def vm_worker_send_snapshot(
                     else:
                         return False
 
-        # Send the volume to the remote
-        cluster = rados.Rados(conffile="/etc/ceph/ceph.conf")
-        cluster.connect()
-        ioctx = cluster.open_ioctx(pool)
-        image = RBDImage(ioctx, name=volume, snapshot=snapshot_name, read_only=True)
-        size = image.size()
-        chunk_size_mb = 1024
+        send_volumes.append((pool, volume, destination_pool))
 
-        if incremental_parent is not None:
-            # Diff between incremental_parent and snapshot
-            celery_message = (
-                f"Sending diff of {rbd_name}@{incremental_parent} → {snapshot_name}"
-            )
-        else:
-            # Full image transfer
-            celery_message = f"Sending full image of {rbd_name}@{snapshot_name}"
+    # Send the volumes to the remote
+    if incremental_parent is not None:
+        celery_message = f"Sending diffs of {len(send_volumes)} volume(s) {incremental_parent} → {snapshot_name}"
+    else:
+        celery_message = (
+            f"Sending full images of {len(send_volumes)} volume(s) @ {snapshot_name}"
+        )
 
-        current_stage += 1
+    current_stage += 1
+    update(
+        celery,
+        celery_message,
+        current=current_stage,
+        total=total_stages,
+    )
+
+    def report_progress(progress_message):
         update(
             celery,
-            celery_message,
+            f"{celery_message}: {progress_message}",
             current=current_stage,
             total=total_stages,
         )
 
-        if incremental_parent is not None:
-            # Createa single session to reuse connections
-            send_params = {
-                "pool": pool,
-                "volume": volume,
-                "snapshot": snapshot_name,
-                "source_snapshot": incremental_parent,
-            }
-
-            session.params.update(send_params)
-
-            # Send 32 objects (128MB) at once
-            send_max_objects = 32
-            batch_size_mb = 4 * send_max_objects
-            batch_size = batch_size_mb * 1024 * 1024
-
-            total_chunks = 0
-
-            def diff_cb_count(offset, length, exists):
-                nonlocal total_chunks
-                if exists:
-                    total_chunks += 1
-
-            current_chunk = 0
-            buffer = list()
-            buffer_size = 0
-            last_chunk_time = time.time()
-
-            def send_batch_multipart(buffer):
-                nonlocal last_chunk_time
-                files = {}
-                for i in range(len(buffer)):
-                    files[f"object_{i}"] = (
-                        f"object_{i}",
-                        buffer[i],
-                        "application/octet-stream",
-                    )
-
-                response = session.put(
-                    f"{destination_api_uri}/vm/{vm_name}/snapshot/receive/block",
-                    files=files,
-                    stream=True,
-                )
-                if response.status_code != 200:
-                    message = (
-                        f"Failed to send diff batch: {response.json()['message']}",
-                    )
-                    fail(celery, message)
-                    if return_status:
-                        return False, message
-                    else:
-                        return False
-
-                current_chunk_time = time.time()
-                chunk_time = current_chunk_time - last_chunk_time
-                last_chunk_time = current_chunk_time
-                chunk_speed = round(batch_size_mb / chunk_time, 1)
-                update(
-                    celery,
-                    celery_message + f" ({chunk_speed} MB/s)",
-                    current=current_stage,
-                    total=total_stages,
-                )
-
-            def add_block_to_multipart(buffer, offset, length, data):
-                part_data = (
-                    offset.to_bytes(8, "big") + length.to_bytes(8, "big") + data
-                )  # Add header and data
-                buffer.append(part_data)
-
-            def diff_cb_send(offset, length, exists):
-                nonlocal current_chunk, buffer, buffer_size
-                if exists:
-                    # Read the data for the current block
-                    data = image.read(offset, length)
-                    # Add the block to the multipart buffer
-                    add_block_to_multipart(buffer, offset, length, data)
-                    current_chunk += 1
-                    buffer_size += len(data)
-                    if buffer_size >= batch_size:
-                        send_batch_multipart(buffer)
-                        buffer.clear()  # Clear the buffer after sending
-                        buffer_size = 0  # Reset buffer size
-
-            try:
-                image.set_snap(snapshot_name)
-                image.diff_iterate(
-                    0, size, incremental_parent, diff_cb_count, whole_object=True
-                )
-                block_total_mb += total_chunks * 4
-                image.diff_iterate(
-                    0, size, incremental_parent, diff_cb_send, whole_object=True
-                )
-
-                if buffer:
-                    send_batch_multipart(buffer)
-                    buffer.clear()  # Clear the buffer after sending
-                    buffer_size = 0  # Reset buffer size
-            except Exception:
-                message = (f"Failed to send snapshot: {response.json()['message']}",)
-                fail(celery, message)
-                if return_status:
-                    return False, message
-                else:
-                    return False
-            finally:
-                image.close()
-                ioctx.close()
-                cluster.shutdown()
+    block_t_start = time.time()
+    result, message, progress = blockstream.send_volumes(
+        session,
+        destination_api_uri,
+        vm_name,
+        send_volumes,
+        snapshot_name,
+        incremental_parent=incremental_parent,
+        compression=compression,
+        volume_concurrency=volume_concurrency,
+        stream_concurrency=stream_concurrency,
+        report=report_progress,
+        limiter=limiter,
+    )
+    if not result:
+        message = (f"Failed to send snapshot: {message}",)
+        fail(celery, message)
+        if return_status:
+            return False, message
         else:
-
-            def full_chunker():
-                nonlocal block_total_mb
-                chunk_size = 1024 * 1024 * chunk_size_mb
-                current_chunk = 0
-                last_chunk_time = time.time()
-                while current_chunk < size:
-                    chunk = image.read(current_chunk, chunk_size)
-                    yield chunk
-                    current_chunk += chunk_size
-                    block_total_mb += len(chunk) / 1024 / 1024
-                    current_chunk_time = time.time()
-                    chunk_time = current_chunk_time - last_chunk_time
-                    last_chunk_time = current_chunk_time
-                    chunk_speed = round(chunk_size_mb / chunk_time, 1)
-                    update(
-                        celery,
-                        celery_message + f" ({chunk_speed} MB/s)",
-                        current=current_stage,
-                        total=total_stages,
-                    )
-
-            send_params = {
-                "pool": pool,
-                "volume": volume,
-                "snapshot": snapshot_name,
-                "size": size,
-                "source_snapshot": incremental_parent,
-            }
-
-            try:
-                response = session.post(
-                    f"{destination_api_uri}/vm/{vm_name}/snapshot/receive/block",
-                    headers={"Content-Type": "application/octet-stream"},
-                    params=send_params,
-                    data=full_chunker(),
-                )
-                if response.status_code != 200:
-                    message = (
-                        f"Failed to send snapshot: {response.json()['message']}",
-                    )
-                    fail(celery, message)
-                    if return_status:
-                        return False, message
-                    else:
-                        return False
-            finally:
-                image.close()
-                ioctx.close()
-                cluster.shutdown()
-
-        send_params = {
-            "pool": pool,
-            "volume": volume,
-            "snapshot": snapshot_name,
-        }
-        try:
-            response = session.patch(
-                f"{destination_api_uri}/vm/{vm_name}/snapshot/receive/block",
-                params=send_params,
-            )
-            if response.status_code != 200:
-                message = (f"Failed to send snapshot: {response.json()['message']}",)
-                fail(celery, message)
-                if return_status:
-                    return False, message
-                else:
-                    return False
-        finally:
-            image.close()
-            ioctx.close()
-            cluster.shutdown()
+            return False
 
     block_t_end = time.time()
+    block_total_mb, _, block_rates = progress.summary()
     block_mbps = round(block_total_mb / (block_t_end - block_t_start), 1)
+    block_details = ", ".join(
+        [f"{name} {rate} MB/s" for name, rate in block_rates.items()]
+    )
 
     current_stage += 1
     message = (
-        f"Successfully sent snapshot '{snapshot_name}' of VM '{domain}' to remote cluster '{destination_api_uri}' (average {block_mbps} MB/s)",
+        f"Successfully sent snapshot '{snapshot_name}' of VM '{domain}' to remote cluster '{destination_api_uri}' (average {block_mbps} MB/s; {block_details})",
     )
     if return_status:
         finish(
@@ -3798,6 +4662,9 @@ def vm_worker_create_mirror(
     destination_api_key,
     destination_api_verify_ssl,
     destination_storage_pool,
+    compression=blockstream.DEFAULT_COMPRESSION,
+    volume_concurrency=blockstream.DEFAULT_VOLUME_CONCURRENCY,
+    stream_concurrency=blockstream.DEFAULT_STREAM_CONCURRENCY,
 ):
     now = datetime.now()
     datestring = now.strftime("%Y%m%d%H%M%S")
@@ -3947,7 +4814,7 @@ def vm_worker_create_mirror(
     # Snapshot creation stages
     total_stages += 1 + len(rbd_list)
     # Snapshot sending stages
-    total_stages += 1 + (3 * len(rbd_list))
+    total_stages += 2 + (2 * len(rbd_list))
 
     #
     # 1. Create snapshot
@@ -4086,9 +4953,8 @@ def vm_worker_create_mirror(
         )
         return False
 
-    # Create the block devices on the remote side if this is a new VM send
-    block_t_start = time.time()
-    block_total_mb = 0
+    # Check the block devices on the remote side, resizing existing ones if required
+    send_volumes = list()
 
     for rbd_detail in [r for r in vm_detail["disks"] if r["type"] == "rbd"]:
         rbd_name = rbd_detail["name"]
@@ -4121,9 +4987,16 @@ def vm_worker_create_mirror(
             local_volume_size = ceph.format_bytes_fromhuman(retdata[0]["stats"]["size"])
         except Exception as e:
             error_message = f"Failed to get volume size for {rbd_name}: {e}"
+            fail(
+                celery,
+                error_message,
+            )
+            return False
 
         if destination_storage_pool is not None:
-            pool = destination_storage_pool
+            destination_pool = destination_storage_pool
+        else:
+            destination_pool = pool
 
         current_stage += 1
         update(
@@ -4135,14 +5008,14 @@ def vm_worker_create_mirror(
 
         # Check if the volume exists on the target
         response = session.get(
-            f"{destination_api_uri}/storage/ceph/volume/{pool}/{volume}",
+            f"{destination_api_uri}/storage/ceph/volume/{destination_pool}/{volume}",
             params=None,
             data=None,
         )
         if response.status_code != 404 and current_destination_vm_state is None:
             fail(
                 celery,
-                f"Remote storage pool {pool} already contains volume {volume}",
+                f"Remote storage pool {destination_pool} already contains volume {volume}",
             )
             return False
 
@@ -4153,12 +5026,15 @@ def vm_worker_create_mirror(
                 )
             except Exception as e:
                 error_message = f"Failed to get volume size for remote {rbd_name}: {e}"
-                fail(celery, error_message)
+                fail(
+                    celery,
+                    error_message,
+                )
                 return False
 
             if local_volume_size != remote_volume_size:
                 response = session.put(
-                    f"{destination_api_uri}/storage/ceph/volume/{pool}/{volume}",
+                    f"{destination_api_uri}/storage/ceph/volume/{destination_pool}/{volume}",
                     params={"new_size": local_volume_size, "force": True},
                 )
                 if response.status_code != 200:
@@ -4168,208 +5044,58 @@ def vm_worker_create_mirror(
                     )
                     return False
 
-        # Send the volume to the remote
-        cluster = rados.Rados(conffile="/etc/ceph/ceph.conf")
-        cluster.connect()
-        ioctx = cluster.open_ioctx(pool)
-        image = RBDImage(ioctx, name=volume, snapshot=snapshot_name, read_only=True)
-        size = image.size()
-        chunk_size_mb = 1024
+        send_volumes.append((pool, volume, destination_pool))
 
-        if incremental_parent is not None:
-            # Diff between incremental_parent and snapshot
-            celery_message = (
-                f"Sending diff of {rbd_name}@{incremental_parent} → {snapshot_name}"
-            )
-        else:
-            # Full image transfer
-            celery_message = f"Sending full image of {rbd_name}@{snapshot_name}"
+    # Send the volumes to the remote
+    if incremental_parent is not None:
+        celery_message = f"Sending diffs of {len(send_volumes)} volume(s) {incremental_parent} → {snapshot_name}"
+    else:
+        celery_message = (
+            f"Sending full images of {len(send_volumes)} volume(s) @ {snapshot_name}"
+        )
 
-        current_stage += 1
+    current_stage += 1
+    update(
+        celery,
+        celery_message,
+        current=current_stage,
+        total=total_stages,
+    )
+
+    def report_progress(progress_message):
         update(
             celery,
-            celery_message,
+            f"{celery_message}: {progress_message}",
             current=current_stage,
             total=total_stages,
         )
 
-        if incremental_parent is not None:
-            # Createa single session to reuse connections
-            send_params = {
-                "pool": pool,
-                "volume": volume,
-                "snapshot": snapshot_name,
-                "source_snapshot": incremental_parent,
-            }
-
-            session.params.update(send_params)
-
-            # Send 32 objects (128MB) at once
-            send_max_objects = 32
-            batch_size_mb = 4 * send_max_objects
-            batch_size = batch_size_mb * 1024 * 1024
-
-            total_chunks = 0
-
-            def diff_cb_count(offset, length, exists):
-                nonlocal total_chunks
-                if exists:
-                    total_chunks += 1
-
-            current_chunk = 0
-            buffer = list()
-            buffer_size = 0
-            last_chunk_time = time.time()
-
-            def send_batch_multipart(buffer):
-                nonlocal last_chunk_time
-                files = {}
-                for i in range(len(buffer)):
-                    files[f"object_{i}"] = (
-                        f"object_{i}",
-                        buffer[i],
-                        "application/octet-stream",
-                    )
-
-                response = session.put(
-                    f"{destination_api_uri}/vm/{vm_name}/snapshot/receive/block",
-                    files=files,
-                    stream=True,
-                )
-                if response.status_code != 200:
-                    fail(
-                        celery,
-                        f"Failed to send diff batch: {response.json()['message']}",
-                    )
-                    return False
-
-                current_chunk_time = time.time()
-                chunk_time = current_chunk_time - last_chunk_time
-                last_chunk_time = current_chunk_time
-                chunk_speed = round(batch_size_mb / chunk_time, 1)
-                update(
-                    celery,
-                    celery_message + f" ({chunk_speed} MB/s)",
-                    current=current_stage,
-                    total=total_stages,
-                )
-
-            def add_block_to_multipart(buffer, offset, length, data):
-                part_data = (
-                    offset.to_bytes(8, "big") + length.to_bytes(8, "big") + data
-                )  # Add header and data
-                buffer.append(part_data)
-
-            def diff_cb_send(offset, length, exists):
-                nonlocal current_chunk, buffer, buffer_size
-                if exists:
-                    # Read the data for the current block
-                    data = image.read(offset, length)
-                    # Add the block to the multipart buffer
-                    add_block_to_multipart(buffer, offset, length, data)
-                    current_chunk += 1
-                    buffer_size += len(data)
-                    if buffer_size >= batch_size:
-                        send_batch_multipart(buffer)
-                        buffer.clear()  # Clear the buffer after sending
-                        buffer_size = 0  # Reset buffer size
-
-            try:
-                image.set_snap(snapshot_name)
-                image.diff_iterate(
-                    0, size, incremental_parent, diff_cb_count, whole_object=True
-                )
-                block_total_mb += total_chunks * 4
-                image.diff_iterate(
-                    0, size, incremental_parent, diff_cb_send, whole_object=True
-                )
-
-                if buffer:
-                    send_batch_multipart(buffer)
-                    buffer.clear()  # Clear the buffer after sending
-                    buffer_size = 0  # Reset buffer size
-            except Exception:
-                fail(
-                    celery,
-                    f"Failed to create mirror: {response.json()['message']}",
-                )
-                return False
-            finally:
-                image.close()
-                ioctx.close()
-                cluster.shutdown()
-        else:
-
-            def full_chunker():
-                nonlocal block_total_mb
-                chunk_size = 1024 * 1024 * chunk_size_mb
-                current_chunk = 0
-                last_chunk_time = time.time()
-                while current_chunk < size:
-                    chunk = image.read(current_chunk, chunk_size)
-                    yield chunk
-                    current_chunk += chunk_size
-                    block_total_mb += len(chunk) / 1024 / 1024
-                    current_chunk_time = time.time()
-                    chunk_time = current_chunk_time - last_chunk_time
-                    last_chunk_time = current_chunk_time
-                    chunk_speed = round(chunk_size_mb / chunk_time, 1)
-                    update(
-                        celery,
-                        celery_message + f" ({chunk_speed} MB/s)",
-                        current=current_stage,
-                        total=total_stages,
-                    )
-
-            send_params = {
-                "pool": pool,
-                "volume": volume,
-                "snapshot": snapshot_name,
-                "size": size,
-                "source_snapshot": incremental_parent,
-            }
-
-            try:
-                response = session.post(
-                    f"{destination_api_uri}/vm/{vm_name}/snapshot/receive/block",
-                    headers={"Content-Type": "application/octet-stream"},
-                    params=send_params,
-                    data=full_chunker(),
-                )
-                if response.status_code != 200:
-                    fail(
-                        celery,
-                        f"Failed to create mirror: {response.json()['message']}",
-                    )
-                    return False
-            finally:
-                image.close()
-                ioctx.close()
-                cluster.shutdown()
-
-        send_params = {
-            "pool": pool,
-            "volume": volume,
-            "snapshot": snapshot_name,
-        }
-        try:
-            response = session.patch(
-                f"{destination_api_uri}/vm/{vm_name}/snapshot/receive/block",
-                params=send_params,
-            )
-            if response.status_code != 200:
-                fail(
-                    celery,
-                    f"Failed to create mirror: {response.json()['message']}",
-                )
-                return False
-        finally:
-            image.close()
-            ioctx.close()
-            cluster.shutdown()
+    block_t_start = time.time()
+    result, message, progress = blockstream.send_volumes(
+        session,
+        destination_api_uri,
+        vm_name,
+        send_volumes,
+        snapshot_name,
+        incremental_parent=incremental_parent,
+        compression=compression,
+        volume_concurrency=volume_concurrency,
+        stream_concurrency=stream_concurrency,
+        report=report_progress,
+    )
+    if not result:
+        fail(
+            celery,
+            f"Failed to create mirror: {message}",
+        )
+        return False
 
     block_t_end = time.time()
+    block_total_mb, _, block_rates = progress.summary()
     block_mbps = round(block_total_mb / (block_t_end - block_t_start), 1)
+    block_details = ", ".join(
+        [f"{name} {rate} MB/s" for name, rate in block_rates.items()]
+    )
 
     if incremental_parent is not None:
         verb = "updated"
@@ -4379,7 +5105,7 @@ def vm_worker_create_mirror(
     current_stage += 1
     return finish(
         celery,
-        f"Successfully {verb} mirror of VM '{domain}' (snapshot '{snapshot_name}') on remote cluster '{destination_api_uri}' (average {block_mbps} MB/s)",
+        f"Successfully {verb} mirror of VM '{domain}' (snapshot '{snapshot_name}') on remote cluster '{destination_api_uri}' (average {block_mbps} MB/s; {block_details})",
         current=current_stage,
         total=total_stages,
     )
@@ -4394,6 +5120,9 @@ def vm_worker_promote_mirror(
     destination_api_verify_ssl,
     destination_storage_pool,
     remove_on_source=False,
+    compression=blockstream.DEFAULT_COMPRESSION,
+    volume_concurrency=blockstream.DEFAULT_VOLUME_CONCURRENCY,
+    stream_concurrency=blockstream.DEFAULT_STREAM_CONCURRENCY,
 ):
     now = datetime.now()
     datestring = now.strftime("%Y%m%d%H%M%S")
@@ -4547,7 +5276,7 @@ def vm_worker_promote_mirror(
     # Snapshot creation stages
     total_stages += 1 + len(rbd_list)
     # Snapshot sending stages
-    total_stages += 1 + (3 * len(rbd_list))
+    total_stages += 2 + (2 * len(rbd_list))
     # Cleanup stages
     total_stages += 2
 
@@ -4709,9 +5438,8 @@ def vm_worker_promote_mirror(
         )
         return False
 
-    # Create the block devices on the remote side if this is a new VM send
-    block_t_start = time.time()
-    block_total_mb = 0
+    # Check the block devices on the remote side, resizing existing ones if required
+    send_volumes = list()
 
     for rbd_detail in [r for r in vm_detail["disks"] if r["type"] == "rbd"]:
         rbd_name = rbd_detail["name"]
@@ -4744,9 +5472,16 @@ def vm_worker_promote_mirror(
             local_volume_size = ceph.format_bytes_fromhuman(retdata[0]["stats"]["size"])
         except Exception as e:
             error_message = f"Failed to get volume size for {rbd_name}: {e}"
+            fail(
+                celery,
+                error_message,
+            )
+            return False
 
         if destination_storage_pool is not None:
-            pool = destination_storage_pool
+            destination_pool = destination_storage_pool
+        else:
+            destination_pool = pool
 
         current_stage += 1
         update(
@@ -4758,14 +5493,14 @@ def vm_worker_promote_mirror(
 
         # Check if the volume exists on the target
         response = session.get(
-            f"{destination_api_uri}/storage/ceph/volume/{pool}/{volume}",
+            f"{destination_api_uri}/storage/ceph/volume/{destination_pool}/{volume}",
             params=None,
             data=None,
         )
         if response.status_code != 404 and current_destination_vm_state is None:
             fail(
                 celery,
-                f"Remote storage pool {pool} already contains volume {volume}",
+                f"Remote storage pool {destination_pool} already contains volume {volume}",
             )
             return False
 
@@ -4776,12 +5511,15 @@ def vm_worker_promote_mirror(
                 )
             except Exception as e:
                 error_message = f"Failed to get volume size for remote {rbd_name}: {e}"
-                fail(celery, error_message)
+                fail(
+                    celery,
+                    error_message,
+                )
                 return False
 
             if local_volume_size != remote_volume_size:
                 response = session.put(
-                    f"{destination_api_uri}/storage/ceph/volume/{pool}/{volume}",
+                    f"{destination_api_uri}/storage/ceph/volume/{destination_pool}/{volume}",
                     params={"new_size": local_volume_size, "force": True},
                 )
                 if response.status_code != 200:
@@ -4791,208 +5529,58 @@ def vm_worker_promote_mirror(
                     )
                     return False
 
-        # Send the volume to the remote
-        cluster = rados.Rados(conffile="/etc/ceph/ceph.conf")
-        cluster.connect()
-        ioctx = cluster.open_ioctx(pool)
-        image = RBDImage(ioctx, name=volume, snapshot=snapshot_name, read_only=True)
-        size = image.size()
-        chunk_size_mb = 1024
+        send_volumes.append((pool, volume, destination_pool))
 
-        if incremental_parent is not None:
-            # Diff between incremental_parent and snapshot
-            celery_message = (
-                f"Sending diff of {rbd_name}@{incremental_parent} → {snapshot_name}"
-            )
-        else:
-            # Full image transfer
-            celery_message = f"Sending full image of {rbd_name}@{snapshot_name}"
+    # Send the volumes to the remote
+    if incremental_parent is not None:
+        celery_message = f"Sending diffs of {len(send_volumes)} volume(s) {incremental_parent} → {snapshot_name}"
+    else:
+        celery_message = (
+            f"Sending full images of {len(send_volumes)} volume(s) @ {snapshot_name}"
+        )
 
-        current_stage += 1
+    current_stage += 1
+    update(
+        celery,
+        celery_message,
+        current=current_stage,
+        total=total_stages,
+    )
+
+    def report_progress(progress_message):
         update(
             celery,
-            celery_message,
+            f"{celery_message}: {progress_message}",
             current=current_stage,
             total=total_stages,
         )
 
-        if incremental_parent is not None:
-            # Createa single session to reuse connections
-            send_params = {
-                "pool": pool,
-                "volume": volume,
-                "snapshot": snapshot_name,
-                "source_snapshot": incremental_parent,
-            }
-
-            session.params.update(send_params)
-
-            # Send 32 objects (128MB) at once
-            send_max_objects = 32
-            batch_size_mb = 4 * send_max_objects
-            batch_size = batch_size_mb * 1024 * 1024
-
-            total_chunks = 0
-
-            def diff_cb_count(offset, length, exists):
-                nonlocal total_chunks
-                if exists:
-                    total_chunks += 1
-
-            current_chunk = 0
-            buffer = list()
-            buffer_size = 0
-            last_chunk_time = time.time()
-
-            def send_batch_multipart(buffer):
-                nonlocal last_chunk_time
-                files = {}
-                for i in range(len(buffer)):
-                    files[f"object_{i}"] = (
-                        f"object_{i}",
-                        buffer[i],
-                        "application/octet-stream",
-                    )
-
-                response = session.put(
-                    f"{destination_api_uri}/vm/{vm_name}/snapshot/receive/block",
-                    files=files,
-                    stream=True,
-                )
-                if response.status_code != 200:
-                    fail(
-                        celery,
-                        f"Failed to send diff batch: {response.json()['message']}",
-                    )
-                    return False
-
-                current_chunk_time = time.time()
-                chunk_time = current_chunk_time - last_chunk_time
-                last_chunk_time = current_chunk_time
-                chunk_speed = round(batch_size_mb / chunk_time, 1)
-                update(
-                    celery,
-                    celery_message + f" ({chunk_speed} MB/s)",
-                    current=current_stage,
-                    total=total_stages,
-                )
-
-            def add_block_to_multipart(buffer, offset, length, data):
-                part_data = (
-                    offset.to_bytes(8, "big") + length.to_bytes(8, "big") + data
-                )  # Add header and data
-                buffer.append(part_data)
-
-            def diff_cb_send(offset, length, exists):
-                nonlocal current_chunk, buffer, buffer_size
-                if exists:
-                    # Read the data for the current block
-                    data = image.read(offset, length)
-                    # Add the block to the multipart buffer
-                    add_block_to_multipart(buffer, offset, length, data)
-                    current_chunk += 1
-                    buffer_size += len(data)
-                    if buffer_size >= batch_size:
-                        send_batch_multipart(buffer)
-                        buffer.clear()  # Clear the buffer after sending
-                        buffer_size = 0  # Reset buffer size
-
-            try:
-                image.set_snap(snapshot_name)
-                image.diff_iterate(
-                    0, size, incremental_parent, diff_cb_count, whole_object=True
-                )
-                block_total_mb += total_chunks * 4
-                image.diff_iterate(
-                    0, size, incremental_parent, diff_cb_send, whole_object=True
-                )
-
-                if buffer:
-                    send_batch_multipart(buffer)
-                    buffer.clear()  # Clear the buffer after sending
-                    buffer_size = 0  # Reset buffer size
-            except Exception:
-                fail(
-                    celery,
-                    f"Failed to promote mirror: {response.json()['message']}",
-                )
-                return False
-            finally:
-                image.close()
-                ioctx.close()
-                cluster.shutdown()
-        else:
-
-            def full_chunker():
-                nonlocal block_total_mb
-                chunk_size = 1024 * 1024 * chunk_size_mb
-                current_chunk = 0
-                last_chunk_time = time.time()
-                while current_chunk < size:
-                    chunk = image.read(current_chunk, chunk_size)
-                    yield chunk
-                    current_chunk += chunk_size
-                    block_total_mb += len(chunk) / 1024 / 1024
-                    current_chunk_time = time.time()
-                    chunk_time = current_chunk_time - last_chunk_time
-                    last_chunk_time = current_chunk_time
-                    chunk_speed = round(chunk_size_mb / chunk_time, 1)
-                    update(
-                        celery,
-                        celery_message + f" ({chunk_speed} MB/s)",
-                        current=current_stage,
-                        total=total_stages,
-                    )
-
-            send_params = {
-                "pool": pool,
-                "volume": volume,
-                "snapshot": snapshot_name,
-                "size": size,
-                "source_snapshot": incremental_parent,
-            }
-
-            try:
-                response = session.post(
-                    f"{destination_api_uri}/vm/{vm_name}/snapshot/receive/block",
-                    headers={"Content-Type": "application/octet-stream"},
-                    params=send_params,
-                    data=full_chunker(),
-                )
-                if response.status_code != 200:
-                    fail(
-                        celery,
-                        f"Failed to promote mirror: {response.json()['message']}",
-                    )
-                    return False
-            finally:
-                image.close()
-                ioctx.close()
-                cluster.shutdown()
-
-        send_params = {
-            "pool": pool,
-            "volume": volume,
-            "snapshot": snapshot_name,
-        }
-        try:
-            response = session.patch(
-                f"{destination_api_uri}/vm/{vm_name}/snapshot/receive/block",
-                params=send_params,
-            )
-            if response.status_code != 200:
-                fail(
-                    celery,
-                    f"Failed to promote mirror: {response.json()['message']}",
-                )
-                return False
-        finally:
-            image.close()
-            ioctx.close()
-            cluster.shutdown()
+    block_t_start = time.time()
+    result, message, progress = blockstream.send_volumes(
+        session,
+        destination_api_uri,
+        vm_name,
+        send_volumes,
+        snapshot_name,
+        incremental_parent=incremental_parent,
+        compression=compression,
+        volume_concurrency=volume_concurrency,
+        stream_concurrency=stream_concurrency,
+        report=report_progress,
+    )
+    if not result:
+        fail(
+            celery,
+            f"Failed to promote mirror: {message}",
+        )
+        return False
 
     block_t_end = time.time()
+    block_total_mb, _, block_rates = progress.summary()
     block_mbps = round(block_total_mb / (block_t_end - block_t_start), 1)
+    block_details = ", ".join(
+        [f"{name} {rate} MB/s" for name, rate in block_rates.items()]
+    )
 
     #
     # 4. Start VM on remote
@@ -5050,7 +5638,7 @@ def vm_worker_promote_mirror(
     current_stage += 1
     return finish(
         celery,
-        f"Successfully promoted VM '{domain}' (snapshot '{snapshot_name}') on remote cluster '{destination_api_uri}' (average {block_mbps} MB/s)",
+        f"Successfully promoted VM '{domain}' (snapshot '{snapshot_name}') on remote cluster '{destination_api_uri}' (average {block_mbps} MB/s; {block_details})",
         current=current_stage,
         total=total_stages,
     )
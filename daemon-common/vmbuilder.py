@@ -20,8 +20,6 @@
 ###############################################################################
 
 import json
-import psycopg2
-import psycopg2.extras
 import re
 import os
 
@@ -33,6 +31,7 @@ from contextlib import contextmanager
 
 from daemon_lib.zkhandler import ZKHandler
 from daemon_lib.celery import start, fail, log_info, log_warn, log_err, update, finish
+from daemon_lib.database import open_database, close_database, execute_prepared
 
 import daemon_lib.common as pvc_common
 import daemon_lib.node as pvc_node
@@ -161,17 +160,37 @@ def chroot(destination):
         del real_root
 
 
+# The profile of a new VM with all of its elements; the system template and OVA details
+# are returned as objects and the networks, storage volumes and OVA volumes as lists
+PROFILE_QUERY = """SELECT profile.*,
+    row_to_json(system_template.*) AS system_details,
+    network_template.mac_template AS mac_template,
+    script.script AS script_body,
+    row_to_json(ova.*) AS ova_details,
+    (
+        SELECT COALESCE(json_agg(network.* ORDER BY network.id), '[]')
+        FROM network WHERE network.network_template = profile.network_template
+    ) AS networks,
+    (
+        SELECT COALESCE(json_agg(storage.* ORDER BY storage.disk_id), '[]')
+        FROM storage WHERE storage.storage_template = profile.storage_template
+    ) AS volumes,
+    (
+        SELECT COALESCE(json_agg(ova_volume.* ORDER BY ova_volume.id), '[]')
+        FROM ova_volume WHERE ova_volume.ova = profile.ova
+    ) AS ova_volumes
+FROM profile
+LEFT JOIN system_template ON system_template.id = profile.system_template
+LEFT JOIN network_template ON network_template.id = profile.network_template
+LEFT JOIN script ON script.id = profile.script
+LEFT JOIN ova ON ova.id = profile.ova
+WHERE profile.name = %s"""
+
+
 @contextmanager
 def open_db(config):
     try:
-        conn = psycopg2.connect(
-            host=config["api_postgresql_host"],
-            port=config["api_postgresql_port"],
-            dbname=config["api_postgresql_dbname"],
-            user=config["api_postgresql_user"],
-            password=config["api_postgresql_password"],
-        )
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        conn, cur = open_database(config)
     except Exception:
         fail(
             None,
@@ -184,9 +203,7 @@ def open_db(config):
     except Exception:
         raise
     finally:
-        conn.commit()
-        cur.close()
-        conn.close()
+        close_database(conn, cur)
         del conn
 
 
@@ -253,10 +270,8 @@ def worker_create_vm(
     vm_data = dict()
 
     with open_db(config) as db_cur:
-        # Get the profile information
-        query = "SELECT * FROM profile WHERE name = %s"
-        args = (vm_profile,)
-        db_cur.execute(query, args)
+        # Get the profile information and all its elements in a single query
+        execute_prepared(db_cur, "vmbuilder_profile", PROFILE_QUERY, (vm_profile,))
         profile_data = db_cur.fetchone()
         if profile_data is None:
             fail(
@@ -265,73 +280,39 @@ def worker_create_vm(
                 exception=ClusterError,
             )
 
-        if profile_data.get("arguments"):
-            vm_data["script_arguments"] = profile_data.get("arguments").split("|")
-        else:
-            vm_data["script_arguments"] = []
-
-        # Get the system details
-        query = "SELECT * FROM system_template WHERE id = %s"
-        args = (profile_data["system_template"],)
-        db_cur.execute(query, args)
-        vm_data["system_details"] = db_cur.fetchone()
-
-        # Get the MAC template
-        query = "SELECT mac_template FROM network_template WHERE id = %s"
-        args = (profile_data["network_template"],)
-        db_cur.execute(query, args)
-        db_row = db_cur.fetchone()
-        if db_row:
-            vm_data["mac_template"] = db_row.get("mac_template")
-        else:
-            vm_data["mac_template"] = None
-
-        # Get the networks
-        query = "SELECT * FROM network WHERE network_template = %s"
-        args = (profile_data["network_template"],)
-        db_cur.execute(query, args)
-        _vm_networks = db_cur.fetchall()
-        vm_networks = list()
-
-        # Set the eth_bridge for each network
-        for network in _vm_networks:
-            vni = network["vni"]
-            if vni in ["upstream", "cluster", "storage"]:
-                eth_bridge = "br{}".format(vni)
-            else:
-                eth_bridge = "vmbr{}".format(vni)
-            network["eth_bridge"] = eth_bridge
-            vm_networks.append(network)
-        vm_data["networks"] = vm_networks
-
-        # Get the storage volumes
-        # ORDER BY ensures disks are always in the sdX/vdX order, regardless of add order
-        query = "SELECT * FROM storage WHERE storage_template = %s ORDER BY disk_id"
-        args = (profile_data["storage_template"],)
-        db_cur.execute(query, args)
-        vm_data["volumes"] = db_cur.fetchall()
-
-        # Get the script
-        query = "SELECT script FROM script WHERE id = %s"
-        args = (profile_data["script"],)
-        db_cur.execute(query, args)
-        db_row = db_cur.fetchone()
-        if db_row:
-            vm_data["script"] = db_row.get("script")
+    if profile_data.get("arguments"):
+        vm_data["script_arguments"] = profile_data.get("arguments").split("|")
+    else:
+        vm_data["script_arguments"] = []
+
+    # Get the system details
+    vm_data["system_details"] = profile_data["system_details"]
+
+    # Get the MAC template
+    vm_data["mac_template"] = profile_data["mac_template"]
+
+    # Set the eth_bridge for each network
+    vm_networks = list()
+    for network in profile_data["networks"]:
+        vni = network["vni"]
+        if vni in ["upstream", "cluster", "storage"]:
+            eth_bridge = "br{}".format(vni)
         else:
-            vm_data["script"] = None
-
-        if profile_data.get("profile_type") == "ova":
-            query = "SELECT * FROM ova WHERE id = %s"
-            args = (profile_data["ova"],)
-            db_cur.execute(query, args)
-            vm_data["ova_details"] = db_cur.fetchone()
-
-            query = "SELECT * FROM ova_volume WHERE ova = %s"
-            args = (profile_data["ova"],)
-            db_cur.execute(query, args)
-            # Replace the existing volumes list with our OVA volume list
-            vm_data["volumes"] = db_cur.fetchall()
+            eth_bridge = "vmbr{}".format(vni)
+        network["eth_bridge"] = eth_bridge
+        vm_networks.append(network)
+    vm_data["networks"] = vm_networks
+
+    # Get the storage volumes, always in the sdX/vdX order, regardless of add order
+    vm_data["volumes"] = profile_data["volumes"]
+
+    # Get the script
+    vm_data["script"] = profile_data["script_body"]
+
+    if profile_data.get("profile_type") == "ova":
+        vm_data["ova_details"] = profile_data["ova_details"]
+        # Replace the existing volumes list with our OVA volume list
+        vm_data["volumes"] = profile_data["ova_volumes"]
 
     retcode, stdout, stderr = pvc_common.run_os_command("uname -m")
     vm_data["system_architecture"] = stdout.strip()
@@ -19,20 +19,51 @@
 #
 ###############################################################################
 
-import asyncio
 import os
+import random
 import time
 import uuid
 import json
 import re
 from functools import wraps
 from kazoo.client import KazooClient, KazooState
-from kazoo.exceptions import NoNodeError
+from kazoo.exceptions import (
+    NoNodeError,
+    NodeExistsError,
+    BadVersionError,
+    RolledBackError,
+)
+
+import daemon_lib.telemetry as telemetry
 
 
 DEFAULT_ROOT_PATH = "/usr/share/pvc"
 SCHEMA_PATH = "daemon_lib/migrations/versions"
 
+# The maximum delay, in seconds, before retrying a write that conflicted with another writer
+RETRY_DELAY = 0.05
+
+# The maximum number of operations in each schema apply transaction
+APPLY_BATCH_SIZE = 100
+
+
+#
+# Packed document helpers
+#
+def load_document(data):
+    """
+    Load the fields of a packed document from its data, treating empty or invalid data as an empty document
+    """
+    try:
+        document = json.loads(data) if data else dict()
+    except ValueError:
+        document = dict()
+
+    if not isinstance(document, dict):
+        document = dict()
+
+    return document
+
 
 #
 # Function decorators
@@ -106,12 +137,15 @@ class ZKHandler(object):
         A zk_conn object will be created but not started
 
         A ZKSchema instance will be created
+
+        A telemetry backend will be created if one is configured
         """
         self.encoding = "utf8"
         self.coordinators = config["coordinators"]
         self.logger = logger
         self.zk_conn = KazooClient(hosts=self.coordinators)
         self._schema = ZKSchema()
+        self.telemetry = telemetry.get_backend(config)
 
     #
     # Class meta-functions
@@ -217,6 +251,58 @@ class ZKHandler(object):
 
         return self.schema.path(ipath, item=item)
 
+    def get_packed_key(self, key):
+        """
+        Get the document key and field name for {key} if it is packed into a document in the current schema.
+
+        Read-mostly keys of an object may be stored as fields of a single JSON document key, rather than as
+        individual keys; the key actions below handle packed keys transparently, so that callers may always
+        use the individual keys.
+
+        Otherwise, returns None since this is not a packed key.
+        """
+        if not isinstance(key, tuple):
+            return None
+
+        if len(key) == 2:
+            ipath, item = key
+            packed = self.schema.packed_field(ipath)
+            if packed is None:
+                return None
+            document_ipath, field = packed
+            return (document_ipath, item), field
+        elif len(key) == 4:
+            ipath, item, sub_ipath, sub_item = key
+            packed = self.schema.packed_field(sub_ipath)
+            if packed is None:
+                return None
+            document_ipath, field = packed
+            return (ipath, item, document_ipath, sub_item), field
+        else:
+            return None
+
+    def is_packed_document(self, key):
+        """
+        Check if {key} is a packed document key in the current schema
+        """
+        if isinstance(key, tuple) and len(key) == 2:
+            return self.schema.is_packed_document(key[0])
+        elif isinstance(key, tuple) and len(key) == 4:
+            return self.schema.is_packed_document(key[2])
+        else:
+            return False
+
+    def read_document(self, path):
+        """
+        Read the fields and version of the packed document at {path}; the version is None if it does not exist
+        """
+        try:
+            data, stat = self.zk_conn.get(path)
+        except NoNodeError:
+            return dict(), None
+
+        return load_document(data.decode(self.encoding)), stat.version
+
     #
     # Key Actions
     #
@@ -224,6 +310,16 @@ class ZKHandler(object):
         """
         Check if a key exists
         """
+        packed = self.get_packed_key(key)
+        if packed is not None:
+            document_key, field = packed
+            path = self.get_schema_path(document_key)
+            if path is None:
+                return False
+
+            document, _ = self.read_document(path)
+            return field in document
+
         path = self.get_schema_path(key)
         if path is None:
             # This path is invalid, this is likely due to missing schema entries, so return False
@@ -239,6 +335,17 @@ class ZKHandler(object):
         """
         Read data from a key
         """
+        if self.telemetry is not None and telemetry.is_telemetry_key(key):
+            return self.read_telemetry([key])[0]
+
+        packed = self.get_packed_key(key)
+        if packed is not None:
+            document_key, field = packed
+            data = self.read(document_key)
+            if data is None:
+                return None
+            return load_document(data).get(field)
+
         try:
             path = self.get_schema_path(key)
             if path is None:
@@ -250,45 +357,164 @@ class ZKHandler(object):
         except NoNodeError:
             return None
 
-    async def read_async(self, key):
+    def _read_many(self, keys):
         """
-        Read data from a key asynchronously
+        Read data from several non-packed keys, sending every request before waiting on any of
+        them, so that the reads are pipelined over the connection
         """
-        try:
+        requests = list()
+        for key in keys:
             path = self.get_schema_path(key)
             if path is None:
                 # This path is invalid; this is likely due to missing schema entries, so return None
-                return None
+                requests.append(None)
+            else:
+                requests.append(self.zk_conn.get_async(path))
 
-            val = self.zk_conn.get_async(path)
-            data = val.get()
-            return data[0].decode(self.encoding)
-        except NoNodeError:
-            return None
+        values = list()
+        for request in requests:
+            try:
+                data = request.get() if request is not None else None
+            except NoNodeError:
+                data = None
+            values.append(data[0].decode(self.encoding) if data is not None else None)
 
-    async def _read_many(self, keys):
-        """
-        Async runner for read_many
-        """
-        res = await asyncio.gather(*(self.read_async(key) for key in keys))
-        return tuple(res)
+        return tuple(values)
 
     def read_many(self, keys):
         """
         Read data from several keys, asynchronously. Returns a tuple of all key values once all
         reads are complete.
+
+        Packed keys sharing a document are served by a single read of that document.
+        """
+        values = dict()
+
+        # Read any telemetry keys from the telemetry backend in one batch
+        if self.telemetry is not None:
+            telemetry_keys = [k for k in keys if telemetry.is_telemetry_key(k)]
+            if telemetry_keys:
+                values.update(zip(telemetry_keys, self.read_telemetry(telemetry_keys)))
+
+        # Read every other key, or the document of every packed key, exactly once
+        packed_keys = dict()
+        read_keys = dict()
+        for key in keys:
+            if key in values or key in packed_keys:
+                continue
+            packed = self.get_packed_key(key)
+            if packed is not None:
+                packed_keys[key] = packed
+                read_keys[packed[0]] = None
+            else:
+                read_keys[key] = None
+
+        if read_keys:
+            values.update(zip(read_keys.keys(), self._read_many(list(read_keys))))
+
+        documents = dict()
+        results = list()
+        for key in keys:
+            if key not in packed_keys:
+                results.append(values[key])
+                continue
+
+            document_key, field = packed_keys[key]
+            if values[document_key] is None:
+                results.append(None)
+                continue
+            if document_key not in documents:
+                documents[document_key] = load_document(values[document_key])
+            results.append(documents[document_key].get(field))
+
+        return tuple(results)
+
+    def read_telemetry(self, keys):
         """
-        return asyncio.run(self._read_many(keys))
+        Read several telemetry keys from the telemetry backend
 
-    def write(self, kvpairs):
+        As in Zookeeper, a key whose object (node, VM, OSD or pool) does not exist reads as None,
+        while a key of an existing object which is missing, expired, or cannot be read reads as
+        the default value written when the object is created.
+        """
+        paths = [self.get_schema_path(key) for key in keys]
+        try:
+            values = self.telemetry.read_many([p for p in paths if p is not None])
+        except Exception as e:
+            self.log(f"ZKHandler error: Failed to read telemetry: {e}", state="e")
+            values = [None] * len([p for p in paths if p is not None])
+
+        values = iter(values)
+        results = list()
+        for key, path in zip(keys, paths):
+            # An invalid path is likely due to missing schema entries, so it reads as None
+            results.append(next(values) if path is not None else None)
+
+        # Check the existence of the objects of any missing values in one batch
+        missing = dict()
+        for key, path, value in zip(keys, paths, results):
+            if path is not None and value is None:
+                object_key = telemetry.get_object_key(key)
+                if object_key not in missing:
+                    object_path = self.get_schema_path(object_key)
+                    missing[object_key] = (
+                        self.zk_conn.exists_async(object_path)
+                        if object_path is not None
+                        else None
+                    )
+        exists = {
+            object_key: request is not None and request.get() is not None
+            for object_key, request in missing.items()
+        }
+
+        for i, (key, path) in enumerate(zip(keys, paths)):
+            if path is not None and results[i] is None:
+                if exists[telemetry.get_object_key(key)]:
+                    results[i] = telemetry.get_default(key)
+        return results
+
+    def write(self, kvpairs, retries=10):
         """
         Create or update one or more keys' data
+
+        Packed document fields are written only if the document did not change since it was read;
+        conflicting writes are retried on the current document.
         """
         if type(kvpairs) is not list:
             self.log("ZKHandler error: Key-value sequence is not a list", state="e")
             return False
 
-        transaction = self.zk_conn.transaction()
+        # Write any telemetry keys to the telemetry backend in one batch; telemetry is
+        # ephemeral, so a failure here is logged but does not fail the write
+        if self.telemetry is not None:
+            telemetry_pairs = [
+                kvpair
+                for kvpair in kvpairs
+                if type(kvpair) is tuple and telemetry.is_telemetry_key(kvpair[0])
+            ]
+            if telemetry_pairs:
+                kvpairs = [
+                    kvpair for kvpair in kvpairs if kvpair not in telemetry_pairs
+                ]
+                try:
+                    self.telemetry.write(
+                        [
+                            (self.get_schema_path(key), value)
+                            for key, value in telemetry_pairs
+                            if self.get_schema_path(key) is not None
+                        ]
+                    )
+                except Exception as e:
+                    self.log(
+                        f"ZKHandler error: Failed to write telemetry: {e}", state="e"
+                    )
+                if not kvpairs:
+                    return True
+
+        # Packed keys are merged into their document, which is written once in the position of the
+        # first key to touch it; the changed fields are kept to re-apply them if the document changes
+        changes = dict()
+        operations = list()
 
         for kvpair in kvpairs:
             if type(kvpair) is not tuple:
@@ -303,48 +529,122 @@ class ZKHandler(object):
             key = kvpair[0]
             value = kvpair[1]
 
+            packed = self.get_packed_key(key)
+            if packed is not None:
+                document_key, field = packed
+            elif self.is_packed_document(key):
+                document_key, field = key, None
+            else:
+                document_key = None
+
+            if document_key is not None:
+                path = self.get_schema_path(document_key)
+                if path is None:
+                    # This path is invalid; this is likely due to missing schema entries, so continue
+                    continue
+
+                if path not in changes:
+                    changes[path] = list()
+                    operations.append((path, None))
+
+                changes[path].append((field, value))
+                continue
+
             path = self.get_schema_path(key)
             if path is None:
                 # This path is invalid; this is likely due to missing schema entries, so continue
                 continue
 
-            if not self.exists(key):
-                # Creating a new key
-                transaction.create(path, str(value).encode(self.encoding))
+            operations.append((path, value))
 
-            else:
-                # Updating an existing key
-                data = self.zk_conn.get(path)
-                version = data[1].version
+        for _ in range(retries):
+            transaction = self.zk_conn.transaction()
 
-                # Validate the expected version after the execution
-                new_version = version + 1
+            for path, value in operations:
+                if path in changes:
+                    document, version = self.read_document(path)
+                    for field, field_value in changes[path]:
+                        if field is not None:
+                            document[field] = str(field_value)
+                        else:
+                            # Writing a document key directly replaces all of its fields
+                            document = load_document(str(field_value))
 
-                # Update the data
-                transaction.set_data(path, str(value).encode(self.encoding))
+                    data = json.dumps(document).encode(self.encoding)
+                    if version is None:
+                        transaction.create(path, data)
+                    else:
+                        # Only update the document if no other fields changed since it was read
+                        transaction.set_data(path, data, version=version)
 
-                # Check the data
-                try:
-                    transaction.check(path, new_version)
-                except TypeError:
-                    self.log(
-                        "ZKHandler error: Key '{}' does not match expected version".format(
-                            path
-                        ),
-                        state="e",
-                    )
-                    return False
+                elif not self.zk_conn.exists(path):
+                    # Creating a new key
+                    transaction.create(path, str(value).encode(self.encoding))
 
-        try:
-            transaction.commit()
-            return True
-        except Exception as e:
-            self.log(
-                "ZKHandler error: Failed to commit transaction: {}".format(e), state="e"
-            )
-            return False
+                else:
+                    # Updating an existing key
+                    data = self.zk_conn.get(path)
+                    version = data[1].version
+
+                    # Validate the expected version after the execution
+                    new_version = version + 1
+
+                    # Update the data
+                    transaction.set_data(path, str(value).encode(self.encoding))
+
+                    # Check the data
+                    try:
+                        transaction.check(path, new_version)
+                    except TypeError:
+                        self.log(
+                            "ZKHandler error: Key '{}' does not match expected version".format(
+                                path
+                            ),
+                            state="e",
+                        )
+                        return False
+
+            try:
+                results = transaction.commit()
+            except Exception as e:
+                self.log(
+                    "ZKHandler error: Failed to commit transaction: {}".format(e),
+                    state="e",
+                )
+                return False
+
+            # The operations which did not fail themselves are only reported as rolled back
+            errors = [
+                result
+                for result in results
+                if isinstance(result, Exception)
+                and not isinstance(result, RolledBackError)
+            ]
+            if not errors:
+                return True
+
+            if not any(
+                isinstance(error, (BadVersionError, NodeExistsError))
+                for error in errors
+            ):
+                self.log(
+                    "ZKHandler error: Failed to commit transaction: {}".format(
+                        type(errors[0]).__name__
+                    ),
+                    state="e",
+                )
+                return False
+
+            # Another writer changed or created a key since it was read; read it again and retry
+            time.sleep(random.uniform(0, RETRY_DELAY))
 
-    def delete(self, keys, recursive=True):
+        self.log(
+            "ZKHandler error: Failed to write keys after {} attempts".format(retries),
+            state="e",
+        )
+        return False
+
+    def delete(self, keys, recursive=True, retries=10):
         """
         Delete a key or list of keys (defaults to recursive)
         """
@@ -352,6 +652,47 @@ class ZKHandler(object):
             keys = [keys]
 
         for key in keys:
+            packed = self.get_packed_key(key)
+            if packed is not None:
+                # Remove the field from its document
+                document_key, field = packed
+                path = self.get_schema_path(document_key)
+                if path is None:
+                    continue
+                for _ in range(retries):
+                    document, version = self.read_document(path)
+                    if field not in document:
+                        break
+                    document.pop(field)
+                    try:
+                        # Only update the document if no other fields changed since it was read
+                        self.zk_conn.set(
+                            path,
+                            json.dumps(document).encode(self.encoding),
+                            version=version,
+                        )
+                        break
+                    except BadVersionError:
+                        # Another writer changed the document since it was read; retry
+                        time.sleep(random.uniform(0, RETRY_DELAY))
+                    except Exception as e:
+                        self.log(
+                            "ZKHandler error: Failed to delete key {}: {}".format(
+                                path, e
+                            ),
+                            state="e",
+                        )
+                        return False
+                else:
+                    self.log(
+                        "ZKHandler error: Failed to delete key {} after {} attempts".format(
+                            path, retries
+                        ),
+                        state="e",
+                    )
+                    return False
+                continue
+
             if self.exists(key):
                 try:
                     path = self.get_schema_path(key)
@@ -379,6 +720,165 @@ class ZKHandler(object):
             # This path is invalid; this is likely due to missing schema entries, so return None
             return None
 
+    def children_many(self, keys):
+        """
+        List the children of several keys, asynchronously. Returns a tuple of all child lists once
+        all listings are complete; missing keys have None.
+        """
+        requests = list()
+        for key in keys:
+            path = self.get_schema_path(key)
+            if path is None:
+                requests.append(None)
+            else:
+                requests.append(self.zk_conn.get_children_async(path))
+
+        children = list()
+        for request in requests:
+            try:
+                children.append(request.get() if request is not None else None)
+            except NoNodeError:
+                children.append(None)
+
+        return tuple(children)
+
+    def count_many(self, keys):
+        """
+        Count the children of several keys, asynchronously, from their stats rather than by listing
+        them. Returns a tuple of all counts once all stats are complete; missing keys count as None.
+        """
+        requests = list()
+        for key in keys:
+            path = self.get_schema_path(key)
+            if path is None:
+                requests.append(None)
+            else:
+                requests.append(self.zk_conn.exists_async(path))
+
+        counts = list()
+        for request in requests:
+            stat = request.get() if request is not None else None
+            counts.append(stat.numChildren if stat is not None else None)
+
+        return tuple(counts)
+
+    def adjust_counters(self, kdpairs, creates=None, deletes=None, retries=10):
+        """
+        Atomically add a delta to each of one or more integer counter keys, as (key, delta) pairs
+
+        Counters which do not exist or have no value yet are left alone, since their value is
+        unknown until they are reconciled. Concurrent adjustments are retried.
+
+        The keys of {creates}, as (key, value) pairs, are created and the keys of {deletes} are
+        deleted (recursively) in the same transaction, so the counters only change along with the
+        keys they count. If any key to create already exists or any key to delete does not, nothing
+        is changed and None is returned.
+        """
+        if type(kdpairs) is not list:
+            self.log("ZKHandler error: Key-delta sequence is not a list", state="e")
+            return False
+
+        paths = [
+            (self.get_schema_path(key), delta)
+            for key, delta in kdpairs
+            if delta != 0 and self.get_schema_path(key) is not None
+        ]
+        create_paths = [
+            (self.get_schema_path(key), value)
+            for key, value in creates or list()
+            if self.get_schema_path(key) is not None
+        ]
+        delete_paths = [
+            self.get_schema_path(key)
+            for key in deletes or list()
+            if self.get_schema_path(key) is not None
+        ]
+
+        def delete_element(transaction, path):
+            for child in self.zk_conn.get_children(path):
+                delete_element(transaction, "{}/{}".format(path, child))
+            transaction.delete(path)
+
+        for _ in range(retries):
+            transaction = self.zk_conn.transaction()
+            try:
+                if any(self.zk_conn.exists(path) for path, _ in create_paths):
+                    return None
+                for path, value in create_paths:
+                    transaction.create(path, str(value).encode(self.encoding))
+                for path in delete_paths:
+                    delete_element(transaction, path)
+            except NoNodeError:
+                return None
+
+            for path, delta in paths:
+                try:
+                    data, stat = self.zk_conn.get(path)
+                    value = int(data.decode(self.encoding))
+                except (NoNodeError, ValueError):
+                    continue
+                # Only update the counter if it did not change since it was read
+                transaction.set_data(
+                    path,
+                    str(max(0, value + delta)).encode(self.encoding),
+                    version=stat.version,
+                )
+
+            try:
+                results = transaction.commit()
+            except Exception as e:
+                self.log(
+                    "ZKHandler error: Failed to commit transaction: {}".format(e),
+                    state="e",
+                )
+                return False
+            if not any(isinstance(result, Exception) for result in results):
+                return True
+
+            # Another writer changed a counter or the keys since they were read; retry
+            time.sleep(random.uniform(0, RETRY_DELAY))
+
+        self.log(
+            "ZKHandler error: Failed to adjust counters after {} attempts".format(
+                retries
+            ),
+            state="e",
+        )
+        return False
+
+    def reconcile_counter(self, key, get_value):
+        """
+        Set an integer counter key to the value returned by get_value, unless the counter changed
+        while get_value ran. Returns a tuple of the previous and reconciled values, or None if the
+        counter is missing or changed.
+        """
+        path = self.get_schema_path(key)
+        if path is None:
+            return None
+
+        try:
+            data, stat = self.zk_conn.get(path)
+        except NoNodeError:
+            return None
+
+        try:
+            old_value = int(data.decode(self.encoding))
+        except ValueError:
+            old_value = None
+
+        new_value = get_value()
+        if new_value == old_value:
+            return old_value, new_value
+
+        try:
+            self.zk_conn.set(
+                path, str(new_value).encode(self.encoding), version=stat.version
+            )
+        except BadVersionError:
+            return None
+
+        return old_value, new_value
+
     def rename(self, kkpairs):
         """
         Rename one or more keys to a new value
@@ -577,7 +1077,7 @@ class ZKHandler(object):
 #
 class ZKSchema(object):
     # Current version
-    _version = 15
+    _version = 19
 
     # Root for doing nested keys
     _schema_root = ""
@@ -619,12 +1119,7 @@ class ZKSchema(object):
         # The schema of an individual logs entry (/logs/{id})
         "faults": {
             "id": "",  # The root key
-            "last_time": "/last_time",
-            "first_time": "/first_time",
-            "ack_time": "/ack_time",
-            "status": "/status",
-            "delta": "/delta",
-            "message": "/message",
+            "data": "/data",
         },
         # The schema of an individual node entry (/nodes/{node_name})
         "node": {
@@ -633,8 +1128,7 @@ class ZKSchema(object):
             "mode": "/daemonmode",
             "data.active_schema": "/activeschema",
             "data.latest_schema": "/latestschema",
-            "data.static": "/staticdata",
-            "data.pvc_version": "/pvcversion",
+            "data": "/data",
             "running_domains": "/runningdomains",
             "count.provisioned_domains": "/domainscount",
             "count.networks": "/networkscount",
@@ -648,9 +1142,7 @@ class ZKSchema(object):
             "memory.free": "/memfree",
             "memory.allocated": "/memalloc",
             "memory.provisioned": "/memprov",
-            "ipmi.hostname": "/ipmihostname",
-            "ipmi.username": "/ipmiusername",
-            "ipmi.password": "/ipmipassword",
+            "ipmi": "/ipmi",
             "sriov": "/sriov",
             "sriov.pf": "/sriov/pf",
             "sriov.vf": "/sriov/vf",
@@ -667,6 +1159,7 @@ class ZKSchema(object):
             "message": "/message",
             "data": "/data",
             "runtime": "/runtime",
+            "runtime_histogram": "/runtime_histogram",
         },
         # The schema of an individual SR-IOV PF entry (/nodes/{node_name}/sriov/pf/{pf})
         "sriov_pf": {
@@ -691,10 +1184,6 @@ class ZKSchema(object):
             "config.trust": "/config/trust",
             "config.query_rss": "/config/query_rss",
             "pci": "/pci",
-            "pci.domain": "/pci/domain",
-            "pci.bus": "/pci/bus",
-            "pci.slot": "/pci/slot",
-            "pci.function": "/pci/function",
             "used": "/used",
             "used_by": "/used_by",
         },
@@ -711,13 +1200,10 @@ class ZKSchema(object):
             "storage.volumes": "/rbdlist",
             "console.log": "/consolelog",
             "console.vnc": "/vnc",
-            "meta.autostart": "/node_autostart",
-            "meta.migrate_method": "/migration_method",
-            "meta.migrate_max_downtime": "/migration_max_downtime",
-            "meta.node_selector": "/node_selector",
-            "meta.node_limit": "/node_limit",
+            "meta": "/meta",
             "meta.tags": "/tags",
             "migrate.sync_lock": "/migrate_sync_lock",
+            "migrate.progress": "/migrate_progress",
             "snapshots": "/snapshots",
         },
         # The schema of an individual domain tag entry (/domains/{domain}/tags/{tag})
@@ -795,6 +1281,7 @@ class ZKSchema(object):
             "pgs": "/pgs",
             "tier": "/tier",
             "stats": "/stats",
+            "snapshot_count": "/snapshot_count",
         },  # The root key
         # The schema of an individual volume entry (/ceph/volumes/{pool_name}/{volume_name})
         "volume": {
@@ -806,6 +1293,49 @@ class ZKSchema(object):
             "name": "",
             "stats": "/stats",
         },  # The root key
+        # Keys packed as fields of a single JSON document znode of their object, by object type and
+        # document key; only read-mostly keys which are never watched or locked individually are packed
+        "packed": {
+            "faults": {
+                "data": [
+                    "last_time",
+                    "first_time",
+                    "ack_time",
+                    "status",
+                    "delta",
+                    "message",
+                ],
+            },
+            "node": {
+                "data": [
+                    "data.static",
+                    "data.pvc_version",
+                ],
+                "ipmi": [
+                    "ipmi.hostname",
+                    "ipmi.username",
+                    "ipmi.password",
+                ],
+            },
+            "sriov_vf": {
+                "pci": [
+                    "pci.domain",
+                    "pci.bus",
+                    "pci.slot",
+                    "pci.function",
+                ],
+            },
+            "domain": {
+                "meta": [
+                    "meta.autostart",
+                    "meta.migrate_method",
+                    "meta.migrate_max_downtime",
+                    "meta.node_selector",
+                    "meta.node_limit",
+                    "meta.migrate_profile",
+                ],
+            },
+        },
     }
 
     # Properties
@@ -896,6 +1426,11 @@ class ZKSchema(object):
 
             sub_path = self.schema.get(itype).get(".".join(ipath))
             if sub_path is None:
+                # Packed keys resolve to the document they are packed into
+                packed = self.packed_field(f"{itype}.{'.'.join(ipath)}")
+                if packed is not None:
+                    return self.path(packed[0], item=item)
+
                 # We didn't find the path we're looking for, so we don't want to do anything
                 return None
 
@@ -908,6 +1443,64 @@ class ZKSchema(object):
         else:
             return list(self.schema.get(itype).keys())
 
+    # Get the packed documents of a schema location, and the keys packed into each
+    def packed(self, itype):
+        return self.schema.get("packed", dict()).get(itype, dict())
+
+    # Get the document key and field name of a packed key, or None if the key is not packed
+    def packed_field(self, ipath):
+        itype, *ipath = ipath.split(".")
+        field = ".".join(ipath)
+        for document, fields in self.packed(itype).items():
+            if field in fields:
+                return f"{itype}.{document}", field
+        return None
+
+    # Determine if a key is a packed document
+    def is_packed_document(self, ipath):
+        itype, *ipath = ipath.split(".")
+        return ".".join(ipath) in self.packed(itype)
+
+    # Get the data of a key newly created by apply
+    def default_data(self, elem, ikey):
+        if elem == "osd" and ikey == "is_split":
+            return "False"
+        elif elem == "pool" and ikey == "tier":
+            return "default"
+        elif elem == "domain" and ikey == "meta.migrate_max_downtime":
+            return "300"
+        elif self.is_packed_document(f"{elem}.{ikey}"):
+            return json.dumps(
+                {
+                    field: self.default_data(elem, field)
+                    for field in self.packed(elem)[ikey]
+                }
+            )
+        else:
+            return ""
+
+    # Get the paths of all instances of a schema location with packed documents
+    def packed_objects(self, zkhandler, itype):
+        if itype in ["node", "domain", "faults"]:
+            base_path = self.path(f"base.{itype}")
+            return [
+                f"{base_path}/{child}"
+                for child in zkhandler.zk_conn.get_children(base_path)
+            ]
+        elif itype in ["sriov_vf"]:
+            objects = list()
+            for node in zkhandler.zk_conn.get_children(self.path("base.node")):
+                vf_path = self.path("node.sriov.vf", node)
+                if not zkhandler.zk_conn.exists(vf_path):
+                    continue
+                objects += [
+                    f"{vf_path}/{child}"
+                    for child in zkhandler.zk_conn.get_children(vf_path)
+                ]
+            return objects
+        else:
+            return list()
+
     # Get the active version of a cluster's schema
     def get_version(self, zkhandler):
         try:
@@ -916,203 +1509,227 @@ class ZKSchema(object):
             current_version = 0
         return current_version
 
-    # Validate an active schema against a Zookeeper cluster
-    def validate(self, zkhandler, logger=None):
-        result = True
-
-        # Walk the entire tree checking our schema
-        for elem in ["base"]:
-            for key in self.keys(elem):
-                kpath = f"{elem}.{key}"
-                if not zkhandler.zk_conn.exists(self.path(kpath)):
-                    if logger is not None:
-                        logger.out(f"Key not found: {self.path(kpath)}", state="w")
-                    result = False
-
-        for elem in ["node", "domain", "network", "osd", "pool"]:
-            # First read all the subelements of the key class
-            for child in zkhandler.zk_conn.get_children(self.path(f"base.{elem}")):
-                # For each key in the schema for that particular elem
+    # Get the paths of several keys' children, pipelined; missing keys have no children
+    @staticmethod
+    def _get_children_many(zkhandler, paths):
+        requests = [
+            (path, zkhandler.zk_conn.get_children_async(path)) for path in paths
+        ]
+        children = dict()
+        for path, request in requests:
+            try:
+                children[path] = request.get()
+            except NoNodeError:
+                children[path] = list()
+        return children
+
+    # Get the objects of each schema location validated and applied by the schema
+    def _get_objects(self, zkhandler):
+        objects = dict()
+
+        # These have a single layer of children
+        elems = ["node", "domain", "network", "osd", "pool"]
+        base_children = self._get_children_many(
+            zkhandler, [self.path(f"base.{elem}") for elem in elems]
+        )
+        for elem in elems:
+            objects[elem] = base_children[self.path(f"base.{elem}")]
+
+        # These have several children layers (pool, volume, snapshot) that must be parsed through
+        pools = self._get_children_many(
+            zkhandler, [self.path("base.volume"), self.path("base.snapshot")]
+        )
+        volume_base = self.path("base.volume")
+        volume_children = self._get_children_many(
+            zkhandler, [f"{volume_base}/{pool}" for pool in pools[volume_base]]
+        )
+        objects["volume"] = [
+            f"{pool_path[len(volume_base) + 1:]}/{volume}"
+            for pool_path, volumes in volume_children.items()
+            for volume in volumes
+        ]
+
+        snapshot_base = self.path("base.snapshot")
+        snapshot_volume_children = self._get_children_many(
+            zkhandler, [f"{snapshot_base}/{pool}" for pool in pools[snapshot_base]]
+        )
+        snapshot_children = self._get_children_many(
+            zkhandler,
+            [
+                f"{pool_path}/{volume}"
+                for pool_path, volumes in snapshot_volume_children.items()
+                for volume in volumes
+            ],
+        )
+        objects["snapshot"] = [
+            f"{volume_path[len(snapshot_base) + 1:]}/{snapshot}"
+            for volume_path, snapshots in snapshot_children.items()
+            for snapshot in snapshots
+        ]
+
+        return objects
+
+    # Get every key of the schema that should exist in a cluster, in creation order, as (path, data)
+    def _get_expected_keys(self, zkhandler, objects):
+        expected_keys = list()
+
+        for key in self.keys("base"):
+            if key == "root":
+                # The root key always exists
+                continue
+            # Ensure that we create base.schema.version with the current valid version value
+            if key == "schema.version":
+                data = str(self.version)
+            else:
+                data = ""
+            expected_keys.append((self.path(f"base.{key}"), data))
+
+        for elem in ["node", "domain", "network", "osd", "pool", "volume", "snapshot"]:
+            for child in objects[elem]:
                 for ikey in self.keys(elem):
-                    kpath = f"{elem}.{ikey}"
-                    # Validate that the key exists for that child
-                    if not zkhandler.zk_conn.exists(self.path(kpath, child)):
-                        if logger is not None:
-                            logger.out(
-                                f"Key not found: {self.path(kpath, child)}", state="w"
-                            )
-                        result = False
-
-                    # Continue for child keys under network (reservation, acl)
-                    if elem in ["network"] and ikey in [
-                        "reservation",
-                        "rule.in",
-                        "rule.out",
-                    ]:
-                        if ikey in ["rule.in", "rule.out"]:
-                            sikey = "rule"
-                        else:
-                            sikey = ikey
-                        npath = self.path(f"{elem}.{ikey}", child)
-                        for nchild in zkhandler.zk_conn.get_children(npath):
-                            nkpath = f"{npath}/{nchild}"
-                            for esikey in self.keys(sikey):
-                                nkipath = f"{nkpath}/{esikey}"
-                                if not zkhandler.zk_conn.exists(nkipath):
-                                    result = False
-
-                    # One might expect child keys under node (specifically, sriov.pf, sriov.vf,
-                    # monitoring.data) to be managed here as well, but those are created
-                    # automatically every time pvcnoded started and thus never need to be validated
-                    # or applied.
-
-        # These two have several children layers that must be parsed through
-        for elem in ["volume"]:
-            # First read all the subelements of the key class (pool layer)
-            for pchild in zkhandler.zk_conn.get_children(self.path(f"base.{elem}")):
-                # Finally read all the subelements of the key class (volume layer)
-                for vchild in zkhandler.zk_conn.get_children(
-                    self.path(f"base.{elem}") + f"/{pchild}"
-                ):
-                    child = f"{pchild}/{vchild}"
-                    # For each key in the schema for that particular elem
-                    for ikey in self.keys(elem):
-                        kpath = f"{elem}.{ikey}"
-                        # Validate that the key exists for that child
-                        if not zkhandler.zk_conn.exists(self.path(kpath, child)):
-                            if logger is not None:
-                                logger.out(
-                                    f"Key not found: {self.path(kpath, child)}",
-                                    state="w",
-                                )
-                            result = False
-
-        for elem in ["snapshot"]:
-            # First read all the subelements of the key class (pool layer)
-            for pchild in zkhandler.zk_conn.get_children(self.path(f"base.{elem}")):
-                # Next read all the subelements of the key class (volume layer)
-                for vchild in zkhandler.zk_conn.get_children(
-                    self.path(f"base.{elem}") + f"/{pchild}"
-                ):
-                    # Finally read all the subelements of the key class (volume layer)
-                    for schild in zkhandler.zk_conn.get_children(
-                        self.path(f"base.{elem}") + f"/{pchild}/{vchild}"
-                    ):
-                        child = f"{pchild}/{vchild}/{schild}"
-                        # For each key in the schema for that particular elem
-                        for ikey in self.keys(elem):
-                            kpath = f"{elem}.{ikey}"
-                            # Validate that the key exists for that child
-                            if not zkhandler.zk_conn.exists(self.path(kpath, child)):
-                                if logger is not None:
-                                    logger.out(
-                                        f"Key not found: {self.path(kpath, child)}",
-                                        state="w",
-                                    )
-                                result = False
-
-        return result
-
-    # Apply the current schema to the cluster
-    def apply(self, zkhandler):
-        # Walk the entire tree checking our schema
-        for elem in ["base"]:
-            for key in self.keys(elem):
-                kpath = f"{elem}.{key}"
-                if not zkhandler.zk_conn.exists(self.path(kpath)):
-                    # Ensure that we create base.schema.version with the current valid version value
-                    if kpath == "base.schema.version":
-                        data = str(self.version)
-                    else:
-                        data = ""
-                    zkhandler.zk_conn.create(
-                        self.path(kpath), data.encode(zkhandler.encoding)
+                    expected_keys.append(
+                        (
+                            self.path(f"{elem}.{ikey}", child),
+                            self.default_data(elem, ikey),
+                        )
                     )
 
-        for elem in ["node", "domain", "network", "osd", "pool"]:
-            # First read all the subelements of the key class
-            for child in zkhandler.zk_conn.get_children(self.path(f"base.{elem}")):
-                # For each key in the schema for that particular elem
-                for ikey in self.keys(elem):
-                    kpath = f"{elem}.{ikey}"
-                    # Validate that the key exists for that child
-                    if not zkhandler.zk_conn.exists(self.path(kpath, child)):
-                        if elem == "osd" and ikey == "is_split":
-                            default_data = "False"
-                        elif elem == "pool" and ikey == "tier":
-                            default_data = "default"
-                        elif elem == "domain" and ikey == "meta.migrate_max_downtime":
-                            default_data = "300"
-                        else:
-                            default_data = ""
-                        zkhandler.zk_conn.create(
-                            self.path(kpath, child),
-                            default_data.encode(zkhandler.encoding),
+        # Continue for child keys under network (reservation, acl)
+        entry_paths = dict()
+        for child in objects["network"]:
+            for ikey, sikey in [
+                ("reservation", "reservation"),
+                ("rule.in", "rule"),
+                ("rule.out", "rule"),
+            ]:
+                entry_paths[self.path(f"network.{ikey}", child)] = sikey
+        for npath, nchildren in self._get_children_many(
+            zkhandler, list(entry_paths.keys())
+        ).items():
+            sikey = entry_paths[npath]
+            for nchild in nchildren:
+                for esikey, esipath in self.schema.get(sikey).items():
+                    if not esipath:
+                        # This is the root key of the entry
+                        continue
+                    expected_keys.append((f"{npath}/{nchild}{esipath}", ""))
+
+        # One might expect child keys under node (specifically, sriov.pf, sriov.vf, monitoring.data)
+        # to be managed here as well, but those are created automatically every time pvcnoded starts
+        # and thus never need to be validated or applied.
+
+        return expected_keys
+
+    # Get the changes required to bring a cluster in line with the schema, as a list of
+    # (path, data, version) tuples; keys with a version of None are to be created, others updated
+    def get_changes(self, zkhandler):
+        objects = self._get_objects(zkhandler)
+        expected_keys = self._get_expected_keys(zkhandler, objects)
+
+        # Check the existence of every key at once, rather than one at a time
+        requests = [
+            (path, data, zkhandler.zk_conn.exists_async(path))
+            for path, data in expected_keys
+        ]
+        changes = [
+            (path, data, None)
+            for path, data, request in requests
+            if request.get() is None
+        ]
+
+        # Check that each existing packed document contains all of its fields
+        missing_paths = set(path for path, _, _ in changes)
+        requests = list()
+        for elem in ["node", "domain"]:
+            for document, fields in self.packed(elem).items():
+                for child in objects[elem]:
+                    document_path = self.path(f"{elem}.{document}", child)
+                    if document_path in missing_paths:
+                        continue
+                    requests.append(
+                        (
+                            elem,
+                            fields,
+                            document_path,
+                            zkhandler.zk_conn.get_async(document_path),
                         )
+                    )
+        for elem, fields, document_path, request in requests:
+            try:
+                data, stat = request.get()
+            except NoNodeError:
+                continue
+            document_data = load_document(data.decode(zkhandler.encoding))
+            missing_fields = [f for f in fields if f not in document_data]
+            if not missing_fields:
+                continue
+            for field in missing_fields:
+                document_data[field] = self.default_data(elem, field)
+            changes.append((document_path, json.dumps(document_data), stat.version))
 
-                    # Continue for child keys under network (reservation, acl)
-                    if elem in ["network"] and ikey in [
-                        "reservation",
-                        "rule.in",
-                        "rule.out",
-                    ]:
-                        if ikey in ["rule.in", "rule.out"]:
-                            sikey = "rule"
-                        else:
-                            sikey = ikey
-                        npath = self.path(f"{elem}.{ikey}", child)
-                        for nchild in zkhandler.zk_conn.get_children(npath):
-                            nkpath = f"{npath}/{nchild}"
-                            for esikey in self.keys(sikey):
-                                nkipath = f"{nkpath}/{esikey}"
-                                if not zkhandler.zk_conn.exists(nkipath):
-                                    zkhandler.zk_conn.create(
-                                        nkipath, "".encode(zkhandler.encoding)
-                                    )
-
-                    # One might expect child keys under node (specifically, sriov.pf and sriov.vf) to be
-                    # managed here as well, but those are created automatically every time pvcnoded starts
-                    # and thus never need to be validated or applied.
-
-        # These two have several children layers that must be parsed through
-        for elem in ["volume"]:
-            # First read all the subelements of the key class (pool layer)
-            for pchild in zkhandler.zk_conn.get_children(self.path(f"base.{elem}")):
-                # Finally read all the subelements of the key class (volume layer)
-                for vchild in zkhandler.zk_conn.get_children(
-                    self.path(f"base.{elem}") + f"/{pchild}"
-                ):
-                    child = f"{pchild}/{vchild}"
-                    # For each key in the schema for that particular elem
-                    for ikey in self.keys(elem):
-                        kpath = f"{elem}.{ikey}"
-                        # Validate that the key exists for that child
-                        if not zkhandler.zk_conn.exists(self.path(kpath, child)):
+        return (
+            changes,
+            sum(len(children) for children in objects.values()),
+            len(expected_keys),
+        )
+
+    # Validate an active schema against a Zookeeper cluster
+    def validate(self, zkhandler, logger=None):
+        return self.apply(zkhandler, dry_run=True, logger=logger) == 0
+
+    # Apply the current schema to the cluster, returning the number of changes made (or required,
+    # in dry-run mode)
+    def apply(self, zkhandler, dry_run=False, logger=None):
+        start_time = time.time()
+        changes, object_count, key_count = self.get_changes(zkhandler)
+        check_time = time.time() - start_time
+
+        if dry_run and logger is not None:
+            for path, data, version in changes:
+                if version is None:
+                    logger.out(f"Key not found: {path}", state="w")
+                else:
+                    logger.out(f"Key fields not found: {path}", state="w")
+
+        if not dry_run:
+            # Make the changes in batched transactions; if a batch fails (e.g. because a daemon
+            # created one of its keys concurrently), make its changes one at a time instead
+            for idx in range(0, len(changes), APPLY_BATCH_SIZE):
+                batch = changes[idx : idx + APPLY_BATCH_SIZE]
+                transaction = zkhandler.zk_conn.transaction()
+                for path, data, version in batch:
+                    if version is None:
+                        transaction.create(path, data.encode(zkhandler.encoding))
+                    else:
+                        transaction.set_data(
+                            path, data.encode(zkhandler.encoding), version=version
+                        )
+                results = transaction.commit()
+                if not any(isinstance(result, Exception) for result in results):
+                    continue
+
+                for path, data, version in batch:
+                    try:
+                        if version is None:
                             zkhandler.zk_conn.create(
-                                self.path(kpath, child), "".encode(zkhandler.encoding)
+                                path, data.encode(zkhandler.encoding)
+                            )
+                        else:
+                            zkhandler.zk_conn.set(
+                                path, data.encode(zkhandler.encoding), version=version
                             )
+                    except (NodeExistsError, NoNodeError, BadVersionError):
+                        continue
+
+        if logger is not None:
+            action = "Found" if dry_run else "Applied"
+            logger.out(
+                f"{action} {len(changes)} schema changes for {key_count} keys of {object_count} objects "
+                f"in {time.time() - start_time:.2f}s ({check_time:.2f}s checking)",
+                state="i",
+            )
 
-        for elem in ["snapshot"]:
-            # First read all the subelements of the key class (pool layer)
-            for pchild in zkhandler.zk_conn.get_children(self.path(f"base.{elem}")):
-                # Next read all the subelements of the key class (volume layer)
-                for vchild in zkhandler.zk_conn.get_children(
-                    self.path(f"base.{elem}") + f"/{pchild}"
-                ):
-                    # Finally read all the subelements of the key class (volume layer)
-                    for schild in zkhandler.zk_conn.get_children(
-                        self.path(f"base.{elem}") + f"/{pchild}/{vchild}"
-                    ):
-                        child = f"{pchild}/{vchild}/{schild}"
-                        # For each key in the schema for that particular elem
-                        for ikey in self.keys(elem):
-                            kpath = f"{elem}.{ikey}"
-                            # Validate that the key exists for that child
-                            if not zkhandler.zk_conn.exists(self.path(kpath, child)):
-                                zkhandler.zk_conn.create(
-                                    self.path(kpath, child),
-                                    "".encode(zkhandler.encoding),
-                                )
+        return len(changes)
 
     # Migrate key diffs
     def run_migrate(self, zkhandler, changes):
@@ -1133,6 +1750,75 @@ class ZKSchema(object):
         zkhandler.delete(remove_tasks)
         zkhandler.rename(rename_tasks)
 
+        for key, pack in changes.get("pack", dict()).items():
+            self.run_pack(zkhandler, key.split(".")[0], pack["path"], pack["fields"])
+        for key, unpack in changes.get("unpack", dict()).items():
+            self.run_unpack(
+                zkhandler, key.split(".")[0], unpack["path"], unpack["fields"]
+            )
+
+    # Pack individual keys into a document on every instance of a schema location; the fields
+    # are merged into any existing document, so packing an object again changes nothing
+    def run_pack(self, zkhandler, itype, document_path, fields):
+        for object_path in self.packed_objects(zkhandler, itype):
+            # The document may replace a former parent key of the fields (e.g. sriov_vf.pci)
+            try:
+                data, stat = zkhandler.zk_conn.get(f"{object_path}{document_path}")
+                document_data = load_document(data.decode(zkhandler.encoding))
+            except NoNodeError:
+                stat = None
+                document_data = dict()
+
+            transaction = zkhandler.zk_conn.transaction()
+            field_count = 0
+            for field, field_path in fields.items():
+                try:
+                    data = zkhandler.zk_conn.get(f"{object_path}{field_path}")[0]
+                except NoNodeError:
+                    continue
+                document_data[field] = data.decode(zkhandler.encoding)
+                transaction.delete(f"{object_path}{field_path}")
+                field_count += 1
+
+            if stat is not None and field_count < 1:
+                continue
+
+            data = json.dumps(document_data).encode(zkhandler.encoding)
+            if stat is not None:
+                transaction.set_data(
+                    f"{object_path}{document_path}", data, version=stat.version
+                )
+            else:
+                transaction.create(f"{object_path}{document_path}", data)
+            transaction.commit()
+
+    # Unpack a document into individual keys on every instance of a schema location
+    def run_unpack(self, zkhandler, itype, document_path, fields):
+        # Keep the document key if it becomes the parent key of the fields (e.g. sriov_vf.pci)
+        is_parent = any(
+            field_path.startswith(f"{document_path}/") for field_path in fields.values()
+        )
+        for object_path in self.packed_objects(zkhandler, itype):
+            try:
+                data = zkhandler.zk_conn.get(f"{object_path}{document_path}")[0]
+            except NoNodeError:
+                continue
+            document_data = load_document(data.decode(zkhandler.encoding))
+
+            transaction = zkhandler.zk_conn.transaction()
+            if is_parent:
+                transaction.set_data(f"{object_path}{document_path}", b"")
+            for field, field_path in fields.items():
+                transaction.create(
+                    f"{object_path}{field_path}",
+                    document_data.get(field, self.default_data(itype, field)).encode(
+                        zkhandler.encoding
+                    ),
+                )
+            if not is_parent:
+                transaction.delete(f"{object_path}{document_path}")
+            transaction.commit()
+
     # Migrate from older to newer schema
     def migrate(self, zkhandler, new_version):
         # Determine the versions in between
@@ -1140,14 +1826,18 @@ class ZKSchema(object):
         if versions is None:
             return
 
-        for version in versions:
+        # Each version is compared against the one before it, so each change is applied once
+        zkschema_base = self
+        for version in sorted(versions):
             # Create a new schema at that version
             zkschema_new = ZKSchema()
+            zkschema_new.schema_path = self.schema_path
             zkschema_new.load(version)
             # Get a list of changes
-            changes = ZKSchema.key_diff(self, zkschema_new)
+            changes = ZKSchema.key_diff(zkschema_base, zkschema_new)
             # Apply those changes
             self.run_migrate(zkhandler, changes)
+            zkschema_base = zkschema_new
 
     # Rollback from newer to older schema
     def rollback(self, zkhandler, old_version):
@@ -1156,16 +1846,18 @@ class ZKSchema(object):
         if versions is None:
             return
 
-        versions.reverse()
-
-        for version in versions:
+        # Each version is compared against the one after it, so each change is applied once
+        zkschema_base = self
+        for version in sorted(versions, reverse=True):
             # Create a new schema at that version
             zkschema_old = ZKSchema()
+            zkschema_old.schema_path = self.schema_path
             zkschema_old.load(version)
             # Get a list of changes
-            changes = ZKSchema.key_diff(self, zkschema_old)
+            changes = ZKSchema.key_diff(zkschema_base, zkschema_old)
             # Apply those changes
             self.run_migrate(zkhandler, changes)
+            zkschema_base = zkschema_old
 
     # Write the latest schema to a file
     def write(self):
@@ -1216,7 +1908,54 @@ class ZKSchema(object):
                         "to": schema_b.path(elem_item),
                     }
 
-        return {"add": diff_add, "remove": diff_remove, "rename": diff_rename}
+        # Packed documents and their fields are moved by packing and unpacking the existing data of
+        # each object, rather than by adding and removing keys
+        diff_pack = dict()
+        diff_unpack = dict()
+
+        for elem in set(schema_a.schema.get("packed", dict()).keys()) | set(
+            schema_b.schema.get("packed", dict()).keys()
+        ):
+            for document, fields in schema_b.packed(elem).items():
+                if document in schema_a.packed(elem):
+                    continue
+                diff_pack[f"{elem}.{document}"] = {
+                    "path": schema_b.schema[elem][document],
+                    "fields": {
+                        field: schema_a.schema[elem][field]
+                        for field in fields
+                        if field in schema_a.schema[elem]
+                    },
+                }
+
+            for document, fields in schema_a.packed(elem).items():
+                if document in schema_b.packed(elem):
+                    continue
+                diff_unpack[f"{elem}.{document}"] = {
+                    "path": schema_a.schema[elem][document],
+                    "fields": {
+                        field: schema_b.schema[elem][field]
+                        for field in fields
+                        if field in schema_b.schema[elem]
+                    },
+                }
+
+        for changes in [diff_pack, diff_unpack]:
+            for key, change in changes.items():
+                elem = key.split(".")[0]
+                diff_add.pop(key, None)
+                diff_remove.pop(key, None)
+                for field in change["fields"]:
+                    diff_add.pop(f"{elem}.{field}", None)
+                    diff_remove.pop(f"{elem}.{field}", None)
+
+        return {
+            "add": diff_add,
+            "remove": diff_remove,
+            "rename": diff_rename,
+            "pack": diff_pack,
+            "unpack": diff_unpack,
+        }
 
     # Static methods for reading information from the files
     def find_all(self, start=0, end=None):
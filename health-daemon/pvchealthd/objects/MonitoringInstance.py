@@ -20,6 +20,8 @@
 ###############################################################################
 
 import concurrent.futures
+import copy
+import multiprocessing
 import time
 import importlib.util
 
@@ -28,7 +30,26 @@ from datetime import datetime
 from json import dumps, loads
 from apscheduler.schedulers.background import BackgroundScheduler
 
-from daemon_lib.faults import generate_fault
+from daemon_lib.faults import generate_faults
+from daemon_lib.ceph import reconcile_snapshot_counts
+
+
+# The upper bounds, in seconds, of the plugin runtime histogram buckets
+RUNTIME_HISTOGRAM_BUCKETS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120]
+
+# Plugin results remain valid for this many plugin intervals (and at least until the run after
+# them has timed out), so a single slow or failed run does not change the node health
+RESULT_EXPIRY_INTERVALS = 3
+
+# The health delta of a plugin whose last result has expired without a new result
+EXPIRED_HEALTH_DELTA = 10
+
+# Unchanged faults are only rewritten to update their last reported time at this interval
+FAULT_REFRESH_INTERVAL = 300
+
+# The interval, in seconds, at which the primary node corrects any drift in the cluster aggregate
+# counters used by the cluster status
+COUNTER_RECONCILE_INTERVAL = 3600
 
 
 class PluginError(Exception):
@@ -51,6 +72,7 @@ class PluginResult(object):
         self.message = "N/A"
         self.data = {}
         self.runtime = "0.00"
+        self.runtime_histogram = None
 
     def set_health_delta(self, new_delta):
         self.health_delta = new_delta
@@ -64,65 +86,89 @@ class PluginResult(object):
     def set_runtime(self, new_runtime):
         self.runtime = new_runtime
 
+    def set_current_time(self, new_current_time):
+        self.current_time = new_current_time
+
+    def set_runtime_histogram(self, new_runtime_histogram):
+        self.runtime_histogram = new_runtime_histogram
+
     def to_zookeeper(self):
-        self.zkhandler.write(
-            [
+        writes = [
+            (
                 (
-                    (
-                        "node.monitoring.data",
-                        self.this_node.name,
-                        "monitoring_plugin.name",
-                        self.plugin_name,
-                    ),
+                    "node.monitoring.data",
+                    self.this_node.name,
+                    "monitoring_plugin.name",
                     self.plugin_name,
                 ),
+                self.plugin_name,
+            ),
+            (
                 (
-                    (
-                        "node.monitoring.data",
-                        self.this_node.name,
-                        "monitoring_plugin.last_run",
-                        self.plugin_name,
-                    ),
-                    self.current_time,
+                    "node.monitoring.data",
+                    self.this_node.name,
+                    "monitoring_plugin.last_run",
+                    self.plugin_name,
                 ),
+                self.current_time,
+            ),
+            (
                 (
-                    (
-                        "node.monitoring.data",
-                        self.this_node.name,
-                        "monitoring_plugin.health_delta",
-                        self.plugin_name,
-                    ),
-                    self.health_delta,
+                    "node.monitoring.data",
+                    self.this_node.name,
+                    "monitoring_plugin.health_delta",
+                    self.plugin_name,
                 ),
+                self.health_delta,
+            ),
+            (
                 (
-                    (
-                        "node.monitoring.data",
-                        self.this_node.name,
-                        "monitoring_plugin.message",
-                        self.plugin_name,
-                    ),
-                    self.message,
+                    "node.monitoring.data",
+                    self.this_node.name,
+                    "monitoring_plugin.message",
+                    self.plugin_name,
                 ),
+                self.message,
+            ),
+            (
                 (
-                    (
-                        "node.monitoring.data",
-                        self.this_node.name,
-                        "monitoring_plugin.data",
-                        self.plugin_name,
-                    ),
-                    dumps(self.data),
+                    "node.monitoring.data",
+                    self.this_node.name,
+                    "monitoring_plugin.data",
+                    self.plugin_name,
+                ),
+                dumps(self.data),
+            ),
+            (
+                (
+                    "node.monitoring.data",
+                    self.this_node.name,
+                    "monitoring_plugin.runtime",
+                    self.plugin_name,
                 ),
+                self.runtime,
+            ),
+        ]
+
+        # Runtime histograms are only written once the active schema supports them
+        if (
+            self.runtime_histogram is not None
+            and self.zkhandler.schema.path("monitoring_plugin.runtime_histogram")
+            is not None
+        ):
+            writes.append(
                 (
                     (
                         "node.monitoring.data",
                         self.this_node.name,
-                        "monitoring_plugin.runtime",
+                        "monitoring_plugin.runtime_histogram",
                         self.plugin_name,
                     ),
-                    self.runtime,
-                ),
-            ]
-        )
+                    dumps(self.runtime_histogram),
+                )
+            )
+
+        self.zkhandler.write(writes)
 
 
 class MonitoringPlugin(object):
@@ -133,6 +179,11 @@ class MonitoringPlugin(object):
         self.this_node = this_node
         self.plugin_name = plugin_name
 
+        # The minimum interval between runs of the plugin, and the time after which a run is
+        # abandoned, in seconds; set from the PLUGIN_INTERVAL and PLUGIN_TIMEOUT of the plugin script
+        self.interval = int(self.config["monitoring_interval"])
+        self.timeout = int(self.config["monitoring_plugin_timeout"])
+
         self.plugin_result = PluginResult(
             self.zkhandler,
             self.config,
@@ -196,66 +247,67 @@ class MonitoringInstance(object):
         self.logger = logger
         self.this_node = this_node
         self.faults = 0
+        self.previous_faults = dict()
 
-        # Create functions for each fault type
-        def get_node_daemon_states():
+        # Create functions for each fault type; each takes a snapshot from get_fault_snapshot
+        def get_node_daemon_states(snapshot):
             node_daemon_states = [
                 {
                     "entry": node,
-                    "check": self.zkhandler.read(("node.state.daemon", node)),
+                    "check": snapshot["values"][("node.state.daemon", node)],
                     "details": None,
                 }
-                for node in self.zkhandler.children("base.node")
+                for node in snapshot["nodes"]
             ]
             return node_daemon_states
 
-        def get_osd_in_states():
+        def get_osd_in_states(snapshot):
             osd_in_states = [
                 {
                     "entry": osd,
-                    "check": loads(self.zkhandler.read(("osd.stats", osd))).get(
+                    "check": loads(snapshot["values"][("osd.stats", osd)] or "{}").get(
                         "in", 0
                     ),
                     "details": None,
                 }
-                for osd in self.zkhandler.children("base.osd")
+                for osd in snapshot["osds"]
             ]
             return osd_in_states
 
-        def get_ceph_health_entries():
+        def get_ceph_health_entries(snapshot):
             ceph_health_entries = [
                 {
                     "entry": key,
                     "check": value["severity"],
                     "details": value["summary"]["message"],
                 }
-                for key, value in loads(zkhandler.read("base.storage.health"))[
+                for key, value in loads(snapshot["values"]["base.storage.health"])[
                     "checks"
                 ].items()
             ]
             return ceph_health_entries
 
-        def get_vm_states():
+        def get_vm_states(snapshot):
             vm_states = [
                 {
-                    "entry": self.zkhandler.read(("domain.name", domain)),
-                    "check": self.zkhandler.read(("domain.state", domain)),
-                    "details": self.zkhandler.read(("domain.failed_reason", domain)),
+                    "entry": snapshot["values"][("domain.name", domain)],
+                    "check": snapshot["values"][("domain.state", domain)],
+                    "details": snapshot["values"][("domain.failed_reason", domain)],
                 }
-                for domain in self.zkhandler.children("base.domain")
+                for domain in snapshot["domains"]
             ]
             return vm_states
 
-        def get_overprovisioned_memory():
-            all_nodes = self.zkhandler.children("base.node")
+        def get_overprovisioned_memory(snapshot):
+            all_nodes = snapshot["nodes"]
             current_memory_provisioned = sum(
                 [
-                    int(self.zkhandler.read(("node.memory.allocated", node)))
+                    int(snapshot["values"][("node.memory.allocated", node)])
                     for node in all_nodes
                 ]
             )
             node_memory_totals = [
-                int(self.zkhandler.read(("node.memory.total", node)))
+                int(snapshot["values"][("node.memory.total", node)])
                 for node in all_nodes
             ]
             total_node_memory = sum(node_memory_totals)
@@ -328,6 +380,8 @@ class MonitoringInstance(object):
 
         self.all_plugins = list()
         self.all_plugin_names = list()
+        self.plugin_states = dict()
+        self.plugin_executor = None
 
         successful_plugins = 0
 
@@ -352,6 +406,14 @@ class MonitoringInstance(object):
                     self.this_node,
                     plugin_script.PLUGIN_NAME,
                 )
+                # Plugins never run more often than the monitoring interval
+                plugin.interval = max(
+                    int(getattr(plugin_script, "PLUGIN_INTERVAL", plugin.interval)),
+                    int(self.config["monitoring_interval"]),
+                )
+                plugin.timeout = int(
+                    getattr(plugin_script, "PLUGIN_TIMEOUT", plugin.timeout)
+                )
 
                 failed_setup = plugin.setup()
                 if failed_setup is not None:
@@ -468,6 +530,26 @@ class MonitoringInstance(object):
                         )
                     )
 
+        # Each plugin has at most one run in progress, so one worker per plugin never queues a run
+        self.plugin_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=len(self.all_plugins), thread_name_prefix="plugin"
+        )
+        for plugin in self.all_plugins:
+            self.plugin_states[plugin.plugin_name] = {
+                "future": None,
+                "started": None,
+                "next_run": 0,
+                "timed_out": False,
+                "result": None,
+                "expires": None,
+                "runtime_histogram": {
+                    "bounds": RUNTIME_HISTOGRAM_BUCKETS,
+                    "buckets": [0 for _ in RUNTIME_HISTOGRAM_BUCKETS],
+                    "count": 0,
+                    "sum": 0.0,
+                },
+            }
+
         self.start_timer()
 
     def __del__(self):
@@ -475,6 +557,9 @@ class MonitoringInstance(object):
 
     def shutdown(self):
         self.stop_timer()
+        if self.plugin_executor is not None:
+            # Hung plugin runs are abandoned rather than waited for
+            self.plugin_executor.shutdown(wait=False, cancel_futures=True)
         self.run_cleanups()
         return
 
@@ -487,6 +572,13 @@ class MonitoringInstance(object):
             trigger="interval",
             seconds=check_interval,
         )
+        # Run once immediately, so counters not yet set after a schema upgrade are set promptly
+        self.timer.add_job(
+            self.run_counter_reconcile,
+            trigger="interval",
+            seconds=COUNTER_RECONCILE_INTERVAL,
+            next_run_time=datetime.now(),
+        )
 
         self.logger.out(
             f"Starting monitoring check timer ({check_interval} second interval)",
@@ -503,12 +595,104 @@ class MonitoringInstance(object):
         except Exception:
             self.logger.out("Failed to stop monitoring check timer", state="w")
 
+    def run_counter_reconcile(self):
+        if self.this_node.coordinator_state != "primary":
+            return
+
+        try:
+            corrections = reconcile_snapshot_counts(self.zkhandler)
+        except Exception as e:
+            self.logger.out(
+                f"Failed to reconcile cluster aggregate counters: {e}", state="e"
+            )
+            return
+
+        for pool, old_count, new_count in corrections:
+            self.logger.out(
+                f"Corrected snapshot count of pool {pool} from {old_count} to {new_count}",
+                state="w",
+            )
+
+    def get_fault_snapshot(self):
+        """
+        Read every key used by the cluster fault checks in a single batch
+        """
+        nodes = self.zkhandler.children("base.node") or list()
+        osds = self.zkhandler.children("base.osd") or list()
+        domains = self.zkhandler.children("base.domain") or list()
+
+        keys = ["base.storage.health"]
+        for node in nodes:
+            keys += [
+                ("node.state.daemon", node),
+                ("node.memory.allocated", node),
+                ("node.memory.total", node),
+            ]
+        for osd in osds:
+            keys.append(("osd.stats", osd))
+        for domain in domains:
+            keys += [
+                ("domain.name", domain),
+                ("domain.state", domain),
+                ("domain.failed_reason", domain),
+            ]
+
+        return {
+            "nodes": nodes,
+            "osds": osds,
+            "domains": domains,
+            "values": dict(zip(keys, self.zkhandler.read_many(keys))),
+        }
+
+    def report_faults(self, source, new_faults):
+        """
+        Report the faults found by a check run of {source}, a dictionary of fault names to
+        (delta, message, details) tuples
+
+        If the faults found are identical to those of the previous run, nothing is written until
+        they are due to be refreshed; otherwise all changed faults are written in one transaction.
+        """
+        previous = self.previous_faults.get(source)
+        if (
+            previous is not None
+            and previous["faults"] == new_faults
+            and time.monotonic() < previous["reported"] + FAULT_REFRESH_INTERVAL
+        ):
+            return
+
+        fault_time = datetime.now()
+        reported = generate_faults(
+            self.zkhandler,
+            self.logger,
+            [
+                (fault_name, fault_time, fault_delta, fault_message, fault_details)
+                for fault_name, (
+                    fault_delta,
+                    fault_message,
+                    fault_details,
+                ) in new_faults.items()
+            ],
+            refresh_interval=FAULT_REFRESH_INTERVAL,
+        )
+
+        # Faults skipped (e.g. in maintenance mode) are reported again on the next run
+        if reported:
+            self.previous_faults[source] = {
+                "faults": new_faults,
+                "reported": time.monotonic(),
+            }
+        else:
+            self.previous_faults.pop(source, None)
+
     def run_faults(self, coordinator_state=None):
         self.logger.out(
             f"Starting cluster fault check run at {datetime.now()}",
             state="t",
         )
 
+        snapshot = self.get_fault_snapshot()
+
+        new_faults = dict()
         for fault_type in self.cluster_faults_map.keys():
             fault_data = self.cluster_faults_map[fault_type]
 
@@ -518,7 +702,7 @@ class MonitoringInstance(object):
                     state="t",
                 )
 
-            entries = fault_data["entries"]()
+            entries = fault_data["entries"](snapshot)
 
             self.logger.out(
                 f"Entries for fault check {fault_type}: {dumps(entries)}",
@@ -531,38 +715,130 @@ class MonitoringInstance(object):
                 details = _entry["details"]
                 for condition in fault_data["conditions"]:
                     if str(condition) == str(check):
-                        fault_time = datetime.now()
                         fault_delta = fault_data["delta"]
                         fault_name = fault_data["name"].format(entry=entry.upper())
                         fault_message = fault_data["message"].format(entry=entry)
-                        generate_fault(
-                            self.zkhandler,
-                            self.logger,
-                            fault_name,
-                            fault_time,
-                            fault_delta,
-                            fault_message,
-                            fault_details=details,
-                        )
+                        new_faults[fault_name] = (fault_delta, fault_message, details)
                         self.faults += 1
 
+        self.report_faults("cluster", new_faults)
+
+    def run_plugin_isolated(self, plugin):
+        """
+        Run a plugin in a forked child process, which is killed if it exceeds the plugin timeout
+
+        The child process cannot use the Zookeeper connection, and changes it makes to the plugin
+        object (other than to its result) do not persist between runs.
+        """
+
+        def run_child(conn):
+            try:
+                result = plugin.run(coordinator_state=self.this_node.coordinator_state)
+                conn.send((None, (result.health_delta, result.message, result.data)))
+            except Exception as e:
+                conn.send((f"{type(e).__name__}: {e}", None))
+            finally:
+                conn.close()
+
+        context = multiprocessing.get_context("fork")
+        parent_conn, child_conn = context.Pipe(duplex=False)
+        process = context.Process(target=run_child, args=(child_conn,), daemon=True)
+        process.start()
+        child_conn.close()
+
+        try:
+            if not parent_conn.poll(plugin.timeout):
+                process.kill()
+                raise TimeoutError(f"timed out after {plugin.timeout} seconds")
+            error, payload = parent_conn.recv()
+        except EOFError:
+            raise Exception(f"plugin process exited with code {process.exitcode}")
+        finally:
+            parent_conn.close()
+            process.join()
+
+        if error is not None:
+            raise Exception(error)
+
+        health_delta, message, data = payload
+        result = plugin.plugin_result
+        result.set_health_delta(health_delta)
+        result.set_message(message)
+        result.set_data(data)
+        return result
+
     def run_plugin(self, plugin):
         time_start = datetime.now()
         try:
-            result = plugin.run(coordinator_state=self.this_node.coordinator_state)
+            if self.config["monitoring_plugin_isolation"]:
+                result = self.run_plugin_isolated(plugin)
+            else:
+                result = plugin.run(coordinator_state=self.this_node.coordinator_state)
         except Exception as e:
             self.logger.out(
                 f"Monitoring plugin {plugin.plugin_name} failed: {type(e).__name__}: {e}",
                 state="e",
             )
             # Whatever it had, we try to return
-            return plugin.plugin_result
+            return plugin.plugin_result, None
         time_end = datetime.now()
         time_delta = time_end - time_start
         runtime = "{:0.02f}".format(time_delta.total_seconds())
         result.set_runtime(runtime)
+        result.set_current_time(int(time.time()))
+        return result, time_delta.total_seconds()
+
+    def observe_runtime(self, plugin, runtime):
+        runtime_histogram = self.plugin_states[plugin.plugin_name]["runtime_histogram"]
+        for idx, bucket in enumerate(RUNTIME_HISTOGRAM_BUCKETS):
+            if runtime <= bucket:
+                runtime_histogram["buckets"][idx] += 1
+        runtime_histogram["count"] += 1
+        runtime_histogram["sum"] = round(runtime_histogram["sum"] + runtime, 3)
+
+    def collect_plugin(self, plugin):
+        """
+        Store the result of a completed plugin run as the current result of the plugin, valid
+        until it expires, and write it to Zookeeper
+        """
+        state = self.plugin_states[plugin.plugin_name]
+        result, runtime = state["future"].result()
+        state["future"] = None
+        state["timed_out"] = False
+
+        if runtime is None:
+            # Failed runs are not cached; the previous result remains valid until it expires
+            if state["result"] is None:
+                state["result"] = copy.copy(result)
+                state["expires"] = time.monotonic() + plugin.interval
+            return
+
+        self.observe_runtime(plugin, runtime)
+        result.set_runtime_histogram(state["runtime_histogram"])
+        result.to_zookeeper()
+
+        # Cache a copy of the result, since the plugin reuses its result object for every run
+        state["result"] = copy.copy(result)
+        state["expires"] = time.monotonic() + max(
+            plugin.interval * RESULT_EXPIRY_INTERVALS, plugin.interval + plugin.timeout
+        )
+
+    def expire_plugin(self, plugin):
+        """
+        Replace the expired result of a plugin which has not completed a run in time
+        """
+        state = self.plugin_states[plugin.plugin_name]
+        result = copy.copy(plugin.plugin_result)
+        result.set_health_delta(EXPIRED_HEALTH_DELTA)
+        result.set_message(
+            f"No result since {datetime.fromtimestamp(state['result'].current_time)}; plugin runs are failing or timing out"
+        )
+        result.set_data({})
+        result.set_runtime_histogram(state["runtime_histogram"])
         result.to_zookeeper()
-        return result
+
+        state["result"] = result
+        state["expires"] = None
 
     def run_plugins(self, coordinator_state=None):
         self.logger.out(
@@ -570,28 +846,71 @@ class MonitoringInstance(object):
             state="t",
         )
 
+        # Start each plugin which is due to run and whose previous run has completed
+        run_start = time.monotonic()
+        started_plugins = list()
+        for plugin in self.all_plugins:
+            state = self.plugin_states[plugin.plugin_name]
+            if state["future"] is not None and state["future"].done():
+                # A late run from a previous check completed since then
+                self.collect_plugin(plugin)
+            if state["future"] is not None or run_start < state["next_run"]:
+                continue
+            state["future"] = self.plugin_executor.submit(self.run_plugin, plugin)
+            state["started"] = run_start
+            state["next_run"] = run_start + plugin.interval
+            started_plugins.append(plugin)
+
+        # Wait for the plugins started in this check, up to their timeouts but never beyond the
+        # monitoring interval; slower runs keep their worker and are collected by a later check
+        # once they complete, while the previous results of their plugins are used
+        wait_end = run_start + int(self.config["monitoring_interval"])
+        for plugin in started_plugins:
+            state = self.plugin_states[plugin.plugin_name]
+            wait_until = min(state["started"] + plugin.timeout, wait_end)
+            try:
+                state["future"].result(timeout=max(0, wait_until - time.monotonic()))
+            except concurrent.futures.TimeoutError:
+                continue
+            self.collect_plugin(plugin)
+
         total_health = 100
-        plugin_results = list()
-        with concurrent.futures.ThreadPoolExecutor(max_workers=99) as executor:
-            to_future_plugin_results = {
-                executor.submit(self.run_plugin, plugin): plugin
-                for plugin in self.all_plugins
-            }
-            for future in concurrent.futures.as_completed(to_future_plugin_results):
-                plugin_results.append(future.result())
+        new_faults = dict()
+        for plugin in sorted(self.all_plugins, key=lambda x: x.plugin_name):
+            state = self.plugin_states[plugin.plugin_name]
+
+            # Isolated plugin runs report their own timeouts when their process is killed
+            if (
+                state["future"] is not None
+                and not state["timed_out"]
+                and not self.config["monitoring_plugin_isolation"]
+            ):
+                if time.monotonic() > state["started"] + plugin.timeout:
+                    self.logger.out(
+                        f"Monitoring plugin {plugin.plugin_name} timed out after {plugin.timeout} seconds",
+                        state="e",
+                    )
+                    state["timed_out"] = True
+
+            if state["result"] is None:
+                # The plugin has not yet completed a run
+                continue
+            if state["expires"] is not None and time.monotonic() > state["expires"]:
+                self.expire_plugin(plugin)
+
+            result = state["result"]
+            cached = plugin not in started_plugins or state["future"] is not None
 
-        for result in sorted(plugin_results, key=lambda x: x.plugin_name):
             if self.config["log_monitoring_details"]:
                 self.logger.out(
                     result.message + f" [-{result.health_delta}]",
                     state="t",
-                    prefix=f"{result.plugin_name} ({result.runtime}s)",
+                    prefix=f"{result.plugin_name} ({'cached' if cached else result.runtime + 's'})",
                 )
 
             # Generate a cluster fault if the plugin is in a suboptimal state
             if result.health_delta > 0:
                 fault_name = f"NODE_PLUGIN_{result.plugin_name.upper()}_{self.this_node.name.upper()}"
-                fault_time = datetime.now()
 
                 # Map our check results to fault results
                 # These are not 1-to-1, as faults are cluster-wide.
@@ -602,19 +921,13 @@ class MonitoringInstance(object):
                 fault_message = (
                     f"{self.this_node.name} {result.plugin_name}: {result.message}"
                 )
-                generate_fault(
-                    self.zkhandler,
-                    self.logger,
-                    fault_name,
-                    fault_time,
-                    fault_delta,
-                    fault_message,
-                    fault_details=None,
-                )
+                new_faults[fault_name] = (fault_delta, fault_message, None)
                 self.faults += 1
 
                 total_health -= result.health_delta
 
+        self.report_faults("plugins", new_faults)
+
         if total_health < 0:
             total_health = 0
 
@@ -41,11 +41,6 @@ class NodeInstance(object):
         # Node resources
         self.health = 100
         self.active_domains_count = 0
-        self.provisioned_domains_count = 0
-        self.memused = 0
-        self.memfree = 0
-        self.memalloc = 0
-        self.vcpualloc = 0
 
         # Zookeeper handlers for changed states
         @self.zkhandler.zk_conn.DataWatch(
@@ -121,74 +116,6 @@ class NodeInstance(object):
             if data != self.health:
                 self.health = data
 
-        @self.zkhandler.zk_conn.DataWatch(
-            self.zkhandler.schema.path("node.memory.free", self.name)
-        )
-        def watch_node_memfree(data, stat, event=""):
-            if event and event.type == "DELETED":
-                # The key has been deleted after existing before; terminate this watcher
-                # because this class instance is about to be reaped in Daemon.py
-                return False
-
-            try:
-                data = data.decode("ascii")
-            except AttributeError:
-                data = 0
-
-            if data != self.memfree:
-                self.memfree = data
-
-        @self.zkhandler.zk_conn.DataWatch(
-            self.zkhandler.schema.path("node.memory.used", self.name)
-        )
-        def watch_node_memused(data, stat, event=""):
-            if event and event.type == "DELETED":
-                # The key has been deleted after existing before; terminate this watcher
-                # because this class instance is about to be reaped in Daemon.py
-                return False
-
-            try:
-                data = data.decode("ascii")
-            except AttributeError:
-                data = 0
-
-            if data != self.memused:
-                self.memused = data
-
-        @self.zkhandler.zk_conn.DataWatch(
-            self.zkhandler.schema.path("node.memory.allocated", self.name)
-        )
-        def watch_node_memalloc(data, stat, event=""):
-            if event and event.type == "DELETED":
-                # The key has been deleted after existing before; terminate this watcher
-                # because this class instance is about to be reaped in Daemon.py
-                return False
-
-            try:
-                data = data.decode("ascii")
-            except AttributeError:
-                data = 0
-
-            if data != self.memalloc:
-                self.memalloc = data
-
-        @self.zkhandler.zk_conn.DataWatch(
-            self.zkhandler.schema.path("node.vcpu.allocated", self.name)
-        )
-        def watch_node_vcpualloc(data, stat, event=""):
-            if event and event.type == "DELETED":
-                # The key has been deleted after existing before; terminate this watcher
-                # because this class instance is about to be reaped in Daemon.py
-                return False
-
-            try:
-                data = data.decode("ascii")
-            except AttributeError:
-                data = 0
-
-            if data != self.vcpualloc:
-                self.vcpualloc = data
-
         @self.zkhandler.zk_conn.DataWatch(
             self.zkhandler.schema.path("node.running_domains", self.name)
         )
@@ -205,20 +132,3 @@ class NodeInstance(object):
 
             if len(data) != self.active_domains_count:
                 self.active_domains_count = len(data)
-
-        @self.zkhandler.zk_conn.DataWatch(
-            self.zkhandler.schema.path("node.count.provisioned_domains", self.name)
-        )
-        def watch_node_domainscount(data, stat, event=""):
-            if event and event.type == "DELETED":
-                # The key has been deleted after existing before; terminate this watcher
-                # because this class instance is about to be reaped in Daemon.py
-                return False
-
-            try:
-                data = data.decode("ascii")
-            except AttributeError:
-                data = 0
-
-            if data != self.provisioned_domains_count:
-                self.provisioned_domains_count = data
@@ -94,7 +94,7 @@ def validate_schema(logger, zkhandler):
     # Validate our schema against the active version
     if not zkhandler.schema.validate(zkhandler, logger):
         logger.out("Found schema violations, applying", state="i")
-        zkhandler.schema.apply(zkhandler)
+        zkhandler.schema.apply(zkhandler, logger=logger)
     else:
         logger.out("Schema successfully validated", state="o")
 
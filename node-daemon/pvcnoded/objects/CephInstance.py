@@ -34,7 +34,6 @@ class CephOSDInstance(object):
         self.device = None
         self.vg = None
         self.lv = None
-        self.stats = dict()
 
         @self.zkhandler.zk_conn.DataWatch(
             self.zkhandler.schema.path("osd.node", self.osd_id)
@@ -53,23 +52,6 @@ class CephOSDInstance(object):
             if data and data != self.node:
                 self.node = data
 
-        @self.zkhandler.zk_conn.DataWatch(
-            self.zkhandler.schema.path("osd.stats", self.osd_id)
-        )
-        def watch_osd_stats(data, stat, event=""):
-            if event and event.type == "DELETED":
-                # The key has been deleted after existing before; terminate this watcher
-                # because this class instance is about to be reaped in Daemon.py
-                return False
-
-            try:
-                data = data.decode("ascii")
-            except AttributeError:
-                data = ""
-
-            if data and data != self.stats:
-                self.stats = json.loads(data)
-
         @self.zkhandler.zk_conn.DataWatch(
             self.zkhandler.schema.path("osd.device", self.osd_id)
         )
@@ -193,7 +175,6 @@ class CephPoolInstance(object):
         self.this_node = this_node
         self.name = name
         self.pgs = ""
-        self.stats = dict()
 
         @self.zkhandler.zk_conn.DataWatch(
             self.zkhandler.schema.path("pool.pgs", self.name)
@@ -212,23 +193,6 @@ class CephPoolInstance(object):
             if data and data != self.pgs:
                 self.pgs = data
 
-        @self.zkhandler.zk_conn.DataWatch(
-            self.zkhandler.schema.path("pool.stats", self.name)
-        )
-        def watch_pool_stats(data, stat, event=""):
-            if event and event.type == "DELETED":
-                # The key has been deleted after existing before; terminate this watcher
-                # because this class instance is about to be reaped in Daemon.py
-                return False
-
-            try:
-                data = data.decode("ascii")
-            except AttributeError:
-                data = ""
-
-            if data and data != self.stats:
-                self.stats = json.loads(data)
-
 
 class CephVolumeInstance(object):
     def __init__(self, zkhandler, logger, this_node, pool, name):
@@ -20,15 +20,25 @@
 ###############################################################################
 
 import time
-import dns.zone
+import dns.message
 import dns.query
+import dns.rdatatype
+import dns.zone
 import psycopg2
+import psycopg2.extras
 
-from threading import Thread, Event
+from threading import Thread, Event, Lock
 
 import daemon_lib.common as common
 
 
+# The port on which the dnsmasq instances of all networks answer zone queries and transfers
+DNSMASQ_PORT = 53
+
+# The types of record synchronized from the dnsmasq instances into the aggregator database
+SYNC_RECORD_TYPES = ("A", "AAAA")
+
+
 class DNSAggregatorInstance(object):
     # Initialization function
     def __init__(self, config, logger):
@@ -64,6 +74,11 @@ class DNSAggregatorInstance(object):
             del self.dns_networks[network]
             self.dns_axfr_daemon.update_networks(self.dns_networks)
 
+    # Synchronize the records of a network after a lease or reservation change
+    def sync_network(self, network):
+        if self.is_active and network in self.dns_networks:
+            self.dns_axfr_daemon.notify(network)
+
 
 class PowerDNSInstance(object):
     # Initialization function
@@ -264,6 +279,12 @@ class DNSNetworkInstance(object):
 
 
 class AXFRDaemonInstance(object):
+    # Seconds to wait after a change event before synchronizing, so that bursts of lease
+    # changes (e.g. a lease replacement, which deletes and recreates it) sync only once
+    sync_delay = 0.5
+    # Seconds between checks of the dnsmasq SOA serials, to catch changes without an event
+    serial_check_interval = 10
+
     # Initialization function
     def __init__(self, aggregator):
         self.aggregator = aggregator
@@ -271,17 +292,29 @@ class AXFRDaemonInstance(object):
         self.logger = self.aggregator.logger
         self.dns_networks = self.aggregator.dns_networks
         self.thread_stopper = Event()
+        self.sync_trigger = Event()
+        self.sync_lock = Lock()
+        self.sync_pending = set()
+        self.zone_serials = dict()
         self.thread = None
         self.sql_conn = None
 
     def update_networks(self, dns_networks):
         self.dns_networks = dns_networks
+        self.notify()
+
+    def notify(self, network=None):
+        """
+        Request a full synchronization of network, or of all networks if None, from the thread
+        """
+        with self.sync_lock:
+            if network is None:
+                self.sync_pending.update(self.dns_networks.keys())
+            else:
+                self.sync_pending.add(network)
+        self.sync_trigger.set()
 
-    def start(self):
-        # Create the thread
-        self.thread_stopper.clear()
-        self.thread = Thread(target=self.run, args=(), kwargs={})
-
+    def connect(self):
         # Start a local instance of the SQL connection
         # Trying to use the instance from the main DNS Aggregator can result in connection failures
         # after the leader transitions
@@ -295,281 +328,225 @@ class AXFRDaemonInstance(object):
             )
         )
 
+    def start(self):
+        # Create the thread
+        self.thread_stopper.clear()
+        self.zone_serials = dict()
+        self.thread = Thread(target=self.run, args=(), kwargs={})
+
+        self.connect()
+
         # Start the thread
         self.thread.start()
 
     def stop(self):
         self.thread_stopper.set()
+        self.sync_trigger.set()
+        if self.thread is not None:
+            self.thread.join(timeout=15)
+            self.thread = None
         if self.sql_conn:
             self.sql_conn.close()
             self.sql_conn = None
 
     def run(self):
         # Wait for all the DNSMASQ instances to actually start
-        time.sleep(5)
+        self.thread_stopper.wait(5)
+        self.notify()
 
         while not self.thread_stopper.is_set():
-            # We do this for each network
-            for network, instance in self.dns_networks.items():
-                # Set up our SQL cursor
-                try:
-                    sql_curs = self.sql_conn.cursor()
-                except Exception:
-                    time.sleep(0.5)
-                    continue
-
-                # Set up our basic variables
-                domain = network.domain
-                if network.ip4_gateway != "None":
-                    dnsmasq_ip = network.ip4_gateway
-                else:
-                    dnsmasq_ip = network.ip6_gateway
-
-                #
-                # Get an AXFR from the dnsmasq instance and list of records
-                #
-                try:
-                    axfr = dns.query.xfr(dnsmasq_ip, domain, lifetime=5.0)
-                    z = dns.zone.from_xfr(axfr)
-                    records_raw = [z[n].to_text(n) for n in z.nodes.keys()]
-                except Exception as e:
-                    self.logger.out(
-                        "{} {} ({})".format(e, dnsmasq_ip, domain),
-                        state="d",
-                        prefix="dns-aggregator",
-                    )
-                    continue
-
-                # Fix the formatting because it's useless
-                # reference: ['@ 600 IN SOA . . 4 1200 180 1209600 600\n@ 600 IN NS .', 'test3 600 IN A 10.1.1.203\ntest3 600 IN AAAA 2001:b23e:1113:0:5054:ff:fe5c:f131', etc.]
-                # We don't really care about dnsmasq's terrible SOA or NS records which are in [0]
-                string_records = "\n".join(records_raw[1:])
-                # Split into individual records
-                records_new = list()
-                for element in string_records.split("\n"):
-                    if element:
-                        record = element.split()
-                        # Handle space-containing data elements
-                        if domain not in record[0]:
-                            name = "{}.{}".format(record[0], domain)
-                        else:
-                            name = record[0]
-                        entry = "{} {} IN {} {}".format(
-                            name, record[1], record[3], " ".join(record[4:])
-                        )
-                        records_new.append(entry)
-
-                #
-                # Get the current zone from the database
-                #
-                try:
-                    sql_curs.execute("SELECT id FROM domains WHERE name=%s", (domain,))
-                    domain_id = sql_curs.fetchone()
-                    sql_curs.execute(
-                        "SELECT * FROM records WHERE domain_id=%s", (domain_id,)
-                    )
-                    results = list(sql_curs.fetchall())
-                    self.logger.out(
-                        "SQL query results: {}".format(results),
-                        state="d",
-                        prefix="dns-aggregator",
-                    )
-                except Exception as e:
-                    self.logger.out(
-                        "ERROR: Failed to obtain DNS records from database: {}".format(
-                            e
-                        )
-                    )
-
-                # Fix the formatting because it's useless for comparison
-                # reference: ((10, 28, 'testnet01.i.bonilan.net', 'SOA', 'nsX.pvc.local root.pvc.local 1 10800 1800 86400 86400', 86400, 0, None, 0, None, 1), etc.)
-                records_old = list()
-                records_old_ids = list()
-                if not results:
-                    self.logger.out(
-                        "No results found, skipping.",
-                        state="d",
-                        prefix="dns-aggregator",
-                    )
-                    continue
-                for record in results:
-                    # Skip the non-A
-                    r_id = record[0]
-                    r_name = record[2]
-                    r_ttl = record[5]
-                    r_type = record[3]
-                    r_data = record[4]
-                    # Assemble a list element in the same format as the AXFR data
-                    entry = "{} {} IN {} {}".format(r_name, r_ttl, r_type, r_data)
-                    self.logger.out(
-                        "Found record: {}".format(entry),
-                        state="d",
-                        prefix="dns-aggregator",
-                    )
-
-                    # Skip non-A or AAAA records
-                    if r_type != "A" and r_type != "AAAA":
-                        self.logger.out(
-                            'Skipping record {}, not A or AAAA: "{}"'.format(
-                                entry, r_type
-                            ),
-                            state="d",
-                            prefix="dns-aggregator",
-                        )
-                        continue
-
-                    records_old.append(entry)
-                    records_old_ids.append(r_id)
-
-                records_new.sort()
-                records_old.sort()
-
-                self.logger.out(
-                    "New: {}".format(records_new),
-                    state="d",
-                    prefix="dns-aggregator",
-                )
-                self.logger.out(
-                    "Old: {}".format(records_old),
-                    state="d",
-                    prefix="dns-aggregator",
-                )
+            if self.sync_trigger.wait(self.serial_check_interval):
+                self.thread_stopper.wait(self.sync_delay)
+            if self.thread_stopper.is_set():
+                break
+
+            with self.sync_lock:
+                self.sync_trigger.clear()
+                sync_pending = self.sync_pending
+                self.sync_pending = set()
+
+            # Networks with a pending event are always synchronized; the others only if the
+            # SOA serial of their dnsmasq instance changed since their last synchronization
+            for network in list(self.dns_networks.keys()):
+                if self.thread_stopper.is_set():
+                    break
+                self.sync_network(network, force=network in sync_pending)
+
+    def sync_network(self, network, force=False):
+        # Set up our basic variables
+        domain = network.domain
+        if network.ip4_gateway != "None":
+            dnsmasq_ip = network.ip4_gateway
+        else:
+            dnsmasq_ip = network.ip6_gateway
+
+        try:
+            if not force:
+                serial = get_zone_serial(dnsmasq_ip, domain, port=DNSMASQ_PORT)
+                if serial == self.zone_serials.get(domain):
+                    return
+            serial, records = get_zone_records(dnsmasq_ip, domain, port=DNSMASQ_PORT)
+        except Exception as e:
+            # Forget the serial so that the next check synchronizes the network in full
+            self.zone_serials.pop(domain, None)
+            self.logger.out(
+                "{} {} ({})".format(e, dnsmasq_ip, domain),
+                state="d",
+                prefix="dns-aggregator",
+            )
+            return
+
+        try:
+            if self.sql_conn is None or self.sql_conn.closed:
+                self.connect()
+            result = sync_zone_records(self.sql_conn, domain, records)
+        except Exception as e:
+            self.logger.out(
+                "ERROR: Failed to synchronize DNS records of {}: {}".format(domain, e),
+                state="e",
+            )
+            self.zone_serials.pop(domain, None)
+            try:
+                self.sql_conn.rollback()
+            except Exception:
+                self.sql_conn = None
+            return
+
+        if result is None:
+            self.logger.out(
+                "No domain entry found for {}, skipping.".format(domain),
+                state="d",
+                prefix="dns-aggregator",
+            )
+            return
+
+        self.zone_serials[domain] = serial
+        added, removed = result
+        if not added and not removed:
+            return
+
+        self.logger.out(
+            "Synchronized {} records of {}: {} added, {} removed".format(
+                len(records), domain, added, removed
+            ),
+            state="d",
+            prefix="dns-aggregator",
+        )
+
+        # Drop the cached answers for the zone and notify its secondaries of the new serial;
+        # the records themselves are read from the database and need no reload
+        for command in ["purge {}$".format(domain), "notify {}".format(domain)]:
+            common.run_os_command(
+                "/usr/bin/pdns_control --socket-dir={} {}".format(
+                    self.config["pdns_dynamic_directory"], command
+                ),
+                background=False,
+            )
+
+
+#
+# Zone synchronization functions
+#
+def get_zone_serial(dnsmasq_ip, domain, port=53, timeout=5.0):
+    """
+    Return the SOA serial of domain from the dnsmasq instance at dnsmasq_ip; dnsmasq increments
+    this serial on every lease change
+    """
+    query = dns.message.make_query(domain, dns.rdatatype.SOA)
+    response = dns.query.udp(query, dnsmasq_ip, port=port, timeout=timeout)
+    for rrset in response.answer:
+        if rrset.rdtype == dns.rdatatype.SOA:
+            return rrset[0].serial
+    raise ValueError("No SOA record in response")
+
+
+def get_zone_records(dnsmasq_ip, domain, port=53, lifetime=5.0):
+    """
+    Return a tuple of the SOA serial and the set of (name, ttl, type, content) tuples of the
+    SYNC_RECORD_TYPES records of domain, by AXFR from the dnsmasq instance at dnsmasq_ip
+    """
+    axfr = dns.query.xfr(
+        dnsmasq_ip, domain, port=port, lifetime=lifetime, relativize=False
+    )
+    zone = dns.zone.from_xfr(axfr, relativize=False)
+    serial = zone.get_soa().serial
+
+    records = set()
+    for name, ttl, rdata in zone.iterate_rdatas():
+        r_type = dns.rdatatype.to_text(rdata.rdtype)
+        if r_type not in SYNC_RECORD_TYPES:
+            continue
+        records.add(
+            (
+                name.to_text(omit_final_dot=True).lower(),
+                ttl,
+                r_type,
+                rdata.to_text(),
+            )
+        )
+    return serial, records
+
+
+def sync_zone_records(sql_conn, domain, records):
+    """
+    Replace the SYNC_RECORD_TYPES records of domain in the PowerDNS database with records, a set
+    of (name, ttl, type, content) tuples, and bump the domain SOA serial if anything changed
+
+    All changes are batched into a single transaction; returns a tuple of the number of records
+    added and removed, or None if the domain is not in the database.
+    """
+    sql_curs = sql_conn.cursor()
+    sql_curs.execute("SELECT id FROM domains WHERE name=%s", (domain,))
+    domain_id = sql_curs.fetchone()
+    if not domain_id:
+        sql_conn.rollback()
+        return None
+    domain_id = domain_id[0]
+
+    sql_curs.execute(
+        "SELECT id, name, ttl, type, content FROM records WHERE domain_id=%s AND type IN %s",
+        (domain_id, SYNC_RECORD_TYPES),
+    )
+    remove_ids = list()
+    records_old = set()
+    for r_id, r_name, r_ttl, r_type, r_content in sql_curs.fetchall():
+        record = (r_name, r_ttl, r_type, r_content)
+        # Remove records which are gone or changed, and any duplicates
+        if record not in records or record in records_old:
+            remove_ids.append((r_id,))
+        else:
+            records_old.add(record)
+    add_records = [
+        (domain_id, r_name, r_ttl, r_type, 0, r_content)
+        for r_name, r_ttl, r_type, r_content in sorted(records - records_old)
+    ]
+
+    if not remove_ids and not add_records:
+        sql_conn.rollback()
+        return 0, 0
+
+    psycopg2.extras.execute_batch(
+        sql_curs, "DELETE FROM records WHERE id=%s", remove_ids
+    )
+    psycopg2.extras.execute_batch(
+        sql_curs,
+        "INSERT INTO records (domain_id, name, ttl, type, prio, content) VALUES (%s, %s, %s, %s, %s, %s)",
+        add_records,
+    )
+
+    # Increase SOA serial
+    sql_curs.execute(
+        "SELECT content FROM records WHERE domain_id=%s AND type='SOA'",
+        (domain_id,),
+    )
+    soa_record = sql_curs.fetchone()
+    if soa_record:
+        soa_record = soa_record[0].split()
+        soa_record[2] = str(int(soa_record[2]) + 1)
+        sql_curs.execute(
+            "UPDATE records SET content=%s WHERE domain_id=%s AND type='SOA'",
+            (" ".join(soa_record), domain_id),
+        )
 
-                # Find the differences between the lists
-                # Basic check one: are they completely equal
-                if records_new != records_old:
-                    # Get set elements
-                    in_new = set(records_new)
-                    in_old = set(records_old)
-                    in_new_not_in_old = in_new - in_old
-                    in_old_not_in_new = in_old - in_new
-
-                    self.logger.out(
-                        "New but not old: {}".format(in_new_not_in_old),
-                        state="d",
-                        prefix="dns-aggregator",
-                    )
-                    self.logger.out(
-                        "Old but not new: {}".format(in_old_not_in_new),
-                        state="d",
-                        prefix="dns-aggregator",
-                    )
-
-                    # Go through the old list
-                    remove_records = list()  # list of database IDs
-                    for i in range(len(records_old)):
-                        record_id = records_old_ids[i]
-                        record = records_old[i]
-                        splitrecord = records_old[i].split()
-
-                        # If the record is not in the new list, remove it
-                        if record in in_old_not_in_new:
-                            remove_records.append(record_id)
-
-                        # Go through the new elements
-                        for newrecord in in_new_not_in_old:
-                            splitnewrecord = newrecord.split()
-                            # If there's a name and type match with different content, remove the old one
-                            if (
-                                splitrecord[0] == splitnewrecord[0]
-                                and splitrecord[3] == splitnewrecord[3]
-                            ):
-                                remove_records.append(record_id)
-
-                    changed = False
-                    if len(remove_records) > 0:
-                        # Remove the invalid old records
-                        for record_id in remove_records:
-                            self.logger.out(
-                                "Removing record: {}".format(record_id),
-                                state="d",
-                                prefix="dns-aggregator",
-                            )
-                            sql_curs.execute(
-                                "DELETE FROM records WHERE id=%s", (record_id,)
-                            )
-                            changed = True
-
-                    if len(in_new_not_in_old) > 0:
-                        # Add the new records
-                        for record in in_new_not_in_old:
-                            # [NAME, TTL, 'IN', TYPE, DATA]
-                            record = record.split()
-                            r_name = record[0]
-                            r_ttl = record[1]
-                            r_type = record[3]
-                            r_data = record[4]
-                            self.logger.out(
-                                "Add record: {}".format(name),
-                                state="d",
-                                prefix="dns-aggregator",
-                            )
-                            try:
-                                sql_curs.execute(
-                                    "INSERT INTO records (domain_id, name, ttl, type, prio, content) VALUES (%s, %s, %s, %s, %s, %s)",
-                                    (domain_id, r_name, r_ttl, r_type, 0, r_data),
-                                )
-                                changed = True
-                            except psycopg2.IntegrityError as e:
-                                self.logger.out(
-                                    "Failed to add record due to {}: {}".format(
-                                        e, name
-                                    ),
-                                    state="d",
-                                    prefix="dns-aggregator",
-                                )
-                            except psycopg2.errors.InFailedSqlTransaction as e:
-                                self.logger.out(
-                                    "Failed to add record due to {}: {}".format(
-                                        e, name
-                                    ),
-                                    state="d",
-                                    prefix="dns-aggregator",
-                                )
-
-                    if changed:
-                        # Increase SOA serial
-                        sql_curs.execute(
-                            "SELECT content FROM records WHERE domain_id=%s AND type='SOA'",
-                            (domain_id,),
-                        )
-                        soa_record = list(sql_curs.fetchone())[0].split()
-                        current_serial = int(soa_record[2])
-                        new_serial = current_serial + 1
-                        soa_record[2] = str(new_serial)
-                        self.logger.out(
-                            "Records changed; bumping SOA: {}".format(new_serial),
-                            state="d",
-                            prefix="dns-aggregator",
-                        )
-                        sql_curs.execute(
-                            "UPDATE records SET content=%s WHERE domain_id=%s AND type='SOA'",
-                            (" ".join(soa_record), domain_id),
-                        )
-
-                        # Commit all the previous changes
-                        self.logger.out(
-                            "Committing database changes and reloading PDNS",
-                            state="d",
-                            prefix="dns-aggregator",
-                        )
-                        try:
-                            self.sql_conn.commit()
-                        except Exception as e:
-                            self.logger.out(
-                                "ERROR: Failed to commit DNS aggregator changes: {}".format(
-                                    e
-                                ),
-                                state="e",
-                            )
-
-                        # Reload the domain
-                        common.run_os_command(
-                            "/usr/bin/pdns_control --socket-dir={} reload {}".format(
-                                self.config["pdns_dynamic_directory"], domain
-                            ),
-                            background=False,
-                        )
-
-            # Wait for 10 seconds
-            time.sleep(10)
+    sql_conn.commit()
+    return len(add_records), len(remove_ids)
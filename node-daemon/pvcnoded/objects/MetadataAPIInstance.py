@@ -22,12 +22,11 @@
 import gevent.pywsgi
 import flask
 import sys
-import psycopg2
 
 from threading import Thread
-from psycopg2.extras import RealDictCursor
 
 import daemon_lib.vm as pvc_vm
+import daemon_lib.database as pvc_database
 import daemon_lib.network as pvc_network
 
 
@@ -130,19 +129,10 @@ class MetadataAPIInstance(object):
 
     # Helper functions
     def open_database(self):
-        conn = psycopg2.connect(
-            host=self.config["api_postgresql_host"],
-            port=self.config["api_postgresql_port"],
-            dbname=self.config["api_postgresql_dbname"],
-            user=self.config["api_postgresql_user"],
-            password=self.config["api_postgresql_password"],
-        )
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        return conn, cur
+        return pvc_database.open_database(self.config)
 
     def close_database(self, conn, cur):
-        cur.close()
-        conn.close()
+        pvc_database.close_database(conn, cur)
 
     # Obtain a list of templates
     def get_profile_userdata(self, vm_profile):
@@ -153,7 +143,7 @@ class MetadataAPIInstance(object):
         args = (vm_profile,)
 
         conn, cur = self.open_database()
-        cur.execute(query, args)
+        pvc_database.execute_prepared(cur, "metadata_profile_userdata", query, args)
         data_raw = cur.fetchone()
         self.close_database(conn, cur)
         if data_raw is not None:
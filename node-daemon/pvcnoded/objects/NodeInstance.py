@@ -66,7 +66,7 @@ class NodeInstance(object):
         self.inactive_node_list = []
         self.network_list = []
         self.domain_list = []
-        # Node resources
+        # Node resources; the statistics are only known for this node, set by its keepalive
         self.health = 100
         self.domains_count = 0
         self.memused = 0
@@ -252,74 +252,6 @@ class NodeInstance(object):
         except Exception:
             pass
 
-        @self.zkhandler.zk_conn.DataWatch(
-            self.zkhandler.schema.path("node.memory.free", self.name)
-        )
-        def watch_node_memfree(data, stat, event=""):
-            if event and event.type == "DELETED":
-                # The key has been deleted after existing before; terminate this watcher
-                # because this class instance is about to be reaped in Daemon.py
-                return False
-
-            try:
-                data = data.decode("ascii")
-            except AttributeError:
-                data = 0
-
-            if data != self.memfree:
-                self.memfree = data
-
-        @self.zkhandler.zk_conn.DataWatch(
-            self.zkhandler.schema.path("node.memory.used", self.name)
-        )
-        def watch_node_memused(data, stat, event=""):
-            if event and event.type == "DELETED":
-                # The key has been deleted after existing before; terminate this watcher
-                # because this class instance is about to be reaped in Daemon.py
-                return False
-
-            try:
-                data = data.decode("ascii")
-            except AttributeError:
-                data = 0
-
-            if data != self.memused:
-                self.memused = data
-
-        @self.zkhandler.zk_conn.DataWatch(
-            self.zkhandler.schema.path("node.memory.allocated", self.name)
-        )
-        def watch_node_memalloc(data, stat, event=""):
-            if event and event.type == "DELETED":
-                # The key has been deleted after existing before; terminate this watcher
-                # because this class instance is about to be reaped in Daemon.py
-                return False
-
-            try:
-                data = data.decode("ascii")
-            except AttributeError:
-                data = 0
-
-            if data != self.memalloc:
-                self.memalloc = data
-
-        @self.zkhandler.zk_conn.DataWatch(
-            self.zkhandler.schema.path("node.vcpu.allocated", self.name)
-        )
-        def watch_node_vcpualloc(data, stat, event=""):
-            if event and event.type == "DELETED":
-                # The key has been deleted after existing before; terminate this watcher
-                # because this class instance is about to be reaped in Daemon.py
-                return False
-
-            try:
-                data = data.decode("ascii")
-            except AttributeError:
-                data = 0
-
-            if data != self.vcpualloc:
-                self.vcpualloc = data
-
         @self.zkhandler.zk_conn.DataWatch(
             self.zkhandler.schema.path("node.running_domains", self.name)
         )
@@ -337,23 +269,6 @@ class NodeInstance(object):
             if data != self.domain_list:
                 self.domain_list = data
 
-        @self.zkhandler.zk_conn.DataWatch(
-            self.zkhandler.schema.path("node.count.provisioned_domains", self.name)
-        )
-        def watch_node_domainscount(data, stat, event=""):
-            if event and event.type == "DELETED":
-                # The key has been deleted after existing before; terminate this watcher
-                # because this class instance is about to be reaped in Daemon.py
-                return False
-
-            try:
-                data = data.decode("ascii")
-            except AttributeError:
-                data = 0
-
-            if data != self.domains_count:
-                self.domains_count = data
-
     # Update value functions
     def update_node_list(self, d_node):
         self.d_node = d_node
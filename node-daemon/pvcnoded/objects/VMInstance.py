@@ -23,13 +23,14 @@ import uuid
 import time
 import libvirt
 
-from threading import Thread
+from threading import Event, Thread
 from xml.etree import ElementTree
-from json import loads as jloads
+from json import dumps as jdumps, loads as jloads
 
 import daemon_lib.common as common
 
 import pvcnoded.objects.VMConsoleWatcherInstance as VMConsoleWatcherInstance
+import pvcnoded.util.libvirt
 
 
 class VMInstance(object):
@@ -587,6 +588,56 @@ class VMInstance(object):
 
         time.sleep(0.5)  # Initial delay for the first writer to grab the lock
 
+        def report_migration_progress(stop):
+            # Report the progress of the running migration job into Zookeeper, and switch it to
+            # post-copy once pre-copy has run for the number of iterations set by the profile
+            phase = "precopy"
+            while not stop.wait(1):
+                try:
+                    stats = self.dom.jobStats()
+                except Exception:
+                    continue
+                if not stats or stats.get("type") != libvirt.VIR_DOMAIN_JOB_UNBOUNDED:
+                    continue
+
+                if (
+                    migrate_profile["postcopy"]
+                    and phase == "precopy"
+                    and stats.get("memory_iteration", 0)
+                    >= migrate_profile["postcopy_after"]
+                ):
+                    try:
+                        self.dom.migrateStartPostCopy(0)
+                        phase = "postcopy"
+                        self.logger.out(
+                            "Switched live migration to post-copy after {} iterations".format(
+                                stats.get("memory_iteration", 0)
+                            ),
+                            state="i",
+                            prefix="Domain {}".format(self.domuuid),
+                        )
+                    except Exception as e:
+                        self.logger.out(
+                            f"Failed to switch live migration to post-copy: {e}",
+                            state="w",
+                            prefix="Domain {}".format(self.domuuid),
+                        )
+
+                progress = pvcnoded.util.libvirt.get_migration_progress(
+                    stats, migrate_profile_name, phase
+                )
+                try:
+                    self.zkhandler.write(
+                        [
+                            (
+                                ("domain.migrate.progress", self.domuuid),
+                                jdumps(progress),
+                            )
+                        ]
+                    )
+                except Exception:
+                    pass
+
         def migrate_live():
             self.logger.out(
                 "Setting up live migration",
@@ -618,16 +669,23 @@ class VMInstance(object):
                 )
                 return False
 
+            # Force the destination URI to ensure we transit over the cluster network
+            flags, params = pvcnoded.util.libvirt.get_migration_parameters(
+                migrate_profile, dest_tcp
+            )
+            progress_stop = Event()
+            progress_thread = Thread(
+                target=report_migration_progress, args=(progress_stop,)
+            )
             try:
                 self.logger.out(
-                    "Live migrating VM",
+                    f'Live migrating VM with migration profile "{migrate_profile_name}"',
                     state="i",
                     prefix="Domain {}".format(self.domuuid),
                 )
-                # Send the live migration; force the destination URI to ensure we transit over the cluster network
-                target_dom = self.dom.migrate(
-                    dest_lv_conn, libvirt.VIR_MIGRATE_LIVE, None, dest_tcp, 0
-                )
+                progress_thread.start()
+                # Send the live migration
+                target_dom = self.dom.migrate3(dest_lv_conn, params, flags)
                 if not target_dom:
                     raise
             except Exception as e:
@@ -640,6 +698,11 @@ class VMInstance(object):
                 )
                 dest_lv_conn.close()
                 return False
+            finally:
+                progress_stop.set()
+                if progress_thread.is_alive():
+                    progress_thread.join()
+                self.zkhandler.write([(("domain.migrate.progress", self.domuuid), "")])
 
             self.logger.out(
                 "Successfully migrated VM",
@@ -687,17 +750,28 @@ class VMInstance(object):
             abort_migrate("Target node changed during preparation")
             return
         if not force_shutdown:
-            # Set the maxdowntime value from Zookeeper
-            try:
-                max_downtime = self.zkhandler.read(
-                    ("domain.meta.migrate_max_downtime", self.domuuid)
-                )
-            except Exception as e:
-                self.logger.out(
-                    f"Error fetching migrate max downtime; using default of 300s: {e}",
-                    state="w",
+            # Get the VM's migration profile, falling back to the cluster default profile
+            migrate_profile_name, migrate_profile = (
+                pvcnoded.util.libvirt.get_migration_profile(
+                    self.config,
+                    self.zkhandler.read(("domain.meta.migrate_profile", self.domuuid)),
                 )
-                self.max_downtime = 300
+            )
+
+            # Set the maxdowntime value from the profile, or otherwise from Zookeeper
+            if migrate_profile["max_downtime"] is not None:
+                max_downtime = migrate_profile["max_downtime"]
+            else:
+                try:
+                    max_downtime = self.zkhandler.read(
+                        ("domain.meta.migrate_max_downtime", self.domuuid)
+                    )
+                except Exception as e:
+                    self.logger.out(
+                        f"Error fetching migrate max downtime; using default of 300s: {e}",
+                        state="w",
+                    )
+                    max_downtime = 300
             self.logger.out(
                 f"Running migrate-setmaxdowntime with downtime value {max_downtime}",
                 state="i",
@@ -455,6 +455,20 @@ add rule inet filter forward ip6 saddr {netaddr6} counter jump {vxlannic}-out
                 if self.dhcp_server_daemon:
                     self.stopDHCPServer()
                     self.startDHCPServer()
+                    self.dns_aggregator.sync_network(self)
+
+        @self.zkhandler.zk_conn.ChildrenWatch(
+            self.zkhandler.schema.path("network.lease", self.vni)
+        )
+        def watch_network_dhcp_leases(new_leases, event=""):
+            if event and event.type == "DELETED":
+                # The key has been deleted after existing before; terminate this watcher
+                # because this class instance is about to be reaped in Daemon.py
+                return False
+
+            # dnsmasq has added, replaced or removed a lease; synchronize its DNS records
+            if self.dhcp_server_daemon:
+                self.dns_aggregator.sync_network(self)
 
         @self.zkhandler.zk_conn.ChildrenWatch(
             self.zkhandler.schema.path("network.rule.in", self.vni)
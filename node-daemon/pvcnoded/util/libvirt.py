@@ -20,6 +20,7 @@
 ###############################################################################
 
 import libvirt
+import time
 
 
 def validate_libvirtd(logger, config):
@@ -34,3 +35,76 @@ def validate_libvirtd(logger, config):
             return False
 
     return True
+
+
+def get_migration_profile(config, profile_name):
+    """
+    Get the name and settings of live migration profile {profile_name}, or of the cluster default
+    profile if it is unset or not defined
+    """
+    if not profile_name or profile_name not in config["migration_profiles"]:
+        profile_name = config["migration_default_profile"]
+    return profile_name, config["migration_profiles"][profile_name]
+
+
+def get_migration_parameters(profile, dest_uri):
+    """
+    Translate the settings of a live migration profile into the flags and typed parameters of a
+    virDomainMigrate3 call to {dest_uri}
+    """
+    flags = libvirt.VIR_MIGRATE_LIVE
+    params = {libvirt.VIR_MIGRATE_PARAM_URI: dest_uri}
+
+    if profile["parallel_connections"] > 1:
+        flags |= libvirt.VIR_MIGRATE_PARALLEL
+        params[libvirt.VIR_MIGRATE_PARAM_PARALLEL_CONNECTIONS] = profile[
+            "parallel_connections"
+        ]
+
+    if profile["compression"]:
+        flags |= libvirt.VIR_MIGRATE_COMPRESSED
+        # A list is passed to libvirt as one parameter per compression method
+        params[libvirt.VIR_MIGRATE_PARAM_COMPRESSION] = list(profile["compression"])
+
+    if profile["auto_converge"]:
+        flags |= libvirt.VIR_MIGRATE_AUTO_CONVERGE
+
+    if profile["postcopy"]:
+        flags |= libvirt.VIR_MIGRATE_POSTCOPY
+
+    if profile["bandwidth"] > 0:
+        params[libvirt.VIR_MIGRATE_PARAM_BANDWIDTH] = profile["bandwidth"]
+        if profile["postcopy"]:
+            params[libvirt.VIR_MIGRATE_PARAM_BANDWIDTH_POSTCOPY] = profile["bandwidth"]
+
+    return flags, params
+
+
+def get_migration_progress(stats, profile_name, phase):
+    """
+    Summarize the jobStats of a running live migration as a progress report
+    """
+    memory_remaining = stats.get("memory_remaining", 0)
+    memory_rate = stats.get("memory_bps", 0)
+    dirty_rate = stats.get("memory_dirty_rate", 0) * stats.get("memory_page_size", 0)
+
+    # During pre-copy, memory is only copied faster than it is dirtied if the transfer rate exceeds
+    # the dirty rate; during post-copy, every page is copied exactly once
+    if phase == "postcopy":
+        net_rate = memory_rate
+    else:
+        net_rate = memory_rate - dirty_rate
+    eta = int(memory_remaining / net_rate) if net_rate > 0 else None
+
+    return {
+        "profile": profile_name,
+        "phase": phase,
+        "elapsed": stats.get("time_elapsed", 0),
+        "iteration": stats.get("memory_iteration", 0),
+        "memory_total": stats.get("memory_total", 0),
+        "memory_remaining": memory_remaining,
+        "memory_rate": memory_rate,
+        "dirty_rate": dirty_rate,
+        "eta": eta,
+        "updated": int(time.time()),
+    }
@@ -95,7 +95,7 @@ def validate_schema(logger, zkhandler):
     if not zkhandler.schema.validate(zkhandler, logger):
         logger.out("Found schema violations, applying", state="i")
         try:
-            zkhandler.schema.apply(zkhandler)
+            zkhandler.schema.apply(zkhandler, logger=logger)
         except Exception as e:
             logger.out(f"Failed to apply schema updates: {e}", state="w")
     else:
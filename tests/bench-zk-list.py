@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+
+# bench-zk-list.py - PVC Zookeeper large list benchmark
+# Part of the Parallel Virtual Cluster (PVC) system
+#
+#    Copyright (C) 2018-2024 Joshua M. Boniface <joshua@boniface.me>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+# Compare the memory use and latency of building a whole VM or volume list at once, as the API
+# did for every list request, against obtaining it in chunks, as the API now streams unpaged
+# lists, and against walking it in cursor pages, as the CLI does. Synthetic VMs and volumes are
+# created in Zookeeper only (not in Libvirt or Ceph) and removed afterwards, so run this against
+# a local or test Zookeeper, e.g.:
+#   PVC_CONFIG_FILE=/etc/pvc/pvc.conf ./tests/bench-zk-list.py 10000
+
+import json
+import sys
+import time
+import tracemalloc
+
+from uuid import uuid4
+
+import harness
+
+harness.use_daemon("api-daemon")
+
+import daemon_lib.ceph as pvc_ceph  # noqa: E402
+import daemon_lib.vm as pvc_vm  # noqa: E402
+
+
+CHUNK_SIZE = 100
+PAGE_SIZE = 100
+WRITE_BATCH_SIZE = 500
+BENCHMARK_PREFIX = "pvcbenchmark"
+
+size = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+zkhandler = harness.connect_zookeeper()
+
+VM_XML = """<domain type="kvm">
+  <name>{name}</name>
+  <uuid>{uuid}</uuid>
+  <description>PVC list benchmark VM</description>
+  <memory unit="MiB">1024</memory>
+  <vcpu>1</vcpu>
+  <os>
+    <type arch="x86_64" machine="pc-i440fx-2.7">hvm</type>
+  </os>
+  <devices>
+    <emulator>/usr/bin/kvm</emulator>
+    <console type="pty"/>
+    <disk type="network" device="disk">
+      <source protocol="rbd" name="{pool}/{name}_disk0"/>
+      <target dev="sda" bus="scsi"/>
+    </disk>
+  </devices>
+</domain>
+"""
+
+# The stats of each volume, as scanned from "rbd info" by the storage functions
+VOLUME_STATS = {
+    "name": "",
+    "id": "pvcbenchmark",
+    "size": 10737418240,
+    "objects": 2560,
+    "order": 22,
+    "object_size": 4194304,
+    "snapshot_count": 0,
+    "block_name_prefix": "rbd_data.pvcbenchmark",
+    "format": 2,
+    "features": ["layering", "exclusive-lock"],
+    "op_features": [],
+    "flags": [],
+    "create_timestamp": "Mon Jan  1 00:00:00 2024",
+    "access_timestamp": "Mon Jan  1 00:00:00 2024",
+    "modify_timestamp": "Mon Jan  1 00:00:00 2024",
+}
+
+
+def write_batched(keys):
+    for idx in range(0, len(keys), WRITE_BATCH_SIZE):
+        zkhandler.write(keys[idx : idx + WRITE_BATCH_SIZE])
+
+
+def create_vms(count):
+    vm_uuids = list()
+    keys = list()
+    for vm in range(count):
+        vm_uuid = str(uuid4())
+        vm_name = f"{BENCHMARK_PREFIX}{vm:06d}"
+        vm_uuids.append(vm_uuid)
+        keys += [
+            (("domain", vm_uuid), vm_name),
+            (
+                ("domain.xml", vm_uuid),
+                VM_XML.format(name=vm_name, uuid=vm_uuid, pool=BENCHMARK_PREFIX),
+            ),
+            (("domain.state", vm_uuid), "stop"),
+            (("domain.profile", vm_uuid), ""),
+            (("domain.stats", vm_uuid), ""),
+            (("domain.node", vm_uuid), ""),
+            (("domain.last_node", vm_uuid), ""),
+            (("domain.failed_reason", vm_uuid), ""),
+            (("domain.storage.volumes", vm_uuid), f"{BENCHMARK_PREFIX}/{vm_name}"),
+            (("domain.console.log", vm_uuid), ""),
+            (("domain.console.vnc", vm_uuid), ""),
+            (("domain.meta.autostart", vm_uuid), "False"),
+            (("domain.meta.migrate_method", vm_uuid), "none"),
+            (("domain.meta.migrate_max_downtime", vm_uuid), 300),
+            (("domain.meta.node_limit", vm_uuid), ""),
+            (("domain.meta.node_selector", vm_uuid), "none"),
+            (("domain.meta.tags", vm_uuid), ""),
+            (("domain.migrate.sync_lock", vm_uuid), ""),
+            (("domain.snapshots", vm_uuid), ""),
+        ]
+    write_batched(keys)
+    return vm_uuids
+
+
+def remove_vms(vm_uuids):
+    for idx in range(0, len(vm_uuids), WRITE_BATCH_SIZE):
+        zkhandler.delete(
+            [("domain", vm_uuid) for vm_uuid in vm_uuids[idx : idx + WRITE_BATCH_SIZE]]
+        )
+
+
+def create_volumes(count):
+    keys = [
+        (("pool", BENCHMARK_PREFIX), ""),
+        (("pool.snapshot_count", BENCHMARK_PREFIX), "0"),
+        (("volume", BENCHMARK_PREFIX), ""),
+        (("snapshot", BENCHMARK_PREFIX), ""),
+    ]
+    for volume in range(count):
+        volume_name = f"{BENCHMARK_PREFIX}/volume{volume:06d}"
+        keys += [
+            (("volume", volume_name), ""),
+            (
+                ("volume.stats", volume_name),
+                json.dumps(dict(VOLUME_STATS, name=f"volume{volume:06d}")),
+            ),
+            (("snapshot", volume_name), ""),
+        ]
+    write_batched(keys)
+
+
+def remove_volumes():
+    zkhandler.delete(
+        [
+            ("pool", BENCHMARK_PREFIX),
+            ("volume", BENCHMARK_PREFIX),
+            ("snapshot", BENCHMARK_PREFIX),
+        ]
+    )
+
+
+def list_whole(list_function):
+    # The previous method: build the whole list, then serialize it as one document
+    start = time.monotonic()
+    _, retdata = list_function()
+    first = time.monotonic() - start
+    output = json.dumps(retdata)
+    return len(retdata), first, len(output)
+
+
+def list_chunked(list_function):
+    # The streamed method: build and serialize one chunk at a time
+    start = time.monotonic()
+    _, chunks = list_function(chunk_size=CHUNK_SIZE)
+    entries, first, output_length = 0, None, 0
+    for chunk in chunks:
+        if first is None:
+            first = time.monotonic() - start
+        entries += len(chunk)
+        output_length += len(json.dumps(chunk))
+    return entries, first, output_length
+
+
+def list_paged(list_function):
+    # The paged method: one request per page, each following the cursor of the last
+    start = time.monotonic()
+    cursor, entries, first, output_length = None, 0, None, 0
+    while True:
+        _, chunks = list_function(
+            cursor=cursor, count=PAGE_SIZE + 1, chunk_size=PAGE_SIZE
+        )
+        page = next(iter(chunks), list())
+        if first is None:
+            first = time.monotonic() - start
+        entries += len(page)
+        output_length += len(json.dumps(page))
+        if len(chunks) <= 1:
+            break
+        cursor = chunks.cursor(PAGE_SIZE)
+    return entries, first, output_length
+
+
+def run(name, method, function):
+    start = time.monotonic()
+    entries, first, _ = function()
+    total = time.monotonic() - start
+
+    # Measure memory in a separate run, since tracing allocations slows it considerably
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    if entries != size:
+        print(f"Warning: {name} {method} listed {entries} of {size} entries")
+    print(
+        f"{name:<8} {method:<8} {entries:>8} {first * 1000:>10.1f} {total * 1000:>10.1f} {peak / 1024 / 1024:>9.1f}"
+    )
+
+
+def vm_list(**kwargs):
+    return pvc_vm.get_list(zkhandler, limit=f"^{BENCHMARK_PREFIX}", **kwargs)
+
+
+def volume_list(**kwargs):
+    return pvc_ceph.get_list_volume(zkhandler, BENCHMARK_PREFIX, **kwargs)
+
+
+print(
+    f"{'List':<8} {'Method':<8} {'Entries':>8} {'First ms':>10} {'Total ms':>10} {'Peak MiB':>9}"
+)
+
+vm_uuids = create_vms(size)
+try:
+    run("vm", "whole", lambda: list_whole(vm_list))
+    run("vm", "chunked", lambda: list_chunked(vm_list))
+    run("vm", "paged", lambda: list_paged(vm_list))
+finally:
+    remove_vms(vm_uuids)
+
+create_volumes(size)
+try:
+    run("volume", "whole", lambda: list_whole(volume_list))
+    run("volume", "chunked", lambda: list_chunked(volume_list))
+    run("volume", "paged", lambda: list_paged(volume_list))
+finally:
+    remove_volumes()
+
+zkhandler.disconnect()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+# bench-zk-schema.py - PVC Zookeeper schema benchmark
+# Part of the Parallel Virtual Cluster (PVC) system
+#
+#    Copyright (C) 2018-2024 Joshua M. Boniface <joshua@boniface.me>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+# Measure the znode count and list latency of the active Zookeeper schema. Run this before and
+# after a schema migration to compare layouts, e.g.:
+#   PVC_CONFIG_FILE=/etc/pvc/pvc.conf ./tests/bench-zk-schema.py 10
+
+import sys
+import time
+
+import harness
+
+harness.use_daemon("api-daemon")
+
+import daemon_lib.faults as pvc_faults  # noqa: E402
+import daemon_lib.node as pvc_node  # noqa: E402
+import daemon_lib.vm as pvc_vm  # noqa: E402
+
+
+iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+zkhandler = harness.connect_zookeeper()
+
+# Count every read round trip made through the connection
+reads = 0
+zk_get = zkhandler.zk_conn.get
+zk_get_async = zkhandler.zk_conn.get_async
+
+
+def counted_get(*args, **kwargs):
+    global reads
+    reads += 1
+    return zk_get(*args, **kwargs)
+
+
+def counted_get_async(*args, **kwargs):
+    global reads
+    reads += 1
+    return zk_get_async(*args, **kwargs)
+
+
+zkhandler.zk_conn.get = counted_get
+zkhandler.zk_conn.get_async = counted_get_async
+
+
+def count_znodes(path):
+    children = zkhandler.zk_conn.get_children(path)
+    return 1 + sum(count_znodes(f"{path.rstrip('/')}/{child}") for child in children)
+
+
+print(f"Schema version: {zkhandler.schema.version}")
+print()
+print(f"{'Tree':<10} {'Objects':>8} {'Znodes':>8} {'Per object':>11}")
+for elem in ["node", "domain", "faults"]:
+    base_path = zkhandler.schema.path(f"base.{elem}")
+    objects = len(zkhandler.zk_conn.get_children(base_path))
+    znodes = count_znodes(base_path) - 1
+    per_object = znodes / objects if objects > 0 else 0
+    print(f"{elem:<10} {objects:>8} {znodes:>8} {per_object:>11.1f}")
+print(
+    f"{'total':<10} {'':>8} {count_znodes(zkhandler.schema.path('base.root') or '/'):>8}"
+)
+print()
+
+print(f"{'List':<10} {'Reads':>8} {'Min ms':>8} {'Avg ms':>8} {'Max ms':>8}")
+for name, list_function in [
+    ("node", lambda: pvc_node.get_list(zkhandler)),
+    ("domain", lambda: pvc_vm.get_list(zkhandler)),
+    ("faults", lambda: pvc_faults.get_list(zkhandler)),
+]:
+    timings = list()
+    for _ in range(iterations):
+        reads = 0
+        start = time.monotonic()
+        list_function()
+        timings.append((time.monotonic() - start) * 1000)
+    print(
+        f"{name:<10} {reads:>8} {min(timings):>8.1f} {sum(timings) / len(timings):>8.1f} {max(timings):>8.1f}"
+    )
+
+zkhandler.disconnect()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+# bench-zk-status.py - PVC Zookeeper cluster status count benchmark
+# Part of the Parallel Virtual Cluster (PVC) system
+#
+#    Copyright (C) 2018-2024 Joshua M. Boniface <joshua@boniface.me>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+# Compare the cost of counting the volumes and snapshots of a pool for the cluster status by
+# listing every volume's snapshots against using znode child counts and the pool snapshot
+# counters. Synthetic pools of each given volume count are created in Zookeeper only (not in
+# Ceph) and removed afterwards, so run this against a local or test Zookeeper, e.g.:
+#   PVC_CONFIG_FILE=/etc/pvc/pvc.conf ./tests/bench-zk-status.py 100 1000 5000
+
+import sys
+import time
+
+import harness
+
+harness.use_daemon("api-daemon")
+
+import daemon_lib.ceph as pvc_ceph  # noqa: E402
+
+
+SNAPSHOTS_PER_VOLUME = 2
+ITERATIONS = 5
+WRITE_BATCH_SIZE = 500
+
+sizes = [int(size) for size in sys.argv[1:]] or [100, 1000, 5000]
+
+zkhandler = harness.connect_zookeeper()
+
+if zkhandler.schema.path("pool.snapshot_count") is None:
+    print("The active schema has no pool snapshot counters; apply schema version 18+")
+    sys.exit(1)
+
+# Count every request made through the connection
+requests = 0
+
+
+def counted(function):
+    def counted_function(*args, **kwargs):
+        global requests
+        requests += 1
+        return function(*args, **kwargs)
+
+    return counted_function
+
+
+for method in [
+    "get",
+    "get_async",
+    "get_children",
+    "get_children_async",
+    "exists",
+    "exists_async",
+]:
+    setattr(zkhandler.zk_conn, method, counted(getattr(zkhandler.zk_conn, method)))
+
+
+def create_pool(pool, volume_count):
+    keys = [
+        (("pool", pool), ""),
+        (("pool.snapshot_count", pool), str(volume_count * SNAPSHOTS_PER_VOLUME)),
+        (("volume", pool), ""),
+        (("snapshot", pool), ""),
+    ]
+    for volume in range(volume_count):
+        keys += [
+            (("volume", f"{pool}/volume{volume}"), ""),
+            (("snapshot", f"{pool}/volume{volume}"), ""),
+        ]
+        keys += [
+            (("snapshot", f"{pool}/volume{volume}/snapshot{snapshot}"), "")
+            for snapshot in range(SNAPSHOTS_PER_VOLUME)
+        ]
+    for idx in range(0, len(keys), WRITE_BATCH_SIZE):
+        zkhandler.write(keys[idx : idx + WRITE_BATCH_SIZE])
+
+
+def remove_pool(pool):
+    zkhandler.delete([("pool", pool), ("volume", pool), ("snapshot", pool)])
+
+
+def count_by_listing(pool):
+    # The previous cluster status method: list every volume, then every volume's snapshots
+    volumes = zkhandler.children(("volume", pool))
+    snapshots = 0
+    for volume in volumes:
+        snapshots += len(zkhandler.children(("snapshot", f"{pool}/{volume}")))
+    return len(volumes), snapshots
+
+
+def count_by_counters(pool):
+    (volumes,) = zkhandler.count_many([("volume", pool)])
+    snapshots = pvc_ceph.get_snapshot_counts(zkhandler, [pool])[pool]
+    return volumes, snapshots
+
+
+print(
+    f"{'Volumes':>8} {'Method':<10} {'Requests':>9} {'Min ms':>8} {'Avg ms':>8} {'Max ms':>8}"
+)
+for size in sizes:
+    pool = f"pvcbenchmark{size}"
+    create_pool(pool, size)
+    try:
+        for name, count_function in [
+            ("listing", count_by_listing),
+            ("counters", count_by_counters),
+        ]:
+            timings = list()
+            for _ in range(ITERATIONS):
+                requests = 0
+                start = time.monotonic()
+                counts = count_function(pool)
+                timings.append((time.monotonic() - start) * 1000)
+            if counts != (size, size * SNAPSHOTS_PER_VOLUME):
+                print(f"Warning: {name} counted {counts} for pool {pool}")
+            print(
+                f"{size:>8} {name:<10} {requests:>9} {min(timings):>8.1f} {sum(timings) / len(timings):>8.1f} {max(timings):>8.1f}"
+            )
+    finally:
+        remove_pool(pool)
+
+zkhandler.disconnect()
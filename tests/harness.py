@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+# harness.py - PVC test and benchmark script helpers
+# Part of the Parallel Virtual Cluster (PVC) system
+#
+#    Copyright (C) 2018-2024 Joshua M. Boniface <joshua@boniface.me>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+# Shared helpers of the test and benchmark scripts in this directory, which import the daemons of
+# this tree rather than any installed ones
+
+import os
+import sys
+
+
+root_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+failures = list()
+
+
+def use_daemon(daemon):
+    """
+    Make the packages of a daemon of this tree (e.g. "api-daemon") importable, including its
+    daemon_lib, and return its path
+    """
+    daemon_path = os.path.join(root_path, daemon)
+    sys.path.insert(0, daemon_path)
+    return daemon_path
+
+
+def check(description, condition):
+    """
+    Report the result of a check, recording it if it failed
+    """
+    print(f"{'ok' if condition else 'FAILED':<8} {description}")
+    if not condition:
+        failures.append(description)
+
+
+def finish():
+    """
+    Report the outcome of all checks, exiting with an error if any of them failed
+    """
+    if failures:
+        print(f"{len(failures)} checks failed")
+        sys.exit(1)
+    print("All checks passed")
+
+
+def use_tree_schemas():
+    """
+    Make every Zookeeper schema, including those of the connections the API daemon makes itself,
+    use the schema versions of this tree rather than those of an installed API daemon
+    """
+    api_path = use_daemon("api-daemon")
+
+    from daemon_lib.zkhandler import ZKSchema
+
+    ZKSchema.__init__.__defaults__ = (api_path,)
+
+
+def connect_zookeeper():
+    """
+    Connect to the Zookeeper of the configuration (PVC_CONFIG_FILE), using the schema versions of
+    this tree, and return the ZKHandler
+    """
+    use_tree_schemas()
+
+    import daemon_lib.config as cfg
+    from daemon_lib.zkhandler import ZKHandler
+
+    zkhandler = ZKHandler(cfg.get_configuration())
+    zkhandler.connect()
+    zkhandler.schema.load(zkhandler.schema.get_version(zkhandler), quiet=True)
+    return zkhandler
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+
+# test-api-load.py - PVC API control request latency under bulk transfer load
+# Part of the Parallel Virtual Cluster (PVC) system
+#
+#    Copyright (C) 2018-2024 Joshua M. Boniface <joshua@boniface.me>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+# Measure the latency of control requests ("GET /" and "GET /status") to a PVC API, first idle and
+# then while more concurrent volume uploads than the API admits are running, and report how many
+# uploads were admitted and refused. Scratch volumes named "pvcloadtest<N>" are created in the
+# given pool and removed afterwards, so run this against a test cluster, e.g.:
+#   ./tests/test-api-load.py http://10.0.0.250:7370/api/v1 vms --key <api_key> --uploaders 16
+
+import argparse
+import os
+import requests
+import threading
+import time
+
+
+MiB = 1024 * 1024
+
+
+class ThrottledBody(object):
+    """
+    A request body of size bytes of random data, read at up to rate bytes per second, so that
+    each upload occupies the API for a predictable time
+    """
+
+    def __init__(self, data, size, rate):
+        self.data = data
+        self.remaining = size
+        self.size = size
+        self.rate = rate
+        self.start = time.monotonic()
+
+    def __len__(self):
+        return self.size
+
+    def read(self, amount=-1):
+        if amount < 0 or amount > self.remaining:
+            amount = self.remaining
+        amount = min(amount, len(self.data))
+        if amount < 1:
+            return b""
+        sent = self.size - self.remaining
+        delay = self.start + sent / self.rate - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self.remaining -= amount
+        return self.data[:amount]
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def probe(session, args, path, stop, results):
+    # Make control requests one after another until stopped
+    while not stop.is_set():
+        start = time.monotonic()
+        try:
+            response = session.get(f"{args.uri}{path}", timeout=60)
+            if response.status_code == 200:
+                results["latencies"].append(time.monotonic() - start)
+            else:
+                results["errors"] += 1
+        except requests.exceptions.RequestException:
+            results["errors"] += 1
+        time.sleep(args.interval)
+
+
+def upload(session, args, volume, stop, results):
+    # Upload chunks of random data to a scratch volume until stopped, starting over at its end
+    data = os.urandom(MiB)
+    chunk_size = args.chunk_size * MiB
+    size = args.volume_size * MiB
+    offset = 0
+    while not stop.is_set():
+        end = min(offset + chunk_size, size) - 1
+        try:
+            response = session.put(
+                f"{args.uri}/storage/ceph/volume/{args.pool}/{volume}/upload",
+                headers={
+                    "Content-Type": "application/octet-stream",
+                    "Content-Range": f"bytes {offset}-{end}/{size}",
+                },
+                params={"initialize": offset == 0},
+                data=ThrottledBody(data, end - offset + 1, args.rate * MiB),
+                timeout=3600,
+            )
+            if response.status_code == 200:
+                results["admitted"] += 1
+                offset = end + 1 if end + 1 < size else 0
+            elif response.status_code == 503:
+                results["refused"] += 1
+                time.sleep(1)
+            else:
+                results["errors"] += 1
+                time.sleep(1)
+        except requests.exceptions.RequestException:
+            # A refused upload may also appear as a reset connection, since the API does not read
+            # the body of a request it refuses
+            results["errors"] += 1
+            time.sleep(1)
+
+
+def measure(session, args, label, upload_volumes):
+    stop = threading.Event()
+    probe_results = {
+        path: {"latencies": list(), "errors": 0} for path in ["/", "/status"]
+    }
+    upload_results = {"admitted": 0, "refused": 0, "errors": 0}
+
+    threads = [
+        threading.Thread(
+            target=upload, args=(session, args, volume, stop, upload_results)
+        )
+        for volume in upload_volumes
+    ]
+    threads += [
+        threading.Thread(target=probe, args=(session, args, path, stop, results))
+        for path, results in probe_results.items()
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    for path, results in probe_results.items():
+        latencies = [latency * 1000 for latency in results["latencies"]]
+        print(
+            f"{label:<10} {'GET ' + path:<12} {len(latencies):>8} {results['errors']:>7} {percentile(latencies, 0.5):>9.1f} {percentile(latencies, 0.95):>9.1f} {percentile(latencies, 0.99):>9.1f} {max(latencies, default=0):>9.1f}"
+        )
+    if upload_volumes:
+        print(
+            f"{label:<10} {'Uploads':<12} admitted {upload_results['admitted']}, refused {upload_results['refused']}, errors {upload_results['errors']}"
+        )
+
+
+parser = argparse.ArgumentParser(
+    description="Measure PVC API control request latency under bulk upload load"
+)
+parser.add_argument("uri", help="API URI, e.g. http://10.0.0.250:7370/api/v1")
+parser.add_argument("pool", help="Storage pool for the scratch volumes")
+parser.add_argument("--key", default=None, help="API key")
+parser.add_argument(
+    "--uploaders", type=int, default=16, help="Concurrent uploads (default 16)"
+)
+parser.add_argument(
+    "--duration", type=int, default=60, help="Seconds per phase (default 60)"
+)
+parser.add_argument(
+    "--interval",
+    type=float,
+    default=0.1,
+    help="Seconds between control requests (default 0.1)",
+)
+parser.add_argument(
+    "--volume-size", type=int, default=1024, help="Scratch volume MiB (default 1024)"
+)
+parser.add_argument(
+    "--chunk-size", type=int, default=64, help="Upload chunk MiB (default 64)"
+)
+parser.add_argument(
+    "--rate", type=int, default=16, help="MiB/s per upload (default 16)"
+)
+args = parser.parse_args()
+
+session = requests.Session()
+session.mount(
+    args.uri,
+    requests.adapters.HTTPAdapter(
+        pool_connections=args.uploaders + 2, pool_maxsize=args.uploaders + 2
+    ),
+)
+if args.key is not None:
+    session.headers["X-Api-Key"] = args.key
+
+volumes = [f"pvcloadtest{idx}" for idx in range(args.uploaders)]
+
+print(
+    f"{'Phase':<10} {'Request':<12} {'Count':>8} {'Errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'Max ms':>9}"
+)
+measure(session, args, "idle", [])
+
+try:
+    for volume in volumes:
+        response = session.post(
+            f"{args.uri}/storage/ceph/volume",
+            params={
+                "pool": args.pool,
+                "volume": volume,
+                "size": f"{args.volume_size}M",
+            },
+        )
+        if response.status_code != 200:
+            print(f"Failed to create {args.pool}/{volume}: {response.text}")
+            exit(1)
+
+    measure(session, args, "uploading", volumes)
+finally:
+    for volume in volumes:
+        session.delete(f"{args.uri}/storage/ceph/volume/{args.pool}/{volume}")
@@ -0,0 +1,54 @@
+#!/usr/bin/env bash
+
+# Startup time regression tests for the CLI client: help and shell completion must not import
+# the client library (or its dependencies like "requests"), and the total import time of help
+# commands must stay under a limit in milliseconds (default 200), as measured by importtime.
+
+limit_ms="${1:-200}"
+
+pushd $( git rev-parse --show-toplevel )/client-cli &>/dev/null
+
+failures=0
+
+# Use an empty client configuration so that no connection is read
+client_dir=$( mktemp -d )
+
+# Run the CLI from this tree with import timing, printing the import time log only
+_pvc_importtime() {
+    PVC_CLIENT_DIR=${client_dir} python3 -X importtime -c 'import sys; from pvc.cli.cli import cli; cli(sys.argv[1:], prog_name="pvc")' "$@" 2>&1 >/dev/null
+}
+
+_check() {
+    description="${1}"
+    importtime="${2}"
+
+    # The self times of all imports (the second column) add up to the total import time
+    total_ms=$( awk -F'|' '/^import time: *[0-9]/ { sub(/import time: */, "", $1); total += $1 } END { printf "%d", total / 1000 }' <<<"${importtime}" )
+    library_modules=$( grep -oE ' (pvc\.lib\.[a-z]+|requests|urllib3|yaml)$' <<<"${importtime}" | tr -d ' ' | sort -u | xargs )
+
+    if [[ -n ${library_modules} ]]; then
+        echo "FAIL ${description}: imported ${library_modules}"
+        failures=$(( failures + 1 ))
+    elif [[ -n ${limit_ms} && ${total_ms} -gt ${limit_ms} ]]; then
+        echo "FAIL ${description}: ${total_ms}ms of imports exceeds ${limit_ms}ms"
+        failures=$(( failures + 1 ))
+    else
+        echo "PASS ${description}: ${total_ms}ms of imports"
+    fi
+}
+
+# Warm up the bytecode cache so that compilation is not counted
+_pvc_importtime vm list --help &>/dev/null
+
+_check "pvc --help" "$( _pvc_importtime --help )"
+_check "pvc vm list --help" "$( _pvc_importtime vm list --help )"
+_check "pvc <tab>" "$( _PVC_COMPLETE=bash_complete COMP_WORDS="pvc " COMP_CWORD=1 _pvc_importtime )"
+_check "pvc vm li<tab>" "$( _PVC_COMPLETE=bash_complete COMP_WORDS="pvc vm li" COMP_CWORD=2 _pvc_importtime )"
+
+rm -rf ${client_dir}
+
+popd &>/dev/null
+
+if [[ ${failures} -gt 0 ]]; then
+    exit 1
+fi
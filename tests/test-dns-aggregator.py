@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+
+# test-dns-aggregator.py - PVC DNS aggregator synchronization tests
+# Part of the Parallel Virtual Cluster (PVC) system
+#
+#    Copyright (C) 2018-2024 Joshua M. Boniface <joshua@boniface.me>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+# Check the synchronization of network zones from dnsmasq into the PowerDNS aggregator database:
+# lease events sync at once, changes without an event are found by SOA serial checks, idle zones
+# are never transferred or rewritten, and each sync is a single transaction. A stand-in for the
+# dnsmasq instance of a network answers SOA queries and AXFRs on 127.0.0.1, and the test domain
+# "pvcdnstest.local" is created in the given PowerDNS database (with the PowerDNS tables, if they
+# do not exist) and removed afterwards, so run this against a local or test PostgreSQL, e.g.:
+#   ./tests/test-dns-aggregator.py --host 127.0.0.1 --dbname pvcdns --user pvcdns --password <password>
+
+import argparse
+import socket
+import struct
+import threading
+import time
+
+import dns.message
+import dns.rdatatype
+import dns.rrset
+import psycopg2
+
+import harness
+
+from harness import check
+
+harness.use_daemon("node-daemon")
+
+import pvcnoded.objects.DNSAggregatorInstance as DNSAggregatorInstance  # noqa: E402
+
+
+TEST_DOMAIN = "pvcdnstest.local"
+
+# The PowerDNS generic PostgreSQL backend tables, as far as the aggregator uses them
+PDNS_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS domains (
+        id SERIAL PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        master VARCHAR(128) DEFAULT NULL,
+        last_check INT DEFAULT NULL,
+        type TEXT NOT NULL,
+        notified_serial BIGINT DEFAULT NULL,
+        account VARCHAR(40) DEFAULT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS records (
+        id BIGSERIAL PRIMARY KEY,
+        domain_id INT DEFAULT NULL,
+        name VARCHAR(255) DEFAULT NULL,
+        type VARCHAR(10) DEFAULT NULL,
+        content VARCHAR(65535) DEFAULT NULL,
+        ttl INT DEFAULT NULL,
+        prio INT DEFAULT NULL,
+        disabled BOOL DEFAULT 'f',
+        ordername VARCHAR(255),
+        auth BOOL DEFAULT 't'
+    )
+    """,
+]
+
+parser = argparse.ArgumentParser(description="Test the PVC DNS aggregator")
+parser.add_argument("--host", default="127.0.0.1", help="PostgreSQL host")
+parser.add_argument("--port", default=5432, type=int, help="PostgreSQL port")
+parser.add_argument("--dbname", default="pvcdns", help="PowerDNS database name")
+parser.add_argument("--user", default="pvcdns", help="PowerDNS database user")
+parser.add_argument("--password", default="", help="PowerDNS database password")
+args = parser.parse_args()
+
+
+class DnsmasqStandIn(object):
+    """
+    Answer SOA queries and AXFRs for a zone of hosts on 127.0.0.1, incrementing the SOA serial on
+    every change of the hosts as dnsmasq does on every lease change
+    """
+
+    def __init__(self, domain):
+        self.domain = domain
+        self.serial = 1
+        self.hosts = dict()
+        self.soa_queries = 0
+        self.transfers = 0
+        self.lock = threading.Lock()
+        self.stop = threading.Event()
+
+        self.udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.udp.bind(("127.0.0.1", 0))
+        self.port = self.udp.getsockname()[1]
+        self.tcp = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.tcp.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.tcp.bind(("127.0.0.1", self.port))
+        self.tcp.listen()
+        for sock in [self.udp, self.tcp]:
+            sock.settimeout(0.2)
+
+        self.threads = [
+            threading.Thread(target=self.serve_udp),
+            threading.Thread(target=self.serve_tcp),
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def set_hosts(self, hosts, bump_serial=True):
+        with self.lock:
+            self.hosts = dict(hosts)
+            if bump_serial:
+                self.serial += 1
+
+    def soa(self):
+        return dns.rrset.from_text(
+            f"{self.domain}.",
+            600,
+            "IN",
+            "SOA",
+            f". . {self.serial} 1200 180 1209600 600",
+        )
+
+    def rrsets(self):
+        rrsets = [
+            self.soa(),
+            dns.rrset.from_text(f"{self.domain}.", 600, "IN", "NS", "."),
+        ]
+        for name, addresses in sorted(self.hosts.items()):
+            for address in addresses:
+                r_type = "AAAA" if ":" in address else "A"
+                rrsets.append(
+                    dns.rrset.from_text(
+                        f"{name}.{self.domain}.", 600, "IN", r_type, address
+                    )
+                )
+        return rrsets + [self.soa()]
+
+    def serve_udp(self):
+        while not self.stop.is_set():
+            try:
+                data, address = self.udp.recvfrom(4096)
+            except socket.timeout:
+                continue
+            query = dns.message.from_wire(data)
+            response = dns.message.make_response(query)
+            with self.lock:
+                self.soa_queries += 1
+                response.answer.append(self.soa())
+            self.udp.sendto(response.to_wire(), address)
+
+    def serve_tcp(self):
+        while not self.stop.is_set():
+            try:
+                conn, _ = self.tcp.accept()
+            except socket.timeout:
+                continue
+            with conn:
+                conn.settimeout(5)
+                length = struct.unpack("!H", conn.recv(2))[0]
+                query = dns.message.from_wire(conn.recv(length))
+                response = dns.message.make_response(query)
+                with self.lock:
+                    self.transfers += 1
+                    response.answer = self.rrsets()
+                wire = response.to_wire(max_size=65535)
+                conn.sendall(struct.pack("!H", len(wire)) + wire)
+
+    def shutdown(self):
+        self.stop.set()
+        for thread in self.threads:
+            thread.join()
+        self.udp.close()
+        self.tcp.close()
+
+
+class TestLogger(object):
+    def out(self, message, state=None, prefix=""):
+        if state == "e":
+            print(f"         {prefix} {message}")
+
+
+class TestNetwork(object):
+    domain = TEST_DOMAIN
+    ip4_gateway = "127.0.0.1"
+    ip6_gateway = "None"
+    name_servers = None
+
+
+def zone_records():
+    sql_curs.execute(
+        "SELECT r.name, r.type, r.content FROM records r JOIN domains d ON r.domain_id=d.id WHERE d.name=%s",
+        (TEST_DOMAIN,),
+    )
+    return sorted(sql_curs.fetchall())
+
+
+def address_records():
+    return [r for r in zone_records() if r[1] in ["A", "AAAA"]]
+
+
+def expected_records(hosts):
+    return sorted(
+        (
+            f"{name}.{TEST_DOMAIN}",
+            "AAAA" if ":" in address else "A",
+            address,
+        )
+        for name, addresses in hosts.items()
+        for address in addresses
+    )
+
+
+def zone_serial():
+    sql_curs.execute(
+        "SELECT r.content FROM records r JOIN domains d ON r.domain_id=d.id WHERE d.name=%s AND r.type='SOA'",
+        (TEST_DOMAIN,),
+    )
+    return int(sql_curs.fetchone()[0].split()[2])
+
+
+def wait_for(condition, timeout):
+    start = time.monotonic()
+    while time.monotonic() - start < timeout:
+        if condition():
+            return time.monotonic() - start
+        time.sleep(0.05)
+    return None
+
+
+def remove_test_domain():
+    sql_curs.execute("SELECT id FROM domains WHERE name=%s", (TEST_DOMAIN,))
+    for (domain_id,) in sql_curs.fetchall():
+        sql_curs.execute("DELETE FROM records WHERE domain_id=%s", (domain_id,))
+        sql_curs.execute("DELETE FROM domains WHERE id=%s", (domain_id,))
+
+
+sql_conn = psycopg2.connect(
+    host=args.host,
+    port=args.port,
+    dbname=args.dbname,
+    user=args.user,
+    password=args.password,
+)
+sql_conn.autocommit = True
+sql_curs = sql_conn.cursor()
+for statement in PDNS_SCHEMA:
+    sql_curs.execute(statement)
+remove_test_domain()
+
+config = {
+    "cluster_floating_ip": "127.0.0.1/32",
+    "upstream_floating_ip": "127.0.0.1/32",
+    "upstream_domain": "pvc.local",
+    "pdns_dynamic_directory": "/nonexistent",
+    "pdns_postgresql_host": args.host,
+    "pdns_postgresql_port": args.port,
+    "pdns_postgresql_dbname": args.dbname,
+    "pdns_postgresql_user": args.user,
+    "pdns_postgresql_password": args.password,
+}
+
+dnsmasq = DnsmasqStandIn(TEST_DOMAIN)
+DNSAggregatorInstance.DNSMASQ_PORT = dnsmasq.port
+DNSAggregatorInstance.AXFRDaemonInstance.serial_check_interval = 2
+DNSAggregatorInstance.AXFRDaemonInstance.sync_delay = 0.1
+
+hosts = {
+    "vm1": ["10.100.0.11"],
+    "vm2": ["10.100.0.12", "fd00:100::12"],
+    "vm3": ["10.100.0.13"],
+}
+dnsmasq.set_hosts(hosts)
+
+# The aggregator is made active without starting PowerDNS itself
+aggregator = DNSAggregatorInstance.DNSAggregatorInstance(config, TestLogger())
+aggregator.is_active = True
+network = TestNetwork()
+aggregator.add_network(network)
+aggregator.dns_axfr_daemon.start()
+
+try:
+    # Initial synchronization
+    elapsed = wait_for(lambda: address_records() == expected_records(hosts), 10)
+    check(
+        f"the zone is synchronized at startup ({elapsed or 0:.2f}s)",
+        elapsed is not None,
+    )
+    check(
+        "the SOA and NS records are kept",
+        [r[1] for r in zone_records() if r[1] not in ["A", "AAAA"]] == ["NS", "SOA"],
+    )
+
+    # Idle zones are only checked, never transferred or rewritten
+    transfers = dnsmasq.transfers
+    soa_queries = dnsmasq.soa_queries
+    serial = zone_serial()
+    time.sleep(5)
+    check("an idle zone is not transferred", dnsmasq.transfers == transfers)
+    check(
+        "an idle zone is checked by its SOA serial",
+        dnsmasq.soa_queries > soa_queries,
+    )
+    check("an idle zone is not rewritten", zone_serial() == serial)
+
+    # A lease event synchronizes at once, even without a new dnsmasq serial
+    hosts["vm4"] = ["10.100.0.14"]
+    dnsmasq.set_hosts(hosts, bump_serial=False)
+    start = time.monotonic()
+    aggregator.sync_network(network)
+    elapsed = wait_for(lambda: address_records() == expected_records(hosts), 5)
+    check(
+        f"a lease event synchronizes the zone ({elapsed or 0:.2f}s)",
+        elapsed is not None and elapsed < 1,
+    )
+    check("a synchronization bumps the SOA serial once", zone_serial() == serial + 1)
+
+    # Changes without an event are found by the SOA serial checks
+    serial = zone_serial()
+    hosts["vm1"] = ["10.100.0.21"]
+    del hosts["vm3"]
+    hosts.update({f"bulk{host}": [f"10.100.1.{host}"] for host in range(100)})
+    dnsmasq.set_hosts(hosts)
+    elapsed = wait_for(lambda: address_records() == expected_records(hosts), 10)
+    check(
+        f"a new dnsmasq serial synchronizes the zone ({elapsed or 0:.2f}s)",
+        elapsed is not None,
+    )
+    check(
+        "a changed address replaces the old record",
+        (f"vm1.{TEST_DOMAIN}", "A", "10.100.0.11") not in address_records(),
+    )
+    check(
+        "100 new records are written in a single transaction",
+        zone_serial() == serial + 1,
+    )
+
+    # Duplicate and stale records in the database are removed
+    sql_curs.execute("SELECT id FROM domains WHERE name=%s", (TEST_DOMAIN,))
+    domain_id = sql_curs.fetchone()[0]
+    sql_curs.execute(
+        "INSERT INTO records (domain_id, name, ttl, type, prio, content) VALUES (%s, %s, 600, 'A', 0, %s)",
+        (domain_id, f"vm2.{TEST_DOMAIN}", "10.100.0.12"),
+    )
+    sql_curs.execute(
+        "INSERT INTO records (domain_id, name, ttl, type, prio, content) VALUES (%s, %s, 600, 'A', 0, %s)",
+        (domain_id, f"stale.{TEST_DOMAIN}", "10.100.0.99"),
+    )
+    aggregator.sync_network(network)
+    elapsed = wait_for(lambda: address_records() == expected_records(hosts), 5)
+    check("duplicate and stale records are removed", elapsed is not None)
+
+    # An unavailable dnsmasq leaves the zone alone, and it is synchronized once back
+    records = address_records()
+    DNSAggregatorInstance.DNSMASQ_PORT = 1
+    aggregator.sync_network(network)
+    time.sleep(1)
+    check("an unavailable dnsmasq leaves the zone alone", address_records() == records)
+    hosts = {"vm1": ["10.100.0.31"]}
+    dnsmasq.set_hosts(hosts)
+    DNSAggregatorInstance.DNSMASQ_PORT = dnsmasq.port
+    elapsed = wait_for(lambda: address_records() == expected_records(hosts), 10)
+    check("the zone is synchronized once dnsmasq is back", elapsed is not None)
+
+    # The synchronization functions report what they changed
+    sql_conn.autocommit = False
+    serial, records = DNSAggregatorInstance.get_zone_records(
+        "127.0.0.1", TEST_DOMAIN, port=dnsmasq.port
+    )
+    check("the transfer returns the dnsmasq serial", serial == dnsmasq.serial)
+    check(
+        "an unchanged zone needs no changes",
+        DNSAggregatorInstance.sync_zone_records(sql_conn, TEST_DOMAIN, records)
+        == (0, 0),
+    )
+    check(
+        "an unknown domain is not synchronized",
+        DNSAggregatorInstance.sync_zone_records(sql_conn, "unknown.local", records)
+        is None,
+    )
+    sql_conn.autocommit = True
+finally:
+    aggregator.dns_axfr_daemon.stop()
+    dnsmasq.shutdown()
+    remove_test_domain()
+    sql_conn.close()
+
+harness.finish()
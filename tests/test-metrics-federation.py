@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+
+# test-metrics-federation.py - PVC API metrics federation tests
+# Part of the Parallel Virtual Cluster (PVC) system
+#
+#    Copyright (C) 2018-2024 Joshua M. Boniface <joshua@boniface.me>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+# Check the per-source timeouts, stale-while-revalidate caching and fan-out of the API's federated
+# /metrics against local stand-in Prometheus exporters which can be made slow, hung or failing.
+# This needs the API daemon's Python dependencies, but not a running API or cluster; the sample
+# configuration is used unless PVC_CONFIG_FILE is set, e.g.:
+#   ./tests/test-metrics-federation.py
+
+import os
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from requests import get
+
+import harness
+
+from harness import check
+
+harness.use_daemon("api-daemon")
+os.environ.setdefault(
+    "PVC_CONFIG_FILE", os.path.join(harness.root_path, "pvc.sample.conf")
+)
+
+import pvcapid.metrics as pvc_metrics  # noqa: E402
+
+
+# The settings of the test sources; the exporter of a hung source only answers once released,
+# long after any source timeout
+SOURCE_TIMEOUT = 1
+SOURCE_MAX_AGE = 1
+SOURCE_MAX_STALE = 4
+SLOW_DELAY = 0.5
+HUNG_DELAY = 30
+
+
+class Exporter(object):
+    """
+    The state of a stand-in exporter: its mode ("ok", "slow", "hung" or "fail"), the generation
+    of its metrics, and the number of requests it received
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.mode = "ok"
+        self.generation = 0
+        self.requests = 0
+
+    def metrics(self):
+        return f'test_metric{{exporter="{self.name}"}} {self.generation}\n'
+
+
+exporters = {name: Exporter(name) for name in ["alpha", "beta", "gamma"]}
+released = threading.Event()
+
+
+class ExporterHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        exporter = exporters[self.path.strip("/")]
+        exporter.requests += 1
+        mode = exporter.mode
+        if mode == "slow":
+            time.sleep(SLOW_DELAY)
+        elif mode == "hung":
+            released.wait(HUNG_DELAY)
+
+        if mode == "fail":
+            self.send_response(500)
+            self.end_headers()
+            return
+
+        body = exporter.metrics().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def exporter_fetch(name):
+    # Like the Ceph and Zookeeper fetches, but a hung exporter holds its fetch for much longer
+    # than the source timeout, as if the connection itself were stuck
+    def fetch():
+        response = get(f"{exporter_url}/{name}", timeout=HUNG_DELAY * 2)
+        if response.status_code != 200:
+            return f"Error: Failed to obtain metric data from {name}\n", 400
+        return response.text, 200
+
+    return fetch
+
+
+def reset_sources():
+    for exporter in exporters.values():
+        exporter.mode = "ok"
+        exporter.requests = 0
+    pvc_metrics.metrics_sources = {
+        name: pvc_metrics.MetricsSource(
+            name,
+            exporter_fetch(name),
+            timeout=SOURCE_TIMEOUT,
+            max_age=SOURCE_MAX_AGE,
+            max_stale=SOURCE_MAX_STALE,
+        )
+        for name in exporters.keys()
+    }
+    return pvc_metrics.metrics_sources
+
+
+def timed(function, *args, **kwargs):
+    start = time.monotonic()
+    result = function(*args, **kwargs)
+    return result, time.monotonic() - start
+
+
+def wait_idle(source):
+    # Wait for any background fetch of the source to complete
+    future = source.future
+    if future is not None:
+        future.result()
+
+
+server = ThreadingHTTPServer(("127.0.0.1", 0), ExporterHandler)
+server.daemon_threads = True
+exporter_url = f"http://127.0.0.1:{server.server_address[1]}"
+threading.Thread(target=server.serve_forever, daemon=True).start()
+
+try:
+    # A fetched result is served from the cache until it is too old
+    sources = reset_sources()
+    (output, age), elapsed = timed(sources["alpha"].get)
+    check(
+        f"a source is fetched on the first scrape ({elapsed:.2f}s)",
+        output == exporters["alpha"].metrics(),
+    )
+    exporters["alpha"].generation += 1
+    (output, age), elapsed = timed(sources["alpha"].get)
+    check(
+        "a fresh result is served from the cache",
+        exporters["alpha"].requests == 1 and output != exporters["alpha"].metrics(),
+    )
+
+    # A stale result is served at once while it is refreshed in the background
+    exporters["alpha"].mode = "slow"
+    time.sleep(SOURCE_MAX_AGE + 0.1)
+    (output, age), elapsed = timed(sources["alpha"].get)
+    check(
+        f"a stale result is served without waiting for the refresh ({elapsed:.2f}s)",
+        output is not None and elapsed < SLOW_DELAY / 2,
+    )
+    check("a stale result is served with its age", age > SOURCE_MAX_AGE)
+    wait_idle(sources["alpha"])
+    (output, age), elapsed = timed(sources["alpha"].get)
+    check(
+        "the background refresh replaces the stale result",
+        output == exporters["alpha"].metrics() and age < SOURCE_MAX_AGE,
+    )
+
+    # A failing refresh keeps serving the stale result until it is too old
+    exporters["alpha"].mode = "fail"
+    time.sleep(SOURCE_MAX_AGE + 0.1)
+    (output, age), elapsed = timed(sources["alpha"].get)
+    wait_idle(sources["alpha"])
+    check(
+        "a stale result is served while refreshes fail",
+        output == exporters["alpha"].metrics(),
+    )
+    time.sleep(SOURCE_MAX_STALE - SOURCE_MAX_AGE + 0.5)
+    (output, age), elapsed = timed(sources["alpha"].get)
+    check(
+        "a result older than its maximum staleness is not served",
+        output is None and age is None,
+    )
+
+    # A hung source is given up on after its timeout
+    sources = reset_sources()
+    exporters["beta"].mode = "hung"
+    (output, age), elapsed = timed(sources["beta"].get)
+    check(
+        f"a hung source without a result times out ({elapsed:.2f}s)",
+        output is None and SOURCE_TIMEOUT * 0.9 <= elapsed < SOURCE_TIMEOUT + 0.5,
+    )
+    (output, age), elapsed = timed(sources["beta"].get)
+    check(
+        "scrapes of a hung source wait on its running fetch instead of starting another",
+        output is None and exporters["beta"].requests == 1,
+    )
+
+    # A hung source does not hold up a combined scrape of the others
+    (output, retcode), elapsed = timed(
+        pvc_metrics.get_metrics, ["alpha", "beta", "gamma"], combined=True
+    )
+    check(
+        f"a combined scrape with a hung source completes in its timeout ({elapsed:.2f}s)",
+        retcode == 200 and elapsed < SOURCE_TIMEOUT + 0.5,
+    )
+    check(
+        "a combined scrape includes the available sources",
+        exporters["alpha"].metrics() in output
+        and exporters["gamma"].metrics() in output,
+    )
+    check(
+        "a combined scrape reports the hung source as down",
+        'pvc_metrics_source_up{source="beta"} 0' in output
+        and 'pvc_metrics_source_up{source="alpha"} 1' in output,
+    )
+    (output, retcode), elapsed = timed(pvc_metrics.get_metrics, ["beta"])
+    check("a scrape of only a hung source fails", retcode == 400)
+
+    # Sources are fetched in parallel, so a scrape takes as long as the slowest source
+    sources = reset_sources()
+    for exporter in exporters.values():
+        exporter.mode = "slow"
+    (output, retcode), elapsed = timed(
+        pvc_metrics.get_metrics, ["alpha", "gamma"], combined=True
+    )
+    check(
+        f"sources are fetched in parallel ({elapsed:.2f}s)",
+        retcode == 200 and elapsed < SLOW_DELAY * 1.8,
+    )
+
+    # Concurrent scrapes share a single fetch of each source
+    sources = reset_sources()
+    exporters["gamma"].mode = "slow"
+    results = list()
+    scrapers = [
+        threading.Thread(
+            target=lambda: results.append(pvc_metrics.get_metrics(["gamma"]))
+        )
+        for _ in range(8)
+    ]
+    for scraper in scrapers:
+        scraper.start()
+    for scraper in scrapers:
+        scraper.join()
+    check(
+        "concurrent scrapes all succeed",
+        len(results) == 8 and all(retcode == 200 for _, retcode in results),
+    )
+    check(
+        "concurrent scrapes share a single fetch",
+        exporters["gamma"].requests == 1,
+    )
+
+    (output, retcode), elapsed = timed(pvc_metrics.get_metrics, ["delta"])
+    check("a scrape of an invalid source fails", retcode == 400)
+finally:
+    released.set()
+    server.shutdown()
+
+harness.finish()
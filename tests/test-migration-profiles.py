@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+
+# test-migration-profiles.py - PVC live migration profile translation tests
+# Part of the Parallel Virtual Cluster (PVC) system
+#
+#    Copyright (C) 2018-2024 Joshua M. Boniface <joshua@boniface.me>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+# Check the parsing of live migration profiles from the configuration, their translation into
+# Libvirt migration flags and parameters, and the progress reports built from migration job
+# statistics. This needs only the Libvirt Python bindings, not a running Libvirt or cluster, e.g.:
+#   ./tests/test-migration-profiles.py
+
+
+import libvirt
+
+import harness
+
+from harness import check
+
+harness.use_daemon("node-daemon")
+
+import daemon_lib.config as cfg  # noqa: E402
+import pvcnoded.util.libvirt as pvc_libvirt  # noqa: E402
+
+
+def check_invalid(description, o_profiles):
+    try:
+        cfg.get_migration_profiles(o_profiles)
+        check(description, False)
+    except cfg.MalformedConfigurationError:
+        check(description, True)
+
+
+MiB = 1024 * 1024
+DEST_URI = "tcp://hv2.cluster.local"
+
+# Profile parsing
+profiles = cfg.get_migration_profiles(
+    {
+        "busy": {
+            "parallel_connections": 4,
+            "compression": "zstd",
+            "auto_converge": True,
+            "max_downtime": 1000,
+            "bandwidth": 500,
+        },
+        "postcopy": {"postcopy": True, "postcopy_after": 2, "bandwidth": 100},
+        "xbzrle": {"compression": ["xbzrle", "mt"]},
+        "empty": None,
+    }
+)
+check("the default profile is always defined", "default" in profiles)
+check(
+    "the default profile is a plain live migration",
+    profiles["default"] == cfg.DEFAULT_MIGRATION_PROFILE,
+)
+check("an empty profile matches the default", profiles["empty"] == profiles["default"])
+check(
+    "a single compression method is a list", profiles["busy"]["compression"] == ["zstd"]
+)
+check("unset profile settings use the default", profiles["busy"]["postcopy"] is False)
+check_invalid("an unknown setting is rejected", {"bad": {"multifd": 4}})
+check_invalid("an unknown compression is rejected", {"bad": {"compression": "lz4"}})
+check_invalid(
+    "zstd without parallel connections is rejected", {"bad": {"compression": "zstd"}}
+)
+check_invalid(
+    "xbzrle with parallel connections is rejected",
+    {"bad": {"compression": "xbzrle", "parallel_connections": 2}},
+)
+
+# Profile selection
+config = {"migration_default_profile": "busy", "migration_profiles": profiles}
+check(
+    "an unset profile uses the cluster default",
+    pvc_libvirt.get_migration_profile(config, "")[0] == "busy",
+)
+check(
+    "an undefined profile uses the cluster default",
+    pvc_libvirt.get_migration_profile(config, "removed")[0] == "busy",
+)
+check(
+    "a defined profile is used",
+    pvc_libvirt.get_migration_profile(config, "xbzrle")
+    == ("xbzrle", profiles["xbzrle"]),
+)
+
+# Flag and parameter translation
+flags, params = pvc_libvirt.get_migration_parameters(profiles["default"], DEST_URI)
+check(
+    "the default profile is a plain live migration", flags == libvirt.VIR_MIGRATE_LIVE
+)
+check(
+    "the default profile only sets the destination URI",
+    params == {libvirt.VIR_MIGRATE_PARAM_URI: DEST_URI},
+)
+
+flags, params = pvc_libvirt.get_migration_parameters(profiles["busy"], DEST_URI)
+check(
+    "the busy profile sets the parallel, compressed and auto-converge flags",
+    flags
+    == libvirt.VIR_MIGRATE_LIVE
+    | libvirt.VIR_MIGRATE_PARALLEL
+    | libvirt.VIR_MIGRATE_COMPRESSED
+    | libvirt.VIR_MIGRATE_AUTO_CONVERGE,
+)
+check(
+    "the busy profile sets the connections, compression and bandwidth",
+    params
+    == {
+        libvirt.VIR_MIGRATE_PARAM_URI: DEST_URI,
+        libvirt.VIR_MIGRATE_PARAM_PARALLEL_CONNECTIONS: 4,
+        libvirt.VIR_MIGRATE_PARAM_COMPRESSION: ["zstd"],
+        libvirt.VIR_MIGRATE_PARAM_BANDWIDTH: 500,
+    },
+)
+
+flags, params = pvc_libvirt.get_migration_parameters(profiles["postcopy"], DEST_URI)
+check(
+    "the postcopy profile sets the postcopy flag",
+    flags == libvirt.VIR_MIGRATE_LIVE | libvirt.VIR_MIGRATE_POSTCOPY,
+)
+check(
+    "the postcopy profile caps the postcopy bandwidth",
+    params.get(libvirt.VIR_MIGRATE_PARAM_BANDWIDTH_POSTCOPY) == 100,
+)
+
+flags, params = pvc_libvirt.get_migration_parameters(profiles["xbzrle"], DEST_URI)
+check(
+    "the xbzrle profile sets the compressed flag only",
+    flags == libvirt.VIR_MIGRATE_LIVE | libvirt.VIR_MIGRATE_COMPRESSED,
+)
+check(
+    "the xbzrle profile sets both compression methods",
+    params.get(libvirt.VIR_MIGRATE_PARAM_COMPRESSION) == ["xbzrle", "mt"],
+)
+
+# Progress reports
+stats = {
+    "type": libvirt.VIR_DOMAIN_JOB_UNBOUNDED,
+    "time_elapsed": 12000,
+    "memory_total": 8192 * MiB,
+    "memory_remaining": 1024 * MiB,
+    "memory_bps": 128 * MiB,
+    "memory_dirty_rate": 16384,
+    "memory_page_size": 4096,
+    "memory_iteration": 2,
+}
+progress = pvc_libvirt.get_migration_progress(stats, "busy", "precopy")
+check("the dirty rate is in bytes per second", progress["dirty_rate"] == 64 * MiB)
+check("the precopy ETA accounts for the dirty rate", progress["eta"] == 16)
+check("the iteration is reported", progress["iteration"] == 2)
+check("the profile is reported", progress["profile"] == "busy")
+
+progress = pvc_libvirt.get_migration_progress(
+    {**stats, "memory_dirty_rate": 65536}, "busy", "precopy"
+)
+check("a migration which is not converging has no ETA", progress["eta"] is None)
+
+progress = pvc_libvirt.get_migration_progress(
+    {**stats, "memory_dirty_rate": 65536}, "busy", "postcopy"
+)
+check("the postcopy ETA ignores the dirty rate", progress["eta"] == 8)
+
+progress = pvc_libvirt.get_migration_progress(dict(), "default", "precopy")
+check("empty job statistics have no ETA", progress["eta"] is None)
+
+harness.finish()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+
+# test-vm-bulk.py - PVC Zookeeper bulk VM action test
+# Part of the Parallel Virtual Cluster (PVC) system
+#
+#    Copyright (C) 2018-2024 Joshua M. Boniface <joshua@boniface.me>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+# Check the bulk VM actions against Zookeeper, including selections and actions which fail for
+# some of the selected VMs. Synthetic VMs are created in Zookeeper only (not in Libvirt) and
+# removed afterwards; a thread stands in for the node daemons, completing shutdowns and restarts.
+# Run this against a local or test Zookeeper without running node daemons, e.g.:
+#   PVC_CONFIG_FILE=/etc/pvc/pvc.conf ./tests/test-vm-bulk.py
+
+import threading
+import time
+
+from uuid import uuid4
+
+import harness
+
+from harness import check
+
+harness.use_daemon("api-daemon")
+
+import daemon_lib.vm as pvc_vm  # noqa: E402
+
+
+TEST_PREFIX = "pvcbulktest"
+TEST_COUNT = 8
+
+zkhandler = harness.connect_zookeeper()
+
+
+def create_vms(count):
+    vm_uuids = list()
+    keys = list()
+    for vm in range(count):
+        vm_uuid = str(uuid4())
+        vm_uuids.append(vm_uuid)
+        keys += [
+            (("domain", vm_uuid), f"{TEST_PREFIX}{vm}"),
+            (("domain.state", vm_uuid), "stop"),
+            (("domain.node", vm_uuid), ""),
+            (("domain.meta.autostart", vm_uuid), "False"),
+            (("domain.meta.migrate_method", vm_uuid), "none"),
+            (("domain.meta.node_limit", vm_uuid), ""),
+            (("domain.meta.node_selector", vm_uuid), "none"),
+            (("domain.meta.tags", vm_uuid), ""),
+        ]
+    zkhandler.write(keys)
+    return vm_uuids
+
+
+def remove_vms(vm_uuids):
+    zkhandler.delete([("domain", vm_uuid) for vm_uuid in vm_uuids])
+
+
+def simulate_nodes(vm_uuids, stop):
+    # Complete shutdowns and restarts as the node daemons would
+    while not stop.is_set():
+        for vm_uuid in vm_uuids:
+            state = zkhandler.read(("domain.state", vm_uuid))
+            if state == "shutdown":
+                zkhandler.write([(("domain.state", vm_uuid), "stop")])
+            elif state == "restart":
+                zkhandler.write([(("domain.state", vm_uuid), "start")])
+        time.sleep(0.2)
+
+
+def results_by_name(results):
+    return {result["name"]: result for result in results}
+
+
+def states(vm_uuids):
+    return [zkhandler.read(("domain.state", vm_uuid)) for vm_uuid in vm_uuids]
+
+
+vm_uuids = create_vms(TEST_COUNT)
+vm_names = [f"{TEST_PREFIX}{vm}" for vm in range(TEST_COUNT)]
+stop = threading.Event()
+simulator = threading.Thread(target=simulate_nodes, args=(vm_uuids, stop))
+simulator.start()
+
+try:
+    retflag, retdata = pvc_vm.bulk_set_vm_state(zkhandler, "start")
+    check("a bulk action without a selection fails", not retflag)
+    check("a bulk action without a selection returns a message", type(retdata) is str)
+
+    retflag, retdata = pvc_vm.bulk_set_vm_state(zkhandler, "start", state="notastate")
+    check("a bulk action selecting an invalid state fails", not retflag)
+
+    # Start all but one VM, one of which is a mirror, selecting one VM by UUID and one missing VM
+    zkhandler.write([(("domain.state", vm_uuids[1]), "mirror")])
+    selection = vm_names[:-2] + [vm_uuids[-2], f"{TEST_PREFIX}missing"]
+    start = time.monotonic()
+    retflag, retdata = pvc_vm.bulk_set_vm_state(zkhandler, "start", vms=selection)
+    elapsed = time.monotonic() - start
+    results = results_by_name(retdata)
+    check("starting with a failing VM fails overall", not retflag)
+    check("starting returns a result for each selected VM", len(retdata) == TEST_COUNT)
+    check("starting a mirror VM fails", not results[vm_names[1]]["result"])
+    check("starting a missing VM fails", not results[f"{TEST_PREFIX}missing"]["result"])
+    check(
+        "starting the other VMs succeeds",
+        all(results[name]["result"] for name in vm_names[:-1] if name != vm_names[1]),
+    )
+    check(
+        "the other VMs are started",
+        states(vm_uuids)
+        == ["start", "mirror"] + ["start"] * (TEST_COUNT - 3) + ["stop"],
+    )
+    check("the state changes are batched", elapsed < 0.5 * (TEST_COUNT - 2))
+
+    # Restart the VMs in the start state, and shut down VMs which are not all started
+    retflag, retdata = pvc_vm.bulk_set_vm_state(
+        zkhandler, "restart", state="start", vms=vm_names, wait=True
+    )
+    check("restarting the started VMs succeeds", retflag)
+    check("restarting selects only the started VMs", len(retdata) == TEST_COUNT - 2)
+    check(
+        "the restarted VMs are started again",
+        states(vm_uuids).count("start") == TEST_COUNT - 2,
+    )
+
+    retflag, retdata = pvc_vm.bulk_set_vm_state(
+        zkhandler, "shutdown", vms=vm_names, wait=True, concurrency=2
+    )
+    results = results_by_name(retdata)
+    check("shutting down with stopped VMs fails overall", not retflag)
+    check("shutting down a stopped VM fails", not results[vm_names[-1]]["result"])
+    check(
+        "the started VMs are shut down",
+        states(vm_uuids) == ["stop", "mirror"] + ["stop"] * (TEST_COUNT - 2),
+    )
+
+    # Disable while another client holds the state lock of one VM
+    pvc_vm.bulk_set_vm_state(zkhandler, "start", vms=vm_names[2:])
+    lock = zkhandler.exclusivelock(("domain.state", vm_uuids[2]))
+    lock.acquire()
+    try:
+        errors = pvc_vm.bulk_change_state(
+            zkhandler,
+            [
+                {"uuid": vm_uuid, "name": vm_name}
+                for vm_uuid, vm_name in zip(vm_uuids[2:], vm_names[2:])
+            ],
+            "stop",
+            lock_timeout=1,
+        )
+    finally:
+        lock.release()
+    check("a locked VM is not changed", list(errors.keys()) == [vm_uuids[2]])
+    check("a locked VM keeps its state", states(vm_uuids)[2] == "start")
+    check(
+        "the unlocked VMs are changed",
+        states(vm_uuids)[3:] == ["stop"] * (TEST_COUNT - 3),
+    )
+
+    retflag, retdata = pvc_vm.bulk_set_vm_state(
+        zkhandler, "disable", vms=vm_names, force=True
+    )
+    results = results_by_name(retdata)
+    check("force disabling with a mirror VM succeeds", retflag)
+    check("force disabling a mirror VM succeeds", results[vm_names[1]]["result"])
+    check("all VMs are disabled", states(vm_uuids) == ["disable"] * TEST_COUNT)
+
+    # Tag by name, then remove the tag from VMs selected by tag, one of which is protected
+    retflag, retdata = pvc_vm.bulk_modify_vm_tag(
+        zkhandler, "add", "bulk", vms=vm_names[:4]
+    )
+    check("adding a tag succeeds", retflag and len(retdata) == 4)
+    pvc_vm.modify_vm_tag(zkhandler, vm_names[4], "add", "bulk", protected=True)
+
+    retflag, retdata = pvc_vm.bulk_modify_vm_tag(
+        zkhandler, "remove", "bulk", select_tag="bulk"
+    )
+    results = results_by_name(retdata)
+    check("removing a tag with a protected VM fails overall", not retflag)
+    check("removing a tag selects the tagged VMs", len(retdata) == 5)
+    check("removing a protected tag fails", not results[vm_names[4]]["result"])
+    check(
+        "the unprotected tags are removed",
+        pvc_vm.get_tag_index(zkhandler).get("bulk", list()) == [vm_uuids[4]],
+    )
+
+    retflag, retdata = pvc_vm.bulk_modify_vm_tag(
+        zkhandler, "remove", "bulk", vms=vm_names[:2]
+    )
+    check("removing a missing tag fails", not any(r["result"] for r in retdata))
+
+    # Modify metadata, including a batch which fails and must be written VM by VM
+    retflag, retdata = pvc_vm.bulk_modify_vm_metadata(
+        zkhandler, None, None, None, None, None, None, state="disable"
+    )
+    check("modifying metadata without updates fails", not retflag)
+
+    retflag, retdata = pvc_vm.bulk_modify_vm_metadata(
+        zkhandler, "hv9", None, None, None, None, "soon", state="disable"
+    )
+    check(
+        "modifying metadata with an invalid max downtime fails",
+        not retflag and isinstance(retdata, str),
+    )
+    check(
+        "an invalid max downtime modifies no VM",
+        not any(
+            zkhandler.read(("domain.meta.node_limit", vm_uuid)) == "hv9"
+            for vm_uuid in vm_uuids
+        ),
+    )
+
+    retflag, retdata = pvc_vm.bulk_modify_vm_metadata(
+        zkhandler, "hv1,hv2", "mem", None, None, "live", None, state="disable"
+    )
+    check("modifying metadata succeeds", retflag and len(retdata) == TEST_COUNT)
+    check(
+        "the metadata of all VMs is modified",
+        all(
+            zkhandler.read(("domain.meta.node_limit", vm_uuid)) == "hv1,hv2"
+            for vm_uuid in vm_uuids
+        ),
+    )
+
+    missing_uuid = str(uuid4())
+    written = pvc_vm.bulk_write(
+        zkhandler,
+        [
+            (vm_uuids[0], [(("domain.meta.node_limit", vm_uuids[0]), "hv3")]),
+            (missing_uuid, [(("domain.meta.node_limit", missing_uuid), "hv3")]),
+            (vm_uuids[1], [(("domain.meta.node_limit", vm_uuids[1]), "hv3")]),
+        ],
+        batch_size=2,
+    )
+    check("a failed batch is written VM by VM", written == set(vm_uuids[:2]))
+    check(
+        "a failed batch does not write the missing VM",
+        not zkhandler.exists(("domain", missing_uuid)),
+    )
+finally:
+    stop.set()
+    simulator.join()
+    remove_vms(vm_uuids)
+    zkhandler.disconnect()
+
+harness.finish()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+
+# test-vm-list.py - PVC API VM list tests
+# Part of the Parallel Virtual Cluster (PVC) system
+#
+#    Copyright (C) 2018-2024 Joshua M. Boniface <joshua@boniface.me>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+# Check that the API's streamed and paged VM lists return every VM when the information of some
+# VMs cannot be obtained (e.g. VMs being defined or removed), including the first or last VM of a
+# page and every VM of a page. Synthetic VMs are created in Zookeeper only (not in Libvirt) and
+# removed afterwards, so run this against a local or test Zookeeper, e.g.:
+#   PVC_CONFIG_FILE=/etc/pvc/pvc.conf ./tests/test-vm-list.py
+
+import json
+
+from uuid import uuid4
+
+import harness
+
+from harness import check
+
+harness.use_daemon("api-daemon")
+
+import flask  # noqa: E402
+import pvcapid.helper as pvc_helper  # noqa: E402
+
+
+TEST_PREFIX = "pvclisttest"
+TEST_COUNT = 250
+PAGE_SIZE = 50
+
+# The VMs without valid XML: the first and last of the first page, and all of the third page
+BROKEN_VMS = {0, PAGE_SIZE - 1} | set(range(2 * PAGE_SIZE, 3 * PAGE_SIZE))
+
+VM_XML = """<domain type="kvm">
+  <name>{name}</name>
+  <uuid>{uuid}</uuid>
+  <memory unit="MiB">1024</memory>
+  <vcpu>1</vcpu>
+  <os>
+    <type arch="x86_64" machine="pc-i440fx-2.7">hvm</type>
+  </os>
+  <devices>
+    <emulator>/usr/bin/kvm</emulator>
+    <console type="pty"/>
+  </devices>
+</domain>
+"""
+
+zkhandler = harness.connect_zookeeper()
+
+
+def create_vms(count):
+    vm_uuids = list()
+    keys = list()
+    for vm in range(count):
+        vm_uuid = str(uuid4())
+        vm_name = f"{TEST_PREFIX}{vm:04d}"
+        vm_uuids.append(vm_uuid)
+        vm_xml = VM_XML.format(name=vm_name, uuid=vm_uuid)
+        if vm in BROKEN_VMS:
+            vm_xml = vm_xml[: len(vm_xml) // 2]
+        keys += [
+            (("domain", vm_uuid), vm_name),
+            (("domain.xml", vm_uuid), vm_xml),
+            (("domain.state", vm_uuid), "stop"),
+            (("domain.profile", vm_uuid), ""),
+            (("domain.stats", vm_uuid), ""),
+            (("domain.node", vm_uuid), ""),
+            (("domain.last_node", vm_uuid), ""),
+            (("domain.failed_reason", vm_uuid), ""),
+            (("domain.storage.volumes", vm_uuid), ""),
+            (("domain.console.log", vm_uuid), ""),
+            (("domain.console.vnc", vm_uuid), ""),
+            (("domain.meta.autostart", vm_uuid), "False"),
+            (("domain.meta.migrate_method", vm_uuid), "none"),
+            (("domain.meta.migrate_max_downtime", vm_uuid), "300"),
+            (("domain.meta.node_limit", vm_uuid), ""),
+            (("domain.meta.node_selector", vm_uuid), "none"),
+            (("domain.meta.tags", vm_uuid), ""),
+            (("domain.migrate.sync_lock", vm_uuid), ""),
+            (("domain.snapshots", vm_uuid), ""),
+        ]
+        if len(keys) >= 500:
+            zkhandler.write(keys)
+            keys = list()
+    zkhandler.write(keys)
+    return vm_uuids
+
+
+def expected_names():
+    return [
+        f"{TEST_PREFIX}{vm:04d}" for vm in range(TEST_COUNT) if vm not in BROKEN_VMS
+    ]
+
+
+def vm_list(**kwargs):
+    return pvc_helper.vm_list(limit=f"^{TEST_PREFIX}", **kwargs)
+
+
+vm_uuids = create_vms(TEST_COUNT)
+try:
+    # The whole list is streamed in chunks, the first of which has broken VMs
+    with flask.Flask(__name__).test_request_context():
+        response = vm_list()
+        check(
+            "the whole list is streamed",
+            isinstance(response, flask.Response),
+        )
+        names = [vm["name"] for vm in json.loads(response.get_data())]
+        response.close()
+    check(
+        "the whole list has every VM with information",
+        names == expected_names(),
+    )
+
+    # Each page is followed by the cursor of the next, including pages with broken VMs
+    names = list()
+    cursors = list()
+    cursor = None
+    while True:
+        response = vm_list(cursor=cursor, page_size=PAGE_SIZE)
+        names += [vm["name"] for vm in response[0]]
+        if len(response) < 3:
+            break
+        cursor = response[2][pvc_helper.LIST_CURSOR_HEADER]
+        cursors.append(cursor)
+        if len(cursors) > TEST_COUNT // PAGE_SIZE:
+            break
+    check(
+        "each page but the last has a next cursor",
+        len(cursors) == TEST_COUNT // PAGE_SIZE - 1,
+    )
+    check(
+        "the pages have every VM with information",
+        names == expected_names(),
+    )
+
+    response = vm_list(cursor=cursors[1], page_size=PAGE_SIZE)
+    check(
+        "a page of only broken VMs is empty but has a next cursor",
+        response[0] == list() and pvc_helper.LIST_CURSOR_HEADER in response[2],
+    )
+finally:
+    zkhandler.delete([("domain", vm_uuid) for vm_uuid in vm_uuids])
+    zkhandler.disconnect()
+
+harness.finish()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+
+# test-vm-snapshot.py - PVC Zookeeper VM snapshot concurrency test
+# Part of the Parallel Virtual Cluster (PVC) system
+#
+#    Copyright (C) 2018-2024 Joshua M. Boniface <joshua@boniface.me>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+# Check and time the creation, rollback and removal of VM snapshots with 1 and with 16 volumes,
+# including a snapshot which fails for one volume. Synthetic VMs and volumes are created in
+# Zookeeper only and removed afterwards, and a stand-in "rbd" command which takes RBD_DELAY
+# seconds per call is placed first in the PATH, so Ceph is never touched. Run this against a
+# local or test Zookeeper, e.g.:
+#   PVC_CONFIG_FILE=/etc/pvc/pvc.conf ./tests/test-vm-snapshot.py
+
+import os
+import shutil
+import tempfile
+import time
+
+from uuid import uuid4
+
+import harness
+
+from harness import check
+
+harness.use_daemon("api-daemon")
+
+import daemon_lib.ceph as pvc_ceph  # noqa: E402
+import daemon_lib.vm as pvc_vm  # noqa: E402
+
+
+TEST_PREFIX = "pvcsnaptest"
+TEST_POOL = "pvcsnaptest"
+RBD_DELAY = 0.2
+
+# Each call is logged to the file named by RBD_LOG
+FAKE_RBD = f"""#!/bin/sh
+echo "$*" >>"$RBD_LOG"
+sleep {RBD_DELAY}
+case "$*" in
+    *failvolume@*) echo "rbd: failed to create snapshot" >&2; exit 1 ;;
+    info*) echo '{{}}' ;;
+esac
+exit 0
+"""
+
+zkhandler = harness.connect_zookeeper()
+
+
+def create_vm(name, volumes):
+    vm_uuid = str(uuid4())
+    rbds = [f"{TEST_POOL}/{name}_{volume}" for volume in volumes]
+    keys = [
+        (("domain", vm_uuid), name),
+        (("domain.state", vm_uuid), "stop"),
+        (("domain.node", vm_uuid), ""),
+        (("domain.xml", vm_uuid), f"<domain><name>{name}</name></domain>"),
+        (("domain.storage.volumes", vm_uuid), ",".join(rbds)),
+        (("domain.snapshots", vm_uuid), ""),
+    ]
+    for rbd in rbds:
+        keys += [
+            (("volume", rbd), ""),
+            (("volume.stats", rbd), '{"snapshot_count": 0}'),
+            (("snapshot", rbd), ""),
+        ]
+    zkhandler.write(keys)
+    return vm_uuid
+
+
+def snapshot_count(vm_uuid):
+    rbds = zkhandler.read(("domain.storage.volumes", vm_uuid)).split(",")
+    return sum(len(zkhandler.children(("snapshot", rbd)) or list()) for rbd in rbds)
+
+
+def rbd_calls():
+    with open(os.environ["RBD_LOG"], "r") as fh:
+        return fh.read().splitlines()
+
+
+# Stand-ins for the guest agent freeze and thaw, which record the RBD calls made while frozen
+thaws = list()
+
+
+def fsfreeze(zkhandler, dom_uuid):
+    open(os.environ["RBD_LOG"], "w").close()
+    return dom_uuid
+
+
+def fsthaw(frozen):
+    thaws.append((rbd_calls(), snapshot_count(frozen)))
+
+
+def timed(function, *args, **kwargs):
+    start = time.monotonic()
+    try:
+        result = function(zkhandler, None, *args, **kwargs)
+    except Exception as e:
+        result = e
+    return result, time.monotonic() - start
+
+
+rbd_dir = tempfile.mkdtemp(prefix=TEST_PREFIX)
+with open(os.path.join(rbd_dir, "rbd"), "w") as fh:
+    fh.write(FAKE_RBD)
+os.chmod(os.path.join(rbd_dir, "rbd"), 0o755)
+os.environ["PATH"] = f"{rbd_dir}:{os.environ['PATH']}"
+os.environ["RBD_LOG"] = os.path.join(rbd_dir, "calls")
+
+zkhandler.write(
+    [
+        (("pool", TEST_POOL), ""),
+        (("pool.snapshot_count", TEST_POOL), "0"),
+        (("volume", TEST_POOL), ""),
+        (("snapshot", TEST_POOL), ""),
+    ]
+)
+vm_uuids = list()
+
+try:
+    timings = dict()
+    for count in [1, 16]:
+        name = f"{TEST_PREFIX}{count}"
+        vm_uuid = create_vm(name, [f"disk{volume}" for volume in range(count)])
+        vm_uuids.append(vm_uuid)
+
+        for action, function, args, kwargs in [
+            ("create", pvc_vm.vm_worker_create_snapshot, [name, "snap"], dict()),
+            ("rollback", pvc_vm.vm_worker_rollback_snapshot, [name, "snap"], dict()),
+            ("remove", pvc_vm.vm_worker_remove_snapshot, [name, "snap"], dict()),
+            (
+                "create sequentially",
+                pvc_vm.vm_worker_create_snapshot,
+                [name, "seq"],
+                {"concurrency": 1},
+            ),
+        ]:
+            result, elapsed = timed(function, *args, **kwargs)
+            timings[(action, count)] = elapsed
+            check(
+                f"{action} a snapshot of {count} volumes succeeds ({elapsed:.2f}s)",
+                not isinstance(result, Exception),
+            )
+            if action == "create":
+                check(
+                    f"the snapshot of {count} volumes has all volume snapshots",
+                    snapshot_count(vm_uuid) == count,
+                )
+            elif action == "remove":
+                check(
+                    f"removing the snapshot of {count} volumes removes all volume snapshots",
+                    snapshot_count(vm_uuid) == 0,
+                )
+
+    for action in ["create", "rollback", "remove"]:
+        check(
+            f"{action} with 16 volumes takes well under 16 times as long as with 1",
+            timings[(action, 16)] < 4 * timings[(action, 1)],
+        )
+    check(
+        "creating concurrently is faster than sequentially",
+        timings[("create", 16)] < timings[("create sequentially", 16)] / 2,
+    )
+
+    # A snapshot which fails for one volume leaves no snapshot of the others
+    name = f"{TEST_PREFIX}fail"
+    vm_uuid = create_vm(name, [f"disk{volume}" for volume in range(7)] + ["failvolume"])
+    vm_uuids.append(vm_uuid)
+    result, elapsed = timed(pvc_vm.vm_worker_create_snapshot, name, "snap")
+    check("a snapshot failing for one volume fails", isinstance(result, Exception))
+    check("a failed snapshot leaves no volume snapshots", snapshot_count(vm_uuid) == 0)
+    check(
+        "a failed snapshot leaves no VM snapshot",
+        not zkhandler.children(("domain.snapshots", vm_uuid)),
+    )
+
+    # Only the RBD snapshots are created while the guest filesystems are frozen
+    pvc_vm.vm_worker_helper_fsfreeze = fsfreeze
+    pvc_vm.vm_worker_helper_fsthaw = fsthaw
+    name = f"{TEST_PREFIX}frozen"
+    vm_uuid = create_vm(name, [f"disk{volume}" for volume in range(16)])
+    vm_uuids.append(vm_uuid)
+    result, elapsed = timed(
+        pvc_vm.vm_worker_create_snapshot, name, "snap", fsfreeze=True
+    )
+    check(
+        f"creating a snapshot with frozen filesystems succeeds ({elapsed:.2f}s)",
+        not isinstance(result, Exception),
+    )
+    check("the filesystems are thawed once", len(thaws) == 1)
+    calls, frozen_count = thaws[0]
+    check(
+        "only the RBD snapshots are created while frozen",
+        len(calls) == 16 and all(call.startswith("snap create ") for call in calls),
+    )
+    check(
+        "the volume snapshots are added after thawing",
+        frozen_count == 0 and snapshot_count(vm_uuid) == 16,
+    )
+
+    thaws.clear()
+    name = f"{TEST_PREFIX}frozenfail"
+    vm_uuid = create_vm(name, [f"disk{volume}" for volume in range(7)] + ["failvolume"])
+    vm_uuids.append(vm_uuid)
+    result, elapsed = timed(
+        pvc_vm.vm_worker_create_snapshot, name, "snap", fsfreeze=True
+    )
+    check(
+        "a snapshot with frozen filesystems failing for one volume fails",
+        isinstance(result, Exception) and len(thaws) == 1,
+    )
+    check(
+        "a failed snapshot with frozen filesystems leaves no volume snapshots",
+        snapshot_count(vm_uuid) == 0,
+    )
+
+    # The pool counts each snapshot once, including snapshots added again in Zookeeper only
+    rbd = f"{TEST_POOL}/{TEST_PREFIX}frozen_disk0"
+    check(
+        "the pool snapshot counter matches the snapshots",
+        pvc_ceph.get_snapshot_counts(zkhandler, [TEST_POOL])
+        == pvc_ceph.count_snapshots(zkhandler, [TEST_POOL]),
+    )
+    counts = pvc_ceph.get_snapshot_counts(zkhandler, [TEST_POOL])
+    pvc_ceph.add_snapshot(zkhandler, *rbd.split("/"), "snap", zk_only=True)
+    check(
+        "adding an existing snapshot again does not count it again",
+        pvc_ceph.get_snapshot_counts(zkhandler, [TEST_POOL]) == counts
+        and zkhandler.read(("volume.stats", rbd)) == '{"snapshot_count": 1}',
+    )
+finally:
+    zkhandler.delete([("domain", vm_uuid) for vm_uuid in vm_uuids])
+    zkhandler.delete(
+        [("pool", TEST_POOL), ("volume", TEST_POOL), ("snapshot", TEST_POOL)]
+    )
+    zkhandler.disconnect()
+    shutil.rmtree(rbd_dir)
+
+harness.finish()
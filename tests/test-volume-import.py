@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+
+# test-volume-import.py - PVC concurrent volume import tests
+# Part of the Parallel Virtual Cluster (PVC) system
+#
+#    Copyright (C) 2018-2024 Joshua M. Boniface <joshua@boniface.me>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+# Check and time the concurrent import of volume images used by snapshot imports and backup
+# restores, including incremental chains, bandwidth limits and failures. A stand-in "rbd" command
+# which takes RBD_DELAY seconds per call and writes each imported volume to a file is placed first
+# in the PATH, so Ceph is never touched and no cluster is needed, e.g.:
+#   ./tests/test-volume-import.py
+
+import os
+import shutil
+import tempfile
+import time
+
+import harness
+
+from harness import check
+
+harness.use_daemon("api-daemon")
+
+import daemon_lib.blockstream as blockstream  # noqa: E402
+import daemon_lib.vm as pvc_vm  # noqa: E402
+
+
+RBD_DELAY = 0.5
+MiB = 1024 * 1024
+
+# Imports write the volume, import-diffs append to it; the volume is the last argument
+FAKE_RBD = f"""#!/bin/sh
+sleep {RBD_DELAY}
+for last; do true; done
+volume="$RBD_DIR/$(echo "$last" | tr / _)"
+case "$*" in
+    *failvolume*) cat >/dev/null; echo "rbd: import failed" >&2; exit 1 ;;
+    import-diff*) [ -f "$volume" ] || exit 2; cat >>"$volume" ;;
+    import*) cat >"$volume" ;;
+esac
+exit 0
+"""
+
+
+def write_image(name, content):
+    path = os.path.join(image_dir, name)
+    with open(path, "wb") as fh:
+        fh.write(content)
+    return path
+
+
+def volume_content(volume):
+    with open(os.path.join(rbd_dir, f"pool_{volume}"), "rb") as fh:
+        return fh.read()
+
+
+def full_chains(volumes, size=1024):
+    return [
+        (
+            f"pool/{volume}",
+            [
+                (
+                    f"import export image {volume}",
+                    pvc_vm.rbd_import_command("pool", volume),
+                    write_image(f"{volume}.rbdimg", volume.encode() * size),
+                )
+            ],
+        )
+        for volume in volumes
+    ]
+
+
+def timed(chains, **kwargs):
+    start = time.monotonic()
+    result = blockstream.import_volumes(chains, **kwargs)
+    return result, time.monotonic() - start
+
+
+rbd_dir = tempfile.mkdtemp(prefix="pvcimporttest")
+image_dir = os.path.join(rbd_dir, "images")
+os.mkdir(image_dir)
+with open(os.path.join(rbd_dir, "rbd"), "w") as fh:
+    fh.write(FAKE_RBD)
+os.chmod(os.path.join(rbd_dir, "rbd"), 0o755)
+os.environ["PATH"] = f"{rbd_dir}:{os.environ['PATH']}"
+os.environ["RBD_DIR"] = rbd_dir
+
+try:
+    # Full images, sequentially and concurrently
+    (success, message, _), single = timed(full_chains(["disk0"]))
+    check(f"importing 1 volume succeeds ({single:.2f}s)", success)
+    check(
+        "the volume is imported from the image",
+        volume_content("disk0") == b"disk0" * 1024,
+    )
+
+    volumes = [f"disk{volume}" for volume in range(8)]
+    (success, message, progress), sequential = timed(
+        full_chains(volumes), volume_concurrency=1
+    )
+    check(f"importing 8 volumes sequentially succeeds ({sequential:.2f}s)", success)
+    (success, message, progress), concurrent = timed(
+        full_chains(volumes), volume_concurrency=8
+    )
+    check(f"importing 8 volumes concurrently succeeds ({concurrent:.2f}s)", success)
+    check(
+        "importing 8 volumes concurrently takes well under 8 times as long as 1",
+        concurrent < 3 * single,
+    )
+    check(
+        "importing concurrently is faster than sequentially",
+        concurrent < sequential / 2,
+    )
+    check(
+        "all volumes are imported from their images",
+        all(volume_content(volume) == volume.encode() * 1024 for volume in volumes),
+    )
+    check(
+        "the progress accounts for all image bytes",
+        progress.summary()[0] * MiB == 8 * 5 * 1024,
+    )
+
+    # Incremental chains import the parent image before the diff of the same volume
+    chains = [
+        (
+            f"pool/{volume}",
+            [
+                (
+                    f"import parent export image {volume}",
+                    pvc_vm.rbd_import_command("pool", volume),
+                    write_image(f"{volume}.parent.rbdimg", b"parent"),
+                ),
+                (
+                    f"import incremental export image {volume}",
+                    pvc_vm.rbd_import_command("pool", volume, diff=True),
+                    write_image(f"{volume}.rbddiff", b"diff"),
+                ),
+            ],
+        )
+        for volume in ["inc0", "inc1", "inc2"]
+    ]
+    (success, message, _), elapsed = timed(chains, volume_concurrency=3)
+    check(f"importing incremental chains succeeds ({elapsed:.2f}s)", success)
+    check(
+        "each diff is imported after its parent image",
+        all(volume_content(v) == b"parentdiff" for v in ["inc0", "inc1", "inc2"]),
+    )
+    check("incremental chains run concurrently", elapsed < 3 * 2 * RBD_DELAY * 0.75)
+
+    # A bandwidth limit caps the combined read rate of all volumes
+    limit = 4 * MiB
+    chains = full_chains(["bw0", "bw1"], size=2 * MiB)
+    total_bytes = sum(os.path.getsize(steps[0][2]) for _, steps in chains)
+    (success, message, _), elapsed = timed(
+        chains,
+        volume_concurrency=2,
+        limiter=blockstream.RateLimiter(limit),
+    )
+    check(f"importing with a bandwidth limit succeeds ({elapsed:.2f}s)", success)
+    check(
+        "the bandwidth limit caps the combined rate",
+        elapsed >= (total_bytes - limit) / limit,
+    )
+    check(
+        "all volume bytes are imported with a bandwidth limit",
+        len(volume_content("bw0")) + len(volume_content("bw1")) == total_bytes,
+    )
+
+    # Progress is reported while imports are running
+    reports = list()
+    blockstream.PROGRESS_INTERVAL = 0.1
+    (success, message, _), elapsed = timed(
+        full_chains(["report0", "report1"]), report=reports.append
+    )
+    check("progress is reported while importing", len(reports) > 0)
+    check(
+        "progress reports name the volumes",
+        all("pool/report0" in report for report in reports),
+    )
+
+    # A failing volume fails the import without stopping the others
+    (success, message, _), elapsed = timed(
+        full_chains(["good0", "failvolume", "good1"]), volume_concurrency=3
+    )
+    check("an import failing for one volume fails", not success)
+    check(
+        "the failure names the step and the error",
+        message == "Failed to import export image failvolume: rbd: import failed",
+    )
+    check(
+        "the other volumes are imported",
+        volume_content("good0") == b"good0" * 1024
+        and volume_content("good1") == b"good1" * 1024,
+    )
+
+    chains = [
+        (
+            "pool/orphan",
+            [
+                (
+                    "import incremental export image orphan",
+                    pvc_vm.rbd_import_command("pool", "orphan", diff=True),
+                    write_image("orphan.rbddiff", b"diff"),
+                )
+            ],
+        )
+    ]
+    (success, message, _), elapsed = timed(chains)
+    check("a diff without its parent image fails", not success)
+finally:
+    shutil.rmtree(rbd_dir)
+
+harness.finish()
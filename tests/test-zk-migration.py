@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+
+# test-zk-migration.py - PVC Zookeeper schema migration tests
+# Part of the Parallel Virtual Cluster (PVC) system
+#
+#    Copyright (C) 2018-2024 Joshua M. Boniface <joshua@boniface.me>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+# Check that migrating a cluster across several schema versions at once, and rolling it back,
+# keeps the data of every key, including keys packed into documents along the way. A synthetic
+# node, VM, SR-IOV VF and fault are created at the old version under the "/pvcmigrationtest"
+# chroot, which is removed afterwards, so the data of the cluster itself is never touched. Run
+# this against a local or test Zookeeper, e.g.:
+#   PVC_CONFIG_FILE=/etc/pvc/pvc.conf ./tests/test-zk-migration.py 15
+
+import os
+import sys
+
+from uuid import uuid4
+
+import harness
+
+from harness import check
+
+api_path = harness.use_daemon("api-daemon")
+
+import daemon_lib.config as cfg  # noqa: E402
+
+from daemon_lib.zkhandler import ZKHandler, SCHEMA_PATH  # noqa: E402
+
+
+TEST_CHROOT = "/pvcmigrationtest"
+TEST_NODE = "hv1"
+TEST_VF = "ens1f0v0"
+TEST_FAULT = "pvcmigrationtest"
+
+from_version = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+
+config = cfg.get_configuration()
+root_zkhandler = ZKHandler(config)
+root_zkhandler.connect()
+if root_zkhandler.zk_conn.exists(TEST_CHROOT):
+    root_zkhandler.zk_conn.delete(TEST_CHROOT, recursive=True)
+root_zkhandler.zk_conn.create(TEST_CHROOT)
+
+zkhandler = ZKHandler(
+    dict(config, coordinators=list(config["coordinators"]) + [TEST_CHROOT])
+)
+zkhandler.connect()
+zkhandler.schema.schema_path = os.path.join(api_path, SCHEMA_PATH)
+to_version = zkhandler.schema.find_latest()
+
+
+def load_schema(version):
+    zkhandler.schema.load(version, quiet=True)
+    return zkhandler.schema
+
+
+def vf_key(field):
+    return ("node.sriov.vf", TEST_NODE, field, TEST_VF)
+
+
+vm_uuid = str(uuid4())
+expected = [
+    (("node.ipmi.hostname", TEST_NODE), "hv1-lom.cluster.local"),
+    (("node.ipmi.username", TEST_NODE), "admin"),
+    (("node.ipmi.password", TEST_NODE), "S3cret!"),
+    (("node.data.static", TEST_NODE), "16 2 x86_64 6.1.0"),
+    (("node.data.pvc_version", TEST_NODE), "0.9.100"),
+    (("domain.meta.autostart", vm_uuid), "True"),
+    (("domain.meta.migrate_method", vm_uuid), "live"),
+    (("domain.meta.migrate_max_downtime", vm_uuid), "500"),
+    (("domain.meta.node_selector", vm_uuid), "mem"),
+    (("domain.meta.node_limit", vm_uuid), "hv1,hv2"),
+    (vf_key("sriov_vf.pci.domain"), "0000"),
+    (vf_key("sriov_vf.pci.bus"), "3b"),
+    (vf_key("sriov_vf.pci.slot"), "02"),
+    (vf_key("sriov_vf.pci.function"), "1"),
+    (("faults.first_time", TEST_FAULT), "1700000000"),
+    (("faults.last_time", TEST_FAULT), "1700000600"),
+    (("faults.status", TEST_FAULT), "ack"),
+    (("faults.delta", TEST_FAULT), "25"),
+    (("faults.message", TEST_FAULT), "Node hv1 was fenced"),
+]
+
+
+def changed_keys():
+    return [key for key, value in expected if zkhandler.read(key) != value]
+
+
+try:
+    # Create the objects and their keys at the old version
+    load_schema(from_version)
+    zkhandler.schema.apply(zkhandler)
+    zkhandler.write(
+        [
+            (("node", TEST_NODE), ""),
+            (("domain", vm_uuid), "pvcmigrationtest"),
+            (("faults", TEST_FAULT), ""),
+        ]
+    )
+    zkhandler.schema.apply(zkhandler)
+    zkhandler.write(
+        [
+            (("node.sriov.vf", TEST_NODE), ""),
+            (vf_key("sriov_vf"), ""),
+            (vf_key("sriov_vf.pci"), ""),
+        ]
+        + expected
+    )
+    check(
+        f"the keys are written at version {from_version}",
+        changed_keys() == list(),
+    )
+
+    # Migrate across every version at once, as a node daemon does
+    load_schema(from_version).migrate(zkhandler, to_version)
+    load_schema(to_version).apply(zkhandler)
+    check(
+        f"migrating from version {from_version} to {to_version} keeps all keys",
+        changed_keys() == list(),
+    )
+    check(
+        f"version {to_version} validates after migrating",
+        zkhandler.schema.validate(zkhandler),
+    )
+
+    # A migration interrupted after packing is run again in full by the next node daemon
+    load_schema(from_version).migrate(zkhandler, to_version)
+    load_schema(to_version)
+    check(
+        "migrating again keeps all keys",
+        changed_keys() == list(),
+    )
+
+    # Roll back across every version at once
+    load_schema(to_version).rollback(zkhandler, from_version)
+    load_schema(from_version).apply(zkhandler)
+    check(
+        f"rolling back from version {to_version} to {from_version} keeps all keys",
+        changed_keys() == list(),
+    )
+    check(
+        f"version {from_version} validates after rolling back",
+        zkhandler.schema.validate(zkhandler),
+    )
+finally:
+    zkhandler.disconnect()
+    root_zkhandler.zk_conn.delete(TEST_CHROOT, recursive=True)
+    root_zkhandler.disconnect()
+
+harness.finish()
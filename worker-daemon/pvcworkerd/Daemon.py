@@ -46,6 +46,7 @@ from daemon_lib.ceph import (
 )
 from daemon_lib.benchmark import (
     worker_run_benchmark,
+    worker_run_benchmark_client,
 )
 from daemon_lib.vmbuilder import (
     worker_create_vm,
@@ -102,12 +103,50 @@ def create_vm(
 
 
 @celery.task(name="storage.benchmark", bind=True, routing_key="run_on")
-def storage_benchmark(self, pool=None, name=None, run_on="primary"):
+def storage_benchmark(
+    self,
+    pool=None,
+    name=None,
+    profile=None,
+    matrix=None,
+    clients=None,
+    runtime=None,
+    run_on="primary",
+):
     @ZKConnection(config)
-    def run_storage_benchmark(zkhandler, self, pool, name):
-        return worker_run_benchmark(zkhandler, self, config, pool, name)
+    def run_storage_benchmark(
+        zkhandler, self, pool, name, profile, matrix, clients, runtime
+    ):
+        return worker_run_benchmark(
+            zkhandler,
+            self,
+            config,
+            pool,
+            name,
+            profile=profile,
+            matrix=matrix,
+            clients=clients,
+            runtime=runtime,
+        )
+
+    return run_storage_benchmark(self, pool, name, profile, matrix, clients, runtime)
 
-    return run_storage_benchmark(self, pool, name)
+
+@celery.task(name="storage.benchmark.client", bind=True, routing_key="run_on")
+def storage_benchmark_client(
+    self,
+    pool=None,
+    volume=None,
+    test=None,
+    test_spec=None,
+    runtime=None,
+    ramp_time=None,
+    start_at=None,
+    run_on="primary",
+):
+    return worker_run_benchmark_client(
+        self, config, pool, volume, test, test_spec, runtime, ramp_time, start_at
+    )
 
 
 @celery.task(name="cluster.autobackup", bind=True, routing_key="run_on")
@@ -173,12 +212,16 @@ def vm_device_detach(self, domain=None, xml=None, run_on=None):
 
 
 @celery.task(name="vm.create_snapshot", bind=True, routing_key="run_on")
-def vm_create_snapshot(self, domain=None, snapshot_name=None, run_on="primary"):
+def vm_create_snapshot(
+    self, domain=None, snapshot_name=None, fsfreeze=False, run_on="primary"
+):
     @ZKConnection(config)
-    def run_vm_create_snapshot(zkhandler, self, domain, snapshot_name):
-        return vm_worker_create_snapshot(zkhandler, self, domain, snapshot_name)
+    def run_vm_create_snapshot(zkhandler, self, domain, snapshot_name, fsfreeze):
+        return vm_worker_create_snapshot(
+            zkhandler, self, domain, snapshot_name, fsfreeze=fsfreeze
+        )
 
-    return run_vm_create_snapshot(self, domain, snapshot_name)
+    return run_vm_create_snapshot(self, domain, snapshot_name, fsfreeze)
 
 
 @celery.task(name="vm.remove_snapshot", bind=True, routing_key="run_on")
@@ -206,11 +249,18 @@ def vm_export_snapshot(
     snapshot_name=None,
     export_path=None,
     incremental_parent=None,
+    export_format="rbd",
     run_on="primary",
 ):
     @ZKConnection(config)
     def run_vm_export_snapshot(
-        zkhandler, self, domain, snapshot_name, export_path, incremental_parent=None
+        zkhandler,
+        self,
+        domain,
+        snapshot_name,
+        export_path,
+        incremental_parent=None,
+        export_format="rbd",
     ):
         return vm_worker_export_snapshot(
             zkhandler,
@@ -219,10 +269,16 @@ def vm_export_snapshot(
             snapshot_name,
             export_path,
             incremental_parent=incremental_parent,
+            export_format=export_format,
         )
 
     return run_vm_export_snapshot(
-        self, domain, snapshot_name, export_path, incremental_parent=incremental_parent
+        self,
+        domain,
+        snapshot_name,
+        export_path,
+        incremental_parent=incremental_parent,
+        export_format=export_format,
     )
 
 
@@ -233,11 +289,20 @@ def vm_import_snapshot(
     snapshot_name=None,
     import_path=None,
     retain_snapshot=True,
+    volume_concurrency=2,
+    bandwidth_limit=None,
     run_on="primary",
 ):
     @ZKConnection(config)
     def run_vm_import_snapshot(
-        zkhandler, self, domain, snapshot_name, import_path, retain_snapshot=True
+        zkhandler,
+        self,
+        domain,
+        snapshot_name,
+        import_path,
+        retain_snapshot=True,
+        volume_concurrency=2,
+        bandwidth_limit=None,
     ):
         return vm_worker_import_snapshot(
             zkhandler,
@@ -246,10 +311,18 @@ def vm_import_snapshot(
             snapshot_name,
             import_path,
             retain_snapshot=retain_snapshot,
+            volume_concurrency=volume_concurrency,
+            bandwidth_limit=bandwidth_limit,
         )
 
     return run_vm_import_snapshot(
-        self, domain, snapshot_name, import_path, retain_snapshot=retain_snapshot
+        self,
+        domain,
+        snapshot_name,
+        import_path,
+        retain_snapshot=retain_snapshot,
+        volume_concurrency=volume_concurrency,
+        bandwidth_limit=bandwidth_limit,
     )
 
 
@@ -263,6 +336,9 @@ def vm_send_snapshot(
     destination_api_verify_ssl=True,
     incremental_parent=None,
     destination_storage_pool=None,
+    compression="zstd",
+    volume_concurrency=2,
+    stream_concurrency=4,
     run_on="primary",
 ):
     @ZKConnection(config)
@@ -276,6 +352,9 @@ def vm_send_snapshot(
         destination_api_verify_ssl=True,
         incremental_parent=None,
         destination_storage_pool=None,
+        compression="zstd",
+        volume_concurrency=2,
+        stream_concurrency=4,
     ):
         return vm_worker_send_snapshot(
             zkhandler,
@@ -287,6 +366,9 @@ def vm_send_snapshot(
             destination_api_verify_ssl=destination_api_verify_ssl,
             incremental_parent=incremental_parent,
             destination_storage_pool=destination_storage_pool,
+            compression=compression,
+            volume_concurrency=volume_concurrency,
+            stream_concurrency=stream_concurrency,
         )
 
     return run_vm_send_snapshot(
@@ -298,6 +380,9 @@ def vm_send_snapshot(
         destination_api_verify_ssl=destination_api_verify_ssl,
         incremental_parent=incremental_parent,
         destination_storage_pool=destination_storage_pool,
+        compression=compression,
+        volume_concurrency=volume_concurrency,
+        stream_concurrency=stream_concurrency,
     )
 
 